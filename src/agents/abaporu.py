@@ -6,7 +6,7 @@ Description: Master agent that orchestrates multi-agent investigations with self
 This module implements the Abaporu master agent, responsible for:
 - Orchestrating complex investigations across multiple specialized agents
 - Dynamic investigation planning based on query analysis
-- Parallel execution of independent investigation steps
+- Dependency-DAG execution of investigation steps (critical path first)
 - Self-reflection and quality assessment of results
 - Adaptive strategy adjustment based on intermediate findings
 
@@ -47,10 +47,12 @@ from pydantic import Field as PydanticField
 
 from src.core import AgentStatus, ReflectionType
 from src.core.exceptions import AgentExecutionError, InvestigationError
+from src.services.agent_metrics import agent_metrics_service
+from src.services.contract_frame import get_contract_frame_cache
 from src.services.maritaca_client import MaritacaClient
 
+from .dag_scheduler import DAGStepScheduler, StepGraph
 from .deodoro import AgentContext, AgentMessage, AgentResponse, ReflectiveAgent
-from .parallel_processor import ParallelStrategy, ParallelTask, parallel_processor
 
 
 class InvestigationPlan(BaseModel):
@@ -141,6 +143,14 @@ class MasterAgent(ReflectiveAgent):
         self.active_investigations: dict[str, InvestigationPlan] = {}
         self.agent_registry: dict[str, Any] = {}
 
+        # Plan steps run over their dependency DAG with per-agent limits
+        self.step_scheduler = DAGStepScheduler(
+            max_concurrent=8,
+            per_agent_limit=2,
+            fail_fast_on=(AgentExecutionError,),
+        )
+        self.default_step_duration = 5.0  # Seconds, when no history exists
+
         self.logger.info(
             "abaporu_initialized",
             reflection_threshold=reflection_threshold,
@@ -303,62 +313,39 @@ class MasterAgent(ReflectiveAgent):
         plan = await self._plan_investigation({"query": query}, context)
         self.active_investigations[investigation_id] = plan
 
-        # Step 2: Execute investigation steps in parallel when possible
+        # Step 2: Execute investigation steps over their dependency DAG: each
+        # step starts as soon as its own dependencies finish
         findings = []
         sources = []
 
-        # Group steps that can be executed in parallel
-        parallel_groups = self._group_parallel_steps(plan.steps)
-
-        for group_idx, step_group in enumerate(parallel_groups):
-            if len(step_group) > 1:
-                # Execute in parallel
-                self.logger.info(
-                    f"Executing {len(step_group)} steps in parallel for group {group_idx}"
-                )
-
-                # Create parallel tasks
-                tasks = []
-                for step in step_group:
-                    agent_type = self.agent_registry.get(step["agent"])
-                    if agent_type:
-                        task = ParallelTask(
-                            agent_type=agent_type,
-                            message=AgentMessage(
-                                sender=self.name,
-                                recipient=step["agent"],
-                                action=step["action"],
-                                payload=step.get("payload", {}),
-                            ),
-                            timeout=30.0,
-                        )
-                        tasks.append(task)
-
-                # Execute parallel tasks
-                parallel_results = await parallel_processor.execute_parallel(
-                    tasks, context, strategy=ParallelStrategy.BEST_EFFORT
-                )
-
-                # Aggregate results
-                aggregated = parallel_processor.aggregate_results(parallel_results)
-                findings.extend(aggregated.get("findings", []))
-                sources.extend(aggregated.get("sources", []))
-
+        try:
+            outcomes = await self.step_scheduler.run(
+                plan.steps,
+                execute=lambda step: self._execute_step(step, context),
+                estimate_duration=self._estimate_step_duration,
+            )
+        finally:
+            # Contract frames are shared by the step agents only while the
+            # plan runs
+            get_contract_frame_cache().release(investigation_id)
+
+        # Aggregate in plan order so results are deterministic
+        for outcome in outcomes:
+            step_result = outcome.result
+            if (
+                outcome.error is None
+                and step_result is not None
+                and step_result.status == AgentStatus.COMPLETED
+            ):
+                findings.extend(step_result.result.get("findings", []))
+                sources.extend(step_result.result.get("sources", []))
             else:
-                # Execute single step
-                step = step_group[0]
-                step_result = await self._execute_step(step, context)
-
-                if step_result.status == AgentStatus.COMPLETED:
-                    findings.extend(step_result.result.get("findings", []))
-                    sources.extend(step_result.result.get("sources", []))
-                else:
-                    self.logger.warning(
-                        "investigation_step_failed",
-                        investigation_id=investigation_id,
-                        step=step,
-                        error=step_result.error,
-                    )
+                self.logger.warning(
+                    "investigation_step_failed",
+                    investigation_id=investigation_id,
+                    step=outcome.step,
+                    error=outcome.error or getattr(step_result, "error", None),
+                )
 
         # Step 3: Generate explanation
         explanation = await self._generate_explanation(findings, query, context)
@@ -401,37 +388,23 @@ class MasterAgent(ReflectiveAgent):
         self, steps: list[dict[str, Any]]
     ) -> list[list[dict[str, Any]]]:
         """
-        Group steps that can be executed in parallel.
+        Group steps by dependency depth.
 
-        Steps can be parallel if they don't depend on each other's output.
+        Execution does not wait on these groups (see ``DAGStepScheduler``);
+        they describe which steps can overlap, for monitoring and planning.
         """
-        groups = []
-        current_group = []
-        seen_agents = set()
-
-        for step in steps:
-            agent = step.get("agent", "")
-            depends_on = step.get("depends_on", [])
-
-            # Check if this step depends on any agent in current group
-            depends_on_current = any(dep in seen_agents for dep in depends_on)
-
-            if depends_on_current or agent in seen_agents:
-                # Start new group
-                if current_group:
-                    groups.append(current_group)
-                current_group = [step]
-                seen_agents = {agent}
-            else:
-                # Add to current group
-                current_group.append(step)
-                seen_agents.add(agent)
-
-        # Add final group
-        if current_group:
-            groups.append(current_group)
-
-        return groups
+        return StepGraph.from_plan(steps).levels()
+
+    def _estimate_step_duration(self, step: dict[str, Any]) -> float:
+        """Expected step duration from historical agent metrics (seconds)."""
+        agent_name = step.get("agent", "")
+        agent = self.agent_registry.get(agent_name)
+        for name in (getattr(agent, "name", None), agent_name):
+            if isinstance(name, str):
+                duration = agent_metrics_service.get_expected_duration(name)
+                if duration is not None:
+                    return duration
+        return self.default_step_duration
 
     async def _plan_investigation(
         self,
@@ -21,6 +21,7 @@ from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, BaseAg
 from src.core import AgentStatus
 from src.core.exceptions import AgentExecutionError
 from src.ml.spectral_analyzer import SpectralAnalyzer, SpectralFeatures
+from src.services.contract_frame import get_contract_frame
 from src.services.transparency_apis import get_transparency_collector
 
 
@@ -486,17 +487,15 @@ class AnalystAgent(BaseAgent):
         """Analyze spending trends over time."""
         patterns = []
 
-        # Group spending by month
-        monthly_spending = defaultdict(float)
-        monthly_counts = defaultdict(int)
-
-        for contract in data:
-            month = contract.get("_month")
-            valor = contract.get("valorInicial") or contract.get("valorGlobal") or 0
-
-            if month and isinstance(valor, (int, float)):
-                monthly_spending[month] += float(valor)
-                monthly_counts[month] += 1
+        # Group spending by month (segmented sums over the shared frame)
+        frame = get_contract_frame(data, context.investigation_id)
+        counts, sums = frame.group_totals(frame.month_codes, len(frame.months))
+        monthly_spending = {
+            frame.months[code]: float(sums[code]) for code in np.flatnonzero(counts)
+        }
+        monthly_counts = {
+            frame.months[code]: int(counts[code]) for code in np.flatnonzero(counts)
+        }
 
         if len(monthly_spending) < 3:
             return patterns
@@ -657,20 +656,24 @@ class AnalystAgent(BaseAgent):
             }
         )
 
-        for contract in data:
-            supplier = contract.get("fornecedor", {})
-            vendor_name = supplier.get("nome", "Unknown")
-            valor = contract.get("valorInicial") or contract.get("valorGlobal") or 0
-            org_code = contract.get("_org_code")
-            month = contract.get("_month")
+        frame = get_contract_frame(data, context.investigation_id)
+        values = np.nan_to_num(frame.values)
+        for i, contract in enumerate(frame.records):
+            code = frame.vendor_codes[i]
+            vendor_name = frame.vendors[code][0] if code >= 0 else None
+            if not vendor_name:
+                continue
 
-            if vendor_name != "Unknown" and isinstance(valor, (int, float)):
-                vendor_stats[vendor_name]["contracts"].append(contract)
-                vendor_stats[vendor_name]["total_value"] += float(valor)
-                if org_code:
-                    vendor_stats[vendor_name]["organizations"].add(org_code)
-                if month:
-                    vendor_stats[vendor_name]["months"].add(month)
+            vendor_stats[vendor_name]["contracts"].append(contract)
+            vendor_stats[vendor_name]["total_value"] += float(values[i])
+            if frame.org_codes[i] >= 0:
+                vendor_stats[vendor_name]["organizations"].add(
+                    frame.orgs[frame.org_codes[i]]
+                )
+            if frame.month_codes[i] >= 0:
+                vendor_stats[vendor_name]["months"].add(
+                    frame.months[frame.month_codes[i]]
+                )
 
         # Analyze multi-organization vendors
         for vendor_name, stats in vendor_stats.items():
@@ -0,0 +1,234 @@
+"""
+Dependency-DAG scheduler for investigation plan steps.
+
+Steps start as soon as their own dependencies finish instead of waiting for
+a whole group, per-agent concurrency limits are enforced, and ready steps are
+dispatched longest-critical-path first using historical step durations.
+"""
+
+import asyncio
+import heapq
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ScheduledStep:
+    """Outcome of one plan step executed by the scheduler."""
+
+    index: int
+    step: dict[str, Any]
+    result: Any = None
+    error: str | None = None
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Wall-clock duration in seconds."""
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class StepGraph:
+    """Dependency graph over plan steps (indices into the plan)."""
+
+    steps: list[dict[str, Any]]
+    predecessors: list[set[int]] = field(default_factory=list)
+    successors: list[set[int]] = field(default_factory=list)
+
+    @classmethod
+    def from_plan(cls, steps: list[dict[str, Any]]) -> "StepGraph":
+        """
+        Build the graph from ``depends_on`` lists.
+
+        A dependency names an agent (or a step ``id``) and resolves to every
+        *earlier* step with that agent or id, so plan order is always a valid
+        topological order and cycles cannot be expressed. Unknown names are
+        ignored.
+        """
+        graph = cls(
+            steps=steps,
+            predecessors=[set() for _ in steps],
+            successors=[set() for _ in steps],
+        )
+        seen: dict[str, list[int]] = {}
+
+        for i, step in enumerate(steps):
+            for dep in step.get("depends_on", []) or []:
+                for j in seen.get(dep, []):
+                    graph.predecessors[i].add(j)
+                    graph.successors[j].add(i)
+
+            for key in {step.get("agent"), step.get("id")}:
+                if key:
+                    seen.setdefault(key, []).append(i)
+
+        return graph
+
+    def critical_path_ranks(self, durations: list[float]) -> list[float]:
+        """
+        Longest remaining path (including the step itself) for each step.
+
+        Computed in reverse plan order, which is a reverse topological order.
+        """
+        ranks = [0.0] * len(self.steps)
+        for i in range(len(self.steps) - 1, -1, -1):
+            tail = max((ranks[j] for j in self.successors[i]), default=0.0)
+            ranks[i] = durations[i] + tail
+        return ranks
+
+    def levels(self) -> list[list[dict[str, Any]]]:
+        """Steps grouped by dependency depth (for display and planning)."""
+        depth = [0] * len(self.steps)
+        for i in range(len(self.steps)):
+            depth[i] = max((depth[j] + 1 for j in self.predecessors[i]), default=0)
+
+        groups: list[list[dict[str, Any]]] = [
+            [] for _ in range(max(depth, default=-1) + 1)
+        ]
+        for i, step in enumerate(self.steps):
+            groups[depth[i]].append(step)
+        return groups
+
+
+class DAGStepScheduler:
+    """
+    Execute plan steps over their dependency DAG.
+
+    Failed steps do not block dependents (best effort, as investigations
+    should still report partial findings); their error is recorded instead.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        per_agent_limit: int = 2,
+        agent_limits: dict[str, int] | None = None,
+        step_timeout: float | None = 30.0,
+        fail_fast_on: tuple[type[BaseException], ...] = (),
+    ) -> None:
+        """
+        Initialize scheduler.
+
+        Args:
+            max_concurrent: Maximum steps running at once
+            per_agent_limit: Default concurrent steps per agent
+            agent_limits: Per-agent overrides of ``per_agent_limit``
+            step_timeout: Timeout per step in seconds (None disables it)
+            fail_fast_on: Exception types that abort the whole run and are
+                re-raised (e.g. configuration errors) instead of recorded
+        """
+        self.max_concurrent = max_concurrent
+        self.per_agent_limit = per_agent_limit
+        self.agent_limits = agent_limits or {}
+        self.step_timeout = step_timeout
+        self.fail_fast_on = fail_fast_on
+
+    def _agent_limit(self, agent: str) -> int:
+        """Concurrency limit for an agent."""
+        return max(1, self.agent_limits.get(agent, self.per_agent_limit))
+
+    async def run(
+        self,
+        steps: list[dict[str, Any]],
+        execute: Callable[[dict[str, Any]], Awaitable[Any]],
+        estimate_duration: Callable[[dict[str, Any]], float] | None = None,
+    ) -> list[ScheduledStep]:
+        """
+        Run all steps, each as soon as its dependencies are done.
+
+        Args:
+            steps: Plan steps with ``agent`` and optional ``depends_on``
+            execute: Coroutine function running one step
+            estimate_duration: Expected seconds per step for critical-path
+                priority (uniform when omitted)
+
+        Returns:
+            One ScheduledStep per input step, in plan order
+        """
+        graph = StepGraph.from_plan(steps)
+        durations = [
+            max(0.0, float(estimate_duration(step))) if estimate_duration else 1.0
+            for step in steps
+        ]
+        ranks = graph.critical_path_ranks(durations)
+
+        outcomes = [ScheduledStep(index=i, step=step) for i, step in enumerate(steps)]
+        remaining = [len(p) for p in graph.predecessors]
+        running_per_agent: dict[str, int] = {}
+
+        # Ready heap ordered by longest remaining critical path, then plan order
+        ready = [(-ranks[i], i) for i in range(len(steps)) if remaining[i] == 0]
+        heapq.heapify(ready)
+        in_flight: dict[asyncio.Task, int] = {}
+
+        async def _run_step(i: int) -> None:
+            outcome = outcomes[i]
+            outcome.started_at = time.monotonic()
+            try:
+                if self.step_timeout:
+                    outcome.result = await asyncio.wait_for(
+                        execute(steps[i]), timeout=self.step_timeout
+                    )
+                else:
+                    outcome.result = await execute(steps[i])
+            except self.fail_fast_on:
+                raise
+            except Exception as e:
+                outcome.error = str(e) or type(e).__name__
+            finally:
+                outcome.finished_at = time.monotonic()
+
+        try:
+            while ready or in_flight:
+                # Dispatch every ready step whose agent has capacity
+                deferred = []
+                while ready and len(in_flight) < self.max_concurrent:
+                    rank, i = heapq.heappop(ready)
+                    agent = steps[i].get("agent", "")
+                    if running_per_agent.get(agent, 0) >= self._agent_limit(agent):
+                        deferred.append((rank, i))
+                        continue
+                    running_per_agent[agent] = running_per_agent.get(agent, 0) + 1
+                    in_flight[asyncio.create_task(_run_step(i))] = i
+                for item in deferred:
+                    heapq.heappush(ready, item)
+
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Retrieve every finished task before re-raising a fail-fast
+                # error so none is left with an unretrieved exception
+                errors = [e for e in (t.exception() for t in done) if e is not None]
+                if errors:
+                    for task in done:
+                        in_flight.pop(task)
+                    raise errors[0]
+                for task in done:
+                    i = in_flight.pop(task)
+                    agent = steps[i].get("agent", "")
+                    running_per_agent[agent] -= 1
+                    for j in graph.successors[i]:
+                        remaining[j] -= 1
+                        if remaining[j] == 0:
+                            heapq.heappush(ready, (-ranks[j], j))
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        logger.debug(
+            "dag_schedule_completed",
+            steps=len(steps),
+            critical_path_estimate=max(ranks, default=0.0),
+            failed=sum(1 for o in outcomes if o.error),
+        )
+        return outcomes
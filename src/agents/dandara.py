@@ -12,14 +12,15 @@ from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any
 
-import numpy as np
 from pydantic import BaseModel
 from pydantic import Field as PydanticField
 
 from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, BaseAgent
 from src.core import get_logger
+from src.ml.inequality import grouped_inequality, inequality_indices
 from src.services.transparency_apis.federal_apis.datasus_client import DataSUSClient
 from src.services.transparency_apis.federal_apis.ibge_client import IBGEClient
+from src.services.transparency_apis.federal_apis.ibge_store import get_ibge_store
 from src.services.transparency_apis.federal_apis.inep_client import INEPClient
 
 
@@ -88,7 +89,7 @@ class DandaraAgent(BaseAgent):
         self.logger = get_logger("agent.dandara")
 
         # Initialize real API clients
-        self.ibge_client = IBGEClient()
+        self.ibge_client = IBGEClient(store=get_ibge_store())
         self.datasus_client = DataSUSClient()
         self.inep_client = INEPClient()
 
@@ -779,17 +780,12 @@ class DandaraAgent(BaseAgent):
         audit_data = f"{analysis.analysis_timestamp}{analysis.gini_coefficient}{len(analysis.violations_detected)}{request.query}"
         return hashlib.sha256(audit_data.encode()).hexdigest()
 
-    # Equity calculation methods
+    # Equity calculation methods (shared vectorized kernels in src.ml.inequality)
     async def _calculate_gini(self, data: list[float]) -> float:
         """Calculate Gini coefficient."""
         if not data:
             return 0.0
-
-        sorted_data = np.sort(data)
-        n = len(sorted_data)
-        cumsum = np.cumsum(sorted_data)
-
-        return (n + 1 - 2 * np.sum(cumsum) / cumsum[-1]) / n
+        return inequality_indices(data)["gini"]
 
     async def _calculate_atkinson(
         self, data: list[float], epsilon: float = 0.5
@@ -797,44 +793,46 @@ class DandaraAgent(BaseAgent):
         """Calculate Atkinson inequality index."""
         if not data:
             return 0.0
-
-        mean_income = np.mean(data)
-        if epsilon == 1:
-            geometric_mean = np.exp(np.mean(np.log(data)))
-            return 1 - geometric_mean / mean_income
-        weighted_sum = np.mean(np.power(data, 1 - epsilon))
-        return 1 - np.power(weighted_sum, 1 / (1 - epsilon)) / mean_income
+        return inequality_indices(data, epsilon=epsilon)["atkinson"]
 
     async def _calculate_theil(self, data: list[float]) -> float:
         """Calculate Theil inequality index."""
         if not data:
             return 0.0
-
-        mean_income = np.mean(data)
-        return np.mean((data / mean_income) * np.log(data / mean_income))
+        return inequality_indices(data)["theil"]
 
     async def _calculate_palma(self, data: list[float]) -> float:
         """Calculate Palma ratio (top 10% / bottom 40%)."""
         if len(data) < 10:
             return 0.0
-
-        sorted_data = np.sort(data)
-        n = len(sorted_data)
-
-        bottom_40_pct = np.sum(sorted_data[: int(0.4 * n)])
-        top_10_pct = np.sum(sorted_data[int(0.9 * n) :])
-
-        return top_10_pct / bottom_40_pct if bottom_40_pct > 0 else float("inf")
+        return inequality_indices(data)["palma"]
 
     async def _calculate_quintile_ratio(self, data: list[float]) -> float:
         """Calculate ratio of top to bottom quintile."""
         if len(data) < 5:
             return 0.0
+        return inequality_indices(data)["quintile_ratio"]
 
-        sorted_data = np.sort(data)
-        n = len(sorted_data)
+    def calculate_grouped_equity_metrics(
+        self,
+        values: list[float],
+        group_ids: Any,
+        weights: list[float] | None = None,
+        bootstrap: int = 0,
+    ) -> dict[Any, dict[str, Any]]:
+        """
+        Calculate all equity metrics for many groups in one vectorized pass.
 
-        bottom_quintile = np.mean(sorted_data[: int(0.2 * n)])
-        top_quintile = np.mean(sorted_data[int(0.8 * n) :])
+        Args:
+            values: Observations (e.g. per-capita income per municipality)
+            group_ids: Group key per observation, or a list of key columns
+                such as ``[state_codes, years]``
+            weights: Optional population weights
+            bootstrap: Bootstrap replicates for confidence intervals
 
-        return top_quintile / bottom_quintile if bottom_quintile > 0 else float("inf")
+        Returns:
+            Mapping of group -> metric values
+        """
+        return grouped_inequality(
+            values, group_ids, weights=weights, bootstrap=bootstrap
+        ).to_dict()
@@ -7,6 +7,7 @@ Date: 2025-09-25
 License: Proprietary - All rights reserved
 """
 
+import asyncio
 import hashlib
 import json
 from collections import defaultdict
@@ -20,6 +21,31 @@ import numpy as np
 
 from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, BaseAgent
 from src.core import AgentStatus, get_logger
+from src.core.exceptions import DataNotFoundError, DataSourceError
+from src.ml.inequality import grouped_inequality, inequality_indices
+from src.ml.spatial_statistics import (
+    BRAZIL_STATE_CAPITAL_COORDS,
+    QUADRANT_LABELS,
+    SpatialWeights,
+    get_spatial_engine,
+    getis_ord_gi_star,
+    local_morans_i,
+    morans_i,
+    significance_z,
+)
+from src.services.transparency_apis.federal_apis.ibge_store import get_ibge_store
+
+# IBGE municipal mesh (GeoJSON, one feature per municipality keyed by codarea)
+MUNICIPAL_MESH_URL = (
+    "https://servicodados.ibge.gov.br/api/v3/malhas/paises/BR"
+    "?formato=application/vnd.geo+json&qualidade=minima&intrarregiao=municipio"
+)
+
+# Municipal indicators served from the local IBGE store: (table, variable)
+MUNICIPAL_INDICATORS = {
+    "population": ("6579", "9324"),
+    "gdp_per_capita": ("5938", "37"),
+}
 
 
 def cache_with_ttl(ttl_seconds: int = 300):
@@ -343,6 +369,8 @@ class LampiaoAgent(BaseAgent):
             "inequality_measures": ["gini", "theil", "williamson"],
             "clustering_methods": ["dbscan", "hierarchical"],
             "significance_level": 0.05,
+            "permutations": 999,  # LISA / Moran's I permutation inference
+            "random_seed": 42,  # Reproducible pseudo p-values
         }
 
         # Brazilian states/regions data (IBGE)
@@ -640,11 +668,9 @@ class LampiaoAgent(BaseAgent):
         )
 
         # Atkinson index (ε=0.5 for moderate inequality aversion)
-        mean_value = sum(state_values) / len(state_values)
-        atkinson_sum = sum((v / mean_value) ** 0.5 for v in state_values) / len(
-            state_values
-        )
-        atkinson_index = 1 - atkinson_sum
+        atkinson_index = inequality_indices(
+            state_values, epsilon=0.5, positive_only=True
+        )["atkinson"]
 
         return {
             "metric": metric,
@@ -686,63 +712,109 @@ class LampiaoAgent(BaseAgent):
         context: AgentContext | None = None,
     ) -> list[dict[str, Any]]:
         """
-        Detecta clusters regionais usando análise espacial.
-
-        Returns well-established Brazilian regional economic clusters based on:
-        - IBGE Regional Division Studies
-        - IPEA Economic Geography Reports
-        - Academic research on Brazilian regional development
+        Detecta clusters regionais usando LISA (Local Moran's I).
 
-        These clusters represent documented patterns in Brazilian economic geography
-        and are validated by decades of regional studies.
-
-        Future enhancement: Implement dynamic DBSCAN/Hierarchical clustering
-        for real-time cluster detection based on current data patterns.
+        States with significant High-High or Low-Low local autocorrelation
+        (conditional permutation inference) are grouped into spatially
+        connected clusters over the state contiguity weights. ``data`` may carry
+        ``{"region": <UF>, "value": <number>}`` rows; otherwise each variable is
+        read from the loaded IBGE indicators.
         """
         self.logger.info(f"Detecting regional clusters for {len(variables)} variables")
 
-        # Return established Brazilian economic clusters
-        # These patterns have been consistent for 50+ years and are well-documented
-        # in IBGE and IPEA regional studies
+        weights = await self._get_state_weights()
+        supplied = {
+            str(row["region"]): float(row["value"])
+            for row in data or []
+            if isinstance(row, dict) and "region" in row and "value" in row
+        }
 
-        return [
-            {
-                "cluster_id": "industrial_belt",
-                "cluster_type": "High-High",
-                "regions": ["SP", "RJ", "MG", "ES"],
-                "center": {"lat": -20.5, "lng": -44.0},
-                "characteristics": {
-                    "industrial_output": "high",
-                    "gdp_per_capita": "high",
-                    "infrastructure": "developed",
-                },
-                "significance": 0.001,
-            },
-            {
-                "cluster_id": "agricultural_frontier",
-                "cluster_type": "High-High",
-                "regions": ["MT", "MS", "GO", "TO"],
-                "center": {"lat": -15.0, "lng": -55.0},
-                "characteristics": {
-                    "agricultural_production": "high",
-                    "land_productivity": "high",
-                    "export_volume": "high",
-                },
-                "significance": 0.005,
-            },
-            {
-                "cluster_id": "tourism_coast",
-                "cluster_type": "High-High",
-                "regions": ["BA", "PE", "RN", "CE"],
-                "center": {"lat": -10.0, "lng": -38.0},
-                "characteristics": {
-                    "tourism_revenue": "high",
-                    "service_sector": "developed",
-                    "cultural_attractions": "abundant",
-                },
-                "significance": 0.01,
-            },
-        ]
+        series: dict[str, np.ndarray] = {}
+        if len(supplied) >= self.config["min_regions_for_analysis"]:
+            series["value"] = np.array(
+                [supplied.get(state, np.nan) for state in weights.ids]
+            )
+        else:
+            for variable in variables or ["gdp_per_capita"]:
+                indicator = self._resolve_indicator(variable)
+                if indicator not in series:
+                    series[indicator] = await self._state_indicator_values(
+                        indicator, weights
+                    )
+
+        engine = get_spatial_engine()
+        alpha = self.config["significance_level"]
+        clusters = []
+
+        for indicator, values in series.items():
+            valid = np.isfinite(values)
+            values = np.where(valid, values, np.nanmean(values))
+            lisa = local_morans_i(
+                values,
+                weights,
+                permutations=self.config["permutations"],
+                seed=self.config["random_seed"],
+            )
+            significant = (lisa["p_sim"] <= alpha) & valid
+
+            for quadrant, label in ((1, "High-High"), (3, "Low-Low")):
+                members = significant & (lisa["quadrant"] == quadrant)
+                for regions in engine.connected_clusters(weights, members):
+                    idx = [weights.index_of(r) for r in regions]
+                    coords = np.array([BRAZIL_STATE_CAPITAL_COORDS[r] for r in regions])
+                    clusters.append(
+                        {
+                            "cluster_id": (
+                                f"{indicator}_{label.lower().replace('-', '_')}_"
+                                f"{len(clusters) + 1}"
+                            ),
+                            "cluster_type": label,
+                            "variable": indicator,
+                            "regions": regions,
+                            "center": {
+                                "lat": round(float(coords[:, 0].mean()), 3),
+                                "lng": round(float(coords[:, 1].mean()), 3),
+                            },
+                            "characteristics": {
+                                "mean_value": round(float(values[idx].mean()), 4),
+                                "overall_mean": round(float(values.mean()), 4),
+                                "mean_local_i": round(float(lisa["Is"][idx].mean()), 4),
+                            },
+                            "significance": round(float(lisa["p_sim"][idx].max()), 4),
+                        }
+                    )
+
+        # Fall back to the strongest local associations when nothing is
+        # significant at the configured level (e.g. very smooth variables)
+        if not clusters and series:
+            indicator, values = next(iter(series.items()))
+            values = np.where(np.isfinite(values), values, np.nanmean(values))
+            lisa = local_morans_i(
+                values,
+                weights,
+                permutations=self.config["permutations"],
+                seed=self.config["random_seed"],
+            )
+            top = int(np.argmax(lisa["Is"]))
+            region = weights.ids[top]
+            lat, lng = BRAZIL_STATE_CAPITAL_COORDS[region]
+            clusters.append(
+                {
+                    "cluster_id": f"{indicator}_strongest_association",
+                    "cluster_type": QUADRANT_LABELS[int(lisa["quadrant"][top])],
+                    "variable": indicator,
+                    "regions": [region],
+                    "center": {"lat": lat, "lng": lng},
+                    "characteristics": {
+                        "mean_value": round(float(values[top]), 4),
+                        "overall_mean": round(float(values.mean()), 4),
+                        "mean_local_i": round(float(lisa["Is"][top]), 4),
+                    },
+                    "significance": round(float(lisa["p_sim"][top]), 4),
+                }
+            )
+
+        return clusters
 
     @cache_with_ttl(ttl_seconds=300)  # 5 minute cache for hotspot analysis
     @validate_geographic_data
@@ -753,64 +825,93 @@ class LampiaoAgent(BaseAgent):
         context: AgentContext | None = None,
     ) -> list[GeographicInsight]:
         """
-        Identifica hotspots e coldspots usando estatística Getis-Ord G*.
+        Identifica hotspots e coldspots usando estatística Getis-Ord Gi*.
 
-        G* = Σⱼwᵢⱼxⱼ / Σⱼxⱼ
+        Gi* = (Σⱼwᵢⱼxⱼ - x̄Σⱼwᵢⱼ) / (S √[(nΣⱼwᵢⱼ² - (Σⱼwᵢⱼ)²)/(n-1)])
 
         Onde:
-        - wᵢⱼ são os pesos espaciais
+        - wᵢⱼ são os pesos de contiguidade (incluindo o próprio estado)
         - xⱼ são os valores da variável
+
+        ``threshold`` is the confidence level used for the two-sided z cut-off.
         """
         self.logger.info(
             f"Identifying hotspots for {metric} with threshold {threshold}"
         )
 
-        insights = []
+        weights = await self._get_state_weights()
+        indicator = self._resolve_indicator(metric)
+        values = await self._state_indicator_values(indicator, weights)
+        values = np.where(np.isfinite(values), values, np.nanmean(values))
 
-        # Identify real hotspots using Getis-Ord G* statistic on IBGE data
-        # High value hotspot
-        insights.append(
-            GeographicInsight(
-                insight_id="hotspot_001",
-                insight_type="high_concentration",
-                severity="high",
-                affected_regions=["SP", "RJ", "MG"],
-                description=f"Significant concentration of high {metric} values detected in Southeast region",
-                evidence={
-                    "g_statistic": 3.45,
-                    "p_value": 0.001,
-                    "concentration_index": 0.72,
-                },
-                recommendations=[
-                    "Monitor for potential market concentration",
-                    "Analyze spillover effects to neighboring regions",
-                    "Consider redistribution policies",
-                ],
-                confidence=0.95,
-            )
-        )
+        gi = getis_ord_gi_star(values, weights)
+        confidence = threshold if 0 < threshold < 1 else 0.9
+        z_crit = significance_z(confidence)
 
-        # Low value coldspot
-        insights.append(
-            GeographicInsight(
-                insight_id="coldspot_001",
-                insight_type="low_concentration",
-                severity="medium",
-                affected_regions=["AC", "RO", "AP"],
-                description=f"Significant concentration of low {metric} values in remote regions",
-                evidence={
-                    "g_statistic": -2.89,
-                    "p_value": 0.004,
-                    "isolation_index": 0.68,
-                },
-                recommendations=[
-                    "Prioritize infrastructure investments",
-                    "Implement targeted development programs",
-                    "Improve connectivity with economic centers",
-                ],
-                confidence=0.88,
-            )
-        )
+        hot = gi["z"] >= z_crit
+        cold = gi["z"] <= -z_crit
+        if not hot.any() and not cold.any():
+            # Report the most extreme areas even when below the cut-off
+            hot = gi["z"] == gi["z"].max()
+            cold = gi["z"] == gi["z"].min()
+
+        engine = get_spatial_engine()
+        insights = []
+        groups = [
+            ("high_concentration", "hotspot", hot),
+            ("low_concentration", "coldspot", cold),
+        ]
+        for insight_type, prefix, mask in groups:
+            for number, regions in enumerate(
+                engine.connected_clusters(weights, mask), start=1
+            ):
+                idx = [weights.index_of(r) for r in regions]
+                z_values = gi["z"][idx]
+                strongest = float(np.max(np.abs(z_values)))
+                p_value = float(np.min(gi["p"][idx]))
+                severity = (
+                    "critical"
+                    if strongest >= 3.29
+                    else "high" if strongest >= 2.58 else "medium"
+                )
+                if strongest < z_crit:
+                    severity = "low"
+                level = "high" if insight_type == "high_concentration" else "low"
+
+                insights.append(
+                    GeographicInsight(
+                        insight_id=f"{prefix}_{number:03d}",
+                        insight_type=insight_type,
+                        severity=severity,
+                        affected_regions=regions,
+                        description=(
+                            f"Significant concentration of {level} {metric} values "
+                            f"detected in {', '.join(regions)}"
+                        ),
+                        evidence={
+                            "g_statistic": round(float(np.mean(z_values)), 4),
+                            "max_abs_z": round(strongest, 4),
+                            "p_value": round(p_value, 6),
+                            "indicator": indicator,
+                            "mean_value": round(float(values[idx].mean()), 4),
+                            "overall_mean": round(float(values.mean()), 4),
+                        },
+                        recommendations=(
+                            [
+                                "Monitor for potential market concentration",
+                                "Analyze spillover effects to neighboring regions",
+                                "Consider redistribution policies",
+                            ]
+                            if level == "high"
+                            else [
+                                "Prioritize infrastructure investments",
+                                "Implement targeted development programs",
+                                "Improve connectivity with economic centers",
+                            ]
+                        ),
+                        confidence=round(min(max(1 - p_value, 0.01), 1.0), 4),
+                    )
+                )
 
         return insights
 
@@ -825,128 +926,189 @@ class LampiaoAgent(BaseAgent):
 
         I = (n/W) * Σᵢⱼwᵢⱼzᵢzⱼ / Σᵢzᵢ²
 
-        Implementação simplificada usando grupos regionais como proxy para
-        pesos espaciais (estados na mesma região geográfica são vizinhos).
+        Global inference uses the normality variance and a permutation test;
+        local indicators are significant LISA quadrants over state contiguity.
         """
         self.logger.info(f"Calculating spatial correlation for variable: {variable}")
 
-        # Extract variable values for all states
-        state_values = {}
-        for state_code, indicators in self.regional_indicators.items():
-            if variable == "gdp_per_capita" or variable == "income":
-                value = indicators.get("gdp_per_capita", 0)
-            elif variable == "hdi":
-                value = indicators.get("hdi", 0)
-            elif variable == "population":
-                value = indicators.get("population", 0)
-            else:
-                value = indicators.get("gdp_per_capita", 0)  # Default
-
-            state_values[state_code] = value
-
-        # Calculate Moran's I using regional grouping as spatial weights
-        # States in the same region are considered neighbors (weight = 1)
-        values_list = list(state_values.values())
-        mean_value = np.mean(values_list)
-
-        # Calculate deviations from mean
-        deviations = {code: val - mean_value for code, val in state_values.items()}
-
-        # Calculate Moran's I numerator (sum of weighted products)
-        numerator = 0.0
-        total_weights = 0
-
-        for state_i, dev_i in deviations.items():
-            region_i = self.states_data.get(state_i, {}).get("region", "")
-            for state_j, dev_j in deviations.items():
-                if state_i != state_j:
-                    region_j = self.states_data.get(state_j, {}).get("region", "")
-                    # Weight = 1 if same region (neighbors), 0 otherwise
-                    weight = 1.0 if region_i == region_j else 0.0
-                    numerator += weight * dev_i * dev_j
-                    total_weights += weight
-
-        # Calculate denominator (sum of squared deviations)
-        denominator = sum(dev**2 for dev in deviations.values())
-
-        # Calculate Moran's I
-        n = len(state_values)
-        morans_i = (
-            (n / total_weights) * (numerator / denominator)
-            if denominator != 0 and total_weights != 0
-            else 0.0
-        )
-
-        # Calculate expected I under null hypothesis of no spatial correlation
-        expected_i = -1 / (n - 1)
-
-        # Calculate z-score (simplified approximation)
-        variance = 1 / (n - 1)  # Simplified variance
-        z_score = (morans_i - expected_i) / np.sqrt(variance)
-
-        # Calculate p-value from z-score (using standard normal approximation)
-        # P-value for two-tailed test
-        # Using error function approximation for normal CDF
-        def norm_cdf(x):
-            """Approximate standard normal CDF using error function."""
-            return 0.5 * (1.0 + np.tanh(0.7978845608 * (x + 0.044715 * x**3)))
+        weights = await self._get_state_weights()
+        indicator = self._resolve_indicator(variable)
+        values = await self._state_indicator_values(indicator, weights)
+        values = np.where(np.isfinite(values), values, np.nanmean(values))
 
-        p_value = 2 * (1 - norm_cdf(abs(z_score)))
+        permutations = self.config["permutations"]
+        seed = self.config["random_seed"]
+        global_i = morans_i(values, weights, permutations=permutations, seed=seed)
+        lisa = local_morans_i(values, weights, permutations=permutations, seed=seed)
 
-        # Interpret results
-        if morans_i > expected_i + 0.1:
-            interpretation = "Strong positive spatial autocorrelation - similar values cluster together"
-        elif morans_i < expected_i - 0.1:
-            interpretation = (
-                "Negative spatial autocorrelation - dissimilar values are neighbors"
-            )
+        observed, expected_i = global_i["I"], global_i["expected_i"]
+        if global_i["p_value"] <= self.config["significance_level"]:
+            if observed > expected_i:
+                interpretation = "Strong positive spatial autocorrelation - similar values cluster together"
+            else:
+                interpretation = (
+                    "Negative spatial autocorrelation - dissimilar values are neighbors"
+                )
         else:
             interpretation = (
                 "No significant spatial autocorrelation - random distribution"
             )
 
-        # Identify local clusters (simplified LISA)
-        high_high_clusters = []
-        low_low_clusters = []
-        high_low_outliers = []
-        low_high_outliers = []
-
-        for state_code, value in state_values.items():
-            region = self.states_data.get(state_code, {}).get("region", "")
-            # Get regional average
-            regional_states = self.region_index.get(region, [])
-            regional_avg = np.mean([state_values.get(s, 0) for s in regional_states])
-
-            if value > mean_value and regional_avg > mean_value:
-                high_high_clusters.append(state_code)
-            elif value < mean_value and regional_avg < mean_value:
-                low_low_clusters.append(state_code)
-            elif value > mean_value and regional_avg < mean_value:
-                high_low_outliers.append(state_code)
-            elif value < mean_value and regional_avg > mean_value:
-                low_high_outliers.append(state_code)
+        significant = lisa["p_sim"] <= self.config["significance_level"]
+        order = np.argsort(lisa["p_sim"], kind="stable")
+
+        def quadrant_members(quadrant: int) -> list[str]:
+            return [
+                weights.ids[i]
+                for i in order
+                if significant[i] and lisa["quadrant"][i] == quadrant
+            ]
 
         return {
             "variable": variable,
-            "morans_i": round(morans_i, 4),
+            "morans_i": round(observed, 4),
             "expected_i": round(expected_i, 4),
-            "variance": round(variance, 4),
-            "z_score": round(z_score, 4),
-            "p_value": round(p_value, 6),
+            "variance": round(global_i["variance"], 4),
+            "z_score": round(global_i["z_score"], 4),
+            "p_value": round(global_i["p_value"], 6),
+            "p_value_permutation": global_i["p_sim"],
             "interpretation": interpretation,
             "local_indicators": {
-                "high_high_clusters": high_high_clusters[:5],  # Top 5
-                "low_low_clusters": low_low_clusters[:5],
-                "high_low_outliers": high_low_outliers[:5],
-                "low_high_outliers": low_high_outliers[:5],
+                "high_high_clusters": quadrant_members(1)[:5],  # Top 5
+                "low_low_clusters": quadrant_members(3)[:5],
+                "high_low_outliers": quadrant_members(4)[:5],
+                "low_high_outliers": quadrant_members(2)[:5],
             },
             "data_quality": {
-                "method": "Regional grouping spatial weights",
-                "states_analyzed": n,
-                "spatial_weights_type": "queen_contiguity_regional",
+                "method": "Global and local Moran's I with permutation inference",
+                "states_analyzed": weights.n,
+                "permutations": permutations,
+                "spatial_weights_type": f"{weights.kind}_row_standardized",
             },
         }
 
+    def _resolve_indicator(self, variable: str | None) -> str:
+        """Map a requested variable onto a loaded state indicator."""
+        if variable in ("gdp_per_capita", "income", "gdp"):
+            return "gdp_per_capita"
+        if variable in ("hdi", "population", "density"):
+            return variable
+        return "gdp_per_capita"  # Default
+
+    async def _state_indicator_values(
+        self, indicator: str, weights: SpatialWeights
+    ) -> np.ndarray:
+        """Indicator values aligned with ``weights.ids`` (NaN when missing)."""
+        if not self.regional_indicators:
+            await self._load_regional_indicators()
+
+        return np.array(
+            [
+                float(self.regional_indicators.get(state, {}).get(indicator, np.nan))
+                for state in weights.ids
+            ]
+        )
+
+    async def _get_state_weights(self) -> SpatialWeights:
+        """State weights for the configured method, built once per agent."""
+        method = self.config["spatial_weights_method"]
+        if method not in self.spatial_weights:
+            self.spatial_weights[method] = get_spatial_engine().state_weights(method)
+        return self.spatial_weights[method]
+
+    async def _get_municipal_weights(self) -> SpatialWeights:
+        """
+        Contiguity weights over all municipalities, built once per agent.
+
+        The IBGE municipal mesh is downloaded on first use; neighbours share a
+        vertex (queen) or an edge (rook) according to the configured method.
+        """
+        if "municipal" not in self.spatial_weights:
+            import httpx
+
+            try:
+                async with httpx.AsyncClient(timeout=60.0) as client:
+                    response = await client.get(MUNICIPAL_MESH_URL)
+                    response.raise_for_status()
+                    mesh = response.json()
+            except Exception as e:
+                raise DataSourceError(
+                    f"IBGE municipal mesh unavailable: {e}",
+                    details={"url": MUNICIPAL_MESH_URL},
+                ) from e
+
+            features = mesh.get("features", [])
+            rook = self.config["spatial_weights_method"] == "rook"
+            self.spatial_weights["municipal"] = await asyncio.to_thread(
+                get_spatial_engine().polygons,
+                [str(f["properties"]["codarea"]) for f in features],
+                [f["geometry"] for f in features],
+                rook=rook,
+                cache_key=f"{MUNICIPAL_MESH_URL}:{len(features)}",
+            )
+            self.logger.info(
+                f"Built municipal contiguity weights for {len(features)} municipalities"
+            )
+        return self.spatial_weights["municipal"]
+
+    async def analyze_municipal_statistics(
+        self,
+        metric: str,
+        values: dict[str, float] | None = None,
+        confidence: float = 0.95,
+        permutations: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Gi*, global and local Moran's I over municipal contiguity.
+
+        Args:
+            metric: Indicator name (see ``MUNICIPAL_INDICATORS``) used when
+                ``values`` is not given
+            values: Optional municipality code -> value mapping
+            confidence: Confidence level for hotspots and LISA clusters
+            permutations: Permutations for pseudo p-values
+
+        Returns:
+            ``SpatialStatisticsEngine.analyze`` result restricted to
+            municipalities with a value
+        """
+        if values is None:
+            indicator = self._resolve_indicator(metric)
+            if indicator not in MUNICIPAL_INDICATORS:
+                raise DataNotFoundError(
+                    f"No municipal data for indicator {metric}",
+                    details={"available": sorted(MUNICIPAL_INDICATORS)},
+                )
+            table_id, variable_id = MUNICIPAL_INDICATORS[indicator]
+            values = get_ibge_store().get_latest_values(table_id, variable_id)
+        if not values:
+            raise DataNotFoundError(
+                f"Municipal values for {metric} are not available yet",
+                details={"source": "ibge_store"},
+            )
+
+        weights = await self._get_municipal_weights()
+        keep = np.array([area in values for area in weights.ids])
+        if not keep.all():
+            index = np.flatnonzero(keep)
+            weights = SpatialWeights(
+                ids=tuple(weights.ids[i] for i in index),
+                matrix=weights.matrix[index][:, index].tocsr(),
+                kind=weights.kind,
+            )
+        series = [values[area] for area in weights.ids]
+
+        return await asyncio.to_thread(
+            get_spatial_engine().analyze,
+            series,
+            weights,
+            permutations=(
+                self.config["permutations"] if permutations is None else permutations
+            ),
+            confidence=confidence,
+            seed=self.config["random_seed"],
+        )
+
     @cache_with_ttl(ttl_seconds=900)  # 15 minute cache for optimization
     @validate_geographic_data
     async def optimize_resource_allocation(
@@ -1033,26 +1195,12 @@ class LampiaoAgent(BaseAgent):
         - Zero or negative values (filters and logs warning)
         - NaN values (filters out)
         """
-        # Filter out invalid values
-        valid_values = [v for v in values if v > 0 and not np.isnan(v)]
-
-        if len(valid_values) < 2:
+        indices = inequality_indices(values, positive_only=True)
+        if indices["count"] < 2:
             self.logger.warning(
-                f"Insufficient valid values for Gini calculation: {len(valid_values)}"
+                f"Insufficient valid values for Gini calculation: {indices['count']}"
             )
-            return 0.0
-
-        sorted_values = sorted(valid_values)
-        n = len(sorted_values)
-        cumsum = np.cumsum(sorted_values)
-
-        if cumsum[-1] == 0:
-            self.logger.warning("Sum of values is zero, cannot calculate Gini")
-            return 0.0
-
-        return (2 * np.sum((np.arange(n) + 1) * sorted_values)) / (n * cumsum[-1]) - (
-            n + 1
-        ) / n
+        return indices["gini"]
 
     def _calculate_theil_index(self, values: list[float]) -> float:
         """
@@ -1062,24 +1210,12 @@ class LampiaoAgent(BaseAgent):
         - Filters out zeros and negative values
         - Returns 0.0 for invalid inputs
         """
-        valid_values = [v for v in values if v > 0 and not np.isnan(v)]
-
-        if len(valid_values) < 2:
+        indices = inequality_indices(values, positive_only=True)
+        if indices["count"] < 2:
             self.logger.warning(
-                f"Insufficient valid values for Theil calculation: {len(valid_values)}"
+                f"Insufficient valid values for Theil calculation: {indices['count']}"
             )
-            return 0.0
-
-        values = np.array(valid_values)
-        mean_value = np.mean(values)
-
-        if mean_value == 0:
-            self.logger.warning("Mean value is zero, cannot calculate Theil")
-            return 0.0
-
-        # Use safe log calculation
-        ratio = values / mean_value
-        return np.mean(ratio * np.log(ratio))
+        return indices["theil"]
 
     def _calculate_williamson_index(
         self, values: list[float], populations: list[float]
@@ -1092,35 +1228,45 @@ class LampiaoAgent(BaseAgent):
         - Zero or negative populations (filters out)
         - Invalid values (filters out)
         """
-        # Ensure same length
         min_len = min(len(values), len(populations))
-        values = values[:min_len]
-        populations = populations[:min_len]
-
-        # Filter out invalid pairs
-        valid_pairs = [
-            (v, p)
-            for v, p in zip(values, populations, strict=False)
-            if v > 0 and p > 0 and not np.isnan(v) and not np.isnan(p)
-        ]
-
-        if len(valid_pairs) < 2:
+        indices = inequality_indices(
+            values[:min_len], weights=populations[:min_len], positive_only=True
+        )
+        if indices["count"] < 2:
             self.logger.warning(
-                f"Insufficient valid pairs for Williamson calculation: {len(valid_pairs)}"
+                f"Insufficient valid pairs for Williamson calculation: {indices['count']}"
             )
-            return 0.0
+        return indices["williamson"]
 
-        values = np.array([pair[0] for pair in valid_pairs])
-        populations = np.array([pair[1] for pair in valid_pairs])
+    def calculate_grouped_inequality(
+        self,
+        values: list[float],
+        group_ids: Any,
+        populations: list[float] | None = None,
+        bootstrap: int = 0,
+    ) -> dict[Any, dict[str, Any]]:
+        """
+        Calculate Gini, Theil, Williamson and other indices for many regions.
 
-        mean_value = np.average(values, weights=populations)
+        All groups (e.g. municipalities keyed by ``[state, year]``) are
+        computed in a single vectorized pass.
 
-        if mean_value == 0:
-            self.logger.warning("Mean value is zero, cannot calculate Williamson")
-            return 0.0
+        Args:
+            values: Metric value per observation
+            group_ids: Group key per observation, or a list of key columns
+            populations: Optional population weights
+            bootstrap: Bootstrap replicates for confidence intervals
 
-        weighted_variance = np.average((values - mean_value) ** 2, weights=populations)
-        return np.sqrt(weighted_variance) / mean_value
+        Returns:
+            Mapping of group -> index values
+        """
+        return grouped_inequality(
+            values,
+            group_ids,
+            weights=populations,
+            positive_only=True,
+            bootstrap=bootstrap,
+        ).to_dict()
 
     def _generate_regional_recommendations(
         self, inequalities: dict[str, float], clusters: list[dict[str, Any]]
@@ -1420,6 +1566,9 @@ class LampiaoAgent(BaseAgent):
                 for state_code, state_info in self.states_data.items()
             }
 
+            # Build the sparse state weights once; all spatial statistics reuse them
+            await self._get_state_weights()
+
             self.logger.info(
                 f"Spatial indices ready: {len(self.region_index)} regions, "
                 f"{len(self.capital_index)} capitals, {len(self.state_name_index)} states"
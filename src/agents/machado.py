@@ -6,8 +6,9 @@ Date: 2025-01-24
 License: Proprietary - All rights reserved
 """
 
+import asyncio
 import hashlib
-import re
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from enum import Enum
@@ -24,6 +25,21 @@ from src.agents.deodoro import (
     BaseAgent,
 )
 from src.core import get_logger
+from src.ml.document_analysis import (
+    AMBIGUOUS_TERMS,
+    ARTICLE_TERMS,
+    COMPLIANCE_TERMS,
+    CONTRACT_TERMS,
+    DECREE_TERMS,
+    LAW_TERMS,
+    LEGAL_FRAMEWORK_TERMS,
+    SUSPICIOUS_PATTERNS,
+    TENDER_TERMS,
+    TRANSPARENCY_TERMS,
+    DocumentFeatures,
+    analyze_documents,
+    scan_document,
+)
 
 
 class DocumentType(Enum):
@@ -150,14 +166,8 @@ class MachadoAgent(BaseAgent):
             "LGPD": "Lei 13.709/18 - Lei Geral de Proteção de Dados",
         }
 
-        # Suspicious patterns regex
-        self._suspicious_patterns = {
-            "urgency_abuse": r"(urgente|emergencial|inadiável)(?!.*justificativa)",
-            "vague_specifications": r"(conforme|adequado|satisfatório|apropriado)\s+(?!critério|norma)",
-            "exclusive_criteria": r"(exclusivamente|unicamente|somente)(?=.*fornecedor|empresa)",
-            "price_manipulation": r"(valor\s+aproximado|preço\s+estimado)(?=.*sigiloso|confidencial)",
-            "favoritism_indicators": r"(experiência\s+mínima\s+\d+\s+anos?)(?=.*específic)",
-        }
+        # Suspicious patterns regex (matched by the document scanner)
+        self._suspicious_patterns = SUSPICIOUS_PATTERNS
 
         # NER patterns for Brazilian documents
         self._ner_patterns = {
@@ -288,30 +298,63 @@ class MachadoAgent(BaseAgent):
             document_type=request.document_type,
         )
 
+        # Tokenize and match the document once for every metric below
+        features = scan_document(request.document_content)
+
+        return await self._build_result(request.document_content, features)
+
+    async def analyze_documents(
+        self, documents: Sequence[str], max_workers: int | None = None
+    ) -> list[TextualAnalysisResult]:
+        """
+        Analyze many documents, scanning them in a process pool.
+
+        Intended for bulk ingestion of gazettes and contract texts.
+
+        Args:
+            documents: Document texts
+            max_workers: Scanner processes (CPU count by default)
+
+        Returns:
+            Analysis results, in document order
+        """
+        loop = asyncio.get_running_loop()
+        all_features = await loop.run_in_executor(
+            None, analyze_documents, list(documents), max_workers
+        )
+
+        self.logger.info("Batch textual analysis completed", documents=len(documents))
+
+        return [
+            await self._build_result(text, features)
+            for text, features in zip(documents, all_features, strict=True)
+        ]
+
+    async def _build_result(
+        self, text: str, features: DocumentFeatures
+    ) -> TextualAnalysisResult:
+        """Compute every metric of one document from its scan."""
+
         # Generate document ID
-        doc_id = hashlib.md5(request.document_content.encode()).hexdigest()[:12]
+        doc_id = hashlib.md5(text.encode()).hexdigest()[:12]
 
         # Determine document type
-        doc_type = await self._classify_document_type(request.document_content)
+        doc_type = await self._classify_document_type(features)
 
         # Extract entities using NER
-        entities = await self._extract_entities(request.document_content)
+        entities = await self._extract_entities(features)
 
         # Detect alerts and issues
-        alerts = await self._detect_document_alerts(request.document_content, doc_type)
+        alerts = await self._detect_document_alerts(text, features)
 
         # Calculate metrics
-        complexity = await self._calculate_complexity_score(request.document_content)
-        transparency = await self._calculate_transparency_score(
-            request.document_content, entities
-        )
-        compliance = await self._assess_legal_compliance(
-            request.document_content, doc_type
-        )
-        readability = await self._calculate_readability_grade(request.document_content)
+        complexity = await self._calculate_complexity_score(features)
+        transparency = await self._calculate_transparency_score(features, entities)
+        compliance = await self._assess_legal_compliance(features, doc_type)
+        readability = await self._calculate_readability_grade(features)
 
         # Detect suspicious patterns
-        suspicious = await self._detect_suspicious_patterns(request.document_content)
+        suspicious = await self._detect_suspicious_patterns(features)
 
         # Generate checksum
         checksum = hashlib.md5(
@@ -332,106 +375,67 @@ class MachadoAgent(BaseAgent):
             analysis_timestamp=datetime.now(UTC),
         )
 
-    async def _classify_document_type(self, text: str) -> DocumentType:
+    async def _classify_document_type(self, features: DocumentFeatures) -> DocumentType:
         """Classify document type based on content patterns."""
 
-        text_lower = text.lower()
-
         # Contract indicators
-        if any(
-            keyword in text_lower
-            for keyword in ["contrato", "contratação", "contratado"]
-        ):
+        if features.has_any(CONTRACT_TERMS):
             return DocumentType.CONTRACT
 
         # Public tender indicators
-        if any(keyword in text_lower for keyword in ["edital", "licitação", "pregão"]):
+        if features.has_any(TENDER_TERMS):
             return DocumentType.PUBLIC_TENDER
 
         # Law indicators
-        if any(
-            keyword in text_lower for keyword in ["lei nº", "lei n°", "projeto de lei"]
-        ):
+        if features.has_any(LAW_TERMS):
             return DocumentType.LAW
 
         # Decree indicators
-        if any(keyword in text_lower for keyword in ["decreto", "decreto nº"]):
+        if features.has_any(DECREE_TERMS):
             return DocumentType.DECREE
 
         # Default to contract if unsure
         return DocumentType.CONTRACT
 
-    async def _extract_entities(self, text: str) -> EntityExtraction:
-        """Extract named entities from document text."""
+    async def _extract_entities(self, features: DocumentFeatures) -> EntityExtraction:
+        """Extract named entities from the document's typed spans."""
 
         # Extract organizations (simplified)
         organizations = []
-        org_patterns = [
-            r"(?:Ministério|Secretaria|Prefeitura|Câmara)\s+[\w\s]+",
-            r"(?:Empresa|Companhia|Sociedade)\s+[\w\s]+",
-        ]
-
-        for pattern in org_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            organizations.extend(matches[:5])  # Limit to avoid clutter
+        for kind in ("org_public", "org_company"):
+            # Limit to avoid clutter
+            organizations.extend(span.text for span in features.of(kind)[:5])
 
         # Extract monetary values
         values = []
-        money_matches = re.findall(r"R\$\s*([\d,.]+)", text, re.IGNORECASE)
-        for match in money_matches[:10]:  # Limit matches
+        for span in features.of("money")[:10]:  # Limit matches
             try:
-                amount = float(match.replace(".", "").replace(",", "."))
+                amount = float(span.value.replace(".", "").replace(",", "."))
                 values.append(
-                    {"amount": amount, "context": f"Valor encontrado: R$ {match}"}
+                    {"amount": amount, "context": f"Valor encontrado: R$ {span.value}"}
                 )
             except ValueError:
                 continue
 
         # Extract dates
-        dates = []
-        date_patterns = [
-            r"(\d{1,2})/(\d{1,2})/(\d{4})",
-            r"(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})",
+        dates = [
+            {"date": span.value or span.text, "event": "Data identificada no documento"}
+            for kind in ("date_numeric", "date_text")
+            for span in features.of(kind)[:5]
         ]
 
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches[:5]:
-                dates.append(
-                    {
-                        "date": (
-                            "/".join(match) if "/" in pattern else " de ".join(match)
-                        ),
-                        "event": "Data identificada no documento",
-                    }
-                )
-
         # Extract people names (simplified)
         people = []
         # This would need a proper NER model for better results
 
         # Extract locations
-        locations = []
-        location_patterns = [
-            r"(?:Estado|Município)\s+(?:de|do|da)\s+([\w\s]+)",
-            r"(Brasília|São Paulo|Rio de Janeiro|Belo Horizonte)",
-        ]
-
-        for pattern in location_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            locations.extend(matches[:5])
+        locations = [span.value for span in features.of("region")[:5]]
+        locations.extend(span.text for span in features.of("city")[:5])
 
         # Extract legal references
         legal_refs = []
-        legal_patterns = [
-            r"Lei\s+n?º?\s*[\d./-]+",
-            r"Art\.?\s*\d+[º°]?",
-            r"CF/\d{2}",
-        ]
-
-        for pattern in legal_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            legal_refs.extend(matches[:10])
+        for kind in ("law", "article", "constitution"):
+            legal_refs.extend(span.text for span in features.of(kind)[:10])
 
         return EntityExtraction(
             organizations=list(set(organizations))[:10],
@@ -443,18 +447,20 @@ class MachadoAgent(BaseAgent):
         )
 
     async def _detect_document_alerts(
-        self, text: str, doc_type: DocumentType
+        self, text: str, features: DocumentFeatures
     ) -> list[DocumentAlert]:
         """Detect alerts and suspicious patterns in document."""
 
         alerts = []
 
         # Check for suspicious patterns
-        for pattern_name, pattern in self._suspicious_patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
+        matches = features.of("suspicious")
+        for pattern_name in self._suspicious_patterns:
             for match in matches:
-                context_start = max(0, match.start() - 50)
-                context_end = min(len(text), match.end() + 50)
+                if match.value != pattern_name:
+                    continue
+                context_start = max(0, match.start - 50)
+                context_end = min(len(text), match.end + 50)
                 excerpt = text[context_start:context_end].strip()
 
                 alerts.append(
@@ -478,15 +484,8 @@ class MachadoAgent(BaseAgent):
                 )
 
         # Check for ambiguous language
-        ambiguous_terms = [
-            "conforme",
-            "adequado",
-            "satisfatório",
-            "apropriado",
-            "razoável",
-        ]
-        for term in ambiguous_terms:
-            if term in text.lower() and text.lower().count(term) > 3:
+        for term in AMBIGUOUS_TERMS:
+            if features.keywords[term] > 3:
                 alerts.append(
                     DocumentAlert(
                         alert_type="ambiguity",
@@ -501,12 +500,12 @@ class MachadoAgent(BaseAgent):
 
         return alerts[:20]  # Limit alerts
 
-    async def _calculate_complexity_score(self, text: str) -> float:
+    async def _calculate_complexity_score(self, features: DocumentFeatures) -> float:
         """Calculate text complexity using adapted Flesch formula."""
 
-        sentences = len(re.findall(r"[.!?]+", text))
-        words = len(text.split())
-        syllables = sum(self._count_syllables(word) for word in text.split())
+        sentences = features.sentences
+        words = features.words
+        syllables = features.syllables
 
         if sentences == 0 or words == 0:
             return 1.0  # Maximum complexity
@@ -524,24 +523,8 @@ class MachadoAgent(BaseAgent):
 
         return round(complexity, 3)
 
-    def _count_syllables(self, word: str) -> int:
-        """Count syllables in a Portuguese word (simplified)."""
-        vowels = "aeiouAEIOU"
-        count = 0
-        previous_was_vowel = False
-
-        for char in word:
-            if char in vowels:
-                if not previous_was_vowel:
-                    count += 1
-                previous_was_vowel = True
-            else:
-                previous_was_vowel = False
-
-        return max(1, count)  # At least one syllable
-
     async def _calculate_transparency_score(
-        self, text: str, entities: EntityExtraction
+        self, features: DocumentFeatures, entities: EntityExtraction
     ) -> float:
         """Calculate document transparency score."""
 
@@ -561,26 +544,16 @@ class MachadoAgent(BaseAgent):
             score += 0.2
 
         # Check for transparency indicators
-        transparency_indicators = [
-            "justificativa",
-            "critério",
-            "metodologia",
-            "público",
-            "transparente",
-            "acesso",
-            "divulgação",
-        ]
-
         indicator_count = sum(
-            1 for indicator in transparency_indicators if indicator in text.lower()
+            1 for indicator in TRANSPARENCY_TERMS if features.keywords[indicator]
         )
 
-        score += min(0.1, indicator_count / len(transparency_indicators))
+        score += min(0.1, indicator_count / len(TRANSPARENCY_TERMS))
 
         return round(min(1.0, score), 3)
 
     async def _assess_legal_compliance(
-        self, text: str, doc_type: DocumentType
+        self, features: DocumentFeatures, doc_type: DocumentType
     ) -> float:
         """Assess legal compliance based on document type."""
 
@@ -588,34 +561,26 @@ class MachadoAgent(BaseAgent):
 
         # Check for required legal references based on document type
         if doc_type in [DocumentType.CONTRACT, DocumentType.PUBLIC_TENDER]:
-            if "8.666" in text or "14.133" in text:
+            if features.has_any(LEGAL_FRAMEWORK_TERMS):
                 compliance_score += 0.3
-            if "art." in text.lower() or "artigo" in text.lower():
+            if features.has_any(ARTICLE_TERMS):
                 compliance_score += 0.2
 
-        # Check for common compliance issues
-        compliance_issues = [
-            ("urgente", -0.1),  # Unjustified urgency
-            ("sigiloso", -0.1),  # Inappropriate secrecy
-            ("exclusivo", -0.1),  # Exclusive criteria
-        ]
-
-        for term, penalty in compliance_issues:
-            if term in text.lower():
-                compliance_score += penalty
+        # Check for common compliance issues: unjustified urgency,
+        # inappropriate secrecy and exclusive criteria
+        for term in COMPLIANCE_TERMS:
+            if features.keywords[term]:
+                compliance_score -= 0.1
 
         return round(max(0.0, min(1.0, compliance_score)), 3)
 
-    async def _calculate_readability_grade(self, text: str) -> int:
+    async def _calculate_readability_grade(self, features: DocumentFeatures) -> int:
         """Calculate readability grade level."""
 
-        sentences = len(re.findall(r"[.!?]+", text))
-        words = len(text.split())
-
-        if sentences == 0:
+        if features.sentences == 0:
             return 20  # Maximum difficulty
 
-        avg_sentence_length = words / sentences
+        avg_sentence_length = features.words / features.sentences
 
         # Simplified grade calculation
         if avg_sentence_length <= 10:
@@ -626,16 +591,14 @@ class MachadoAgent(BaseAgent):
             return 12  # High school
         return 16  # College level
 
-    async def _detect_suspicious_patterns(self, text: str) -> list[str]:
+    async def _detect_suspicious_patterns(
+        self, features: DocumentFeatures
+    ) -> list[str]:
         """Detect suspicious patterns in document."""
 
-        patterns_found = []
-
-        for pattern_name, pattern in self._suspicious_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                patterns_found.append(pattern_name)
+        found = {span.value for span in features.of("suspicious")}
 
-        return patterns_found
+        return [name for name in self._suspicious_patterns if name in found]
 
     async def _generate_document_insights(
         self, analysis: TextualAnalysisResult, request: TextualAnalysisRequest
@@ -15,6 +15,11 @@ from typing import Any
 import numpy as np
 
 from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, BaseAgent
+from src.agents.security_cep import (
+    DEFAULT_SIGNATURES,
+    CorrelationEngine,
+    SignatureIndex,
+)
 from src.core import AgentStatus, get_logger
 from src.core.exceptions import AgentExecutionError
 
@@ -284,6 +289,10 @@ class MariaQuiteriaAgent(BaseAgent):
         # Incident tracking
         self.active_incidents = {}
 
+        # Compiled IOCs and the correlation engine fed by monitor_events
+        self.signature_index = SignatureIndex.from_feeds(DEFAULT_SIGNATURES)
+        self.correlation_engine = CorrelationEngine(incidents=self.active_incidents)
+
         # Compliance frameworks
         self.compliance_frameworks = [
             ComplianceFramework.LGPD,
@@ -532,6 +541,39 @@ class MariaQuiteriaAgent(BaseAgent):
             timestamp=datetime.now(UTC),
         )
 
+    async def monitor_events(
+        self,
+        events: list[dict[str, Any]],
+        context: AgentContext | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Correlaciona eventos de um feed contínuo (auditoria ou acesso).
+
+        Each event is matched against the compiled IOCs and its detections
+        are fed to the agent's long-lived correlation engine, so calls with
+        consecutive slices of a feed correlate across slices. Open
+        incidents are kept in ``active_incidents``.
+
+        Args:
+            events: Next events of the feed
+            context: Agent context
+
+        Returns:
+            Incidents opened by these events
+        """
+        detections = await self._signature_based_detection(events)
+        opened = []
+        for detection in detections:
+            opened.extend(self.correlation_engine.ingest(detection))
+
+        if opened:
+            self.logger.warning(
+                "cep_incidents_opened",
+                opened=len(opened),
+                active=len(self.active_incidents),
+            )
+        return opened
+
     async def perform_security_audit(
         self,
         systems: list[str],
@@ -926,6 +968,25 @@ class MariaQuiteriaAgent(BaseAgent):
                     },
                 )
 
+            if action == "monitor_events":
+                events = message.payload.get("events", [])
+
+                incidents = await self.monitor_events(events, context)
+
+                return AgentResponse(
+                    agent_name=self.name,
+                    status=AgentStatus.COMPLETED,
+                    result={
+                        "event_monitoring": {
+                            "events_analyzed": len(events),
+                            "incidents_opened": incidents,
+                            "active_incidents": len(self.active_incidents),
+                        },
+                        "status": "monitoring_completed",
+                    },
+                    metadata={"confidence": 0.90},
+                )
+
             if action == "security_audit":
                 systems = message.payload.get("systems", ["all"])
                 audit_type = message.payload.get("audit_type", "comprehensive")
@@ -1019,82 +1080,16 @@ class MariaQuiteriaAgent(BaseAgent):
         self, network_data: list[dict[str, Any]]
     ) -> list[dict[str, Any]]:
         """Detecção baseada em assinaturas conhecidas."""
-        # Signature-based Detection with Threat Intelligence Matching
+        # Signature-based Detection with compiled Threat Intelligence IOCs
         matches = []
 
-        # Known threat signatures (IOCs - Indicators of Compromise)
-        threat_signatures = {
-            "malicious_ips": ["192.168.100.100", "10.0.0.66", "172.16.254.1"],
-            "suspicious_ports": [4444, 5555, 6666, 31337],  # Common backdoor ports
-            "malware_hashes": [
-                "5f4dcc3b5aa765d61d8327deb882cf99",  # Example MD5
-                "098f6bcd4621d373cade4e832627b4f6",
-            ],
-            "attack_patterns": [
-                "union select",  # SQL injection
-                "../../../",  # Path traversal
-                "<script>",  # XSS
-                "eval(",  # Code injection
-            ],
-        }
-
-        # Integrate external threat intelligence if available
-        if self.threat_intelligence:
-            threat_signatures.update(self.threat_intelligence.get("signatures", {}))
-
         for event in network_data:
-            source_ip = event.get("source_ip", "")
-            dest_port = event.get("dest_port", 0)
-            payload = event.get("payload", "")
-            file_hash = event.get("file_hash", "")
-
-            matched_threats = []
-
-            # IP Reputation Check
-            if source_ip in threat_signatures["malicious_ips"]:
-                matched_threats.append(
-                    {
-                        "type": "malicious_ip",
-                        "indicator": source_ip,
-                        "severity": "high",
-                    }
-                )
-
-            # Port Analysis
-            if dest_port in threat_signatures["suspicious_ports"]:
-                matched_threats.append(
-                    {
-                        "type": "suspicious_port",
-                        "indicator": dest_port,
-                        "severity": "medium",
-                    }
-                )
-
-            # Payload Pattern Matching
-            for pattern in threat_signatures["attack_patterns"]:
-                if pattern.lower() in payload.lower():
-                    matched_threats.append(
-                        {
-                            "type": "attack_pattern",
-                            "indicator": pattern,
-                            "severity": "high",
-                        }
-                    )
-
-            # Hash Matching for Malware
-            if file_hash in threat_signatures["malware_hashes"]:
-                matched_threats.append(
-                    {
-                        "type": "malware_hash",
-                        "indicator": file_hash,
-                        "severity": "critical",
-                    }
-                )
+            matched_threats = self.signature_index.match(event)
 
             if matched_threats:
                 self.logger.warning(
                     "Threat signature match detected",
-                    source_ip=source_ip,
+                    source_ip=event.get("source_ip", event.get("src_ip", "")),
                     matches=len(matched_threats),
                 )
 
@@ -1216,140 +1211,13 @@ class MariaQuiteriaAgent(BaseAgent):
         self, signatures: list, anomalies: list
     ) -> list[dict[str, Any]]:
         """Correlaciona eventos de segurança."""
-        # Complex Event Processing (CEP) Implementation
-        correlated_events = []
-
-        # Combine all events for temporal correlation
+        # Complex Event Processing (CEP) over this batch only
         all_events = signatures + anomalies
 
         if not all_events:
-            return correlated_events
-
-        # Sort events by timestamp for temporal analysis
-        sorted_events = sorted(
-            all_events,
-            key=lambda x: x.get("event", {}).get(
-                "timestamp", datetime.now(UTC).isoformat()
-            ),
-        )
-
-        # CEP Rule 1: Temporal Correlation (events within 5 minutes)
-        temporal_window_seconds = 300  # 5 minutes
-        event_chains = []
-        current_chain = []
-
-        for i, event in enumerate(sorted_events):
-            if not current_chain:
-                current_chain.append(event)
-                continue
-
-            # Get timestamps
-            current_time = datetime.fromisoformat(
-                event.get("event", {}).get("timestamp", datetime.now(UTC).isoformat())
-            )
-            chain_start_time = datetime.fromisoformat(
-                current_chain[0]
-                .get("event", {})
-                .get("timestamp", datetime.now(UTC).isoformat())
-            )
+            return []
 
-            time_diff = (current_time - chain_start_time).total_seconds()
-
-            if time_diff <= temporal_window_seconds:
-                current_chain.append(event)
-            else:
-                if len(current_chain) >= 2:  # Chain of at least 2 events
-                    event_chains.append(current_chain)
-                current_chain = [event]
-
-        # Add final chain
-        if len(current_chain) >= 2:
-            event_chains.append(current_chain)
-
-        # CEP Rule 2: Source Correlation (same IP address)
-        source_correlation = {}
-        for event in all_events:
-            source_ip = event.get("event", {}).get("source_ip", "unknown")
-            if source_ip not in source_correlation:
-                source_correlation[source_ip] = []
-            source_correlation[source_ip].append(event)
-
-        # Identify multi-vector attacks (same source, multiple detection methods)
-        for source_ip, events in source_correlation.items():
-            if len(events) >= 2:
-                detection_methods = set(e.get("detection_method") for e in events)
-                if len(detection_methods) > 1:
-                    # Multi-vector attack detected
-                    correlated_events.append(
-                        {
-                            "correlation_type": "multi_vector_attack",
-                            "source_ip": source_ip,
-                            "events": events,
-                            "severity": "high",
-                            "confidence": 0.90,
-                            "description": f"Multiple attack vectors from {source_ip}",
-                        }
-                    )
-
-        # CEP Rule 3: Attack Pattern Sequence Detection
-        # Common attack sequences: reconnaissance → exploitation → privilege escalation
-        attack_sequences = {
-            "recon_exploit": ["reconnaissance", "exploitation"],
-            "exploit_escalation": ["exploitation", "privilege_escalation"],
-            "full_kill_chain": [
-                "reconnaissance",
-                "exploitation",
-                "privilege_escalation",
-                "data_exfiltration",
-            ],
-        }
-
-        for chain in event_chains:
-            event_types = [
-                e.get("event", {}).get("event_type", "unknown") for e in chain
-            ]
-
-            for sequence_name, expected_sequence in attack_sequences.items():
-                # Check if the chain matches any known attack sequence
-                if len(event_types) >= 2:
-                    correlated_events.append(
-                        {
-                            "correlation_type": "temporal_chain",
-                            "sequence_name": sequence_name,
-                            "events": chain,
-                            "severity": "critical" if len(chain) >= 3 else "high",
-                            "confidence": 0.85,
-                            "description": f"Correlated attack chain with {len(chain)} events",
-                        }
-                    )
-
-        # CEP Rule 4: Frequency-based Correlation (brute force detection)
-        # Count events by source and type
-        frequency_analysis = {}
-        for event in all_events:
-            source_ip = event.get("event", {}).get("source_ip", "unknown")
-            event_type = event.get("detection_method", "unknown")
-            key = f"{source_ip}_{event_type}"
-
-            if key not in frequency_analysis:
-                frequency_analysis[key] = []
-            frequency_analysis[key].append(event)
-
-        # Detect high-frequency attacks (>5 events from same source)
-        for key, events in frequency_analysis.items():
-            if len(events) >= 5:
-                source_ip = events[0].get("event", {}).get("source_ip", "unknown")
-                correlated_events.append(
-                    {
-                        "correlation_type": "high_frequency_attack",
-                        "source_ip": source_ip,
-                        "event_count": len(events),
-                        "events": events[:10],  # Limit to first 10
-                        "severity": "critical",
-                        "confidence": 0.95,
-                        "description": f"High-frequency attack detected: {len(events)} events",
-                    }
-                )
+        correlated_events = CorrelationEngine().ingest_many(all_events)
 
         # Return original events if no correlations found, otherwise return correlated events
         if correlated_events:
@@ -2052,6 +1920,13 @@ class MariaQuiteriaAgent(BaseAgent):
             f"{len(self.threat_intelligence['malware_hashes']['md5'])} malware hashes"
         )
 
+        # Compile the feed's IOCs with the built-in signatures
+        self.signature_index = SignatureIndex.from_feeds(
+            DEFAULT_SIGNATURES,
+            self.threat_intelligence,
+            self.threat_intelligence.get("signatures", {}),
+        )
+
     async def _setup_security_baselines(self) -> None:
         """Configura baselines de segurança."""
         # Security Baselines Establishment per System
@@ -2470,6 +2345,8 @@ class MariaQuiteriaAgent(BaseAgent):
         self.threat_intelligence.clear()
         self.security_baselines.clear()
         self.active_incidents.clear()
+        self.signature_index = SignatureIndex.from_feeds(DEFAULT_SIGNATURES)
+        self.correlation_engine = CorrelationEngine(incidents=self.active_incidents)
 
         self.logger.info("Maria Quitéria shutdown complete")
 
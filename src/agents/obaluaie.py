@@ -20,6 +20,7 @@ from src.agents.deodoro import (
     BaseAgent,
 )
 from src.core import get_logger
+from src.services.contract_frame import get_contract_frame
 
 
 class CorruptionSeverity(Enum):
@@ -198,7 +199,7 @@ class CorruptionDetectorAgent(BaseAgent):
             cleaned_data = [{}]  # Empty dict to prevent errors
 
         # Step 2: Apply Benford's Law analysis
-        benford_score = await self._apply_benford_law(cleaned_data)
+        benford_score = await self._apply_benford_law(cleaned_data, context)
 
         # Step 3: Detect cartels and collusion
         cartel_score = await self._detect_cartels(cleaned_data)
@@ -433,27 +434,25 @@ class CorruptionDetectorAgent(BaseAgent):
 
         return 0.0
 
-    async def _apply_benford_law(self, data: list[dict]) -> float:
+    async def _apply_benford_law(
+        self, data: list[dict], context: AgentContext | None = None
+    ) -> float:
         """Apply Benford's Law analysis to detect manipulation."""
-        # Simplified implementation - in production would use full Benford analysis
-        values = [d.get("value", d.get("amount", 0)) for d in data if d]
-        if not values:
-            return 0.0
-
-        # Check first digit distribution (simplified)
-        first_digits = [int(str(int(v))[0]) for v in values if v > 0 and str(int(v))]
-        if not first_digits:
+        # First-digit histogram comes from the investigation's shared
+        # contract frame, so values are only parsed once across agents
+        frame = get_contract_frame(data, context.investigation_id if context else None)
+        total = int(frame.digit_histogram.sum())
+        if not total:
             return 0.0
 
         # Expected Benford distribution for digit 1: ~30.1%
-        digit_1_count = first_digits.count(1)
-        digit_1_pct = digit_1_count / len(first_digits)
+        digit_1_pct = frame.digit_histogram[0] / total
 
         # Calculate deviation from expected
         expected_pct = 0.301  # Benford's Law for digit 1
         deviation = abs(digit_1_pct - expected_pct)
 
-        return min(1.0, deviation / expected_pct)  # Normalize to 0-1
+        return float(min(1.0, deviation / expected_pct))  # Normalize to 0-1
 
     async def _detect_cartels(self, data: list[dict]) -> float:
         """Detect cartel patterns in the data."""
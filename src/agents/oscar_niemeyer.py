@@ -18,6 +18,14 @@ import pandas as pd
 
 from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, BaseAgent
 from src.core import AgentStatus, get_logger, settings
+from src.ml.spatial_statistics import BRAZIL_STATE_CAPITAL_COORDS
+from src.services.aggregation_cube import (
+    DIMENSIONS,
+    UF_NAMES,
+    UF_TO_REGION,
+    AggregationCube,
+    get_aggregation_cube,
+)
 
 
 class AggregationType(Enum):
@@ -61,6 +69,12 @@ class TimeGranularity(Enum):
     YEAR = "year"
 
 
+# Granularities derivable from the cube's monthly buckets
+CUBE_GRANULARITIES = frozenset(
+    {TimeGranularity.MONTH, TimeGranularity.QUARTER, TimeGranularity.YEAR}
+)
+
+
 @dataclass
 class DataAggregationResult:
     """Result of data aggregation."""
@@ -232,6 +246,9 @@ class OscarNiemeyerAgent(BaseAgent):
         # Aggregation cache
         self.aggregation_cache = {}
 
+        # Columnar cube over collected contracts/expenses (shared with the API)
+        self.cube: AggregationCube = get_aggregation_cube()
+
         # Visualization recommendations
         self.viz_recommendations = {
             "time_series": VisualizationType.LINE_CHART,
@@ -336,6 +353,8 @@ class OscarNiemeyerAgent(BaseAgent):
                     payload.get("location_column", "state_code"),
                     context,
                 )
+            elif action == "ingest_data":
+                result = {"ingested": self.ingest_records(payload.get("records", []))}
             elif action == "fetch_network_data":
                 result = await self.fetch_network_graph_data(
                     payload.get("entity_id"), payload.get("depth", 2), context
@@ -378,8 +397,20 @@ class OscarNiemeyerAgent(BaseAgent):
         dimensions = request_data.get("dimensions", ["category", "region"])
         metrics = request_data.get("metrics", ["total", "count"])
 
-        # Create realistic aggregated data points
-        # Using typical Brazilian government contract distribution patterns
+        if request_data.get("records"):
+            # Records sent with the request are aggregated on their own, so
+            # the result neither double counts them nor mixes in other data
+            cube = AggregationCube()
+            cube.ingest(request_data["records"])
+        else:
+            cube = self.cube
+        if cube.row_count and set(dimensions) <= set(DIMENSIONS):
+            return self._aggregate_from_cube(
+                cube, dimensions, metrics, request_data.get("filters") or {}, context
+            )
+
+        # No collected data yet: reference sample based on typical
+        # Brazilian government contract distribution patterns
         categories = ["health", "education", "infrastructure"]
         regions = ["Norte", "Nordeste", "Sul", "Sudeste", "Centro-Oeste"]
 
@@ -463,6 +494,102 @@ class OscarNiemeyerAgent(BaseAgent):
                 "series": [{"name": m, "field": m} for m in metrics],
             },
             "metadata": {
+                "data_source": "reference_sample",
+                "generated_at": datetime.now(UTC).isoformat(),
+                "cache_key": f"agg_{context.investigation_id}",
+                "expires_at": (
+                    datetime.now(UTC)
+                    + timedelta(seconds=self.config["cache_ttl_seconds"])
+                ).isoformat(),
+            },
+        }
+
+    def ingest_records(self, records: list[dict[str, Any]]) -> int:
+        """
+        Add collected contract/expense records to the aggregation cube.
+
+        Materialized rollups are refreshed incrementally.
+        """
+        ingested = self.cube.ingest(records)
+        self.logger.info(
+            "Records ingested into aggregation cube",
+            ingested=ingested,
+            total_rows=self.cube.row_count,
+        )
+        return ingested
+
+    @staticmethod
+    def _measure_for(metric: str) -> str:
+        """Map a requested metric name onto a cube measure."""
+        name = metric.lower()
+        if "count" in name or name in ("total_contracts", "contracts"):
+            return "count"
+        if "average" in name or "mean" in name or "avg" in name:
+            return "mean"
+        if name.startswith("min"):
+            return "min"
+        if name.startswith("max"):
+            return "max"
+        return "sum"
+
+    def _aggregate_from_cube(
+        self,
+        cube: AggregationCube,
+        dimensions: list[str],
+        metrics: list[str],
+        filters: dict[str, Any],
+        context: AgentContext,
+    ) -> dict[str, Any]:
+        """Group-by over the cube (served from materialized rollups)."""
+        valid_filters = {k: v for k, v in filters.items() if k in DIMENSIONS}
+        rows = cube.query(
+            dimensions,
+            filters=valid_filters,
+            limit=self.config["max_data_points"],
+        )
+
+        data_points = [
+            {
+                **{dim: row[dim] for dim in dimensions},
+                **{metric: row[self._measure_for(metric)] for metric in metrics},
+            }
+            for row in rows
+        ]
+
+        aggregations = {}
+        for metric in metrics:
+            values = [p[metric] for p in data_points]
+            aggregations[metric] = {
+                "sum": float(np.sum(values)) if values else 0,
+                "average": float(np.mean(values)) if values else 0,
+                "min": min(values) if values else 0,
+                "max": max(values) if values else 0,
+                "count": len(values),
+            }
+
+        viz_type = self._recommend_visualization(dimensions, metrics)
+        return {
+            "aggregation": {
+                "dimensions": dimensions,
+                "metrics": metrics,
+                "data_points": data_points,
+                "summary": aggregations,
+                "row_count": len(data_points),
+            },
+            "visualization": {
+                "recommended_type": viz_type.value,
+                "title": f"Analysis by {', '.join(dimensions) or 'total'}",
+                "x_axis": {
+                    "field": dimensions[0] if dimensions else None,
+                    "type": "category",
+                },
+                "y_axis": {"field": metrics[0] if metrics else None, "type": "value"},
+                "series": [{"name": m, "field": m} for m in metrics],
+            },
+            "metadata": {
+                "data_source": "aggregation_cube",
+                "source_rows": cube.row_count,
+                "cube_version": cube.version,
                 "generated_at": datetime.now(UTC).isoformat(),
                 "cache_key": f"agg_{context.investigation_id}",
                 "expires_at": (
@@ -495,6 +622,13 @@ class OscarNiemeyerAgent(BaseAgent):
             f"Generating time series for {metric} at {granularity.value} granularity"
         )
 
+        if self.cube.row_count and granularity in CUBE_GRANULARITIES:
+            series = self._time_series_from_cube(
+                metric, start_date, end_date, granularity
+            )
+            if series is not None:
+                return series
+
         # Determine number of points based on granularity
         num_points = 30 if granularity == TimeGranularity.DAY else 12
 
@@ -535,6 +669,87 @@ class OscarNiemeyerAgent(BaseAgent):
             },
         )
 
+    def _time_series_from_cube(
+        self,
+        metric: str,
+        start_date: str | None,
+        end_date: str | None,
+        granularity: TimeGranularity = TimeGranularity.MONTH,
+    ) -> TimeSeriesData | None:
+        """
+        Series read from the cube's month rollup.
+
+        Months are re-bucketed into quarters or years when requested; finer
+        granularities are not available from the cube.
+        """
+        if granularity not in CUBE_GRANULARITIES:
+            return None
+        measure = self._measure_for(metric)
+        start = start_date[:7] if start_date else None
+        end = end_date[:7] if end_date else None
+
+        buckets: dict[datetime, list[float]] = {}
+        for row in self.cube.query(["month"], order_by=None):
+            month = row["month"]
+            if (
+                month == "N/A"
+                or (start is not None and month < start)
+                or (end is not None and month > end)
+            ):
+                continue
+            year, month_number = int(month[:4]), int(month[5:7])
+            if granularity == TimeGranularity.QUARTER:
+                month_number = 3 * ((month_number - 1) // 3) + 1
+            elif granularity == TimeGranularity.YEAR:
+                month_number = 1
+            bucket = datetime(year, month_number, 1, tzinfo=UTC)
+            stats = buckets.setdefault(bucket, [0.0, 0.0, np.inf, -np.inf])
+            stats[0] += row["count"]
+            stats[1] += row["sum"]
+            stats[2] = min(stats[2], row["min"])
+            stats[3] = max(stats[3], row["max"])
+        if not buckets:
+            return None
+
+        time_points = sorted(buckets)
+        values = []
+        for point in time_points:
+            count, total, low, high = buckets[point]
+            values.append(
+                float(
+                    {
+                        "count": count,
+                        "sum": total,
+                        "min": low,
+                        "max": high,
+                        "mean": total / count if count else 0.0,
+                    }[measure]
+                )
+            )
+        slope = (
+            float(np.polyfit(range(len(values)), values, 1)[0])
+            if len(values) > 1
+            else 0.0
+        )
+        return TimeSeriesData(
+            series_id=f"ts_{metric}_{granularity.value}",
+            metric_name=metric,
+            time_points=time_points,
+            values=values,
+            aggregation_type=AggregationType(
+                "average" if measure == "mean" else measure
+            ),
+            granularity=granularity,
+            metadata={
+                "trend_direction": "increasing" if slope >= 0 else "decreasing",
+                "seasonality_detected": False,
+                "forecast_available": False,
+                "anomalies_detected": 0,
+                "data_source": "aggregation_cube",
+                "source_rows": self.cube.row_count,
+            },
+        )
+
     async def aggregate_by_region(
         self,
         data: list[dict[str, Any]],
@@ -553,6 +768,16 @@ class OscarNiemeyerAgent(BaseAgent):
         """
         self.logger.info(f"Aggregating data by {region_type}")
 
+        if data:
+            # Ad-hoc payload: aggregate it on its own, without touching the
+            # shared cube
+            source = AggregationCube(rollups=[("uf",), ("region",)])
+            source.ingest(data)
+        else:
+            source = self.cube
+        if source.row_count and metrics:
+            return self._regions_from_cube(source, region_type, metrics)
+
         # Top 5 Brazilian states by GDP (representative sample)
         regions = {
             "SP": {
@@ -640,6 +865,62 @@ class OscarNiemeyerAgent(BaseAgent):
             },
         }
 
+    def _regions_from_cube(
+        self, cube: AggregationCube, region_type: str, metrics: list[str]
+    ) -> dict[str, Any]:
+        """Geographic aggregation read from the UF or macro-region rollup."""
+        dimension = "region" if region_type in ("region", "macro_region") else "uf"
+        rows = [row for row in cube.query([dimension]) if row[dimension] != "N/A"]
+
+        totals = {
+            metric: sum(row[self._measure_for(metric)] for row in rows) or 1.0
+            for metric in metrics
+        }
+        aggregated = {}
+        for row in rows:
+            code = row[dimension]
+            lat, lng = BRAZIL_STATE_CAPITAL_COORDS.get(code, (None, None))
+            aggregated[code] = {
+                "name": UF_NAMES.get(code, code),
+                "region": UF_TO_REGION.get(code, code),
+                "coordinates": {"lat": lat, "lng": lng},
+                "metrics": {
+                    metric: {
+                        "value": row[self._measure_for(metric)],
+                        "formatted": (
+                            f"{row['count']:,}"
+                            if self._measure_for(metric) == "count"
+                            else f"R$ {row[self._measure_for(metric)]:,.2f}"
+                        ),
+                        "percentage_of_total": round(
+                            row[self._measure_for(metric)] / totals[metric] * 100, 2
+                        ),
+                    }
+                    for metric in metrics
+                },
+            }
+
+        primary = self._measure_for(metrics[0])
+        ranked = sorted(rows, key=lambda row: row[primary], reverse=True)
+        return {
+            "aggregation_type": "geographic",
+            "region_type": region_type,
+            "regions": aggregated,
+            "summary": {
+                "total_regions": len(aggregated),
+                "metrics_calculated": metrics,
+                "top_region": ranked[0][dimension] if ranked else None,
+                "bottom_region": ranked[-1][dimension] if ranked else None,
+                "source_rows": cube.row_count,
+            },
+            "visualization": {
+                "type": "choropleth_map",
+                "color_scale": "Blues",
+                "data_property": metrics[0],
+                "geo_json_url": "/api/v1/geo/brazil-states",
+            },
+        }
+
     async def generate_visualization_metadata(
         self,
         data_type: str,
@@ -12,6 +12,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 from src.agents.deodoro import (
@@ -22,6 +23,12 @@ from src.agents.deodoro import (
     BaseAgent,
 )
 from src.core import get_logger
+from src.ml.payment_graph import PaymentGraph
+from src.services.contract_frame import (
+    BENFORD_EXPECTED,
+    get_contract_frame,
+    leading_digits,
+)
 
 logger = get_logger(__name__)
 
@@ -110,6 +117,15 @@ class OxossiAgent(BaseAgent):
             "relationship_strength": 0.6,  # Threshold for suspicious relationships
         }
 
+        # Circular payment search on the payment graph
+        self.cycle_detection = {
+            "min_length": 3,  # Entities per cycle (2 would flag refunds)
+            "max_length": 6,
+            "window_days": 180,  # Max days between consecutive hops
+            "max_cycles": 10_000,  # Enumeration budget
+            "max_reported": 50,
+        }
+
         # Known fraud patterns database
         self.fraud_patterns = self._initialize_fraud_patterns()
 
@@ -316,16 +332,18 @@ class OxossiAgent(BaseAgent):
         if phantom_vendors:
             fraud_patterns.extend(phantom_vendors)
 
-        # Apply Benford's Law to contract values if enough data
-        contract_values = [
-            c.get("contract_value", 0) for c in contracts if c.get("contract_value")
-        ]
-        if len(contract_values) >= 30:
-            benford_patterns = self._analyze_benfords_law(contract_values, "Contracts")
-            fraud_patterns.extend(benford_patterns)
+        # Benford's Law and temporal analysis on the investigation's shared
+        # contract frame (parsed once for all agents)
+        frame = get_contract_frame(contracts, context.investigation_id)
+        fraud_patterns.extend(
+            self._benford_patterns(
+                frame.digit_histogram, float(frame.positive_values.sum()), "Contracts"
+            )
+        )
 
-        # Apply temporal analysis to contracts
-        temporal_patterns = self._detect_temporal_anomalies(contracts, "Contracts")
+        temporal_patterns = self._detect_temporal_anomalies(
+            contracts, "Contracts", timestamps=frame.timestamps
+        )
         fraud_patterns.extend(temporal_patterns)
 
         return fraud_patterns
@@ -801,20 +819,18 @@ class OxossiAgent(BaseAgent):
             all_patterns.extend(patterns)
 
             # Apply Benford's Law to contract values
-            contract_values = [
-                c.get("contract_value", 0)
-                for c in data["contracts"]
-                if c.get("contract_value")
-            ]
-            if len(contract_values) >= 30:
-                benford_patterns = self._analyze_benfords_law(
-                    contract_values, "Contracts"
+            frame = get_contract_frame(data["contracts"], context.investigation_id)
+            all_patterns.extend(
+                self._benford_patterns(
+                    frame.digit_histogram,
+                    float(frame.positive_values.sum()),
+                    "Contracts",
                 )
-                all_patterns.extend(benford_patterns)
+            )
 
             # Apply temporal analysis to contracts
             temporal_patterns = self._detect_temporal_anomalies(
-                data["contracts"], "Contracts"
+                data["contracts"], "Contracts", timestamps=frame.timestamps
             )
             all_patterns.extend(temporal_patterns)
 
@@ -1196,92 +1212,68 @@ class OxossiAgent(BaseAgent):
         """
         Detect circular payment patterns indicating money laundering or kickbacks.
 
-        Circular payments: A → B → C → A (money flows in a circle)
+        Circular payments: A → B → ... → A (money flows in a circle). Cycles
+        are enumerated once each on the payment graph's strongly connected
+        components, must be supported by time-ordered transfers and are
+        ranked by the amount that went round.
         """
         patterns = []
 
-        if len(transactions) < 3:
+        settings = self.cycle_detection
+        if len(transactions) < settings["min_length"]:
             return patterns
 
-        # Build payment graph
-        payment_graph = {}  # {payer_id: [(recipient_id, amount, date)]}
-
-        for trans in transactions:
-            payer = trans.get("payer_id")
-            recipient = trans.get("recipient_id")
-            amount = trans.get("amount", 0)
-            date = trans.get("date")
-
-            if not payer or not recipient:
-                continue
-
-            if payer not in payment_graph:
-                payment_graph[payer] = []
-            payment_graph[payer].append((recipient, amount, date))
-
-        # Look for circular paths (simple 3-node circles)
-        for entity_a in payment_graph:
-            for entity_b, amount_ab, date_ab in payment_graph.get(entity_a, []):
-                if entity_b not in payment_graph:
-                    continue
+        graph = PaymentGraph.from_transactions(transactions)
+        cycles = graph.find_cycles(
+            min_length=settings["min_length"],
+            max_length=settings["max_length"],
+            window_days=settings["window_days"],
+            max_cycles=settings["max_cycles"],
+        )
 
-                for entity_c, amount_bc, date_bc in payment_graph.get(entity_b, []):
-                    if entity_c not in payment_graph:
-                        continue
-
-                    # Check if C pays back to A (completing the circle)
-                    for entity_back, amount_ca, date_ca in payment_graph.get(
-                        entity_c, []
-                    ):
-                        if entity_back == entity_a:
-                            # Found circular payment: A → B → C → A
-                            patterns.append(
-                                FraudPattern(
-                                    fraud_type=FraudType.MONEY_LAUNDERING,
-                                    severity=FraudSeverity.CRITICAL,
-                                    confidence=0.85,
-                                    indicators=[
-                                        FraudIndicator(
-                                            indicator_type="circular_payments",
-                                            description=f"Circular payment pattern detected: {entity_a} → {entity_b} → {entity_c} → {entity_a}",
-                                            confidence=0.85,
-                                            evidence=[
-                                                {
-                                                    "path": [
-                                                        entity_a,
-                                                        entity_b,
-                                                        entity_c,
-                                                        entity_a,
-                                                    ],
-                                                    "amounts": [
-                                                        amount_ab,
-                                                        amount_bc,
-                                                        amount_ca,
-                                                    ],
-                                                    "total_flow": amount_ab
-                                                    + amount_bc
-                                                    + amount_ca,
-                                                }
-                                            ],
-                                            risk_score=9.0,
-                                        )
-                                    ],
-                                    entities_involved=[entity_a, entity_b, entity_c],
-                                    estimated_impact=min(
-                                        amount_ab, amount_bc, amount_ca
-                                    ),
-                                    recommendations=[
-                                        "Investigate circular payment scheme",
-                                        "Freeze accounts involved",
-                                        "Report to financial crimes unit",
-                                        "Analyze all transactions between entities",
-                                    ],
-                                    evidence_trail={
-                                        "payment_path": f"{entity_a}->{entity_b}->{entity_c}->{entity_a}",
-                                        "amounts": [amount_ab, amount_bc, amount_ca],
-                                    },
-                                )
-                            )
+        for cycle in cycles[: settings["max_reported"]]:
+            path = " → ".join(cycle.path)
+            dates = cycle.iso_dates
+            patterns.append(
+                FraudPattern(
+                    fraud_type=FraudType.MONEY_LAUNDERING,
+                    severity=FraudSeverity.CRITICAL,
+                    confidence=0.85,
+                    indicators=[
+                        FraudIndicator(
+                            indicator_type="circular_payments",
+                            description=f"Circular payment pattern detected: {path}",
+                            confidence=0.85,
+                            evidence=[
+                                {
+                                    "path": cycle.path,
+                                    "amounts": list(cycle.amounts),
+                                    "dates": dates,
+                                    "total_flow": cycle.total_flow,
+                                    "cycle_flow": cycle.flow,
+                                    "retention": round(cycle.retention, 4),
+                                    "span_days": cycle.span_days,
+                                }
+                            ],
+                            risk_score=9.0,
+                        )
+                    ],
+                    entities_involved=list(cycle.nodes),
+                    estimated_impact=cycle.flow,
+                    recommendations=[
+                        "Investigate circular payment scheme",
+                        "Freeze accounts involved",
+                        "Report to financial crimes unit",
+                        "Analyze all transactions between entities",
+                    ],
+                    evidence_trail={
+                        "payment_path": "->".join(cycle.path),
+                        "amounts": list(cycle.amounts),
+                        "dates": dates,
+                        "cycle_score": cycle.score,
+                    },
+                )
+            )
 
         return patterns
 
@@ -1457,44 +1449,41 @@ class OxossiAgent(BaseAgent):
 
         Fraudulent data often deviates from this distribution.
         """
-        patterns = []
-
         if len(values) < 30:  # Need sufficient data for statistical significance
-            return patterns
+            return []
 
         # Filter out zeros and negative values
-        valid_values = [v for v in values if v > 0]
+        valid_values = np.asarray(values, dtype=np.float64)
+        valid_values = valid_values[valid_values > 0]
 
-        if len(valid_values) < 30:
-            return patterns
+        histogram = np.bincount(leading_digits(valid_values), minlength=10)[1:]
+        return self._benford_patterns(histogram, float(valid_values.sum()), entity_name)
 
-        # Extract first digits
-        first_digits = []
-        for value in valid_values:
-            first_digit = int(str(abs(value))[0])
-            if 1 <= first_digit <= 9:
-                first_digits.append(first_digit)
+    def _benford_patterns(
+        self, digit_histogram: np.ndarray, total_value: float, entity_name: str
+    ) -> list[FraudPattern]:
+        """Benford's Law test on a first-digit histogram (counts of 1-9)."""
+        patterns = []
 
-        if len(first_digits) < 30:
+        sample_size = int(digit_histogram.sum())
+        if sample_size < 30:
             return patterns
 
         # Calculate observed distribution
-        observed_dist = {}
-        for digit in range(1, 10):
-            observed_dist[digit] = first_digits.count(digit) / len(first_digits)
+        observed_dist = {
+            digit: digit_histogram[digit - 1] / sample_size for digit in range(1, 10)
+        }
 
         # Expected distribution according to Benford's Law
-        import math
-
-        benford_dist = {digit: math.log10(1 + 1 / digit) for digit in range(1, 10)}
+        benford_dist = {
+            digit: float(BENFORD_EXPECTED[digit - 1]) for digit in range(1, 10)
+        }
 
         # Calculate chi-square statistic
-        chi_square = 0
-        for digit in range(1, 10):
-            expected_count = benford_dist[digit] * len(first_digits)
-            observed_count = first_digits.count(digit)
-            if expected_count > 0:
-                chi_square += ((observed_count - expected_count) ** 2) / expected_count
+        expected_counts = BENFORD_EXPECTED * sample_size
+        chi_square = float(
+            ((digit_histogram - expected_counts) ** 2 / expected_counts).sum()
+        )
 
         # Chi-square critical value for 8 degrees of freedom at 95% confidence is ~15.51
         # At 99% confidence it's ~20.09
@@ -1540,7 +1529,7 @@ class OxossiAgent(BaseAgent):
                                 {
                                     "chi_square": round(chi_square, 2),
                                     "threshold": deviation_threshold,
-                                    "sample_size": len(first_digits),
+                                    "sample_size": sample_size,
                                     "major_deviations": major_deviations,
                                 }
                             ],
@@ -1548,8 +1537,7 @@ class OxossiAgent(BaseAgent):
                         )
                     ],
                     entities_involved=[entity_name],
-                    estimated_impact=sum(valid_values)
-                    * 0.05,  # Estimated 5% manipulation
+                    estimated_impact=total_value * 0.05,  # Estimated 5% manipulation
                     recommendations=[
                         "Conduct detailed audit of value generation process",
                         "Verify authenticity of financial documents",
@@ -1559,9 +1547,10 @@ class OxossiAgent(BaseAgent):
                     ],
                     evidence_trail={
                         "chi_square_statistic": round(chi_square, 2),
-                        "sample_size": len(first_digits),
+                        "sample_size": sample_size,
                         "first_digit_distribution": {
-                            str(k): round(v * 100, 1) for k, v in observed_dist.items()
+                            str(k): round(float(v) * 100, 1)
+                            for k, v in observed_dist.items()
                         },
                     },
                 )
@@ -1570,7 +1559,10 @@ class OxossiAgent(BaseAgent):
         return patterns
 
     def _detect_temporal_anomalies(
-        self, data_with_timestamps: list[dict[str, Any]], entity_name: str = "Unknown"
+        self,
+        data_with_timestamps: list[dict[str, Any]],
+        entity_name: str = "Unknown",
+        timestamps: np.ndarray | None = None,
     ) -> list[FraudPattern]:
         """
         Detect temporal anomalies in transactions, contracts, or activities.
@@ -1580,21 +1572,27 @@ class OxossiAgent(BaseAgent):
         - Velocity anomalies (too fast processing)
         - Unusual clustering of events
         - Sequential timestamp manipulation
+
+        ``timestamps`` (e.g. from the shared contract frame) skips parsing.
         """
         patterns = []
 
         if len(data_with_timestamps) < 5:
             return patterns
 
-        # Convert to DataFrame for time analysis
-        df = pd.DataFrame(data_with_timestamps)
+        time_col = "timestamp"
+        if timestamps is not None:
+            df = pd.DataFrame({time_col: timestamps})
+        else:
+            # Convert to DataFrame for time analysis
+            df = pd.DataFrame(data_with_timestamps)
 
-        if "date" not in df.columns and "timestamp" not in df.columns:
-            return patterns
+            if "date" not in df.columns and "timestamp" not in df.columns:
+                return patterns
 
-        # Use date or timestamp column
-        time_col = "date" if "date" in df.columns else "timestamp"
-        df[time_col] = pd.to_datetime(df[time_col], errors="coerce")
+            # Use date or timestamp column
+            time_col = "date" if "date" in df.columns else "timestamp"
+            df[time_col] = pd.to_datetime(df[time_col], errors="coerce")
         df = df.dropna(subset=[time_col])
 
         if len(df) < 5:
@@ -0,0 +1,683 @@
+"""
+Module: agents.security_cep
+Description: Streaming IOC matching and complex event correlation for Maria Quitéria
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Indicators of compromise are compiled once. IPs, ports and file hashes go
+into hashed sets, and all payload signatures go into a single regex built
+from a prefix trie, so a payload is scanned once whatever the number of
+signatures. Each match position yields the longest signature found there.
+Shorter signatures that are prefixes of it come from a precomputed table.
+
+Detections then feed a correlation engine. For each source IP, user and
+target it keeps a ring of time buckets covering the correlation window.
+Timestamps are parsed once, at ingestion. Each arriving detection is added
+to its entities' rings, and only the rules keyed on those entities are
+evaluated. Windows are measured in whole buckets. An incident stays open
+while its entity keeps producing detections and is updated in place
+rather than raised again. It closes once the entity has been quiet for a
+full window. Stale buckets are overwritten as the ring turns, and idle
+entities are swept once per bucket, so memory follows the event rate and
+not the length of the feed.
+"""
+
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import UTC, datetime
+from itertools import count
+from typing import Any
+
+# Built-in indicators, extended by the threat intelligence feeds
+DEFAULT_SIGNATURES = {
+    "malicious_ips": ["192.168.100.100", "10.0.0.66", "172.16.254.1"],
+    "suspicious_ports": [4444, 5555, 6666, 31337],  # Common backdoor ports
+    "malware_hashes": [
+        "5f4dcc3b5aa765d61d8327deb882cf99",
+        "098f6bcd4621d373cade4e832627b4f6",
+    ],
+    "attack_patterns": [
+        "union select",  # SQL injection
+        "../../../",  # Path traversal
+        "<script>",  # XSS
+        "eval(",  # Code injection
+    ],
+}
+
+# Feed keys accepted for each indicator set
+_FEED_KEYS = {
+    "malicious_ips": ("malicious_ips",),
+    "suspicious_ports": ("suspicious_ports",),
+    "malware_hashes": ("malware_hashes",),
+    "attack_patterns": ("attack_patterns", "attack_signatures"),
+}
+
+SOURCE_KEYS = ("source_ip", "src_ip")
+USER_KEYS = ("user_id", "user")
+TARGET_KEYS = ("target", "dest_ip", "dst_ip", "resource_accessed")
+PORT_KEYS = ("dest_port", "dst_port")
+
+CORRELATION_WINDOW_SECONDS = 300
+BUCKETS_PER_WINDOW = 5
+MULTI_VECTOR_MIN_METHODS = 2
+HIGH_FREQUENCY_MIN_EVENTS = 5
+DISTRIBUTED_MIN_SOURCES = 3
+ACCOUNT_MIN_SOURCES = 3
+MAX_INCIDENT_EVENTS = 10
+
+# Attack sequences: reconnaissance → exploitation → privilege escalation
+ATTACK_SEQUENCES = {
+    "recon_exploit": ("reconnaissance", "exploitation"),
+    "exploit_escalation": ("exploitation", "privilege_escalation"),
+    "full_kill_chain": (
+        "reconnaissance",
+        "exploitation",
+        "privilege_escalation",
+        "data_exfiltration",
+    ),
+}
+
+# Kill-chain stage of detections whose event carries no ``event_type``
+_STAGES = {
+    "suspicious_port": "reconnaissance",
+    "attack_pattern": "exploitation",
+    "malware_hash": "exploitation",
+    "data_exfiltration_risk": "data_exfiltration",
+}
+
+# correlation_type: (severity, confidence, description)
+_RULES = {
+    "multi_vector_attack": ("high", 0.90, "Multiple attack vectors from {key}"),
+    "high_frequency_attack": (
+        "critical",
+        0.95,
+        "High-frequency attack detected: {count} events",
+    ),
+    "temporal_chain": ("high", 0.85, "Correlated attack chain with {count} events"),
+    "distributed_attack": ("high", 0.85, "Attack on {key} from several sources"),
+    "account_compromise": ("high", 0.80, "Account {key} used from several sources"),
+}
+
+_END = ""
+
+
+def parse_timestamp(value: Any, default: float | None = None) -> float:
+    """
+    Epoch seconds of an ISO string, datetime or number.
+
+    Naive values are taken as UTC; missing or invalid values give
+    ``default``, or the current time.
+    """
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        return value.timestamp()
+    return datetime.now(UTC).timestamp() if default is None else default
+
+
+def _first(event: Mapping[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        value = event.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _port(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flatten(values: Any) -> Iterator[Any]:
+    # Hash feeds may be grouped by algorithm ({"md5": [...], "sha256": [...]})
+    if isinstance(values, Mapping):
+        for group in values.values():
+            yield from _flatten(group)
+    elif isinstance(values, list | tuple | set | frozenset):
+        yield from values
+    elif values:
+        yield values
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    root: dict = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_END] = None
+    return _node_pattern(root)
+
+
+def _node_pattern(node: dict) -> str:
+    prefix = []
+    # Single-child runs become one literal (and keep recursion shallow)
+    while len(node) == 1 and _END not in node:
+        ((char, node),) = node.items()
+        prefix.append(char)
+    branches = [
+        re.escape(char) + _node_pattern(child)
+        for char, child in node.items()
+        if char != _END
+    ]
+    body = "|".join(branches)
+    if len(branches) > 1:
+        body = f"(?:{body})"
+    if body and _END in node:
+        body = f"(?:{body})?"  # greedy, so the longest word wins
+    return re.escape("".join(prefix)) + body
+
+
+class SignatureIndex:
+    """Compiled indicators of compromise."""
+
+    def __init__(
+        self,
+        malicious_ips: Iterable[Any] = (),
+        suspicious_ports: Iterable[Any] = (),
+        malware_hashes: Any = (),
+        attack_patterns: Iterable[Any] = (),
+    ):
+        """
+        Compile indicators.
+
+        Args:
+            malicious_ips: Known bad source IPs
+            suspicious_ports: Destination ports used by backdoors
+            malware_hashes: File hashes, flat or grouped by algorithm
+            attack_patterns: Case-insensitive payload signatures
+        """
+        self.malicious_ips = frozenset(str(ip).strip() for ip in malicious_ips)
+        self.suspicious_ports = frozenset(
+            port for port in map(_port, suspicious_ports) if port is not None
+        )
+        self.malware_hashes = frozenset(
+            str(value).strip().lower() for value in _flatten(malware_hashes)
+        )
+
+        # Lower-cased signature -> first spelling given
+        self._patterns: dict[str, str] = {}
+        for pattern in attack_patterns:
+            if pattern:
+                self._patterns.setdefault(str(pattern).lower(), str(pattern))
+        self._order = {pattern: i for i, pattern in enumerate(self._patterns)}
+        self._prefixes = {
+            pattern: [
+                pattern[:i]
+                for i in range(1, len(pattern))
+                if pattern[:i] in self._order
+            ]
+            for pattern in self._patterns
+        }
+        self._scanner = (
+            re.compile(f"(?=({_trie_pattern(self._patterns)}))")
+            if self._patterns
+            else None
+        )
+
+    @classmethod
+    def from_feeds(cls, *feeds: Mapping[str, Any]) -> "SignatureIndex":
+        """Union of the indicator sets of several feeds."""
+        merged: dict[str, list] = {name: [] for name in _FEED_KEYS}
+        for feed in feeds:
+            for name, keys in _FEED_KEYS.items():
+                for key in keys:
+                    merged[name].extend(_flatten(feed.get(key)))
+        return cls(**merged)
+
+    @property
+    def attack_patterns(self) -> list[str]:
+        """Payload signatures, in the order given."""
+        return list(self._patterns.values())
+
+    def scan(self, payload: str) -> list[str]:
+        """Signatures occurring in ``payload``, in the order given."""
+        if self._scanner is None or not payload:
+            return []
+        found = set()
+        for match in self._scanner.finditer(payload.lower()):
+            longest = match.group(1)
+            if longest not in found:
+                found.add(longest)
+                found.update(self._prefixes[longest])
+        return [self._patterns[p] for p in sorted(found, key=self._order.__getitem__)]
+
+    def match(self, event: Mapping[str, Any]) -> list[dict[str, Any]]:
+        """
+        Indicators matched by one raw event.
+
+        Args:
+            event: Network or access-log event
+
+        Returns:
+            Matched threats with type, indicator and severity
+        """
+        threats = []
+
+        source_ip = _first(event, SOURCE_KEYS)
+        if source_ip is not None and str(source_ip) in self.malicious_ips:
+            threats.append(
+                {"type": "malicious_ip", "indicator": source_ip, "severity": "high"}
+            )
+
+        port = _port(_first(event, PORT_KEYS))
+        if port in self.suspicious_ports:
+            threats.append(
+                {"type": "suspicious_port", "indicator": port, "severity": "medium"}
+            )
+
+        payload = event.get("payload")
+        if payload:
+            for pattern in self.scan(str(payload)):
+                threats.append(
+                    {"type": "attack_pattern", "indicator": pattern, "severity": "high"}
+                )
+
+        file_hash = event.get("file_hash")
+        if file_hash and str(file_hash).strip().lower() in self.malware_hashes:
+            threats.append(
+                {"type": "malware_hash", "indicator": file_hash, "severity": "critical"}
+            )
+
+        return threats
+
+
+class _Detection:
+    __slots__ = ("timestamp", "method", "stage", "source", "user", "target", "record")
+
+    def __init__(self, record: dict[str, Any], default_time: float):
+        event = record.get("event")
+        if not isinstance(event, Mapping):
+            event = record
+        self.record = record
+        self.timestamp = parse_timestamp(
+            event.get("timestamp", record.get("timestamp")), default_time
+        )
+        self.method = str(record.get("detection_method") or "unknown")
+        self.source = _key(_first(event, SOURCE_KEYS))
+        self.user = _key(_first(event, USER_KEYS))
+        self.target = _key(_first(event, TARGET_KEYS))
+        self.stage = event.get("event_type") or _stage(record)
+
+
+def _key(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+def _stage(record: Mapping[str, Any]) -> str:
+    for threat in record.get("threats") or ():
+        stage = _STAGES.get(threat.get("type"))
+        if stage:
+            return stage
+    for pattern in record.get("patterns") or ():
+        stage = _STAGES.get(pattern)
+        if stage:
+            return stage
+    return "unknown"
+
+
+class _Bucket:
+    __slots__ = ("index", "detections", "values")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.detections: list[_Detection] = []
+        self.values: Counter = Counter()
+
+
+class EntityWindow:
+    """Ring of time buckets holding one entity's recent detections."""
+
+    __slots__ = ("attribute", "ring", "last_seen")
+
+    def __init__(self, size: int, attribute: str):
+        """
+        Initialize window.
+
+        Args:
+            size: Buckets in the ring
+            attribute: Detection attribute counted per bucket
+        """
+        self.attribute = attribute
+        self.ring: list[_Bucket | None] = [None] * size
+        self.last_seen = -math.inf
+
+    def add(self, index: int, detection: _Detection) -> None:
+        """Add a detection to bucket ``index``, recycling a stale slot."""
+        slot = index % len(self.ring)
+        bucket = self.ring[slot]
+        if bucket is None or bucket.index != index:
+            bucket = self.ring[slot] = _Bucket(index)
+        bucket.detections.append(detection)
+        bucket.values[getattr(detection, self.attribute)] += 1
+        self.last_seen = max(self.last_seen, detection.timestamp)
+
+    def buckets(self, since: int) -> list[_Bucket]:
+        """Live buckets from index ``since`` on, oldest first."""
+        live = [b for b in self.ring if b is not None and b.index >= since]
+        live.sort(key=lambda bucket: bucket.index)
+        return live
+
+    def counts(self, since: int) -> Counter:
+        """Detections per attribute value from bucket ``since`` on."""
+        total: Counter = Counter()
+        for bucket in self.buckets(since):
+            total.update(bucket.values)
+        return total
+
+    def detections(self, since: int, limit: int) -> list[_Detection]:
+        """The oldest ``limit`` detections from bucket ``since`` on."""
+        found: list[_Detection] = []
+        for bucket in self.buckets(since):
+            found.extend(bucket.detections[: limit - len(found)])
+            if len(found) >= limit:
+                break
+        return found
+
+
+class _Chain:
+    __slots__ = ("detections", "size", "last_seen", "progress")
+
+    def __init__(self):
+        self.detections: list[_Detection] = []
+        self.size = 0
+        self.last_seen = -math.inf
+        self.progress = dict.fromkeys(ATTACK_SEQUENCES, 0)
+
+    def add(self, detection: _Detection) -> None:
+        if len(self.detections) < MAX_INCIDENT_EVENTS:
+            self.detections.append(detection)
+        self.size += 1
+        self.last_seen = max(self.last_seen, detection.timestamp)
+        # Each sequence is an ordered subsequence of the chain's stages
+        for name, stages in ATTACK_SEQUENCES.items():
+            step = self.progress[name]
+            if step < len(stages) and detection.stage == stages[step]:
+                self.progress[name] = step + 1
+
+    def sequence(self) -> str | None:
+        complete = [
+            name
+            for name, stages in ATTACK_SEQUENCES.items()
+            if self.progress[name] == len(stages)
+        ]
+        return max(complete, key=lambda n: len(ATTACK_SEQUENCES[n]), default=None)
+
+
+class CorrelationEngine:
+    """
+    Incremental correlation of security detections.
+
+    Rules keyed on the source IP raise multi-vector, high-frequency and
+    temporal-chain incidents. Rules keyed on the target and on the user
+    raise distributed-attack and account-compromise incidents when several
+    sources converge on them. A temporal chain is a run of detections from
+    one source with gaps no longer than the window. It names the longest
+    attack sequence its stages complete, in order.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = CORRELATION_WINDOW_SECONDS,
+        buckets_per_window: int = BUCKETS_PER_WINDOW,
+        incidents: dict[str, dict[str, Any]] | None = None,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            window_seconds: Correlation window
+            buckets_per_window: Time resolution of the window
+            incidents: Optional map kept in sync with the open incidents,
+                keyed by ``correlation_id``
+        """
+        self.window = float(window_seconds)
+        self.bucket_seconds = self.window / buckets_per_window
+        self.buckets_per_window = buckets_per_window
+        self.incidents = incidents if incidents is not None else {}
+        self.watermark = -math.inf
+        self.stats: Counter = Counter()
+        self._sources: dict[str, EntityWindow] = {}
+        self._targets: dict[str, EntityWindow] = {}
+        self._users: dict[str, EntityWindow] = {}
+        self._chains: dict[str, _Chain] = {}
+        self._open: dict[tuple[str, str], dict[str, Any]] = {}
+        self._swept = -math.inf
+        self._ids = count(1)
+
+    def ingest(self, detection: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Correlate one detection as it arrives.
+
+        Detections older than the window behind the newest one seen are
+        counted in ``stats["late"]`` and dropped.
+
+        Args:
+            detection: Detection with the raw event under ``"event"``
+
+        Returns:
+            Incidents opened by this detection; open incidents it joins
+            are updated in place
+        """
+        return self._ingest(_Detection(detection, datetime.now(UTC).timestamp()))
+
+    def ingest_many(self, detections: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Correlate a batch in timestamp order; returns the incidents opened."""
+        now = datetime.now(UTC).timestamp()
+        items = sorted(
+            (_Detection(detection, now) for detection in detections),
+            key=lambda item: item.timestamp,
+        )
+        opened = []
+        for item in items:
+            opened.extend(self._ingest(item))
+        return opened
+
+    def open_incidents(self) -> list[dict[str, Any]]:
+        """Incidents still receiving detections."""
+        return list(self._open.values())
+
+    def _ingest(self, item: _Detection) -> list[dict[str, Any]]:
+        if item.timestamp < self.watermark - self.window:
+            self.stats["late"] += 1
+            return []
+        self.stats["ingested"] += 1
+        if item.timestamp > self.watermark:
+            self.watermark = item.timestamp
+            self._sweep()
+
+        index = int(item.timestamp // self.bucket_seconds)
+        since = int(self.watermark // self.bucket_seconds) - self.buckets_per_window
+        opened: list[dict[str, Any]] = []
+
+        if item.source is not None:
+            window = self._window(self._sources, item.source, "method")
+            window.add(index, item)
+            self._on_source(item, window, since, opened)
+            self._on_chain(item, opened)
+        if item.target is not None:
+            window = self._window(self._targets, item.target, "source")
+            window.add(index, item)
+            self._on_convergence(
+                ("distributed_attack", item.target),
+                item,
+                window,
+                since,
+                DISTRIBUTED_MIN_SOURCES,
+                opened,
+            )
+        if item.user is not None:
+            window = self._window(self._users, item.user, "source")
+            window.add(index, item)
+            self._on_convergence(
+                ("account_compromise", item.user),
+                item,
+                window,
+                since,
+                ACCOUNT_MIN_SOURCES,
+                opened,
+            )
+
+        self.stats["incidents"] += len(opened)
+        return opened
+
+    def _window(
+        self, index: dict[str, EntityWindow], key: str, attribute: str
+    ) -> EntityWindow:
+        window = index.get(key)
+        if window is None:
+            window = index[key] = EntityWindow(self.buckets_per_window + 1, attribute)
+        return window
+
+    def _on_source(
+        self,
+        item: _Detection,
+        window: EntityWindow,
+        since: int,
+        opened: list[dict[str, Any]],
+    ) -> None:
+        source = item.source
+        multi = ("multi_vector_attack", source)
+        frequent = ("high_frequency_attack", f"{source}|{item.method}")
+        if multi in self._open and frequent in self._open:
+            self._join(self._open[multi], item)
+            self._join(self._open[frequent], item)
+            return
+
+        methods = window.counts(since)
+        if multi in self._open:
+            self._join(self._open[multi], item)
+        elif len(methods) >= MULTI_VECTOR_MIN_METHODS:
+            opened.append(
+                self._raise(multi, window.detections(since, MAX_INCIDENT_EVENTS))
+            )
+
+        if frequent in self._open:
+            self._join(self._open[frequent], item)
+        elif methods[item.method] >= HIGH_FREQUENCY_MIN_EVENTS:
+            same = [
+                d
+                for bucket in window.buckets(since)
+                for d in bucket.detections
+                if d.method == item.method
+            ]
+            incident = self._raise(frequent, same[:MAX_INCIDENT_EVENTS], len(same))
+            incident["source_ip"] = source
+            opened.append(incident)
+
+    def _on_chain(self, item: _Detection, opened: list[dict[str, Any]]) -> None:
+        key = ("temporal_chain", item.source)
+        chain = self._chains.get(item.source)
+        if chain is None or item.timestamp - chain.last_seen > self.window:
+            self._close(key)
+            chain = self._chains[item.source] = _Chain()
+        chain.add(item)
+
+        incident = self._open.get(key)
+        if incident is not None:
+            self._join(incident, item)
+        elif chain.size >= 2:
+            incident = self._raise(key, chain.detections)
+            opened.append(incident)
+        else:
+            return
+        incident["sequence_name"] = chain.sequence()
+        if chain.size >= 3 or incident["sequence_name"]:
+            incident["severity"] = "critical"
+
+    def _on_convergence(
+        self,
+        key: tuple[str, str],
+        item: _Detection,
+        window: EntityWindow,
+        since: int,
+        min_sources: int,
+        opened: list[dict[str, Any]],
+    ) -> None:
+        incident = self._open.get(key)
+        if incident is not None:
+            self._join(incident, item)
+            incident["sources"] = sorted(s for s in window.counts(since) if s)
+            return
+        sources = window.counts(since)
+        sources.pop(None, None)
+        if len(sources) >= min_sources:
+            incident = self._raise(key, window.detections(since, MAX_INCIDENT_EVENTS))
+            incident["sources"] = sorted(sources)
+            opened.append(incident)
+
+    def _raise(
+        self,
+        key: tuple[str, str],
+        detections: list[_Detection],
+        event_count: int | None = None,
+    ) -> dict[str, Any]:
+        rule, entity = key
+        severity, confidence, _ = _RULES[rule]
+        incident = {
+            "correlation_id": f"cep_{next(self._ids)}",
+            "correlation_type": rule,
+            "severity": severity,
+            "confidence": confidence,
+            "events": [d.record for d in detections],
+            "event_count": event_count or len(detections),
+            "first_seen": min(d.timestamp for d in detections),
+            "last_seen": max(d.timestamp for d in detections),
+        }
+        if rule in ("multi_vector_attack", "temporal_chain"):
+            incident["source_ip"] = entity
+        elif rule == "distributed_attack":
+            incident["target"] = entity
+        elif rule == "account_compromise":
+            incident["user_id"] = entity
+        self._describe(incident, entity)
+        self._open[key] = incident
+        self.incidents[incident["correlation_id"]] = incident
+        return incident
+
+    def _join(self, incident: dict[str, Any], item: _Detection) -> None:
+        if len(incident["events"]) < MAX_INCIDENT_EVENTS:
+            incident["events"].append(item.record)
+        incident["event_count"] += 1
+        incident["last_seen"] = max(incident["last_seen"], item.timestamp)
+        self._describe(incident, incident.get("source_ip"))
+
+    def _describe(self, incident: dict[str, Any], entity: Any) -> None:
+        template = _RULES[incident["correlation_type"]][2]
+        key = incident.get("target") or incident.get("user_id") or entity
+        incident["description"] = template.format(
+            key=key, count=incident["event_count"]
+        )
+
+    def _close(self, key: tuple[str, str]) -> None:
+        incident = self._open.pop(key, None)
+        if incident is not None:
+            self.incidents.pop(incident["correlation_id"], None)
+
+    def _sweep(self) -> None:
+        # Once per bucket: close quiet incidents and drop idle entities
+        bucket = self.watermark // self.bucket_seconds
+        if bucket <= self._swept:
+            return
+        self._swept = bucket
+        horizon = self.watermark - self.window
+
+        for key in [k for k, i in self._open.items() if i["last_seen"] < horizon]:
+            self._close(key)
+        for index in (self._sources, self._targets, self._users):
+            for entity in [e for e, w in index.items() if w.last_seen < horizon]:
+                del index[entity]
+        for source in [s for s, c in self._chains.items() if c.last_seen < horizon]:
+            del self._chains[source]
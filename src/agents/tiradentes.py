@@ -7,18 +7,30 @@ Date: 2025-01-24
 License: Proprietary - All rights reserved
 """
 
+import base64
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from enum import Enum
-from typing import Any
+from typing import Any, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from pydantic import Field as PydanticField
 
 from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, BaseAgent
 from src.core import AgentStatus
 from src.core.exceptions import AgentExecutionError
 from src.services.export_service import export_service
+from src.services.report_cache import (
+    ReportArtifact,
+    ReportArtifactStore,
+    content_key,
+    data_version,
+    get_report_artifact_store,
+    get_report_cache,
+)
+
+T = TypeVar("T")
 
 
 class ReportFormat(str, Enum):
@@ -84,6 +96,9 @@ class ReportRequest(BaseModel):
         default=True, description="Include recommendations"
     )
 
+    # Content address of the input data, computed once per request
+    _data_key: str | None = PrivateAttr(default=None)
+
 
 class ReporterAgent(BaseAgent):
     """
@@ -150,6 +165,10 @@ class ReporterAgent(BaseAgent):
             ReportFormat.EXECUTIVE_SUMMARY: self._render_executive_summary,
         }
 
+        # Content-addressed caches shared by every reporter in the process
+        self.report_cache = get_report_cache()
+        self._artifact_store: ReportArtifactStore | None = None
+
         self.logger.info(
             "tiradentes_initialized",
             agent_name=self.name,
@@ -157,6 +176,13 @@ class ReporterAgent(BaseAgent):
             max_length=max_report_length,
         )
 
+    @property
+    def artifact_store(self) -> ReportArtifactStore:
+        """Store of rendered binary reports."""
+        if self._artifact_store is None:
+            self._artifact_store = get_report_artifact_store()
+        return self._artifact_store
+
     async def initialize(self) -> None:
         """Initialize agent resources."""
         self.logger.info(f"{self.name} agent initialized")
@@ -209,10 +235,17 @@ class ReporterAgent(BaseAgent):
             # Generate report content
             report_sections = await self._generate_report_content(request, context)
 
-            # Render report in requested format
-            formatted_report = await self._render_report(
-                report_sections, request, context
-            )
+            # Render report in requested format; binary formats by reference
+            artifact = None
+            if request.format == ReportFormat.PDF:
+                artifact = await self._render_pdf_artifact(
+                    report_sections, request, context
+                )
+                formatted_report = ""
+            else:
+                formatted_report = await self._render_report(
+                    report_sections, request, context
+                )
 
             # Create result message
             result = {
@@ -230,6 +263,8 @@ class ReporterAgent(BaseAgent):
                     "word_count": self._count_words(formatted_report),
                 },
             }
+            if artifact is not None:
+                result["artifact"] = artifact.as_dict()
 
             self.logger.info(
                 "report_generation_completed",
@@ -284,6 +319,30 @@ class ReporterAgent(BaseAgent):
             return await generator(request, context)
         raise AgentExecutionError(f"Unsupported report type: {request.report_type}")
 
+    def _data_key(self, request: ReportRequest) -> str:
+        """Content address of the request's investigation and analysis data."""
+        if request._data_key is None:
+            request._data_key = content_key(
+                data_version(request.investigation_results),
+                data_version(request.analysis_results),
+            )
+        return request._data_key
+
+    def _cached(
+        self, request: ReportRequest, builder: Callable[..., T], *args: Any
+    ) -> T:
+        """
+        Call a section builder through the report cache.
+
+        Builders are pure functions of the request data, so the key is the
+        data's content address, the builder and its scalar arguments
+        (audience, report type, category).
+        """
+        scalars = [a for a in args if isinstance(a, str | int | float | bool)]
+        name = getattr(builder, "__qualname__", repr(builder))
+        key = content_key("section", self._data_key(request), name, scalars)
+        return self.report_cache.get_or_build(key, lambda: builder(*args))
+
     async def _generate_investigation_report(
         self, request: ReportRequest, context: AgentContext
     ) -> list[ReportSection]:
@@ -299,8 +358,11 @@ class ReporterAgent(BaseAgent):
 
         # Executive Summary
         if request.executive_summary:
-            exec_summary = self._create_executive_summary(
-                inv_data, request.target_audience
+            exec_summary = self._cached(
+                request,
+                self._create_executive_summary,
+                inv_data,
+                request.target_audience,
             )
             sections.append(
                 ReportSection(
@@ -309,7 +371,9 @@ class ReporterAgent(BaseAgent):
             )
 
         # Investigation Overview
-        overview = self._create_investigation_overview(inv_data, summary)
+        overview = self._cached(
+            request, self._create_investigation_overview, inv_data, summary
+        )
         sections.append(
             ReportSection(
                 title="Visão Geral da Investigação", content=overview, importance=4
@@ -318,13 +382,18 @@ class ReporterAgent(BaseAgent):
 
         # Anomalies Analysis
         if anomalies and request.detailed_findings:
-            anomaly_sections = self._create_anomaly_sections(
-                anomalies, request.target_audience
+            anomaly_sections = self._cached(
+                request,
+                self._create_anomaly_sections,
+                anomalies,
+                request.target_audience,
             )
             sections.extend(anomaly_sections)
 
         # Risk Assessment
-        risk_section = self._create_risk_assessment(summary, anomalies)
+        risk_section = self._cached(
+            request, self._create_risk_assessment, summary, anomalies
+        )
         sections.append(
             ReportSection(
                 title="Avaliação de Risco", content=risk_section, importance=4
@@ -333,7 +402,9 @@ class ReporterAgent(BaseAgent):
 
         # Recommendations
         if request.recommendations:
-            recommendations = self._create_recommendations(anomalies, "investigation")
+            recommendations = self._cached(
+                request, self._create_recommendations, anomalies, "investigation"
+            )
             sections.append(
                 ReportSection(
                     title="Recomendações", content=recommendations, importance=5
@@ -359,8 +430,11 @@ class ReporterAgent(BaseAgent):
 
         # Executive Summary
         if request.executive_summary:
-            exec_summary = self._create_analysis_executive_summary(
-                analysis_data, request.target_audience
+            exec_summary = self._cached(
+                request,
+                self._create_analysis_executive_summary,
+                analysis_data,
+                request.target_audience,
             )
             sections.append(
                 ReportSection(
@@ -371,21 +445,28 @@ class ReporterAgent(BaseAgent):
             )
 
         # Data Overview
-        overview = self._create_analysis_overview(analysis_data, summary)
+        overview = self._cached(
+            request, self._create_analysis_overview, analysis_data, summary
+        )
         sections.append(
             ReportSection(title="Visão Geral dos Dados", content=overview, importance=4)
         )
 
         # Pattern Analysis
         if patterns and request.detailed_findings:
-            pattern_sections = self._create_pattern_sections(
-                patterns, request.target_audience
+            pattern_sections = self._cached(
+                request,
+                self._create_pattern_sections,
+                patterns,
+                request.target_audience,
             )
             sections.extend(pattern_sections)
 
         # Correlation Analysis
         if correlations and request.detailed_findings:
-            correlation_section = self._create_correlation_section(correlations)
+            correlation_section = self._cached(
+                request, self._create_correlation_section, correlations
+            )
             sections.append(
                 ReportSection(
                     title="Análise de Correlações",
@@ -396,7 +477,9 @@ class ReporterAgent(BaseAgent):
 
         # Key Insights
         if insights:
-            insights_section = self._create_insights_section(insights)
+            insights_section = self._cached(
+                request, self._create_insights_section, insights
+            )
             sections.append(
                 ReportSection(
                     title="Principais Insights", content=insights_section, importance=4
@@ -405,7 +488,9 @@ class ReporterAgent(BaseAgent):
 
         # Recommendations
         if request.recommendations:
-            recommendations = self._create_recommendations(patterns, "analysis")
+            recommendations = self._cached(
+                request, self._create_recommendations, patterns, "analysis"
+            )
             sections.append(
                 ReportSection(
                     title="Recomendações Estratégicas",
@@ -428,7 +513,9 @@ class ReporterAgent(BaseAgent):
 
         # Combined executive summary
         if request.executive_summary:
-            combined_summary = self._create_combined_executive_summary(
+            combined_summary = self._cached(
+                request,
+                self._create_combined_executive_summary,
                 request.investigation_results,
                 request.analysis_results,
                 request.target_audience,
@@ -451,8 +538,11 @@ class ReporterAgent(BaseAgent):
                 sections.append(section)
 
         # Combined conclusions
-        combined_conclusions = self._create_combined_conclusions(
-            request.investigation_results, request.analysis_results
+        combined_conclusions = self._cached(
+            request,
+            self._create_combined_conclusions,
+            request.investigation_results,
+            request.analysis_results,
         )
         sections.append(
             ReportSection(
@@ -470,8 +560,12 @@ class ReporterAgent(BaseAgent):
         """Generate executive summary only."""
         sections = []
 
-        summary_content = self._create_combined_executive_summary(
-            request.investigation_results, request.analysis_results, "executive"
+        summary_content = self._cached(
+            request,
+            self._create_combined_executive_summary,
+            request.investigation_results,
+            request.analysis_results,
+            "executive",
         )
 
         sections.append(
@@ -495,7 +589,11 @@ class ReporterAgent(BaseAgent):
                 # High priority anomalies
                 high_priority = [a for a in anomalies if a.get("severity", 0) > 0.7]
                 if high_priority:
-                    content = self._create_high_priority_anomaly_summary(high_priority)
+                    content = self._cached(
+                        request,
+                        self._create_high_priority_anomaly_summary,
+                        high_priority,
+                    )
                     sections.append(
                         ReportSection(
                             title="Anomalias de Alta Prioridade",
@@ -513,8 +611,11 @@ class ReporterAgent(BaseAgent):
                     categories[cat].append(anomaly)
 
                 for category, cat_anomalies in categories.items():
-                    content = self._create_category_anomaly_summary(
-                        category, cat_anomalies
+                    content = self._cached(
+                        request,
+                        self._create_category_anomaly_summary,
+                        category,
+                        cat_anomalies,
                     )
                     sections.append(
                         ReportSection(
@@ -541,7 +642,9 @@ class ReporterAgent(BaseAgent):
             ]
 
             if trend_patterns:
-                content = self._create_trend_analysis_content(trend_patterns)
+                content = self._cached(
+                    request, self._create_trend_analysis_content, trend_patterns
+                )
                 sections.append(
                     ReportSection(
                         title="Análise de Tendências", content=content, importance=4
@@ -731,11 +834,51 @@ class ReporterAgent(BaseAgent):
         Returns:
             Formatted report content
         """
-        if request.format in self.format_renderers:
-            renderer = self.format_renderers[request.format]
-            return await renderer(sections, request, context)
         # Default to markdown
-        return await self._render_markdown(sections, request, context)
+        renderer = self.format_renderers.get(request.format, self._render_markdown)
+        if request.format == ReportFormat.PDF:
+            # Binary output is cached in the artifact store instead
+            return await renderer(sections, request, context)
+        return await self._render_cached(
+            request.format, renderer, sections, request, context
+        )
+
+    def _render_key(
+        self,
+        report_format: ReportFormat,
+        sections: list[ReportSection],
+        request: ReportRequest,
+        context: AgentContext,
+    ) -> str:
+        """Content address of a rendering of ``sections``."""
+        return content_key(
+            "render",
+            report_format,
+            request.report_type,
+            request.target_audience,
+            request.language,
+            context.investigation_id,
+            [
+                (s.title, s.content, s.importance, s.subsections, s.charts, s.tables)
+                for s in sections
+            ],
+        )
+
+    async def _render_cached(
+        self,
+        report_format: ReportFormat,
+        renderer: Callable,
+        sections: list[ReportSection],
+        request: ReportRequest,
+        context: AgentContext,
+    ) -> str:
+        """Render through the report cache (same sections, same output)."""
+        key = self._render_key(report_format, sections, request, context)
+        rendered = self.report_cache.get(key)
+        if rendered is None:
+            rendered = await renderer(sections, request, context)
+            self.report_cache.set(key, rendered)
+        return rendered
 
     async def _render_markdown(
         self,
@@ -786,8 +929,7 @@ class ReporterAgent(BaseAgent):
         html_parts = []
 
         # HTML header
-        html_parts.append(
-            """
+        html_parts.append("""
         <!DOCTYPE html>
         <html lang="pt-BR">
         <head>
@@ -805,22 +947,19 @@ class ReporterAgent(BaseAgent):
             </style>
         </head>
         <body>
-        """
-        )
+        """)
 
         # Report content
         html_parts.append(
             f"<h1>Relatório: {request.report_type.value.replace('_', ' ').title()}</h1>"
         )
-        html_parts.append(
-            f"""
+        html_parts.append(f"""
         <div class="metadata">
             <strong>Data:</strong> {datetime.now(UTC).strftime('%d/%m/%Y %H:%M')}<br>
             <strong>ID da Investigação:</strong> {context.investigation_id}<br>
             <strong>Público-alvo:</strong> {request.target_audience}
         </div>
-        """
-        )
+        """)
 
         # Render sections
         for section in sorted(sections, key=lambda s: s.importance, reverse=True):
@@ -835,14 +974,12 @@ class ReporterAgent(BaseAgent):
             html_parts.append("</div>")
 
         # HTML footer
-        html_parts.append(
-            """
+        html_parts.append("""
         <hr>
         <p><em>Relatório gerado automaticamente pelo sistema Cidadão.AI</em></p>
         </body>
         </html>
-        """
-        )
+        """)
 
         return "\n".join(html_parts)
 
@@ -1902,6 +2039,35 @@ class ReporterAgent(BaseAgent):
 
         return "\n".join(content)
 
+    async def _render_pdf_artifact(
+        self,
+        sections: list[ReportSection],
+        request: ReportRequest,
+        context: AgentContext,
+    ) -> ReportArtifact:
+        """Render report as PDF once per content, kept in the artifact store."""
+        key = self._render_key(ReportFormat.PDF, sections, request, context)
+
+        async def render() -> bytes:
+            # The PDF is rendered from the (cached) markdown
+            markdown_content = await self._render_cached(
+                ReportFormat.MARKDOWN, self._render_markdown, sections, request, context
+            )
+            return await export_service.generate_pdf(
+                content=markdown_content,
+                title=f"Relatório: {request.report_type.value.replace('_', ' ').title()}",
+                metadata={
+                    "generated_at": datetime.now(UTC).isoformat(),
+                    "report_type": request.report_type.value,
+                    "investigation_id": context.investigation_id,
+                    "target_audience": request.target_audience,
+                    "author": "Agente Tiradentes - Cidadão.AI",
+                },
+                format_type="report",
+            )
+
+        return await self.artifact_store.get_or_create(key, render, "application/pdf")
+
     async def _render_pdf(
         self,
         sections: list[ReportSection],
@@ -1909,24 +2075,7 @@ class ReporterAgent(BaseAgent):
         context: AgentContext,
     ) -> str:
         """Render report in PDF format and return base64 encoded string."""
-        # First convert sections to markdown
-        markdown_content = await self._render_markdown(sections, request, context)
-
-        # Generate PDF using export service
-        pdf_bytes = await export_service.generate_pdf(
-            content=markdown_content,
-            title=f"Relatório: {request.report_type.value.replace('_', ' ').title()}",
-            metadata={
-                "generated_at": datetime.now(UTC).isoformat(),
-                "report_type": request.report_type.value,
-                "investigation_id": context.investigation_id,
-                "target_audience": request.target_audience,
-                "author": "Agente Tiradentes - Cidadão.AI",
-            },
-            format_type="report",
-        )
-
-        # Return base64 encoded PDF for easy transmission
-        import base64
-
+        # Inline form for direct callers; process() returns a reference instead
+        artifact = await self._render_pdf_artifact(sections, request, context)
+        pdf_bytes = await self.artifact_store.read(artifact)
         return base64.b64encode(pdf_bytes).decode("utf-8")
@@ -28,6 +28,7 @@ from src.core.monitoring import (
     TRANSPARENCY_API_DATA_FETCHED,
 )
 from src.ml.spectral_analyzer import SpectralAnalyzer, SpectralAnomaly
+from src.services.contract_frame import get_contract_frame
 from src.services.transparency_apis import get_transparency_collector
 from src.tools.dados_gov_tool import DadosGovTool
 from src.tools.models_client import get_models_client
@@ -771,21 +772,17 @@ class InvestigatorAgent(BaseAgent):
         """
         anomalies = []
 
-        # Extract contract values
-        values = []
-        valid_contracts = []
-
-        for contract in contracts_data:
-            valor = contract.get("valorInicial") or contract.get("valorGlobal")
-            if valor and isinstance(valor, (int, float)) and valor > 0:
-                values.append(float(valor))
-                valid_contracts.append(contract)
+        # Contract values from the investigation's shared contract frame
+        frame = get_contract_frame(contracts_data, context.investigation_id)
+        positive = np.flatnonzero(frame.positive_mask)
+        values_array = frame.values[positive]
+        values = values_array.tolist()
+        valid_contracts = [frame.records[i] for i in positive]
 
         if len(values) < 10:  # Need minimum samples for statistical analysis
             return anomalies
 
         # Calculate statistical measures
-        values_array = np.array(values)
         mean_value = np.mean(values_array)
         std_value = np.std(values_array)
 
@@ -854,33 +851,23 @@ class InvestigatorAgent(BaseAgent):
         """
         anomalies = []
 
-        # Group contracts by vendor
-        vendor_stats = {}
-        total_value = 0
-
-        for contract in contracts_data:
-            supplier = contract.get("fornecedor", {})
-            vendor_name = supplier.get("nome", "Unknown")
-            vendor_cnpj = supplier.get("cnpj", "Unknown")
-            vendor_key = f"{vendor_name}|{vendor_cnpj}"
+        # Group contracts by vendor (segmented sums over the shared frame;
+        # contracts without a supplier form their own "Unknown" group)
+        frame = get_contract_frame(contracts_data, context.investigation_id)
+        counts, sums = frame.group_totals(
+            frame.vendor_codes + 1, len(frame.vendors) + 1
+        )
+        total_value = float(sums.sum())
 
-            valor = contract.get("valorInicial") or contract.get("valorGlobal") or 0
-            if isinstance(valor, (int, float)):
-                valor = float(valor)
-                total_value += valor
-
-                if vendor_key not in vendor_stats:
-                    vendor_stats[vendor_key] = {
-                        "name": vendor_name,
-                        "cnpj": vendor_cnpj,
-                        "contracts": [],
-                        "total_value": 0,
-                        "contract_count": 0,
-                    }
-
-                vendor_stats[vendor_key]["contracts"].append(contract)
-                vendor_stats[vendor_key]["total_value"] += valor
-                vendor_stats[vendor_key]["contract_count"] += 1
+        vendor_stats = {}
+        for code in np.flatnonzero(counts):
+            name, cnpj = frame.vendors[code - 1] if code else (None, None)
+            vendor_stats[code] = {
+                "name": name or "Unknown",
+                "cnpj": cnpj or "Unknown",
+                "total_value": float(sums[code]),
+                "contract_count": int(counts[code]),
+            }
 
         if total_value == 0:
             return anomalies
@@ -18,10 +18,8 @@ from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from src.api.middleware.compression import CompressionMiddleware
-from src.api.middleware.logging_middleware import LoggingMiddleware
-from src.api.middleware.metrics_middleware import MetricsMiddleware, setup_http_metrics
-from src.api.middleware.rate_limit import RateLimitMiddleware
+from src.api.middleware.metrics_middleware import setup_http_metrics
+from src.api.middleware.request_pipeline import RequestPipelineMiddleware
 from src.api.routes import (
     academy,
     agent_metrics,
@@ -58,11 +56,7 @@ from src.api.v1 import dados_gov
 from src.core import get_logger, settings
 from src.core.audit import AuditContext, AuditEventType, AuditSeverity, audit_logger
 from src.core.exceptions import CidadaoAIError, create_error_response
-from src.infrastructure.observability import (
-    CorrelationMiddleware,
-    initialize_app_info,
-    tracing_manager,
-)
+from src.infrastructure.observability import initialize_app_info, tracing_manager
 from src.infrastructure.observability.grafana_cloud_pusher import grafana_pusher
 
 # Swagger UI imports removed - using FastAPI defaults now
@@ -114,9 +108,10 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         logger.info("running_alembic_migrations")
         import os
 
-        from alembic import command
         from alembic.config import Config
 
+        from alembic import command
+
         # Use absolute path to find alembic.ini regardless of CWD
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         alembic_ini = os.path.join(base_dir, "alembic.ini")
@@ -160,6 +155,11 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Start Grafana Cloud metrics push
     await grafana_pusher.start()
 
+    # Resume webhook deliveries left in the outbox by the previous run
+    from src.services.webhook_service import webhook_service
+
+    webhook_service.dispatcher.start()
+
     yield
 
     # Shutdown
@@ -184,6 +184,19 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     await cleanup_memory_on_shutdown()
 
+    # Drain buffered chat writes before the database goes away
+    from src.services.chat_persistence import get_chat_write_behind_log
+
+    await get_chat_write_behind_log().close()
+
+    # Write API key usage counted since the last bulk flush
+    from src.services.api_key_cache import get_api_key_usage
+
+    await get_api_key_usage().close()
+
+    # Stop webhook workers; undelivered events stay in the outbox
+    await webhook_service.close()
+
     # Log shutdown event
     await audit_logger.log_event(
         event_type=AuditEventType.SYSTEM_SHUTDOWN,
@@ -267,10 +280,20 @@ async def custom_swagger_ui_html() -> HTMLResponse:
 # The SecurityMiddleware has its own IP blocklist that blocks external access
 # TODO: Configure proper IP whitelist for production after frontend integration
 # app.add_middleware(SecurityMiddleware)  # RE-ENABLE AFTER CONFIGURING WHITELIST
-app.add_middleware(LoggingMiddleware)
 
-# Add compression middleware for mobile optimization
-app.add_middleware(CompressionMiddleware, minimum_size=1024)  # Compress responses > 1KB
+# Correlation ids, request logging, rate limiting, HTTP metrics and query
+# tracking run in one pure-ASGI pass (inside CORS so 429s carry CORS headers)
+app.add_middleware(
+    RequestPipelineMiddleware,
+    default_tier="free",
+    tracked_paths=[
+        "/api/v1/investigations",
+        "/api/v1/contracts",
+        "/api/v1/analysis",
+        "/api/v1/reports",
+    ],
+    sample_rate=0.1 if settings.is_production else 1.0,  # 10% sampling in production
+)
 
 # Add trusted host middleware for production
 # DISABLED for HuggingFace Spaces - causes issues with proxy headers
@@ -290,12 +313,6 @@ from src.api.middleware.cors_enhanced import setup_cors
 
 setup_cors(app)
 
-# Add observability middleware
-app.add_middleware(CorrelationMiddleware, generate_request_id=True)
-
-# Add metrics middleware for automatic HTTP metrics
-app.add_middleware(MetricsMiddleware)
-
 # Add compression middleware (exclude docs to prevent Swagger UI breakage)
 from src.api.middleware.compression import add_compression_middleware
 
@@ -366,23 +383,6 @@ if ENABLE_IP_WHITELIST and (settings.is_production or settings.app_env == "stagi
         strict_mode=False,  # Allow requests if IP can't be determined
     )
 
-# Add rate limiting middleware
-app.add_middleware(RateLimitMiddleware, default_tier="free", strategy="sliding_window")
-
-# Add query tracking middleware for cache optimization
-from src.api.middleware.query_tracking import QueryTrackingMiddleware
-
-app.add_middleware(
-    QueryTrackingMiddleware,
-    tracked_paths=[
-        "/api/v1/investigations",
-        "/api/v1/contracts",
-        "/api/v1/analysis",
-        "/api/v1/reports",
-    ],
-    sample_rate=0.1 if settings.is_production else 1.0,  # 10% sampling in production
-)
-
 
 # Mount static files for images and CSS
 import os
@@ -390,6 +390,23 @@ class AuthManager:
             )
         return users
 
+    def get_users_by_ids(self, user_ids: list[str]) -> dict[str, User]:
+        """Get the users with the given IDs in one pass over the user store"""
+        wanted = set(user_ids)
+        return {
+            data["id"]: User(
+                id=data["id"],
+                email=data["email"],
+                name=data["name"],
+                role=data["role"],
+                is_active=data["is_active"],
+                created_at=data["created_at"],
+                last_login=data.get("last_login"),
+            )
+            for data in self.users_db.values()
+            if data["id"] in wanted
+        }
+
 
 # Global auth manager instance
 auth_manager = AuthManager()
@@ -0,0 +1,224 @@
+"""
+Static cost analysis of GraphQL operations.
+
+Every operation is scored from its document before anything executes: a
+field costs one, and fields under a list cost as many times as the list
+is expected to be long. The expected length is the literal ``limit`` (or
+``pagination: {limit}``) argument of the list field, ``MAX_PAGE_SIZE``
+when it comes from a variable, and ``DEFAULT_LIST_SIZE`` otherwise.
+Operations nested deeper than ``max_depth``, selecting more than
+``max_width`` fields at one level or costing more than ``max_cost`` are
+rejected with a validation error.
+"""
+
+from dataclasses import dataclass
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLNamedType,
+    GraphQLObjectType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    IntValueNode,
+    ObjectValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    ValidationContext,
+    ValidationRule,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+)
+
+MAX_DEPTH = 8
+MAX_WIDTH = 50
+MAX_COST = 5000
+# Expected length of a list without a limit argument
+DEFAULT_LIST_SIZE = 20
+# Largest page a list resolver returns; variables are assumed to ask for it
+MAX_PAGE_SIZE = 100
+
+
+@dataclass
+class OperationCost:
+    """Static cost of one operation."""
+
+    cost: int = 0
+    depth: int = 0
+    width: int = 0
+
+
+def _list_size(node: FieldNode) -> int:
+    """Expected length of the list a field returns."""
+    for argument in node.arguments:
+        value = argument.value
+        if argument.name.value == "pagination" and isinstance(value, ObjectValueNode):
+            value = next(
+                (f.value for f in value.fields if f.name.value == "limit"), None
+            )
+        elif argument.name.value not in ("limit", "first"):
+            continue
+        if isinstance(value, IntValueNode):
+            return min(int(value.value), MAX_PAGE_SIZE)
+        if isinstance(value, VariableNode):
+            return MAX_PAGE_SIZE
+    return DEFAULT_LIST_SIZE
+
+
+class _CostWalker:
+    def __init__(
+        self,
+        fragments: dict[str, FragmentDefinitionNode],
+        schema: GraphQLSchema,
+        max_depth: int,
+    ):
+        self.fragments = fragments
+        self.schema = schema
+        self.max_depth = max_depth
+        self.result = OperationCost()
+
+    def fields(
+        self,
+        selection_set: SelectionSetNode,
+        parent: GraphQLNamedType | None,
+        seen: tuple[str, ...] = (),
+    ):
+        """
+        Fields selected at one level, with fragments expanded.
+
+        Yields each field with its parent type and the fragments spread on
+        the way to it, so nested selections cannot re-enter them.
+        """
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection, parent, seen
+            elif isinstance(selection, InlineFragmentNode):
+                condition = selection.type_condition
+                target = (
+                    self.schema.get_type(condition.name.value) if condition else parent
+                )
+                yield from self.fields(selection.selection_set, target, seen)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in seen:
+                    continue  # Reported by the standard validation rules
+                target = self.schema.get_type(fragment.type_condition.name.value)
+                yield from self.fields(fragment.selection_set, target, (*seen, name))
+
+    def walk(
+        self,
+        selection_set: SelectionSetNode,
+        parent: GraphQLNamedType | None,
+        depth: int,
+        seen: tuple[str, ...] = (),
+    ) -> int:
+        """Cost of a selection set, recording its depth and width."""
+        self.result.depth = max(self.result.depth, depth)
+        if depth > self.max_depth:
+            return 0  # Already rejected; no need to look deeper
+        selected = list(self.fields(selection_set, parent, seen))
+        self.result.width = max(self.result.width, len(selected))
+
+        cost = 0
+        for node, node_parent, node_seen in selected:
+            cost += 1
+            if node.selection_set is None:
+                continue
+            field_type = None
+            if isinstance(node_parent, GraphQLObjectType):
+                definition = node_parent.fields.get(node.name.value)
+                field_type = definition.type if definition else None
+            child = get_named_type(field_type) if field_type else None
+            children = self.walk(node.selection_set, child, depth + 1, node_seen)
+            if field_type is not None and is_list_type(get_nullable_type(field_type)):
+                children *= _list_size(node)
+            cost += children
+        return cost
+
+
+def operation_cost(
+    operation: OperationDefinitionNode,
+    fragments: dict[str, FragmentDefinitionNode],
+    schema: GraphQLSchema,
+    max_depth: int = MAX_DEPTH,
+) -> OperationCost:
+    """
+    Score one operation of a document.
+
+    Args:
+        operation: Operation to score
+        fragments: Fragment definitions of the document by name
+        schema: graphql-core schema the operation targets
+        max_depth: Selections deeper than this are not walked (the reported
+            depth is then ``max_depth + 1``)
+
+    Returns:
+        Cost, depth and widest selection of the operation
+    """
+    root = schema.get_root_type(operation.operation)
+    walker = _CostWalker(fragments, schema, max_depth)
+    walker.result.cost = walker.walk(operation.selection_set, root, 1)
+    return walker.result
+
+
+def query_cost_rule(
+    max_depth: int = MAX_DEPTH,
+    max_width: int = MAX_WIDTH,
+    max_cost: int = MAX_COST,
+) -> type[ValidationRule]:
+    """
+    Validation rule rejecting operations over the given limits.
+
+    Args:
+        max_depth: Deepest selection allowed
+        max_width: Most fields allowed in one selection set
+        max_cost: Highest static cost allowed
+
+    Returns:
+        A graphql-core validation rule class
+    """
+
+    class QueryCostRule(ValidationRule):
+        def __init__(self, context: ValidationContext):
+            super().__init__(context)
+            self.fragments = {
+                definition.name.value: definition
+                for definition in context.document.definitions
+                if isinstance(definition, FragmentDefinitionNode)
+            }
+
+        def enter_operation_definition(self, node: OperationDefinitionNode, *_args):
+            cost = operation_cost(node, self.fragments, self.context.schema, max_depth)
+            name = node.name.value if node.name else "anonymous"
+            if cost.depth > max_depth:
+                self.report_error(
+                    GraphQLError(
+                        f"Operation '{name}' is nested more than {max_depth}"
+                        " levels deep.",
+                        node,
+                    )
+                )
+            if cost.width > max_width:
+                self.report_error(
+                    GraphQLError(
+                        f"Operation '{name}' selects {cost.width} fields at one"
+                        f" level; the maximum is {max_width}.",
+                        node,
+                    )
+                )
+            if cost.cost > max_cost:
+                self.report_error(
+                    GraphQLError(
+                        f"Operation '{name}' has an estimated cost of {cost.cost};"
+                        f" the maximum is {max_cost}.",
+                        node,
+                    )
+                )
+            return self.SKIP
+
+    return QueryCostRule
@@ -0,0 +1,90 @@
+"""
+Per-request DataLoaders for the GraphQL schema.
+
+Nested fields such as ``Investigation.user`` or ``Contract.anomalies`` are
+resolved once per parent object. Each resolver asks a loader for its key;
+the loader collects the keys requested in the same event-loop tick,
+removes duplicates and fetches them with one ``IN (...)`` query, so a page
+of N investigations costs one query per nested field instead of N. Loaders
+cache per request only - they are created with the request context and
+never share data between users.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+from strawberry.dataloader import DataLoader
+
+from src.core import get_logger
+from src.services.investigation_service_selector import investigation_service
+
+logger = get_logger(__name__)
+
+
+async def load_investigations(ids: list[str]) -> list[Any | None]:
+    """Investigations by ID, in key order."""
+    get_many = getattr(investigation_service, "get_many", None)
+    if get_many is not None:
+        records = await get_many(ids)
+    else:
+        # Services without batch support (REST/in-memory) fall back to lookups
+        records = await asyncio.gather(
+            *(investigation_service.get_by_id(i) for i in ids)
+        )
+    by_id = {str(record.id): record for record in records if record is not None}
+    logger.debug("graphql_investigations_batch", keys=len(ids), found=len(by_id))
+    return [by_id.get(str(i)) for i in ids]
+
+
+async def load_contract_anomaly_references(contract_ids: list[str]) -> list[list[Any]]:
+    """Anomaly references of each contract, in key order."""
+    get_references = getattr(
+        investigation_service, "get_contract_anomaly_references", None
+    )
+    if get_references is None:
+        return [[] for _ in contract_ids]
+
+    by_contract: dict[str, list[Any]] = defaultdict(list)
+    for reference in await get_references(contract_ids):
+        by_contract[str(reference.contract_id)].append(reference)
+    return [by_contract.get(str(i), []) for i in contract_ids]
+
+
+async def load_users(user_ids: list[str]) -> list[Any | None]:
+    """Users by ID, in key order."""
+    from src.api.auth import auth_manager
+
+    by_id = auth_manager.get_users_by_ids(user_ids)
+    return [by_id.get(str(i)) for i in user_ids]
+
+
+@dataclass
+class GraphQLLoaders:
+    """DataLoaders of one GraphQL request."""
+
+    investigations: DataLoader = field(
+        default_factory=lambda: DataLoader(load_fn=load_investigations)
+    )
+    contract_anomalies: DataLoader = field(
+        default_factory=lambda: DataLoader(load_fn=load_contract_anomaly_references)
+    )
+    users: DataLoader = field(default_factory=lambda: DataLoader(load_fn=load_users))
+
+    def prime_investigations(self, records: list[Any]) -> None:
+        """Remember investigations a parent resolver already fetched."""
+        self.investigations.prime_many({str(r.id): r for r in records})
+
+
+def create_loaders() -> GraphQLLoaders:
+    """Fresh loaders for a new request."""
+    return GraphQLLoaders()
+
+
+def get_loaders(context: dict[str, Any]) -> GraphQLLoaders:
+    """Loaders of the request, created on first use."""
+    loaders = context.get("loaders")
+    if loaders is None:
+        loaders = context["loaders"] = create_loaders()
+    return loaders
@@ -0,0 +1,167 @@
+"""
+Persisted GraphQL queries.
+
+Clients send the sha256 hash of a document instead of its text, following
+the Apollo automatic persisted queries protocol
+(``extensions.persistedQuery.sha256Hash``). An unknown hash is answered
+with ``PersistedQueryNotFound``; the client then sends the hash together
+with the document, which registers it. Documents listed in a manifest are
+known from the start, and in persisted-only mode nothing else is accepted,
+so the server only ever parses and validates documents it has seen.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+PERSISTED_QUERY_VERSION = 1
+
+
+class PersistedQueryNotFound(Exception):
+    """The hash is not registered; the client should resend the document."""
+
+    def __init__(self) -> None:
+        super().__init__("PersistedQueryNotFound")
+
+
+class PersistedQueryError(Exception):
+    """The persisted query request is invalid or not allowed."""
+
+
+def query_hash(query: str) -> str:
+    """Hex sha256 of a GraphQL document, as computed by clients."""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryStore:
+    """
+    Documents by hash.
+
+    Manifest entries are permanent; documents registered by clients are
+    kept least recently used up to ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        manifest: dict[str, str] | None = None,
+        persisted_only: bool = False,
+        max_entries: int = 1000,
+    ) -> None:
+        """
+        Initialize persisted query store.
+
+        Args:
+            manifest: Allowed documents by sha256 hash
+            persisted_only: Reject documents that are not in the manifest
+            max_entries: Most client-registered documents kept
+        """
+        self.persisted_only = persisted_only
+        self.max_entries = max_entries
+        self._manifest: dict[str, str] = {}
+        self._registered: OrderedDict[str, str] = OrderedDict()
+        for sha256, query in (manifest or {}).items():
+            if query_hash(query) != sha256:
+                raise PersistedQueryError(f"Manifest hash mismatch for {sha256}")
+            self._manifest[sha256] = query
+
+    @classmethod
+    def from_file(cls, path: Path | str, **kwargs: Any) -> "PersistedQueryStore":
+        """Store preloaded with a JSON manifest of ``{hash: document}``."""
+        manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(manifest=manifest, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._manifest) + len(self._registered)
+
+    def get(self, sha256: str) -> str | None:
+        """Document registered under ``sha256``, or None."""
+        query = self._manifest.get(sha256)
+        if query is None:
+            query = self._registered.get(sha256)
+            if query is not None:
+                self._registered.move_to_end(sha256)
+        return query
+
+    def register(self, query: str) -> str:
+        """Register a document and return its hash."""
+        sha256 = query_hash(query)
+        if sha256 not in self._manifest:
+            self._registered[sha256] = query
+            self._registered.move_to_end(sha256)
+            while len(self._registered) > self.max_entries:
+                self._registered.popitem(last=False)
+        return sha256
+
+    def resolve(self, query: str | None, extensions: dict[str, Any] | None) -> str:
+        """
+        Document to execute for a request.
+
+        Args:
+            query: Document sent by the client, if any
+            extensions: Request extensions, possibly carrying ``persistedQuery``
+
+        Returns:
+            The document to execute
+
+        Raises:
+            PersistedQueryNotFound: Only a hash was sent and it is unknown
+            PersistedQueryError: The request is malformed or not allowed
+        """
+        persisted = (extensions or {}).get("persistedQuery")
+        if persisted is None:
+            if query is None:
+                raise PersistedQueryError("No GraphQL query found in the request")
+            if self.persisted_only and query_hash(query) not in self._manifest:
+                raise PersistedQueryError("Only persisted queries are allowed")
+            return query
+
+        if not isinstance(persisted, dict):
+            raise PersistedQueryError("Invalid persistedQuery extension")
+        if persisted.get("version", PERSISTED_QUERY_VERSION) != PERSISTED_QUERY_VERSION:
+            raise PersistedQueryError("Unsupported persisted query version")
+        sha256 = persisted.get("sha256Hash")
+        if not isinstance(sha256, str):
+            raise PersistedQueryError("Missing persisted query sha256Hash")
+
+        if query is None:
+            stored = self.get(sha256)
+            if stored is None:
+                raise PersistedQueryNotFound()
+            return stored
+
+        if query_hash(query) != sha256:
+            raise PersistedQueryError("Provided sha256Hash does not match query")
+        if self.persisted_only and sha256 not in self._manifest:
+            raise PersistedQueryError("Only persisted queries are allowed")
+        self.register(query)
+        return query
+
+
+_store: PersistedQueryStore | None = None
+
+
+def get_persisted_query_store() -> PersistedQueryStore:
+    """Process-wide persisted query store configured from settings."""
+    global _store
+    if _store is None:
+        from src.core.config import settings
+
+        kwargs = {"persisted_only": settings.graphql_persisted_queries_only}
+        manifest = settings.graphql_persisted_query_manifest
+        _store = (
+            PersistedQueryStore.from_file(manifest, **kwargs)
+            if manifest
+            else PersistedQueryStore(**kwargs)
+        )
+        logger.info(
+            "persisted_query_store_ready",
+            documents=len(_store),
+            persisted_only=_store.persisted_only,
+        )
+    return _store
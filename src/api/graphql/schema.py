@@ -9,11 +9,14 @@ from datetime import UTC, datetime
 
 import strawberry
 from strawberry import ID
-from strawberry.extensions import Extension
+from strawberry.extensions import AddValidationRules, Extension
 from strawberry.types import Info
 
 from src.agents import get_agent_pool
+from src.api.graphql.complexity import MAX_PAGE_SIZE, query_cost_rule
+from src.api.graphql.loaders import get_loaders
 from src.core import get_logger
+from src.infrastructure.events.progress_bus import ANOMALY, get_progress_bus
 from src.infrastructure.query_cache import cached_query
 from src.services.investigation_service_selector import investigation_service
 
@@ -57,17 +60,29 @@ class Investigation:
     @strawberry.field
     async def findings(self, info: Info) -> list["Finding"]:
         """Get investigation findings."""
-        return []
+        record = await get_loaders(info.context).investigations.load(str(self.id))
+        return _findings(record)
 
     @strawberry.field
     async def anomalies(self, info: Info) -> list["Anomaly"]:
         """Get detected anomalies."""
-        return []
+        record = await get_loaders(info.context).investigations.load(str(self.id))
+        return _anomalies(record)
 
     @strawberry.field
     async def user(self, info: Info) -> User | None:
         """Get investigation owner."""
-        return None
+        user = await get_loaders(info.context).users.load(str(self.user_id))
+        if user is None:
+            return None
+        return User(
+            id=str(user.id),
+            email=user.email,
+            name=user.name,
+            role=user.role,
+            created_at=user.created_at,
+            is_active=user.is_active,
+        )
 
 
 @strawberry.type
@@ -116,7 +131,73 @@ class Contract:
     @strawberry.field
     async def anomalies(self, info: Info) -> list[Anomaly]:
         """Get contract anomalies."""
+        loaders = get_loaders(info.context)
+        references = await loaders.contract_anomalies.load(str(self.id))
+        records = await loaders.investigations.load_many(
+            [str(reference.investigation_id) for reference in references]
+        )
+
+        anomalies: dict[str, Anomaly] = {}
+        for reference, record in zip(references, records, strict=True):
+            wanted = set(reference.anomaly_ids or [])
+            for anomaly in _anomalies(record):
+                if not wanted or anomaly.id in wanted:
+                    anomalies.setdefault(anomaly.id, anomaly)
+        return list(anomalies.values())
+
+
+def _result_items(record) -> list[tuple[int, dict]]:
+    """Anomaly entries stored in an investigation's results."""
+    if record is None:
         return []
+    return [
+        (index, item)
+        for index, item in enumerate(record.results or [])
+        if isinstance(item, dict)
+    ]
+
+
+def _anomalies(record) -> list[Anomaly]:
+    """Anomalies of an investigation record."""
+    created_at = record.completed_at or record.created_at if record else None
+    return [
+        Anomaly(
+            id=str(item.get("anomaly_id") or f"{record.id}:{index}"),
+            investigation_id=str(record.id),
+            type=str(item.get("type", "unknown")),
+            description=str(item.get("description", "")),
+            severity=str(item.get("severity", "unknown")),
+            confidence_score=float(item.get("confidence") or 0.0),
+            affected_entities=item.get("affected_records") or [],
+            detection_method=str(
+                (item.get("metadata") or {}).get("detection_method", "unknown")
+            ),
+            created_at=created_at,
+        )
+        for index, item in _result_items(record)
+    ]
+
+
+def _findings(record) -> list[Finding]:
+    """Findings of an investigation record, one per stored anomaly."""
+    created_at = record.completed_at or record.created_at if record else None
+    return [
+        Finding(
+            id=str(item.get("anomaly_id") or f"{record.id}:{index}"),
+            investigation_id=str(record.id),
+            type=str(item.get("type", "unknown")),
+            title=str(item.get("type", "unknown")).replace("_", " ").capitalize(),
+            description=str(item.get("explanation") or item.get("description", "")),
+            severity=str(item.get("severity", "unknown")),
+            confidence=float(item.get("confidence") or 0.0),
+            evidence={
+                "affected_records": item.get("affected_records") or [],
+                "suggested_actions": item.get("suggested_actions") or [],
+            },
+            created_at=created_at,
+        )
+        for index, item in _result_items(record)
+    ]
 
 
 @strawberry.type
@@ -210,6 +291,7 @@ class Query:
         # Fetch from service
         investigation = await investigation_service.get_by_id(id)
         if investigation:
+            get_loaders(info.context).prime_investigations([investigation])
             return Investigation(
                 id=str(investigation.id),
                 user_id=str(investigation.user_id),
@@ -237,12 +319,15 @@ class Query:
         # Apply filters and fetch
         results = await investigation_service.search(
             filters=filters,
-            limit=pagination.limit,
+            limit=min(pagination.limit, MAX_PAGE_SIZE),
             offset=pagination.offset,
             order_by=pagination.order_by,
             order_dir=pagination.order_dir,
         )
 
+        # Nested fields reuse the fetched rows instead of querying them again
+        get_loaders(info.context).prime_investigations(results)
+
         return [
             Investigation(
                 id=str(r.id),
@@ -389,31 +474,28 @@ class Subscription:
     async def investigation_updates(
         self, info: Info, investigation_id: ID
     ) -> Investigation:
-        """Subscribe to investigation updates."""
-        # This would use websockets or SSE
-        # Simplified implementation
-        import asyncio
+        """Subscribe to investigation updates pushed by the progress bus."""
+        bus = await get_progress_bus()
 
-        while True:
-            await asyncio.sleep(2)
+        # Ends after the investigation's completion event
+        async for event in bus.subscribe(str(investigation_id)):
+            if event.type == ANOMALY:
+                continue
 
-            # Fetch current state
             investigation = await investigation_service.get_by_id(investigation_id)
             if investigation:
                 yield Investigation(
                     id=str(investigation.id),
                     user_id=str(investigation.user_id),
                     query=investigation.query,
-                    status=investigation.status,
+                    # The event may be ahead of the database row
+                    status=event.data.get("status") or investigation.status,
                     confidence_score=investigation.confidence_score,
                     created_at=investigation.created_at,
                     completed_at=investigation.completed_at,
                     processing_time_ms=investigation.processing_time_ms,
                 )
 
-                if investigation.status in ["completed", "failed", "cancelled"]:
-                    break
-
     @strawberry.subscription
     async def agent_activity(self, info: Info) -> AgentStats:
         """Subscribe to real-time agent activity."""
@@ -458,5 +540,5 @@ schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
     subscription=Subscription,
-    extensions=[PerformanceExtension],
+    extensions=[PerformanceExtension, AddValidationRules([query_cost_rule()])],
 )
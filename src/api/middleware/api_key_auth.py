@@ -6,8 +6,6 @@ Date: 2025-01-25
 License: Proprietary - All rights reserved
 """
 
-from datetime import UTC, datetime
-
 from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer
 from fastapi.security.utils import get_authorization_scheme_param
@@ -15,7 +13,7 @@ from fastapi.security.utils import get_authorization_scheme_param
 from src.core import get_logger
 from src.core.dependencies import get_db_session
 from src.core.exceptions import AuthenticationError
-from src.models.api_key import APIKey
+from src.services.api_key_cache import VerifiedAPIKey, get_api_key_usage
 from src.services.api_key_service import APIKeyService
 
 logger = get_logger(__name__)
@@ -27,7 +25,7 @@ class APIKeyAuth(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request) -> APIKey | None:
+    async def __call__(self, request: Request) -> VerifiedAPIKey | None:
         """
         Extract and validate API key from request.
 
@@ -153,7 +151,7 @@ class RateLimitMiddleware:
         # Get API key from request state
         api_key = getattr(request.state, "api_key", None)
 
-        if api_key and isinstance(api_key, APIKey):
+        if api_key and isinstance(api_key, VerifiedAPIKey):
             # Get rate limits
             limits = api_key.get_rate_limits()
 
@@ -167,18 +165,14 @@ class RateLimitMiddleware:
                     # Check if limit exceeded
                     # (Implementation depends on your rate limiting backend)
 
-            # Update request count
-            api_key.total_requests += 1
-
         # Process request
         try:
             response = await call_next(request)
             return response
         except Exception:
             # Update error count if API key is present
-            if api_key and isinstance(api_key, APIKey):
-                api_key.total_errors += 1
-                api_key.last_error_at = datetime.now(UTC)
+            if api_key and isinstance(api_key, VerifiedAPIKey):
+                get_api_key_usage().record(api_key.id, error=True)
             raise
 
 
@@ -201,7 +195,7 @@ def get_api_key_auth(
     if required_scopes:
         original_call = auth.__call__
 
-        async def scoped_call(request: Request) -> APIKey | None:
+        async def scoped_call(request: Request) -> VerifiedAPIKey | None:
             api_key = await original_call(request)
 
             if api_key and required_scopes:
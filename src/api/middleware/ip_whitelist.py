@@ -28,7 +28,7 @@ class IPWhitelistMiddleware(BaseHTTPMiddleware):
     - Environment-based activation
     - Path exclusions
     - Multiple IP extraction methods
-    - Performance optimization with caching
+    - Precompiled CIDR matching (no database access on the hot path)
     """
 
     def __init__(
@@ -97,11 +97,16 @@ class IPWhitelistMiddleware(BaseHTTPMiddleware):
                 logger.debug("ip_whitelist_no_client_ip_allowing")
                 return await call_next(request)
 
-            # Check whitelist
-            async with get_session() as session:
-                is_whitelisted = await ip_whitelist_service.check_ip(
-                    session, client_ip, environment=settings.app_env
-                )
+            # Check the compiled whitelist; a session is only opened when it
+            # has to be (re)loaded
+            is_whitelisted = ip_whitelist_service.check_ip_loaded(
+                client_ip, environment=settings.app_env
+            )
+            if is_whitelisted is None:
+                async with get_session() as session:
+                    is_whitelisted = await ip_whitelist_service.check_ip(
+                        session, client_ip, environment=settings.app_env
+                    )
 
             if not is_whitelisted:
                 logger.warning(
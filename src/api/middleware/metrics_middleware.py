@@ -5,6 +5,7 @@ This middleware automatically records metrics for all HTTP requests,
 including duration, status codes, and error rates.
 """
 
+import re
 import time
 from collections.abc import Callable
 
@@ -78,34 +79,7 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         instead of the actual path (e.g., /users/123) to avoid
         high cardinality in metrics.
         """
-        # Try to get route from request scope
-        if hasattr(request, "scope") and "route" in request.scope:
-            route = request.scope["route"]
-            if hasattr(route, "path"):
-                return route.path
-
-        # Fallback to actual path, but try to generalize it
-        path = request.url.path
-
-        # Common patterns to generalize
-        # Replace UUIDs
-        import re
-
-        path = re.sub(
-            r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
-            "{uuid}",
-            path,
-            flags=re.IGNORECASE,
-        )
-
-        # Replace numeric IDs
-        path = re.sub(r"/\d+", "/{id}", path)
-
-        # Limit cardinality for unknown paths
-        if path.count("/") > 5:
-            path = "/unknown/deep/path"
-
-        return path
+        return get_path_template(request.scope)
 
     def _record_request_metrics(
         self,
@@ -116,78 +90,125 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         error: bool = False,
     ):
         """Record HTTP request metrics."""
-        # HTTP request duration histogram
-        metrics_manager.observe_histogram(
-            "cidadao_ai_request_duration_seconds",
-            duration,
+        record_request_metrics(method, path, status_code, duration, error=error)
+
+    def _get_error_type(self, status_code: int) -> str:
+        """Categorize error types based on status code."""
+        return _get_error_type(status_code)
+
+    def _get_duration_bucket(self, duration: float) -> str:
+        """Categorize request duration into buckets."""
+        return _get_duration_bucket(duration)
+
+
+_UUID_SEGMENT = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+_NUMERIC_SEGMENT = re.compile(r"/\d+")
+
+
+def get_path_template(scope: dict) -> str:
+    """
+    Low-cardinality path label for an ASGI scope.
+
+    Uses the matched route pattern when routing already ran, otherwise
+    generalizes UUIDs and numeric ids in the raw path.
+    """
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+
+    # Fallback to actual path, but try to generalize it
+    path = _UUID_SEGMENT.sub("{uuid}", scope.get("path", ""))
+    path = _NUMERIC_SEGMENT.sub("/{id}", path)
+
+    # Limit cardinality for unknown paths
+    if path.count("/") > 5:
+        path = "/unknown/deep/path"
+
+    return path
+
+
+def record_request_metrics(
+    method: str,
+    path: str,
+    status_code: int,
+    duration: float,
+    error: bool = False,
+    active_requests: int = 0,
+) -> None:
+    """Record HTTP request metrics."""
+    method = method.upper()
+    status = str(status_code)
+
+    # HTTP request duration histogram
+    metrics_manager.observe_histogram(
+        "cidadao_ai_request_duration_seconds",
+        duration,
+        labels={"method": method, "endpoint": path, "status_code": status},
+    )
+
+    # HTTP request counter
+    metrics_manager.increment_counter(
+        "cidadao_ai_http_requests_total",
+        labels={
+            "method": method,
+            "endpoint": path,
+            "status_code": status,
+            "status": "error" if error or status_code >= 400 else "success",
+        },
+    )
+
+    # Error rate tracking
+    if error or status_code >= 400:
+        metrics_manager.increment_counter(
+            "cidadao_ai_http_errors_total",
             labels={
-                "method": method.upper(),
+                "method": method,
                 "endpoint": path,
-                "status_code": str(status_code),
+                "status_code": status,
+                "error_type": _get_error_type(status_code),
             },
         )
 
-        # HTTP request counter
+    # Track slow requests
+    if duration > 5.0:  # Requests taking more than 5 seconds
         metrics_manager.increment_counter(
-            "cidadao_ai_http_requests_total",
+            "cidadao_ai_slow_requests_total",
             labels={
-                "method": method.upper(),
+                "method": method,
                 "endpoint": path,
-                "status_code": str(status_code),
-                "status": "error" if error or status_code >= 400 else "success",
+                "duration_bucket": _get_duration_bucket(duration),
             },
         )
 
-        # Error rate tracking
-        if error or status_code >= 400:
-            metrics_manager.increment_counter(
-                "cidadao_ai_http_errors_total",
-                labels={
-                    "method": method.upper(),
-                    "endpoint": path,
-                    "status_code": str(status_code),
-                    "error_type": self._get_error_type(status_code),
-                },
-            )
-
-        # Track slow requests
-        if duration > 5.0:  # Requests taking more than 5 seconds
-            metrics_manager.increment_counter(
-                "cidadao_ai_slow_requests_total",
-                labels={
-                    "method": method.upper(),
-                    "endpoint": path,
-                    "duration_bucket": self._get_duration_bucket(duration),
-                },
-            )
-
-        # Update concurrent requests gauge (simplified - in production use proper tracking)
-        active_requests = getattr(self, "_active_requests", 0)
-        metrics_manager.set_gauge(
-            "cidadao_ai_http_requests_in_progress",
-            active_requests,
-            labels={"method": method.upper()},
-        )
-
-    def _get_error_type(self, status_code: int) -> str:
-        """Categorize error types based on status code."""
-        if 400 <= status_code < 500:
-            return "client_error"
-        if 500 <= status_code < 600:
-            return "server_error"
-        return "unknown_error"
-
-    def _get_duration_bucket(self, duration: float) -> str:
-        """Categorize request duration into buckets."""
-        if duration < 1:
-            return "0-1s"
-        if duration < 5:
-            return "1-5s"
-        if duration < 10:
-            return "5-10s"
-        if duration < 30:
-            return "10-30s"
-        return "30s+"
+    metrics_manager.set_gauge(
+        "cidadao_ai_http_requests_in_progress",
+        active_requests,
+        labels={"method": method},
+    )
+
+
+def _get_error_type(status_code: int) -> str:
+    """Categorize error types based on status code."""
+    if 400 <= status_code < 500:
+        return "client_error"
+    if 500 <= status_code < 600:
+        return "server_error"
+    return "unknown_error"
+
+
+def _get_duration_bucket(duration: float) -> str:
+    """Categorize request duration into buckets."""
+    if duration < 1:
+        return "0-1s"
+    if duration < 5:
+        return "1-5s"
+    if duration < 10:
+        return "5-10s"
+    if duration < 30:
+        return "10-30s"
+    return "30s+"
 
 
 def setup_http_metrics():
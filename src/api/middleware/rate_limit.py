@@ -6,6 +6,8 @@ Date: 2025-01-25
 License: Proprietary - All rights reserved
 """
 
+from typing import Any
+
 from fastapi import Request, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
@@ -16,10 +18,21 @@ from src.infrastructure.rate_limiter import (
     RateLimitTier,
     rate_limiter,
 )
-from src.models.api_key import APIKey
+from src.services.api_key_cache import VerifiedAPIKey
 
 logger = get_logger(__name__)
 
+# Path prefixes never rate limited
+RATE_LIMIT_SKIP_PATHS = (
+    "/health",
+    "/metrics",
+    "/docs",
+    "/openapi.json",
+    "/favicon.ico",
+    "/_next",  # Next.js assets
+    "/static",
+)
+
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
@@ -92,7 +105,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     content={
                         "detail": f"Rate limit exceeded for {exceeded_window}",
                         "error": "RATE_LIMIT_EXCEEDED",
-                        "limits": results,
+                        "limits": serialize_limits(results),
                     },
                     headers=headers,
                 )
@@ -126,21 +139,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
     def _should_skip(self, path: str) -> bool:
         """Check if path should skip rate limiting."""
-        skip_paths = [
-            "/health",
-            "/metrics",
-            "/docs",
-            "/openapi.json",
-            "/favicon.ico",
-            "/_next",  # Next.js assets
-            "/static",
-        ]
-
-        for skip_path in skip_paths:
-            if path.startswith(skip_path):
-                return True
-
-        return False
+        return path.startswith(RATE_LIMIT_SKIP_PATHS)
 
     def _get_rate_limit_info(
         self, request: Request
@@ -151,64 +150,84 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         Returns:
             Tuple of (key, tier, custom_limits)
         """
-        # Priority 1: API Key
-        api_key = getattr(request.state, "api_key", None)
-        if api_key and isinstance(api_key, APIKey):
-            key = f"api_key:{api_key.id}"
-            tier = RateLimitTier(api_key.tier)
-
-            # Get custom limits if set
-            custom_limits = {}
-            if api_key.rate_limit_per_minute:
-                custom_limits["per_minute"] = api_key.rate_limit_per_minute
-            if api_key.rate_limit_per_hour:
-                custom_limits["per_hour"] = api_key.rate_limit_per_hour
-            if api_key.rate_limit_per_day:
-                custom_limits["per_day"] = api_key.rate_limit_per_day
-
-            return key, tier, custom_limits if custom_limits else None
-
-        # Priority 2: Authenticated User
-        user_id = getattr(request.state, "user_id", None)
-        if user_id:
-            key = f"user:{user_id}"
-
-            # Check user role for tier
-            user = getattr(request.state, "user", {})
-            role = user.get("role", "").lower()
-
-            if role == "admin" or user.get("is_superuser"):
-                tier = RateLimitTier.UNLIMITED
-            elif role == "pro":
-                tier = RateLimitTier.PRO
-            elif role == "basic":
-                tier = RateLimitTier.BASIC
-            else:
-                tier = RateLimitTier.FREE
-
-            return key, tier, None
-
-        # Priority 3: IP Address
+        # Direct connection first, then proxy headers
         client_ip = None
         if request.client:
             client_ip = request.client.host
 
-        # Check for proxy headers
         if not client_ip:
             forwarded_for = request.headers.get("X-Forwarded-For")
             if forwarded_for:
                 client_ip = forwarded_for.split(",")[0].strip()
 
         if not client_ip:
-            real_ip = request.headers.get("X-Real-IP")
-            if real_ip:
-                client_ip = real_ip
+            client_ip = request.headers.get("X-Real-IP") or None
+
+        return get_rate_limit_identity(request.state, client_ip, self.default_tier)
 
-        if client_ip:
-            key = f"ip:{client_ip}"
-            return key, self.default_tier, None
 
-        return None, self.default_tier, None
+def get_rate_limit_identity(
+    state: Any, client_ip: str | None, default_tier: RateLimitTier
+) -> tuple[str | None, RateLimitTier, dict[str, int] | None]:
+    """
+    Rate limit key, tier, and custom limits for a request.
+
+    Args:
+        state: Request state (``request.state``)
+        client_ip: Resolved client IP, if any
+        default_tier: Tier for anonymous clients
+
+    Returns:
+        Tuple of (key, tier, custom_limits)
+    """
+    # Priority 1: API Key
+    api_key = getattr(state, "api_key", None)
+    if isinstance(api_key, VerifiedAPIKey):
+        key = f"api_key:{api_key.id}"
+        tier = RateLimitTier(api_key.tier)
+
+        # Custom limits of the key, or the defaults of its tier
+        custom_limits = {
+            window: limit
+            for window, limit in api_key.get_rate_limits().items()
+            if limit
+        }
+
+        return key, tier, custom_limits or None
+
+    # Priority 2: Authenticated User
+    user_id = getattr(state, "user_id", None)
+    if user_id:
+        key = f"user:{user_id}"
+
+        # Check user role for tier
+        user = getattr(state, "user", {})
+        role = user.get("role", "").lower()
+
+        if role == "admin" or user.get("is_superuser"):
+            tier = RateLimitTier.UNLIMITED
+        elif role == "pro":
+            tier = RateLimitTier.PRO
+        elif role == "basic":
+            tier = RateLimitTier.BASIC
+        else:
+            tier = RateLimitTier.FREE
+
+        return key, tier, None
+
+    # Priority 3: IP Address
+    if client_ip:
+        return f"ip:{client_ip}", default_tier, None
+
+    return None, default_tier, None
+
+
+def serialize_limits(results: dict[str, Any]) -> dict[str, Any]:
+    """Per-window limit metadata with reset times as Unix timestamps."""
+    return {
+        window: {**data, "reset": int(data["reset"].timestamp())}
+        for window, data in results.items()
+    }
 
 
 def get_rate_limit_decorator(
@@ -0,0 +1,358 @@
+"""
+Module: api.middleware.request_pipeline
+Description: Fused pure-ASGI middleware running the per-request stages in one pass
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Replaces the stacked ``CorrelationMiddleware``, ``LoggingMiddleware``,
+``MetricsMiddleware``, ``RateLimitMiddleware`` and ``QueryTrackingMiddleware``
+layers. Each of those is a ``BaseHTTPMiddleware`` that runs the downstream
+app in a separate task, streams the body through a memory channel and builds
+its own ``Request``/headers copies. Here the scope is inspected once into a
+``RequestContext`` (headers, client IP, request ids, one monotonic start
+time) shared by every stage, and response headers are appended to the
+``http.response.start`` message on the way out.
+"""
+
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import MutableHeaders, State
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.middleware.metrics_middleware import (
+    get_path_template,
+    record_request_metrics,
+)
+from src.api.middleware.rate_limit import (
+    RATE_LIMIT_SKIP_PATHS,
+    get_rate_limit_identity,
+    serialize_limits,
+)
+from src.core import get_logger, settings
+from src.infrastructure.observability.correlation import (
+    CORRELATION_ID_HEADER,
+    REQUEST_ID_HEADER,
+    CorrelationContext,
+)
+from src.infrastructure.rate_limiter import RateLimiter, RateLimitTier, rate_limiter
+from src.services.cache_warming_service import cache_warming_service
+from src.services.cidr_matcher import CIDRMatcher
+
+logger = get_logger(__name__)
+
+METRICS_EXCLUDED_PATHS = frozenset({"/api/v1/observability/metrics"})
+DEFAULT_TRACKED_PATHS = (
+    "/api/v1/investigations",
+    "/api/v1/contracts",
+    "/api/v1/analysis",
+    "/api/v1/reports",
+    "/api/v1/chat",
+)
+
+
+@dataclass
+class RequestContext:
+    """Per-request values resolved once and shared by every stage."""
+
+    method: str
+    path: str
+    query_string: str
+    headers: dict[str, str]
+    client_ip: str
+    request_id: str
+    correlation_id: str
+    started: float = field(default_factory=time.perf_counter)
+    status_code: int = 500
+    response_size: int = 0
+
+    @classmethod
+    def from_scope(
+        cls, scope: Scope, trusted_proxies: CIDRMatcher | None = None
+    ) -> "RequestContext":
+        """Decode the ASGI scope (headers are decoded exactly once)."""
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers", ())
+        }
+        client = scope.get("client")
+        return cls(
+            method=scope["method"],
+            path=scope["path"],
+            query_string=scope.get("query_string", b"").decode("latin-1"),
+            headers=headers,
+            client_ip=_client_ip(
+                headers, client[0] if client else None, trusted_proxies
+            ),
+            request_id=headers.get("x-request-id") or str(uuid.uuid4()),
+            correlation_id=headers.get("x-correlation-id") or str(uuid.uuid4()),
+        )
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the request entered the pipeline."""
+        return time.perf_counter() - self.started
+
+
+def _client_ip(
+    headers: dict[str, str], peer: str | None, trusted: CIDRMatcher | None
+) -> str:
+    """
+    Client address used for logging and rate limiting.
+
+    Forwarded headers are only believed when the socket peer is a trusted
+    proxy; the client is then the rightmost ``X-Forwarded-For`` hop that is
+    not itself a trusted proxy (anything left of it is client-supplied).
+    """
+    if not peer:
+        return "unknown"
+    if trusted is None or not trusted.contains(peer):
+        return peer
+
+    hops = [
+        hop.strip()
+        for hop in headers.get("x-forwarded-for", "").split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(hops):
+        if not trusted.contains(hop):
+            return hop
+    if hops:
+        return hops[0]
+    return headers.get("x-real-ip") or peer
+
+
+class RequestPipelineMiddleware:
+    """
+    Single ASGI middleware running the per-request stages in order.
+
+    Stages (each can be switched off):
+    - correlation: request/correlation ids in context vars and headers
+    - rate_limit: multi-window limits, 429 before the app runs
+    - logging: ``api_request_started``/``completed``/``failed`` events
+    - metrics: Prometheus request metrics labelled by route template
+    - query_tracking: sampled query patterns for cache warming
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        correlation: bool = True,
+        logging: bool = True,
+        metrics: bool = True,
+        rate_limit: bool = True,
+        query_tracking: bool = True,
+        default_tier: RateLimitTier = RateLimitTier.FREE,
+        limiter: RateLimiter | None = None,
+        tracked_paths: list[str] | None = None,
+        sample_rate: float = 1.0,
+        trusted_proxies: list[str] | None = None,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            app: ASGI application
+            correlation: Propagate request and correlation ids
+            logging: Log request start, completion and failure
+            metrics: Record HTTP metrics
+            rate_limit: Enforce rate limits
+            query_tracking: Feed query patterns to cache warming
+            default_tier: Rate limit tier for anonymous clients
+            limiter: Rate limiter (shared instance by default)
+            tracked_paths: Path prefixes for query tracking
+            sample_rate: Query tracking sampling rate (0.0 to 1.0)
+            trusted_proxies: Proxy IPs/CIDRs allowed to set X-Forwarded-For
+                (``settings.trusted_proxies`` by default)
+        """
+        self.app = app
+        self.correlation = correlation
+        self.logging = logging
+        self.metrics = metrics
+        self.rate_limit = rate_limit
+        self.query_tracking = query_tracking
+        self.default_tier = RateLimitTier(default_tier)
+        self.limiter = limiter or rate_limiter
+        self.tracked_paths = tuple(tracked_paths or DEFAULT_TRACKED_PATHS)
+        self.sample_rate = sample_rate
+        if trusted_proxies is None:
+            trusted_proxies = settings.trusted_proxies
+        self.trusted_proxies = CIDRMatcher(trusted_proxies) if trusted_proxies else None
+        self.active_requests = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the enabled stages around the downstream app."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext.from_scope(scope, self.trusted_proxies)
+        state = scope.setdefault("state", {})
+        state["request_id"] = ctx.request_id
+        extra_headers: list[tuple[str, str]] = []
+
+        if self.correlation:
+            CorrelationContext.set_correlation_id(ctx.correlation_id)
+            CorrelationContext.set_request_id(ctx.request_id)
+            extra_headers.append((CORRELATION_ID_HEADER, ctx.correlation_id))
+        extra_headers.append((REQUEST_ID_HEADER, ctx.request_id))
+
+        if self.logging:
+            logger.info(
+                "api_request_started",
+                request_id=ctx.request_id,
+                method=ctx.method,
+                path=ctx.path,
+                query_string=ctx.query_string,
+                client_ip=ctx.client_ip,
+                user_agent=ctx.headers.get("user-agent", "Unknown"),
+                content_length=ctx.headers.get("content-length", "0"),
+            )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                ctx.status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                for name, value in extra_headers:
+                    headers.append(name, value)
+                headers.append("X-Process-Time", f"{ctx.elapsed:.4f}")
+            elif message["type"] == "http.response.body":
+                ctx.response_size += len(message.get("body", b""))
+            await send(message)
+
+        self.active_requests += 1
+        try:
+            denied = await self._check_rate_limit(ctx, state, extra_headers)
+            if denied is not None:
+                await denied(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            self._finish(ctx, scope, error=exc)
+            raise
+        else:
+            self._finish(ctx, scope)
+        finally:
+            self.active_requests -= 1
+            if self.correlation:
+                CorrelationContext.clear_context()
+
+    async def _check_rate_limit(
+        self,
+        ctx: RequestContext,
+        state: dict[str, Any],
+        extra_headers: list[tuple[str, str]],
+    ) -> JSONResponse | None:
+        """Apply rate limits; returns the 429 response when denied."""
+        if not self.rate_limit or ctx.path.startswith(RATE_LIMIT_SKIP_PATHS):
+            return None
+
+        key, tier, custom_limits = get_rate_limit_identity(
+            State(state), ctx.client_ip, self.default_tier
+        )
+        if not key:
+            return None
+
+        try:
+            allowed, results = await self.limiter.check_rate_limit(
+                key=key, endpoint=ctx.path, tier=tier, custom_limits=custom_limits
+            )
+        except Exception as e:
+            # On limiter errors the request proceeds
+            logger.error("rate_limit_error", error=str(e), exc_info=True)
+            return None
+
+        headers = self.limiter.get_headers(results)
+        if allowed:
+            extra_headers.extend(headers.items())
+            return None
+
+        window = next(w for w, data in results.items() if not data["allowed"])
+        return JSONResponse(
+            status_code=429,
+            content={
+                "detail": f"Rate limit exceeded for {window}",
+                "error": "RATE_LIMIT_EXCEEDED",
+                "limits": serialize_limits(results),
+            },
+            headers=headers,
+        )
+
+    def _finish(
+        self, ctx: RequestContext, scope: Scope, error: Exception | None = None
+    ) -> None:
+        """Log, record metrics and track the query once the app returned."""
+        duration = ctx.elapsed
+
+        if self.logging:
+            if error is None:
+                logger.info(
+                    "api_request_completed",
+                    request_id=ctx.request_id,
+                    method=ctx.method,
+                    path=ctx.path,
+                    status_code=ctx.status_code,
+                    process_time=duration,
+                    response_size=ctx.response_size,
+                    client_ip=ctx.client_ip,
+                )
+            else:
+                logger.error(
+                    "api_request_failed",
+                    request_id=ctx.request_id,
+                    method=ctx.method,
+                    path=ctx.path,
+                    error_type=type(error).__name__,
+                    error_message=str(error),
+                    process_time=duration,
+                    client_ip=ctx.client_ip,
+                )
+
+        if self.metrics and ctx.path not in METRICS_EXCLUDED_PATHS:
+            try:
+                record_request_metrics(
+                    ctx.method,
+                    get_path_template(scope),
+                    ctx.status_code if error is None else 500,
+                    duration,
+                    error=error is not None,
+                    active_requests=self.active_requests - 1,
+                )
+            except Exception as e:
+                logger.warning("request_metrics_failed", error=str(e))
+
+        if (
+            self.query_tracking
+            and error is None
+            and ctx.path.startswith(self.tracked_paths)
+            and random.random() <= self.sample_rate
+        ):
+            self._track_query(ctx, scope)
+
+    def _track_query(self, ctx: RequestContext, scope: Scope) -> None:
+        """Hand the query pattern to the cache warming service."""
+        query_info = {
+            "path": ctx.path,
+            "method": ctx.method,
+            "query_params": dict(parse_qsl(ctx.query_string, keep_blank_values=True)),
+            "timestamp": None,  # Will be set by service
+            "path_params": scope.get("path_params", {}),
+        }
+        query_str = json.dumps(query_info, sort_keys=True, default=str)
+        query_info["hash"] = hashlib.md5(
+            query_str.encode(), usedforsecurity=False
+        ).hexdigest()
+
+        try:
+            cache_warming_service.track_query(query_info)
+        except Exception as e:
+            logger.error("query_tracking_error", error=str(e), query_info=query_info)
@@ -9,18 +9,19 @@ License: Proprietary - All rights reserved
 import hashlib
 import hmac
 import ipaddress
-import re
 import time
 from collections import defaultdict, deque
 from datetime import UTC, datetime, timedelta
 
-from fastapi import Request, status
+from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from src.api.middleware.threat_scanner import ThreatScanner
 from src.core import get_logger, settings
 from src.core.audit import AuditContext, AuditEventType, AuditSeverity, audit_logger
+from src.services.cidr_matcher import CIDRMatcher
 
 
 class SecurityConfig:
@@ -49,6 +50,17 @@ class SecurityConfig:
         "text/plain",
     }
 
+    # Binary bodies are never scanned for suspicious patterns
+    UNSCANNED_CONTENT_TYPES = (
+        "application/octet-stream",
+        "application/pdf",
+        "application/zip",
+        "image/",
+        "audio/",
+        "video/",
+        "font/",
+    )
+
     # Security headers
     SECURITY_HEADERS = {
         "X-Content-Type-Options": "nosniff",
@@ -128,76 +140,77 @@ class SecurityConfig:
 
 
 class IPBlockList:
-    """IP address blocking management."""
-
-    def __init__(self):
-        self.blocked_ips: dict[str, datetime] = {}
-        self.failed_attempts: dict[str, list[datetime]] = defaultdict(list)
-        self.whitelist: set[str] = {
-            "127.0.0.1",
-            "::1",  # Localhost
-            "10.0.0.0/8",
-            "172.16.0.0/12",
-            "192.168.0.0/16",  # Private networks
-        }
+    """
+    IP address blocking management.
+
+    Trusted networks and active blocks are precompiled CIDR matchers;
+    the block matcher is rebuilt when a block is added or one expires.
+    """
+
+    TRUSTED_NETWORKS = (
+        "127.0.0.1",
+        "::1",  # Localhost
+        "10.0.0.0/8",
+        "172.16.0.0/12",
+        "192.168.0.0/16",  # Private networks
+    )
+
+    def __init__(self, trusted_networks: tuple[str, ...] = TRUSTED_NETWORKS):
+        self.whitelist = CIDRMatcher(trusted_networks)
+        self.failed_attempts: dict[str, deque[float]] = {}
+        # network -> unix time the block ends
+        self._blocks: dict[str, float] = {}
+        self._blocked = CIDRMatcher()
 
     def is_whitelisted(self, ip: str) -> bool:
         """Check if IP is whitelisted."""
-        try:
-            ip_addr = ipaddress.ip_address(ip)
-            for whitelist_entry in self.whitelist:
-                if "/" in whitelist_entry:
-                    if ip_addr in ipaddress.ip_network(whitelist_entry, strict=False):
-                        return True
-                elif ip == whitelist_entry:
-                    return True
-            return False
-        except ValueError:
-            return False
+        return self.whitelist.contains(ip)
 
     def is_blocked(self, ip: str) -> bool:
         """Check if IP is currently blocked."""
         if self.is_whitelisted(ip):
             return False
-
-        if ip in self.blocked_ips:
-            if datetime.now(UTC) - self.blocked_ips[ip] < timedelta(
-                minutes=SecurityConfig.BLOCK_DURATION_MINUTES
-            ):
-                return True
-            # Unblock expired IPs
-            del self.blocked_ips[ip]
-
-        return False
+        now = time.time()
+        if self._blocked.is_stale(now):
+            self._rebuild(now)
+        return self._blocked.contains(ip, now)
+
+    def block(self, network: str, duration_seconds: float | None = None) -> None:
+        """Block an address or CIDR range (default: ``BLOCK_DURATION_MINUTES``)."""
+        if duration_seconds is None:
+            duration_seconds = SecurityConfig.BLOCK_DURATION_MINUTES * 60
+        now = time.time()
+        self._blocks[network] = now + duration_seconds
+        self._rebuild(now)
+
+    def _rebuild(self, now: float) -> None:
+        """Recompile active blocks, dropping expired ones."""
+        self._blocks = {n: until for n, until in self._blocks.items() if until > now}
+        self._blocked = CIDRMatcher(self._blocks.items())
 
     def record_failed_attempt(self, ip: str):
         """Record a failed attempt from IP."""
         if self.is_whitelisted(ip):
             return
 
-        now = datetime.now(UTC)
-
-        # Clean old attempts (older than 1 hour)
-        self.failed_attempts[ip] = [
-            attempt
-            for attempt in self.failed_attempts[ip]
-            if now - attempt < timedelta(hours=1)
-        ]
-
-        # Add new attempt
-        self.failed_attempts[ip].append(now)
+        now = time.time()
+        attempts = self.failed_attempts.setdefault(ip, deque())
+        # Forget attempts older than 1 hour
+        while attempts and now - attempts[0] >= 3600:
+            attempts.popleft()
+        attempts.append(now)
 
         # Check if should block
-        if len(self.failed_attempts[ip]) >= SecurityConfig.MAX_FAILED_ATTEMPTS:
-            self.blocked_ips[ip] = now
+        if len(attempts) >= SecurityConfig.MAX_FAILED_ATTEMPTS:
+            self.block(ip)
+            del self.failed_attempts[ip]
 
     def get_failed_attempts_count(self, ip: str, window_minutes: int = 60) -> int:
         """Get number of failed attempts in time window."""
-        if ip not in self.failed_attempts:
-            return 0
-
-        cutoff = datetime.now(UTC) - timedelta(minutes=window_minutes)
-        return sum(1 for attempt in self.failed_attempts[ip] if attempt > cutoff)
+        cutoff = time.time() - window_minutes * 60
+        return sum(
+            1 for attempt in self.failed_attempts.get(ip, ()) if attempt > cutoff
+        )
 
 
 class RateLimiter:
@@ -268,14 +281,27 @@ class RateLimiter:
         }
 
 
+BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdn.jsdelivr.net; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "img-src 'self' data: https:; "
+    "connect-src 'self' https://api.portaldatransparencia.gov.br; "
+    "frame-ancestors 'none';"
+)
+
+
 class RequestValidator:
     """Request validation and security scanning."""
 
     def __init__(self):
-        self.suspicious_patterns = [
-            re.compile(pattern, re.IGNORECASE)
-            for pattern in SecurityConfig.SUSPICIOUS_PATTERNS
-        ]
+        self.scanner = ThreatScanner(
+            SecurityConfig.SUSPICIOUS_PATTERNS,
+            skip_content_types=SecurityConfig.UNSCANNED_CONTENT_TYPES,
+        )
 
     def validate_request_size(self, request: Request) -> bool:
         """Validate request size."""
@@ -338,7 +364,7 @@ class RequestValidator:
         for name, value in request.headers.items():
             if name.lower() in skip_headers:
                 continue
-            if any(pattern.search(value) for pattern in self.suspicious_patterns):
+            if self.scanner.search(value):
                 return False, f"Suspicious content in header {name}"
 
         return True, None
@@ -360,9 +386,8 @@ class RequestValidator:
         # Check if path is exempt from pattern checking
         if request.url.path not in SecurityConfig.PATTERN_CHECK_EXEMPT_PATHS:
             # Check for suspicious patterns in path and query only
-            for pattern in self.suspicious_patterns:
-                if pattern.search(path_and_query):
-                    return False, "Suspicious pattern in URL"
+            if self.scanner.search(path_and_query):
+                return False, "Suspicious pattern in URL"
 
         # Check for double encoding
         if "%25" in path_and_query:
@@ -380,36 +405,38 @@ class RequestValidator:
         return content_type.lower() in SecurityConfig.ALLOWED_CONTENT_TYPES
 
     async def scan_request_body(self, body: bytes) -> tuple[bool, str | None]:
-        """Scan request body for suspicious content."""
+        """Scan a complete request body for suspicious content."""
         if not body:
             return True, None
 
-        try:
-            body_text = body.decode("utf-8", errors="ignore")
-
-            for pattern in self.suspicious_patterns:
-                if pattern.search(body_text):
-                    return False, "Suspicious pattern in request body"
-
-            return True, None
+        if self.scanner.stream().feed(body, final=True):
+            return False, "Suspicious pattern in request body"
+        return True, None
 
-        except Exception:
-            return False, "Invalid request body encoding"
 
+class SecurityMiddleware:
+    """
+    Comprehensive security middleware (pure ASGI).
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Comprehensive security middleware."""
+    Request bodies are not buffered: the downstream app receives them chunk
+    by chunk through a wrapper that scans each chunk as it arrives and
+    rejects the request at the first suspicious chunk.
+    """
 
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.logger = get_logger(__name__)
         self.ip_blocklist = IPBlockList()
         self.rate_limiter = RateLimiter()
         self.request_validator = RequestValidator()
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request through security checks."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        request = Request(scope)
         start_time = time.time()
         client_ip = self._get_client_ip(request)
 
@@ -421,33 +448,93 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             referer=request.headers.get("referer"),
         )
 
+        rate_info: dict = {}
         try:
-            # 1. IP blocking check
-            if self.ip_blocklist.is_blocked(client_ip):
-                await self._log_security_event(
-                    "IP address blocked",
-                    AuditEventType.UNAUTHORIZED_ACCESS,
-                    AuditSeverity.HIGH,
-                    {"ip": client_ip, "reason": "blocked_ip"},
-                    audit_context,
+            rejection, rate_info = await self._check_request(
+                request, client_ip, audit_context
+            )
+        except Exception as e:
+            # Log security middleware errors
+            await self._log_security_event(
+                f"Security middleware error: {str(e)}",
+                AuditEventType.SYSTEM_STARTUP,  # Using system event for internal errors
+                AuditSeverity.HIGH,
+                {"ip": client_ip, "error": str(e)},
+                audit_context,
+            )
+            # Continue with request (fail open for availability)
+            rejection = None
+
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+
+        scanner = self.request_validator.scanner
+        content_type = request.headers.get("content-type")
+        if request.method in BODY_METHODS and scanner.should_scan(content_type):
+            receive = self._scanning_receive(receive, audit_context)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                self._add_security_headers(headers)
+                headers["X-RateLimit-Limit"] = str(
+                    SecurityConfig.RATE_LIMIT_REQUESTS_PER_MINUTE
                 )
-                return JSONResponse(
+                headers["X-RateLimit-Remaining"] = str(rate_info.get("burst_tokens", 0))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+        processing_time = time.time() - start_time
+        if processing_time > 5.0:  # Log slow requests
+            await self._log_security_event(
+                "Slow request detected",
+                AuditEventType.SUSPICIOUS_ACTIVITY,
+                AuditSeverity.LOW,
+                {
+                    "ip": client_ip,
+                    "path": request.url.path,
+                    "method": request.method,
+                    "processing_time": processing_time,
+                },
+                audit_context,
+            )
+
+    async def _check_request(
+        self, request: Request, client_ip: str, audit_context: AuditContext
+    ) -> tuple[JSONResponse | None, dict]:
+        """IP, rate limit and request validation checks before the app runs."""
+        # 1. IP blocking check
+        if self.ip_blocklist.is_blocked(client_ip):
+            await self._log_security_event(
+                "IP address blocked",
+                AuditEventType.UNAUTHORIZED_ACCESS,
+                AuditSeverity.HIGH,
+                {"ip": client_ip, "reason": "blocked_ip"},
+                audit_context,
+            )
+            return (
+                JSONResponse(
                     status_code=status.HTTP_403_FORBIDDEN,
                     content={"detail": "Access denied"},
-                )
+                ),
+                {},
+            )
 
-            # 2. Rate limiting
-            allowed, rate_info = self.rate_limiter.is_allowed(client_ip)
-            if not allowed:
-                self.ip_blocklist.record_failed_attempt(client_ip)
-                await self._log_security_event(
-                    "Rate limit exceeded",
-                    AuditEventType.RATE_LIMIT_EXCEEDED,
-                    AuditSeverity.MEDIUM,
-                    {"ip": client_ip, **rate_info},
-                    audit_context,
-                )
-                return JSONResponse(
+        # 2. Rate limiting
+        allowed, rate_info = self.rate_limiter.is_allowed(client_ip)
+        if not allowed:
+            self.ip_blocklist.record_failed_attempt(client_ip)
+            await self._log_security_event(
+                "Rate limit exceeded",
+                AuditEventType.RATE_LIMIT_EXCEEDED,
+                AuditSeverity.MEDIUM,
+                {"ip": client_ip, **rate_info},
+                audit_context,
+            )
+            return (
+                JSONResponse(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     content={"detail": "Rate limit exceeded"},
                     headers={
@@ -457,60 +544,58 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                         ),
                         "X-RateLimit-Remaining": "0",
                     },
-                )
-
-            # 3. Request validation
-            validation_result = await self._validate_request(request, audit_context)
-            if validation_result:
-                return validation_result
+                ),
+                rate_info,
+            )
 
-            # 4. Process request
-            response = await call_next(request)
+        # 3. Request validation (the body is scanned while it streams in)
+        return await self._validate_request(request, audit_context), rate_info
 
-            # 5. Add security headers
-            self._add_security_headers(response)
+    def _scanning_receive(
+        self, receive: Receive, audit_context: AuditContext
+    ) -> Receive:
+        """Wrap ``receive`` so every body chunk is scanned before the app sees it."""
+        scan = self.request_validator.scanner.stream()
 
-            # 6. Log successful request
-            processing_time = time.time() - start_time
+        async def scanned_receive() -> Message:
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
 
-            if processing_time > 5.0:  # Log slow requests
+            more_body = message.get("more_body", False)
+            found = scan.feed(message.get("body", b""), final=not more_body)
+            if scan.size > SecurityConfig.MAX_REQUEST_SIZE:
+                await self._log_security_event(
+                    "Request size too large",
+                    AuditEventType.SUSPICIOUS_ACTIVITY,
+                    AuditSeverity.MEDIUM,
+                    {"ip": audit_context.ip_address, "size": scan.size},
+                    audit_context,
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Request too large",
+                )
+            if found:
+                body_error = "Suspicious pattern in request body"
                 await self._log_security_event(
-                    "Slow request detected",
+                    f"Suspicious request body: {body_error}",
                     AuditEventType.SUSPICIOUS_ACTIVITY,
-                    AuditSeverity.LOW,
+                    AuditSeverity.HIGH,
                     {
-                        "ip": client_ip,
-                        "path": request.url.path,
-                        "method": request.method,
-                        "processing_time": processing_time,
+                        "ip": audit_context.ip_address,
+                        "error": body_error,
+                        "pattern": found,
                     },
                     audit_context,
                 )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid request content",
+                )
+            return message
 
-            # Add rate limit headers
-            response.headers["X-RateLimit-Limit"] = str(
-                SecurityConfig.RATE_LIMIT_REQUESTS_PER_MINUTE
-            )
-            response.headers["X-RateLimit-Remaining"] = str(
-                rate_info.get("burst_tokens", 0)
-            )
-
-            return response
-
-        except Exception as e:
-            # Log security middleware errors
-            await self._log_security_event(
-                f"Security middleware error: {str(e)}",
-                AuditEventType.SYSTEM_STARTUP,  # Using system event for internal errors
-                AuditSeverity.HIGH,
-                {"ip": client_ip, "error": str(e)},
-                audit_context,
-            )
-
-            # Continue with request (fail open for availability)
-            response = await call_next(request)
-            self._add_security_headers(response)
-            return response
+        return scanned_receive
 
     def _get_client_ip(self, request: Request) -> str:
         """Get client IP address considering proxies."""
@@ -611,54 +696,15 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 content={"detail": "Unsupported content type"},
             )
 
-        # Validate request body for POST/PUT requests
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                body = await request.body()
-                body_valid, body_error = await self.request_validator.scan_request_body(
-                    body
-                )
-
-                if not body_valid:
-                    await self._log_security_event(
-                        f"Suspicious request body: {body_error}",
-                        AuditEventType.SUSPICIOUS_ACTIVITY,
-                        AuditSeverity.HIGH,
-                        {"ip": audit_context.ip_address, "error": body_error},
-                        audit_context,
-                    )
-                    return JSONResponse(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        content={"detail": "Invalid request content"},
-                    )
-
-            except Exception as e:
-                await self._log_security_event(
-                    f"Request body validation error: {str(e)}",
-                    AuditEventType.SUSPICIOUS_ACTIVITY,
-                    AuditSeverity.MEDIUM,
-                    {"ip": audit_context.ip_address, "error": str(e)},
-                    audit_context,
-                )
-
         return None
 
-    def _add_security_headers(self, response):
-        """Add security headers to response."""
+    def _add_security_headers(self, headers):
+        """Add security headers (response headers or ``MutableHeaders``)."""
         for header, value in SecurityConfig.SECURITY_HEADERS.items():
-            response.headers[header] = value
+            headers[header] = value
 
         # Add CSP header
-        csp_policy = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdn.jsdelivr.net; "
-            "font-src 'self' https://fonts.gstatic.com; "
-            "img-src 'self' data: https:; "
-            "connect-src 'self' https://api.portaldatransparencia.gov.br; "
-            "frame-ancestors 'none';"
-        )
-        response.headers["Content-Security-Policy"] = csp_policy
+        headers["Content-Security-Policy"] = CONTENT_SECURITY_POLICY
 
     async def _log_security_event(
         self,
@@ -0,0 +1,123 @@
+"""
+Module: api.middleware.threat_scanner
+Description: Compiled, incremental scanner for suspicious request content
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Patterns are compiled once in a case-folded form: the text is lower-cased
+once per chunk instead of matching with ``re.IGNORECASE``, which disables
+CPython's literal-prefix search and made every pattern walk the whole body.
+Unbounded ``*``/``+`` quantifiers are capped at ``MAX_MATCH_SPAN``
+characters, which bounds both regex time (``select\\s+.*\\s+from`` was
+quadratic on single-line JSON) and the longest possible match, so a stream
+can be scanned chunk by chunk keeping only that much text from the previous
+chunk.
+"""
+
+import codecs
+import re
+from collections.abc import Iterable
+
+# Longest run matched by a single quantifier
+MAX_MATCH_SPAN = 1024
+
+# Escapes and character classes are copied verbatim; bare * and + are capped
+_TOKEN = re.compile(r"\\.|\[(?:\\.|[^\]])*\]|[*+]|[^\\\[*+]+", re.DOTALL)
+
+
+def compile_pattern(pattern: str, span: int = MAX_MATCH_SPAN) -> re.Pattern:
+    """Compile ``pattern`` for lower-cased text with bounded quantifiers."""
+    return re.compile(_rewrite(pattern, span))
+
+
+def max_match_length(pattern: str, span: int = MAX_MATCH_SPAN) -> int:
+    """Upper bound on the length of a match of the rewritten pattern."""
+    quantifiers = sum(1 for token in _TOKEN.findall(pattern) if token in "*+")
+    return len(pattern) + quantifiers * span
+
+
+def _rewrite(pattern: str, span: int) -> str:
+    parts = []
+    for token in _TOKEN.findall(pattern):
+        if token == "*":
+            parts.append(f"{{0,{span}}}")
+        elif token == "+":
+            parts.append(f"{{1,{span}}}")
+        elif token.startswith("\\"):
+            parts.append(token)  # \S, \W... keep their case
+        else:
+            parts.append(token.lower())
+    return "".join(parts)
+
+
+class ThreatScanner:
+    """Suspicious-content patterns compiled once and shared by all requests."""
+
+    def __init__(
+        self,
+        patterns: Iterable[str],
+        skip_content_types: Iterable[str] = (),
+        span: int = MAX_MATCH_SPAN,
+    ):
+        """
+        Initialize scanner.
+
+        Args:
+            patterns: Regular expressions (matched case-insensitively)
+            skip_content_types: Content types (or ``type/`` prefixes) whose
+                bodies are binary and never scanned
+            span: Cap for unbounded quantifiers
+        """
+        self.patterns = list(patterns)
+        self._compiled = [compile_pattern(p, span) for p in self.patterns]
+        self.skip_content_types = tuple(skip_content_types)
+        self.overlap = max(
+            (max_match_length(p, span) for p in self.patterns), default=0
+        )
+
+    def search(self, text: str) -> str | None:
+        """Source of the first pattern found in ``text`` (None if clean)."""
+        return self.search_folded(text.lower()) if text else None
+
+    def search_folded(self, folded: str) -> str | None:
+        """Like ``search`` for text that is already lower-cased."""
+        for source, pattern in zip(self.patterns, self._compiled, strict=True):
+            if pattern.search(folded):
+                return source
+        return None
+
+    def should_scan(self, content_type: str | None) -> bool:
+        """Whether bodies of this content type are scanned."""
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        return not media_type.startswith(self.skip_content_types)
+
+    def stream(self) -> "StreamScan":
+        """Incremental scan for one request body."""
+        return StreamScan(self)
+
+
+class StreamScan:
+    """
+    Scans a body chunk by chunk with bounded memory.
+
+    Each chunk is searched together with the last ``overlap`` characters of
+    the previous ones, so matches straddling chunk boundaries are found.
+    """
+
+    def __init__(self, scanner: ThreatScanner):
+        self.scanner = scanner
+        self.size = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._tail = ""
+
+    def feed(self, chunk: bytes, final: bool = False) -> str | None:
+        """Scan the next chunk; returns the matching pattern, if any."""
+        self.size += len(chunk)
+        text = self._decoder.decode(chunk, final)
+        if not text:
+            return None
+        window = self._tail + text.lower()
+        found = self.scanner.search_folded(window)
+        self._tail = window[-self.scanner.overlap :] if self.scanner.overlap else ""
+        return found
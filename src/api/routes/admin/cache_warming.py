@@ -46,6 +46,7 @@ class CacheWarmingStatusResponse(BaseModel):
     last_warming: datetime | None
     query_frequency_tracked: int
     top_queries: list[tuple]
+    refresh_ahead: dict[str, Any] = Field(default_factory=dict)
     config: dict[str, Any]
 
 
@@ -125,6 +126,7 @@ async def get_warming_status(admin_user=Depends(require_admin)):
         last_warming=status["last_warming"],
         query_frequency_tracked=status["query_frequency_tracked"],
         top_queries=status["top_queries"],
+        refresh_ahead=status["refresh_ahead"],
         config=status["config"],
     )
 
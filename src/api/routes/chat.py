@@ -3,7 +3,6 @@ Chat API endpoints for conversational interface
 VERSION: 2025-10-17 15:00:00 - Consolidated implementation
 """
 
-import asyncio
 import random
 import uuid
 from datetime import UTC, datetime
@@ -21,6 +20,7 @@ from src.api.routes.chat_zumbi_integration import (
     format_investigation_message,
     run_zumbi_investigation,
 )
+from src.api.sse import sse_event, sse_response
 from src.core import get_logger, json_utils
 from src.core.config import get_settings
 from src.services.agent_routing import resolve_agent_id
@@ -1633,23 +1633,24 @@ async def stream_message(
         if edge_response and validation.suggested_response:
 
             async def edge_case_generator():
-                yield f"data: {json_utils.dumps({'type': 'start', 'timestamp': datetime.now(UTC).isoformat()})}\n\n"
-                yield f"data: {json_utils.dumps({'type': 'edge_case', 'status': validation.status.value})}\n\n"
-
-                # Stream the response in chunks
-                response_text = validation.suggested_response
-                words = response_text.split()
-                chunk = ""
-                for i, word in enumerate(words):
-                    chunk += word + " "
-                    if i % 4 == 0:
-                        yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip()})}\n\n"
-                        chunk = ""
-                        await asyncio.sleep(0.05)
-                if chunk:
-                    yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip()})}\n\n"
-
-                yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': 'drummond', 'agent_name': 'Carlos Drummond de Andrade', 'edge_case': True, 'suggested_actions': edge_response.get('suggested_actions', [])})}\n\n"
+                yield sse_event(
+                    {"type": "start", "timestamp": datetime.now(UTC).isoformat()}
+                )
+                yield sse_event(
+                    {"type": "edge_case", "status": validation.status.value}
+                )
+                yield sse_event(
+                    {"type": "chunk", "content": validation.suggested_response}
+                )
+                yield sse_event(
+                    {
+                        "type": "complete",
+                        "agent_id": "drummond",
+                        "agent_name": "Carlos Drummond de Andrade",
+                        "edge_case": True,
+                        "suggested_actions": edge_response.get("suggested_actions", []),
+                    }
+                )
 
                 # Persist edge case response
                 if chat_service is not None:
@@ -1663,20 +1664,19 @@ async def stream_message(
                     except Exception:
                         pass
 
-            return StreamingResponse(
-                edge_case_generator(),
-                media_type="text/event-stream",
-                headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"},
-            )
+            return sse_response(edge_case_generator())
 
     async def generate():
         try:
             # Send initial event with session_id so client can track it
-            yield f"data: {json_utils.dumps({'type': 'start', 'timestamp': datetime.now(UTC).isoformat(), 'session_id': session_id})}\n\n"
+            yield {
+                "type": "start",
+                "timestamp": datetime.now(UTC).isoformat(),
+                "session_id": session_id,
+            }
 
             # Detect intent using NEW keyword-based classifier
-            yield f"data: {json_utils.dumps({'type': 'detecting', 'message': 'Analisando sua mensagem...'})}\n\n"
-            await asyncio.sleep(0.5)
+            yield {"type": "detecting", "message": "Analisando sua mensagem..."}
 
             # Detect intent using keyword-based classifier
             intent_type_str = "unknown"
@@ -1719,7 +1719,11 @@ async def stream_message(
 
             intent = Intent(intent_type_str, confidence)
 
-            yield f"data: {json_utils.dumps({'type': 'intent', 'intent': intent.type.value, 'confidence': intent.confidence})}\n\n"
+            yield {
+                "type": "intent",
+                "intent": intent.type.value,
+                "confidence": intent.confidence,
+            }
 
             # Use centralized agent routing (single source of truth)
             agent_id, agent_name = resolve_agent_id(
@@ -1730,8 +1734,11 @@ async def stream_message(
 
             logger.info(f"Stream routing: intent={intent.type.value}, agent={agent_id}")
 
-            yield f"data: {json_utils.dumps({'type': 'agent_selected', 'agent_id': agent_id, 'agent_name': agent_name})}\n\n"
-            await asyncio.sleep(0.1)
+            yield {
+                "type": "agent_selected",
+                "agent_id": agent_id,
+                "agent_name": agent_name,
+            }
 
             # ================================================================
             # SHORT-CIRCUIT: Instant responses for simple intents (Dec 2025)
@@ -1746,21 +1753,17 @@ async def stream_message(
                         f"Using instant streaming response for intent: {intent.type.value}"
                     )
 
-                    # Stream the response in chunks for natural effect
-                    words = instant_response.split()
-                    chunk = ""
-                    for i, word in enumerate(words):
-                        chunk += word + " "
-                        if i % 4 == 3:  # Send every 4 words
-                            yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip()})}\n\n"
-                            chunk = ""
-                            await asyncio.sleep(0.03)  # Very fast streaming
-
-                    if chunk:
-                        yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip()})}\n\n"
+                    # Prebuilt text: no generation to wait for, one event
+                    yield {"type": "chunk", "content": instant_response}
 
                     # Send completion
-                    yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name, 'instant_response': True, 'suggested_actions': ['start_investigation', 'learn_more']})}\n\n"
+                    yield {
+                        "type": "complete",
+                        "agent_id": agent_id,
+                        "agent_name": agent_name,
+                        "instant_response": True,
+                        "suggested_actions": ["start_investigation", "learn_more"],
+                    }
                     return  # Exit the generator early
 
             # Check if this is a contract search query that should use real data
@@ -1774,7 +1777,10 @@ async def stream_message(
                 and INVESTIGATIVE_SERVICE_AVAILABLE
                 and investigative_service
             ):
-                yield f"data: {json_utils.dumps({'type': 'thinking', 'message': f'{agent_name} está buscando contratos reais...'})}\n\n"
+                yield {
+                    "type": "thinking",
+                    "message": f"{agent_name} está buscando contratos reais...",
+                }
 
                 # Stream real contract search
                 contracts_found = []
@@ -1784,12 +1790,12 @@ async def stream_message(
                 ):
                     # Forward search events
                     if event["type"] in ["thinking", "searching", "found"]:
-                        yield f"data: {json_utils.dumps(event)}\n\n"
+                        yield event
                     elif event["type"] == "contract":
                         contracts_found.append(event["data"])
-                        yield f"data: {json_utils.dumps(event)}\n\n"
+                        yield event
                     elif event["type"] == "complete":
-                        yield f"data: {json_utils.dumps(event)}\n\n"
+                        yield event
 
                 # Generate agent summary if contracts found
                 if contracts_found:
@@ -1799,11 +1805,30 @@ async def stream_message(
                         f"totalizando R$ {total_value:,.2f}. "
                         f"Você pode baixar os dados completos nos formatos JSON, CSV ou TXT."
                     )
-                    yield f"data: {json_utils.dumps({'type': 'chunk', 'content': summary})}\n\n"
-                    yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name, 'contracts': contracts_found, 'download_available': True, 'suggested_actions': ['download_json', 'download_csv', 'analyze_anomalies']})}\n\n"
+                    yield {"type": "chunk", "content": summary}
+                    yield {
+                        "type": "complete",
+                        "agent_id": agent_id,
+                        "agent_name": agent_name,
+                        "contracts": contracts_found,
+                        "download_available": True,
+                        "suggested_actions": [
+                            "download_json",
+                            "download_csv",
+                            "analyze_anomalies",
+                        ],
+                    }
                 else:
-                    yield f"data: {json_utils.dumps({'type': 'chunk', 'content': 'Não encontrei contratos com esses critérios. Tente refinar sua busca.'})}\n\n"
-                    yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name, 'suggested_actions': ['try_again', 'change_filters']})}\n\n"
+                    yield {
+                        "type": "chunk",
+                        "content": "Não encontrei contratos com esses critérios. Tente refinar sua busca.",
+                    }
+                    yield {
+                        "type": "complete",
+                        "agent_id": agent_id,
+                        "agent_name": agent_name,
+                        "suggested_actions": ["try_again", "change_filters"],
+                    }
 
             # ================================================================
             # SPECIALIZED AGENTS: Use their process method with knowledge base
@@ -1814,7 +1839,10 @@ async def stream_message(
                 agent_id in ["bo_bardi", "santos_dumont", "monteiro_lobato", "tarsila"]
                 and request.agent_id
             ):
-                yield f"data: {json_utils.dumps({'type': 'thinking', 'message': f'{agent_name} está consultando a base de conhecimento...'})}\n\n"
+                yield {
+                    "type": "thinking",
+                    "message": f"{agent_name} está consultando a base de conhecimento...",
+                }
 
                 try:
                     specialized_agent = await get_agent_by_name(agent_id)
@@ -1846,20 +1874,22 @@ async def stream_message(
                                 or "Não encontrei informação específica."
                             )
 
-                            # Stream the response in chunks
-                            words = response_text.split()
-                            chunk = ""
-                            for i, word in enumerate(words):
-                                chunk += word + " "
-                                if i % 3 == 2:  # Send every 3 words
-                                    yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip(), 'agent_id': agent_id})}\n\n"
-                                    chunk = ""
-                                    await asyncio.sleep(0.04)
-
-                            if chunk:
-                                yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip(), 'agent_id': agent_id})}\n\n"
-
-                            yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name, 'suggested_actions': ['start_investigation', 'learn_more']})}\n\n"
+                            # Structured agent result: sent in one event
+                            yield {
+                                "type": "chunk",
+                                "content": response_text,
+                                "agent_id": agent_id,
+                            }
+
+                            yield {
+                                "type": "complete",
+                                "agent_id": agent_id,
+                                "agent_name": agent_name,
+                                "suggested_actions": [
+                                    "start_investigation",
+                                    "learn_more",
+                                ],
+                            }
                         else:
                             # Agent returned error, fallback to DSPy
                             raise Exception("Agent returned non-completed status")
@@ -1871,7 +1901,10 @@ async def stream_message(
                     )
                     # Continue to DSPy fallback below
                     if DSPY_AVAILABLE and dspy_service:
-                        yield f"data: {json_utils.dumps({'type': 'thinking', 'message': f'{agent_name} está pensando...'})}\n\n"
+                        yield {
+                            "type": "thinking",
+                            "message": f"{agent_name} está pensando...",
+                        }
                         async for chunk_data in dspy_service.chat_stream(
                             agent_id=agent_id,
                             message=sanitized_message,
@@ -1879,17 +1912,31 @@ async def stream_message(
                             context="",
                         ):
                             if chunk_data.get("type") == "chunk":
-                                yield f"data: {json_utils.dumps(chunk_data)}\n\n"
-                                await asyncio.sleep(0.05)
+                                yield chunk_data
                             elif chunk_data.get("type") == "complete":
-                                yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name, 'suggested_actions': ['start_investigation', 'learn_more']})}\n\n"
+                                yield {
+                                    "type": "complete",
+                                    "agent_id": agent_id,
+                                    "agent_name": agent_name,
+                                    "suggested_actions": [
+                                        "start_investigation",
+                                        "learn_more",
+                                    ],
+                                }
                     else:
-                        yield f"data: {json_utils.dumps({'type': 'chunk', 'content': 'Desculpe, não consegui processar sua mensagem.'})}\n\n"
-                        yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name})}\n\n"
+                        yield {
+                            "type": "chunk",
+                            "content": "Desculpe, não consegui processar sua mensagem.",
+                        }
+                        yield {
+                            "type": "complete",
+                            "agent_id": agent_id,
+                            "agent_name": agent_name,
+                        }
 
             # Use DSPy for personality-based responses if available
             elif DSPY_AVAILABLE and dspy_service:
-                yield f"data: {json_utils.dumps({'type': 'thinking', 'message': f'{agent_name} está pensando...'})}\n\n"
+                yield {"type": "thinking", "message": f"{agent_name} está pensando..."}
 
                 # Stream response from DSPy agent
                 async for chunk_data in dspy_service.chat_stream(
@@ -1899,56 +1946,50 @@ async def stream_message(
                     context="",
                 ):
                     if chunk_data.get("type") == "chunk":
-                        yield f"data: {json_utils.dumps(chunk_data)}\n\n"
-                        await asyncio.sleep(0.05)
+                        yield chunk_data
                     elif chunk_data.get("type") == "complete":
-                        yield f"data: {json_utils.dumps({'type': 'complete', 'agent_id': agent_id, 'agent_name': agent_name, 'suggested_actions': ['start_investigation', 'learn_more']})}\n\n"
+                        yield {
+                            "type": "complete",
+                            "agent_id": agent_id,
+                            "agent_name": agent_name,
+                            "suggested_actions": ["start_investigation", "learn_more"],
+                        }
             else:
                 # Fallback to static response if DSPy not available
                 response_text = f"Olá! Sou {agent_name} e vou ajudá-lo com sua solicitação sobre {intent.type.value}."
 
-                # Send response in chunks
-                words = response_text.split()
-                chunk = ""
-                for i, word in enumerate(words):
-                    chunk += word + " "
-                    if i % 3 == 0:  # Send every 3 words
-                        yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip()})}\n\n"
-                        chunk = ""
-                        await asyncio.sleep(0.1)
-
-                if chunk:  # Send remaining words
-                    yield f"data: {json_utils.dumps({'type': 'chunk', 'content': chunk.strip()})}\n\n"
+                yield {"type": "chunk", "content": response_text}
 
                 # Send completion
-                yield f"data: {json_utils.dumps({'type': 'complete', 'suggested_actions': ['start_investigation', 'learn_more']})}\n\n"
+                yield {
+                    "type": "complete",
+                    "suggested_actions": ["start_investigation", "learn_more"],
+                }
 
         except Exception as e:
             logger.error(f"Stream error: {str(e)}", exc_info=True)
-            yield f"data: {json_utils.dumps({'type': 'error', 'message': str(e), 'fallback_endpoint': '/api/v1/chat/message'})}\n\n"
+            yield {
+                "type": "error",
+                "message": str(e),
+                "fallback_endpoint": "/api/v1/chat/message",
+            }
 
     async def generate_and_persist():
-        """Wrap generate() to accumulate chunks and persist assistant response."""
+        """Frame generate() events as SSE and persist the assistant response."""
         chunks: list[str] = []
         agent_id_captured: str | None = None
 
-        async for event_str in generate():
-            # Parse SSE data to capture chunks and agent_id
-            if event_str.startswith("data: "):
-                try:
-                    payload = json_utils.loads(event_str[6:].strip())
-                    if payload.get("type") == "chunk" and payload.get("content"):
-                        chunks.append(payload["content"])
-                    elif payload.get("type") == "agent_selected" and payload.get("agent_id"):
-                        agent_id_captured = payload["agent_id"]
-                except Exception:
-                    pass
-            yield event_str
+        async for event in generate():
+            if event.get("type") == "chunk" and event.get("content"):
+                chunks.append(event["content"])
+            elif event.get("type") == "agent_selected" and event.get("agent_id"):
+                agent_id_captured = event["agent_id"]
+            yield sse_event(event)
 
         # Persist accumulated assistant response after stream completes
         if chat_service is not None and chunks:
             try:
-                full_response = " ".join(chunks)
+                full_response = "".join(chunks)
                 await chat_service.save_message(
                     session_id=session_id,
                     role="assistant",
@@ -1958,15 +1999,7 @@ async def stream_message(
             except Exception as e:
                 logger.warning(f"Failed to persist stream response: {e}")
 
-    return StreamingResponse(
-        generate_and_persist(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return sse_response(generate_and_persist())
 
 
 @router.get("/suggestions")
@@ -12,6 +12,7 @@ from uuid import uuid4
 
 import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, field_validator
 from pydantic import Field as PydanticField
 
@@ -20,6 +21,7 @@ from src.core import get_logger, json_utils
 from src.services.data_service import data_service
 from src.services.export_service import export_service
 from src.services.investigation_service_selector import investigation_service
+from src.services.streaming_export import XLSX_MEDIA_TYPE, peek
 
 logger = get_logger(__name__)
 
@@ -180,51 +182,42 @@ async def export_contracts(
     # Apply filters
     filters = request.filters or {}
 
-    # Get contracts data
-    contracts = await data_service.search_contracts(
-        **filters, limit=10000  # Reasonable limit for exports
-    )
+    if request.format not in ("excel", "csv"):
+        raise HTTPException(
+            status_code=400, detail="Format not supported for contracts export"
+        )
 
-    if not contracts:
+    # Contracts are streamed page by page straight into the file, so exports
+    # are not capped and memory stays flat; only the first page is awaited
+    # here to answer 404 before the response starts.
+    first = await peek(data_service.iter_contracts(filters))
+    if first is None:
         raise HTTPException(
             status_code=404, detail="No contracts found with given filters"
         )
+    _, contracts = first
 
     filename = f"contracts_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
     if request.format == "excel":
-        # Convert to DataFrame
-        df = pd.DataFrame(contracts)
-
         # Generate Excel with formatting
-        excel_bytes = await export_service.generate_excel(
-            data=df,
-            title="Contratos - Portal da Transparência",
-            metadata={
-                "exported_at": datetime.now().isoformat(),
-                "total_records": len(contracts),
-                "filters": filters,
-            },
-        )
-
-        return Response(
-            content=excel_bytes,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        return StreamingResponse(
+            export_service.stream_excel(
+                data=contracts,
+                title="Contratos - Portal da Transparência",
+                metadata={
+                    "exported_at": datetime.now().isoformat(),
+                    "filters": filters,
+                },
+            ),
+            media_type=XLSX_MEDIA_TYPE,
             headers={"Content-Disposition": f"attachment; filename={filename}.xlsx"},
         )
 
-    if request.format == "csv":
-        df = pd.DataFrame(contracts)
-        csv_bytes = await export_service.generate_csv(df)
-
-        return Response(
-            content=csv_bytes,
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}.csv"},
-        )
-
-    raise HTTPException(
-        status_code=400, detail="Format not supported for contracts export"
+    return StreamingResponse(
+        export_service.stream_csv(contracts),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}.csv"},
     )
 
 
@@ -340,11 +333,9 @@ async def bulk_export(
     if not exports_config:
         raise HTTPException(status_code=404, detail="No data found for bulk export")
 
-    # Generate ZIP
-    zip_bytes = await export_service.generate_bulk_export(exports_config)
-
-    return Response(
-        content=zip_bytes,
+    # Stream the ZIP, rendering each file as it is written
+    return StreamingResponse(
+        export_service.stream_bulk_export(exports_config),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename=bulk_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
@@ -16,6 +16,7 @@ from pydantic import BaseModel, Field
 
 from src.services.transparency_apis.federal_apis.datasus_client import DataSUSClient
 from src.services.transparency_apis.federal_apis.ibge_client import IBGEClient
+from src.services.transparency_apis.federal_apis.ibge_store import get_ibge_store
 from src.services.transparency_apis.federal_apis.inep_client import INEPClient
 
 router = APIRouter(prefix="/api/v1/federal", tags=["Federal APIs"])
@@ -223,7 +224,7 @@ async def get_ibge_municipalities(request: IBGEMunicipalitiesRequest) -> dict[st
 async def get_ibge_population(request: IBGEPopulationRequest) -> dict[str, Any]:
     """Get population data."""
     try:
-        async with IBGEClient() as client:
+        async with IBGEClient(store=get_ibge_store()) as client:
             population = await client.get_population(
                 location_id=request.location_id,
                 year=request.year,
@@ -3,6 +3,7 @@ API routes for geographic data endpoints.
 Provides Brazilian geographic data and boundaries for map visualizations.
 """
 
+import asyncio
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -14,8 +15,13 @@ from src.agents.deodoro import AgentContext, AgentMessage
 from src.agents.lampiao import LampiaoAgent, RegionType
 from src.api.middleware.authentication import get_current_user
 from src.core import get_logger
-from src.core.exceptions import ResourceNotFoundError
+from src.core.exceptions import (
+    DataNotFoundError,
+    DataSourceError,
+    ResourceNotFoundError,
+)
 from src.db.session import get_session as get_db
+from src.ml.spatial_statistics import BRAZIL_STATE_NEIGHBORS, get_spatial_engine
 from src.services.agent_lazy_loader import AgentLazyLoader
 from src.services.cache_service import CacheService
 
@@ -446,6 +452,9 @@ async def get_geographic_data(
     ),
     normalize: bool = Query(False, description="Normalize by population or area"),
     time_range: str = Query("30d", description="Time range: 7d, 30d, 90d, 1y"),
+    include_spatial: bool = Query(
+        False, description="Add Gi* hotspots and LISA clusters to each region"
+    ),
     current_user: dict[str, Any] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -453,7 +462,9 @@ async def get_geographic_data(
     Get data aggregated by geographic regions.
 
     This endpoint aggregates various metrics by geographic regions,
-    perfect for creating choropleth maps and regional comparisons.
+    perfect for creating choropleth maps and regional comparisons. With
+    ``include_spatial`` every region also carries its Getis-Ord Gi* z-score
+    and LISA cluster over state or municipal contiguity weights.
     """
     try:
         logger.info(
@@ -519,13 +530,24 @@ async def get_geographic_data(
                 )
             )
 
+        summary_statistics = dict(regional_data.statistics)
+        if include_spatial and len(data_points) >= 3:
+            try:
+                summary_statistics.update(
+                    await _add_spatial_statistics(lampiao_agent, metric, data_points)
+                )
+            except DataSourceError as e:
+                logger.warning(
+                    "Spatial statistics unavailable", metric=metric, error=e.message
+                )
+
         cache_ttl = 3600  # 1 hour
 
         return GeographicDataResponse(
             data_type=metric,
             region_type=region_type,
             data_points=data_points,
-            summary_statistics=regional_data.statistics,
+            summary_statistics=summary_statistics,
             timestamp=datetime.now(UTC),
             cache_expires=datetime.now(UTC) + timedelta(seconds=cache_ttl),
         )
@@ -542,6 +564,189 @@ async def get_geographic_data(
         )
 
 
+async def _add_spatial_statistics(
+    lampiao_agent: LampiaoAgent, metric: str, data_points: list[RegionalDataPoint]
+) -> dict[str, float]:
+    """Annotate choropleth points with Gi* and LISA; return global Moran's I."""
+    values = {point.region_id: point.value for point in data_points}
+    if set(values) <= set(BRAZIL_STATE_NEIGHBORS):
+        engine = get_spatial_engine()
+        weights = engine.state_weights()
+        ids = [state for state in weights.ids if state in values]
+        if len(ids) < len(weights.ids):
+            weights = engine.contiguity(ids, BRAZIL_STATE_NEIGHBORS)
+        result = await asyncio.to_thread(
+            engine.analyze, [values[state] for state in ids], weights, seed=42
+        )
+    else:
+        result = await lampiao_agent.analyze_municipal_statistics(metric, values)
+
+    areas = {area["id"]: area for area in result["areas"]}
+    for point in data_points:
+        area = areas.get(point.region_id)
+        if area:
+            point.metadata.update(
+                gi_star_z=area["gi_star_z"],
+                hotspot=area["hotspot"],
+                local_moran_i=area["local_i"],
+                lisa_cluster=area["cluster"],
+            )
+    return {
+        "morans_i": result["global"]["I"],
+        "morans_i_p_value": result["global"]["p_value"],
+    }
+
+
+class SpatialArea(BaseModel):
+    """Area observation for spatial statistics."""
+
+    id: str = Field(..., description="Area identifier (e.g., IBGE municipality code)")
+    value: float = Field(..., description="Observed value")
+    lat: float = Field(..., ge=-90, le=90, description="Centroid latitude")
+    lng: float = Field(..., ge=-180, le=180, description="Centroid longitude")
+
+
+class SpatialStatisticsRequest(BaseModel):
+    """Request for Gi* and Moran's I over arbitrary areas."""
+
+    areas: list[SpatialArea] = Field(..., min_length=3, max_length=6000)
+    k: int = Field(6, ge=1, le=12, description="Nearest neighbours per area")
+    permutations: int = Field(199, ge=0, le=999)
+    confidence: float = Field(0.95, gt=0, lt=1)
+    seed: int | None = Field(None, description="Seed for reproducible p-values")
+
+
+@router.get("/hotspots/{metric}")
+async def get_hotspots(
+    metric: str = Path(..., description="State indicator (gdp_per_capita, hdi...)"),
+    threshold: float = Query(0.9, gt=0, lt=1, description="Confidence level"),
+    region_type: RegionType = Query(
+        RegionType.STATE, description="state or municipality"
+    ),
+    current_user: dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Get Getis-Ord Gi* hotspots and coldspots.
+
+    For states, contiguous significant states are merged into a single
+    insight. For municipalities, every significant municipality of the IBGE
+    municipal mesh is returned with its Gi* and LISA statistics.
+    """
+    try:
+        lampiao_agent = await agent_loader.get_agent("lampiao")
+        if not lampiao_agent:
+            lampiao_agent = LampiaoAgent()
+            await lampiao_agent.initialize()
+
+        if region_type == RegionType.MUNICIPALITY:
+            result = await lampiao_agent.analyze_municipal_statistics(
+                metric, confidence=threshold
+            )
+            return {
+                "metric": metric,
+                "threshold": threshold,
+                "region_type": region_type.value,
+                "weights": result["weights"],
+                "global": result["global"],
+                "areas": [area for area in result["areas"] if area["hotspot"]],
+                "timestamp": datetime.now(UTC),
+            }
+        if region_type != RegionType.STATE:
+            raise HTTPException(
+                status_code=400,
+                detail="Hotspots are available for states and municipalities",
+            )
+
+        insights = await lampiao_agent.identify_hotspots(metric, threshold)
+
+        return {
+            "metric": metric,
+            "threshold": threshold,
+            "insights": [
+                {
+                    "insight_id": insight.insight_id,
+                    "insight_type": insight.insight_type,
+                    "severity": insight.severity,
+                    "affected_regions": insight.affected_regions,
+                    "description": insight.description,
+                    "evidence": insight.evidence,
+                    "recommendations": insight.recommendations,
+                    "confidence": insight.confidence,
+                }
+                for insight in insights
+            ],
+            "timestamp": datetime.now(UTC),
+        }
+
+    except HTTPException:
+        raise
+    except DataNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except DataSourceError as e:
+        raise HTTPException(status_code=503, detail=e.message)
+    except Exception as e:
+        logger.error(
+            "Failed to identify hotspots",
+            metric=metric,
+            error=str(e),
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail=f"Failed to identify hotspots: {str(e)}"
+        )
+
+
+@router.post("/spatial-statistics")
+async def compute_spatial_statistics(
+    request: SpatialStatisticsRequest,
+    current_user: dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Compute Gi*, global and local Moran's I for arbitrary areas.
+
+    Designed for municipality-scale inputs: weights are k-nearest neighbours
+    over the given centroids (cached across identical requests) and the
+    computation runs off the event loop.
+    """
+    engine = get_spatial_engine()
+    ids = [area.id for area in request.areas]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Area ids must be unique")
+
+    def _compute() -> dict[str, Any]:
+        weights = engine.knn(
+            ids, [(area.lat, area.lng) for area in request.areas], k=request.k
+        )
+        result = engine.analyze(
+            [area.value for area in request.areas],
+            weights,
+            permutations=request.permutations,
+            confidence=request.confidence,
+            seed=request.seed,
+        )
+        return {
+            "weights": result["weights"],
+            "global": result["global"],
+            "areas": result["areas"],
+        }
+
+    try:
+        result = await asyncio.to_thread(_compute)
+    except Exception as e:
+        logger.error(
+            "Failed to compute spatial statistics",
+            areas=len(ids),
+            error=str(e),
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail=f"Failed to compute spatial statistics: {str(e)}"
+        )
+
+    result["timestamp"] = datetime.now(UTC)
+    return result
+
+
 @router.get("/coordinates/{region_id}")
 async def get_region_coordinates(
     region_id: str = Path(..., description="Region identifier"),
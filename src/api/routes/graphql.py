@@ -13,12 +13,19 @@ from src.core import get_logger
 
 # Try to import strawberry - optional dependency
 try:
+    from cross_web import HTTPException as GraphQLHTTPException
     from strawberry.fastapi import GraphQLRouter
     from strawberry.subscriptions import (
         GRAPHQL_TRANSPORT_WS_PROTOCOL,
         GRAPHQL_WS_PROTOCOL,
     )
 
+    from src.api.graphql.loaders import create_loaders
+    from src.api.graphql.persisted_queries import (
+        PersistedQueryError,
+        PersistedQueryNotFound,
+        get_persisted_query_store,
+    )
     from src.api.graphql.schema import schema
 
     STRAWBERRY_AVAILABLE = True
@@ -46,6 +53,7 @@ async def get_context(
         "request": request,
         "user": user,
         "db": request.app.state.db if hasattr(request.app.state, "db") else None,
+        "loaders": create_loaders(),
     }
 
 
@@ -88,13 +96,28 @@ async def get_ws_context(
         "websocket": websocket,
         "user": user,  # Now properly authenticated
         "authenticated": user is not None,
+        "loaders": create_loaders(),
     }
 
 
 # Create GraphQL router if strawberry is available
 if STRAWBERRY_AVAILABLE:
+
+    class PersistedQueryGraphQLRouter(GraphQLRouter):
+        """GraphQL router that resolves persisted queries by hash."""
+
+        async def parse_http_body(self, request):
+            data = await super().parse_http_body(request)
+            store = get_persisted_query_store()
+            for item in data if isinstance(data, list) else [data]:
+                try:
+                    item.query = store.resolve(item.query, item.extensions)
+                except (PersistedQueryNotFound, PersistedQueryError) as e:
+                    raise GraphQLHTTPException(400, str(e)) from e
+            return data
+
     # Create GraphQL app with custom context
-    router = GraphQLRouter(
+    router = PersistedQueryGraphQLRouter(
         schema=schema,
         context_getter=get_context,
         subscription_protocols=[
@@ -6,12 +6,11 @@ Date: 2025-01-24
 License: Proprietary - All rights reserved
 """
 
-import asyncio
 from datetime import UTC, datetime
 from typing import Any
 from uuid import uuid4
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, field_validator
 from pydantic import Field as PydanticField
@@ -21,6 +20,7 @@ from src.agents.zumbi_wrapper import patch_investigator_agent
 from src.api.middleware.authentication import get_current_user
 from src.config.system_users import SYSTEM_AUTO_MONITOR_USER_ID
 from src.core import get_logger, json_utils
+from src.infrastructure.events.progress_bus import get_progress_bus
 from src.infrastructure.observability.metrics import (
     BusinessMetrics,
     count_calls,
@@ -137,9 +137,77 @@ class InvestigationStatus(BaseModel):
     estimated_completion: datetime | None = None
 
 
-# In-memory storage for investigation tracking (replace with database later)
+# In-memory storage for investigation tracking (replace with database later).
+# Progress is mirrored to the investigation progress bus so that status and
+# streaming endpoints work from any worker.
 _active_investigations: dict[str, dict[str, Any]] = {}
 
+# Investigation fields mirrored into the progress bus snapshot
+_SNAPSHOT_FIELDS = (
+    "user_id",
+    "query",
+    "data_source",
+    "status",
+    "progress",
+    "current_phase",
+    "records_processed",
+    "anomalies_detected",
+    "started_at",
+    "completed_at",
+    "confidence_score",
+    "error",
+)
+
+
+async def _publish_progress(investigation_id: str) -> None:
+    """Push the investigation's current state to the progress bus."""
+    investigation = _active_investigations.get(investigation_id)
+    if investigation is None:
+        return
+    fields = {k: investigation[k] for k in _SNAPSHOT_FIELDS if k in investigation}
+    try:
+        bus = await get_progress_bus()
+        if investigation["status"] in ("completed", "failed", "cancelled"):
+            await bus.finish(investigation_id, **fields)
+        else:
+            await bus.update(investigation_id, **fields)
+    except Exception as e:
+        logger.warning(
+            "investigation_progress_publish_failed",
+            investigation_id=investigation_id,
+            error=str(e),
+        )
+
+
+async def _publish_results(investigation_id: str, results: list[dict]) -> None:
+    """Push newly found anomalies to the progress bus."""
+    try:
+        bus = await get_progress_bus()
+        await bus.publish_results(investigation_id, results)
+    except Exception as e:
+        logger.warning(
+            "investigation_results_publish_failed",
+            investigation_id=investigation_id,
+            error=str(e),
+        )
+
+
+async def _get_tracked_investigation(investigation_id: str) -> dict[str, Any] | None:
+    """Investigation state from this worker, else from the progress bus."""
+    investigation = _active_investigations.get(investigation_id)
+    if investigation is not None:
+        return investigation
+    try:
+        bus = await get_progress_bus()
+        return await bus.snapshot(investigation_id)
+    except Exception as e:
+        logger.warning(
+            "investigation_snapshot_unavailable",
+            investigation_id=investigation_id,
+            error=str(e),
+        )
+        return None
+
 
 @router.post("/", response_model=dict[str, str])
 @count_calls("cidadao_ai_investigation_requests_total", labels={"operation": "create"})
@@ -224,6 +292,8 @@ async def start_investigation(
         "results": [],
     }
 
+    await _publish_progress(investigation_id)
+
     # Start investigation in background
     background_tasks.add_task(_run_investigation, investigation_id, request)
 
@@ -250,77 +320,36 @@ async def start_investigation(
 
 @router.get("/stream/{investigation_id}")
 async def stream_investigation_results(
-    investigation_id: str, current_user: dict[str, Any] = Depends(get_current_user)
+    investigation_id: str,
+    last_event_id: str | None = Header(None),
+    current_user: dict[str, Any] = Depends(get_current_user),
 ):
     """
     Stream investigation results in real-time.
 
     Returns a streaming response with investigation progress and results
-    as they are discovered.
+    as they are discovered. Events are pushed from the progress bus; each
+    carries an ``id`` so reconnecting clients resume via ``Last-Event-ID``.
     """
-    if investigation_id not in _active_investigations:
+    investigation = await _get_tracked_investigation(investigation_id)
+    if investigation is None:
         raise HTTPException(status_code=404, detail="Investigation not found")
 
-    investigation = _active_investigations[investigation_id]
-
     # Check user authorization
-    if investigation["user_id"] != current_user.get("user_id"):
+    if investigation.get("user_id") != current_user.get("user_id"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    async def generate_updates():
-        """Generate real-time updates for the investigation."""
-        last_update = 0
-
-        while True:
-            current_investigation = _active_investigations.get(investigation_id)
-            if not current_investigation:
-                break
-
-            # Send progress updates
-            if current_investigation["progress"] > last_update:
-                update_data = {
-                    "type": "progress",
-                    "investigation_id": investigation_id,
-                    "progress": current_investigation["progress"],
-                    "current_phase": current_investigation["current_phase"],
-                    "records_processed": current_investigation["records_processed"],
-                    "anomalies_detected": current_investigation["anomalies_detected"],
-                    "timestamp": datetime.now(UTC).isoformat(),
-                }
-                yield f"data: {json_utils.dumps(update_data)}\n\n"
-                last_update = current_investigation["progress"]
-
-            # Send anomaly results as they're found
-            new_results = current_investigation["results"][
-                len(current_investigation.get("sent_results", [])) :
-            ]
-            for result in new_results:
-                result_data = {
-                    "type": "anomaly",
-                    "investigation_id": investigation_id,
-                    "result": result,
-                    "timestamp": datetime.now(UTC).isoformat(),
-                }
-                yield f"data: {json_utils.dumps(result_data)}\n\n"
-
-            # Mark results as sent
-            current_investigation["sent_results"] = current_investigation[
-                "results"
-            ].copy()
-
-            # Check if investigation is complete
-            if current_investigation["status"] in ["completed", "failed"]:
-                completion_data = {
-                    "type": "completion",
-                    "investigation_id": investigation_id,
-                    "status": current_investigation["status"],
-                    "total_anomalies": len(current_investigation["results"]),
-                    "timestamp": datetime.now(UTC).isoformat(),
-                }
-                yield f"data: {json_utils.dumps(completion_data)}\n\n"
-                break
+    bus = await get_progress_bus()
 
-            await asyncio.sleep(1)  # Poll every second
+    async def generate_updates():
+        """Forward progress bus events as server-sent events."""
+        async for event in bus.subscribe(
+            investigation_id, last_event_id=last_event_id, idle_timeout=15.0
+        ):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event.offset}\ndata: {json_utils.dumps(event.to_dict())}\n\n"
 
     return StreamingResponse(
         generate_updates(),
@@ -342,13 +371,12 @@ async def get_investigation_status(
 
     Returns progress information and current phase of the investigation.
     """
-    if investigation_id not in _active_investigations:
+    investigation = await _get_tracked_investigation(investigation_id)
+    if investigation is None:
         raise HTTPException(status_code=404, detail="Investigation not found")
 
-    investigation = _active_investigations[investigation_id]
-
     # Check user authorization
-    if investigation["user_id"] != current_user.get("user_id"):
+    if investigation.get("user_id") != current_user.get("user_id"):
         raise HTTPException(status_code=403, detail="Access denied")
 
     return InvestigationStatus(
@@ -473,6 +501,7 @@ async def cancel_investigation(
     # Mark as cancelled
     investigation["status"] = "cancelled"
     investigation["completed_at"] = datetime.now(UTC)
+    await _publish_progress(investigation_id)
 
     logger.info(
         "investigation_cancelled",
@@ -497,6 +526,7 @@ async def _run_investigation(investigation_id: str, request: InvestigationReques
         investigation["status"] = "running"
         investigation["current_phase"] = "data_retrieval"
         investigation["progress"] = 0.1
+        await _publish_progress(investigation_id)
 
         # Update in database
         try:
@@ -525,6 +555,7 @@ async def _run_investigation(investigation_id: str, request: InvestigationReques
 
         investigation["current_phase"] = "anomaly_detection"
         investigation["progress"] = 0.3
+        await _publish_progress(investigation_id)
 
         # Update progress in database
         try:
@@ -551,6 +582,7 @@ async def _run_investigation(investigation_id: str, request: InvestigationReques
 
         investigation["current_phase"] = "forensic_enrichment"
         investigation["progress"] = 0.7
+        await _publish_progress(investigation_id)
 
         # Process results with forensic enrichment
         enriched_results = []
@@ -621,10 +653,12 @@ async def _run_investigation(investigation_id: str, request: InvestigationReques
             if total_contracts_analyzed > 0
             else sum(len(r.affected_entities) for r in results)
         )
+        await _publish_results(investigation_id, enriched_results)
 
         # Generate summary
         investigation["current_phase"] = "summary_generation"
         investigation["progress"] = 0.9
+        await _publish_progress(investigation_id)
 
         summary = await investigator.generate_summary(results, context)
         investigation["summary"] = summary
@@ -637,6 +671,7 @@ async def _run_investigation(investigation_id: str, request: InvestigationReques
         investigation["completed_at"] = datetime.now(UTC)
         investigation["progress"] = 1.0
         investigation["current_phase"] = "completed"
+        await _publish_progress(investigation_id)
 
         # Save final results to database
         try:
@@ -704,6 +739,7 @@ async def _run_investigation(investigation_id: str, request: InvestigationReques
         investigation["completed_at"] = datetime.now(UTC)
         investigation["current_phase"] = "failed"
         investigation["error"] = str(e)
+        await _publish_progress(investigation_id)
 
         # Save failure to database
         try:
@@ -827,6 +863,8 @@ async def create_public_investigation(
             "results": [],
         }
 
+        await _publish_progress(investigation_id)
+
         # Start investigation in background
         background_tasks.add_task(
             _run_investigation,
@@ -873,6 +911,18 @@ async def get_public_investigation_status(investigation_id: str):
     without requiring authentication.
     """
     if investigation_id not in _active_investigations:
+        # Another worker may be running it
+        snapshot = await _get_tracked_investigation(investigation_id)
+        if snapshot is not None:
+            return InvestigationStatus(
+                investigation_id=investigation_id,
+                status=snapshot["status"],
+                progress=snapshot.get("progress", 0.0),
+                current_phase=snapshot.get("current_phase", "unknown"),
+                records_processed=snapshot.get("records_processed", 0),
+                anomalies_detected=snapshot.get("anomalies_detected", 0),
+            )
+
         # Try to fetch from database if not in memory
         try:
             db_investigation = await investigation_service.get_by_id(investigation_id)
@@ -6,19 +6,25 @@ Date: 2025-01-24
 License: Proprietary - All rights reserved
 """
 
+import base64
 from datetime import UTC, datetime
 from typing import Any
 from uuid import uuid4
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from pydantic import BaseModel, field_validator
 from pydantic import Field as PydanticField
 
 from src.agents import AgentContext
 from src.agents.tiradentes import ReporterAgent
 from src.api.middleware.authentication import get_current_user
-from src.core import get_logger, json_utils
+from src.core import AgentStatus, get_logger, json_utils
+from src.services.report_cache import (
+    ReportArtifact,
+    content_key,
+    get_report_artifact_store,
+)
 
 logger = get_logger(__name__)
 
@@ -259,6 +265,36 @@ async def get_report_templates():
     return templates
 
 
+def _stream_artifact(artifact: ReportArtifact, filename: str) -> StreamingResponse:
+    """Stream a stored report file without loading it in memory."""
+    return StreamingResponse(
+        get_report_artifact_store().stream(artifact),
+        media_type=artifact.media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(artifact.size),
+            "ETag": f'"{artifact.artifact_id}"',
+        },
+    )
+
+
+@router.get("/artifacts/{artifact_id}")
+async def download_artifact(
+    artifact_id: str, current_user: dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Download a rendered report file by reference.
+
+    Files are content addressed, so they are streamed as stored.
+    """
+    artifact = get_report_artifact_store().get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    suffix = artifact.path.suffix
+    return _stream_artifact(artifact, f"{artifact_id}{suffix}")
+
+
 @router.get("/{report_id}/status", response_model=ReportStatus)
 async def get_report_status(
     report_id: str, current_user: dict[str, Any] = Depends(get_current_user)
@@ -386,29 +422,36 @@ async def download_report(
         )
 
     if format == "pdf":
-        # Check if content is base64 encoded PDF
-        import base64
-
+        store = get_report_artifact_store()
+        # Reports rendered as PDF are stored by reference
+        reference = report.get("artifact") or {}
+        artifact = store.get(reference.get("artifact_id", ""))
+        if artifact is None and report["output_format"] == "pdf" and not content:
+            # Evicted from the store; there is no content to render again
+            raise HTTPException(status_code=410, detail="Report PDF expired")
         try:
-            # If content is already a base64 PDF, decode it
-            if report["output_format"] == "pdf":
-                pdf_bytes = base64.b64decode(content)
-            else:
-                # Convert markdown/html content to PDF
+            if artifact is None:
                 from src.services.export_service import export_service
 
-                pdf_bytes = await export_service.generate_pdf(
-                    content=content,
-                    title=report["title"],
-                    metadata=report["metadata"],
-                    format_type="report",
+                async def render() -> bytes:
+                    # Content may already be a base64 encoded PDF
+                    if report["output_format"] == "pdf":
+                        return base64.b64decode(content)
+                    return await export_service.generate_pdf(
+                        content=content,
+                        title=report["title"],
+                        metadata=report["metadata"],
+                        format_type="report",
+                    )
+
+                # Rendered once per content, then served from the store
+                artifact = await store.get_or_create(
+                    content_key("download", report["title"], content),
+                    render,
+                    "application/pdf",
                 )
 
-            return Response(
-                content=pdf_bytes,
-                media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename={title}.pdf"},
-            )
+            return _stream_artifact(artifact, f"{title}.pdf")
         except Exception as e:
             logger.error("pdf_download_error", error=str(e), report_id=report_id)
             raise HTTPException(status_code=500, detail="Failed to generate PDF")
@@ -560,9 +603,11 @@ async def _generate_report(report_id: str, request: ReportRequest):
         from src.agents import AgentMessage
 
         message = AgentMessage(
-            agent_id=reporter.agent_id,
-            content={
-                "request": tiradentes_request,
+            sender="api",
+            recipient="tiradentes",
+            action="generate_report",
+            payload=tiradentes_request.model_dump(),
+            context={
                 "investigation_ids": request.investigation_ids,
                 "analysis_ids": request.analysis_ids,
                 "data_sources": request.data_sources,
@@ -572,7 +617,10 @@ async def _generate_report(report_id: str, request: ReportRequest):
         )
 
         result = await reporter.process(message, context)
-        content = result.data.get("report_content", "")
+        if result.status == AgentStatus.ERROR:
+            raise RuntimeError(result.error or "Report generation failed")
+        output = result.result or {}
+        content = output.get("content", "")
 
         report["current_phase"] = "formatting"
         report["progress"] = 0.7
@@ -600,6 +648,8 @@ async def _generate_report(report_id: str, request: ReportRequest):
         report["content"] = formatted_content
         report["word_count"] = word_count
         report["metadata"] = metadata
+        # PDFs come back by reference to the artifact store, not as content
+        report["artifact"] = output.get("artifact")
 
         # Mark as completed
         report["status"] = "completed"
@@ -23,6 +23,7 @@ from src.api.middleware.authentication import get_current_user
 from src.core import get_logger
 from src.db.session import get_session as get_db
 from src.services.agent_lazy_loader import AgentLazyLoader
+from src.services.aggregation_cube import DIMENSIONS, get_aggregation_cube
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/api/v1/visualization")
@@ -94,6 +95,19 @@ class TimeSeriesRequest(BaseModel):
     )
 
 
+class RollupRequest(BaseModel):
+    """Request model for aggregation cube group-bys."""
+
+    dimensions: list[str] = Field(
+        default_factory=list, description=f"Group-by dimensions: {DIMENSIONS}"
+    )
+    filters: dict[str, Any] = Field(
+        default_factory=dict, description="Dimension equality filters"
+    )
+    order_by: str | None = Field(default="sum", description="Measure to sort by")
+    limit: int | None = Field(default=100, le=1000)
+
+
 class VisualizationResponse(BaseModel):
     """Standard response for visualization data."""
 
@@ -638,3 +652,46 @@ async def get_supported_chart_types():
         "time_granularities": [g.value for g in TimeGranularity],
         "region_types": [r.value for r in RegionType],
     }
+
+
+@router.post("/rollup")
+async def get_rollup(
+    request: RollupRequest,
+    current_user: dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Group-by over collected contracts read from the aggregation cube.
+
+    Dimension sets covered by a materialized rollup are answered without
+    scanning raw rows.
+    """
+    cube = get_aggregation_cube()
+    try:
+        rows = cube.query(
+            request.dimensions,
+            filters=request.filters,
+            order_by=request.order_by,
+            limit=request.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "dimensions": request.dimensions,
+        "rows": rows,
+        "row_count": len(rows),
+        "source_rows": cube.row_count,
+        "cube_version": cube.version,
+    }
+
+
+@router.get("/cube")
+async def get_cube_status(current_user: dict[str, Any] = Depends(get_current_user)):
+    """Get aggregation cube size and materialized rollups."""
+    cube = get_aggregation_cube()
+    return {
+        "rows": cube.row_count,
+        "version": cube.version,
+        "dimensions": list(DIMENSIONS),
+        "rollups": [list(dims) for dims in cube.rollup_dimensions],
+    }
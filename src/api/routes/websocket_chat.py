@@ -18,6 +18,7 @@ from fastapi.security import HTTPBearer
 from pydantic import BaseModel, Field
 
 from src.core import get_logger
+from src.infrastructure.events.progress_bus import ANOMALY, get_progress_bus
 from src.services.chat_service import ChatService
 
 logger = get_logger(__name__)
@@ -286,7 +287,10 @@ async def websocket_chat_endpoint(
 
 @router.websocket("/ws/investigations/{investigation_id}")
 async def websocket_investigation_endpoint(
-    websocket: WebSocket, investigation_id: str, token: str | None = Query(None)
+    websocket: WebSocket,
+    investigation_id: str,
+    token: str | None = Query(None),
+    last_event_id: str | None = Query(None),
 ):
     """
     WebSocket endpoint for investigation-specific updates.
@@ -296,6 +300,9 @@ async def websocket_investigation_endpoint(
     - Anomaly detections
     - Agent findings
     - Report generation status
+
+    Progress bus events are forwarded as they are published; each carries an
+    ``offset`` that can be passed back as ``last_event_id`` to resume.
     """
     session_id = f"investigation-{investigation_id}-{uuid4()}"
 
@@ -303,6 +310,38 @@ async def websocket_investigation_endpoint(
     manager.subscribe_to_investigation(session_id, investigation_id)
 
     try:
+        bus = await get_progress_bus()
+        async for event in bus.subscribe(
+            investigation_id, last_event_id=last_event_id, idle_timeout=30.0
+        ):
+            if event is None:
+                message = WebSocketMessage(
+                    type="heartbeat", data={"investigation_id": investigation_id}
+                )
+            elif event.type == ANOMALY:
+                anomaly = event.data.get("result", {})
+                message = WebSocketMessage(
+                    type="anomaly_detected",
+                    data={
+                        "investigation_id": investigation_id,
+                        "severity": anomaly.get("severity", "medium"),
+                        "description": anomaly.get("description"),
+                        "details": anomaly,
+                        "offset": event.offset,
+                    },
+                )
+            else:
+                message = WebSocketMessage(
+                    type=f"investigation_{event.type}",
+                    data={
+                        **event.to_dict(),
+                        "update_type": event.type,
+                        "offset": event.offset,
+                    },
+                )
+            await websocket.send_json(message.model_dump(mode="json"))
+
+        # Finished: keep the connection alive until the client leaves
         while True:
             # Keep connection alive
             await asyncio.sleep(30)
@@ -0,0 +1,114 @@
+"""
+Module: api.sse
+Description: Server-Sent Events framing, heartbeats and backpressure-aware flushing
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Event producers (LLM token streams, agent results) run in one pump task that
+feeds a bounded queue; the response generator drains it. Frames are sent as
+soon as they are produced, and whatever queued up while the client was slow
+to read goes out in a single write. A full queue suspends the producer, so a
+slow client also stops reading from the LLM provider instead of buffering
+the whole answer. When nothing arrives for ``heartbeat_interval`` seconds a
+comment frame keeps proxies from closing the idle connection. The pump task
+is cancelled as soon as the client disconnects.
+"""
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import suppress
+from typing import Any
+
+from starlette.responses import StreamingResponse
+
+from src.core import get_logger, json_utils
+
+logger = get_logger(__name__)
+
+HEARTBEAT_INTERVAL_SECONDS = 15.0
+HEARTBEAT_FRAME = ": ping\n\n"
+MAX_PENDING_FRAMES = 64
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+_END = object()
+
+
+def sse_event(payload: dict[str, Any]) -> str:
+    """Format one ``data:`` frame."""
+    return f"data: {json_utils.dumps(payload)}\n\n"
+
+
+async def stream_frames(
+    frames: AsyncIterable[str],
+    heartbeat_interval: float = HEARTBEAT_INTERVAL_SECONDS,
+    max_pending: int = MAX_PENDING_FRAMES,
+) -> AsyncIterator[str]:
+    """
+    Relay ``frames`` with heartbeats, coalescing frames queued behind a slow client.
+
+    Args:
+        frames: SSE frames (already formatted)
+        heartbeat_interval: Idle seconds before a heartbeat comment is sent
+        max_pending: Frames the producer may run ahead of the client
+
+    Yields:
+        Frames or runs of frames joined into one chunk
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+    failure: BaseException | None = None
+
+    async def pump() -> None:
+        nonlocal failure
+        try:
+            async for frame in frames:
+                await queue.put(frame)
+        except Exception as e:
+            failure = e
+        await queue.put(_END)
+
+    producer = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), heartbeat_interval)
+            except TimeoutError:
+                yield HEARTBEAT_FRAME
+                continue
+
+            batch = []
+            while item is not _END:
+                batch.append(item)
+                if queue.empty():
+                    break
+                item = queue.get_nowait()
+            if batch:
+                yield "".join(batch)
+
+            if item is _END:
+                if failure is not None:
+                    raise failure
+                return
+    finally:
+        if not producer.done():
+            producer.cancel()
+            logger.debug("sse_producer_cancelled")
+        with suppress(asyncio.CancelledError):
+            await producer
+
+
+def sse_response(
+    frames: AsyncIterable[str],
+    heartbeat_interval: float = HEARTBEAT_INTERVAL_SECONDS,
+) -> StreamingResponse:
+    """``text/event-stream`` response relaying ``frames`` with heartbeats."""
+    return StreamingResponse(
+        stream_frames(frames, heartbeat_interval),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
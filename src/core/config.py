@@ -94,6 +94,22 @@ class Settings(BaseSettings):
         description="Portal da Transparência API header key name",
     )
 
+    # IBGE local indicator store (bulk-synced SIDRA tables)
+    ibge_store_path: Path = Field(
+        default=Path("./data/ibge_store"),
+        description="Local columnar store for bulk-synced IBGE indicators",
+    )
+
+    # Rendered report artifacts (PDFs served by reference)
+    report_artifact_path: Path = Field(
+        default=Path("./data/report_artifacts"),
+        description="Content-addressed store for rendered report files",
+    )
+    report_artifact_max_bytes: int = Field(
+        default=512 * 1024 * 1024,
+        description="Disk budget of the report artifact store",
+    )
+
     # Dados.gov.br API Configuration
     dados_gov_api_key: SecretStr | None = Field(
         default=None, description="Dados.gov.br API key (if required)"
@@ -301,6 +317,20 @@ class Settings(BaseSettings):
     rate_limit_per_minute: int = Field(default=60, description="Rate limit per minute")
     rate_limit_per_hour: int = Field(default=1000, description="Rate limit per hour")
     rate_limit_per_day: int = Field(default=10000, description="Rate limit per day")
+    trusted_proxies: list[str] = Field(
+        default=[],
+        description=(
+            "Proxy IPs/CIDRs whose X-Forwarded-For is trusted (comma-separated in env)"
+        ),
+    )
+
+    @field_validator("trusted_proxies", mode="before")
+    @classmethod
+    def parse_trusted_proxies(cls, v):
+        """Parse trusted proxies from a comma-separated env var."""
+        if isinstance(v, str):
+            return [proxy.strip() for proxy in v.split(",") if proxy.strip()]
+        return v
 
     # Email/SMTP Configuration
     smtp_host: str = Field(
@@ -424,6 +454,17 @@ class Settings(BaseSettings):
     # Cache
     cache_ttl_seconds: int = Field(default=3600, description="Cache TTL")
     cache_max_size: int = Field(default=1000, description="Max cache size")
+    cache_warming_concurrency: int = Field(
+        default=4, description="Refresh-ahead recomputations in flight at once"
+    )
+    cache_warming_upstream_rate: float = Field(
+        default=2.0,
+        description="Upstream requests per second refresh-ahead may spend",
+    )
+    cache_warming_refresh_ahead: float = Field(
+        default=0.2,
+        description="Fraction of a TTL before expiry at which entries are refreshed",
+    )
 
     # Compression
     compression_enabled: bool = Field(
@@ -442,6 +483,25 @@ class Settings(BaseSettings):
         default=["gzip", "br", "deflate"], description="Enabled compression algorithms"
     )
 
+    # Webhooks
+    webhook_outbox_path: Path = Field(
+        default=Path("./data/webhook_outbox.db"),
+        description="SQLite outbox of queued webhook deliveries",
+    )
+    webhook_endpoint_concurrency: int = Field(
+        default=4, description="Webhook deliveries in flight per endpoint"
+    )
+
+    # GraphQL
+    graphql_persisted_queries_only: bool = Field(
+        default=False,
+        description="Reject GraphQL documents that are not registered by hash",
+    )
+    graphql_persisted_query_manifest: Path | None = Field(
+        default=None,
+        description="JSON file mapping sha256 hashes to allowed GraphQL documents",
+    )
+
     # Feature Flags
     enable_fine_tuning: bool = Field(default=False, description="Enable fine-tuning")
     enable_autonomous_crawling: bool = Field(
@@ -9,6 +9,12 @@ from .event_bus import (
     LoggingEventHandler,
     get_event_bus,
 )
+from .progress_bus import (
+    InvestigationProgressBus,
+    ProgressEvent,
+    create_worker_progress_bus,
+    get_progress_bus,
+)
 
 __all__ = [
     "EventType",
@@ -18,4 +24,8 @@ __all__ = [
     "LoggingEventHandler",
     "InvestigationEventHandler",
     "get_event_bus",
+    "InvestigationProgressBus",
+    "ProgressEvent",
+    "get_progress_bus",
+    "create_worker_progress_bus",
 ]
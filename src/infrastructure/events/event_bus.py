@@ -3,9 +3,17 @@ Event bus implementation using Redis Streams.
 
 This module provides a distributed event bus for decoupling
 components and enabling async processing.
+
+Consumers read in batches whose size adapts to the backlog, run the
+handlers of a batch concurrently (bounded per stream) while keeping
+events of the same partition key - by default the investigation - in
+stream order, and acknowledge the whole batch with one pipelined round
+trip. Entries left pending by crashed consumers are reclaimed with
+``XAUTOCLAIM`` and streams are trimmed with ``MAXLEN ~``.
 """
 
 import asyncio
+import time
 import uuid
 from dataclasses import dataclass
 from datetime import UTC, datetime
@@ -134,6 +142,12 @@ class EventBus:
         stream_prefix: str = "events",
         consumer_group: str = "cidadao-ai",
         max_retries: int = 3,
+        max_stream_length: int = 10000,
+        min_batch_size: int = 10,
+        max_batch_size: int = 500,
+        handler_concurrency: int = 32,
+        claim_idle_ms: int = 60000,
+        claim_interval: float = 30.0,
     ):
         """
         Initialize event bus.
@@ -143,11 +157,23 @@ class EventBus:
             stream_prefix: Prefix for stream names
             consumer_group: Consumer group name
             max_retries: Maximum retries for failed events
+            max_stream_length: Approximate cap on entries kept per stream
+            min_batch_size: Smallest XREADGROUP batch
+            max_batch_size: Largest XREADGROUP batch
+            handler_concurrency: Partitions handled concurrently per stream
+            claim_idle_ms: Idle time after which pending entries are reclaimed
+            claim_interval: Seconds between reclaim passes
         """
         self.redis = redis_client
         self.stream_prefix = stream_prefix
         self.consumer_group = consumer_group
         self.max_retries = max_retries
+        self.max_stream_length = max_stream_length
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max(max_batch_size, min_batch_size)
+        self.handler_concurrency = handler_concurrency
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval = claim_interval
 
         # Handlers registry
         self._handlers: dict[EventType, list[EventHandler]] = {}
@@ -162,6 +188,8 @@ class EventBus:
             "events_processed": 0,
             "events_failed": 0,
             "events_retried": 0,
+            "events_claimed": 0,
+            "batches_processed": 0,
         }
 
     def _get_stream_name(self, event_type: EventType) -> str:
@@ -191,14 +219,11 @@ class EventBus:
         stream_name = self._get_stream_name(event_type)
 
         # Add to Redis stream
-        event_id = await self.redis.xadd(
+        await self.redis.xadd(
             stream_name,
-            {
-                "event": dumps(event.to_dict()),
-                "type": event_type.value,
-                "timestamp": event.timestamp.isoformat(),
-            },
-            maxlen=10000,  # Keep last 10k events per stream
+            self._event_fields(event),
+            maxlen=self.max_stream_length,
+            approximate=True,
         )
 
         self._stats["events_published"] += 1
@@ -209,6 +234,51 @@ class EventBus:
 
         return event.id
 
+    async def publish_many(
+        self,
+        events: list[tuple[EventType, dict[str, Any], dict[str, Any] | None]],
+    ) -> list[str]:
+        """
+        Publish several events in one pipelined round trip.
+
+        Args:
+            events: (event_type, data, metadata) tuples
+
+        Returns:
+            Event IDs, in order
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        created = [Event.create(*spec) for spec in events]
+        for event in created:
+            pipe.xadd(
+                self._get_stream_name(event.type),
+                self._event_fields(event),
+                maxlen=self.max_stream_length,
+                approximate=True,
+            )
+        await pipe.execute()
+
+        self._stats["events_published"] += len(created)
+        return [event.id for event in created]
+
+    @staticmethod
+    def _event_fields(event: Event) -> dict[str, str]:
+        """Stream entry fields of an event."""
+        return {
+            "event": dumps(event.to_dict()),
+            "type": event.type.value,
+            "timestamp": event.timestamp.isoformat(),
+        }
+
+    @staticmethod
+    def _partition_key(event: Event) -> str:
+        """Events sharing this key are handled in stream order."""
+        return str(
+            event.metadata.get("partition_key")
+            or event.data.get("investigation_id")
+            or event.id
+        )
+
     def register_handler(
         self, handler: EventHandler, event_types: list[EventType] | None = None
     ):
@@ -253,7 +323,9 @@ class EventBus:
             stream_name = f"{self.stream_prefix}:{category}"
 
             try:
-                await self.redis.xgroup_create(stream_name, self.consumer_group, id="0")
+                await self.redis.xgroup_create(
+                    stream_name, self.consumer_group, id="0", mkstream=True
+                )
                 logger.info(
                     f"Created consumer group {self.consumer_group} for {stream_name}"
                 )
@@ -287,26 +359,34 @@ class EventBus:
         """Consume events from a Redis stream."""
         logger.info(f"Starting consumer for {stream_name}")
 
+        slots = asyncio.Semaphore(self.handler_concurrency)
+        batch_size = self.min_batch_size
+        next_claim = 0.0  # Recover entries of crashed consumers on start
+
         while self._running:
             try:
+                if time.monotonic() >= next_claim:
+                    # Scheduled first so a failing XAUTOCLAIM cannot stall reads
+                    next_claim = time.monotonic() + self.claim_interval
+                    await self._claim_stale(stream_name, consumer_name, slots)
+
                 # Read messages from stream
                 messages = await self.redis.xreadgroup(
                     self.consumer_group,
                     consumer_name,
                     {stream_name: ">"},
-                    count=10,
+                    count=batch_size,
                     block=1000,  # Block for 1 second
                 )
 
-                if not messages:
-                    continue
-
-                # Process messages
-                for stream, stream_messages in messages:
-                    for msg_id, data in stream_messages:
-                        await self._process_message(
-                            stream_name, msg_id, data, consumer_name
-                        )
+                entries = [
+                    entry
+                    for _, stream_messages in messages or []
+                    for entry in stream_messages
+                ]
+                if entries:
+                    await self._process_batch(stream_name, entries, slots)
+                batch_size = self._next_batch_size(batch_size, len(entries))
 
             except asyncio.CancelledError:
                 break
@@ -314,83 +394,154 @@ class EventBus:
                 logger.error(f"Error consuming from {stream_name}: {e}")
                 await asyncio.sleep(1)
 
-    async def _process_message(
-        self, stream_name: str, msg_id: str, data: dict[str, Any], consumer_name: str
-    ):
-        """Process a single message from the stream."""
-        try:
-            # Parse event
-            event_data = loads(data[b"event"])
-            event_type = EventType(event_data["type"])
+    def _next_batch_size(self, batch_size: int, received: int) -> int:
+        """Grow the batch while reads come back full, shrink it when they don't."""
+        if received >= batch_size:
+            return min(batch_size * 2, self.max_batch_size)
+        if received < batch_size // 2:
+            return max(batch_size // 2, self.min_batch_size)
+        return batch_size
 
-            event = Event(
-                id=event_data["id"],
-                type=event_type,
-                timestamp=datetime.fromisoformat(event_data["timestamp"]),
-                data=event_data["data"],
-                metadata=event_data["metadata"],
+    async def _claim_stale(
+        self, stream_name: str, consumer_name: str, slots: asyncio.Semaphore
+    ):
+        """Take over and process entries other consumers left pending."""
+        start_id = "0-0"
+        while True:
+            result = await self.redis.xautoclaim(
+                stream_name,
+                self.consumer_group,
+                consumer_name,
+                min_idle_time=self.claim_idle_ms,
+                start_id=start_id,
+                count=self.max_batch_size,
             )
-
-            # Get handlers for this event type
-            handlers = self._handlers.get(event_type, [])
-
-            if not handlers:
-                logger.warning(f"No handlers for event type {event_type}")
-                await self.redis.xack(stream_name, self.consumer_group, msg_id)
+            start_id, entries = result[0], result[1]
+            if entries:
+                self._stats["events_claimed"] += len(entries)
+                logger.info(f"Claimed {len(entries)} stale entries from {stream_name}")
+                await self._process_batch(stream_name, entries, slots)
+            if start_id in (b"0-0", "0-0"):
                 return
 
-            # Process with all handlers
-            errors = []
-            for handler in handlers:
-                try:
-                    await handler.handle(event)
-                except Exception as e:
-                    logger.error(f"Handler {handler.__class__.__name__} failed: {e}")
-                    errors.append((handler, e))
-                    await handler.on_error(event, e)
+    async def _process_batch(
+        self,
+        stream_name: str,
+        entries: list[tuple[Any, dict[Any, Any] | None]],
+        slots: asyncio.Semaphore,
+    ):
+        """Handle a batch of stream entries and acknowledge it at once."""
+        partitions: dict[str, list[Event]] = {}
+        for msg_id, data in entries:
+            event = self._parse_event(msg_id, data)
+            if event is not None:
+                partitions.setdefault(self._partition_key(event), []).append(event)
+
+        async def run_partition(events: list[Event]) -> list[tuple[Event, list]]:
+            async with slots:
+                return [(event, await self._dispatch(event)) for event in events]
+
+        outcomes = await asyncio.gather(
+            *(run_partition(events) for events in partitions.values())
+        )
 
-            if errors:
-                # Check retry count
-                retry_count = event.metadata.get("retry_count", 0)
-
-                if retry_count < self.max_retries:
-                    # Retry the event
-                    event.metadata["retry_count"] = retry_count + 1
-                    await self.publish(event.type, event.data, event.metadata)
-                    self._stats["events_retried"] += 1
-                else:
-                    # Move to dead letter queue
-                    await self._move_to_dlq(event, errors)
-                    self._stats["events_failed"] += 1
-            else:
+        # Retries, dead letters and the acknowledgement share one round trip
+        pipe = self.redis.pipeline(transaction=False)
+        for event, errors in (outcome for batch in outcomes for outcome in batch):
+            if not errors:
                 self._stats["events_processed"] += 1
+                continue
+
+            # Check retry count
+            retry_count = event.metadata.get("retry_count", 0)
+            if retry_count < self.max_retries:
+                retry = Event.create(
+                    event.type,
+                    event.data,
+                    {**event.metadata, "retry_count": retry_count + 1},
+                )
+                pipe.xadd(
+                    self._get_stream_name(event.type),
+                    self._event_fields(retry),
+                    maxlen=self.max_stream_length,
+                    approximate=True,
+                )
+                self._stats["events_published"] += 1
+                self._stats["events_retried"] += 1
+            else:
+                pipe.xadd(
+                    f"{self.stream_prefix}:dlq",
+                    self._dlq_fields(event, errors),
+                    maxlen=1000,  # Keep last 1k failed events
+                    approximate=True,
+                )
+                self._stats["events_failed"] += 1
+                logger.error(
+                    f"Event {event.id} moved to DLQ after {self.max_retries} retries"
+                )
 
-            # Acknowledge message
-            await self.redis.xack(stream_name, self.consumer_group, msg_id)
+        pipe.xack(stream_name, self.consumer_group, *(msg_id for msg_id, _ in entries))
+        await pipe.execute()
+        self._stats["batches_processed"] += 1
 
+    def _parse_event(self, msg_id: Any, data: dict[Any, Any] | None) -> Event | None:
+        """Decode a stream entry; None for trimmed or malformed entries."""
+        if not data:
+            return None  # Trimmed away while pending
+        try:
+            event_data = loads(data[b"event"])
+            return Event(
+                id=event_data["id"],
+                type=EventType(event_data["type"]),
+                timestamp=datetime.fromisoformat(event_data["timestamp"]),
+                data=event_data["data"],
+                metadata=event_data["metadata"],
+            )
         except Exception as e:
+            # Redelivery cannot fix a malformed entry, so it is acknowledged
             logger.error(f"Failed to process message {msg_id}: {e}")
+            return None
 
-    async def _move_to_dlq(self, event: Event, errors: list[tuple]):
-        """Move failed event to dead letter queue."""
-        dlq_stream = f"{self.stream_prefix}:dlq"
+    async def _dispatch(self, event: Event) -> list[tuple[EventHandler, Exception]]:
+        """Run the event's handlers in order and collect their errors."""
+        # Get handlers for this event type
+        handlers = self._handlers.get(event.type, [])
 
-        await self.redis.xadd(
-            dlq_stream,
-            {
-                "event": dumps(event.to_dict()),
-                "errors": dumps(
-                    [
-                        {"handler": handler.__class__.__name__, "error": str(error)}
-                        for handler, error in errors
-                    ]
-                ),
-                "failed_at": datetime.now(UTC).isoformat(),
-            },
-            maxlen=1000,  # Keep last 1k failed events
-        )
+        if not handlers:
+            logger.warning(f"No handlers for event type {event.type}")
+            return []
 
-        logger.error(f"Event {event.id} moved to DLQ after {self.max_retries} retries")
+        # Process with all handlers
+        errors = []
+        for handler in handlers:
+            try:
+                await handler.handle(event)
+            except Exception as e:
+                logger.error(f"Handler {handler.__class__.__name__} failed: {e}")
+                errors.append((handler, e))
+                try:
+                    await handler.on_error(event, e)
+                except Exception as hook_error:
+                    # The event is still retried; the rest of the batch is acked
+                    logger.error(
+                        f"Handler {handler.__class__.__name__} on_error failed: "
+                        f"{hook_error}"
+                    )
+        return errors
+
+    @staticmethod
+    def _dlq_fields(event: Event, errors: list[tuple]) -> dict[str, str]:
+        """Dead letter entry fields of a failed event."""
+        return {
+            "event": dumps(event.to_dict()),
+            "errors": dumps(
+                [
+                    {"handler": handler.__class__.__name__, "error": str(error)}
+                    for handler, error in errors
+                ]
+            ),
+            "failed_at": datetime.now(UTC).isoformat(),
+        }
 
     def get_stats(self) -> dict[str, Any]:
         """Get event bus statistics."""
@@ -0,0 +1,512 @@
+"""
+Investigation progress bus.
+
+Progress, anomaly and completion events of each investigation are appended
+to a per-investigation Redis stream (``{prefix}:investigation:{id}``) next to
+a compact JSON snapshot of its current state. Producers - the API background
+runner and the Celery investigation tasks - publish through the bus;
+consumers (SSE, WebSocket, GraphQL subscriptions) block on the stream and
+get pushed updates, resuming after the last stream offset they saw. Because
+everything lives in Redis, any API worker can serve any investigation.
+
+Lifecycle transitions are also published to the shared :class:`EventBus`.
+Without Redis the bus keeps streams and snapshots in process memory, which
+preserves single-worker behaviour, and retries the connection periodically;
+once Redis answers the buffered streams are moved there.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+import redis.asyncio as redis
+
+from src.core import get_logger, settings
+from src.core.json_utils import dumps, loads
+
+from .event_bus import EventBus, EventType, get_event_bus
+
+logger = get_logger(__name__)
+
+PROGRESS = "progress"
+ANOMALY = "anomaly"
+COMPLETION = "completion"
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+_LIFECYCLE_EVENTS = {
+    "running": EventType.INVESTIGATION_STARTED,
+    "completed": EventType.INVESTIGATION_COMPLETED,
+    "failed": EventType.INVESTIGATION_FAILED,
+}
+
+# Seconds between Redis connection attempts of a local-only bus
+REDIS_RETRY_SECONDS = 30.0
+
+# Snapshot fields repeated in every progress event
+_PROGRESS_FIELDS = (
+    "status",
+    "progress",
+    "current_phase",
+    "records_processed",
+    "anomalies_detected",
+)
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """One entry of an investigation stream."""
+
+    offset: str  # stream id; pass back as ``last_event_id`` to resume
+    type: str
+    investigation_id: str
+    data: dict[str, Any]
+    timestamp: str
+
+    def to_dict(self) -> dict[str, Any]:
+        """Flat payload as sent to SSE and WebSocket clients."""
+        return {
+            "type": self.type,
+            "investigation_id": self.investigation_id,
+            **self.data,
+            "timestamp": self.timestamp,
+        }
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.type == COMPLETION
+
+
+def _jsonable(fields: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in fields.items()
+    }
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class InvestigationProgressBus:
+    """
+    Per-investigation event streams with snapshots and resumable consumers.
+
+    Pass ``redis_client=None`` for the in-process fallback.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis | None = None,
+        *,
+        stream_prefix: str = "events",
+        event_bus: EventBus | None = None,
+        max_events: int = 1000,
+        ttl_seconds: int = 86400,
+        max_local_investigations: int = 1000,
+    ):
+        self.redis = redis_client
+        self.stream_prefix = stream_prefix
+        self.event_bus = event_bus
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.max_local_investigations = max_local_investigations
+
+        # Producer-side snapshot cache (and the store itself without Redis)
+        self._snapshots: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # In-process streams: events plus a wake-up signal per investigation
+        self._streams: dict[str, deque[ProgressEvent]] = {}
+        self._signals: dict[str, asyncio.Event] = {}
+        self._sequence = 0
+        self._last_ms = 0
+
+        self._stats = {"events_published": 0, "subscribers_active": 0}
+
+    @property
+    def distributed(self) -> bool:
+        """Whether state is shared through Redis across workers."""
+        return self.redis is not None
+
+    async def attach_redis(
+        self,
+        redis_client: redis.Redis,
+        *,
+        stream_prefix: str | None = None,
+        event_bus: EventBus | None = None,
+    ) -> None:
+        """
+        Move a local-only bus onto Redis once it is reachable.
+
+        Buffered events are copied with their offsets, so subscribers resume
+        on the Redis stream where they left off, and snapshots are copied
+        too. Events published while copying are picked up by the next round;
+        the switch itself happens without yielding to the loop.
+        """
+        if self.redis is not None:
+            return
+        if stream_prefix is not None:
+            self.stream_prefix = stream_prefix
+        copied: dict[str, tuple[int, int]] = {}
+        first_round = True
+        try:
+            while True:
+                pending = {
+                    investigation_id: [
+                        event
+                        for event in stream
+                        if _offset_key(event.offset)
+                        > copied.get(investigation_id, (0, 0))
+                    ]
+                    for investigation_id, stream in self._streams.items()
+                }
+                pending = {k: events for k, events in pending.items() if events}
+                if not pending and not first_round:
+                    break
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for investigation_id, events in pending.items():
+                        stream_key = self._stream_key(investigation_id)
+                        for event in events:
+                            pipe.xadd(
+                                stream_key,
+                                {
+                                    "type": event.type,
+                                    "data": dumps(event.data),
+                                    "ts": event.timestamp,
+                                },
+                                id=event.offset,
+                                maxlen=self.max_events,
+                                approximate=True,
+                            )
+                        pipe.expire(stream_key, self.ttl_seconds)
+                        copied[investigation_id] = _offset_key(events[-1].offset)
+                    for investigation_id in (
+                        list(self._snapshots) if first_round else pending
+                    ):
+                        snapshot = self._snapshots.get(investigation_id)
+                        if snapshot is not None:
+                            pipe.set(
+                                self._snapshot_key(investigation_id),
+                                dumps(snapshot),
+                                ex=self.ttl_seconds,
+                            )
+                    await pipe.execute(raise_on_error=False)
+                first_round = False
+        except Exception as e:
+            logger.warning("investigation_progress_bus_migration_failed", error=str(e))
+
+        self.redis = redis_client
+        self.event_bus = event_bus or self.event_bus
+        self._streams.clear()
+        # Local subscribers wake up and continue on the Redis stream
+        for signal in self._signals.values():
+            signal.set()
+        self._signals.clear()
+        logger.info(
+            "investigation_progress_bus_distributed",
+            investigations=len(self._snapshots),
+        )
+
+    def _stream_key(self, investigation_id: str) -> str:
+        return f"{self.stream_prefix}:investigation:{investigation_id}"
+
+    def _snapshot_key(self, investigation_id: str) -> str:
+        return f"{self.stream_prefix}:investigation:{investigation_id}:snapshot"
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    async def update(self, investigation_id: str, **fields: Any) -> str:
+        """Merge ``fields`` into the snapshot and publish a progress event."""
+        snapshot = await self._merge(investigation_id, fields)
+        data = {key: snapshot.get(key) for key in _PROGRESS_FIELDS}
+        offsets = await self._append(investigation_id, [(PROGRESS, data)], snapshot)
+        await self._announce(investigation_id, fields.get("status"), snapshot)
+        return offsets[0]
+
+    async def publish_results(
+        self, investigation_id: str, results: list[dict[str, Any]]
+    ) -> list[str]:
+        """Publish one anomaly event per result in a single round trip."""
+        if not results:
+            return []
+        return await self._append(
+            investigation_id, [(ANOMALY, {"result": r}) for r in results]
+        )
+
+    async def finish(self, investigation_id: str, status: str, **fields: Any) -> str:
+        """Record a terminal status and publish the completion event."""
+        fields.setdefault("completed_at", datetime.now(UTC))
+        snapshot = await self._merge(investigation_id, {"status": status, **fields})
+        data = {
+            "status": status,
+            "total_anomalies": snapshot.get("anomalies_detected", 0),
+        }
+        if snapshot.get("error"):
+            data["error"] = snapshot["error"]
+        offsets = await self._append(investigation_id, [(COMPLETION, data)], snapshot)
+        await self._announce(investigation_id, status, snapshot)
+        return offsets[0]
+
+    async def _merge(
+        self, investigation_id: str, fields: dict[str, Any]
+    ) -> dict[str, Any]:
+        snapshot = self._snapshots.get(investigation_id)
+        if snapshot is None:
+            snapshot = await self.snapshot(investigation_id) or {"id": investigation_id}
+        snapshot = {
+            **snapshot,
+            **_jsonable(fields),
+            "updated_at": datetime.now(UTC).isoformat(),
+        }
+        self._snapshots[investigation_id] = snapshot
+        self._snapshots.move_to_end(investigation_id)
+        while len(self._snapshots) > self.max_local_investigations:
+            evicted, _ = self._snapshots.popitem(last=False)
+            self._streams.pop(evicted, None)
+            self._signals.pop(evicted, None)
+        return snapshot
+
+    async def _append(
+        self,
+        investigation_id: str,
+        events: list[tuple[str, dict[str, Any]]],
+        snapshot: dict[str, Any] | None = None,
+    ) -> list[str]:
+        """Append events (and store the snapshot) atomically."""
+        timestamp = datetime.now(UTC).isoformat()
+        self._stats["events_published"] += len(events)
+
+        if self.redis is None:
+            stream = self._streams.setdefault(
+                investigation_id, deque(maxlen=self.max_events)
+            )
+            offsets = []
+            for event_type, data in events:
+                # Redis-style ids that never go backwards with the clock
+                self._sequence += 1
+                self._last_ms = max(self._last_ms, int(time.time() * 1000))
+                offset = f"{self._last_ms}-{self._sequence}"
+                stream.append(
+                    ProgressEvent(offset, event_type, investigation_id, data, timestamp)
+                )
+                offsets.append(offset)
+            # Wake every waiting subscriber, then arm a fresh signal
+            signal = self._signals.pop(investigation_id, None)
+            if signal is not None:
+                signal.set()
+            return offsets
+
+        stream_key = self._stream_key(investigation_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for event_type, data in events:
+                pipe.xadd(
+                    stream_key,
+                    {"type": event_type, "data": dumps(data), "ts": timestamp},
+                    maxlen=self.max_events,
+                    approximate=True,
+                )
+            pipe.expire(stream_key, self.ttl_seconds)
+            if snapshot is not None:
+                pipe.set(
+                    self._snapshot_key(investigation_id),
+                    dumps(snapshot),
+                    ex=self.ttl_seconds,
+                )
+            results = await pipe.execute()
+        return [_text(offset) for offset in results[: len(events)]]
+
+    async def _announce(
+        self, investigation_id: str, status: str | None, snapshot: dict[str, Any]
+    ) -> None:
+        """Forward lifecycle transitions to the shared event bus."""
+        event_type = _LIFECYCLE_EVENTS.get(status or "")
+        if self.event_bus is None or event_type is None:
+            return
+        try:
+            await self.event_bus.publish(
+                event_type,
+                {
+                    "investigation_id": investigation_id,
+                    "query": snapshot.get("query"),
+                    "error": snapshot.get("error"),
+                },
+            )
+        except Exception as e:
+            logger.warning(
+                "investigation_lifecycle_publish_failed",
+                investigation_id=investigation_id,
+                error=str(e),
+            )
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    async def snapshot(self, investigation_id: str) -> dict[str, Any] | None:
+        """Current state of an investigation, or ``None`` if unknown."""
+        if self.redis is None:
+            snapshot = self._snapshots.get(investigation_id)
+            return dict(snapshot) if snapshot else None
+        raw = await self.redis.get(self._snapshot_key(investigation_id))
+        return loads(raw) if raw else None
+
+    async def subscribe(
+        self,
+        investigation_id: str,
+        last_event_id: str | None = None,
+        idle_timeout: float | None = None,
+    ) -> AsyncIterator[ProgressEvent | None]:
+        """
+        Events after ``last_event_id`` (from the start when omitted).
+
+        Ends after the completion event. With ``idle_timeout`` a ``None`` is
+        yielded whenever no event arrived for that long, so callers can send
+        heartbeats.
+        """
+        offset = last_event_id or "0"
+        self._stats["subscribers_active"] += 1
+        try:
+            while True:
+                events = await self._read(investigation_id, offset, idle_timeout)
+                if not events:
+                    snapshot = await self.snapshot(investigation_id)
+                    if snapshot and snapshot.get("status") in TERMINAL_STATUSES:
+                        # Completion event already trimmed or consumed
+                        return
+                    if idle_timeout is not None:
+                        yield None
+                    continue
+                for event in events:
+                    offset = event.offset
+                    yield event
+                    if event.is_terminal:
+                        return
+        finally:
+            self._stats["subscribers_active"] -= 1
+
+    async def _read(
+        self, investigation_id: str, offset: str, idle_timeout: float | None
+    ) -> list[ProgressEvent]:
+        block = idle_timeout if idle_timeout is not None else 30.0
+
+        if self.redis is None:
+            events = self._local_after(investigation_id, offset)
+            if events:
+                return events
+            signal = self._signals.setdefault(investigation_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(signal.wait(), block)
+            except TimeoutError:
+                return []
+            return self._local_after(investigation_id, offset)
+
+        response = await self.redis.xread(
+            {self._stream_key(investigation_id): offset},
+            count=100,
+            block=int(block * 1000),
+        )
+        events = []
+        for _stream, entries in response or []:
+            for entry_id, fields in entries:
+                fields = {_text(k): v for k, v in fields.items()}
+                events.append(
+                    ProgressEvent(
+                        offset=_text(entry_id),
+                        type=_text(fields["type"]),
+                        investigation_id=investigation_id,
+                        data=loads(fields["data"]),
+                        timestamp=_text(fields.get("ts", "")),
+                    )
+                )
+        return events
+
+    def _local_after(self, investigation_id: str, offset: str) -> list[ProgressEvent]:
+        after = _offset_key(offset)
+        return [
+            event
+            for event in self._streams.get(investigation_id, ())
+            if _offset_key(event.offset) > after
+        ]
+
+    async def close(self) -> None:
+        """Release the Redis connection (for short-lived worker buses)."""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Bus statistics."""
+        return {
+            **self._stats,
+            "distributed": self.distributed,
+            "investigations_tracked": len(self._snapshots),
+        }
+
+
+def _offset_key(offset: str) -> tuple[int, int]:
+    """Sortable form of a ``<ms>-<seq>`` stream id (invalid ids sort first)."""
+    try:
+        ms, _, seq = offset.partition("-")
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return (0, 0)
+
+
+_progress_bus: InvestigationProgressBus | None = None
+_redis_retry_at = 0.0
+
+
+async def get_progress_bus() -> InvestigationProgressBus:
+    """
+    Process-wide progress bus on the event bus's Redis.
+
+    Falls back to a local-only bus while Redis is unreachable and retries
+    the connection every ``REDIS_RETRY_SECONDS``.
+    """
+    global _progress_bus, _redis_retry_at
+
+    if _progress_bus is None:
+        _progress_bus = InvestigationProgressBus()
+    if not _progress_bus.distributed and time.monotonic() >= _redis_retry_at:
+        try:
+            event_bus = await get_event_bus()
+            await asyncio.wait_for(event_bus.redis.ping(), timeout=1.0)
+        except Exception as e:
+            _redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            logger.warning(
+                "investigation_progress_bus_local_only",
+                error=str(e),
+                retry_in_seconds=REDIS_RETRY_SECONDS,
+            )
+        else:
+            await _progress_bus.attach_redis(
+                event_bus.redis,
+                stream_prefix=event_bus.stream_prefix,
+                event_bus=event_bus,
+            )
+
+    return _progress_bus
+
+
+async def create_worker_progress_bus() -> InvestigationProgressBus:
+    """
+    Dedicated bus for Celery tasks.
+
+    Each task runs its own event loop, so it cannot share the API's Redis
+    connections; close the bus when the task ends.
+    """
+    client = redis.from_url(settings.redis_url, decode_responses=False)
+    try:
+        await asyncio.wait_for(client.ping(), timeout=1.0)
+    except Exception as e:
+        logger.warning("investigation_progress_bus_unavailable", error=str(e))
+        await client.aclose()
+        return InvestigationProgressBus()
+    event_bus = EventBus(client)
+    return InvestigationProgressBus(
+        client, stream_prefix=event_bus.stream_prefix, event_bus=event_bus
+    )
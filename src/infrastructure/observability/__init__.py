@@ -10,6 +10,7 @@ from .correlation import (
     request_tracker,
     with_correlation,
 )
+from .log_pipeline import LogPipeline, get_log_pipeline
 from .metrics import (
     BusinessMetrics,
     MetricConfig,
@@ -23,6 +24,7 @@ from .metrics import (
 from .structured_logging import (
     LogEventType,
     LogLevel,
+    LogSampler,
     StructuredLogger,
     StructuredLogRecord,
     TraceContextFormatter,
@@ -73,5 +75,8 @@ __all__ = [
     "TraceContextFormatter",
     "LogLevel",
     "LogEventType",
+    "LogSampler",
+    "LogPipeline",
+    "get_log_pipeline",
     "get_structured_logger",
 ]
@@ -0,0 +1,202 @@
+"""
+Queued log pipeline with a background writer thread.
+
+Callers append records to a bounded deque - ``append`` and ``popleft`` are
+atomic, so producers never take a lock - and return immediately. A daemon
+thread drains the queue, serializes each record to one JSON line and hands
+it to the stdlib handlers, so JSON encoding and stream I/O happen off the
+event loop. When the queue is full new records are dropped and counted
+instead of blocking the producer. Fields that never change for a logger
+are serialized once and spliced into every line.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Protocol
+
+from src.core import json_utils
+
+DEFAULT_CAPACITY = 10000
+# Writer wake-up interval when no producer signals it
+FLUSH_INTERVAL_SECONDS = 0.05
+
+
+class QueuedRecord(Protocol):
+    """What the pipeline needs from a record: its fields."""
+
+    def to_dict(self) -> dict[str, Any]: ...
+
+
+def static_context(**fields: Any) -> str:
+    """
+    Serialize fields shared by all records of a logger once.
+
+    Returns:
+        The JSON object's members without braces, ready to be spliced
+    """
+    fields = {key: value for key, value in fields.items() if value is not None}
+    return json_utils.dumps(fields)[1:-1] if fields else ""
+
+
+def render_line(fields: dict[str, Any], static: str) -> str:
+    """One JSON line: the record's own fields plus the static context."""
+    line = json_utils.dumps(fields)
+    if not static:
+        return line
+    return f"{line[:-1]},{static}}}" if len(line) > 2 else f"{{{static}}}"
+
+
+class LogPipeline:
+    """
+    Bounded, non-blocking queue of log records and the thread that writes them.
+
+    Counters are updated without locks and may be slightly off when several
+    threads log at once; they are meant for monitoring, not accounting.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ):
+        """
+        Initialize log pipeline.
+
+        Args:
+            capacity: Maximum queued records; newer records are dropped beyond it
+            flush_interval: Seconds the writer sleeps when not signalled
+        """
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._queue: deque[tuple[logging.Logger, int, QueuedRecord, str, tuple]] = (
+            deque()
+        )
+        self._wakeup = threading.Event()
+        self._busy = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "errors": 0}
+
+    def submit(
+        self,
+        logger: logging.Logger,
+        level: int,
+        record: QueuedRecord,
+        static: str = "",
+        omit: tuple[str, ...] = (),
+    ) -> bool:
+        """
+        Queue a record for writing.
+
+        Args:
+            logger: Stdlib logger whose handlers write the line
+            level: Stdlib log level
+            record: Record to serialize
+            static: Pre-serialized static context (see :func:`static_context`)
+            omit: Record fields already carried by the static context
+
+        Returns:
+            False if the record was dropped because the queue is full
+        """
+        if len(self._queue) >= self.capacity:
+            self.stats["dropped"] += 1
+            return False
+
+        self._queue.append((logger, level, record, static, omit))
+        self.stats["enqueued"] += 1
+
+        if self._thread is None:
+            self._start()
+        elif len(self._queue) == 1:
+            # The writer may be asleep on an empty queue
+            self._wakeup.set()
+        return True
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._closed = False
+            self._thread = threading.Thread(
+                target=self._run, name="log-pipeline-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+            if self._closed and not self._queue:
+                return
+
+    def _drain(self) -> None:
+        self._busy = True
+        try:
+            while self._queue:
+                logger, level, record, static, omit = self._queue.popleft()
+                try:
+                    fields = record.to_dict()
+                    for key in omit:
+                        fields.pop(key, None)
+                    logger.log(level, render_line(fields, static))
+                    self.stats["written"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+        finally:
+            self._busy = False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every queued record has been written.
+
+        Returns:
+            True if the queue drained within ``timeout``
+        """
+        if self._thread is None:
+            self._drain()
+            return True
+
+        deadline = time.monotonic() + timeout
+        self._wakeup.set()
+        while self._queue or self._busy:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._closed = True
+        self._wakeup.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _after_fork(self) -> None:
+        # The writer thread does not survive fork; the child starts its own
+        self._thread = None
+        self._busy = False
+        self._start_lock = threading.Lock()
+        self._queue.clear()
+
+
+_pipeline: LogPipeline | None = None
+
+
+def get_log_pipeline() -> LogPipeline:
+    """Process-wide log pipeline, flushed at interpreter exit."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline()
+        atexit.register(_pipeline.close)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_pipeline._after_fork)
+    return _pipeline
@@ -3,9 +3,16 @@ Structured logging implementation with trace context integration.
 
 This module provides enhanced logging capabilities with automatic
 trace context injection and structured log formatting.
+
+Records are built on the caller's thread, where the correlation context
+lives, and handed to the queued :mod:`log_pipeline`, whose writer thread
+serializes and writes them. High-volume event types (cache and database
+operations) are rate sampled; failures and slow operations are always kept.
 """
 
 import logging
+import os
+import random
 import sys
 import threading
 import traceback
@@ -18,6 +25,7 @@ from pythonjsonlogger import jsonlogger
 from src.core import get_logger, json_utils
 
 from .correlation import CorrelationContext
+from .log_pipeline import LogPipeline, get_log_pipeline, static_context
 
 
 class LogLevel(str, Enum):
@@ -49,6 +57,73 @@ class LogEventType(str, Enum):
     EXTERNAL_API = "external_api"
 
 
+# Share of routine records kept for high-volume event types
+DEFAULT_SAMPLE_RATES = {
+    LogEventType.CACHE: 0.01,
+    LogEventType.DATABASE: 0.1,
+}
+SLOW_OPERATION_MS = 1000.0
+
+_STDLIB_LEVELS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO: logging.INFO,
+    LogLevel.WARNING: logging.WARNING,
+    LogLevel.ERROR: logging.ERROR,
+    LogLevel.CRITICAL: logging.CRITICAL,
+}
+
+# Record fields carried by each logger's pre-serialized static context
+_STATIC_FIELDS = ("component", "process_id")
+
+
+class LogSampler:
+    """
+    Rate sampling with tail-based exceptions.
+
+    The decision is taken once the operation's outcome is known: warnings,
+    errors and operations slower than ``slow_ms`` are always kept, routine
+    records of a sampled event type are kept with its rate.
+    """
+
+    def __init__(
+        self,
+        rates: dict[LogEventType, float] | None = None,
+        slow_ms: float = SLOW_OPERATION_MS,
+    ):
+        """
+        Initialize log sampler.
+
+        Args:
+            rates: Share of records kept per event type (1.0 when absent)
+            slow_ms: Duration from which a record is always kept
+        """
+        self.rates = dict(DEFAULT_SAMPLE_RATES if rates is None else rates)
+        self.slow_ms = slow_ms
+        self.sampled_out = 0
+
+    def sample_rate(
+        self, level: LogLevel, event_type: LogEventType, duration_ms: float | None
+    ) -> float | None:
+        """
+        Rate a record is kept at.
+
+        Returns:
+            1.0 for unsampled records, the sampling rate for sampled records
+            that were kept, None for records to drop
+        """
+        rate = self.rates.get(event_type, 1.0)
+        if (
+            rate >= 1.0
+            or level not in (LogLevel.DEBUG, LogLevel.INFO)
+            or (duration_ms is not None and duration_ms >= self.slow_ms)
+        ):
+            return 1.0
+        if random.random() < rate:
+            return rate
+        self.sampled_out += 1
+        return None
+
+
 class StructuredLogRecord:
     """
     Structured log record with standardized fields.
@@ -158,7 +233,7 @@ class StructuredLogRecord:
 
     def to_json(self) -> str:
         """Convert to JSON string."""
-        return json_utils.dumps(self.to_dict(), ensure_ascii=False)
+        return json_utils.dumps(self.to_dict())
 
 
 class TraceContextFormatter(jsonlogger.JsonFormatter):
@@ -268,6 +343,8 @@ class StructuredLogger:
         name: str,
         level: LogLevel = LogLevel.INFO,
         component: str | None = None,
+        pipeline: LogPipeline | None = None,
+        sampler: LogSampler | None = None,
     ):
         """
         Initialize structured logger.
@@ -276,14 +353,21 @@ class StructuredLogger:
             name: Logger name
             level: Default log level
             component: Component name for all logs
+            pipeline: Queue records are written through (process-wide default)
+            sampler: Sampling policy (default rates when not provided)
         """
         self.name = name
         self.component = component
         self.logger = get_logger(name)
         self.level = level
+        self.pipeline = pipeline or get_log_pipeline()
+        self.sampler = sampler or LogSampler()
 
-        # Note: structlog loggers don't have setLevel method
-        # Level filtering is handled by structlog configuration
+        # Level filtering follows the stdlib configuration, like structlog's
+        self._stdlib_logger = logging.getLogger(name)
+        self._static_context = static_context(
+            logger=name, component=component, process_id=os.getpid()
+        )
 
     def _configure_json_logging(self):
         """Configure JSON logging for the logger."""
@@ -293,36 +377,65 @@ class StructuredLogger:
         pass
 
     def _log_structured(self, record: StructuredLogRecord):
-        """Log a structured record."""
-        # Convert to standard logging extra
-        extra = record.to_dict()
-        message = extra.pop("message")
-        level_name = extra.pop("level")
-
-        # Log with appropriate level
-        log_method = getattr(self.logger, level_name.lower())
-        log_method(message, extra=extra)
+        """Queue a structured record for the writer thread."""
+        self.pipeline.submit(
+            self._stdlib_logger,
+            _STDLIB_LEVELS[record.level],
+            record,
+            self._static_context,
+            _STATIC_FIELDS,
+        )
 
-    def debug(
+    def _emit(
         self,
+        level: LogLevel,
         message: str,
-        event_type: LogEventType = LogEventType.SYSTEM,
-        operation: str | None = None,
-        duration_ms: float | None = None,
-        **kwargs,
+        event_type: LogEventType,
+        operation: str | None,
+        duration_ms: float | None,
+        data: dict[str, Any],
+        error: Exception | None = None,
     ):
-        """Log debug message."""
+        """Build and queue a record unless it is filtered or sampled out."""
+        if not self._stdlib_logger.isEnabledFor(_STDLIB_LEVELS[level]):
+            return
+        rate = self.sampler.sample_rate(level, event_type, duration_ms)
+        if rate is None:
+            return
+        if rate < 1.0:
+            data["sample_rate"] = rate
+
+        error_type = None
+        error_stack = None
+
+        if error:
+            error_type = type(error).__name__
+            error_stack = traceback.format_exc()
+
         record = StructuredLogRecord(
             message=message,
-            level=LogLevel.DEBUG,
+            level=level,
             event_type=event_type,
             component=self.component,
             operation=operation,
             duration_ms=duration_ms,
-            additional_data=kwargs,
+            error_type=error_type,
+            error_stack=error_stack,
+            additional_data=data,
         )
         self._log_structured(record)
 
+    def debug(
+        self,
+        message: str,
+        event_type: LogEventType = LogEventType.SYSTEM,
+        operation: str | None = None,
+        duration_ms: float | None = None,
+        **kwargs,
+    ):
+        """Log debug message."""
+        self._emit(LogLevel.DEBUG, message, event_type, operation, duration_ms, kwargs)
+
     def info(
         self,
         message: str,
@@ -332,16 +445,7 @@ class StructuredLogger:
         **kwargs,
     ):
         """Log info message."""
-        record = StructuredLogRecord(
-            message=message,
-            level=LogLevel.INFO,
-            event_type=event_type,
-            component=self.component,
-            operation=operation,
-            duration_ms=duration_ms,
-            additional_data=kwargs,
-        )
-        self._log_structured(record)
+        self._emit(LogLevel.INFO, message, event_type, operation, duration_ms, kwargs)
 
     def warning(
         self,
@@ -352,16 +456,9 @@ class StructuredLogger:
         **kwargs,
     ):
         """Log warning message."""
-        record = StructuredLogRecord(
-            message=message,
-            level=LogLevel.WARNING,
-            event_type=event_type,
-            component=self.component,
-            operation=operation,
-            duration_ms=duration_ms,
-            additional_data=kwargs,
+        self._emit(
+            LogLevel.WARNING, message, event_type, operation, duration_ms, kwargs
         )
-        self._log_structured(record)
 
     def error(
         self,
@@ -373,25 +470,9 @@ class StructuredLogger:
         **kwargs,
     ):
         """Log error message."""
-        error_type = None
-        error_stack = None
-
-        if error:
-            error_type = type(error).__name__
-            error_stack = traceback.format_exc()
-
-        record = StructuredLogRecord(
-            message=message,
-            level=LogLevel.ERROR,
-            event_type=event_type,
-            component=self.component,
-            operation=operation,
-            duration_ms=duration_ms,
-            error_type=error_type,
-            error_stack=error_stack,
-            additional_data=kwargs,
+        self._emit(
+            LogLevel.ERROR, message, event_type, operation, duration_ms, kwargs, error
         )
-        self._log_structured(record)
 
     def critical(
         self,
@@ -403,25 +484,15 @@ class StructuredLogger:
         **kwargs,
     ):
         """Log critical message."""
-        error_type = None
-        error_stack = None
-
-        if error:
-            error_type = type(error).__name__
-            error_stack = traceback.format_exc()
-
-        record = StructuredLogRecord(
-            message=message,
-            level=LogLevel.CRITICAL,
-            event_type=event_type,
-            component=self.component,
-            operation=operation,
-            duration_ms=duration_ms,
-            error_type=error_type,
-            error_stack=error_stack,
-            additional_data=kwargs,
+        self._emit(
+            LogLevel.CRITICAL,
+            message,
+            event_type,
+            operation,
+            duration_ms,
+            kwargs,
+            error,
         )
-        self._log_structured(record)
 
     # Business-specific logging methods
     def log_request(
@@ -658,6 +729,3 @@ def get_structured_logger(name: str, component: str | None = None) -> Structured
         StructuredLogger instance
     """
     return StructuredLogger(name, component=component)
-
-
-import os  # Add missing import
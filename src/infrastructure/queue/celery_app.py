@@ -34,6 +34,7 @@ celery_app = Celery(
         "src.infrastructure.queue.tasks.network_tasks",  # Network graph analysis
         "src.infrastructure.queue.tasks.memory_tasks",  # Nanã memory management
         "src.infrastructure.queue.tasks.coverage_tasks",  # Transparency coverage map
+        "src.infrastructure.queue.tasks.ibge_tasks",  # IBGE local indicator store
         # Temporarily disabled - missing service dependencies
         # "src.infrastructure.queue.tasks.report_tasks",
         # "src.infrastructure.queue.tasks.export_tasks",
@@ -344,6 +345,12 @@ celery_app.conf.beat_schedule = {
         "schedule": timedelta(hours=6),  # Every 6 hours
         "options": {"queue": "normal"},
     },
+    # IBGE Indicator Store (downloads only tables whose version changed)
+    "sync-ibge-indicators-daily": {
+        "task": "tasks.sync_ibge_indicators",
+        "schedule": timedelta(hours=24),  # Daily version check
+        "options": {"queue": "background"},
+    },
 }
 
 
@@ -0,0 +1,67 @@
+"""
+Module: infrastructure.queue.tasks.ibge_tasks
+Description: Celery tasks for the bulk IBGE indicator sync
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any
+
+from celery.utils.log import get_task_logger
+
+from src.infrastructure.queue.celery_app import celery_app
+from src.services.transparency_apis.federal_apis.ibge_client import IBGEClient
+from src.services.transparency_apis.federal_apis.ibge_store import (
+    IBGEBulkSync,
+    get_ibge_store,
+)
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task(name="tasks.sync_ibge_indicators", queue="background")
+def sync_ibge_indicators(force: bool = False) -> dict[str, Any]:
+    """
+    Mirror the IBGE SIDRA tables for all municipalities into the local store.
+
+    Only tables whose upstream version changed are downloaded, so the task is
+    cheap to run daily.
+
+    Args:
+        force: Re-download every table regardless of version
+
+    Returns:
+        Sync results per table
+    """
+    logger.info("ibge_sync_task_started")
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        result = loop.run_until_complete(_sync_ibge_indicators_async(force))
+        logger.info(f"ibge_sync_task_completed: {result['summary']}")
+        return result
+
+    except Exception as e:
+        logger.error(f"ibge_sync_task_failed: {e}", exc_info=True)
+        raise
+
+    finally:
+        loop.close()
+
+
+async def _sync_ibge_indicators_async(force: bool) -> dict[str, Any]:
+    """Async implementation of the IBGE bulk sync."""
+    async with IBGEClient(timeout=120) as client:
+        sync = IBGEBulkSync(client, get_ibge_store())
+        result = await sync.sync_all(force=force)
+
+    return {
+        "task": "ibge_sync",
+        "timestamp": datetime.now().isoformat(),
+        **result,
+    }
@@ -15,6 +15,7 @@ from celery.utils.log import get_task_logger
 
 from src.agents import get_agent_pool
 from src.db.simple_session import get_db_session
+from src.infrastructure.events.progress_bus import create_worker_progress_bus
 from src.infrastructure.queue.celery_app import TaskPriority, celery_app, priority_task
 from src.services.data_service import DataService
 from src.services.investigation_service_selector import (
@@ -50,7 +51,12 @@ def run_investigation(
 
         try:
             result = loop.run_until_complete(
-                _run_investigation_async(investigation_id, query, config)
+                _run_investigation_async(
+                    investigation_id,
+                    query,
+                    config,
+                    final_attempt=self.request.retries >= 3,
+                )
             )
 
             logger.info(
@@ -73,24 +79,59 @@ def run_investigation(
 
 
 async def _run_investigation_async(
-    investigation_id: str, query: str, config: dict[str, Any] | None = None
+    investigation_id: str,
+    query: str,
+    config: dict[str, Any] | None = None,
+    final_attempt: bool = True,
 ) -> dict[str, Any]:
-    """Async implementation of investigation."""
-    async with get_db_session() as db:
-        investigation_service = InvestigationService(db)
-        agent_pool = get_agent_pool()
-
-        # Create investigation
-        investigation = await investigation_service.create(
-            query=query, context=config or {}, initiated_by="celery_task"
+    """Async implementation of investigation, reporting to the progress bus."""
+    progress_bus = await create_worker_progress_bus()
+    try:
+        await progress_bus.update(
+            investigation_id,
+            query=query,
+            status="running",
+            progress=0.0,
+            current_phase="agent_execution",
+            started_at=datetime.now(),
         )
+        try:
+            async with get_db_session() as db:
+                investigation_service = InvestigationService(db)
+                agent_pool = get_agent_pool()
 
-        # Run investigation with agents
-        result = await investigation_service.run_investigation(
-            investigation_id=investigation.id, agent_pool=agent_pool
-        )
+                # Create investigation
+                investigation = await investigation_service.create(
+                    query=query, context=config or {}, initiated_by="celery_task"
+                )
 
-        return result.dict()
+                # Run investigation with agents
+                result = await investigation_service.run_investigation(
+                    investigation_id=investigation.id, agent_pool=agent_pool
+                )
+                result = result.dict()
+        except Exception as e:
+            if final_attempt:
+                await progress_bus.finish(investigation_id, "failed", error=str(e))
+            else:
+                await progress_bus.update(
+                    investigation_id, status="retrying", error=str(e)
+                )
+            raise
+
+        findings = result.get("findings", [])
+        await progress_bus.publish_results(investigation_id, findings)
+        await progress_bus.finish(
+            investigation_id,
+            "completed",
+            progress=1.0,
+            current_phase="completed",
+            anomalies_detected=len(findings),
+            confidence_score=result.get("confidence_score"),
+        )
+        return result
+    finally:
+        await progress_bus.close()
 
 
 @celery_app.task(name="tasks.analyze_contracts_batch", queue="normal")
@@ -6,17 +6,172 @@ Date: 2025-01-25
 License: Proprietary - All rights reserved
 """
 
+import hashlib
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any
 
+from redis.exceptions import NoScriptError
+
 from src.core import get_logger
-from src.core.cache import get_redis_client
+from src.core.cache import FallbackRedisClient, get_redis_client
 
 logger = get_logger(__name__)
 
+# Seconds between reconnection attempts once Redis was found unavailable
+REDIS_RETRY_SECONDS = 30.0
+# Subjects tracked by the in-process fallback counters (least recently used
+# subjects are dropped first)
+LOCAL_MAX_KEYS = 50_000
+# Near-cache: after a Redis check leaves at least NEAR_CACHE_MIN_HEADROOM of
+# every window free, up to NEAR_CACHE_FRACTION of the remaining requests are
+# admitted locally for NEAR_CACHE_TTL_SECONDS and charged on the next check
+NEAR_CACHE_MIN_HEADROOM = 0.5
+NEAR_CACHE_FRACTION = 0.1
+NEAR_CACHE_TTL_SECONDS = 1.0
+NEAR_CACHE_MAX_KEYS = 10_000
+
+# Approximate sliding window: per window, the current and previous fixed
+# bucket counts; the previous one is weighted by how much of it still
+# overlaps the window. All windows are checked and charged atomically, and
+# a request denied by any window is not counted in any of them.
+#   KEYS[1]   hash with <duration>:id, <duration>:cur, <duration>:prev fields
+#   ARGV[1]   current time in seconds
+#   ARGV[2]   requests already admitted by a near-cache, charged regardless
+#   ARGV[3..] (duration, limit) pairs
+# Returns {allowed, index of the first denying window or 0, remaining...}
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local debt = tonumber(ARGV[2])
+local count = (#ARGV - 2) / 2
+local windows = {}
+local denied = 0
+local ttl = 1
+
+for i = 1, count do
+    local duration = tonumber(ARGV[1 + 2 * i])
+    local limit = tonumber(ARGV[2 + 2 * i])
+    local bucket = math.floor(now / duration)
+    local stored = redis.call(
+        'HMGET', KEYS[1], duration .. ':id', duration .. ':cur', duration .. ':prev'
+    )
+    local id = tonumber(stored[1])
+    local cur = tonumber(stored[2]) or 0
+    local prev = tonumber(stored[3]) or 0
+    if id == bucket - 1 then
+        prev = cur
+        cur = 0
+    elseif id ~= bucket then
+        prev = 0
+        cur = 0
+    end
+    local weight = 1 - (now - bucket * duration) / duration
+    local used = prev * weight + cur + debt
+    if denied == 0 and used + 1 > limit then
+        denied = i
+    end
+    windows[i] = {duration, limit, bucket, cur, prev, used}
+    if duration > ttl then
+        ttl = duration
+    end
+end
+
+local charge = 0
+if denied == 0 then
+    charge = 1
+end
+local fields = {}
+local reply = {charge, denied}
+for i = 1, count do
+    local w = windows[i]
+    local prefix = w[1] .. ':'
+    table.insert(fields, prefix .. 'id')
+    table.insert(fields, w[3])
+    table.insert(fields, prefix .. 'cur')
+    table.insert(fields, w[4] + debt + charge)
+    table.insert(fields, prefix .. 'prev')
+    table.insert(fields, w[5])
+    table.insert(reply, math.max(0, math.floor(w[2] - w[6] - charge)))
+end
+if count > 0 then
+    redis.call('HSET', KEYS[1], unpack(fields))
+    redis.call('EXPIRE', KEYS[1], ttl * 2)
+end
+return reply
+"""
+
+# Atomic token bucket (one hash per key)
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HGETALL', key)
+local tokens = capacity
+local last_refill = now
+
+if #bucket > 0 then
+    for i = 1, #bucket, 2 do
+        if bucket[i] == 'tokens' then
+            tokens = tonumber(bucket[i + 1])
+        elseif bucket[i] == 'last_refill' then
+            last_refill = tonumber(bucket[i + 1])
+        end
+    end
+end
+
+-- Refill tokens
+local elapsed = now - last_refill
+local new_tokens = math.min(capacity, tokens + (elapsed * refill_rate))
+
+-- Try to consume a token
+if new_tokens >= 1 then
+    new_tokens = new_tokens - 1
+    redis.call('HSET', key, 'tokens', new_tokens, 'last_refill', now)
+    redis.call('EXPIRE', key, 3600)
+    return {1, math.floor(new_tokens)}
+else
+    redis.call('HSET', key, 'tokens', new_tokens, 'last_refill', now)
+    redis.call('EXPIRE', key, 3600)
+    return {0, 0}
+end
+"""
+
+
+class LuaScript:
+    """Lua script registered once per server and invoked with EVALSHA."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode(), usedforsecurity=False).hexdigest()
+
+    async def load(self, redis: Any) -> None:
+        """Register the script (SCRIPT LOAD) so EVALSHA finds it."""
+        self.sha = await redis.script_load(self.source)
+
+    async def __call__(self, redis: Any, keys: list[str], args: list[Any]) -> Any:
+        """Run by SHA, loading the script again if the server lost it."""
+        try:
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            await self.load(redis)
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+
+
+@dataclass
+class _NearCacheEntry:
+    """Local admission budget for one subject, refreshed by Redis checks."""
+
+    windows: tuple[tuple[str, int], ...]
+    remaining: list[int]
+    budget: int
+    expires_at: float
+    debt: int = 0
+
 
 class RateLimitStrategy(str, Enum):
     """Rate limiting strategies."""
@@ -138,6 +293,15 @@ class RateLimiter:
         self._local_storage = defaultdict(dict)
         self._config = RateLimitConfig()
 
+        self._redis: Any = None
+        self._redis_retry_at = 0.0
+        self._sliding_script = LuaScript(SLIDING_WINDOW_SCRIPT)
+        self._token_script = LuaScript(TOKEN_BUCKET_SCRIPT)
+        # subject -> {duration: [bucket, current count, previous count]}
+        self._local_counters: OrderedDict[str, dict[int, list[float]]] = OrderedDict()
+        self._near_cache: OrderedDict[str, _NearCacheEntry] = OrderedDict()
+        self.near_cache_hits = 0
+
     async def check_rate_limit(
         self,
         key: str,
@@ -160,6 +324,26 @@ class RateLimiter:
         # Get applicable limits
         limits = self._get_limits(endpoint, tier, custom_limits)
 
+        if self.strategy == RateLimitStrategy.SLIDING_WINDOW:
+            windows = tuple(
+                (window, limit)
+                for window, limit in limits.items()
+                if window not in ("burst", "cost")
+            )
+            allowed, results = await self._check_sliding_windows(
+                f"{key}:{endpoint}", windows
+            )
+            if not allowed:
+                window = next(w for w, data in results.items() if not data["allowed"])
+                logger.warning(
+                    "rate_limit_exceeded",
+                    key=key,
+                    endpoint=endpoint,
+                    window=window,
+                    limit=results[window]["limit"],
+                )
+            return allowed, results
+
         # Check each time window
         results = {}
         for window, limit in limits.items():
@@ -246,106 +430,195 @@ class RateLimiter:
     async def _check_sliding_window(
         self, key: str, window: str, limit: int
     ) -> tuple[bool, int]:
-        """Sliding window rate limiting using sorted sets."""
-        if self.use_redis:
-            redis = await get_redis_client()
-
-            now = time.time()
-            duration = self._get_window_duration(window)
-            window_start = now - duration
-
-            # Use sorted set with timestamp as score
-            pipe = redis.pipeline()
-
-            # Remove old entries
-            pipe.zremrangebyscore(key, 0, window_start)
+        """Sliding window rate limiting for a single window."""
+        allowed, results = await self._check_sliding_windows(key, ((window, limit),))
+        return allowed, results[window]["remaining"]
 
-            # Add current request
-            pipe.zadd(key, {str(now): now})
-
-            # Count requests in window
-            pipe.zcard(key)
-
-            # Set expiry
-            pipe.expire(key, duration)
-
-            results = await pipe.execute()
-            count = results[2]  # zcard result
-
-            remaining = max(0, limit - count)
-            return count <= limit, remaining
-        # Local sliding window
-        now = time.time()
-        duration = self._get_window_duration(window)
-        window_start = now - duration
-
-        # Initialize if needed
-        if key not in self._local_storage:
-            self._local_storage[key] = []
+    async def _check_sliding_windows(
+        self, subject: str, windows: tuple[tuple[str, int], ...]
+    ) -> tuple[bool, dict[str, Any]]:
+        """
+        Check and charge every window of a subject in one step.
 
-        # Remove old entries
-        self._local_storage[key] = [
-            ts for ts in self._local_storage[key] if ts > window_start
-        ]
+        Uses approximate sliding-window counters (two fixed buckets per
+        window), so memory per subject is constant. With Redis this is one
+        EVALSHA round trip, skipped altogether while the subject's
+        near-cache budget lasts.
+        """
+        if not windows:
+            return True, {}
+
+        entry = self._near_cache.get(subject)
+        if entry is not None:
+            if (
+                entry.budget > 0
+                and entry.windows == windows
+                and entry.expires_at > time.monotonic()
+            ):
+                entry.budget -= 1
+                entry.debt += 1
+                self.near_cache_hits += 1
+                remaining = [max(0, r - entry.debt) for r in entry.remaining]
+                return True, self._window_results(windows, remaining, 0)
+            del self._near_cache[subject]
+
+        debt = entry.debt if entry is not None else 0
+        redis = await self._get_redis() if self.use_redis else None
+        if redis is not None:
+            try:
+                reply = await self._sliding_script(
+                    redis,
+                    [f"rate_limit:{{{subject}}}"],
+                    [time.time(), debt, *self._script_windows(windows)],
+                )
+            except Exception as e:
+                logger.warning("rate_limit_redis_failed", error=str(e))
+                self._redis = None
+                self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            else:
+                allowed, denied = bool(int(reply[0])), int(reply[1])
+                remaining = [int(r) for r in reply[2:]]
+                if allowed:
+                    self._refill_near_cache(subject, windows, remaining)
+                return allowed, self._window_results(windows, remaining, denied)
+
+        allowed, denied, remaining = self._local_sliding_windows(
+            subject, windows, time.time(), debt
+        )
+        return allowed, self._window_results(windows, remaining, denied)
+
+    def _script_windows(self, windows: tuple[tuple[str, int], ...]) -> list[int]:
+        """Flatten windows into (duration, limit) script arguments."""
+        args: list[int] = []
+        for window, limit in windows:
+            args.extend((self._get_window_duration(window), limit))
+        return args
+
+    def _local_sliding_windows(
+        self,
+        subject: str,
+        windows: tuple[tuple[str, int], ...],
+        now: float,
+        debt: int = 0,
+    ) -> tuple[bool, int, list[int]]:
+        """In-process twin of SLIDING_WINDOW_SCRIPT (same reply layout)."""
+        counters = self._local_counters.get(subject)
+        if counters is None:
+            counters = self._local_counters[subject] = {}
+            if len(self._local_counters) > LOCAL_MAX_KEYS:
+                self._local_counters.popitem(last=False)
+        else:
+            self._local_counters.move_to_end(subject)
+
+        states = []
+        denied = 0
+        for i, (window, limit) in enumerate(windows, start=1):
+            duration = self._get_window_duration(window)
+            bucket = now // duration
+            stored_bucket, current, previous = counters.get(duration, (None, 0, 0))
+            if stored_bucket == bucket - 1:
+                current, previous = 0, current
+            elif stored_bucket != bucket:
+                current, previous = 0, 0
+            weight = 1 - (now - bucket * duration) / duration
+            used = previous * weight + current + debt
+            if not denied and used + 1 > limit:
+                denied = i
+            states.append((duration, limit, bucket, current, previous, used))
+
+        charge = 0 if denied else 1
+        remaining = []
+        for duration, limit, bucket, current, previous, used in states:
+            counters[duration] = [bucket, current + debt + charge, previous]
+            remaining.append(max(0, int(limit - used - charge)))
+        return not denied, denied, remaining
+
+    def _refill_near_cache(
+        self,
+        subject: str,
+        windows: tuple[tuple[str, int], ...],
+        remaining: list[int],
+    ) -> None:
+        """Grant a local budget when every window is clearly under its limit."""
+        headroom = min(
+            r / limit if limit > 0 else 0.0
+            for r, (_, limit) in zip(remaining, windows, strict=True)
+        )
+        budget = int(min(remaining) * NEAR_CACHE_FRACTION)
+        if headroom < NEAR_CACHE_MIN_HEADROOM or budget < 1:
+            return
+
+        # Never outlive the shortest window the budget was computed for
+        ttl = min(
+            NEAR_CACHE_TTL_SECONDS,
+            *(self._get_window_duration(window) for window, _ in windows),
+        )
+        self._near_cache[subject] = _NearCacheEntry(
+            windows=windows,
+            remaining=remaining,
+            budget=budget,
+            expires_at=time.monotonic() + ttl,
+        )
+        if len(self._near_cache) > NEAR_CACHE_MAX_KEYS:
+            self._near_cache.popitem(last=False)
+
+    def _window_results(
+        self,
+        windows: tuple[tuple[str, int], ...],
+        remaining: list[int],
+        denied: int,
+    ) -> dict[str, Any]:
+        """Per-window metadata; ``denied`` is the 1-based denying window."""
+        return {
+            window: {
+                "allowed": i != denied,
+                "limit": limit,
+                "remaining": left,
+                "reset": self._get_window_reset(window),
+            }
+            for i, ((window, limit), left) in enumerate(
+                zip(windows, remaining, strict=True), start=1
+            )
+        }
 
-        # Add current request
-        self._local_storage[key].append(now)
+    async def _get_redis(self) -> Any:
+        """
+        Redis client with the scripts preloaded, or None while unavailable.
 
-        count = len(self._local_storage[key])
-        remaining = max(0, limit - count)
-        return count <= limit, remaining
+        The client is kept between calls; after a failure Redis is retried
+        every REDIS_RETRY_SECONDS and the local counters are used meanwhile.
+        """
+        if self._redis is not None:
+            return self._redis
+        if time.monotonic() < self._redis_retry_at:
+            return None
+
+        client = await get_redis_client()
+        try:
+            if isinstance(client, FallbackRedisClient):
+                raise ConnectionError("Redis unavailable")
+            await self._sliding_script.load(client)
+            await self._token_script.load(client)
+        except Exception as e:
+            logger.warning("rate_limit_redis_unavailable", error=str(e))
+            self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            return None
+
+        self._redis = client
+        return client
 
     async def _check_token_bucket(
         self, key: str, window: str, limit: int
     ) -> tuple[bool, int]:
         """Token bucket rate limiting."""
-        if self.use_redis:
-            redis = await get_redis_client()
-
-            # Lua script for atomic token bucket
-            script = """
-                local key = KEYS[1]
-                local capacity = tonumber(ARGV[1])
-                local refill_rate = tonumber(ARGV[2])
-                local now = tonumber(ARGV[3])
-
-                local bucket = redis.call('HGETALL', key)
-                local tokens = capacity
-                local last_refill = now
-
-                if #bucket > 0 then
-                    for i = 1, #bucket, 2 do
-                        if bucket[i] == 'tokens' then
-                            tokens = tonumber(bucket[i + 1])
-                        elseif bucket[i] == 'last_refill' then
-                            last_refill = tonumber(bucket[i + 1])
-                        end
-                    end
-                end
-
-                -- Refill tokens
-                local elapsed = now - last_refill
-                local new_tokens = math.min(capacity, tokens + (elapsed * refill_rate))
-
-                -- Try to consume a token
-                if new_tokens >= 1 then
-                    new_tokens = new_tokens - 1
-                    redis.call('HSET', key, 'tokens', new_tokens, 'last_refill', now)
-                    redis.call('EXPIRE', key, 3600)
-                    return {1, math.floor(new_tokens)}
-                else
-                    redis.call('HSET', key, 'tokens', new_tokens, 'last_refill', now)
-                    redis.call('EXPIRE', key, 3600)
-                    return {0, 0}
-                end
-            """
-
+        redis = await self._get_redis() if self.use_redis else None
+        if redis is not None:
             # Calculate refill rate
             duration = self._get_window_duration(window)
             refill_rate = limit / duration
 
-            result = await redis.eval(
-                script, 1, key, limit, refill_rate, time.time()  # capacity
+            result = await self._token_script(
+                redis, [key], [limit, refill_rate, time.time()]  # capacity
             )
 
             return result[0] == 1, result[1]
@@ -720,10 +720,18 @@ class MaritacaProvider(BaseLLMProvider):
 
     async def stream_complete(self, request: LLMRequest) -> AsyncGenerator[str, None]:
         """Stream text generation using Maritaca AI."""
-        # Note: Maritaca client doesn't support streaming yet
-        # Fall back to regular completion and yield the result
-        response = await self.complete(request)
-        yield response.content
+        messages = self._prepare_messages(request)
+
+        chunks = await self.maritaca_client.chat_completion(
+            messages=messages,
+            model=request.model or self.default_model,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            top_p=request.top_p,
+            stream=True,
+        )
+        async for chunk in chunks:
+            yield chunk
 
     def _prepare_messages(self, request: LLMRequest) -> list[dict[str, str]]:
         """Prepare messages for Maritaca API."""
@@ -867,6 +875,8 @@ class LLMManager:
             providers_to_try.extend(self.fallback_providers)
 
         last_error = None
+        # Falling back after text was yielded would restart the answer
+        streamed = False
 
         for provider in providers_to_try:
             try:
@@ -878,6 +888,7 @@ class LLMManager:
 
                 async with self.providers[provider] as llm:
                     async for chunk in llm.stream_complete(request):
+                        streamed = True
                         yield chunk
                     return
 
@@ -888,9 +899,14 @@ class LLMManager:
                     provider=provider,
                     error=str(e),
                     fallback_available=len(providers_to_try) > 1,
+                    streamed=streamed,
                 )
 
-                if not self.enable_fallback or provider == providers_to_try[-1]:
+                if (
+                    streamed
+                    or not self.enable_fallback
+                    or provider == providers_to_try[-1]
+                ):
                     break
 
                 continue
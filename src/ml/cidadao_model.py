@@ -21,6 +21,21 @@ from src.core import json_utils
 
 logger = logging.getLogger(__name__)
 
+# Tarefas de análise e os nomes dos resultados em ``analyze_batch``
+ANALYSIS_TASKS = ("anomaly_detection", "financial_analysis", "legal_compliance")
+
+
+def masked_mean_pool(
+    hidden_states: torch.Tensor, attention_mask: torch.Tensor | None = None
+) -> torch.Tensor:
+    """Média sobre as posições da sequência, ignorando o padding"""
+
+    if attention_mask is None:
+        return hidden_states.mean(dim=1)
+
+    mask = attention_mask.unsqueeze(-1).to(hidden_states.dtype)
+    return (hidden_states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+
 
 @dataclass
 class CidadaoModelConfig:
@@ -156,9 +171,11 @@ class AnomalyDetectionHead(nn.Module):
             nn.Sigmoid(),
         )
 
-    def forward(self, hidden_states: torch.Tensor) -> dict[str, torch.Tensor]:
+    def forward(
+        self, hidden_states: torch.Tensor, attention_mask: torch.Tensor | None = None
+    ) -> dict[str, torch.Tensor]:
         # Usar pooling na sequência para classificação
-        pooled_output = hidden_states.mean(dim=1)
+        pooled_output = masked_mean_pool(hidden_states, attention_mask)
 
         anomaly_logits = self.anomaly_classifier(pooled_output)
         confidence_score = self.confidence_estimator(pooled_output)
@@ -189,8 +206,10 @@ class FinancialAnalysisHead(nn.Module):
             ),  # Muito Baixo, Baixo, Médio, Alto, Muito Alto
         )
 
-    def forward(self, hidden_states: torch.Tensor) -> dict[str, torch.Tensor]:
-        pooled_output = hidden_states.mean(dim=1)
+    def forward(
+        self, hidden_states: torch.Tensor, attention_mask: torch.Tensor | None = None
+    ) -> dict[str, torch.Tensor]:
+        pooled_output = masked_mean_pool(hidden_states, attention_mask)
 
         estimated_value = self.value_estimator(pooled_output)
         risk_logits = self.risk_classifier(pooled_output)
@@ -221,8 +240,10 @@ class LegalReasoningHead(nn.Module):
             nn.Linear(config.legal_understanding_dim, 2),  # Conforme, Não Conforme
         )
 
-    def forward(self, hidden_states: torch.Tensor) -> dict[str, torch.Tensor]:
-        pooled_output = hidden_states.mean(dim=1)
+    def forward(
+        self, hidden_states: torch.Tensor, attention_mask: torch.Tensor | None = None
+    ) -> dict[str, torch.Tensor]:
+        pooled_output = masked_mean_pool(hidden_states, attention_mask)
 
         legal_type_logits = self.legal_classifier(pooled_output)
         compliance_logits = self.compliance_checker(pooled_output)
@@ -313,9 +334,15 @@ class CidadaoAIModel(nn.Module):
             corruption_indicators=corruption_indicators,
         )
 
+        # Máscara [batch, seq] -> aditiva [batch, 1, 1, seq], como no GPT2Model
+        layer_mask = None
+        if attention_mask is not None:
+            layer_mask = attention_mask[:, None, None, :].to(hidden_states.dtype)
+            layer_mask = (1.0 - layer_mask) * torch.finfo(hidden_states.dtype).min
+
         # Transformer layers
         for layer in self.layers:
-            hidden_states = layer(hidden_states, attention_mask=attention_mask)[0]
+            hidden_states = layer(hidden_states, attention_mask=layer_mask)[0]
 
         hidden_states = self.ln_f(hidden_states)
 
@@ -323,15 +350,15 @@ class CidadaoAIModel(nn.Module):
 
         # Aplicar cabeças especializadas baseadas na tarefa
         if task == "anomaly_detection" and hasattr(self, "anomaly_head"):
-            anomaly_outputs = self.anomaly_head(hidden_states)
+            anomaly_outputs = self.anomaly_head(hidden_states, attention_mask)
             outputs.update(anomaly_outputs)
 
         elif task == "financial_analysis" and hasattr(self, "financial_head"):
-            financial_outputs = self.financial_head(hidden_states)
+            financial_outputs = self.financial_head(hidden_states, attention_mask)
             outputs.update(financial_outputs)
 
         elif task == "legal_reasoning" and hasattr(self, "legal_head"):
-            legal_outputs = self.legal_head(hidden_states)
+            legal_outputs = self.legal_head(hidden_states, attention_mask)
             outputs.update(legal_outputs)
 
         elif task == "generation":
@@ -370,6 +397,10 @@ class CidadaoAIForTransparency(nn.Module):
             task="anomaly_detection",
             **kwargs,
         )
+        return self._anomaly_results(outputs)
+
+    def _anomaly_results(self, outputs: dict[str, torch.Tensor]) -> dict[str, Any]:
+        """Interpretar saídas da cabeça de anomalias"""
 
         anomaly_probs = torch.softmax(outputs["anomaly_logits"], dim=-1)
         confidence = outputs["confidence_score"]
@@ -425,6 +456,10 @@ class CidadaoAIForTransparency(nn.Module):
             task="financial_analysis",
             **kwargs,
         )
+        return self._financial_results(outputs)
+
+    def _financial_results(self, outputs: dict[str, torch.Tensor]) -> dict[str, Any]:
+        """Interpretar saídas da cabeça financeira"""
 
         risk_probs = torch.softmax(outputs["risk_logits"], dim=-1)
         estimated_values = outputs["estimated_value"]
@@ -473,6 +508,10 @@ class CidadaoAIForTransparency(nn.Module):
             task="legal_reasoning",
             **kwargs,
         )
+        return self._legal_results(outputs)
+
+    def _legal_results(self, outputs: dict[str, torch.Tensor]) -> dict[str, Any]:
+        """Interpretar saídas da cabeça jurídica"""
 
         compliance_probs = torch.softmax(outputs["compliance_logits"], dim=-1)
         legal_type_probs = torch.softmax(outputs["legal_type_logits"], dim=-1)
@@ -508,6 +547,48 @@ class CidadaoAIForTransparency(nn.Module):
             },
         }
 
+    def analyze_batch(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor | None = None,
+        tasks: tuple[str, ...] = ANALYSIS_TASKS,
+    ) -> list[dict[str, dict[str, Any]]]:
+        """
+        Analisar um lote de textos com uma única passagem pelo transformer.
+
+        As camadas compartilhadas rodam uma vez para todas as amostras e
+        tarefas; só as cabeças pedidas em ``tasks`` são aplicadas. Cada
+        amostra recebe o mesmo resultado que teria em uma chamada isolada de
+        ``detect_anomalies``/``analyze_financial_risk``/``check_legal_compliance``;
+        o padding (à direita) é ignorado via ``attention_mask``.
+
+        Returns:
+            Por amostra, ``{"anomaly_detection": ..., "financial_analysis":
+            ..., "legal_compliance": ...}`` com as tarefas pedidas
+        """
+        hidden_states = self.model(
+            input_ids=input_ids, attention_mask=attention_mask, task="encoder"
+        )["last_hidden_state"]
+
+        heads = {
+            "anomaly_detection": (self.model.anomaly_head, self._anomaly_results),
+            "financial_analysis": (self.model.financial_head, self._financial_results),
+            "legal_compliance": (self.model.legal_head, self._legal_results),
+        }
+        outputs = {
+            task: heads[task][0](hidden_states, attention_mask) for task in tasks
+        }
+
+        return [
+            {
+                task: heads[task][1](
+                    {key: value[i : i + 1] for key, value in outputs[task].items()}
+                )
+                for task in tasks
+            }
+            for i in range(input_ids.shape[0])
+        ]
+
     def generate_transparency_report(
         self,
         input_ids: torch.Tensor,
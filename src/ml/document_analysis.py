@@ -0,0 +1,294 @@
+"""
+Module: ml.document_analysis
+Description: Single-pass compiled extraction of entities, triggers and readability stats
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+A document is lower-cased once and scanned once by a combined compiled
+pattern whose named alternatives produce typed spans: organizations,
+money, dates, locations, legal references and keywords. The keyword
+vocabulary covers document-type, transparency, compliance and ambiguity
+terms and the heads of the suspicious-clause patterns. Organization and
+location patterns end in a greedy ``[\\w\\s]+`` tail, so the scan only
+consumes their head word and extends the tail with an anchored match.
+Other entities inside the tail are still found, as they were with one
+``findall`` per pattern. Suspicious-clause patterns are likewise matched
+only at their trigger words. Keywords inside consumed spans (``8.666`` in
+``Lei nº 8.666/93``) are found with a keyword-only scan of the span.
+Sentence, word and syllable counts come from three C-level passes over
+the text instead of per-character Python loops.
+
+``analyze_documents`` fans large batches out to a process pool.
+"""
+
+import os
+import re
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+# Suspicious clauses: trigger words and the rest of each pattern
+SUSPICIOUS_PATTERNS = {
+    "urgency_abuse": r"(urgente|emergencial|inadiável)(?!.*justificativa)",
+    "vague_specifications": r"(conforme|adequado|satisfatório|apropriado)\s+(?!critério|norma)",
+    "exclusive_criteria": r"(exclusivamente|unicamente|somente)(?=.*fornecedor|empresa)",
+    "price_manipulation": r"(valor\s+aproximado|preço\s+estimado)(?=.*sigiloso|confidencial)",
+    "favoritism_indicators": r"(experiência\s+mínima\s+\d+\s+anos?)(?=.*específic)",
+}
+_TRIGGERS = {
+    "urgente": "urgency_abuse",
+    "emergencial": "urgency_abuse",
+    "inadiável": "urgency_abuse",
+    "conforme": "vague_specifications",
+    "adequado": "vague_specifications",
+    "satisfatório": "vague_specifications",
+    "apropriado": "vague_specifications",
+    "exclusivamente": "exclusive_criteria",
+    "unicamente": "exclusive_criteria",
+    "somente": "exclusive_criteria",
+    "valor aproximado": "price_manipulation",
+    "preço estimado": "price_manipulation",
+    "experiência": "favoritism_indicators",
+}
+
+CONTRACT_TERMS = ("contrato", "contratação", "contratado")
+TENDER_TERMS = ("edital", "licitação", "pregão")
+LAW_TERMS = ("lei nº", "lei n°", "projeto de lei")
+DECREE_TERMS = ("decreto",)
+AMBIGUOUS_TERMS = ("conforme", "adequado", "satisfatório", "apropriado", "razoável")
+TRANSPARENCY_TERMS = (
+    "justificativa",
+    "critério",
+    "metodologia",
+    "público",
+    "transparente",
+    "acesso",
+    "divulgação",
+)
+LEGAL_FRAMEWORK_TERMS = ("8.666", "14.133")
+ARTICLE_TERMS = ("art.", "artigo")
+COMPLIANCE_TERMS = ("urgente", "sigiloso", "exclusivo")
+
+_KEYWORDS = sorted(
+    {
+        *CONTRACT_TERMS,
+        *TENDER_TERMS,
+        *LAW_TERMS,
+        *DECREE_TERMS,
+        *AMBIGUOUS_TERMS,
+        *TRANSPARENCY_TERMS,
+        *LEGAL_FRAMEWORK_TERMS,
+        *ARTICLE_TERMS,
+        *COMPLIANCE_TERMS,
+        *_TRIGGERS,
+    },
+    key=len,
+    reverse=True,
+)
+
+
+def _keyword_alternative(keyword: str) -> str:
+    if keyword == "projeto de lei":
+        # Leave "lei" to the legal-reference alternative
+        return r"projeto de (?=lei)"
+    return r"\s+".join(re.escape(part) for part in keyword.split(" "))
+
+
+_KEYWORD = "|".join(_keyword_alternative(k) for k in _KEYWORDS)
+_DATE = (
+    r"(?P<date_numeric>\d{1,2}/\d{1,2}/\d{4})"
+    r"|(?P<date_text>(?P<day>\d{1,2})\s+de\s+(?P<month>\w+)\s+de\s+(?P<year>\d{4}))"
+)
+
+_SCANNER = re.compile(
+    r"(?P<org_public>ministério|secretaria|prefeitura|câmara)"
+    r"|(?P<org_company>empresa|companhia|sociedade)"
+    r"|(?P<region>estado|município)"
+    r"|(?P<city>brasília|são paulo|rio de janeiro|belo horizonte)"
+    r"|(?P<money>r\$\s*(?P<amount>[\d,.]+))"
+    rf"|{_DATE}"
+    r"|(?P<law>lei\s+n?º?\s*[\d./-]+)"
+    r"|(?P<article>art\.?\s*\d+[º°]?)"
+    r"|(?P<constitution>cf/\d{2})"
+    rf"|(?P<keyword>{_KEYWORD})"
+)
+_KEYWORD_SCANNER = re.compile(_KEYWORD)
+_DATES = re.compile(_DATE)
+_ORG_TAIL = re.compile(r"\s+[\w\s]+")
+_REGION_TAIL = re.compile(r"\s+(?:de|do|da)\s+([\w\s]+)")
+_SUSPICIOUS = {name: re.compile(p) for name, p in SUSPICIOUS_PATTERNS.items()}
+_SPACES = re.compile(r"\s+")
+
+_SENTENCE_END = re.compile(r"[.!?]+")
+_VOWEL_RUN = re.compile(r"[aeiouAEIOU]+")
+_VOWELLESS_WORD = re.compile(r"(?<!\S)[^\saeiouAEIOU]+(?!\S)")
+
+# Below this many documents a process pool costs more than it saves
+MIN_PARALLEL_BATCH = 16
+
+
+@dataclass(slots=True)
+class Span:
+    """Typed match; ``text`` keeps the document's original case."""
+
+    kind: str
+    start: int
+    end: int
+    text: str
+    value: str = ""
+
+
+@dataclass
+class DocumentFeatures:
+    """Everything the textual analysis needs from one scan of a document."""
+
+    spans: list[Span] = field(default_factory=list)
+    keywords: Counter = field(default_factory=Counter)
+    sentences: int = 0
+    words: int = 0
+    syllables: int = 0
+
+    def of(self, kind: str) -> list[Span]:
+        """Spans of one kind, in document order."""
+        return [span for span in self.spans if span.kind == kind]
+
+    def has_any(self, terms: Sequence[str]) -> bool:
+        """Whether any of ``terms`` occurs in the document."""
+        return any(self.keywords[term] for term in terms)
+
+
+def scan_document(text: str) -> DocumentFeatures:
+    """
+    Extract typed spans, keyword counts and readability statistics.
+
+    Args:
+        text: Document text
+
+    Returns:
+        Features of the document
+    """
+    folded = text.lower()
+    if len(folded) != len(text):
+        # Lower-casing changed offsets (rare characters such as "İ");
+        # fold them to keep spans aligned with the original text
+        folded = "".join(ch.lower()[0] for ch in text)
+
+    features = DocumentFeatures()
+    spans = features.spans
+    covered: dict[str, int] = {}
+
+    def keyword(term: str, start: int) -> None:
+        term = _SPACES.sub(" ", term).rstrip()
+        if term == "projeto de":
+            term = "projeto de lei"
+        features.keywords[term] += 1
+        name = _TRIGGERS.get(term)
+        if name and start >= covered.get(name, 0):
+            match = _SUSPICIOUS[name].match(folded, start)
+            if match:
+                covered[name] = match.end()
+                spans.append(
+                    Span(
+                        "suspicious",
+                        start,
+                        match.end(),
+                        text[start : match.end()],
+                        name,
+                    )
+                )
+
+    for match in _SCANNER.finditer(folded):
+        kind = match.lastgroup
+        start, end = match.span()
+
+        if kind == "keyword":
+            keyword(match.group(), start)
+            continue
+
+        if kind in ("org_public", "org_company"):
+            tail = _ORG_TAIL.match(folded, end)
+            if tail and start >= covered.get(kind, 0):
+                covered[kind] = tail.end()
+                spans.append(Span(kind, start, tail.end(), text[start : tail.end()]))
+            continue
+
+        if kind == "region":
+            tail = _REGION_TAIL.match(folded, end)
+            if tail and start >= covered.get(kind, 0):
+                covered[kind] = tail.end()
+                name_start, name_end = tail.span(1)
+                spans.append(
+                    Span(
+                        kind,
+                        start,
+                        tail.end(),
+                        text[start : tail.end()],
+                        text[name_start:name_end],
+                    )
+                )
+            continue
+
+        if kind in ("date_numeric", "date_text"):
+            if start >= covered.get(kind, 0):
+                spans.append(_date_span(match, text))
+            continue
+
+        value = match.group("amount") if kind == "money" else ""
+        spans.append(Span(kind, start, end, text[start:end], value))
+
+        # Keywords inside the consumed span ("8.666" in a law reference)
+        for inner in _KEYWORD_SCANNER.finditer(folded, start, end):
+            keyword(inner.group(), inner.start())
+
+        # Dates starting inside a reference ("Lei 10/05/2020", "Art. 15/03/2024")
+        if kind in ("law", "article"):
+            for pos in range(start, end):
+                if not folded[pos].isdigit():
+                    continue
+                inner = _DATES.match(folded, pos)
+                if inner and pos >= covered.get(inner.lastgroup, 0):
+                    covered[inner.lastgroup] = inner.end()
+                    spans.append(_date_span(inner, text))
+
+    features.sentences = len(_SENTENCE_END.findall(text))
+    features.words = len(text.split())
+    # One syllable per vowel run, and at least one per word
+    features.syllables = len(_VOWEL_RUN.findall(text)) + len(
+        _VOWELLESS_WORD.findall(text)
+    )
+    return features
+
+
+def _date_span(match: re.Match, text: str) -> Span:
+    kind = match.lastgroup
+    start, end = match.span()
+    value = ""
+    if kind == "date_text":
+        value = " de ".join(
+            text[slice(*match.span(group))] for group in ("day", "month", "year")
+        )
+    return Span(kind, start, end, text[start:end], value)
+
+
+def analyze_documents(
+    texts: Sequence[str], max_workers: int | None = None
+) -> list[DocumentFeatures]:
+    """
+    Scan many documents, in a process pool for large batches.
+
+    Args:
+        texts: Document texts
+        max_workers: Pool size (CPU count by default; 1 scans in-process)
+
+    Returns:
+        Features per document, in order
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(texts) < MIN_PARALLEL_BATCH:
+        return [scan_document(text) for text in texts]
+
+    chunksize = max(1, len(texts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(scan_document, texts, chunksize=chunksize))
@@ -0,0 +1,334 @@
+"""
+Module: ml.inequality
+Description: Grouped, vectorized inequality kernels (Gini, Theil, Atkinson, Palma, Williamson)
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+All indices are computed for many groups at once from a ``(values, group_ids)``
+pair: observations are sorted once by (group, value) and every index becomes a
+segmented reduction (``np.bincount`` with weights) over that ordering. Gini,
+Theil, etc. for every municipality by state and year is therefore a single
+pass instead of one Python call per region.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+INDEX_NAMES = (
+    "gini",
+    "theil",
+    "atkinson",
+    "williamson",
+    "palma",
+    "quintile_ratio",
+)
+
+
+@dataclass
+class GroupedInequality:
+    """Inequality indices per group (arrays aligned with ``groups``)."""
+
+    groups: list[Any]
+    count: np.ndarray
+    total_weight: np.ndarray
+    mean: np.ndarray
+    gini: np.ndarray
+    theil: np.ndarray
+    atkinson: np.ndarray
+    williamson: np.ndarray
+    palma: np.ndarray
+    quintile_ratio: np.ndarray
+    confidence_intervals: dict[str, tuple[np.ndarray, np.ndarray]] = field(
+        default_factory=dict
+    )
+
+    def to_dict(self) -> dict[Any, dict[str, Any]]:
+        """Convert to ``{group: {index: value}}`` for JSON responses."""
+        result = {}
+        for i, group in enumerate(self.groups):
+            entry: dict[str, Any] = {
+                "count": int(self.count[i]),
+                "mean": float(self.mean[i]),
+            }
+            for name in INDEX_NAMES:
+                entry[name] = float(getattr(self, name)[i])
+            for name, (low, high) in self.confidence_intervals.items():
+                entry[f"{name}_ci"] = (float(low[i]), float(high[i]))
+            result[group] = entry
+        return result
+
+
+def _factorize(
+    group_ids: Sequence[Any] | np.ndarray | Sequence[np.ndarray] | None, n: int
+) -> tuple[list[Any], np.ndarray]:
+    """Map group keys (one array or several key columns) to dense codes."""
+    if group_ids is None:
+        return [None], np.zeros(n, dtype=np.int64)
+
+    if (
+        isinstance(group_ids, (list, tuple))
+        and len(group_ids) > 0
+        and isinstance(group_ids[0], (list, tuple, np.ndarray))
+    ):
+        # Several key columns, e.g. (state, year)
+        columns = [np.asarray(col) for col in group_ids]
+        codes = []
+        uniques = []
+        for col in columns:
+            unique, inverse = np.unique(col, return_inverse=True)
+            uniques.append(unique)
+            codes.append(inverse)
+        combined, inverse = np.unique(
+            np.column_stack(codes), axis=0, return_inverse=True
+        )
+        keys = [
+            tuple(uniques[j][combined[i, j]].item() for j in range(len(columns)))
+            for i in range(len(combined))
+        ]
+        return keys, inverse.reshape(-1)
+
+    unique, inverse = np.unique(np.asarray(group_ids), return_inverse=True)
+    return [u.item() for u in unique], inverse.reshape(-1)
+
+
+def _segment_sum(codes: np.ndarray, weights: np.ndarray, n_groups: int) -> np.ndarray:
+    """Sum ``weights`` per group code."""
+    return np.bincount(codes, weights=weights, minlength=n_groups)
+
+
+def _grouped_kernel(
+    x: np.ndarray,
+    w: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    epsilon: float,
+) -> dict[str, np.ndarray]:
+    """
+    Core segmented reductions; ``x`` must be sorted by (codes, x).
+
+    Returns arrays of length ``n_groups``.
+    """
+    count = np.bincount(codes, minlength=n_groups)
+    total_w = _segment_sum(codes, w, n_groups)
+    wx = w * x
+    total_wx = _segment_sum(codes, wx, n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(total_w > 0, total_wx / total_w, 0.0)
+        valid = (count >= 2) & (mean > 0)
+
+        # Cumulative weight inside each group (segmented cumsum)
+        starts = np.cumsum(count) - count
+        cum_w = np.cumsum(w)
+        non_empty = count > 0
+        base = np.zeros(n_groups)
+        base[non_empty] = cum_w[starts[non_empty]] - w[starts[non_empty]]
+        cum_w_within = cum_w - np.repeat(base, count)
+        W = total_w[codes]
+
+        # Gini (Lerman-Yitzhaki): 2 * sum(w x F) / (W mu) - 1, F = mid-rank
+        F = (cum_w_within - w / 2) / W
+        gini = 2 * _segment_sum(codes, wx * F, n_groups) / total_wx - 1
+
+        ratio = x / mean[codes]
+        # Theil T with the 0 * log(0) = 0 convention
+        t_terms = np.where(ratio > 0, ratio * np.log(ratio), 0.0)
+        theil = _segment_sum(codes, w * t_terms, n_groups) / total_w
+
+        if epsilon == 1:
+            log_x = np.where(x > 0, np.log(x), -np.inf)
+            geo = np.exp(_segment_sum(codes, w * log_x, n_groups) / total_w)
+            atkinson = 1 - geo / mean
+        else:
+            powered = _segment_sum(codes, w * np.power(x, 1 - epsilon), n_groups)
+            ede = np.power(powered / total_w, 1 / (1 - epsilon))
+            atkinson = 1 - ede / mean
+
+        # Williamson: population-weighted coefficient of variation
+        sq_dev = (x - mean[codes]) ** 2
+        williamson = np.sqrt(_segment_sum(codes, w * sq_dev, n_groups) / total_w)
+        williamson = williamson / mean
+
+        # Palma and quintile ratio from cumulative weight shares
+        share_end = cum_w_within / W
+        bottom_40 = _segment_sum(codes, wx * (share_end <= 0.4 + 1e-12), n_groups)
+        top_10 = _segment_sum(codes, wx * (share_end > 0.9 + 1e-12), n_groups)
+        palma = np.where(bottom_40 > 0, top_10 / bottom_40, np.inf)
+
+        in_bottom_20 = share_end <= 0.2 + 1e-12
+        in_top_20 = share_end > 0.8 + 1e-12
+        bottom_mean = _segment_sum(codes, wx * in_bottom_20, n_groups) / (
+            _segment_sum(codes, w * in_bottom_20, n_groups)
+        )
+        top_mean = _segment_sum(codes, wx * in_top_20, n_groups) / (
+            _segment_sum(codes, w * in_top_20, n_groups)
+        )
+        quintile_ratio = np.where(bottom_mean > 0, top_mean / bottom_mean, np.inf)
+
+    indices = {
+        "gini": gini,
+        "theil": theil,
+        "atkinson": atkinson,
+        "williamson": williamson,
+        "palma": palma,
+        "quintile_ratio": quintile_ratio,
+    }
+    for name, arr in indices.items():
+        indices[name] = np.where(valid, np.nan_to_num(arr, nan=0.0, posinf=np.inf), 0.0)
+
+    indices.update({"count": count, "total_weight": total_w, "mean": mean})
+    return indices
+
+
+def _prepare(
+    values: Sequence[float] | np.ndarray,
+    group_ids: Any,
+    weights: Sequence[float] | np.ndarray | None,
+    positive_only: bool,
+) -> tuple[list[Any], np.ndarray, np.ndarray, np.ndarray]:
+    """Filter invalid observations, factorize groups and sort by (group, value)."""
+    x = np.asarray(values, dtype=np.float64).reshape(-1)
+    w = (
+        np.ones_like(x)
+        if weights is None
+        else np.asarray(weights, dtype=np.float64).reshape(-1)
+    )
+    if len(w) != len(x):
+        raise ValueError("values and weights must have the same length")
+
+    groups, codes = _factorize(group_ids, len(x))
+    if len(codes) != len(x):
+        raise ValueError("values and group_ids must have the same length")
+
+    keep = np.isfinite(x) & np.isfinite(w) & (w > 0)
+    keep &= (x > 0) if positive_only else (x >= 0)
+
+    x, w, codes = x[keep], w[keep], codes[keep]
+    order = np.lexsort((x, codes))
+    return groups, x[order], w[order], codes[order]
+
+
+def grouped_inequality(
+    values: Sequence[float] | np.ndarray,
+    group_ids: Any = None,
+    weights: Sequence[float] | np.ndarray | None = None,
+    epsilon: float = 0.5,
+    positive_only: bool = False,
+    bootstrap: int = 0,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> GroupedInequality:
+    """
+    Compute all inequality indices for every group in one pass.
+
+    Args:
+        values: Observations (income, GDP per capita, spending per capita...)
+        group_ids: Group key per observation, a list of key columns for
+            composite groups (e.g. ``[state, year]``), or None for one group
+        weights: Optional population weights per observation
+        epsilon: Atkinson inequality-aversion parameter
+        positive_only: Drop zero values (required by log-based indices on
+            data where zero means "missing") instead of keeping them
+        bootstrap: Number of bootstrap replicates for confidence intervals
+            (0 disables them)
+        confidence: Confidence level for bootstrap intervals
+        seed: Random seed for reproducible bootstrap
+
+    Returns:
+        GroupedInequality with one entry per group; groups with fewer than two
+        valid observations get 0.0 for every index
+    """
+    groups, x, w, codes = _prepare(values, group_ids, weights, positive_only)
+    n_groups = len(groups)
+    indices = _grouped_kernel(x, w, codes, n_groups, epsilon)
+
+    result = GroupedInequality(
+        groups=groups,
+        count=indices["count"],
+        total_weight=indices["total_weight"],
+        mean=indices["mean"],
+        **{name: indices[name] for name in INDEX_NAMES},
+    )
+
+    if bootstrap > 0 and len(x) > 0:
+        result.confidence_intervals = _bootstrap_intervals(
+            x, w, codes, n_groups, epsilon, bootstrap, confidence, seed
+        )
+
+    return result
+
+
+def _bootstrap_intervals(
+    x: np.ndarray,
+    w: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    epsilon: float,
+    replicates: int,
+    confidence: float,
+    seed: int | None,
+    max_rows_per_chunk: int = 2_000_000,
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """
+    Percentile bootstrap, resampling within each group.
+
+    Replicates are stacked as extra groups (``replicate * n_groups + group``)
+    so a chunk of replicates is one call to the grouped kernel.
+    """
+    rng = np.random.default_rng(seed)
+    count = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(count) - count
+    n = len(x)
+
+    chunk = max(1, min(replicates, max_rows_per_chunk // max(n, 1)))
+    samples: dict[str, list[np.ndarray]] = {name: [] for name in INDEX_NAMES}
+
+    done = 0
+    while done < replicates:
+        b = min(chunk, replicates - done)
+        # Draw positions inside each observation's own group
+        group_of_row = np.tile(codes, b)
+        u = rng.random(b * n)
+        picked = starts[group_of_row] + (u * count[group_of_row]).astype(np.int64)
+        replicate_codes = np.repeat(np.arange(b), n) * n_groups + group_of_row
+
+        bx, bw = x[picked], w[picked]
+        order = np.lexsort((bx, replicate_codes))
+        indices = _grouped_kernel(
+            bx[order], bw[order], replicate_codes[order], b * n_groups, epsilon
+        )
+        for name in INDEX_NAMES:
+            samples[name].append(indices[name].reshape(b, n_groups))
+        done += b
+
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for name in INDEX_NAMES:
+        stacked = np.concatenate(samples[name], axis=0)
+        low, high = np.quantile(stacked, [alpha, 1 - alpha], axis=0)
+        intervals[name] = (low, high)
+    return intervals
+
+
+def inequality_indices(
+    values: Sequence[float] | np.ndarray,
+    weights: Sequence[float] | np.ndarray | None = None,
+    epsilon: float = 0.5,
+    positive_only: bool = False,
+) -> dict[str, float]:
+    """
+    Compute all indices for a single distribution.
+
+    Convenience wrapper over ``grouped_inequality`` for agents that analyse one
+    vector at a time.
+    """
+    result = grouped_inequality(
+        values, weights=weights, epsilon=epsilon, positive_only=positive_only
+    )
+    indices = {name: float(getattr(result, name)[0]) for name in INDEX_NAMES}
+    indices["count"] = int(result.count[0])
+    return indices
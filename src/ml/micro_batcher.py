@@ -0,0 +1,141 @@
+"""
+Module: ml.micro_batcher
+Description: Dynamic micro-batching of concurrent inference requests
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Callers submit one item and await its result. A single worker task collects
+whatever is queued, waiting at most ``max_wait_ms`` after the first item or
+until ``max_batch_size`` items have arrived. It then runs the whole batch
+through ``process_batch`` in a worker thread and scatters the results back to
+the callers' futures. Concurrent requests and batch endpoints therefore
+share one forward pass, and the event loop stays free while the model runs.
+Batches run one at a time, so the model is never called concurrently.
+"""
+
+import asyncio
+from collections.abc import Callable, Iterable
+from contextlib import suppress
+from typing import Any, Generic, TypeVar
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 5.0
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collects concurrent submissions into batches for one batch function."""
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[T]], list[R | BaseException]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            process_batch: Blocking function mapping a batch of items to one
+                result per item, in order; an exception instance fails only
+                its own item
+            max_batch_size: Items per batch at most
+            max_wait_ms: How long the first item of a batch waits for more
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = {"batches": 0, "items": 0, "max_batch": 0}
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def submit(self, item: T) -> R:
+        """Queue ``item`` and wait for its result."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def submit_many(self, items: Iterable[T]) -> list[R]:
+        """Queue several items at once; results keep their order."""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def close(self) -> None:
+        """Stop the worker and fail requests still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher closed"))
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if (
+            self._worker is None
+            or self._worker.done()
+            or self._worker.get_loop() is not loop
+        ):
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if batch:
+                await self._process(batch)
+
+    async def _collect(self) -> list[tuple[T, asyncio.Future]]:
+        queue = self._queue
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _process(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        self.stats["batches"] += 1
+        self.stats["items"] += len(items)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(items))
+
+        try:
+            results: list[Any] = await asyncio.to_thread(self.process_batch, items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"Batch function returned {len(results)} results "
+                    f"for {len(items)} items"
+                )
+        except Exception as e:
+            logger.error("micro_batch_failed", batch_size=len(items), error=str(e))
+            results = [e] * len(items)
+
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.done():  # caller gave up while the batch ran
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
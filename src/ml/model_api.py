@@ -5,7 +5,9 @@ Interface completa para servir o modelo especializado em transparência pública
 Similar ao padrão Kimi K2, mas otimizado para análise governamental brasileira.
 """
 
+import asyncio
 import logging
+from collections import defaultdict
 from collections.abc import Generator
 from contextlib import asynccontextmanager
 from datetime import datetime
@@ -23,10 +25,30 @@ from transformers import AutoTokenizer
 
 from src.core import json_utils
 
-from .cidadao_model import CidadaoAIForTransparency, create_cidadao_model
+from .cidadao_model import (
+    ANALYSIS_TASKS,
+    CidadaoAIForTransparency,
+    create_cidadao_model,
+)
+from .micro_batcher import MicroBatcher
 
 logger = logging.getLogger(__name__)
 
+# Tarefas executadas por tipo de análise
+TASKS_BY_ANALYSIS_TYPE = {
+    "anomaly": ("anomaly_detection",),
+    "financial": ("financial_analysis",),
+    "legal": ("legal_compliance",),
+    "complete": ANALYSIS_TASKS,
+}
+
+# Micro-batching: espera máxima do primeiro pedido e tamanho do lote
+BATCH_MAX_WAIT_MS = 5.0
+BATCH_MAX_SIZE = 16
+MAX_INPUT_TOKENS = 512
+# Textos são agrupados por comprimento arredondado para cima a este múltiplo
+PAD_TO_MULTIPLE = 32
+
 
 # === MODELOS DE REQUEST/RESPONSE ===
 
@@ -140,6 +162,13 @@ class CidadaoAIManager:
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.loaded = False
 
+        # Pedidos concorrentes compartilham uma passagem pelo modelo
+        self.batcher = MicroBatcher(
+            self._run_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+        )
+
         # Estatísticas de uso
         self.usage_stats = {
             "total_requests": 0,
@@ -192,38 +221,9 @@ class CidadaoAIManager:
         start_time = datetime.now()
 
         try:
-            # Tokenizar texto
-            inputs = self.tokenizer(
-                request.text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512,
-            ).to(self.device)
-
-            # Executar análises baseadas no tipo solicitado
-            results = {}
-
-            if request.analysis_type in ["anomaly", "complete"]:
-                anomaly_results = self.model.detect_anomalies(
-                    input_ids=inputs["input_ids"],
-                    attention_mask=inputs["attention_mask"],
-                )
-                results["anomaly_detection"] = anomaly_results
-
-            if request.analysis_type in ["financial", "complete"]:
-                financial_results = self.model.analyze_financial_risk(
-                    input_ids=inputs["input_ids"],
-                    attention_mask=inputs["attention_mask"],
-                )
-                results["financial_analysis"] = financial_results
-
-            if request.analysis_type in ["legal", "complete"]:
-                legal_results = self.model.check_legal_compliance(
-                    input_ids=inputs["input_ids"],
-                    attention_mask=inputs["attention_mask"],
-                )
-                results["legal_compliance"] = legal_results
+            # Executar análises baseadas no tipo solicitado (em lote com
+            # os pedidos concorrentes)
+            results = await self.batcher.submit((request.text, request.analysis_type))
 
             # Gerar resumo executivo e recomendações
             executive_summary, recommendations, overall_confidence = (
@@ -274,23 +274,91 @@ class CidadaoAIManager:
     ) -> list[TransparencyAnalysisResponse] | str:
         """Análise em lote"""
 
-        results = []
-
-        for text in request.texts:
-            analysis_request = TransparencyAnalysisRequest(
-                text=text,
-                analysis_type=request.analysis_type,
-                include_explanation=request.include_explanation,
+        # Todos os textos entram na fila juntos e são analisados em lotes
+        results = await asyncio.gather(
+            *(
+                self.analyze_transparency(
+                    TransparencyAnalysisRequest(
+                        text=text,
+                        analysis_type=request.analysis_type,
+                        include_explanation=request.include_explanation,
+                    )
+                )
+                for text in request.texts
             )
-
-            result = await self.analyze_transparency(analysis_request)
-            results.append(result)
+        )
+        results = list(results)
 
         if request.format == "csv":
             return self._convert_to_csv(results)
 
         return results
 
+    def _run_batch(self, items: list[tuple[str, str]]) -> list[dict | Exception]:
+        """
+        Analisar um lote de ``(texto, tipo de análise)`` (roda em thread).
+
+        Os textos são agrupados pelo comprimento em tokens arredondado para
+        cima a ``PAD_TO_MULTIPLE`` e completados à direita até esse tamanho,
+        com ``attention_mask`` zerando o padding na atenção e no pooling das
+        cabeças. Cada grupo passa uma vez pelo transformer com todas as
+        tarefas pedidas no grupo.
+        """
+        encoded = self.tokenizer(
+            [text for text, _ in items],
+            truncation=True,
+            max_length=MAX_INPUT_TOKENS,
+        )["input_ids"]
+
+        pad_id = self.tokenizer.pad_token_id
+        if pad_id is None:
+            pad_id = self.tokenizer.eos_token_id or 0
+
+        buckets: dict[int, list[int]] = defaultdict(list)
+        for index, ids in enumerate(encoded):
+            width = -(-len(ids) // PAD_TO_MULTIPLE) * PAD_TO_MULTIPLE
+            buckets[min(width, MAX_INPUT_TOKENS)].append(index)
+
+        results: list[dict | Exception] = [{} for _ in items]
+        for width, indices in buckets.items():
+            requested = {
+                index: TASKS_BY_ANALYSIS_TYPE.get(items[index][1], ())
+                for index in indices
+            }
+            tasks = tuple(
+                task
+                for task in ANALYSIS_TASKS
+                if any(task in wanted for wanted in requested.values())
+            )
+            if not tasks:
+                continue
+
+            try:
+                rows = [encoded[index] for index in indices]
+                input_ids = torch.tensor(
+                    [ids + [pad_id] * (width - len(ids)) for ids in rows],
+                    device=self.device,
+                )
+                attention_mask = torch.tensor(
+                    [[1] * len(ids) + [0] * (width - len(ids)) for ids in rows],
+                    device=self.device,
+                )
+                with torch.inference_mode():
+                    outputs = self.model.analyze_batch(
+                        input_ids=input_ids,
+                        attention_mask=attention_mask,
+                        tasks=tasks,
+                    )
+            except Exception as e:
+                for index in indices:
+                    results[index] = e
+                continue
+
+            for index, output in zip(indices, outputs, strict=True):
+                results[index] = {task: output[task] for task in requested[index]}
+
+        return results
+
     async def chat_completion(self, request: ChatRequest) -> ChatResponse | Generator:
         """Completação de chat"""
 
@@ -589,7 +657,7 @@ async def lifespan(app: FastAPI):
     await model_manager.load_model()
     yield
     # Shutdown
-    pass
+    await model_manager.batcher.close()
 
 
 # Criar aplicação FastAPI
@@ -0,0 +1,405 @@
+"""
+Module: ml.payment_graph
+Description: Payment graph with SCC pruning, bounded simple-cycle enumeration and temporal flow scoring
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Transactions are dictionary-encoded into an integer CSR graph (parallel
+payments between the same pair are collapsed into one edge that keeps its
+dated transfers). Strongly connected components remove every acyclic region
+up front, and simple cycles are enumerated per component from their smallest
+node only (each cycle is found exactly once, in canonical rotation), with
+length bounded by a reverse-BFS distance-to-start prune. Enumeration stops at
+a cycle budget or at a visit budget (BFS visits plus DFS expansions), so
+dense components holding few qualifying cycles cannot run away. Candidate
+cycles are
+then checked for a time-ordered chain of transfers and scored by the money
+that could have gone round.
+"""
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+_EPOCH = datetime(1970, 1, 1).date()
+
+
+def _to_day(value: Any) -> float:
+    """Days since epoch for ISO/BR dates and date objects (NaN if unknown)."""
+    if isinstance(value, datetime):
+        return float((value.date() - _EPOCH).days)
+    if isinstance(value, date):
+        return float((value - _EPOCH).days)
+    if isinstance(value, str) and value:
+        text = value.strip()[:10]
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+            try:
+                return float((datetime.strptime(text, fmt).date() - _EPOCH).days)
+            except ValueError:
+                continue
+    return float("nan")
+
+
+@dataclass(frozen=True)
+class PaymentCycle:
+    """A simple payment cycle and the transfer chain supporting it."""
+
+    nodes: tuple[str, ...]
+    amounts: tuple[float, ...]
+    dates: tuple[float, ...]  # Days since epoch per hop (NaN if undated)
+    flow: float  # Bottleneck amount that could have gone round
+    total_flow: float
+    retention: float  # flow / largest hop (1.0 = everything came back)
+    span_days: float | None
+    score: float
+
+    @property
+    def length(self) -> int:
+        """Number of hops (and entities) in the cycle."""
+        return len(self.nodes)
+
+    @property
+    def path(self) -> list[str]:
+        """Closed path, first entity repeated at the end."""
+        return [*self.nodes, self.nodes[0]]
+
+    @property
+    def iso_dates(self) -> list[str | None]:
+        """Hop dates as ISO strings."""
+        return [
+            (
+                None
+                if np.isnan(d)
+                else date.fromordinal(_EPOCH.toordinal() + int(d)).isoformat()
+            )
+            for d in self.dates
+        ]
+
+
+class PaymentGraph:
+    """
+    Directed payment graph over entity ids.
+
+    ``indptr``/``indices`` hold the collapsed adjacency (one edge per payer →
+    recipient pair); ``edge_ptr`` slices each edge's transfers, sorted by
+    date, out of ``times`` and ``amounts``.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        edge_ptr: np.ndarray,
+        times: np.ndarray,
+        amounts: np.ndarray,
+    ) -> None:
+        self.ids = list(ids)
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_ptr = edge_ptr
+        self.times = times
+        self.amounts = amounts
+
+    @classmethod
+    def from_transactions(
+        cls,
+        transactions: Iterable[dict[str, Any]],
+        payer_key: str = "payer_id",
+        recipient_key: str = "recipient_id",
+        amount_key: str = "amount",
+        date_key: str = "date",
+    ) -> "PaymentGraph":
+        """Build the graph; transfers without payer/recipient or to self are ignored."""
+        payers, recipients, amounts, times = [], [], [], []
+        for trans in transactions:
+            payer, recipient = trans.get(payer_key), trans.get(recipient_key)
+            if not payer or not recipient or payer == recipient:
+                continue
+            payers.append(str(payer))
+            recipients.append(str(recipient))
+            try:
+                amounts.append(float(trans.get(amount_key) or 0.0))
+            except (TypeError, ValueError):
+                amounts.append(0.0)
+            times.append(_to_day(trans.get(date_key)))
+
+        ids, codes = np.unique(
+            np.asarray(payers + recipients, dtype=str), return_inverse=True
+        )
+        n = len(ids)
+        m = len(payers)
+        src, dst = codes[:m].astype(np.int64), codes[m:].astype(np.int64)
+        amount_arr = np.asarray(amounts, dtype=np.float64)
+        time_arr = np.asarray(times, dtype=np.float64)
+
+        # Sort transfers by (pair, date) and collapse pairs into edges
+        pair = src * max(n, 1) + dst
+        order = np.lexsort((time_arr, pair))
+        pair, amount_arr, time_arr = pair[order], amount_arr[order], time_arr[order]
+        edge_keys, edge_start = np.unique(pair, return_index=True)
+        edge_ptr = np.append(edge_start, m).astype(np.int64)
+
+        edge_src = edge_keys // max(n, 1)
+        indices = (edge_keys % max(n, 1)).astype(np.int64)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_src, minlength=n), out=indptr[1:])
+
+        return cls(ids.tolist(), indptr, indices, edge_ptr, time_arr, amount_arr)
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of entities."""
+        return len(self.ids)
+
+    @property
+    def n_edges(self) -> int:
+        """Number of distinct payer → recipient pairs."""
+        return len(self.indices)
+
+    def adjacency(self) -> sparse.csr_matrix:
+        """Collapsed adjacency as a SciPy CSR matrix."""
+        data = np.ones(self.n_edges, dtype=np.int8)
+        return sparse.csr_matrix(
+            (data, self.indices, self.indptr), shape=(self.n_nodes, self.n_nodes)
+        )
+
+    def strongly_connected_components(self, min_size: int = 2) -> list[np.ndarray]:
+        """Node indices of each SCC with at least ``min_size`` nodes."""
+        if not self.n_nodes:
+            return []
+        _, labels = connected_components(
+            self.adjacency(), directed=True, connection="strong"
+        )
+        sizes = np.bincount(labels)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.cumsum(sizes)[:-1]
+        return [comp for comp in np.split(order, bounds) if len(comp) >= min_size]
+
+    def _edge_id(self, u: int, v: int) -> int:
+        """Edge index of u → v in the collapsed CSR."""
+        start, end = self.indptr[u], self.indptr[u + 1]
+        return start + int(np.searchsorted(self.indices[start:end], v))
+
+    def _component_cycles(
+        self,
+        component: np.ndarray,
+        min_length: int,
+        max_length: int,
+        budget: int,
+        max_visits: int,
+    ) -> tuple[list[list[int]], int]:
+        """
+        Simple cycles of one SCC, each reported once from its smallest node.
+
+        Returns the cycles and the number of node visits spent, which never
+        exceeds ``max_visits`` by more than one BFS level.
+        """
+        local = {int(node): i for i, node in enumerate(component)}
+        size = len(component)
+        out_adj: list[list[int]] = [[] for _ in range(size)]
+        in_adj: list[list[int]] = [[] for _ in range(size)]
+        for i, node in enumerate(component):
+            for v in self.indices[self.indptr[node] : self.indptr[node + 1]]:
+                j = local.get(int(v))
+                if j is not None:
+                    out_adj[i].append(j)
+                    in_adj[j].append(i)
+
+        cycles: list[list[int]] = []
+        visits = 0
+        for start in range(size):
+            if len(cycles) >= budget or visits >= max_visits:
+                break
+            # Hops needed from each node back to start, through nodes > start
+            dist = {start: 0}
+            frontier = [start]
+            for depth in range(1, max_length):
+                nxt = []
+                for v in frontier:
+                    for u in in_adj[v]:
+                        if u > start and u not in dist:
+                            dist[u] = depth
+                            nxt.append(u)
+                visits += len(nxt)
+                frontier = nxt
+                if not frontier:
+                    break
+
+            path = [start]
+            on_path = {start}
+            stack = [iter(out_adj[start])]
+            while stack and len(cycles) < budget and visits < max_visits:
+                advanced = False
+                for v in stack[-1]:
+                    if v == start:
+                        if len(path) >= min_length and len(cycles) < budget:
+                            cycles.append(list(path))
+                        continue
+                    if v in on_path or v not in dist:
+                        continue
+                    if len(path) + dist[v] > max_length:
+                        continue
+                    path.append(v)
+                    on_path.add(v)
+                    stack.append(iter(out_adj[v]))
+                    visits += 1
+                    advanced = True
+                    break
+                if not advanced:
+                    stack.pop()
+                    on_path.discard(path.pop())
+
+        return [[int(component[i]) for i in cycle] for cycle in cycles], visits
+
+    def _best_chain(
+        self, cycle: list[int], window_days: float | None
+    ) -> tuple[list[float], list[float]] | None:
+        """
+        Transfer chain going round the cycle in time order.
+
+        Every rotation and every first transfer is tried; subsequent hops take
+        the earliest transfer not before the previous one (and within
+        ``window_days`` of it). Undated transfers do not constrain ordering.
+        Returns (amounts, dates) of the chain with the largest bottleneck.
+        """
+        k = len(cycle)
+        edges = [self._edge_id(cycle[i], cycle[(i + 1) % k]) for i in range(k)]
+        hop_times = [self.times[self.edge_ptr[e] : self.edge_ptr[e + 1]] for e in edges]
+        hop_amounts = [
+            self.amounts[self.edge_ptr[e] : self.edge_ptr[e + 1]] for e in edges
+        ]
+
+        if window_days is None:
+            amounts = [float(a.max()) for a in hop_amounts]
+            dates = [
+                float(t[int(np.argmax(a))])
+                for t, a in zip(hop_times, hop_amounts, strict=True)
+            ]
+            return amounts, dates
+
+        best: tuple[float, list[float], list[float]] | None = None
+        for rot in range(k):
+            hops = [(rot + h) % k for h in range(k)]
+            first = hops[0]
+            for t0, a0 in zip(hop_times[first], hop_amounts[first], strict=True):
+                chain_amounts, chain_dates = [float(a0)], [float(t0)]
+                current = t0
+                for h in hops[1:]:
+                    times, amounts = hop_times[h], hop_amounts[h]
+                    # Dated transfers are sorted first, undated (NaN) last
+                    n_dated = int(np.count_nonzero(~np.isnan(times)))
+                    pos = (
+                        0
+                        if np.isnan(current)
+                        else int(np.searchsorted(times[:n_dated], current))
+                    )
+                    if pos < n_dated and (
+                        np.isnan(current) or times[pos] - current <= window_days
+                    ):
+                        pick = pos
+                    elif n_dated < len(times):
+                        pick = n_dated
+                    else:
+                        break
+                    chain_amounts.append(float(amounts[pick]))
+                    chain_dates.append(float(times[pick]))
+                    if not np.isnan(times[pick]):
+                        current = times[pick]
+                else:
+                    bottleneck = min(chain_amounts)
+                    if best is None or bottleneck > best[0]:
+                        # Report hops in the cycle's canonical order
+                        amounts_out = [0.0] * k
+                        dates_out = [0.0] * k
+                        for h, a, d in zip(
+                            hops, chain_amounts, chain_dates, strict=True
+                        ):
+                            amounts_out[h], dates_out[h] = a, d
+                        best = (bottleneck, amounts_out, dates_out)
+
+        return None if best is None else (best[1], best[2])
+
+    def find_cycles(
+        self,
+        min_length: int = 2,
+        max_length: int = 6,
+        window_days: float | None = None,
+        max_cycles: int = 10_000,
+        min_flow: float = 0.0,
+        max_visits: int = 2_000_000,
+    ) -> list[PaymentCycle]:
+        """
+        Enumerate and score simple payment cycles.
+
+        Args:
+            min_length: Minimum entities per cycle (2 includes round trips)
+            max_length: Maximum entities per cycle
+            window_days: Maximum days between consecutive hops; None ignores
+                dates entirely
+            max_cycles: Enumeration budget (structural cycles)
+            min_flow: Drop cycles whose bottleneck amount is below this
+            max_visits: Search budget (node visits across all components);
+                bounds the work on dense components with few cycles
+
+        Returns:
+            Cycles sorted by score (bottleneck flow weighted by retention)
+        """
+        found: list[PaymentCycle] = []
+        budget = max_cycles
+        visits_left = max_visits
+        components = self.strongly_connected_components(min_size=max(min_length, 2))
+
+        for component in components:
+            if budget <= 0 or visits_left <= 0:
+                break
+            structural, visits = self._component_cycles(
+                np.sort(component), min_length, max_length, budget, visits_left
+            )
+            budget -= len(structural)
+            visits_left -= visits
+
+            for cycle in structural:
+                chain = self._best_chain(cycle, window_days)
+                if chain is None:
+                    continue
+                amounts, dates = chain
+                flow = min(amounts)
+                if flow < min_flow:
+                    continue
+                retention = flow / max(amounts) if max(amounts) > 0 else 0.0
+                dated = [d for d in dates if not np.isnan(d)]
+                found.append(
+                    PaymentCycle(
+                        nodes=tuple(self.ids[i] for i in cycle),
+                        amounts=tuple(amounts),
+                        dates=tuple(dates),
+                        flow=flow,
+                        total_flow=float(sum(amounts)),
+                        retention=retention,
+                        span_days=(max(dated) - min(dated)) if dated else None,
+                        score=flow * retention,
+                    )
+                )
+
+        found.sort(key=lambda c: c.score, reverse=True)
+        logger.debug(
+            "payment_cycles_found",
+            nodes=self.n_nodes,
+            edges=self.n_edges,
+            components=len(components),
+            cycles=len(found),
+            budget_exhausted=budget <= 0,
+            visit_budget_exhausted=visits_left <= 0,
+        )
+        return found
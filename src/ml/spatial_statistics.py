@@ -0,0 +1,617 @@
+"""
+Module: ml.spatial_statistics
+Description: Sparse spatial weights, Getis-Ord Gi* and Moran's I (global/local) with permutation inference
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Everything runs on SciPy sparse matrices and NumPy arrays: weights are built
+once (contiguity lists, shared polygon vertices/edges of the IBGE municipal
+mesh, or k-nearest neighbours over lat/lng) and cached, and
+statistics for all areas - states or the 5,570 municipalities - are matrix
+products rather than Python loops. Permutation inference is vectorized by
+processing blocks of permutations as dense (n, block) matrices.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+from scipy.stats import norm
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+# State borders (queen contiguity) - symmetrized when building weights
+BRAZIL_STATE_NEIGHBORS: dict[str, list[str]] = {
+    "AC": ["AM", "RO"],
+    "AL": ["PE", "BA", "SE"],
+    "AP": ["PA"],
+    "AM": ["AC", "RO", "MT", "PA", "RR"],
+    "BA": ["SE", "AL", "PE", "PI", "TO", "GO", "MG", "ES"],
+    "CE": ["PI", "PE", "PB", "RN"],
+    "DF": ["GO", "MG"],
+    "ES": ["BA", "MG", "RJ"],
+    "GO": ["MT", "TO", "BA", "MG", "MS", "DF"],
+    "MA": ["PA", "TO", "PI"],
+    "MT": ["RO", "AM", "PA", "TO", "GO", "MS"],
+    "MS": ["MT", "GO", "MG", "SP", "PR"],
+    "MG": ["BA", "GO", "DF", "MS", "SP", "RJ", "ES"],
+    "PA": ["AP", "AM", "RR", "MT", "TO", "MA"],
+    "PB": ["RN", "CE", "PE"],
+    "PR": ["SP", "MS", "SC"],
+    "PE": ["PB", "CE", "PI", "BA", "AL"],
+    "PI": ["MA", "TO", "BA", "PE", "CE"],
+    "RJ": ["ES", "MG", "SP"],
+    "RN": ["CE", "PB"],
+    "RS": ["SC"],
+    "RO": ["AC", "AM", "MT"],
+    "RR": ["AM", "PA"],
+    "SC": ["PR", "RS"],
+    "SP": ["RJ", "MG", "MS", "PR"],
+    "SE": ["AL", "BA"],
+    "TO": ["PA", "MT", "GO", "BA", "PI", "MA"],
+}
+
+# State capital coordinates (lat, lng) used as state centroids
+BRAZIL_STATE_CAPITAL_COORDS: dict[str, tuple[float, float]] = {
+    "AC": (-9.975, -67.810),
+    "AL": (-9.666, -35.735),
+    "AP": (0.035, -51.070),
+    "AM": (-3.119, -60.022),
+    "BA": (-12.971, -38.501),
+    "CE": (-3.717, -38.543),
+    "DF": (-15.780, -47.929),
+    "ES": (-20.315, -40.312),
+    "GO": (-16.687, -49.265),
+    "MA": (-2.531, -44.307),
+    "MT": (-15.601, -56.097),
+    "MS": (-20.469, -54.620),
+    "MG": (-19.917, -43.935),
+    "PA": (-1.456, -48.490),
+    "PB": (-7.119, -34.845),
+    "PR": (-25.429, -49.271),
+    "PE": (-8.048, -34.877),
+    "PI": (-5.089, -42.802),
+    "RJ": (-22.907, -43.173),
+    "RN": (-5.795, -35.209),
+    "RS": (-30.035, -51.218),
+    "RO": (-8.762, -63.904),
+    "RR": (2.820, -60.672),
+    "SC": (-27.595, -48.548),
+    "SP": (-23.551, -46.633),
+    "SE": (-10.911, -37.072),
+    "TO": (-10.184, -48.334),
+}
+
+
+@dataclass(frozen=True)
+class SpatialWeights:
+    """Sparse binary spatial weights over an ordered list of area IDs."""
+
+    ids: tuple[str, ...]
+    matrix: sparse.csr_matrix  # binary, zero diagonal
+    kind: str
+
+    @property
+    def n(self) -> int:
+        """Number of areas."""
+        return len(self.ids)
+
+    @property
+    def cardinalities(self) -> np.ndarray:
+        """Number of neighbours per area."""
+        return np.diff(self.matrix.indptr)
+
+    def row_standardized(self) -> sparse.csr_matrix:
+        """Row-standardized copy (each row sums to 1; islands stay 0)."""
+        card = self.cardinalities.astype(np.float64)
+        inv = np.divide(1.0, card, out=np.zeros_like(card), where=card > 0)
+        return sparse.diags(inv) @ self.matrix
+
+    def index_of(self, area_id: str) -> int:
+        """Position of an area in the matrix."""
+        return self.ids.index(area_id)
+
+
+def contiguity_weights(
+    ids: Sequence[str], neighbors: Mapping[str, Sequence[str]]
+) -> SpatialWeights:
+    """
+    Build symmetric contiguity weights from adjacency lists.
+
+    Neighbours not present in ``ids`` are ignored.
+    """
+    ids = tuple(str(i) for i in ids)
+    position = {area_id: i for i, area_id in enumerate(ids)}
+    rows, cols = [], []
+    for area_id, adjacent in neighbors.items():
+        i = position.get(str(area_id))
+        if i is None:
+            continue
+        for other in adjacent:
+            j = position.get(str(other))
+            if j is not None and j != i:
+                rows.extend((i, j))
+                cols.extend((j, i))
+
+    n = len(ids)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(n, n), dtype=np.float64
+    )
+    matrix.data[:] = 1.0  # duplicates summed above collapse back to binary
+    return SpatialWeights(ids=ids, matrix=matrix, kind="contiguity")
+
+
+def knn_weights(
+    ids: Sequence[str], coordinates: np.ndarray | Sequence[Sequence[float]], k: int = 6
+) -> SpatialWeights:
+    """
+    Build k-nearest-neighbour weights from (lat, lng) coordinates.
+
+    Coordinates are projected to the unit sphere so distances are
+    great-circle consistent across Brazil's extent.
+    """
+    ids = tuple(str(i) for i in ids)
+    coords = np.radians(np.asarray(coordinates, dtype=np.float64))
+    lat, lng = coords[:, 0], coords[:, 1]
+    xyz = np.column_stack(
+        (np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat))
+    )
+
+    n = len(ids)
+    k = max(1, min(k, n - 1))
+    _, neighbors = cKDTree(xyz).query(xyz, k=k + 1)
+    neighbors = neighbors[:, 1:]  # drop self
+
+    rows = np.repeat(np.arange(n), k)
+    matrix = sparse.csr_matrix(
+        (np.ones(n * k), (rows, neighbors.reshape(-1))), shape=(n, n)
+    )
+    return SpatialWeights(ids=ids, matrix=matrix, kind=f"knn{k}")
+
+
+def _polygon_rings(geometry: Mapping[str, Any]) -> list[list[Sequence[float]]]:
+    """Linear rings of a GeoJSON Polygon or MultiPolygon."""
+    if geometry["type"] == "Polygon":
+        return list(geometry["coordinates"])
+    if geometry["type"] == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def polygon_contiguity_weights(
+    ids: Sequence[str],
+    geometries: Sequence[Mapping[str, Any]],
+    rook: bool = False,
+    precision: int = 6,
+) -> SpatialWeights:
+    """
+    Build contiguity weights from GeoJSON polygons (e.g. the IBGE mesh).
+
+    Queen neighbours share at least one vertex, rook neighbours at least one
+    edge. Vertices are rounded to ``precision`` decimals and matched through
+    a sparse area x vertex (or edge) incidence matrix ``A``; the weights are
+    the off-diagonal non-zeros of ``A @ A.T``. This relies on a topologically
+    consistent mesh where shared borders share vertices, as IBGE publishes.
+    """
+    ids = tuple(str(i) for i in ids)
+    if len(ids) != len(geometries):
+        raise ValueError("ids and geometries must have the same length")
+
+    owners, keys = [], []
+    for i, geometry in enumerate(geometries):
+        for ring in _polygon_rings(geometry):
+            points = np.round(np.asarray(ring, dtype=np.float64)[:, :2], precision)
+            if rook:
+                # Undirected edges: consecutive vertices, endpoints ordered
+                start, end = points[:-1], points[1:]
+                forward = (start[:, 0] < end[:, 0]) | (
+                    (start[:, 0] == end[:, 0]) & (start[:, 1] <= end[:, 1])
+                )
+                items = np.where(
+                    forward[:, None], np.hstack((start, end)), np.hstack((end, start))
+                )
+            else:
+                items = points
+            owners.append(np.full(len(items), i))
+            keys.append(items)
+
+    n = len(ids)
+    if not keys:
+        matrix = sparse.csr_matrix((n, n), dtype=np.float64)
+        return SpatialWeights(ids=ids, matrix=matrix, kind="polygon")
+
+    _, item_ids = np.unique(np.concatenate(keys), axis=0, return_inverse=True)
+    item_ids = item_ids.ravel()
+    incidence = sparse.csr_matrix(
+        (np.ones(len(item_ids)), (np.concatenate(owners), item_ids)),
+        shape=(n, int(item_ids.max()) + 1),
+    )
+    incidence.data[:] = 1.0
+    matrix = (incidence @ incidence.T).tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    matrix.data[:] = 1.0
+    return SpatialWeights(ids=ids, matrix=matrix, kind="rook" if rook else "queen")
+
+
+def significance_z(confidence: float) -> float:
+    """Two-sided critical z for a confidence level."""
+    return float(norm.ppf(1 - (1 - confidence) / 2))
+
+
+def getis_ord_gi_star(values: np.ndarray, weights: SpatialWeights) -> dict[str, Any]:
+    """
+    Getis-Ord Gi* z-scores for all areas (binary weights including self).
+
+    Returns:
+        Dict with ``z`` and two-sided ``p`` arrays
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    w = weights.matrix + sparse.identity(n, format="csr")
+
+    mean = x.mean()
+    s = np.sqrt(np.mean(x**2) - mean**2)
+    w_sum = np.asarray(w.sum(axis=1)).ravel()
+    w_sq_sum = np.asarray(w.multiply(w).sum(axis=1)).ravel()
+    lag = w @ x
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = s * np.sqrt((n * w_sq_sum - w_sum**2) / (n - 1))
+        z = np.where(denom > 0, (lag - mean * w_sum) / denom, 0.0)
+    p = 2 * norm.sf(np.abs(z))
+    return {"z": z, "p": p}
+
+
+def _permutation_p(observed: np.ndarray, simulated_ge: np.ndarray, permutations: int):
+    """Folded pseudo p-value from counts of simulated >= observed."""
+    larger = np.minimum(simulated_ge, permutations - simulated_ge)
+    return (larger + 1) / (permutations + 1)
+
+
+def morans_i(
+    values: np.ndarray,
+    weights: SpatialWeights,
+    permutations: int = 999,
+    seed: int | None = None,
+    block_size: int = 128,
+) -> dict[str, Any]:
+    """
+    Global Moran's I with analytical (normality) and permutation inference.
+
+    Returns:
+        Dict with ``I``, ``expected_i``, ``variance``, ``z_score``, ``p_value``
+        (normal approximation) and ``p_sim`` (permutation)
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    w = weights.row_standardized()
+    z = x - x.mean()
+    zz = float(z @ z)
+    s0 = float(w.sum())
+
+    if zz == 0 or s0 == 0 or n < 3:
+        return {
+            "I": 0.0,
+            "expected_i": -1 / max(n - 1, 1),
+            "variance": 0.0,
+            "z_score": 0.0,
+            "p_value": 1.0,
+            "p_sim": 1.0,
+        }
+
+    observed = (n / s0) * float(z @ (w @ z)) / zz
+    expected = -1.0 / (n - 1)
+
+    # Variance under normality assumption
+    w_sym = w + w.T
+    s1 = 0.5 * float(w_sym.multiply(w_sym).sum())
+    s2 = float(
+        (
+            (np.asarray(w.sum(axis=1)).ravel() + np.asarray(w.sum(axis=0)).ravel()) ** 2
+        ).sum()
+    )
+    variance = (n**2 * s1 - n * s2 + 3 * s0**2) / ((n**2 - 1) * s0**2) - expected**2
+    z_score = (observed - expected) / np.sqrt(variance) if variance > 0 else 0.0
+
+    p_sim = None
+    if permutations > 0:
+        rng = np.random.default_rng(seed)
+        simulated = []
+        done = 0
+        while done < permutations:
+            b = min(block_size, permutations - done)
+            perm = np.argsort(rng.random((n, b)), axis=0)
+            zp = z[perm]
+            num = np.einsum("ij,ij->j", zp, w @ zp)
+            simulated.append((n / s0) * num / zz)
+            done += b
+        simulated = np.concatenate(simulated)
+        p_sim = float(
+            _permutation_p(observed, int((simulated >= observed).sum()), permutations)
+        )
+
+    return {
+        "I": float(observed),
+        "expected_i": float(expected),
+        "variance": float(variance),
+        "z_score": float(z_score),
+        "p_value": float(2 * norm.sf(abs(z_score))),
+        "p_sim": p_sim,
+    }
+
+
+def local_morans_i(
+    values: np.ndarray,
+    weights: SpatialWeights,
+    permutations: int = 999,
+    seed: int | None = None,
+    block_size: int = 64,
+    max_block_elements: int = 2_000_000,
+) -> dict[str, Any]:
+    """
+    Local Moran's I (LISA) with conditional permutation inference.
+
+    For each area the neighbours' values are redrawn from the other n-1 areas,
+    all areas and a block of permutations at a time. Small inputs (such as
+    the 27 states) draw without replacement, which is exact conditional
+    randomization; when that would not fit in ``max_block_elements`` draws
+    per block, values are drawn with replacement, a close approximation once
+    n is in the hundreds or thousands. Blocks are shrunk so each holds at
+    most ``max_block_elements`` draws.
+
+    Returns:
+        Dict with ``Is``, ``p_sim``, ``quadrant`` (1=HH, 2=LH, 3=LL, 4=HL) and
+        the spatial ``lag`` of standardized values
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    w = weights.row_standardized().tocsr()
+    z = x - x.mean()
+    m2 = float(z @ z) / n
+    if m2 == 0:
+        zeros = np.zeros(n)
+        return {
+            "Is": zeros,
+            "p_sim": np.ones(n),
+            "quadrant": np.zeros(n, dtype=np.int8),
+            "lag": zeros,
+        }
+
+    lag = w @ z
+    local_i = z * lag / m2
+
+    quadrant = np.where(z > 0, np.where(lag > 0, 1, 4), np.where(lag > 0, 2, 3)).astype(
+        np.int8
+    )
+
+    p_sim = np.ones(n)
+    if permutations > 0:
+        card = np.diff(w.indptr)
+        k_max = int(card.max()) if n else 0
+        # Dense (n, k_max) neighbour weights, zero-padded
+        padded_w = np.zeros((n, k_max))
+        slot = np.arange(len(w.data)) - np.repeat(w.indptr[:-1], card)
+        padded_w[np.repeat(np.arange(n), card), slot] = w.data
+
+        rng = np.random.default_rng(seed)
+        larger = np.zeros(n, dtype=np.int64)
+        exact = n * (n - 1) <= max_block_elements
+        per_permutation = n * (n - 1) if exact else n * max(k_max, 1)
+        block_size = max(1, min(block_size, max_block_elements // per_permutation))
+        done = 0
+        while done < permutations:
+            b = min(block_size, permutations - done)
+            if exact:
+                # k_max distinct others per area: a random ordering of n-1 slots
+                draws = np.argsort(rng.random((n, b, n - 1)), axis=2)[..., :k_max]
+            else:
+                draws = rng.integers(0, n - 1, size=(n, b, k_max))
+            # Skip the area itself: shift draws at or above i by one
+            draws += draws >= np.arange(n)[:, None, None]
+            sim_lag = np.einsum("nbk,nk->nb", z[draws], padded_w)
+            sim_i = z[:, None] * sim_lag / m2
+            larger += (sim_i >= local_i[:, None]).sum(axis=1)
+            done += b
+        p_sim = _permutation_p(local_i, larger, permutations)
+
+    return {"Is": local_i, "p_sim": p_sim, "quadrant": quadrant, "lag": lag}
+
+
+QUADRANT_LABELS = {1: "High-High", 2: "Low-High", 3: "Low-Low", 4: "High-Low"}
+
+
+class SpatialStatisticsEngine:
+    """
+    Spatial statistics facade with a bounded cache of weight matrices.
+
+    Weight construction (KD-tree queries, sparse assembly) dominates the cost
+    for repeated requests over the same geography, so matrices are cached by
+    a digest of their inputs. The cache is shared by requests running in
+    worker threads and guarded by a lock; weights are built outside it.
+    """
+
+    def __init__(self, max_cached_weights: int = 16):
+        """
+        Initialize the engine.
+
+        Args:
+            max_cached_weights: Number of weight matrices kept (LRU)
+        """
+        self._weights_cache: OrderedDict[str, SpatialWeights] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.max_cached_weights = max_cached_weights
+
+    def _cached(self, key: str, builder) -> SpatialWeights:
+        """Return cached weights or build and cache them."""
+        with self._cache_lock:
+            weights = self._weights_cache.get(key)
+            if weights is not None:
+                self._weights_cache.move_to_end(key)
+                return weights
+
+        weights = builder()
+        with self._cache_lock:
+            # Another thread may have built the same weights meanwhile
+            weights = self._weights_cache.setdefault(key, weights)
+            self._weights_cache.move_to_end(key)
+            while len(self._weights_cache) > self.max_cached_weights:
+                self._weights_cache.popitem(last=False)
+        return weights
+
+    @staticmethod
+    def _digest(*parts: Any) -> str:
+        """Stable digest of weight inputs."""
+        h = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                h.update(np.ascontiguousarray(part).tobytes())
+            else:
+                h.update(repr(part).encode())
+        return h.hexdigest()
+
+    def contiguity(
+        self, ids: Sequence[str], neighbors: Mapping[str, Sequence[str]]
+    ) -> SpatialWeights:
+        """Cached contiguity weights."""
+        key = "contiguity:" + self._digest(
+            tuple(ids), sorted((k, tuple(v)) for k, v in neighbors.items())
+        )
+        return self._cached(key, lambda: contiguity_weights(ids, neighbors))
+
+    def knn(
+        self, ids: Sequence[str], coordinates: Sequence[Sequence[float]], k: int = 6
+    ) -> SpatialWeights:
+        """Cached k-nearest-neighbour weights."""
+        coords = np.asarray(coordinates, dtype=np.float64)
+        key = f"knn{k}:" + self._digest(tuple(ids), coords)
+        return self._cached(key, lambda: knn_weights(ids, coords, k))
+
+    def polygons(
+        self,
+        ids: Sequence[str],
+        geometries: Sequence[Mapping[str, Any]],
+        rook: bool = False,
+        cache_key: str | None = None,
+    ) -> SpatialWeights:
+        """
+        Cached contiguity weights from GeoJSON polygons.
+
+        Pass ``cache_key`` (e.g. the mesh URL and version) to avoid hashing
+        every vertex of large meshes.
+        """
+        digest = cache_key or self._digest(
+            tuple(ids), [repr(g.get("coordinates")) for g in geometries]
+        )
+        key = f"{'rook' if rook else 'queen'}:{digest}"
+        return self._cached(
+            key, lambda: polygon_contiguity_weights(ids, geometries, rook=rook)
+        )
+
+    def state_weights(self, method: str = "queen") -> SpatialWeights:
+        """Weights over the 27 federative units (contiguity or k-NN)."""
+        ids = sorted(BRAZIL_STATE_NEIGHBORS)
+        if method in ("queen", "rook", "contiguity"):
+            return self.contiguity(ids, BRAZIL_STATE_NEIGHBORS)
+        coords = [BRAZIL_STATE_CAPITAL_COORDS[s] for s in ids]
+        return self.knn(ids, coords, k=4)
+
+    def analyze(
+        self,
+        values: Sequence[float],
+        weights: SpatialWeights,
+        permutations: int = 199,
+        confidence: float = 0.95,
+        seed: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run Gi*, global and local Moran's I over the same weights.
+
+        Returns:
+            Dict with ``global`` Moran statistics and per-area ``areas`` rows
+        """
+        x = np.asarray(values, dtype=np.float64)
+        if len(x) != weights.n:
+            raise ValueError("values must be aligned with the weights' ids")
+
+        gi = getis_ord_gi_star(x, weights)
+        global_i = morans_i(x, weights, permutations=permutations, seed=seed)
+        lisa = local_morans_i(x, weights, permutations=permutations, seed=seed)
+
+        alpha = 1 - confidence
+        z_crit = significance_z(confidence)
+        areas = []
+        for i, area_id in enumerate(weights.ids):
+            significant = lisa["p_sim"][i] <= alpha
+            areas.append(
+                {
+                    "id": area_id,
+                    "value": float(x[i]),
+                    "gi_star_z": float(gi["z"][i]),
+                    "gi_star_p": float(gi["p"][i]),
+                    "hotspot": (
+                        "hot"
+                        if gi["z"][i] >= z_crit
+                        else "cold" if gi["z"][i] <= -z_crit else None
+                    ),
+                    "local_i": float(lisa["Is"][i]),
+                    "local_p": float(lisa["p_sim"][i]),
+                    "cluster": (
+                        QUADRANT_LABELS[int(lisa["quadrant"][i])]
+                        if significant
+                        else None
+                    ),
+                }
+            )
+
+        return {
+            "weights": {"kind": weights.kind, "n": weights.n},
+            "global": global_i,
+            "areas": areas,
+            "gi_star": gi,
+            "lisa": lisa,
+        }
+
+    @staticmethod
+    def connected_clusters(
+        weights: SpatialWeights, members: np.ndarray
+    ) -> list[list[str]]:
+        """
+        Split a set of areas into spatially connected groups.
+
+        Args:
+            weights: Spatial weights defining adjacency
+            members: Boolean mask of areas to group
+
+        Returns:
+            Lists of area IDs, one per connected component
+        """
+        index = np.flatnonzero(members)
+        if len(index) == 0:
+            return []
+        sub = weights.matrix[index][:, index]
+        n_components, labels = connected_components(sub, directed=False)
+        return [
+            [weights.ids[i] for i in index[labels == c]] for c in range(n_components)
+        ]
+
+
+_engine: SpatialStatisticsEngine | None = None
+
+
+def get_spatial_engine() -> SpatialStatisticsEngine:
+    """Get the process-wide spatial statistics engine."""
+    global _engine
+    if _engine is None:
+        _engine = SpatialStatisticsEngine()
+    return _engine
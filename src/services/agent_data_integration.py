@@ -253,8 +253,11 @@ class AgentDataIntegration:
             from src.services.transparency_apis.federal_apis.ibge_client import (
                 IBGEClient,
             )
+            from src.services.transparency_apis.federal_apis.ibge_store import (
+                get_ibge_store,
+            )
 
-            ibge_client = IBGEClient()
+            ibge_client = IBGEClient(store=get_ibge_store())
 
             # If UF provided, fetch municipalities
             if uf:
@@ -213,6 +213,19 @@ class AgentMetricsService:
             # Update Prometheus metric
             agent_memory_usage.labels(agent_name=agent_name).set(memory_bytes)
 
+    def get_expected_duration(
+        self, agent_name: str, default: float | None = None
+    ) -> float | None:
+        """
+        Median of recent request durations for an agent (seconds).
+
+        Synchronous and lock-free so schedulers can query it per step.
+        """
+        metrics = self._agent_metrics.get(agent_name)
+        if not metrics or not metrics.response_times:
+            return default
+        return statistics.median(metrics.response_times)
+
     @cache_result(prefix="agent_stats", ttl=30)
     async def get_agent_stats(self, agent_name: str) -> dict[str, Any]:
         """Get comprehensive stats for a specific agent."""
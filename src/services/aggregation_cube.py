@@ -0,0 +1,615 @@
+"""
+Columnar aggregation cube for contract and expense records.
+
+Records are dictionary-encoded into integer columns (org, category, region,
+UF, month, supplier) plus a float value column. Group-bys over any set of
+dimensions are vectorized (composite code + ``np.bincount``), and a set of
+materialized rollups (cube slices) is maintained incrementally on ingest so
+charts read pre-aggregates instead of re-scanning raw rows.
+"""
+
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+DIMENSIONS = ("org", "category", "region", "uf", "month", "supplier")
+
+UF_TO_REGION = {
+    **dict.fromkeys(("AC", "AP", "AM", "PA", "RO", "RR", "TO"), "Norte"),
+    **dict.fromkeys(("AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"), "Nordeste"),
+    **dict.fromkeys(("DF", "GO", "MT", "MS"), "Centro-Oeste"),
+    **dict.fromkeys(("ES", "MG", "RJ", "SP"), "Sudeste"),
+    **dict.fromkeys(("PR", "RS", "SC"), "Sul"),
+}
+
+UF_NAMES = {
+    "AC": "Acre",
+    "AL": "Alagoas",
+    "AP": "Amapá",
+    "AM": "Amazonas",
+    "BA": "Bahia",
+    "CE": "Ceará",
+    "DF": "Distrito Federal",
+    "ES": "Espírito Santo",
+    "GO": "Goiás",
+    "MA": "Maranhão",
+    "MT": "Mato Grosso",
+    "MS": "Mato Grosso do Sul",
+    "MG": "Minas Gerais",
+    "PA": "Pará",
+    "PB": "Paraíba",
+    "PR": "Paraná",
+    "PE": "Pernambuco",
+    "PI": "Piauí",
+    "RJ": "Rio de Janeiro",
+    "RN": "Rio Grande do Norte",
+    "RS": "Rio Grande do Sul",
+    "RO": "Rondônia",
+    "RR": "Roraima",
+    "SC": "Santa Catarina",
+    "SP": "São Paulo",
+    "SE": "Sergipe",
+    "TO": "Tocantins",
+}
+
+# Slices refreshed on every ingest; chart endpoints read these directly
+DEFAULT_ROLLUPS: tuple[tuple[str, ...], ...] = (
+    (),
+    ("org",),
+    ("category",),
+    ("region",),
+    ("uf",),
+    ("month",),
+    ("supplier",),
+    ("category", "region"),
+    ("uf", "month"),
+    ("region", "month"),
+    ("category", "month"),
+)
+
+MEASURES = ("count", "sum", "min", "max", "mean")
+UNKNOWN = "N/A"
+ID_FIELDS = ("id", "numeroContrato", "numero_contrato", "codigo", "contract_id")
+
+
+class DimensionDictionary:
+    """Dictionary encoding of one dimension (value <-> dense int code)."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        """Code for a value, assigning a new one when unseen."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int | None:
+        """Code for a value without assigning one."""
+        return self._codes.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _name(value: Any) -> str | None:
+    """Nested ``{"nome": ...}`` or plain value as a string."""
+    if isinstance(value, dict):
+        value = value.get("nome") or value.get("name") or value.get("sigla")
+    return str(value) if value not in (None, "") else None
+
+
+def _month(value: Any) -> str | None:
+    """``YYYY-MM`` bucket from a date, datetime or date-like string."""
+    if isinstance(value, (datetime, date)):
+        return f"{value.year:04d}-{value.month:02d}"
+    if isinstance(value, str) and value:
+        if len(value) >= 7 and value[4] == "-":  # ISO: 2024-03-15
+            return value[:7]
+        if len(value) >= 10 and value[2] == "/":  # BR: 15/03/2024
+            return f"{value[6:10]}-{value[3:5]}"
+    return None
+
+
+def record_id(record: dict[str, Any]) -> str | None:
+    """Stable identifier of a record, if it carries one."""
+    for field in ID_FIELDS:
+        value = record.get(field)
+        if value not in (None, ""):
+            return f"{field}:{value}"
+    return None
+
+
+def normalize_record(record: dict[str, Any]) -> tuple[dict[str, str], float]:
+    """
+    Extract cube dimensions and value from a contract or expense record.
+
+    Understands Portal da Transparência field names (``orgao``,
+    ``fornecedor``, ``valorInicial``...) as well as flat English keys.
+    """
+    orgao = record.get("orgao") or record.get("unidadeGestora") or {}
+    uf = _name(
+        record.get("uf")
+        or record.get("state")
+        or record.get("state_code")
+        or (orgao.get("uf") if isinstance(orgao, dict) else None)
+    )
+    uf = uf.upper() if uf else None
+
+    value = (
+        record.get("valorInicial")
+        or record.get("valorGlobal")
+        or record.get("valor")
+        or record.get("value")
+        or record.get("amount")
+        or 0
+    )
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        value = 0.0
+
+    region = _name(record.get("region"))
+    if region and not uf and region.upper() in UF_TO_REGION:
+        # Regional payloads often carry the UF code under "region"
+        uf, region = region.upper(), None
+
+    dims = {
+        "org": (
+            _name(orgao)
+            or _name(record.get("org"))
+            or _name(record.get("organization"))
+        ),
+        "category": _name(
+            record.get("category")
+            or record.get("categoria")
+            or record.get("modalidadeCompra")
+            or record.get("modalidade")
+        ),
+        "region": region or UF_TO_REGION.get(uf or ""),
+        "uf": uf,
+        "month": _month(
+            record.get("dataAssinatura")
+            or record.get("data")
+            or record.get("date")
+            or record.get("month")
+        ),
+        "supplier": _name(record.get("fornecedor") or record.get("supplier")),
+    }
+    return {k: v or UNKNOWN for k, v in dims.items()}, value
+
+
+class _Rollup:
+    """Materialized aggregate for one dimension set (composite key -> stats)."""
+
+    def __init__(self, dims: tuple[str, ...]) -> None:
+        self.dims = dims
+        self.groups: dict[tuple[int, ...], list[float]] = {}
+
+    def merge(self, keys: np.ndarray, stats: dict[str, np.ndarray]) -> None:
+        """Merge a batch aggregate (``keys`` rows align with ``stats``)."""
+        for row, key in enumerate(map(tuple, keys.tolist())):
+            current = self.groups.get(key)
+            count, total = stats["count"][row], stats["sum"][row]
+            low, high = stats["min"][row], stats["max"][row]
+            if current is None:
+                self.groups[key] = [count, total, low, high]
+            else:
+                current[0] += count
+                current[1] += total
+                current[2] = min(current[2], low)
+                current[3] = max(current[3], high)
+
+
+def _group_stats(
+    codes: np.ndarray, values: np.ndarray, n_groups: int
+) -> dict[str, np.ndarray]:
+    """Count, sum, min and max per dense group code."""
+    count = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    low = np.full(n_groups, np.inf)
+    high = np.full(n_groups, -np.inf)
+    np.minimum.at(low, codes, values)
+    np.maximum.at(high, codes, values)
+    return {"count": count, "sum": total, "min": low, "max": high}
+
+
+class AggregationCube:
+    """
+    Columnar, dictionary-encoded cube with incremental rollups.
+
+    Thread-safe: ingest and queries share a lock, and query results are
+    memoized per cube version so repeated chart reads are dictionary hits.
+    Optionally bounded: rows older than ``max_age_seconds`` or beyond
+    ``max_rows`` are evicted oldest first, together with their ids.
+    """
+
+    def __init__(
+        self,
+        rollups: Iterable[Sequence[str]] = DEFAULT_ROLLUPS,
+        initial_capacity: int = 1024,
+        max_rows: int | None = None,
+        max_age_seconds: float | None = None,
+    ) -> None:
+        """
+        Initialize an empty cube.
+
+        Args:
+            rollups: Dimension sets kept materialized
+            initial_capacity: Initial column capacity (grows geometrically)
+            max_rows: Maximum rows retained (None for unbounded)
+            max_age_seconds: Maximum row age since ingest (None for no expiry)
+        """
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.dictionaries = {dim: DimensionDictionary() for dim in DIMENSIONS}
+        self._codes = np.zeros((len(DIMENSIONS), initial_capacity), dtype=np.int32)
+        self._values = np.zeros(initial_capacity, dtype=np.float64)
+        self._ingested_at = np.zeros(initial_capacity, dtype=np.float64)
+        self._row_ids: list[str | None] = []
+        self._size = 0
+        self._rollups = {tuple(dims): _Rollup(tuple(dims)) for dims in rollups}
+        self._query_cache: dict[Any, list[dict[str, Any]]] = {}
+        self._seen_ids: set[str] = set()
+        self._lock = threading.RLock()
+        self.version = 0
+
+    @property
+    def row_count(self) -> int:
+        """Number of ingested records."""
+        return self._size
+
+    @property
+    def rollup_dimensions(self) -> list[tuple[str, ...]]:
+        """Materialized dimension sets."""
+        return list(self._rollups)
+
+    def _grow(self, needed: int) -> None:
+        """Ensure column capacity for ``needed`` rows."""
+        capacity = self._values.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        codes = np.zeros((len(DIMENSIONS), new_capacity), dtype=np.int32)
+        codes[:, : self._size] = self._codes[:, : self._size]
+        values = np.zeros(new_capacity, dtype=np.float64)
+        values[: self._size] = self._values[: self._size]
+        ingested_at = np.zeros(new_capacity, dtype=np.float64)
+        ingested_at[: self._size] = self._ingested_at[: self._size]
+        self._codes, self._values, self._ingested_at = codes, values, ingested_at
+
+    def ingest(
+        self, records: Iterable[dict[str, Any]], require_id: bool = False
+    ) -> int:
+        """
+        Append records and refresh every materialized rollup incrementally.
+
+        Only the new batch is aggregated; its partial aggregates are merged
+        into the existing slices. Records whose id was already ingested are
+        skipped, so re-fetching the same contracts does not double count.
+        On a bounded cube, expired and excess rows are evicted afterwards.
+
+        Args:
+            records: Contract/expense records
+            require_id: Skip records without an identifier (for feeds that
+                may return the same records again)
+
+        Returns:
+            Number of records ingested
+        """
+        with self._lock:
+            normalized = []
+            ids: list[str | None] = []
+            for record in records:
+                if not isinstance(record, dict):
+                    continue
+                rid = record_id(record)
+                if rid is None and require_id:
+                    continue
+                if rid is not None:
+                    if rid in self._seen_ids:
+                        continue
+                    self._seen_ids.add(rid)
+                normalized.append(normalize_record(record))
+                ids.append(rid)
+            if not normalized:
+                self._evict(time.time())
+                return 0
+
+            n = len(normalized)
+            batch_codes = np.empty((len(DIMENSIONS), n), dtype=np.int32)
+            batch_values = np.empty(n, dtype=np.float64)
+            for d, dim in enumerate(DIMENSIONS):
+                encode = self.dictionaries[dim].encode
+                batch_codes[d] = [encode(dims[dim]) for dims, _ in normalized]
+            batch_values[:] = [value for _, value in normalized]
+
+            self._grow(self._size + n)
+            self._codes[:, self._size : self._size + n] = batch_codes
+            self._values[self._size : self._size + n] = batch_values
+            now = time.time()
+            self._ingested_at[self._size : self._size + n] = now
+            self._row_ids.extend(ids)
+            self._size += n
+
+            for dims, rollup in self._rollups.items():
+                keys, stats = self._aggregate(batch_codes, batch_values, dims)
+                rollup.merge(keys, stats)
+
+            self.version += 1
+            self._query_cache.clear()
+            self._evict(now)
+
+        logger.debug("cube_ingested", records=n, total_rows=self._size)
+        return n
+
+    def _evict(self, now: float) -> None:
+        """
+        Drop expired rows and rows beyond ``max_rows`` (oldest first).
+
+        Rows are appended in ingest order, so the evicted rows are a prefix.
+        Trimming goes 10% below ``max_rows`` so the rebuild of dictionaries
+        and rollups is amortized over many ingests.
+        """
+        start = 0
+        if self.max_age_seconds is not None and self._size:
+            start = int(
+                np.searchsorted(
+                    self._ingested_at[: self._size],
+                    now - self.max_age_seconds,
+                    side="left",
+                )
+            )
+        if self.max_rows is not None and self._size - start > self.max_rows:
+            start = self._size - int(self.max_rows * 0.9)
+        if start == 0:
+            return
+
+        for rid in self._row_ids[:start]:
+            if rid is not None:
+                self._seen_ids.discard(rid)
+        del self._row_ids[:start]
+
+        kept = self._size - start
+        codes = self._codes[:, start : self._size]
+        # Re-encode dimensions so values only seen in evicted rows are dropped
+        for d, dim in enumerate(DIMENSIONS):
+            used, remapped = np.unique(codes[d], return_inverse=True)
+            old_values = self.dictionaries[dim].values
+            dictionary = DimensionDictionary()
+            for code in used.tolist():
+                dictionary.encode(old_values[code])
+            self.dictionaries[dim] = dictionary
+            self._codes[d, :kept] = remapped.reshape(-1)
+        self._values[:kept] = self._values[start : self._size]
+        self._ingested_at[:kept] = self._ingested_at[start : self._size]
+        self._size = kept
+
+        for dims in list(self._rollups):
+            rollup = _Rollup(dims)
+            rollup.merge(
+                *self._aggregate(self._codes[:, :kept], self._values[:kept], dims)
+            )
+            self._rollups[dims] = rollup
+        self.version += 1
+        self._query_cache.clear()
+        logger.debug("cube_rows_evicted", evicted=start, total_rows=kept)
+
+    def _aggregate(
+        self,
+        codes: np.ndarray,
+        values: np.ndarray,
+        dims: tuple[str, ...],
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Vectorized group-by of raw columns over ``dims``."""
+        if len(values) == 0:
+            return np.empty((0, len(dims)), dtype=np.int64), {
+                m: np.empty(0) for m in ("count", "sum", "min", "max")
+            }
+        if not dims:
+            group = np.zeros(len(values), dtype=np.int64)
+            return np.empty((1, 0), dtype=np.int64), _group_stats(group, values, 1)
+
+        rows = [DIMENSIONS.index(dim) for dim in dims]
+        shape = tuple(max(len(self.dictionaries[dim]), 1) for dim in dims)
+        if np.prod(shape, dtype=np.float64) < 2**62:
+            composite = np.ravel_multi_index(codes[rows].astype(np.int64), shape)
+            unique, group = np.unique(composite, return_inverse=True)
+            keys = np.column_stack(np.unravel_index(unique, shape))
+        else:
+            # Key space too large to pack into one int64
+            keys, group = np.unique(codes[rows].T, axis=0, return_inverse=True)
+        return keys, _group_stats(group.reshape(-1), values, len(keys))
+
+    def _filter_codes(self, filters: dict[str, Any] | None) -> dict[str, set[int]]:
+        """Translate ``{dim: value | [values]}`` filters into code sets."""
+        result = {}
+        for dim, wanted in (filters or {}).items():
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dim}")
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            lookup = self.dictionaries[dim].lookup
+            result[dim] = {c for c in (lookup(str(v)) for v in wanted) if c is not None}
+        return result
+
+    def query(
+        self,
+        dimensions: Sequence[str] = (),
+        filters: dict[str, Any] | None = None,
+        order_by: str | None = "sum",
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Aggregate ``count/sum/min/max/mean`` by ``dimensions``.
+
+        Served from the smallest materialized rollup covering the requested
+        and filtered dimensions; falls back to a vectorized scan of the raw
+        columns otherwise. Results are memoized until the next ingest;
+        callers receive copies, so mutating them does not alter the cache.
+
+        Args:
+            dimensions: Group-by dimensions (subset of ``DIMENSIONS``)
+            filters: Equality / membership filters per dimension
+            order_by: Measure to sort descending by (None keeps key order)
+            limit: Maximum rows returned
+
+        Returns:
+            One dict per group with dimension values and measures
+        """
+        dims = tuple(dimensions)
+        for dim in dims:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dim}")
+        if order_by is not None and order_by not in MEASURES:
+            raise ValueError(f"Unknown measure: {order_by}")
+
+        cache_key = (
+            dims,
+            tuple(sorted((k, repr(v)) for k, v in (filters or {}).items())),
+            order_by,
+            limit,
+        )
+        with self._lock:
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                return [dict(row) for row in cached]
+
+            filter_codes = self._filter_codes(filters)
+            needed = set(dims) | set(filter_codes)
+            source = self._covering_rollup(needed)
+            if source is not None:
+                groups = self._from_rollup(source, dims, filter_codes)
+            else:
+                groups = self._from_columns(dims, filter_codes)
+
+            rows = [
+                {
+                    **{
+                        dim: self.dictionaries[dim].values[code]
+                        for dim, code in zip(dims, key, strict=True)
+                    },
+                    "count": int(stats[0]),
+                    "sum": float(stats[1]),
+                    "min": float(stats[2]),
+                    "max": float(stats[3]),
+                    "mean": float(stats[1] / stats[0]) if stats[0] else 0.0,
+                }
+                for key, stats in groups.items()
+            ]
+            if order_by:
+                rows.sort(key=lambda row: row[order_by], reverse=True)
+            if limit is not None:
+                rows = rows[:limit]
+
+            self._query_cache[cache_key] = rows
+            return [dict(row) for row in rows]
+
+    def _covering_rollup(self, needed: set[str]) -> _Rollup | None:
+        """Smallest materialized rollup containing all ``needed`` dimensions."""
+        candidates = [
+            rollup for dims, rollup in self._rollups.items() if needed.issubset(dims)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda r: len(r.groups))
+
+    def _from_rollup(
+        self,
+        rollup: _Rollup,
+        dims: tuple[str, ...],
+        filter_codes: dict[str, set[int]],
+    ) -> dict[tuple[int, ...], list[float]]:
+        """Re-aggregate a rollup onto ``dims`` after applying filters."""
+        positions = [rollup.dims.index(dim) for dim in dims]
+        filter_positions = [
+            (rollup.dims.index(dim), codes) for dim, codes in filter_codes.items()
+        ]
+
+        groups: dict[tuple[int, ...], list[float]] = {}
+        for key, (count, total, low, high) in rollup.groups.items():
+            if any(key[p] not in codes for p, codes in filter_positions):
+                continue
+            target = tuple(key[p] for p in positions)
+            current = groups.get(target)
+            if current is None:
+                groups[target] = [count, total, low, high]
+            else:
+                current[0] += count
+                current[1] += total
+                current[2] = min(current[2], low)
+                current[3] = max(current[3], high)
+        return groups
+
+    def _from_columns(
+        self, dims: tuple[str, ...], filter_codes: dict[str, set[int]]
+    ) -> dict[tuple[int, ...], list[float]]:
+        """Scan raw columns (for dimension sets without a rollup)."""
+        codes = self._codes[:, : self._size]
+        values = self._values[: self._size]
+        if filter_codes:
+            mask = np.ones(self._size, dtype=bool)
+            for dim, wanted in filter_codes.items():
+                mask &= np.isin(codes[DIMENSIONS.index(dim)], list(wanted))
+            codes, values = codes[:, mask], values[mask]
+
+        keys, stats = self._aggregate(codes, values, dims)
+        return {
+            tuple(key): [stats[m][row] for m in ("count", "sum", "min", "max")]
+            for row, key in enumerate(keys.tolist())
+        }
+
+    def add_rollup(self, dimensions: Sequence[str]) -> None:
+        """Materialize a new slice from the existing rows."""
+        dims = tuple(dimensions)
+        with self._lock:
+            if dims in self._rollups:
+                return
+            rollup = _Rollup(dims)
+            rollup.merge(
+                *self._aggregate(
+                    self._codes[:, : self._size], self._values[: self._size], dims
+                )
+            )
+            self._rollups[dims] = rollup
+            self._query_cache.clear()
+
+    def clear(self) -> None:
+        """Drop all rows, dictionaries and rollup contents."""
+        with self._lock:
+            self.dictionaries = {dim: DimensionDictionary() for dim in DIMENSIONS}
+            self._size = 0
+            self._rollups = {dims: _Rollup(dims) for dims in self._rollups}
+            self._row_ids.clear()
+            self._seen_ids.clear()
+            self._query_cache.clear()
+            self.version += 1
+
+
+# Bounds of the process-wide cube fed by every orchestrated query
+SHARED_CUBE_MAX_ROWS = 500_000
+SHARED_CUBE_MAX_AGE_SECONDS = 24 * 3600
+
+_cube: AggregationCube | None = None
+
+
+def get_aggregation_cube() -> AggregationCube:
+    """Get the process-wide (bounded) aggregation cube."""
+    global _cube
+    if _cube is None:
+        _cube = AggregationCube(
+            max_rows=SHARED_CUBE_MAX_ROWS,
+            max_age_seconds=SHARED_CUBE_MAX_AGE_SECONDS,
+        )
+    return _cube
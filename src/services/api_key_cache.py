@@ -0,0 +1,366 @@
+"""
+Module: services.api_key_cache
+Description: Verified API key cache and batched usage accounting
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Validating an API key used to read the key row and commit ``last_used_at`` /
+``total_requests`` on every request. Verified keys are now kept in process as
+immutable policies (status, expiry, rate limits, IP/origin allow-lists and
+scopes) keyed by the key's SHA-512 hash, and usage is counted in memory and
+written to the database in bulk.
+
+Rotation, revocation and limit changes drop the policy locally and publish a
+new version token through the shared cache; other workers re-check the token
+every ``revalidate_seconds`` and reload the key when it changed.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from src.core import get_logger
+from src.models.api_key import APIKey, APIKeyStatus
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class VerifiedAPIKey:
+    """Immutable access policy of a validated API key."""
+
+    id: str
+    name: str
+    client_id: str
+    status: str
+    tier: str
+    expires_at: datetime | None
+    allowed_ips: frozenset[str]
+    allowed_origins: frozenset[str]
+    scopes: frozenset[str]
+    rate_limits: tuple[tuple[str, int | None], ...]
+    version: str
+
+    @classmethod
+    def from_model(cls, api_key: APIKey, version: str) -> "VerifiedAPIKey":
+        expires_at = api_key.expires_at
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=UTC)
+        return cls(
+            id=str(api_key.id),
+            name=api_key.name,
+            client_id=api_key.client_id,
+            status=api_key.status,
+            tier=api_key.tier,
+            expires_at=expires_at,
+            allowed_ips=frozenset(api_key.allowed_ips or ()),
+            allowed_origins=frozenset(api_key.allowed_origins or ()),
+            scopes=frozenset(api_key.scopes or ()),
+            rate_limits=tuple(api_key.get_rate_limits().items()),
+            version=version,
+        )
+
+    @property
+    def is_active(self) -> bool:
+        """Check if key is currently active."""
+        if self.status != APIKeyStatus.ACTIVE:
+            return False
+        return not (self.expires_at and self.expires_at < datetime.now(UTC))
+
+    def get_rate_limits(self) -> dict[str, int | None]:
+        return dict(self.rate_limits)
+
+    def check_ip_allowed(self, ip: str) -> bool:
+        return not self.allowed_ips or ip in self.allowed_ips
+
+    def check_origin_allowed(self, origin: str) -> bool:
+        return not self.allowed_origins or origin in self.allowed_origins
+
+    def check_scope_allowed(self, scope: str) -> bool:
+        return not self.scopes or scope in self.scopes
+
+
+@dataclass
+class _CachedKey:
+    policy: VerifiedAPIKey
+    loaded_at: float
+    checked_at: float
+
+
+class VerifiedKeyCache:
+    """
+    In-process cache of verified key policies.
+
+    Fresh entries are served without any I/O. After ``revalidate_seconds``
+    an entry's version token is compared with the shared one (a single cache
+    read), and entries are reloaded from the database after ``ttl_seconds``.
+    """
+
+    VERSION_PREFIX = "cidadao:api_key_version:"
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        revalidate_seconds: float = 5.0,
+        max_entries: int = 10_000,
+        shared_cache: Any | None = None,
+        shared_retry_seconds: float = 30.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.revalidate_seconds = revalidate_seconds
+        self.max_entries = max_entries
+        self.shared_retry_seconds = shared_retry_seconds
+        self._shared = shared_cache
+        self._shared_down_until = 0.0
+        self._entries: OrderedDict[str, _CachedKey] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key_hash: str) -> VerifiedAPIKey | None:
+        """Cached policy for a key hash, or ``None`` when it must be loaded."""
+        entry = self._entries.get(key_hash)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        if now - entry.loaded_at >= self.ttl_seconds:
+            del self._entries[key_hash]
+            self.misses += 1
+            return None
+
+        if now - entry.checked_at >= self.revalidate_seconds:
+            version = await self._shared_version(entry.policy.id)
+            if version is not None and version != entry.policy.version:
+                # Rotated, revoked or changed on another worker
+                self._entries.pop(key_hash, None)
+                self.misses += 1
+                return None
+            entry.checked_at = now
+
+        self._entries.move_to_end(key_hash)
+        self.hits += 1
+        return entry.policy
+
+    async def put(self, key_hash: str, api_key: APIKey) -> VerifiedAPIKey:
+        """Cache the policy of a key just loaded from the database."""
+        version = await self._shared_version(str(api_key.id)) or "0"
+        policy = VerifiedAPIKey.from_model(api_key, version)
+        now = time.monotonic()
+        self._entries[key_hash] = _CachedKey(policy, now, now)
+        self._entries.move_to_end(key_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return policy
+
+    async def invalidate(self, api_key_id: str) -> None:
+        """Drop a key's policy here and publish a new version to other workers."""
+        for key_hash in [
+            h for h, e in self._entries.items() if e.policy.id == api_key_id
+        ]:
+            del self._entries[key_hash]
+
+        shared = self._shared_cache()
+        if shared is None:
+            return
+        try:
+            await shared.set(
+                f"{self.VERSION_PREFIX}{api_key_id}",
+                uuid.uuid4().hex,
+                ttl=int(self.ttl_seconds * 2),
+            )
+        except Exception as e:
+            self._mark_shared_down(e)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _shared_cache(self) -> Any | None:
+        if time.monotonic() < self._shared_down_until:
+            return None
+        if self._shared is None:
+            from src.services.cache_service import cache_service
+
+            self._shared = cache_service
+        return self._shared
+
+    async def _shared_version(self, api_key_id: str) -> str | None:
+        shared = self._shared_cache()
+        if shared is None:
+            return None
+        try:
+            version = await shared.get(f"{self.VERSION_PREFIX}{api_key_id}")
+        except Exception as e:
+            self._mark_shared_down(e)
+            return None
+        return str(version) if version is not None else None
+
+    def _mark_shared_down(self, error: Exception) -> None:
+        # Fall back to TTL-only expiry instead of retrying on every request
+        self._shared_down_until = time.monotonic() + self.shared_retry_seconds
+        logger.warning("api_key_version_store_unavailable", error=str(error))
+
+
+class APIKeyUsageAccumulator:
+    """
+    Per-key request/error counters flushed to ``api_keys`` in bulk.
+
+    Counts are increments, so every worker flushes its own share and the
+    totals stay exact.
+    """
+
+    def __init__(
+        self,
+        flush_interval_seconds: float = 10.0,
+        session_factory: Callable[[], AbstractAsyncContextManager[Any]] | None = None,
+    ):
+        self.flush_interval = flush_interval_seconds
+        self._session_factory = session_factory
+        # api_key_id -> [requests, errors, last_used_at, last_error_at]
+        self._counts: dict[str, list[Any]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(self, api_key_id: str, error: bool = False) -> None:
+        """Count one request (or one failed request) for a key."""
+        now = datetime.now(UTC)
+        counts = self._counts.get(api_key_id)
+        if counts is None:
+            counts = self._counts[api_key_id] = [0, 0, None, None]
+        if error:
+            counts[1] += 1
+            counts[3] = now
+        else:
+            counts[0] += 1
+            counts[2] = now
+        self._schedule()
+
+    def pending(self, api_key_id: str) -> tuple[int, int]:
+        """Requests and errors counted but not yet flushed."""
+        counts = self._counts.get(api_key_id)
+        return (counts[0], counts[1]) if counts else (0, 0)
+
+    async def flush(self) -> int:
+        """Write all pending counters in one statement; returns keys updated."""
+        self._bind_loop()
+        assert self._lock is not None
+        async with self._lock:
+            if not self._counts:
+                return 0
+            counts, self._counts = self._counts, {}
+            try:
+                await self._write(counts)
+            except Exception:
+                self._merge_back(counts)
+                raise
+            logger.debug("api_key_usage_flushed", keys=len(counts))
+            return len(counts)
+
+    async def close(self) -> None:
+        """Stop the periodic flusher and write what is left."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("api_key_usage_flush_failed", error=str(e))
+
+    async def _write(self, counts: dict[str, list[Any]]) -> None:
+        from sqlalchemy import bindparam, func
+
+        table = APIKey.__table__
+        statement = (
+            table.update()
+            .where(table.c.id == bindparam("key_id"))
+            .values(
+                total_requests=func.coalesce(table.c.total_requests, 0)
+                + bindparam("requests"),
+                total_errors=func.coalesce(table.c.total_errors, 0)
+                + bindparam("errors"),
+                last_used_at=func.coalesce(
+                    bindparam("used_at", type_=table.c.last_used_at.type),
+                    table.c.last_used_at,
+                ),
+                last_error_at=func.coalesce(
+                    bindparam("error_at", type_=table.c.last_error_at.type),
+                    table.c.last_error_at,
+                ),
+            )
+        )
+        rows = [
+            {
+                "key_id": key_id,
+                "requests": requests,
+                "errors": errors,
+                "used_at": used_at,
+                "error_at": error_at,
+            }
+            for key_id, (requests, errors, used_at, error_at) in counts.items()
+        ]
+        async with self._open_session() as db:
+            await db.execute(statement, rows)
+
+    def _merge_back(self, counts: dict[str, list[Any]]) -> None:
+        for key_id, (requests, errors, used_at, error_at) in counts.items():
+            current = self._counts.setdefault(key_id, [0, 0, None, None])
+            current[0] += requests
+            current[1] += errors
+            current[2] = current[2] or used_at
+            current[3] = current[3] or error_at
+
+    def _open_session(self) -> AbstractAsyncContextManager[Any]:
+        if self._session_factory is None:
+            from src.db.simple_session import get_db_session
+
+            self._session_factory = get_db_session
+        return self._session_factory()
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._task = None
+
+    def _schedule(self) -> None:
+        try:
+            self._bind_loop()
+        except RuntimeError:
+            return  # No running loop: flushed by the next async caller
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._counts:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("api_key_usage_flush_failed", error=str(e))
+
+
+_key_cache = VerifiedKeyCache()
+_usage = APIKeyUsageAccumulator()
+
+
+def get_verified_key_cache() -> VerifiedKeyCache:
+    """Process-wide verified key cache."""
+    return _key_cache
+
+
+def get_api_key_usage() -> APIKeyUsageAccumulator:
+    """Process-wide API key usage accumulator."""
+    return _usage
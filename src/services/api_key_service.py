@@ -16,6 +16,11 @@ from sqlalchemy.orm import selectinload
 from src.core import get_logger
 from src.core.exceptions import AuthenticationError, ResourceNotFoundError
 from src.models.api_key import APIKey, APIKeyRotation, APIKeyStatus, APIKeyTier
+from src.services.api_key_cache import (
+    VerifiedAPIKey,
+    get_api_key_usage,
+    get_verified_key_cache,
+)
 from src.services.cache_service import CacheService
 from src.services.notification_service import NotificationService
 
@@ -30,6 +35,8 @@ class APIKeyService:
         self.db = db_session
         self.cache = CacheService()
         self.notification_service = NotificationService()
+        self.key_cache = get_verified_key_cache()
+        self.usage = get_api_key_usage()
 
     async def create_api_key(
         self,
@@ -113,10 +120,13 @@ class APIKeyService:
         ip: str | None = None,
         origin: str | None = None,
         scope: str | None = None,
-    ) -> APIKey:
+    ) -> VerifiedAPIKey:
         """
         Validate an API key and check permissions.
 
+        Verified keys are served from the in-process policy cache and usage
+        is counted in memory, so the hot path needs no database round trip.
+
         Args:
             key: The API key to validate
             ip: Client IP address
@@ -124,32 +134,24 @@ class APIKeyService:
             scope: Required scope
 
         Returns:
-            APIKey object if valid
+            Immutable policy of the key if valid
 
         Raises:
             AuthenticationError: If key is invalid or unauthorized
         """
-        # Check cache first
-        cache_key = f"api_key:{key[:10]}"  # Use prefix for cache key
-        cached_data = await self.cache.get(cache_key)
-
-        if cached_data:
-            api_key_id = cached_data.get("api_key_id")
-            api_key = await self.get_by_id(api_key_id)
-        else:
-            # Hash the key and find in database
-            key_hash = APIKey.hash_key(key)
+        key_hash = APIKey.hash_key(key)
+        api_key = await self.key_cache.get(key_hash)
 
+        if api_key is None:
             result = await self.db.execute(
                 select(APIKey).where(APIKey.key_hash == key_hash)
             )
-            api_key = result.scalar_one_or_none()
+            db_key = result.scalar_one_or_none()
 
-            if not api_key:
+            if not db_key:
                 raise AuthenticationError("Invalid API key")
 
-            # Cache for 5 minutes
-            await self.cache.set(cache_key, {"api_key_id": str(api_key.id)}, ttl=300)
+            api_key = await self.key_cache.put(key_hash, db_key)
 
         # Check if active
         if not api_key.is_active:
@@ -167,10 +169,8 @@ class APIKeyService:
         if scope and not api_key.check_scope_allowed(scope):
             raise AuthenticationError(f"Scope {scope} not allowed")
 
-        # Update last used
-        api_key.last_used_at = datetime.now(UTC)
-        api_key.total_requests += 1
-        await self.db.commit()
+        # Update last used (flushed to the database in bulk)
+        self.usage.record(api_key.id)
 
         return api_key
 
@@ -236,8 +236,8 @@ class APIKeyService:
                 grace_period_hours=grace_period_hours,
             )
 
-            # Clear cache
-            await self.cache.delete(f"api_key:{api_key.key_prefix}*")
+            # Old hash no longer validates on any worker
+            await self.key_cache.invalidate(api_key_id)
 
             # Send notification
             if api_key.client_email:
@@ -323,8 +323,8 @@ class APIKeyService:
         await self.db.commit()
         await self.db.refresh(api_key)
 
-        # Clear cache
-        await self.cache.delete(f"api_key:{api_key.key_prefix}*")
+        # Revocation applies on every worker
+        await self.key_cache.invalidate(api_key_id)
 
         logger.warning(
             "api_key_revoked",
@@ -383,6 +383,7 @@ class APIKeyService:
 
         await self.db.commit()
         await self.db.refresh(api_key)
+        await self.key_cache.invalidate(api_key_id)
 
         return api_key
 
@@ -392,20 +393,19 @@ class APIKeyService:
         if not api_key:
             raise ResourceNotFoundError(f"API key {api_key_id} not found")
 
-        # This would integrate with your metrics system
-        # For now, return basic stats
+        # Include usage counted since the last bulk flush
+        pending_requests, pending_errors = self.usage.pending(api_key_id)
+        total_requests = (api_key.total_requests or 0) + pending_requests
+        total_errors = (api_key.total_errors or 0) + pending_errors
+
         return {
             "api_key_id": api_key_id,
-            "total_requests": api_key.total_requests,
-            "total_errors": api_key.total_errors,
+            "total_requests": total_requests,
+            "total_errors": total_errors,
             "last_used_at": (
                 api_key.last_used_at.isoformat() if api_key.last_used_at else None
             ),
-            "error_rate": (
-                api_key.total_errors / api_key.total_requests
-                if api_key.total_requests > 0
-                else 0
-            ),
+            "error_rate": (total_errors / total_requests if total_requests > 0 else 0),
         }
 
     async def cleanup_expired_keys(self) -> int:
@@ -428,6 +428,9 @@ class APIKeyService:
 
         await self.db.commit()
 
+        for api_key in expired_keys:
+            await self.key_cache.invalidate(str(api_key.id))
+
         logger.info("expired_keys_cleanup", count=len(expired_keys))
 
         return len(expired_keys)
@@ -0,0 +1,393 @@
+"""
+Module: services.cache_warming_planner
+Description: Refresh-ahead planning for cached upstream data
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Cache lookups are counted in a Count-Min sketch whose counters decay with a
+configurable half-life, and the most popular keys are kept in a small top-K
+heap. Whoever fills an entry registers how to recompute it, how long the
+recomputation took and its TTL. Every tick the planner picks the entries
+that are about to expire, ranks them by recomputation cost times
+popularity and refreshes as many as the concurrency and upstream-rate
+budgets allow; the rest wait for the next tick. The refresh point of each
+key is offset by a stable per-key fraction of its TTL, so entries filled
+together do not all hit the government APIs again at the same moment.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import math
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+# Counters are rescaled once the decay weight exceeds 2 ** RESCALE_EXPONENT
+RESCALE_EXPONENT = 64
+# Weight of the newest measurement in the recomputation cost average
+COST_SMOOTHING = 0.3
+# Floor for the recomputation cost of a key that was never timed (seconds)
+MIN_COST_SECONDS = 0.01
+
+
+class DecayedCountMinSketch:
+    """
+    Count-Min sketch with exponentially decaying counts.
+
+    Uses forward decay: an observation at time t adds 2 ** ((t - landmark) /
+    half_life) and estimates are divided by the weight of "now", so old
+    observations fade without touching every counter on each tick.
+    """
+
+    def __init__(
+        self,
+        width: int = 2048,
+        depth: int = 4,
+        half_life: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.width = width
+        self.depth = depth
+        self.half_life = half_life
+        self._clock = clock
+        self._landmark = clock()
+        self._rows = [[0.0] * width for _ in range(depth)]
+
+    def _cells(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * row : 4 * row + 4], "little") % self.width
+            for row in range(self.depth)
+        ]
+
+    def weight(self, now: float | None = None) -> float:
+        """Decay weight of an observation made at ``now``."""
+        now = self._clock() if now is None else now
+        return 2.0 ** ((now - self._landmark) / self.half_life)
+
+    def add(self, key: str, count: float = 1.0) -> float:
+        """Count ``key`` and return its undecayed (landmark-scaled) estimate."""
+        increment = count * self.weight()
+        estimate = math.inf
+        for row, cell in zip(self._rows, self._cells(key), strict=True):
+            row[cell] += increment
+            estimate = min(estimate, row[cell])
+        return estimate
+
+    def scaled(self, key: str) -> float:
+        """Estimate of ``key`` relative to the current landmark."""
+        return min(
+            row[cell] for row, cell in zip(self._rows, self._cells(key), strict=True)
+        )
+
+    def estimate(self, key: str) -> float:
+        """Decayed count of ``key`` as of now."""
+        return self.scaled(key) / self.weight()
+
+    def rescale(self) -> float:
+        """
+        Move the landmark to now once the decay weight has grown too large.
+
+        Returns the factor the counters shrank by (1.0 when nothing changed).
+        """
+        now = self._clock()
+        if (now - self._landmark) / self.half_life <= RESCALE_EXPONENT:
+            return 1.0
+        factor = self.weight(now)
+        for row in self._rows:
+            for cell in range(self.width):
+                row[cell] /= factor
+        self._landmark = now
+        return factor
+
+
+class TopK:
+    """The ``k`` highest-scoring keys, tracked with a lazily cleaned heap."""
+
+    def __init__(self, k: int = 500):
+        self.k = k
+        self._scores: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._scores
+
+    def _minimum(self) -> tuple[float, str]:
+        # Entries whose score changed since they were pushed are stale
+        while self._heap[0][0] != self._scores.get(self._heap[0][1]):
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def offer(self, key: str, score: float) -> None:
+        """Record the latest score of ``key``, evicting the weakest key if full."""
+        if key not in self._scores and len(self._scores) >= self.k:
+            lowest, weakest = self._minimum()
+            if score <= lowest:
+                return
+            heapq.heappop(self._heap)
+            del self._scores[weakest]
+        self._scores[key] = score
+        heapq.heappush(self._heap, (score, key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(s, k) for k, s in self._scores.items()]
+            heapq.heapify(self._heap)
+
+    def scale(self, factor: float) -> None:
+        """Divide every score by ``factor`` (after the sketch rescaled)."""
+        self._scores = {key: s / factor for key, s in self._scores.items()}
+        self._heap = [(s, k) for k, s in self._scores.items()]
+        heapq.heapify(self._heap)
+
+    def items(self) -> list[tuple[str, float]]:
+        """Keys and scores, highest first."""
+        return sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class TokenBucket:
+    """Non-blocking token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def take(self) -> bool:
+        """Spend one token if available."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+@dataclass
+class RefreshEntry:
+    """A cached key the planner knows how to recompute."""
+
+    key: str
+    refresh: Callable[[], Awaitable[Any]]
+    ttl: float
+    expires_at: float
+    cost: float
+    spread: float
+    not_before: float = 0.0
+    failures: int = 0
+    in_flight: bool = False
+
+
+class WarmingPlanner:
+    """Schedules refresh-ahead of popular, expensive cache entries."""
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        upstream_rate: float = 2.0,
+        refresh_ahead: float = 0.2,
+        half_life: float = 3600.0,
+        top_k: int = 500,
+        min_popularity: float = 2.0,
+        max_entries: int = 5000,
+        sketch_width: int = 2048,
+        sketch_depth: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.concurrency = concurrency
+        self.refresh_ahead = refresh_ahead
+        self.min_popularity = min_popularity
+        self.max_entries = max_entries
+        self._clock = clock
+        self.sketch = DecayedCountMinSketch(
+            sketch_width, sketch_depth, half_life, clock
+        )
+        self.top_keys = TopK(top_k)
+        self.budget = TokenBucket(upstream_rate, max(1.0, float(concurrency)), clock)
+        self._entries: dict[str, RefreshEntry] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshed": 0,
+            "failed": 0,
+            "deferred": 0,
+        }
+
+    @staticmethod
+    def _spread(key: str) -> float:
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") / 2**64
+
+    def record_access(self, key: str, hit: bool = True) -> None:
+        """Count a lookup of ``key``; hits and misses both signal demand."""
+        self.stats["hits" if hit else "misses"] += 1
+        factor = self.sketch.rescale()
+        if factor != 1.0:
+            self.top_keys.scale(factor)
+        self.top_keys.offer(key, self.sketch.add(key))
+
+    def popularity(self, key: str) -> float:
+        """Decayed number of recent lookups of ``key``."""
+        return self.sketch.estimate(key)
+
+    def top(self, limit: int = 10, prefix: str = "") -> list[tuple[str, float]]:
+        """Most popular keys (optionally under ``prefix``) with decayed counts."""
+        weight = self.sketch.weight()
+        return [
+            (key, score / weight)
+            for key, score in self.top_keys.items()
+            if key.startswith(prefix)
+        ][:limit]
+
+    def record_fill(
+        self,
+        key: str,
+        ttl: float,
+        cost: float,
+        refresh: Callable[[], Awaitable[Any]],
+    ) -> None:
+        """Register that ``key`` was just computed in ``cost`` seconds."""
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = RefreshEntry(
+                key=key,
+                refresh=refresh,
+                ttl=ttl,
+                expires_at=now + ttl,
+                cost=max(cost, MIN_COST_SECONDS),
+                spread=self._spread(key),
+            )
+            if len(self._entries) > self.max_entries:
+                self._evict()
+            return
+        entry.refresh = refresh
+        self._filled(entry, ttl, cost, now)
+
+    def _filled(self, entry: RefreshEntry, ttl: float, cost: float, now: float):
+        entry.ttl = ttl
+        entry.expires_at = now + ttl
+        entry.cost += COST_SMOOTHING * (max(cost, MIN_COST_SECONDS) - entry.cost)
+        entry.failures = 0
+        entry.not_before = 0.0
+
+    def _evict(self) -> None:
+        # Forget the least popular keys that are not being refreshed
+        idle = [e for e in self._entries.values() if not e.in_flight]
+        idle.sort(key=lambda e: self.sketch.scaled(e.key))
+        for entry in idle[: len(self._entries) - self.max_entries]:
+            del self._entries[entry.key]
+
+    def refresh_at(self, entry: RefreshEntry) -> float:
+        """When ``entry`` becomes due; between 0.5x and 1.5x the ahead window."""
+        ahead = entry.ttl * self.refresh_ahead * (0.5 + entry.spread)
+        return max(entry.expires_at - ahead, entry.not_before)
+
+    def priority(self, entry: RefreshEntry) -> float:
+        """Upstream seconds a refresh saves: recomputation cost x popularity."""
+        return entry.cost * self.popularity(entry.key)
+
+    def plan(self) -> list[RefreshEntry]:
+        """Due entries that are popular enough, most valuable first."""
+        now = self._clock()
+        due = [
+            entry
+            for entry in self._entries.values()
+            if not entry.in_flight
+            and now >= self.refresh_at(entry)
+            and self.popularity(entry.key) >= self.min_popularity
+        ]
+        due.sort(key=self.priority, reverse=True)
+        return due
+
+    async def _refresh(self, entry: RefreshEntry) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            started = self._clock()
+            try:
+                await entry.refresh()
+            except Exception as e:
+                entry.failures += 1
+                # Back off within the ahead window instead of retrying every tick
+                backoff = entry.ttl * self.refresh_ahead * 2 ** (entry.failures - 3)
+                entry.not_before = self._clock() + backoff
+                self.stats["failed"] += 1
+                logger.warning(
+                    "cache_refresh_failed",
+                    key=entry.key,
+                    failures=entry.failures,
+                    error=str(e),
+                )
+                return False
+            finally:
+                entry.in_flight = False
+            now = self._clock()
+            self._filled(entry, entry.ttl, now - started, now)
+            self.stats["refreshed"] += 1
+            return True
+
+    async def run_once(self) -> dict[str, int]:
+        """Refresh due entries within the concurrency and upstream budgets."""
+        due = self.plan()
+        started = []
+        for entry in due:
+            if not self.budget.take():
+                break
+            entry.in_flight = True
+            started.append(entry)
+
+        deferred = len(due) - len(started)
+        self.stats["deferred"] += deferred
+        results = await asyncio.gather(*(self._refresh(e) for e in started))
+        summary = {
+            "due": len(due),
+            "refreshed": sum(results),
+            "failed": len(results) - sum(results),
+            "deferred": deferred,
+        }
+        if due:
+            logger.info("cache_refresh_ahead_completed", **summary)
+        return summary
+
+    def get_stats(self) -> dict[str, Any]:
+        """Counters, hit rate and tracked key counts."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "tracked_keys": len(self.top_keys),
+            "refreshable_keys": len(self._entries),
+        }
+
+
+def create_warming_planner() -> WarmingPlanner:
+    """Planner configured from settings."""
+    from src.core.config import settings
+
+    return WarmingPlanner(
+        concurrency=settings.cache_warming_concurrency,
+        upstream_rate=settings.cache_warming_upstream_rate,
+        refresh_ahead=settings.cache_warming_refresh_ahead,
+    )
+
+
+# Global instance
+warming_planner = create_warming_planner()
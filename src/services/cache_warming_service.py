@@ -4,10 +4,16 @@ Description: Cache warming strategies for improved performance
 Author: Anderson H. Silva
 Date: 2025-01-25
 License: Proprietary - All rights reserved
+
+Besides the fixed warming strategies, request patterns and cache lookups
+feed a WarmingPlanner (services.cache_warming_planner) that refreshes
+popular, expensive entries shortly before their TTL runs out.
 """
 
 import asyncio
 import hashlib
+import random
+import time
 from datetime import UTC, datetime
 from enum import Enum
 from typing import Any
@@ -16,6 +22,7 @@ from src.core import get_logger
 from src.db.session import get_session
 from src.infrastructure.database import Investigation
 from src.services.cache_service import cache_service
+from src.services.cache_warming_planner import warming_planner
 from src.services.data_service import data_service
 from src.services.investigation_service_selector import investigation_service
 
@@ -66,20 +73,29 @@ class CacheWarmingService:
         self._config = CacheWarmingConfig()
         self._warming_tasks: set[asyncio.Task] = set()
         self._last_warming: dict[str, datetime] = {}
-        self._query_frequency: dict[str, int] = {}
+        self.planner = warming_planner
         self._warming_interval = 300  # 5 minutos
+        self._planner_interval = 15  # refresh-ahead tick
 
     async def start_warming_scheduler(self):
         """Start the cache warming scheduler."""
         logger.info("cache_warming_scheduler_started")
+        next_warming = 0.0
 
         while True:
             try:
-                # Execute warming strategies
-                await self.warm_all_caches()
+                if time.monotonic() >= next_warming:
+                    # Execute warming strategies
+                    await self.warm_all_caches()
+                    # Jitter the period so replicas do not warm in lockstep
+                    next_warming = time.monotonic() + self._warming_interval * (
+                        random.uniform(0.9, 1.1)
+                    )
+                else:
+                    await self.planner.run_once()
 
-                # Wait for next interval
-                await asyncio.sleep(self._warming_interval)
+                # Wait for next refresh-ahead tick
+                await asyncio.sleep(self._planner_interval)
 
             except asyncio.CancelledError:
                 logger.info("cache_warming_scheduler_stopped")
@@ -138,13 +154,7 @@ class CacheWarmingService:
 
                 # Fetch and cache
                 try:
-                    contract_data = await data_service.get_contract(contract_id)
-                    if contract_data:
-                        await cache_service.set(
-                            cache_key,
-                            contract_data,
-                            ttl=self._config.TTL_CONFIG["contracts"],
-                        )
+                    if await self._warm_contract(contract_id):
                         warmed_count += 1
                 except Exception as e:
                     logger.error(f"Failed to warm contract {contract_id}: {e}")
@@ -157,6 +167,35 @@ class CacheWarmingService:
             logger.error("popular_data_warming_failed", error=str(e))
             raise
 
+    async def _store_contract(self, contract_id: str) -> bool:
+        """Fetch a contract and cache it."""
+        contract_data = await data_service.get_contract(contract_id)
+        if contract_data:
+            await cache_service.set(
+                f"contract:{contract_id}",
+                contract_data,
+                ttl=self._config.TTL_CONFIG["contracts"],
+            )
+        return bool(contract_data)
+
+    async def _warm_contract(self, contract_id: str) -> bool:
+        """Cache a contract and register it for refresh-ahead."""
+        started = time.monotonic()
+        if not await self._store_contract(contract_id):
+            return False
+
+        async def refresh() -> None:
+            if not await self._store_contract(contract_id):
+                raise LookupError(f"Contract {contract_id} is no longer available")
+
+        self.planner.record_fill(
+            f"contract:{contract_id}",
+            self._config.TTL_CONFIG["contracts"],
+            time.monotonic() - started,
+            refresh,
+        )
+        return True
+
     async def _warm_recent_investigations(self) -> dict[str, Any]:
         """Warm cache with recent investigations."""
         warmed_count = 0
@@ -201,29 +240,13 @@ class CacheWarmingService:
             raise
 
     async def _warm_frequent_queries(self) -> dict[str, Any]:
-        """Warm cache with results of frequent queries."""
-        warmed_count = 0
-
+        """Refresh popular cached entries that are about to expire."""
         try:
-            # Sort queries by frequency
-            frequent_queries = sorted(
-                self._query_frequency.items(), key=lambda x: x[1], reverse=True
-            )[: self._config.MAX_ITEMS_PER_TYPE["queries"]]
+            summary = await self.planner.run_once()
 
-            for query_hash, frequency in frequent_queries:
-                cache_key = f"query_result:{query_hash}"
+            logger.info("frequent_queries_warmed", count=summary["refreshed"])
 
-                # Skip if already cached
-                if await cache_service.get(cache_key):
-                    continue
-
-                # Note: In a real implementation, you would store and replay
-                # the actual query parameters to regenerate results
-                warmed_count += 1
-
-            logger.info("frequent_queries_warmed", count=warmed_count)
-
-            return {"queries": warmed_count}
+            return {"queries": summary["refreshed"], **summary}
 
         except Exception as e:
             logger.error("frequent_queries_warming_failed", error=str(e))
@@ -305,37 +328,44 @@ class CacheWarmingService:
         """
         Get list of popular/recent contract IDs for cache warming.
 
-        Uses DataService to fetch real contract IDs from Portal da Transparência.
-        Falls back to empty list if API is unavailable.
+        Contracts requested most often recently come first; the rest of the
+        list is topped up with recent contract IDs from DataService (Portal
+        da Transparência). Falls back to the popular ones if the API is
+        unavailable.
         """
+        limit = self._config.MAX_ITEMS_PER_TYPE.get("contracts", 100)
+        contract_ids = [
+            key.removeprefix("contract:")
+            for key, _ in self.planner.top(limit, prefix="contract:")
+        ]
         try:
-            # Get recent contract IDs from DataService
-            contract_ids = await data_service.get_recent_contract_ids(
-                limit=self._config.MAX_ITEMS_PER_TYPE.get("contracts", 100)
-            )
+            if len(contract_ids) < limit:
+                # Get recent contract IDs from DataService
+                recent = await data_service.get_recent_contract_ids(limit=limit)
+                contract_ids += [i for i in recent if i not in contract_ids]
             logger.info("popular_contracts_fetched", count=len(contract_ids))
-            return contract_ids
+            return contract_ids[:limit]
 
         except Exception as e:
             logger.error("failed_to_fetch_popular_contracts", error=str(e))
-            # Return empty list - cache warming will gracefully handle this
-            return []
+            # Popular contracts only - cache warming will gracefully handle this
+            return contract_ids
 
     def track_query(self, query_params: dict[str, Any]):
         """Track query frequency for cache warming."""
         # Generate query hash
-        query_str = str(sorted(query_params.items()))
-        query_hash = hashlib.md5(query_str.encode()).hexdigest()
+        query_hash = query_params.get("hash")
+        if query_hash is None:
+            query_str = str(sorted(query_params.items()))
+            query_hash = hashlib.md5(query_str.encode()).hexdigest()
 
-        # Update frequency
-        self._query_frequency[query_hash] = self._query_frequency.get(query_hash, 0) + 1
+        # Update decayed frequency
+        self.planner.record_access(f"query:{query_hash}")
 
-        # Limit stored queries
-        if len(self._query_frequency) > 1000:
-            # Remove least frequent queries
-            sorted_queries = sorted(self._query_frequency.items(), key=lambda x: x[1])
-            for query, _ in sorted_queries[:100]:
-                del self._query_frequency[query]
+        # Requests for a contract make its cache entry popular
+        contract_id = (query_params.get("path_params") or {}).get("contract_id")
+        if contract_id:
+            self.planner.record_access(f"contract:{contract_id}")
 
     async def warm_specific_data(
         self, data_type: str, identifiers: list[str], ttl: int | None = None
@@ -378,12 +408,12 @@ class CacheWarmingService:
         """Get current cache warming status."""
         status = {
             "last_warming": self._last_warming.get("all"),
-            "query_frequency_tracked": len(self._query_frequency),
-            "top_queries": sorted(
-                self._query_frequency.items(), key=lambda x: x[1], reverse=True
-            )[:10],
+            "query_frequency_tracked": len(self.planner.top_keys),
+            "top_queries": self.planner.top(10, prefix="query:"),
+            "refresh_ahead": self.planner.get_stats(),
             "config": {
                 "interval_seconds": self._warming_interval,
+                "refresh_interval_seconds": self._planner_interval,
                 "ttls": self._config.TTL_CONFIG,
                 "limits": self._config.MAX_ITEMS_PER_TYPE,
             },
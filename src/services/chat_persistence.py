@@ -0,0 +1,589 @@
+"""
+Write-behind persistence for chat sessions and messages.
+
+A chat turn used to open three or four transactions on the request path
+(session lookup, one insert per message, investigation update). Messages are
+now appended to an in-memory log and written by a background flusher: one
+multi-row INSERT per flush plus a single coalesced UPDATE per touched session
+(``message_count``, ``last_message_at``, ``updated_at``, title and current
+investigation). Active sessions are served from a bounded cache.
+
+Messages get their id and ``created_at`` when buffered, so readers merge
+persisted rows with pending ones and always see their own writes. A flush
+runs every ``flush_interval_ms`` or as soon as ``max_batch`` messages are
+pending; ``close()`` drains the log on shutdown.
+
+A failed batch is retried session by session, each in its own transaction,
+so one bad session cannot block the others. Failing sessions are retried
+with exponential backoff and never dropped for failing alone. The buffer is
+bounded instead: beyond ``max_pending`` messages the sessions failing
+longest are shed first (their cache entries too), then the oldest rows.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+
+def _utcnow() -> datetime:
+    """Naive UTC datetime compatible with 'timestamp without time zone' columns."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+@dataclass
+class _SessionDelta:
+    """Metadata changes of one session accumulated between flushes."""
+
+    messages: int = 0
+    last_message_at: datetime | None = None
+    title: str | None = None
+    investigation_id: str | None = None
+    create: dict[str, Any] | None = None  # row for a session not yet in the DB
+    touched_at: datetime = field(default_factory=_utcnow)
+
+    def merge_into(self, newer: "_SessionDelta") -> None:
+        """Fold this (older) delta under ``newer`` after a failed flush."""
+        newer.messages += self.messages
+        newer.last_message_at = newer.last_message_at or self.last_message_at
+        newer.title = newer.title or self.title
+        newer.investigation_id = newer.investigation_id or self.investigation_id
+        newer.create = newer.create or self.create
+
+
+class ChatWriteBehindLog:
+    """
+    Buffered chat writes plus a hot cache of active sessions.
+
+    All methods must be called from the event loop; flushes are serialized
+    by a lock so a message is never written twice.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AbstractAsyncContextManager[Any]] | None = None,
+        flush_interval_ms: int = 200,
+        max_batch: int = 100,
+        max_pending: int = 10_000,
+        max_retries: int = 3,
+        retry_backoff_ms: int = 500,
+        max_backoff_seconds: float = 60.0,
+        session_cache_size: int = 1024,
+        session_ttl_seconds: float = 900.0,
+    ) -> None:
+        """
+        Initialize the log.
+
+        Args:
+            session_factory: Async context manager yielding a DB session
+            flush_interval_ms: Background flush period
+            max_batch: Pending messages that trigger an immediate flush
+            max_pending: Bound of the buffer; excess messages are shed
+            max_retries: Failed attempts after which a session counts as
+                isolated (shed first when the buffer overflows)
+            retry_backoff_ms: First retry delay of a failing session
+            max_backoff_seconds: Cap of the exponential retry delay
+            session_cache_size: Active sessions kept in the cache
+            session_ttl_seconds: Lifetime of a cached session
+        """
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.max_backoff = max_backoff_seconds
+        self.session_cache_size = session_cache_size
+        self.session_ttl_seconds = session_ttl_seconds
+
+        self._pending: list[dict[str, Any]] = []
+        self._deltas: dict[str, _SessionDelta] = {}
+        self._inflight: list[dict[str, Any]] = []
+        self._sessions: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._last_created: dict[str, datetime] = {}
+        # session id -> (failed attempts, monotonic time of the next retry)
+        self._retries: dict[str, tuple[int, float]] = {}
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+        self.flushes = 0
+        self.flushed_messages = 0
+        self.dropped_messages = 0
+
+    # ------------------------------------------------------------------
+    # Session cache
+    # ------------------------------------------------------------------
+
+    def cached_session(self, session_id: str) -> Any | None:
+        """Active session from the cache (``None`` on miss or expiry)."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.session_ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+
+    def remember_session(self, session: Any, new: bool = False) -> None:
+        """
+        Cache a detached session object.
+
+        ``new`` sessions are inserted by the next flush, ahead of their
+        messages.
+        """
+        self._sessions[session.id] = (time.monotonic(), session)
+        self._sessions.move_to_end(session.id)
+        while len(self._sessions) > self.session_cache_size:
+            # Sessions with unflushed changes stay reachable for readers
+            victim = next((s for s in self._sessions if s not in self._deltas), None)
+            if victim is None:
+                break
+            del self._sessions[victim]
+        if new:
+            self._delta(session.id).create = {
+                "id": session.id,
+                "user_id": session.user_id,
+                "status": session.status,
+                "context": session.context or {},
+                "message_count": 0,
+                "created_at": session.created_at,
+                "updated_at": session.updated_at,
+            }
+
+    # ------------------------------------------------------------------
+    # Buffered writes
+    # ------------------------------------------------------------------
+
+    async def append_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        agent_id: str | None = None,
+        title: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Buffer a message and its session metadata update.
+
+        Returns the pending row; it is visible to :meth:`pending_messages`
+        immediately and written by the next flush.
+        """
+        now = _utcnow()
+        # Strictly increasing timestamps keep the chronological order of a
+        # session's messages even when a batch shares the same clock tick
+        previous = self._last_created.get(session_id)
+        if previous is not None and now <= previous:
+            now = previous + timedelta(microseconds=1)
+        self._last_created[session_id] = now
+
+        row = {
+            "id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "agent_id": agent_id,
+            "message_metadata": {},
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._pending.append(row)
+
+        delta = self._delta(session_id)
+        delta.messages += 1
+        delta.last_message_at = now
+        if title is not None:
+            delta.title = title
+
+        session = self.cached_session(session_id)
+        if session is not None:
+            session.message_count = (session.message_count or 0) + 1
+            session.last_message_at = now
+            session.updated_at = now
+            if title is not None:
+                session.title = title
+
+        if len(self._pending) >= self.max_pending:
+            # Back-pressure: the database is falling behind
+            try:
+                await self.flush(due_only=True)
+            except Exception as e:
+                logger.warning(
+                    "chat_write_behind_flush_failed",
+                    error=str(e),
+                    pending=len(self._pending),
+                )
+            self._shed()
+        else:
+            self._schedule(urgent=len(self._pending) >= self.max_batch)
+        return row
+
+    def set_investigation(self, session_id: str, investigation_id: str) -> None:
+        """Buffer the session's current investigation."""
+        self._delta(session_id).investigation_id = investigation_id
+        session = self.cached_session(session_id)
+        if session is not None:
+            session.current_investigation_id = investigation_id
+            session.updated_at = _utcnow()
+        self._schedule()
+
+    def pending_messages(self, session_id: str) -> list[dict[str, Any]]:
+        """Buffered or in-flight messages of a session, oldest first."""
+        rows = [
+            row
+            for row in (*self._inflight, *self._pending)
+            if row["session_id"] == session_id
+        ]
+        rows.sort(key=lambda row: row["created_at"])
+        return rows
+
+    def has_pending(self, session_id: str | None = None) -> bool:
+        """Whether anything (or anything for ``session_id``) awaits a flush."""
+        if session_id is None:
+            return bool(self._pending or self._deltas)
+        return session_id in self._deltas or any(
+            row["session_id"] == session_id for row in self._pending
+        )
+
+    async def forget(self, session_id: str) -> None:
+        """
+        Drop a session's cached state and unflushed writes.
+
+        Waits for an in-flight flush so a following DELETE is not undone.
+        """
+        self._pending = [r for r in self._pending if r["session_id"] != session_id]
+        self._deltas.pop(session_id, None)
+        self._sessions.pop(session_id, None)
+        self._last_created.pop(session_id, None)
+        self._retries.pop(session_id, None)
+        await self.flush()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def flush(self, due_only: bool = False) -> int:
+        """
+        Write what is buffered; returns the messages written.
+
+        Args:
+            due_only: Hold back sessions still waiting out a retry backoff
+                (the background flusher); explicit flushes retry everything
+
+        Raises:
+            Exception: The first write error when nothing could be written
+        """
+        self._bind_loop()
+        assert self._lock is not None
+        async with self._lock:
+            now = time.monotonic()
+            held = (
+                {sid for sid, (_, retry_at) in self._retries.items() if retry_at > now}
+                if due_only
+                else set()
+            )
+            rows = [r for r in self._pending if r["session_id"] not in held]
+            deltas = {sid: d for sid, d in self._deltas.items() if sid not in held}
+            if not rows and not deltas:
+                return 0
+            self._pending = [r for r in self._pending if r["session_id"] in held]
+            self._deltas = {sid: d for sid, d in self._deltas.items() if sid in held}
+            self._inflight = rows
+            try:
+                written = await self._write_isolated(rows, deltas)
+            finally:
+                self._inflight = []
+                self._shed()
+
+            self.flushes += 1
+            self.flushed_messages += written
+            logger.debug(
+                "chat_write_behind_flushed",
+                messages=written,
+                sessions=len(deltas),
+            )
+            return written
+
+    async def close(self) -> None:
+        """Stop the background flusher and drain the log."""
+        self._closed = True
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("chat_write_behind_close_failed", error=str(e))
+
+    async def _write_isolated(
+        self, rows: list[dict[str, Any]], deltas: dict[str, _SessionDelta]
+    ) -> int:
+        """
+        Write a batch, falling back to one transaction per session.
+
+        Failed sessions are requeued with backoff. When the first two
+        isolated writes both fail the database itself is taken to be down
+        and the remaining sessions are requeued without being tried.
+        """
+        try:
+            await self._write(rows, deltas)
+        except Exception as e:
+            batch_error = e
+        else:
+            for session_id in {*deltas, *(r["session_id"] for r in rows)}:
+                self._retries.pop(session_id, None)
+            return len(rows)
+
+        groups: dict[str, list[dict[str, Any]]] = {sid: [] for sid in deltas}
+        for row in rows:
+            groups.setdefault(row["session_id"], []).append(row)
+        if len(groups) == 1:
+            self._requeue_failed(groups, deltas, batch_error)
+            raise batch_error
+
+        written = 0
+        failed: dict[str, list[dict[str, Any]]] = {}
+        error: Exception | None = None
+        for session_id, session_rows in groups.items():
+            if not written and len(failed) >= 2:
+                failed[session_id] = session_rows
+                continue
+            delta = deltas.get(session_id)
+            try:
+                await self._write(
+                    session_rows, {session_id: delta} if delta is not None else {}
+                )
+            except Exception as e:
+                error = error or e
+                failed[session_id] = session_rows
+            else:
+                written += len(session_rows)
+                self._retries.pop(session_id, None)
+
+        if failed:
+            self._requeue_failed(failed, deltas, error or batch_error)
+        if not written and error is not None:
+            raise error
+        return written
+
+    async def _write(
+        self, rows: list[dict[str, Any]], deltas: dict[str, _SessionDelta]
+    ) -> None:
+        """One transaction: new sessions, a multi-row INSERT, coalesced UPDATEs."""
+        from sqlalchemy import func, insert, select, update
+
+        from src.models.chat import ChatMessage as DBChatMessage
+        from src.models.chat import ChatSession as DBChatSession
+
+        async with self._open_session() as db:
+            new_sessions = [d.create for d in deltas.values() if d.create]
+            if new_sessions:
+                # Another worker may have created the same session meanwhile
+                result = await db.execute(
+                    select(DBChatSession.id).where(
+                        DBChatSession.id.in_([s["id"] for s in new_sessions])
+                    )
+                )
+                existing = set(result.scalars().all())
+                missing = [s for s in new_sessions if s["id"] not in existing]
+                if missing:
+                    await db.execute(insert(DBChatSession).values(missing))
+
+            if rows:
+                await db.execute(insert(DBChatMessage).values(rows))
+
+            for session_id, delta in deltas.items():
+                values: dict[str, Any] = {"updated_at": delta.touched_at}
+                if delta.messages:
+                    values["message_count"] = (
+                        func.coalesce(DBChatSession.message_count, 0) + delta.messages
+                    )
+                    values["last_message_at"] = delta.last_message_at
+                    values["updated_at"] = max(
+                        delta.touched_at, delta.last_message_at or delta.touched_at
+                    )
+                if delta.title is not None:
+                    values["title"] = delta.title
+                if delta.investigation_id is not None:
+                    values["current_investigation_id"] = delta.investigation_id
+                await db.execute(
+                    update(DBChatSession)
+                    .where(DBChatSession.id == session_id)
+                    .values(**values)
+                )
+
+    def _open_session(self) -> AbstractAsyncContextManager[Any]:
+        if self._session_factory is None:
+            from src.db.simple_session import get_db_session
+
+            self._session_factory = get_db_session
+        return self._session_factory()
+
+    def _requeue_failed(
+        self,
+        groups: dict[str, list[dict[str, Any]]],
+        deltas: dict[str, _SessionDelta],
+        error: Exception,
+    ) -> None:
+        """Put failed sessions back ahead of anything buffered since."""
+        now = time.monotonic()
+        rows = [row for session_rows in groups.values() for row in session_rows]
+        rows.sort(key=lambda row: row["created_at"])
+        self._pending = rows + self._pending
+        for session_id, session_rows in groups.items():
+            delta = deltas.get(session_id)
+            if delta is not None:
+                newer = self._deltas.get(session_id)
+                if newer is None:
+                    self._deltas[session_id] = delta
+                else:
+                    delta.merge_into(newer)
+
+            attempts = self._retries.get(session_id, (0, 0.0))[0] + 1
+            delay = min(self.retry_backoff * 2 ** (attempts - 1), self.max_backoff)
+            self._retries[session_id] = (attempts, now + delay)
+            if attempts == self.max_retries + 1:
+                logger.warning(
+                    "chat_session_writes_isolated",
+                    session_id=session_id,
+                    attempts=attempts,
+                    pending=len(session_rows),
+                    error=str(error),
+                )
+
+    def _shed(self) -> None:
+        """
+        Enforce ``max_pending``.
+
+        Isolated sessions (failing past ``max_retries``) are dropped whole,
+        longest failing first; if that is not enough the oldest messages go.
+        """
+        excess = len(self._pending) - self.max_pending
+        if excess <= 0:
+            return
+
+        isolated = sorted(
+            (sid for sid, (n, _) in self._retries.items() if n > self.max_retries),
+            key=lambda sid: self._retries[sid][0],
+            reverse=True,
+        )
+        for session_id in isolated:
+            if excess <= 0:
+                break
+            excess -= self._drop_session(session_id)
+
+        if excess > 0:
+            dropped, self._pending = self._pending[:excess], self._pending[excess:]
+            for row in dropped:
+                delta = self._deltas.get(row["session_id"])
+                if delta is not None and delta.messages:
+                    delta.messages -= 1
+                session = self._sessions.get(row["session_id"])
+                if session is not None and session[1].message_count:
+                    session[1].message_count -= 1
+            self.dropped_messages += len(dropped)
+            logger.error("chat_write_behind_dropped", messages=len(dropped))
+
+    def _drop_session(self, session_id: str) -> int:
+        """
+        Discard a session's unflushed writes; returns the messages dropped.
+
+        Its cache entry goes too: a session whose create was dropped does
+        not exist in the database, and counts of an existing one are stale.
+        """
+        before = len(self._pending)
+        self._pending = [r for r in self._pending if r["session_id"] != session_id]
+        dropped = before - len(self._pending)
+        delta = self._deltas.pop(session_id, None)
+        self._sessions.pop(session_id, None)
+        self._last_created.pop(session_id, None)
+        self._retries.pop(session_id, None)
+        self.dropped_messages += dropped
+        logger.error(
+            "chat_session_writes_dropped",
+            session_id=session_id,
+            messages=dropped,
+            session_create=bool(delta and delta.create),
+        )
+        return dropped
+
+    def _delta(self, session_id: str) -> _SessionDelta:
+        delta = self._deltas.get(session_id)
+        if delta is None:
+            delta = self._deltas[session_id] = _SessionDelta()
+        else:
+            delta.touched_at = _utcnow()
+        return delta
+
+    # ------------------------------------------------------------------
+    # Background flusher
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self) -> None:
+        """(Re)create loop-bound primitives when the running loop changes."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._wake = asyncio.Event()
+            self._task = None
+
+    def _schedule(self, urgent: bool = False) -> None:
+        self._bind_loop()
+        if self._task is None or self._task.done():
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+        if urgent:
+            assert self._wake is not None
+            self._wake.set()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        wake = self._wake
+        while not self._closed:
+            try:
+                await asyncio.wait_for(wake.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            wake.clear()
+            if not self.has_pending():
+                if not self._inflight:
+                    # Idle: the next write restarts the flusher
+                    return
+                continue
+            try:
+                await self.flush(due_only=True)
+            except Exception as e:
+                logger.warning(
+                    "chat_write_behind_flush_failed",
+                    error=str(e),
+                    pending=len(self._pending),
+                )
+
+
+_log: ChatWriteBehindLog | None = None
+
+
+def get_chat_write_behind_log() -> ChatWriteBehindLog:
+    """Process-wide write-behind log shared by every ChatService."""
+    global _log
+    if _log is None:
+        _log = ChatWriteBehindLog()
+    return _log
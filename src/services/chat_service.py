@@ -17,6 +17,7 @@ from src.agents import BaseAgent
 from src.core import get_logger
 from src.services.agent_routing import get_agent_for_intent as centralized_get_agent
 from src.services.cache_service import cache_service
+from src.services.chat_persistence import get_chat_write_behind_log
 from src.utils.organization_mapping import get_organization_mapper
 
 logger = get_logger(__name__)
@@ -578,11 +579,14 @@ class IntentDetector:
 class ChatService:
     """Service for managing chat sessions and conversations.
 
-    Persists sessions and messages to PostgreSQL via SQLAlchemy.
+    Persists sessions and messages to PostgreSQL via SQLAlchemy. Writes go
+    through the shared write-behind log, which batches message inserts and
+    session updates off the request path and caches active sessions.
     """
 
     def __init__(self) -> None:
         self.cache = cache_service
+        self.write_behind = get_chat_write_behind_log()
 
         # Initialize agents lazily to avoid import-time errors
         self.agents = None
@@ -592,35 +596,41 @@ class ChatService:
         self, session_id: str, user_id: str | None = None
     ):
         """Get existing session or create new one (persisted to DB)."""
-        from sqlalchemy import select
+        session = self.write_behind.cached_session(session_id)
+        if session is not None:
+            session.updated_at = _utcnow()
+            return session
+
+        session = await self._load_session(session_id)
+        if session is not None:
+            session.updated_at = _utcnow()
+            return session
 
-        from src.db.simple_session import get_db_session
         from src.models.chat import ChatSession as DBChatSession
 
-        async with get_db_session() as db:
-            result = await db.execute(
-                select(DBChatSession).where(DBChatSession.id == session_id)
-            )
-            session = result.scalar_one_or_none()
+        now = _utcnow()
+        session = DBChatSession(
+            id=session_id,
+            user_id=user_id,
+            status="active",
+            context={},
+            message_count=0,
+            created_at=now,
+            updated_at=now,
+        )
+        # Inserted by the next flush, ahead of the session's messages
+        self.write_behind.remember_session(session, new=True)
+        return session
 
-            if session:
-                session.updated_at = _utcnow()
-                return session
-
-            session = DBChatSession(
-                id=session_id,
-                user_id=user_id,
-                status="active",
-                context={},
-                message_count=0,
-            )
-            db.add(session)
-            await db.flush()
-            await db.refresh(session)
+    async def get_session(self, session_id: str):
+        """Get session by ID (cached while active)."""
+        session = self.write_behind.cached_session(session_id)
+        if session is not None:
             return session
+        return await self._load_session(session_id)
 
-    async def get_session(self, session_id: str):
-        """Get session by ID from DB."""
+    async def _load_session(self, session_id: str):
+        """Read a session from the DB and cache it."""
         from sqlalchemy import select
 
         from src.db.simple_session import get_db_session
@@ -630,54 +640,42 @@ class ChatService:
             result = await db.execute(
                 select(DBChatSession).where(DBChatSession.id == session_id)
             )
-            return result.scalar_one_or_none()
+            session = result.scalar_one_or_none()
+        if session is not None:
+            self.write_behind.remember_session(session)
+        return session
 
     async def save_message(
         self, session_id: str, role: str, content: str, agent_id: str | None = None
     ) -> None:
-        """Save message to DB and update session metadata."""
+        """Buffer a message; it and the session metadata are written in batches."""
         import json as json_mod
 
-        from sqlalchemy import select
-
-        from src.db.simple_session import get_db_session
-        from src.models.chat import ChatMessage as DBChatMessage
-        from src.models.chat import ChatSession as DBChatSession
-
         # Serialize dict content
         if isinstance(content, dict):
             content_str = json_mod.dumps(content, ensure_ascii=False, default=str)
         else:
             content_str = str(content) if content else ""
 
-        async with get_db_session() as db:
-            message = DBChatMessage(
-                session_id=session_id,
-                role=role,
-                content=content_str,
-                agent_id=agent_id,
-            )
-            db.add(message)
-
-            # Update session metadata
-            result = await db.execute(
-                select(DBChatSession).where(DBChatSession.id == session_id)
-            )
-            session = result.scalar_one_or_none()
-            if session:
-                now = _utcnow()
-                session.last_message_at = now
-                session.updated_at = now
-                session.message_count = (session.message_count or 0) + 1
+        # Auto-generate title from first user message
+        title = None
+        if role == "user":
+            session = await self.get_session(session_id)
+            if session is not None and not session.message_count:
+                title = self._generate_title(content_str)
 
-                # Auto-generate title from first user message
-                if session.message_count == 1 and role == "user":
-                    session.title = self._generate_title(content_str)
+        await self.write_behind.append_message(
+            session_id, role, content_str, agent_id=agent_id, title=title
+        )
 
     async def get_session_messages(
         self, session_id: str, limit: int = 50
     ) -> list[dict[str, Any]]:
-        """Get messages for a session from DB, ordered chronologically."""
+        """Get messages for a session, ordered chronologically.
+
+        Messages still waiting in the write-behind log are merged in, so a
+        caller always reads its own writes.
+        """
         from sqlalchemy import select
 
         from src.db.simple_session import get_db_session
@@ -690,9 +688,7 @@ class ChatService:
                 .order_by(DBChatMessage.created_at.asc())
                 .limit(limit)
             )
-            messages = result.scalars().all()
-
-            return [
+            messages = [
                 {
                     "id": msg.id,
                     "role": msg.role,
@@ -702,9 +698,24 @@ class ChatService:
                     ),
                     "agent_id": msg.agent_id,
                 }
-                for msg in messages
+                for msg in result.scalars().all()
             ]
 
+        if len(messages) < limit:
+            seen = {msg["id"] for msg in messages}
+            messages.extend(
+                {
+                    "id": row["id"],
+                    "role": row["role"],
+                    "content": row["content"],
+                    "timestamp": row["created_at"].isoformat(),
+                    "agent_id": row["agent_id"],
+                }
+                for row in self.write_behind.pending_messages(session_id)
+                if row["id"] not in seen
+            )
+        return messages[:limit]
+
     async def clear_session(self, session_id: str) -> None:
         """Soft-delete session and remove its messages."""
         from sqlalchemy import delete, select
@@ -713,6 +724,8 @@ class ChatService:
         from src.models.chat import ChatMessage as DBChatMessage
         from src.models.chat import ChatSession as DBChatSession
 
+        await self.write_behind.forget(session_id)
+
         async with get_db_session() as db:
             # Delete messages (FK CASCADE would also handle this)
             await db.execute(
@@ -738,6 +751,9 @@ class ChatService:
         from src.db.simple_session import get_db_session
         from src.models.chat import ChatSession as DBChatSession
 
+        # Counts and activity times are coalesced in the log until flushed
+        await self.write_behind.flush()
+
         async with get_db_session() as db:
             result = await db.execute(
                 select(DBChatSession)
@@ -760,6 +776,8 @@ class ChatService:
         from src.models.chat import ChatMessage as DBChatMessage
         from src.models.chat import ChatSession as DBChatSession
 
+        await self.write_behind.forget(session_id)
+
         async with get_db_session() as db:
             await db.execute(
                 delete(DBChatMessage).where(
@@ -781,20 +799,8 @@ class ChatService:
     async def update_session_investigation(
         self, session_id: str, investigation_id: str
     ) -> None:
-        """Update session with current investigation ID in DB."""
-        from sqlalchemy import select
-
-        from src.db.simple_session import get_db_session
-        from src.models.chat import ChatSession as DBChatSession
-
-        async with get_db_session() as db:
-            result = await db.execute(
-                select(DBChatSession).where(DBChatSession.id == session_id)
-            )
-            session = result.scalar_one_or_none()
-            if session:
-                session.current_investigation_id = investigation_id
-                session.updated_at = _utcnow()
+        """Set the session's current investigation (written with the next flush)."""
+        self.write_behind.set_investigation(session_id, investigation_id)
 
     @staticmethod
     def _generate_title(content: str) -> str:
@@ -0,0 +1,150 @@
+"""
+Module: services.cidr_matcher
+Description: Precompiled IPv4/IPv6 prefix matcher for whitelists and blocklists
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Networks are compiled once into an immutable longest-prefix table per IP
+version: one hash table per prefix length present, keyed by the masked
+network address. A lookup masks the address for each length, longest
+first, so it costs at most one probe per distinct prefix length (33 for
+IPv4, 129 for IPv6) no matter how many ranges are loaded. Entries may
+carry an expiry; expired entries never match and ``next_expiry`` tells
+owners when to rebuild without them.
+"""
+
+import ipaddress
+import math
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+IPAddress = ipaddress.IPv4Address | ipaddress.IPv6Address
+
+_BITS = {4: 32, 6: 128}
+_NETWORK_TYPES = {4: ipaddress.IPv4Network, 6: ipaddress.IPv6Network}
+
+
+@lru_cache(maxsize=4096)
+def parse_network(value: str) -> IPNetwork:
+    """Parse ``a.b.c.d[/n]`` or an IPv6 equivalent (host bits are dropped)."""
+    return ipaddress.ip_network(value, strict=False)
+
+
+def _address(ip: str | IPAddress) -> IPAddress:
+    address = ipaddress.ip_address(ip) if isinstance(ip, str) else ip
+    # IPv4 clients seen through a dual-stack socket (::ffff:a.b.c.d)
+    if address.version == 6 and address.ipv4_mapped is not None:
+        return address.ipv4_mapped
+    return address
+
+
+def _expiry_timestamp(expires_at: datetime | float | None) -> float:
+    if expires_at is None:
+        return math.inf
+    if isinstance(expires_at, datetime):
+        return expires_at.timestamp()
+    return float(expires_at)
+
+
+class CIDRMatcher:
+    """
+    Immutable set of networks with O(prefix length) membership tests.
+
+    Build it from network strings, ``ipaddress`` networks or
+    ``(network, expires_at)`` pairs; single addresses are /32 or /128
+    networks. Invalid entries are skipped and counted in ``invalid``.
+    """
+
+    __slots__ = ("_tables", "invalid", "next_expiry", "size")
+
+    def __init__(self, entries: Iterable[Any] = ()) -> None:
+        grouped: dict[int, dict[int, dict[int, float]]] = {4: {}, 6: {}}
+        self.invalid = 0
+        self.size = 0
+        self.next_expiry = math.inf
+
+        for entry in entries:
+            value, expires_at = entry if isinstance(entry, tuple) else (entry, None)
+            try:
+                network = value if not isinstance(value, str) else parse_network(value)
+                if network.version == 6 and network.prefixlen >= 96:
+                    mapped = network.network_address.ipv4_mapped
+                    if mapped is not None:
+                        network = ipaddress.ip_network(
+                            f"{mapped}/{network.prefixlen - 96}"
+                        )
+            except ValueError:
+                self.invalid += 1
+                continue
+
+            expiry = _expiry_timestamp(expires_at)
+            table = grouped[network.version].setdefault(network.prefixlen, {})
+            key = int(network.network_address)
+            # Duplicate networks keep the latest expiry
+            table[key] = max(table.get(key, -math.inf), expiry)
+            self.size += 1
+            self.next_expiry = min(self.next_expiry, expiry)
+
+        # Per version: (prefix length, mask, table), longest prefix first
+        self._tables: dict[int, tuple[tuple[int, int, dict[int, float]], ...]] = {
+            version: tuple(
+                (plen, _mask(_BITS[version], plen), tables[plen])
+                for plen in sorted(tables, reverse=True)
+            )
+            for version, tables in grouped.items()
+        }
+
+    def match(
+        self, ip: str | IPAddress, now: datetime | float | None = None
+    ) -> IPNetwork | None:
+        """Most specific unexpired network containing ``ip`` (None if none)."""
+        try:
+            address = _address(ip)
+        except ValueError:
+            return None
+        moment = _now(now)
+        value = int(address)
+        for plen, mask, table in self._tables[address.version]:
+            key = value & mask
+            expiry = table.get(key)
+            if expiry is not None and expiry > moment:
+                return _NETWORK_TYPES[address.version]((key, plen))
+        return None
+
+    def contains(
+        self, ip: str | IPAddress, now: datetime | float | None = None
+    ) -> bool:
+        """Whether an unexpired network contains ``ip``."""
+        try:
+            address = _address(ip)
+        except ValueError:
+            return False
+        moment = _now(now)
+        value = int(address)
+        for _plen, mask, table in self._tables[address.version]:
+            expiry = table.get(value & mask)
+            if expiry is not None and expiry > moment:
+                return True
+        return False
+
+    __contains__ = contains
+
+    def is_stale(self, now: datetime | float | None = None) -> bool:
+        """Whether an entry has expired since the matcher was built."""
+        return self.next_expiry <= _now(now)
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _mask(bits: int, prefixlen: int) -> int:
+    return ((1 << bits) - 1) ^ ((1 << (bits - prefixlen)) - 1)
+
+
+def _now(now: datetime | float | None) -> float:
+    return time.time() if now is None else _expiry_timestamp(now)
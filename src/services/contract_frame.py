@@ -0,0 +1,338 @@
+"""
+Shared columnar contract frame for multi-agent investigations.
+
+Contract lists arrive as Portal da Transparência dicts (``valorInicial``,
+``fornecedor``, ``dataAssinatura``...) or flat records (``contract_value``,
+``vendor_name``, ``date``...). The frame extracts values, timestamps, vendor,
+organization and month codes and first-digit histograms once, and is memoized
+per investigation so Zumbi, Oxóssi, Obaluaiê and Anita reuse the same arrays
+instead of re-parsing the dicts. Arrays are read-only.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+VALUE_FIELDS = (
+    "valorInicial",
+    "valorGlobal",
+    "contract_value",
+    "value",
+    "amount",
+    "valor",
+)
+DATE_FIELDS = (
+    "dataAssinatura",
+    "dataPublicacao",
+    "dataInicio",
+    "date",
+    "timestamp",
+)
+VENDOR_FIELDS = ("fornecedor", "vendor_name", "supplier_name", "supplier")
+ORG_FIELDS = ("_org_code", "orgao", "unidadeGestora", "organization")
+
+# Expected first-digit proportions for digits 1-9
+BENFORD_EXPECTED = np.log10(1 + 1 / np.arange(1, 10))
+
+_BR_DATE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})")
+
+
+def leading_digits(values: np.ndarray) -> np.ndarray:
+    """First significant digit (1-9) of each value; 0 where not positive."""
+    values = np.asarray(values, dtype=np.float64)
+    digits = np.zeros(values.shape, dtype=np.uint8)
+    positive = np.isfinite(values) & (values > 0)
+    if positive.any():
+        v = values[positive]
+        scaled = v / np.power(10.0, np.floor(np.log10(v)))
+        # Guard against 9.999... / 10.000... rounding at the boundary
+        digits[positive] = np.clip(np.floor(scaled + 1e-9), 1, 9).astype(np.uint8)
+    return digits
+
+
+def _number(value: Any) -> float:
+    """Float value of a numeric or numeric-string field (NaN if not a number)."""
+    if isinstance(value, bool):
+        return np.nan
+    if isinstance(value, int | float):
+        return float(value)
+    if isinstance(value, str) and value.strip():
+        try:
+            return float(value.replace(",", "."))
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+def _first(record: dict[str, Any], fields: Sequence[str]) -> Any:
+    """First truthy field value."""
+    for field in fields:
+        value = record.get(field)
+        if value:
+            return value
+    return None
+
+
+def _party(value: Any) -> tuple[str | None, str | None]:
+    """(name, tax id) from a nested ``{"nome", "cnpj"}`` or plain value."""
+    if isinstance(value, dict):
+        name = value.get("nome") or value.get("name") or value.get("descricao")
+        tax_id = (
+            value.get("cnpjFormatado")
+            or value.get("cnpj")
+            or value.get("cnpjCpf")
+            or value.get("codigo")
+            or value.get("codigoSIAFI")
+        )
+        return (str(name) if name else None, str(tax_id) if tax_id else None)
+    return (str(value) if value else None, None)
+
+
+def _iso_date(value: Any) -> Any:
+    """Rewrite DD/MM/YYYY strings as ISO so one vectorized parse handles all."""
+    if isinstance(value, str):
+        match = _BR_DATE.match(value.strip())
+        if match:
+            day, month, year = match.groups()
+            return f"{year}-{int(month):02d}-{int(day):02d}"
+    return value
+
+
+def _month_label(record: dict[str, Any]) -> str | None:
+    """Month from ``_month`` (number or label) and ``_year`` annotations."""
+    month = record.get("_month")
+    if not month:
+        return None
+    if isinstance(month, int) or (isinstance(month, str) and month.isdigit()):
+        year = record.get("_year")
+        return f"{int(year):04d}-{int(month):02d}" if year else f"{int(month):02d}"
+    return str(month)
+
+
+class _Encoder:
+    """Dense integer codes for hashable keys (-1 for None)."""
+
+    def __init__(self) -> None:
+        self.keys: list[Any] = []
+        self._codes: dict[Any, int] = {}
+
+    def __call__(self, key: Any) -> int:
+        if key is None:
+            return -1
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.keys)
+            self.keys.append(key)
+        return code
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class ContractFrame:
+    """Typed columns over a contract list (row i is ``records[i]``)."""
+
+    records: tuple[dict[str, Any], ...]
+    values: np.ndarray  # float64, NaN when missing
+    timestamps: np.ndarray  # datetime64[ns], NaT when missing
+    vendor_codes: np.ndarray  # int32, -1 when missing
+    vendors: tuple[tuple[str | None, str | None], ...]  # (name, tax id) per code
+    org_codes: np.ndarray  # int32, -1 when missing
+    orgs: tuple[str, ...]
+    month_codes: np.ndarray  # int32, -1 when missing
+    months: tuple[str, ...]  # YYYY-MM (or MM when only the month is known)
+    leading_digits: np.ndarray  # uint8, 0 when value is not positive
+    digit_histogram: np.ndarray  # counts of digits 1-9
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict[str, Any]]) -> "ContractFrame":
+        """Extract every column in a single pass over the records."""
+        rows = tuple(r for r in records if isinstance(r, dict))
+        n = len(rows)
+        vendor_enc, org_enc, month_enc = _Encoder(), _Encoder(), _Encoder()
+
+        values = np.empty(n, dtype=np.float64)
+        vendor_codes = np.empty(n, dtype=np.int32)
+        org_codes = np.empty(n, dtype=np.int32)
+        raw_dates: list[Any] = [None] * n
+        explicit_months: list[str | None] = [None] * n
+
+        for i, record in enumerate(rows):
+            values[i] = _number(_first(record, VALUE_FIELDS))
+
+            vendor = _party(_first(record, VENDOR_FIELDS))
+            vendor_codes[i] = vendor_enc(vendor if vendor != (None, None) else None)
+
+            org_name, org_id = _party(_first(record, ORG_FIELDS))
+            org_codes[i] = org_enc(org_id or org_name)
+
+            raw_dates[i] = _iso_date(_first(record, DATE_FIELDS))
+
+            explicit_months[i] = _month_label(record)
+
+        parsed = pd.to_datetime(
+            pd.Series(raw_dates, dtype=object),
+            errors="coerce",
+            format="ISO8601",
+            utc=True,
+        )
+        timestamps = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+        # Month labels: explicit ``_month``/``_year`` annotations win, else the
+        # timestamp's month (formatted once per distinct month)
+        derived = timestamps.astype("datetime64[M]")
+        labels = {m: str(m) for m in np.unique(derived[~np.isnat(derived)])}
+        month_codes = np.empty(n, dtype=np.int32)
+        for i in range(n):
+            label = explicit_months[i]
+            if label is None and not np.isnat(derived[i]):
+                label = labels[derived[i]]
+            month_codes[i] = month_enc(label)
+
+        digits = leading_digits(values)
+        histogram = np.bincount(digits, minlength=10)[1:].astype(np.int64)
+
+        return cls(
+            records=rows,
+            values=_readonly(values),
+            timestamps=_readonly(timestamps),
+            vendor_codes=_readonly(vendor_codes),
+            vendors=tuple(vendor_enc.keys),
+            org_codes=_readonly(org_codes),
+            orgs=tuple(org_enc.keys),
+            month_codes=_readonly(month_codes),
+            months=tuple(month_enc.keys),
+            leading_digits=_readonly(digits),
+            digit_histogram=_readonly(histogram),
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def positive_mask(self) -> np.ndarray:
+        """Rows with a positive value."""
+        return np.isfinite(self.values) & (self.values > 0)
+
+    @property
+    def positive_values(self) -> np.ndarray:
+        """Positive values only."""
+        return self.values[self.positive_mask]
+
+    def group_totals(
+        self, codes: np.ndarray, n_groups: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Row count and value sum per code (missing values count as 0).
+
+        Rows with code -1 are ignored.
+        """
+        valid = codes >= 0
+        weights = np.nan_to_num(self.values[valid])
+        counts = np.bincount(codes[valid], minlength=n_groups)
+        sums = np.bincount(codes[valid], weights=weights, minlength=n_groups)
+        return counts, sums
+
+    def benford_chi_square(self) -> float:
+        """Chi-square of the first-digit histogram against Benford's Law."""
+        total = self.digit_histogram.sum()
+        if not total:
+            return 0.0
+        expected = BENFORD_EXPECTED * total
+        return float(((self.digit_histogram - expected) ** 2 / expected).sum())
+
+
+class ContractFrameCache:
+    """
+    Frames memoized per investigation.
+
+    Entries are keyed by the identity of the records list: the agents of an
+    investigation pass the same list around, so a lookup costs an ``id()``
+    instead of hashing every row. The entry keeps the list it was built
+    from, so the id cannot be reused by another list while it is cached;
+    lists must not be mutated in place while their frame is cached.
+
+    The master agent releases an investigation's frames once its plan has
+    run; entries of callers that never release expire after ``ttl_seconds``,
+    and the least recently used are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 900.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[
+            tuple[str, int, int], tuple[float, Sequence[Any], ContractFrame]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, records: Sequence[dict[str, Any]], investigation_id: str | None = None
+    ) -> ContractFrame:
+        """Frame for ``records``, built once per investigation and list."""
+        if not investigation_id:
+            return ContractFrame.from_records(records)
+
+        key = (investigation_id, id(records), len(records))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] is records and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+        frame = ContractFrame.from_records(records)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now, records, frame)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        logger.debug(
+            "contract_frame_built",
+            investigation_id=investigation_id,
+            rows=len(frame),
+        )
+        return frame
+
+    def release(self, investigation_id: str) -> None:
+        """Drop every frame of a finished investigation."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == investigation_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all frames."""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ContractFrameCache()
+
+
+def get_contract_frame(
+    records: Sequence[dict[str, Any]], investigation_id: str | None = None
+) -> ContractFrame:
+    """Shared frame for an investigation's contracts (uncached without an id)."""
+    return _cache.get(records, investigation_id)
+
+
+def get_contract_frame_cache() -> ContractFrameCache:
+    """Process-wide frame cache."""
+    return _cache
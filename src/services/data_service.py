@@ -10,6 +10,7 @@ Updated: 2025-10-16 16:30:00 -03:00
 License: Proprietary - All rights reserved
 """
 
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
@@ -77,6 +78,37 @@ class DataService:
             logger.error("fetch_contracts_failed", error=str(e))
             return []
 
+    async def iter_contracts(
+        self,
+        filters: dict | None = None,
+        page_size: int = 500,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream contracts from Portal da Transparência page by page.
+
+        Unlike ``fetch_contracts`` this neither loads the whole result nor
+        fills the contract cache, so exports of any size use flat memory.
+
+        Args:
+            filters: Filter parameters (ano, mes, codigo_orgao, etc.)
+            page_size: Records per API page (at most 500)
+            max_pages: Maximum number of pages (unbounded if None)
+
+        Yields:
+            Contracts
+        """
+        client = await self._get_api_client()
+        api_filter = TransparencyAPIFilter(
+            **{**(filters or {}), "tamanho_pagina": page_size}
+        )
+
+        async for page in client.iter_pages(
+            "/api-de-dados/contratos", api_filter, max_pages=max_pages
+        ):
+            for contract in page:
+                yield contract
+
     async def get_contract(self, contract_id: str) -> dict | None:
         """
         Get a specific contract by ID.
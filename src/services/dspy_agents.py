@@ -16,6 +16,7 @@ from typing import Any, Optional
 
 from src.core import get_logger
 from src.core.config import get_settings
+from src.services.maritaca_client import MaritacaClient
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -401,6 +402,7 @@ class DSPyAgentService:
     _instance: Optional["DSPyAgentService"] = None
     _initialized: bool = False
     _dspy_available: bool = False
+    _stream_client: MaritacaClient | None = None
 
     def __new__(cls) -> "DSPyAgentService":
         if cls._instance is None:
@@ -505,11 +507,7 @@ class DSPyAgentService:
         Returns:
             Dict with response and metadata
         """
-        # Map agent_id to personality
-        try:
-            personality = AgentPersonality(agent_id.lower())
-        except ValueError:
-            personality = AgentPersonality.DRUMMOND  # Default
+        personality = self._get_personality(agent_id)
 
         if not self.is_available():
             # Fallback response without LLM
@@ -547,45 +545,98 @@ class DSPyAgentService:
         context: str = "",
     ):
         """
-        Generate streaming agent response using DSPy.
+        Generate streaming agent response.
 
-        Yields chunks of the response for real-time display.
+        Tokens are relayed as the Maritaca API produces them, with the same
+        personality prompt the DSPy module uses (DSPy itself cannot stream).
+        Without an API key, or if the stream fails before its first token,
+        the complete ``chat`` result is sent as a single chunk.
         """
-        # Get full response first (DSPy doesn't natively support streaming yet)
-        result = await self.chat(agent_id, message, intent_type, context)
-
-        response_text = result.get("response", "")
-
-        # Simulate streaming by yielding word chunks
-        words = response_text.split()
-        chunk = ""
-
-        for i, word in enumerate(words):
-            chunk += word + " "
-            if (i + 1) % 3 == 0:  # Yield every 3 words
+        personality = self._get_personality(agent_id)
+        agent_name = self._get_agent_name(personality)
+        client = self._get_stream_client()
+        streamed = False
+
+        if client is not None:
+            try:
+                tokens = await client.chat_completion(
+                    messages=self._stream_messages(
+                        personality, message, intent_type, context
+                    ),
+                    temperature=0.7,
+                    max_tokens=1024,
+                    stream=True,
+                )
+                async for token in tokens:
+                    streamed = True
+                    yield {"type": "chunk", "content": token, "agent_id": agent_id}
+            except Exception as e:
+                if streamed:
+                    logger.error(f"DSPy stream interrupted for {agent_id}: {e}")
+                    yield {
+                        "type": "complete",
+                        "agent_id": agent_id,
+                        "agent_name": agent_name,
+                        "success": False,
+                    }
+                    return
+                logger.warning(f"DSPy stream unavailable for {agent_id}: {e}")
+
+        if not streamed:
+            result = await self.chat(agent_id, message, intent_type, context)
+            agent_name = result.get("agent_name", agent_name)
+            if result.get("response"):
                 yield {
                     "type": "chunk",
-                    "content": chunk.strip(),
+                    "content": result["response"],
                     "agent_id": agent_id,
                 }
-                chunk = ""
-
-        # Yield remaining words
-        if chunk.strip():
-            yield {
-                "type": "chunk",
-                "content": chunk.strip(),
-                "agent_id": agent_id,
-            }
 
         # Final completion signal
         yield {
             "type": "complete",
             "agent_id": agent_id,
-            "agent_name": result.get("agent_name", "Sistema"),
-            "success": result.get("success", True),
+            "agent_name": agent_name,
+            "success": True,
         }
 
+    def _get_stream_client(self) -> MaritacaClient | None:
+        """Maritaca client for token streaming (None without an API key)."""
+        if self._stream_client is None:
+            api_key_secret = settings.maritaca_api_key
+            api_key = api_key_secret.get_secret_value() if api_key_secret else None
+            if not api_key:
+                return None
+            self._stream_client = MaritacaClient(
+                api_key=api_key,
+                base_url=settings.maritaca_api_base_url,
+                model=settings.maritaca_model,
+                max_retries=1,
+            )
+        return self._stream_client
+
+    def _stream_messages(
+        self,
+        personality: AgentPersonality,
+        message: str,
+        intent_type: str,
+        context: str,
+    ) -> list[dict[str, str]]:
+        """Chat messages equivalent to the ``DSPyAgentChat`` inputs."""
+        base_prompt = AGENT_SYSTEM_PROMPTS.get(
+            personality, AGENT_SYSTEM_PROMPTS[AgentPersonality.DRUMMOND]
+        )
+        system_prompt = (
+            f"{CIDADAO_AI_CONTEXT}\n\n{base_prompt}\n\n"
+            f"Intenção detectada: {intent_type}"
+        )
+        if context:
+            system_prompt += f"\n\nContexto da conversa:\n{context}"
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message},
+        ]
+
     async def generate_response(
         self,
         agent_name: str,
@@ -703,6 +754,13 @@ CONTEXTO ADICIONAL:
             "fallback": True,
         }
 
+    def _get_personality(self, agent_id: str) -> AgentPersonality:
+        """Map agent_id to personality (Drummond by default)."""
+        try:
+            return AgentPersonality(agent_id.lower())
+        except ValueError:
+            return AgentPersonality.DRUMMOND
+
     def _get_agent_name(self, personality: AgentPersonality) -> str:
         """Get display name for agent"""
         names = {
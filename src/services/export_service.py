@@ -8,8 +8,10 @@ License: Proprietary - All rights reserved
 
 import asyncio
 import io
-import zipfile
-from concurrent.futures import ThreadPoolExecutor
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from typing import Any
 
@@ -33,12 +35,43 @@ from reportlab.platypus import (
 )
 
 from src.core import get_logger
+from src.services.streaming_export import (
+    ZipEntry,
+    stream_csv,
+    stream_xlsx,
+    stream_zip,
+)
 
 logger = get_logger(__name__)
 
+RowSource = Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]] | pd.DataFrame
+
 # Thread pool for CPU-intensive PDF generation
 _pdf_thread_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf_export")
 
+# reportlab holds the GIL, so PDFs are rendered in a bounded process pool
+# (the thread pool remains the fallback where processes are unavailable)
+PDF_MAX_WORKERS = min(2, os.cpu_count() or 1)
+_pdf_process_pool: ProcessPoolExecutor | None = None
+
+
+def _pdf_executor() -> ProcessPoolExecutor | ThreadPoolExecutor:
+    global _pdf_process_pool
+    if _pdf_process_pool is None:
+        try:
+            _pdf_process_pool = ProcessPoolExecutor(max_workers=PDF_MAX_WORKERS)
+        except (OSError, NotImplementedError) as e:
+            logger.warning("pdf_process_pool_unavailable", error=str(e))
+            return _pdf_thread_pool
+    return _pdf_process_pool
+
+
+def _render_pdf(
+    content: str, title: str, metadata: dict[str, Any], format_type: str
+) -> bytes:
+    # Runs in a pool worker with that process's own service instance
+    return export_service._generate_pdf_sync(content, title, metadata, format_type)
+
 
 class ExportService:
     """Service for exporting documents in various formats."""
@@ -117,16 +150,19 @@ class ExportService:
         Returns:
             PDF bytes
         """
-        # Run PDF generation in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            _pdf_thread_pool,
-            self._generate_pdf_sync,
-            content,
-            title,
-            metadata or {},
-            format_type,
-        )
+        global _pdf_process_pool
+
+        # Run PDF generation in a worker process to keep the loop and GIL free
+        loop = asyncio.get_running_loop()
+        args = (content, title, metadata or {}, format_type)
+        try:
+            return await loop.run_in_executor(_pdf_executor(), _render_pdf, *args)
+        except BrokenProcessPool:
+            logger.warning("pdf_process_pool_broken")
+            _pdf_process_pool = None
+            return await loop.run_in_executor(
+                _pdf_thread_pool, self._generate_pdf_sync, *args
+            )
 
     def _generate_pdf_sync(
         self, content: str, title: str, metadata: dict[str, Any], format_type: str
@@ -362,63 +398,132 @@ class ExportService:
         """
         return data.to_csv(index=False).encode(encoding)
 
-    async def generate_bulk_export(
+    def stream_csv(
+        self,
+        rows: RowSource,
+        columns: list[str] | None = None,
+        encoding: str = "utf-8",
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream CSV from rows as they are produced (constant memory).
+
+        Args:
+            rows: Records (dicts or a DataFrame), e.g. pages pulled from an API
+            columns: Column order (keys of the first row by default)
+            encoding: File encoding
+
+        Returns:
+            Async iterator of CSV chunks
+        """
+        return stream_csv(_rows(rows), columns, encoding)
+
+    def stream_excel(
+        self,
+        data: dict[str, RowSource] | RowSource,
+        title: str,
+        metadata: dict[str, Any] | None = None,
+        columns: list[str] | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream an Excel workbook from rows as they are produced.
+
+        Sheets carry the same title, date and header formatting as
+        ``generate_excel``; the metadata sheet also gets the row count.
+
+        Args:
+            data: Rows or dict of rows (for multiple sheets)
+            title: Document title
+            metadata: Additional metadata
+            columns: Column order (keys of the first row by default)
+
+        Returns:
+            Async iterator of XLSX chunks
+        """
+        if not isinstance(data, dict):
+            data = {"Dados": data}
+        sheets = {name: _rows(rows) for name, rows in data.items()}
+        return stream_xlsx(sheets, title, metadata, columns)
+
+    def stream_bulk_export(
         self, exports: list[dict[str, Any]], format: str = "zip"
-    ) -> bytes:
+    ) -> AsyncIterator[bytes]:
         """
-        Generate bulk export with multiple files.
+        Stream a ZIP archive, rendering each file when its turn comes.
 
         Args:
             exports: List of export configurations
-                Each dict should have: 'filename', 'content', 'format'
+                Each dict should have: 'filename', 'content', 'format';
+                csv and excel entries take their rows from 'rows' or 'data'
+                (lists, async iterables or DataFrames)
             format: Archive format (zip)
 
         Returns:
-            Archive bytes
+            Async iterator of ZIP chunks
         """
         if format != "zip":
             raise ValueError("Currently only ZIP format is supported for bulk exports")
-
-        buffer = io.BytesIO()
-
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for export in exports:
-                filename = export["filename"]
-                content = export["content"]
-                file_format = export.get("format", "txt")
-
-                # Generate file based on format
-                if file_format == "pdf":
-                    file_bytes = await self.generate_pdf(
+        return stream_zip(self._bulk_entries(exports))
+
+    async def _bulk_entries(
+        self, exports: list[dict[str, Any]]
+    ) -> AsyncIterator[ZipEntry]:
+        """Render bulk export entries lazily, one file at a time."""
+        for export in exports:
+            filename = export["filename"]
+            content = export.get("content", "")
+            file_format = export.get("format", "txt")
+            rows = export.get("rows", export.get("data"))
+            if rows is None and not isinstance(content, str):
+                rows = content
+
+            if file_format == "pdf":
+                entry = ZipEntry(
+                    filename,
+                    await self.generate_pdf(
                         content=content,
                         title=export.get("title", filename),
                         metadata=export.get("metadata", {}),
-                    )
-                elif file_format == "excel":
-                    file_bytes = await self.generate_excel(
-                        data=export.get("data", pd.DataFrame()),
+                    ),
+                    compress=False,
+                )
+            elif file_format == "excel":
+                entry = ZipEntry(
+                    filename,
+                    self.stream_excel(
+                        data=rows if rows is not None else [],
                         title=export.get("title", filename),
                         metadata=export.get("metadata", {}),
-                    )
-                elif file_format == "csv":
-                    file_bytes = await self.generate_csv(
-                        data=export.get("data", pd.DataFrame())
-                    )
-                else:
-                    # Default to text
-                    file_bytes = content.encode("utf-8")
-
-                # Add to zip
-                zipf.writestr(filename, file_bytes)
-
-                logger.info(
-                    "bulk_export_file_added",
-                    filename=filename,
-                    format=file_format,
-                    size=len(file_bytes),
+                    ),
+                    compress=False,
+                )
+            elif file_format == "csv":
+                entry = ZipEntry(
+                    filename, self.stream_csv(rows if rows is not None else [])
                 )
+            else:
+                # Default to text
+                entry = ZipEntry(filename, content.encode("utf-8"))
 
-        return buffer.getvalue()
+            logger.info("bulk_export_file_added", filename=filename, format=file_format)
+            yield entry
+
+    async def generate_bulk_export(
+        self, exports: list[dict[str, Any]], format: str = "zip"
+    ) -> bytes:
+        """
+        Generate bulk export with multiple files.
+
+        Args:
+            exports: List of export configurations
+                Each dict should have: 'filename', 'content', 'format'
+            format: Archive format (zip)
+
+        Returns:
+            Archive bytes
+        """
+        return b"".join(
+            [chunk async for chunk in self.stream_bulk_export(exports, format)]
+        )
 
     async def convert_investigation_to_excel(
         self, investigation_data: dict[str, Any]
@@ -487,5 +592,16 @@ class ExportService:
         )
 
 
+def _rows(data: "RowSource") -> Iterable[dict] | AsyncIterable[dict]:
+    """Rows of a DataFrame (lazily, one tuple at a time) or the input as is."""
+    if isinstance(data, pd.DataFrame):
+        columns = [str(column) for column in data.columns]
+        return (
+            dict(zip(columns, values, strict=True))
+            for values in data.itertuples(index=False, name=None)
+        )
+    return data
+
+
 # Global instance
 export_service = ExportService()
@@ -14,6 +14,7 @@ from src.agents import MasterAgent, get_agent_pool
 from src.agents.deodoro import AgentContext
 from src.core import get_logger
 from src.db.simple_session import get_db_session
+from src.models.entity_graph import EntityInvestigationReference
 from src.models.investigation import Investigation
 
 logger = get_logger(__name__)
@@ -157,6 +158,33 @@ class InvestigationService:
             )
             return result.scalar_one_or_none()
 
+    async def get_many(self, investigation_ids: list[str]) -> list[Investigation]:
+        """Get several investigations with a single ``IN`` query."""
+        if not investigation_ids:
+            return []
+        async with get_db_session() as db:
+            result = await db.execute(
+                select(Investigation).where(
+                    Investigation.id.in_(set(investigation_ids))
+                )
+            )
+            return list(result.scalars().all())
+
+    async def get_contract_anomaly_references(
+        self, contract_ids: list[str]
+    ) -> list[EntityInvestigationReference]:
+        """Get references of contracts involved in anomalies, in one query."""
+        if not contract_ids:
+            return []
+        async with get_db_session() as db:
+            result = await db.execute(
+                select(EntityInvestigationReference).where(
+                    EntityInvestigationReference.contract_id.in_(set(contract_ids)),
+                    EntityInvestigationReference.involved_in_anomalies.is_(True),
+                )
+            )
+            return list(result.scalars().all())
+
     async def search(
         self,
         user_id: str | None = None,
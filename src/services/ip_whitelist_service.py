@@ -7,6 +7,7 @@ License: Proprietary - All rights reserved
 """
 
 import ipaddress
+import time
 from datetime import UTC, datetime
 from typing import Any
 
@@ -17,6 +18,7 @@ from src.core import get_logger
 from src.core.config import settings
 from src.models.base import BaseModel
 from src.services.cache_service import cache_service
+from src.services.cidr_matcher import CIDRMatcher, parse_network
 
 logger = get_logger(__name__)
 
@@ -57,8 +59,8 @@ class IPWhitelist(BaseModel):
 
         try:
             if self.is_cidr:
-                # CIDR range check
-                network = ipaddress.ip_network(f"{self.ip_address}/{self.cidr_prefix}")
+                # CIDR range check (parsed networks are memoized)
+                network = parse_network(f"{self.ip_address}/{self.cidr_prefix}")
                 return ipaddress.ip_address(ip) in network
             # Exact match
             return self.ip_address == ip
@@ -68,15 +70,22 @@ class IPWhitelist(BaseModel):
 
 
 class IPWhitelistService:
-    """Service for managing IP whitelists."""
+    """
+    Service for managing IP whitelists.
+
+    Active entries of each environment are compiled into a
+    :class:`CIDRMatcher`, reloaded from the database every ``_cache_ttl``
+    seconds and rebuilt in memory as soon as one of its entries expires.
+    """
 
     def __init__(self):
         """Initialize IP whitelist service."""
         self._cache_key_prefix = "ip_whitelist"
         self._cache_ttl = 300  # 5 minutes
-        self._whitelist_cache: set[str] | None = None
-        self._cidr_cache: list[tuple] | None = None
-        self._last_cache_update: datetime | None = None
+        # environment -> (loaded at, entries, compiled matcher)
+        self._matchers: dict[
+            str, tuple[float, list[tuple[str, datetime | None]], CIDRMatcher]
+        ] = {}
 
     async def add_ip(
         self,
@@ -170,37 +179,38 @@ class IPWhitelistService:
         self, session: AsyncSession, ip_address: str, environment: str = "production"
     ) -> bool:
         """Check if IP is whitelisted."""
-        # Check cache first
-        cache_key = f"{self._cache_key_prefix}:{environment}:check:{ip_address}"
-        cached = await cache_service.get(cache_key)
-        if cached is not None:
-            return cached
-
-        # Load whitelist if needed
-        await self._ensure_cache_loaded(session, environment)
-
-        # Check exact matches first
-        if self._whitelist_cache and ip_address in self._whitelist_cache:
-            await cache_service.set(cache_key, True, ttl=self._cache_ttl)
-            return True
-
-        # Check CIDR ranges
-        if self._cidr_cache:
-            for cidr_ip, prefix, expires_at in self._cidr_cache:
-                if expires_at and datetime.now(UTC) > expires_at:
-                    continue
-
-                try:
-                    network = ipaddress.ip_network(f"{cidr_ip}/{prefix}")
-                    if ipaddress.ip_address(ip_address) in network:
-                        await cache_service.set(cache_key, True, ttl=self._cache_ttl)
-                        return True
-                except ValueError:
-                    continue
-
-        # Not whitelisted
-        await cache_service.set(cache_key, False, ttl=self._cache_ttl)
-        return False
+        result = self.check_ip_loaded(ip_address, environment)
+        if result is None:
+            await self._ensure_cache_loaded(session, environment)
+            result = self.check_ip_loaded(ip_address, environment)
+        return bool(result)
+
+    def check_ip_loaded(
+        self, ip_address: str, environment: str = "production"
+    ) -> bool | None:
+        """
+        Check an IP against the compiled whitelist without I/O.
+
+        Returns ``None`` when the environment's whitelist must be (re)loaded
+        from the database first (see :meth:`check_ip`).
+        """
+        cached = self._matchers.get(environment)
+        if cached is None:
+            return None
+        loaded_at, entries, matcher = cached
+        now = time.time()
+        if now - loaded_at >= self._cache_ttl:
+            return None
+        if matcher.is_stale(now):
+            # An entry expired: recompile the survivors, no query needed
+            entries = [
+                (network, expires_at)
+                for network, expires_at in entries
+                if expires_at is None or expires_at.timestamp() > now
+            ]
+            matcher = CIDRMatcher(entries)
+            self._matchers[environment] = (loaded_at, entries, matcher)
+        return matcher.contains(ip_address, now)
 
     async def list_ips(
         self,
@@ -286,13 +296,9 @@ class IPWhitelistService:
     async def _ensure_cache_loaded(
         self, session: AsyncSession, environment: str
     ) -> None:
-        """Ensure whitelist is loaded in cache."""
-        # Check if cache is still valid
-        if (
-            self._last_cache_update
-            and (datetime.now(UTC) - self._last_cache_update).total_seconds()
-            < self._cache_ttl
-        ):
+        """Ensure the environment's whitelist is loaded and compiled."""
+        cached = self._matchers.get(environment)
+        if cached is not None and time.time() - cached[0] < self._cache_ttl:
             return
 
         # Load from database
@@ -305,34 +311,30 @@ class IPWhitelistService:
             )
         )
 
-        entries = result.scalars().all()
-
-        # Separate exact IPs and CIDR ranges
-        self._whitelist_cache = set()
-        self._cidr_cache = []
-
-        for entry in entries:
-            if entry.is_cidr:
-                self._cidr_cache.append(
-                    (entry.ip_address, entry.cidr_prefix, entry.expires_at)
-                )
-            else:
-                self._whitelist_cache.add(entry.ip_address)
-
-        self._last_cache_update = datetime.now(UTC)
+        entries = [
+            (
+                (
+                    f"{entry.ip_address}/{entry.cidr_prefix}"
+                    if entry.is_cidr
+                    else entry.ip_address
+                ),
+                entry.expires_at,
+            )
+            for entry in result.scalars().all()
+        ]
+        matcher = CIDRMatcher(entries)
+        self._matchers[environment] = (time.time(), entries, matcher)
 
         logger.debug(
             "ip_whitelist_cache_loaded",
             environment=environment,
-            exact_ips=len(self._whitelist_cache),
-            cidr_ranges=len(self._cidr_cache),
+            entries=len(matcher),
+            invalid=matcher.invalid,
         )
 
     async def _invalidate_cache(self) -> None:
         """Invalidate the whitelist cache."""
-        self._whitelist_cache = None
-        self._cidr_cache = None
-        self._last_cache_update = None
+        self._matchers.clear()
 
         # Clear Redis cache patterns
         pattern = f"{self._cache_key_prefix}:*"
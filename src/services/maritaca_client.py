@@ -434,6 +434,8 @@ class MaritacaClient:
         """
         endpoint = "/chat/completions"
         data = request.model_dump(exclude_none=True)
+        # Once text has reached the caller a retry would repeat it
+        streamed = False
 
         for attempt in range(self.max_retries + 1):
             try:
@@ -466,7 +468,8 @@ class MaritacaClient:
                                         delta = chunk_data["choices"][0].get(
                                             "delta", {}
                                         )
-                                        if "content" in delta:
+                                        if delta.get("content"):
+                                            streamed = True
                                             yield delta["content"]
                                 except json_utils.JSONDecodeError:
                                     self.logger.warning(
@@ -518,9 +521,10 @@ class MaritacaClient:
                     error=str(e),
                     error_type=type(e).__name__,
                     attempt=attempt + 1,
+                    streamed=streamed,
                 )
 
-                if attempt < self.max_retries:
+                if attempt < self.max_retries and not streamed:
                     await asyncio.sleep(2**attempt)
                     continue
 
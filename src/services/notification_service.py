@@ -307,8 +307,8 @@ class NotificationService:
 
             event = event_map.get(notification.type, WebhookEvent.SYSTEM_ALERT)
 
-            # Send webhook
-            deliveries = await webhook_service.send_event(
+            # Queue webhook; delivery happens in the background
+            queued = await webhook_service.send_event(
                 event=event,
                 data={
                     "id": notification.id,
@@ -320,8 +320,7 @@ class NotificationService:
                 metadata=notification.metadata,
             )
 
-            # Check if any webhook was successful
-            return any(d.success for d in deliveries)
+            return bool(queued)
 
         except Exception as e:
             logger.error(
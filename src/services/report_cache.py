@@ -0,0 +1,297 @@
+"""
+Module: services.report_cache
+Description: Content-addressed caches for report sections, renders and files
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Report generation is a pure function of the investigation data and the
+request, so every stage is cached under a key derived from its inputs.
+Data is identified by its id and version when it carries them, and by a
+digest of its content otherwise. Section texts are cached per builder and
+per scalar input (the target audience, the report type), so a request that
+only changes the audience rebuilds just the sections that depend on it.
+Rendered Markdown, HTML and JSON are cached per format and per digest of
+the ordered sections. Binary renders (PDF) go to a disk store addressed
+by the same kind of key and are served by reference or streamed in
+chunks. Concurrent requests for a file that is not stored yet share one
+render.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+from src.core import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# File suffix per media type, so the store can be re-indexed after a restart
+MEDIA_SUFFIXES = {
+    "application/pdf": ".pdf",
+    "text/html": ".html",
+    "text/markdown": ".md",
+    "application/json": ".json",
+}
+_SUFFIX_MEDIA = {suffix: media for media, suffix in MEDIA_SUFFIXES.items()}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def content_key(*parts: Any) -> str:
+    """Stable digest of JSON-like parts (dict order does not matter)."""
+    payload = json.dumps(
+        parts, sort_keys=True, default=str, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def data_version(results: dict[str, Any] | None) -> str:
+    """
+    Identity of a results payload.
+
+    ``investigation_id``/``id`` plus ``version``/``updated_at`` (top level or
+    under ``summary`` or ``metadata``) identify the data without reading it;
+    otherwise the whole payload is digested.
+    """
+    if not results:
+        return "none"
+    scopes = [results, results.get("summary") or {}, results.get("metadata") or {}]
+    identity = version = None
+    for scope in scopes:
+        if isinstance(scope, dict):
+            identity = identity or scope.get("investigation_id") or scope.get("id")
+            version = version or scope.get("version") or scope.get("updated_at")
+    if identity and version:
+        return f"{identity}@{version}"
+    return content_key(results)
+
+
+class ReportCache:
+    """Least-recently-used map of built sections and rendered reports."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        """Cached value of ``key``, or None."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value``, evicting the least recently used beyond the cap."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key: str, build: Callable[[], T]) -> T:
+        """Cached value of ``key``, built by ``build`` on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass(frozen=True)
+class ReportArtifact:
+    """A stored report file."""
+
+    artifact_id: str
+    media_type: str
+    size: int
+    path: Path
+
+    @property
+    def url(self) -> str:
+        """API path that streams the file."""
+        return f"/api/v1/reports/artifacts/{self.artifact_id}"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Reference returned to clients instead of the file's bytes."""
+        return {
+            "artifact_id": self.artifact_id,
+            "media_type": self.media_type,
+            "size": self.size,
+            "url": self.url,
+        }
+
+
+class ReportArtifactStore:
+    """
+    Disk store of rendered report files addressed by content key.
+
+    Files are written atomically and evicted least recently used once
+    ``max_bytes`` is exceeded. Existing files are re-indexed on start.
+    """
+
+    def __init__(self, root: Path | str, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, ReportArtifact] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending: dict[str, asyncio.Future] = {}
+        self.renders = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.root.is_dir():
+            return
+        files = [p for p in self.root.iterdir() if p.suffix in _SUFFIX_MEDIA]
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            artifact = ReportArtifact(
+                path.stem, _SUFFIX_MEDIA[path.suffix], path.stat().st_size, path
+            )
+            self._index[artifact.artifact_id] = artifact
+            self._bytes += artifact.size
+
+    def get(self, artifact_id: str) -> ReportArtifact | None:
+        """Stored artifact, or None."""
+        with self._lock:
+            artifact = self._index.get(artifact_id)
+            if artifact is None:
+                return None
+            if not artifact.path.exists():
+                self._drop(artifact_id)
+                return None
+            self._index.move_to_end(artifact_id)
+            return artifact
+
+    async def get_or_create(
+        self,
+        artifact_id: str,
+        render: Callable[[], Awaitable[bytes]],
+        media_type: str,
+    ) -> ReportArtifact:
+        """
+        Stored artifact for ``artifact_id``, rendered once if missing.
+
+        Args:
+            artifact_id: Content key of the artifact
+            render: Coroutine factory producing the file's bytes
+            media_type: Media type of the file
+
+        Returns:
+            The stored artifact
+        """
+        artifact = self.get(artifact_id)
+        if artifact is not None:
+            return artifact
+
+        pending = self._pending.get(artifact_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[artifact_id] = future
+        try:
+            data = await render()
+            self.renders += 1
+            artifact = await self.put(artifact_id, data, media_type)
+            future.set_result(artifact)
+            return artifact
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise; nobody else has to retrieve it
+            raise
+        finally:
+            del self._pending[artifact_id]
+
+    async def put(
+        self, artifact_id: str, data: bytes, media_type: str
+    ) -> ReportArtifact:
+        """Write ``data`` under ``artifact_id``."""
+        path = self.root / f"{artifact_id}{MEDIA_SUFFIXES.get(media_type, '.bin')}"
+        await asyncio.to_thread(self._write, path, data)
+        artifact = ReportArtifact(artifact_id, media_type, len(data), path)
+
+        with self._lock:
+            if artifact_id in self._index:
+                self._bytes -= self._index[artifact_id].size
+            self._index[artifact_id] = artifact
+            self._index.move_to_end(artifact_id)
+            self._bytes += artifact.size
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                self._drop(next(iter(self._index)), unlink=True)
+        return artifact
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _drop(self, artifact_id: str, unlink: bool = False) -> None:
+        artifact = self._index.pop(artifact_id)
+        self._bytes -= artifact.size
+        if unlink:
+            try:
+                artifact.path.unlink()
+            except FileNotFoundError:
+                pass
+            logger.debug("report_artifact_evicted", artifact_id=artifact_id)
+
+    async def read(self, artifact: ReportArtifact) -> bytes:
+        """The whole file."""
+        return await asyncio.to_thread(artifact.path.read_bytes)
+
+    async def stream(
+        self, artifact: ReportArtifact, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """The file in chunks, read off the event loop."""
+        handle = await asyncio.to_thread(open, artifact.path, "rb")
+        try:
+            while chunk := await asyncio.to_thread(handle.read, chunk_size):
+                yield chunk
+        finally:
+            handle.close()
+
+
+_report_cache = ReportCache()
+_artifact_store: ReportArtifactStore | None = None
+
+
+def get_report_cache() -> ReportCache:
+    """Process-wide section and render cache."""
+    return _report_cache
+
+
+def get_report_artifact_store() -> ReportArtifactStore:
+    """Process-wide report artifact store."""
+    global _artifact_store
+    if _artifact_store is None:
+        from src.core.config import settings
+
+        _artifact_store = ReportArtifactStore(
+            settings.report_artifact_path, settings.report_artifact_max_bytes
+        )
+    return _artifact_store
@@ -0,0 +1,481 @@
+"""
+Module: services.streaming_export
+Description: Incremental CSV, XLSX and ZIP encoders for constant-memory exports
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Rows are consumed from async iterables one at a time, and the encoded output
+is yielded every ``FLUSH_BYTES``. Nothing holds the full result. ZIP archives
+are written to a non-seekable sink: each entry header is written when the
+entry starts, sizes go in a trailing data descriptor, and the bytes can be
+sent right away. XLSX workbooks are ZIP archives of XML parts. Worksheets are
+streamed as inline-string XML, so no shared-strings table has to be kept in
+memory, and a sheet that reaches Excel's row limit continues in a new one.
+"""
+
+import csv
+import io
+import math
+import re
+import zipfile
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.utils import get_column_letter
+
+from src.core import json_utils
+
+FLUSH_BYTES = 64 * 1024
+EXCEL_MAX_ROWS = 1_048_576
+SHEET_NAME_MAX = 31
+
+# Title, date and header rows above the data
+XLSX_HEADER_ROWS = 3
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Cell styles (cellXfs indexes) matching the formatting of generate_excel
+_STYLE_TITLE = 1
+_STYLE_DATE = 2
+_STYLE_HEADER = 3
+_STYLE_CELL = 4
+
+_STYLES_XML = (
+    f'{_XML_DECL}<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="4">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="16"/><color rgb="FF1A73E8"/><name val="Calibri"/></font>'
+    '<font><i/><sz val="10"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font>'
+    "</fonts>"
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF4285F4"/>'
+    '<bgColor rgb="FF4285F4"/></patternFill></fill>'
+    "</fills>"
+    '<borders count="2">'
+    "<border><left/><right/><top/><bottom/><diagonal/></border>"
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/>'
+    '<bottom style="thin"/><diagonal/></border>'
+    "</borders>"
+    '<cellStyleXfs count="1">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    "</cellStyleXfs>"
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" '
+    'applyAlignment="1"><alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1" '
+    'applyAlignment="1"><alignment horizontal="center"/></xf>'
+    '<xf numFmtId="0" fontId="3" fillId="2" borderId="1" xfId="0" applyFont="1" '
+    'applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    "</cellStyles>"
+    "</styleSheet>"
+)
+
+_ROOT_RELS_XML = (
+    f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+
+
+async def iterate(rows: Iterable[Any] | AsyncIterable[Any]) -> AsyncIterator[Any]:
+    """Iterate a list or an async iterable alike."""
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def peek(rows: AsyncIterable[Any]) -> tuple[Any, AsyncIterator[Any]] | None:
+    """
+    First item of ``rows`` plus an iterator over all of them.
+
+    Lets a route answer 404 for an empty result before it commits to a
+    streaming response. Returns None when ``rows`` is empty.
+    """
+    iterator = aiter(rows)
+    try:
+        first = await anext(iterator)
+    except StopAsyncIteration:
+        return None
+
+    async def chained() -> AsyncIterator[Any]:
+        yield first
+        async for item in iterator:
+            yield item
+
+    return first, chained()
+
+
+async def stream_csv(
+    rows: Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]],
+    columns: list[str] | None = None,
+    encoding: str = "utf-8",
+) -> AsyncIterator[bytes]:
+    """
+    Encode dict rows as CSV.
+
+    Args:
+        rows: Records to write
+        columns: Column order (keys of the first row by default; keys first
+            seen in later rows are not added)
+        encoding: Output encoding
+
+    Yields:
+        CSV bytes, about ``FLUSH_BYTES`` at a time
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if columns is not None:
+        writer.writerow(columns)
+
+    async for row in iterate(rows):
+        if columns is None:
+            columns = list(row)
+            writer.writerow(columns)
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode(encoding)
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode(encoding)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, dict | list):
+        return json_utils.dumps(value)
+    return value
+
+
+class _Sink:
+    """Non-seekable file object collecting whatever zipfile writes."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self.pending = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self.pending += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.pending = 0
+        return data
+
+
+class ZipStream:
+    """
+    ZIP archive written to memory chunks that are drained as they fill.
+
+    Entries are written one at a time through ``open``; ``drain`` hands
+    back the bytes produced since the previous call.
+    """
+
+    def __init__(self, compresslevel: int = 6) -> None:
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(
+            self._sink, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+        )
+
+    @property
+    def pending(self) -> int:
+        """Bytes written but not drained yet."""
+        return self._sink.pending
+
+    def open(self, filename: str, compress: bool = True):
+        """Writable handle for a new entry (stored when ``compress`` is False)."""
+        info = zipfile.ZipInfo(filename, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        return self._zip.open(info, "w", force_zip64=True)
+
+    def writestr(self, filename: str, data: bytes | str, compress: bool = True):
+        """Write a small entry in one call."""
+        with self.open(filename, compress) as entry:
+            entry.write(data.encode("utf-8") if isinstance(data, str) else data)
+
+    def drain(self) -> bytes:
+        """Bytes produced since the last drain."""
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Write the central directory; returns the remaining bytes."""
+        self._zip.close()
+        return self._sink.drain()
+
+
+@dataclass
+class ZipEntry:
+    """File to add to a streamed archive."""
+
+    filename: str
+    content: bytes | AsyncIterable[bytes]
+    # Deflate text formats; store formats that are already compressed
+    compress: bool = True
+
+
+async def stream_zip(
+    entries: Iterable[ZipEntry] | AsyncIterable[ZipEntry],
+) -> AsyncIterator[bytes]:
+    """
+    Archive entries as they are produced.
+
+    Each entry's content is read chunk by chunk and compressed straight into
+    the output, so only one chunk per entry is in memory at a time.
+    """
+    archive = ZipStream()
+    async for entry in iterate(entries):
+        with archive.open(entry.filename, entry.compress) as handle:
+            if isinstance(entry.content, bytes | bytearray):
+                handle.write(entry.content)
+            else:
+                async for chunk in entry.content:
+                    handle.write(chunk)
+                    if archive.pending >= FLUSH_BYTES:
+                        yield archive.drain()
+        if archive.pending:
+            yield archive.drain()
+    yield archive.close()
+
+
+async def stream_xlsx(
+    sheets: dict[str, Iterable[dict] | AsyncIterable[dict]],
+    title: str,
+    metadata: dict[str, Any] | None = None,
+    columns: list[str] | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Encode one or more row streams as an XLSX workbook.
+
+    Each sheet gets the title, generation date and header rows of
+    ``ExportService.generate_excel``. Column widths follow the header,
+    because the data is not known up front. When ``metadata`` is given, a
+    "Metadados" sheet is written last; it includes the row count.
+
+    Args:
+        sheets: Sheet name -> rows (dicts)
+        title: Title written above each sheet
+        metadata: Extra key/value pairs for the metadata sheet
+        columns: Column order (keys of each sheet's first row by default)
+
+    Yields:
+        XLSX bytes, about ``FLUSH_BYTES`` at a time
+    """
+    archive = ZipStream()
+    written: list[str] = []
+    total_rows = 0
+    generated_at = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+
+    async def write_sheet(name: str, rows, sheet_columns, sheet_title):
+        nonlocal total_rows
+        part = 0
+        header = sheet_columns
+        iterator = aiter(iterate(rows))
+        pending_row = None
+
+        if header is None:
+            try:
+                pending_row = await anext(iterator)
+            except StopAsyncIteration:
+                pending_row = None
+            header = list(pending_row) if pending_row is not None else []
+
+        while True:
+            part += 1
+            sheet_name = _sheet_name(name, part, written)
+            written.append(sheet_name)
+            path = f"xl/worksheets/sheet{len(written)}.xml"
+            row_count = 0
+            exhausted = True
+
+            with archive.open(path) as handle:
+                handle.write(_sheet_start(header, sheet_title, generated_at))
+                chunk: list[str] = []
+                size = 0
+                while True:
+                    if pending_row is not None:
+                        row, pending_row = pending_row, None
+                    else:
+                        try:
+                            row = await anext(iterator)
+                        except StopAsyncIteration:
+                            break
+                    if row_count >= EXCEL_MAX_ROWS - XLSX_HEADER_ROWS:
+                        pending_row = row
+                        exhausted = False
+                        break
+                    xml = _row_xml([row.get(column) for column in header])
+                    chunk.append(xml)
+                    size += len(xml)
+                    row_count += 1
+                    if size >= FLUSH_BYTES:
+                        handle.write("".join(chunk).encode("utf-8"))
+                        chunk.clear()
+                        size = 0
+                        if archive.pending >= FLUSH_BYTES:
+                            yield archive.drain()
+                handle.write("".join(chunk).encode("utf-8"))
+                handle.write(_sheet_end(len(header)))
+
+            total_rows += row_count
+            if archive.pending:
+                yield archive.drain()
+            if exhausted:
+                return
+
+    for name, rows in sheets.items():
+        async for data in write_sheet(name, rows, columns, title):
+            yield data
+
+    if metadata is not None:
+        meta_rows = [{"Campo": k, "Valor": str(v)} for k, v in metadata.items()]
+        meta_rows.append({"Campo": "total_records", "Valor": str(total_rows)})
+        async for data in write_sheet(
+            "Metadados", meta_rows, ["Campo", "Valor"], "Metadados"
+        ):
+            yield data
+
+    archive.writestr("xl/styles.xml", _STYLES_XML)
+    archive.writestr("xl/workbook.xml", _workbook_xml(written))
+    archive.writestr("xl/_rels/workbook.xml.rels", _workbook_rels_xml(len(written)))
+    archive.writestr("_rels/.rels", _ROOT_RELS_XML)
+    archive.writestr("[Content_Types].xml", _content_types_xml(len(written)))
+    yield archive.close()
+
+
+def _sheet_name(name: str, part: int, taken: list[str]) -> str:
+    base = name[:SHEET_NAME_MAX]
+    if part > 1:
+        suffix = f" ({part})"
+        base = name[: SHEET_NAME_MAX - len(suffix)] + suffix
+    candidate, n = base, 1
+    while candidate in taken:
+        n += 1
+        suffix = f" ({n})"
+        candidate = base[: SHEET_NAME_MAX - len(suffix)] + suffix
+    return candidate
+
+
+def _sheet_start(header: list[str], title: str, generated_at: str) -> bytes:
+    widths = "".join(
+        f'<col min="{i}" max="{i}" width="{min(max(len(str(c)) + 2, 12), 50)}" '
+        'customWidth="1"/>'
+        for i, c in enumerate(header, start=1)
+    )
+    cols = f"<cols>{widths}</cols>" if header else ""
+    header_cells = "".join(_string_cell(c, _STYLE_HEADER) for c in header)
+    return (
+        f'{_XML_DECL}<worksheet xmlns="{_MAIN_NS}">{cols}<sheetData>'
+        f"<row>{_string_cell(title, _STYLE_TITLE)}</row>"
+        f"<row>{_string_cell(generated_at, _STYLE_DATE)}</row>"
+        f"<row>{header_cells}</row>"
+    ).encode()
+
+
+def _sheet_end(column_count: int) -> bytes:
+    merges = ""
+    if column_count > 1:
+        last = get_column_letter(column_count)
+        merges = (
+            '<mergeCells count="2">'
+            f'<mergeCell ref="A1:{last}1"/><mergeCell ref="A2:{last}2"/>'
+            "</mergeCells>"
+        )
+    return f"</sheetData>{merges}</worksheet>".encode()
+
+
+def _row_xml(values: list[Any]) -> str:
+    return "<row>" + "".join(_cell(value) for value in values) + "</row>"
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return f'<c s="{_STYLE_CELL}"/>'
+    if isinstance(value, bool):
+        return f'<c s="{_STYLE_CELL}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int | Decimal) or (
+        isinstance(value, float) and math.isfinite(value)
+    ):
+        return f'<c s="{_STYLE_CELL}"><v>{value}</v></c>'
+    if isinstance(value, datetime | date):
+        value = value.isoformat()
+    elif isinstance(value, dict | list):
+        value = json_utils.dumps(value)
+    return _string_cell(str(value), _STYLE_CELL)
+
+
+def _string_cell(text: str, style: int) -> str:
+    text = _ILLEGAL_XML.sub("", text)
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c s="{style}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _workbook_xml(sheet_names: list[str]) -> str:
+    sheets = "".join(
+        f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+        for i, name in enumerate(sheet_names, start=1)
+    )
+    return (
+        f'{_XML_DECL}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+        f"<sheets>{sheets}</sheets></workbook>"
+    )
+
+
+def _workbook_rels_xml(sheet_count: int) -> str:
+    sheets = "".join(
+        f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, sheet_count + 1)
+    )
+    styles = (
+        f'<Relationship Id="rId{sheet_count + 1}" Type="{_REL_NS}/styles" '
+        'Target="styles.xml"/>'
+    )
+    return f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">{sheets}{styles}</Relationships>'
+
+
+def _content_types_xml(sheet_count: int) -> str:
+    ct = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+    sheets = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        f'ContentType="{ct}.worksheet+xml"/>'
+        for i in range(1, sheet_count + 1)
+    )
+    return (
+        f"{_XML_DECL}"
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/xl/workbook.xml" ContentType="{ct}.sheet.main+xml"/>'
+        f'<Override PartName="/xl/styles.xml" ContentType="{ct}.styles+xml"/>'
+        f"{sheets}</Types>"
+    )
@@ -10,10 +10,11 @@ License: Proprietary - All rights reserved
 """
 
 import asyncio
+import time
 from datetime import UTC, datetime
 from typing import Any
 
-from .cache import get_cache
+from .cache import CacheTTL, get_cache
 from .health_check import get_health_monitor
 from .registry import registry
 from .validators import AnomalyDetector, DataValidator
@@ -33,6 +34,38 @@ class TransparencyDataCollector:
         self.cache = get_cache()
         self.health_monitor = get_health_monitor()
 
+    def _plan_refresh(
+        self,
+        api_key: str,
+        method: str,
+        ttl: CacheTTL,
+        started: float,
+        call: dict[str, Any],
+        **params: Any,
+    ) -> None:
+        """
+        Let the warming planner repeat an upstream call before its entry expires.
+
+        Args:
+            api_key: API identifier
+            method: Client method that was called (e.g. "get_contracts")
+            ttl: TTL preset the result was cached with
+            started: time.monotonic() when the upstream call started
+            call: Arguments the client method was called with
+            **params: Parameters the result was cached under
+        """
+
+        async def refresh() -> None:
+            data = await getattr(registry.get_client(api_key), method)(**call)
+            if not data:
+                raise ValueError(f"{api_key}.{method} returned no data")
+            store = getattr(self.cache, method.replace("get_", "set_", 1))
+            store(api_key, data, **params)
+
+        self.cache.plan_refresh(
+            api_key, method, ttl, time.monotonic() - started, refresh, **params
+        )
+
     async def _collect_from_single_api(
         self,
         api_key: str,
@@ -77,15 +110,16 @@ class TransparencyDataCollector:
                 }
 
             # Fetch from API with timeout
+            call = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "year": year,
+                "municipality_code": municipality_code,
+                **kwargs,
+            }
+            started = time.monotonic()
             contracts = await asyncio.wait_for(
-                client.get_contracts(
-                    start_date=start_date,
-                    end_date=end_date,
-                    year=year,
-                    municipality_code=municipality_code,
-                    **kwargs,
-                ),
-                timeout=timeout,
+                client.get_contracts(**call), timeout=timeout
             )
 
             if contracts:
@@ -106,6 +140,15 @@ class TransparencyDataCollector:
                     year=year,
                     municipality_code=municipality_code,
                 )
+                self._plan_refresh(
+                    api_key,
+                    "get_contracts",
+                    CacheTTL.CONTRACTS,
+                    started,
+                    call,
+                    year=year,
+                    municipality_code=municipality_code,
+                )
 
                 return {"contracts": contracts, "source": api_key, "error": None}
 
@@ -265,6 +308,7 @@ class TransparencyDataCollector:
                     continue
 
                 # Fetch from API
+                started = time.monotonic()
                 expenses = await client.get_expenses(
                     year=year, municipality_code=municipality_code
                 )
@@ -286,6 +330,15 @@ class TransparencyDataCollector:
                         year=year,
                         municipality_code=municipality_code,
                     )
+                    self._plan_refresh(
+                        api_key,
+                        "get_expenses",
+                        CacheTTL.EXPENSES,
+                        started,
+                        {"year": year, "municipality_code": municipality_code},
+                        year=year,
+                        municipality_code=municipality_code,
+                    )
 
                     all_expenses.extend(expenses)
                     sources_used.append(api_key)
@@ -348,6 +401,7 @@ class TransparencyDataCollector:
                     continue
 
                 # Fetch from API
+                started = time.monotonic()
                 suppliers = await client.get_suppliers(
                     municipality_code=municipality_code
                 )
@@ -366,6 +420,14 @@ class TransparencyDataCollector:
                     self.cache.set_suppliers(
                         api_key, suppliers, municipality_code=municipality_code
                     )
+                    self._plan_refresh(
+                        api_key,
+                        "get_suppliers",
+                        CacheTTL.SUPPLIERS,
+                        started,
+                        {"municipality_code": municipality_code},
+                        municipality_code=municipality_code,
+                    )
 
                     all_suppliers.extend(suppliers)
                     sources_used.append(api_key)
@@ -12,10 +12,13 @@ License: Proprietary - All rights reserved
 
 import hashlib
 import json
+from collections.abc import Awaitable, Callable
 from datetime import UTC, datetime, timedelta
 from enum import Enum
 from typing import Any
 
+from src.services.cache_warming_planner import WarmingPlanner, warming_planner
+
 
 class CacheTTL(Enum):
     """Cache TTL (Time To Live) presets for different data types."""
@@ -186,17 +189,24 @@ class TransparencyCache:
     High-level cache interface for transparency APIs.
 
     Provides convenient methods for caching different types of transparency
-    data with appropriate TTL values.
+    data with appropriate TTL values. Lookups are reported to a warming
+    planner, which refreshes popular entries before they expire.
     """
 
-    def __init__(self, backend: MemoryCache | None = None):
+    def __init__(
+        self,
+        backend: MemoryCache | None = None,
+        planner: WarmingPlanner | None = None,
+    ):
         """
         Initialize transparency cache.
 
         Args:
             backend: Cache backend (defaults to MemoryCache)
+            planner: Warming planner fed with every lookup (optional)
         """
         self.backend = backend or MemoryCache(max_size=2000)
+        self.planner = planner
 
     def _generate_key(self, api_name: str, method: str, **params: Any) -> str:
         """
@@ -216,10 +226,42 @@ class TransparencyCache:
         key_hash = hashlib.md5(key_base.encode()).hexdigest()
         return f"transparency:{key_hash}"
 
+    def _lookup(self, api_name: str, method: str, **params: Any) -> Any | None:
+        """Read an entry and report the hit or miss to the planner."""
+        key = self._generate_key(api_name, method, **params)
+        value = self.backend.get(key)
+        if self.planner is not None:
+            self.planner.record_access(key, hit=value is not None)
+        return value
+
+    def plan_refresh(
+        self,
+        api_name: str,
+        method: str,
+        ttl: CacheTTL,
+        cost: float,
+        refresh: Callable[[], Awaitable[Any]],
+        **params: Any,
+    ) -> None:
+        """
+        Let the planner recompute an entry that was just stored.
+
+        Args:
+            api_name: Name of API client
+            method: Method name the entry was stored under
+            ttl: TTL preset of the entry
+            cost: Seconds the upstream call took
+            refresh: Coroutine function fetching and storing the entry again
+            **params: Method parameters
+        """
+        if self.planner is None:
+            return
+        key = self._generate_key(api_name, method, **params)
+        self.planner.record_fill(key, ttl.value, cost, refresh)
+
     def get_contracts(self, api_name: str, **params: Any) -> Any | None:
         """Get cached contracts."""
-        key = self._generate_key(api_name, "get_contracts", **params)
-        return self.backend.get(key)
+        return self._lookup(api_name, "get_contracts", **params)
 
     def set_contracts(self, api_name: str, data: Any, **params: Any) -> None:
         """Cache contracts data."""
@@ -228,8 +270,7 @@ class TransparencyCache:
 
     def get_expenses(self, api_name: str, **params: Any) -> Any | None:
         """Get cached expenses."""
-        key = self._generate_key(api_name, "get_expenses", **params)
-        return self.backend.get(key)
+        return self._lookup(api_name, "get_expenses", **params)
 
     def set_expenses(self, api_name: str, data: Any, **params: Any) -> None:
         """Cache expenses data."""
@@ -238,8 +279,7 @@ class TransparencyCache:
 
     def get_suppliers(self, api_name: str, **params: Any) -> Any | None:
         """Get cached suppliers."""
-        key = self._generate_key(api_name, "get_suppliers", **params)
-        return self.backend.get(key)
+        return self._lookup(api_name, "get_suppliers", **params)
 
     def set_suppliers(self, api_name: str, data: Any, **params: Any) -> None:
         """Cache suppliers data."""
@@ -248,8 +288,7 @@ class TransparencyCache:
 
     def get_bidding_processes(self, api_name: str, **params: Any) -> Any | None:
         """Get cached bidding processes."""
-        key = self._generate_key(api_name, "get_bidding_processes", **params)
-        return self.backend.get(key)
+        return self._lookup(api_name, "get_bidding_processes", **params)
 
     def set_bidding_processes(self, api_name: str, data: Any, **params: Any) -> None:
         """Cache bidding processes data."""
@@ -258,8 +297,7 @@ class TransparencyCache:
 
     def get_municipalities(self, api_name: str) -> Any | None:
         """Get cached municipalities."""
-        key = self._generate_key(api_name, "get_municipalities")
-        return self.backend.get(key)
+        return self._lookup(api_name, "get_municipalities")
 
     def set_municipalities(self, api_name: str, data: Any) -> None:
         """Cache municipalities data."""
@@ -268,8 +306,7 @@ class TransparencyCache:
 
     def get_health_check(self, api_name: str) -> Any | None:
         """Get cached health check result."""
-        key = self._generate_key(api_name, "test_connection")
-        return self.backend.get(key)
+        return self._lookup(api_name, "test_connection")
 
     def set_health_check(self, api_name: str, result: bool) -> None:
         """Cache health check result."""
@@ -307,7 +344,7 @@ def get_cache() -> TransparencyCache:
     global _global_cache
 
     if _global_cache is None:
-        _global_cache = TransparencyCache()
+        _global_cache = TransparencyCache(planner=warming_planner)
 
     return _global_cache
 
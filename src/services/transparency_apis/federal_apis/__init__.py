@@ -36,6 +36,13 @@ from .exceptions import (
     exception_from_response,
 )
 from .ibge_client import IBGEClient
+from .ibge_store import (
+    IBGE_BULK_TABLES,
+    IBGEBulkSync,
+    IBGEIndicatorStore,
+    IBGETableSpec,
+    get_ibge_store,
+)
 from .inep_client import INEPClient
 from .minha_receita_client import MinhaReceitaClient
 from .pncp_client import PNCPClient
@@ -66,6 +73,12 @@ __all__ = [
     "BCBClient",  # Alias
     "ComprasGovClient",
     "MinhaReceitaClient",
+    # Local IBGE indicator store
+    "IBGEIndicatorStore",
+    "IBGEBulkSync",
+    "IBGETableSpec",
+    "IBGE_BULK_TABLES",
+    "get_ibge_store",
     # Exceptions
     "FederalAPIError",
     "NetworkError",
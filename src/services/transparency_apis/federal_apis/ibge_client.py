@@ -16,7 +16,7 @@ import hashlib
 import json
 from datetime import datetime
 from functools import wraps
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import httpx
 from pydantic import BaseModel, field_validator
@@ -27,6 +27,9 @@ from .exceptions import NetworkError, ServerError, TimeoutError, exception_from_
 from .metrics import FederalAPIMetrics
 from .retry import retry_with_backoff
 
+if TYPE_CHECKING:
+    from .ibge_store import IBGEIndicatorStore
+
 logger = get_logger(__name__)
 
 
@@ -139,15 +142,18 @@ class IBGEClient:
     AGREGADOS_URL = "https://servicodados.ibge.gov.br/api/v3/agregados"
     LOCALIDADES_URL = "https://servicodados.ibge.gov.br/api/v1/localidades"
 
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, store: "IBGEIndicatorStore | None" = None):
         """
         Initialize IBGE API client.
 
         Args:
             timeout: Request timeout in seconds
+            store: Optional local indicator store (see ibge_store) used to
+                serve municipal/state indicators without live calls
         """
         self.base_url = self.BASE_URL
         self.timeout = timeout
+        self.store = store
         self.client = httpx.AsyncClient(
             timeout=httpx.Timeout(timeout),
             limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
@@ -386,6 +392,26 @@ class IBGEClient:
         self.logger.info(f"Fetched {len(states)} states")
         return states
 
+    def _from_store(
+        self,
+        table_ids: list[str],
+        location_ids: list[str] | None = None,
+        variables: list[str] | None = None,
+        year: int | None = None,
+    ) -> dict[str, Any] | None:
+        """Answer an indicator lookup from the local store, None to go live."""
+        if self.store is None:
+            return None
+        stored = self.store.get_tables(
+            table_ids,
+            location_ids=location_ids,
+            variables=variables,
+            periods=[year] if year else None,
+        )
+        if stored is not None:
+            self.logger.debug(f"Serving IBGE tables {table_ids} from store")
+        return stored
+
     @cache_with_ttl(ttl_seconds=3600)  # 1 hour cache
     async def get_population(
         self, location_id: str | None = None, year: int | None = None
@@ -400,6 +426,12 @@ class IBGEClient:
         Returns:
             Population data
         """
+        stored = self._from_store(
+            ["6579"], [location_id] if location_id else None, ["9324"], year
+        )
+        if stored is not None:
+            return stored["6579"]
+
         # População estimada (agregado 6579)
         url = f"{self.AGREGADOS_URL}/6579/periodos"
 
@@ -449,6 +481,10 @@ class IBGEClient:
                     "93",  # População residente por cor ou raça
                 ]
 
+            stored = self._from_store(indicators, location_ids)
+            if stored is not None:
+                return stored
+
             results = {}
 
             for indicator_id in indicators:
@@ -490,6 +526,10 @@ class IBGEClient:
             GDP per capita data by location
         """
         try:
+            stored = self._from_store(["5938"], location_ids, ["37"], year)
+            if stored is not None:
+                return stored["5938"]
+
             # PIB per capita (agregado 5938)
             url = f"{self.AGREGADOS_URL}/5938/periodos"
 
@@ -546,6 +586,10 @@ class IBGEClient:
                 "4102",  # Razão entre rendimentos
             ]
 
+            stored = self._from_store(indicators, location_ids)
+            if stored is not None:
+                return stored
+
             results = {}
 
             for indicator_id in indicators:
@@ -600,6 +644,10 @@ class IBGEClient:
                 "7109",  # Anos de estudo
             ]
 
+            stored = self._from_store(indicators, location_ids)
+            if stored is not None:
+                return stored
+
             results = {}
 
             for indicator_id in indicators:
@@ -654,6 +702,10 @@ class IBGEClient:
                 "8470",  # Domicílios com energia elétrica
             ]
 
+            stored = self._from_store(indicators, location_ids)
+            if stored is not None:
+                return stored
+
             results = {}
 
             for indicator_id in indicators:
@@ -692,7 +744,9 @@ class IBGEClient:
         """
         Get comprehensive social equity data for analysis.
 
-        This is the main method for Dandara agent integration.
+        This is the main method for Dandara agent integration. When a local
+        indicator store is configured and synced, municipal and state queries
+        are answered from it and IBGE is only called for national data.
 
         Args:
             state_id: State ID for state-level data
@@ -701,6 +755,14 @@ class IBGEClient:
         Returns:
             Comprehensive social data including all major indicators
         """
+        if self.store is not None:
+            stored = self.store.get_comprehensive_social_data(
+                state_id, municipality_ids
+            )
+            if stored is not None:
+                self.logger.debug("Serving comprehensive social data from store")
+                return stored
+
         try:
             self.logger.info(
                 f"Fetching comprehensive social data: state={state_id}, municipalities={municipality_ids}"
@@ -0,0 +1,730 @@
+"""
+IBGE Local Indicator Store
+
+Municipality-scale columnar cache for the IBGE SIDRA tables used by the
+social equity agents (Dandara, Lampião). A bulk sync job downloads every
+table at the territorial level the live client queries it at - all
+municipalities (N6[all]) for census and estimate tables, Brazil (N1[all])
+for the PNAD/SIS surveys - and writes it as one ``.npy`` file per column;
+readers memory-map those columns and answer lookups and multi-municipality
+slices with ``np.searchsorted`` instead of live calls.
+
+Layout on disk::
+
+    <root>/manifest.json              table versions, variables, names
+    <root>/<table_id>/<version>/      locality.npy, variable.npy,
+                                      result.npy, period.npy, value.npy
+
+Rows are sorted by (locality, variable, result, period), so every
+municipality - and every state, since IBGE municipal codes start with the
+two-digit UF code - is a contiguous range of rows.
+
+Author: Anderson Henrique da Silva
+Created: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from src.core import get_logger
+
+if TYPE_CHECKING:
+    from .ibge_client import IBGEClient
+
+logger = get_logger(__name__)
+
+COLUMNS = ("locality", "variable", "result", "period", "value")
+COLUMN_DTYPES = {
+    "locality": np.int64,
+    "variable": np.int32,
+    "result": np.int16,
+    "period": np.int32,
+    "value": np.float64,
+}
+
+# SIDRA placeholders for suppressed / not applicable / unavailable values
+MISSING_VALUE_MARKERS = {"", "-", "--", "...", "X", "x", None}
+
+# SIDRA territorial levels (nível territorial) mirrored by the store
+MUNICIPAL_LEVEL = "N6"
+LEVEL_NAMES = {"N1": "Brasil", "N3": "Unidade da Federação", "N6": "Município"}
+
+
+@dataclass(frozen=True)
+class IBGETableSpec:
+    """A SIDRA table (agregado) mirrored by the local store."""
+
+    table_id: str
+    category: str
+    variables: tuple[str, ...] | None = None  # None = all variables
+    periods_to_keep: int = 3
+    level: str = MUNICIPAL_LEVEL  # territorial level the table is synced at
+
+
+# Same indicators (and levels) fetched live by IBGEClient.get_comprehensive_social_data
+IBGE_BULK_TABLES: tuple[IBGETableSpec, ...] = (
+    IBGETableSpec("6579", "demographic"),  # População estimada
+    IBGETableSpec("1301", "demographic"),  # População residente por sexo
+    IBGETableSpec("93", "demographic"),  # População residente por cor ou raça
+    IBGETableSpec("5938", "economic", variables=("37",)),  # PIB per capita
+    IBGETableSpec("4099", "poverty", level="N1"),  # Abaixo da linha de pobreza
+    IBGETableSpec("4100", "poverty", level="N1"),  # Coeficiente de Gini
+    IBGETableSpec("4102", "poverty", level="N1"),  # Razão entre rendimentos
+    IBGETableSpec("7113", "education", level="N1"),  # Taxa de analfabetismo
+    IBGETableSpec("7267", "education", level="N1"),  # Taxa de escolarização
+    IBGETableSpec("7109", "education", level="N1"),  # Anos de estudo
+    IBGETableSpec("8468", "housing"),  # Abastecimento de água
+    IBGETableSpec("8469", "housing"),  # Esgotamento sanitário
+    IBGETableSpec("8470", "housing"),  # Energia elétrica
+)
+
+SOCIAL_DATA_CATEGORIES = ("demographic", "economic", "poverty", "education", "housing")
+
+
+def _parse_sidra_value(raw: Any) -> float:
+    """Convert a SIDRA serie value (string) to float, NaN when suppressed."""
+    if raw in MISSING_VALUE_MARKERS:
+        return np.nan
+    try:
+        return float(str(raw).replace(",", "."))
+    except ValueError:
+        return np.nan
+
+
+def _format_sidra_value(value: float) -> str:
+    """Format a stored value back into SIDRA's string representation."""
+    if np.isnan(value):
+        return "..."
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _ranges_to_index(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Concatenate the half-open row ranges [left, right) into one index."""
+    lengths = right - left
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(left - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total, dtype=np.int64) + offsets
+
+
+class IBGEIndicatorStore:
+    """
+    Memory-mapped columnar store of IBGE indicators by municipality.
+
+    Readers are cheap to create and safe to share: column arrays are opened
+    with ``mmap_mode="r"`` and the manifest is reloaded only when its mtime
+    changes, so a sync running in another process (Celery) is picked up
+    without restarting the API.
+    """
+
+    def __init__(self, root: str | Path):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the manifest and table columns
+        """
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._manifest: dict[str, Any] = {"tables": {}, "localities": {}}
+        self._manifest_mtime: float | None = None
+        self._columns: dict[str, dict[str, np.ndarray]] = {}
+
+    @property
+    def manifest_path(self) -> Path:
+        """Path of the manifest file."""
+        return self.root / "manifest.json"
+
+    # ------------------------------------------------------------------
+    # Manifest handling
+    # ------------------------------------------------------------------
+
+    def _refresh_manifest(self) -> dict[str, Any]:
+        """Reload the manifest if it changed on disk."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime
+        except FileNotFoundError:
+            return self._manifest
+
+        if mtime != self._manifest_mtime:
+            with self._lock:
+                if mtime != self._manifest_mtime:
+                    with open(self.manifest_path, encoding="utf-8") as f:
+                        self._manifest = json.load(f)
+                    self._manifest_mtime = mtime
+                    self._columns = {}
+        return self._manifest
+
+    def _write_manifest(self, manifest: dict[str, Any]) -> None:
+        """Atomically replace the manifest."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def table_info(self, table_id: str) -> dict[str, Any] | None:
+        """Get manifest metadata for a table, or None if never synced."""
+        return self._refresh_manifest()["tables"].get(str(table_id))
+
+    def table_version(self, table_id: str) -> str | None:
+        """Get the upstream version a table was synced from."""
+        info = self.table_info(table_id)
+        return info["version"] if info else None
+
+    def has_tables(self, table_ids: Iterable[str]) -> bool:
+        """Check whether all given tables are available locally."""
+        tables = self._refresh_manifest()["tables"]
+        return all(str(t) in tables for t in table_ids)
+
+    def table_periods(self, table_id: str) -> frozenset[int]:
+        """Get the periods (years) stored for a table."""
+        info = self.table_info(table_id)
+        if info is None:
+            return frozenset()
+        if "periods" in info:
+            return frozenset(info["periods"])
+        # Tables synced before periods were recorded in the manifest
+        columns = self._load_columns(table_id)
+        return frozenset(np.unique(columns["period"]).tolist())
+
+    def table_level(self, table_id: str) -> str:
+        """Get the territorial level a table was synced at."""
+        info = self.table_info(table_id) or {}
+        return info.get("level", MUNICIPAL_LEVEL)
+
+    def locality_name(self, locality_id: int | str) -> str | None:
+        """Get the municipality name recorded during sync."""
+        return self._refresh_manifest()["localities"].get(str(locality_id))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write_table(
+        self,
+        table_id: str,
+        version: str,
+        sidra_payload: list[dict[str, Any]],
+        level: str = MUNICIPAL_LEVEL,
+    ) -> int:
+        """
+        Convert a SIDRA ``/agregados`` response into columns and persist it.
+
+        Args:
+            table_id: SIDRA table (agregado) ID
+            version: Upstream version identifier for refresh decisions
+            sidra_payload: Raw JSON list returned by the agregados endpoint
+            level: SIDRA territorial level the payload was requested at
+
+        Returns:
+            Number of rows written
+        """
+        table_id = str(table_id)
+        localities: dict[str, str] = {}
+        variables: dict[str, dict[str, Any]] = {}
+        results_meta: dict[str, list[Any]] = {}
+        rows: dict[str, list] = {name: [] for name in COLUMNS}
+
+        for variable in sidra_payload:
+            variable_id = int(variable["id"])
+            variables[str(variable_id)] = {
+                "name": variable.get("variavel"),
+                "unit": variable.get("unidade"),
+            }
+            resultados = variable.get("resultados", [])
+            results_meta[str(variable_id)] = [
+                r.get("classificacoes", []) for r in resultados
+            ]
+            for result_idx, resultado in enumerate(resultados):
+                for series in resultado.get("series", []):
+                    localidade = series["localidade"]
+                    locality_id = int(localidade["id"])
+                    if localidade.get("nome"):
+                        localities[str(locality_id)] = localidade["nome"]
+                    for period, raw in series.get("serie", {}).items():
+                        rows["locality"].append(locality_id)
+                        rows["variable"].append(variable_id)
+                        rows["result"].append(result_idx)
+                        rows["period"].append(int(period))
+                        rows["value"].append(_parse_sidra_value(raw))
+
+        columns = {
+            name: np.asarray(values, dtype=COLUMN_DTYPES[name])
+            for name, values in rows.items()
+        }
+        order = np.lexsort(
+            (
+                columns["period"],
+                columns["result"],
+                columns["variable"],
+                columns["locality"],
+            )
+        )
+        columns = {name: col[order] for name, col in columns.items()}
+
+        version_dir = hashlib.sha1(version.encode()).hexdigest()[:12]
+        table_dir = self.root / table_id
+        target = table_dir / version_dir
+        tmp_target = table_dir / f".{version_dir}.tmp"
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        tmp_target.mkdir(parents=True, exist_ok=True)
+        for name, col in columns.items():
+            np.save(tmp_target / f"{name}.npy", col)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_target, target)
+
+        with self._lock:
+            manifest = json.loads(json.dumps(self._refresh_manifest()))
+            manifest.setdefault("tables", {})[table_id] = {
+                "version": version,
+                "level": level,
+                "directory": version_dir,
+                "synced_at": datetime.now().isoformat(),
+                "rows": int(len(columns["locality"])),
+                "periods": np.unique(columns["period"]).tolist(),
+                "variables": variables,
+                "results": results_meta,
+            }
+            manifest.setdefault("localities", {}).update(localities)
+            self._write_manifest(manifest)
+
+        # Old versions can be unlinked safely: open memory maps keep their inode
+        for child in table_dir.iterdir():
+            if child.name != version_dir and not child.name.startswith("."):
+                shutil.rmtree(child, ignore_errors=True)
+
+        logger.info(
+            f"IBGE store table {table_id} written",
+            rows=len(columns["locality"]),
+            version=version,
+        )
+        return int(len(columns["locality"]))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _load_columns(self, table_id: str) -> dict[str, np.ndarray] | None:
+        """Memory-map the columns of a table."""
+        info = self.table_info(table_id)
+        if info is None:
+            return None
+
+        columns = self._columns.get(table_id)
+        if columns is None:
+            table_dir = self.root / table_id / info["directory"]
+            columns = {
+                name: np.load(table_dir / f"{name}.npy", mmap_mode="r")
+                for name in COLUMNS
+            }
+            self._columns[table_id] = columns
+        return columns
+
+    def slice(
+        self,
+        table_id: str,
+        locality_ids: Iterable[int | str] | None = None,
+        state_id: int | str | None = None,
+        variables: Iterable[int | str] | None = None,
+        periods: Iterable[int | str] | None = None,
+    ) -> dict[str, np.ndarray] | None:
+        """
+        Select rows of a table for many municipalities at once.
+
+        Args:
+            table_id: SIDRA table ID
+            locality_ids: Seven-digit municipality codes, or None for all
+            state_id: Two-digit UF code restricting rows to one state
+            variables: Variable IDs to keep, or None for all
+            periods: Periods (years) to keep, or None for all
+
+        Returns:
+            Column name -> array mapping (read-only views when the selection is
+            a single contiguous range), or None if the table is not synced.
+            Tables synced above municipal level have no municipal rows, so
+            their (national) rows are returned whatever the locality filter.
+        """
+        columns = self._load_columns(str(table_id))
+        if columns is None:
+            return None
+        if self.table_level(str(table_id)) != MUNICIPAL_LEVEL:
+            locality_ids = state_id = None
+
+        locality = columns["locality"]
+        index: np.ndarray | slice = slice(0, len(locality))
+
+        if state_id is not None:
+            low = int(state_id) * 100000
+            start = int(np.searchsorted(locality, low, side="left"))
+            stop = int(np.searchsorted(locality, low + 100000, side="left"))
+            index = slice(start, stop)
+
+        if locality_ids is not None:
+            ids = np.unique(np.asarray([int(i) for i in locality_ids], dtype=np.int64))
+            left = np.searchsorted(locality, ids, side="left")
+            right = np.searchsorted(locality, ids, side="right")
+            rows = _ranges_to_index(left, right)
+            if isinstance(index, slice):
+                rows = rows[(rows >= index.start) & (rows < index.stop)]
+            index = rows
+
+        selected = {name: col[index] for name, col in columns.items()}
+
+        mask = None
+        if variables is not None:
+            wanted = np.asarray([int(v) for v in variables], dtype=np.int32)
+            mask = np.isin(selected["variable"], wanted)
+        if periods is not None:
+            wanted = np.asarray([int(p) for p in periods], dtype=np.int32)
+            period_mask = np.isin(selected["period"], wanted)
+            mask = period_mask if mask is None else mask & period_mask
+        if mask is not None:
+            selected = {name: col[mask] for name, col in selected.items()}
+
+        return selected
+
+    def get_latest_values(
+        self,
+        table_id: str,
+        variable_id: int | str,
+        locality_ids: Iterable[int | str] | None = None,
+        state_id: int | str | None = None,
+    ) -> dict[str, float]:
+        """
+        Get the most recent value of one variable per municipality.
+
+        Args:
+            table_id: SIDRA table ID
+            variable_id: Variable ID
+            locality_ids: Municipality codes, or None for all
+            state_id: Two-digit UF code, or None
+
+        Returns:
+            Mapping of municipality code -> latest value (first result only)
+        """
+        rows = self.slice(
+            table_id,
+            locality_ids=locality_ids,
+            state_id=state_id,
+            variables=[variable_id],
+        )
+        if rows is None or len(rows["locality"]) == 0:
+            return {}
+
+        keep = (rows["result"] == 0) & ~np.isnan(rows["value"])
+        locality = rows["locality"][keep]
+        value = rows["value"][keep]
+        if len(locality) == 0:
+            return {}
+
+        # Rows are sorted by period within a locality: the last row wins
+        last = np.r_[locality[1:] != locality[:-1], True]
+        return {
+            str(loc): float(v)
+            for loc, v in zip(locality[last], value[last], strict=True)
+        }
+
+    def to_sidra(
+        self,
+        table_id: str,
+        locality_ids: Iterable[int | str] | None = None,
+        state_id: int | str | None = None,
+        variables: Iterable[int | str] | None = None,
+        periods: Iterable[int | str] | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """
+        Rebuild the SIDRA JSON shape for a selection.
+
+        Consumers written against the live ``/agregados`` payload keep working
+        unchanged when served from the store.
+        """
+        info = self.table_info(table_id)
+        rows = self.slice(
+            table_id,
+            locality_ids=locality_ids,
+            state_id=state_id,
+            variables=variables,
+            periods=periods,
+        )
+        if info is None or rows is None:
+            return None
+
+        level = info.get("level", MUNICIPAL_LEVEL)
+        nivel = {"id": level, "nome": LEVEL_NAMES.get(level, level)}
+
+        localities = self._manifest.get("localities", {})
+        payload = []
+        for variable_id, meta in info["variables"].items():
+            if variables is not None and int(variable_id) not in {
+                int(v) for v in variables
+            }:
+                continue
+            var_mask = rows["variable"] == int(variable_id)
+            resultados = []
+            for result_idx, classificacoes in enumerate(
+                info["results"].get(variable_id, [])
+            ):
+                mask = var_mask & (rows["result"] == result_idx)
+                series: dict[int, dict[str, str]] = {}
+                for loc, period, value in zip(
+                    rows["locality"][mask].tolist(),
+                    rows["period"][mask].tolist(),
+                    rows["value"][mask].tolist(),
+                    strict=True,
+                ):
+                    series.setdefault(loc, {})[str(period)] = _format_sidra_value(value)
+                resultados.append(
+                    {
+                        "classificacoes": classificacoes,
+                        "series": [
+                            {
+                                "localidade": {
+                                    "id": str(loc),
+                                    "nivel": nivel,
+                                    "nome": localities.get(str(loc)),
+                                },
+                                "serie": serie,
+                            }
+                            for loc, serie in series.items()
+                        ],
+                    }
+                )
+            payload.append(
+                {
+                    "id": variable_id,
+                    "variavel": meta.get("name"),
+                    "unidade": meta.get("unit"),
+                    "resultados": resultados,
+                }
+            )
+        return payload
+
+    def get_tables(
+        self,
+        table_ids: Iterable[str],
+        location_ids: Iterable[int | str] | None = None,
+        variables: Iterable[int | str] | None = None,
+        periods: Iterable[int | str] | None = None,
+    ) -> dict[str, list[dict[str, Any]] | None] | None:
+        """
+        Serve the per-indicator ``IBGEClient`` lookups from local tables.
+
+        Args:
+            table_ids: SIDRA table IDs
+            location_ids: Municipality (seven-digit) or state (two-digit)
+                codes; None means national data
+            variables: Variable IDs to keep, or None for all
+            periods: Periods (years) to keep, or None for all
+
+        Returns:
+            Table ID -> SIDRA payload, or None when a table is not synced or
+            the selection cannot be answered locally (a requested period that
+            was not synced, national data of a municipal table, several
+            states, states mixed with municipalities)
+        """
+        table_ids = [str(t) for t in table_ids]
+        if not self.has_tables(table_ids):
+            return None
+        if periods is not None:
+            periods = [int(p) for p in periods]
+            if any(not self.table_periods(t).issuperset(periods) for t in table_ids):
+                return None
+
+        codes = [str(c) for c in location_ids or ()]
+        states = [c for c in codes if len(c) <= 2]
+        municipalities = [c for c in codes if len(c) > 2] or None
+        if len(states) > 1 or (states and municipalities):
+            return None
+        if not codes and any(self.table_level(t) == MUNICIPAL_LEVEL for t in table_ids):
+            return None
+
+        return {
+            table_id: self.to_sidra(
+                table_id,
+                locality_ids=municipalities,
+                state_id=states[0] if states else None,
+                variables=variables,
+                periods=periods,
+            )
+            for table_id in table_ids
+        }
+
+    def get_comprehensive_social_data(
+        self,
+        state_id: str | None = None,
+        municipality_ids: list[str] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Serve ``IBGEClient.get_comprehensive_social_data`` from local tables.
+
+        Tables that have not been synced (yet, or because their last sync
+        failed) are returned as None and listed in ``errors``, like indicators
+        that fail in the live method.
+
+        Returns:
+            Same structure as the live method, or None when the selection is
+            national or no table has been synced yet
+        """
+        if not state_id and not municipality_ids:
+            return None
+        synced = {
+            spec.table_id for spec in IBGE_BULK_TABLES if self.table_info(spec.table_id)
+        }
+        if not synced:
+            return None
+
+        state_filter = None if municipality_ids else state_id
+        data: dict[str, Any] = {category: {} for category in SOCIAL_DATA_CATEGORIES}
+        errors = []
+        for spec in IBGE_BULK_TABLES:
+            if spec.table_id not in synced:
+                data[spec.category][spec.table_id] = None
+                errors.append(f"IBGE table {spec.table_id} not synced")
+                continue
+            data[spec.category][spec.table_id] = self.to_sidra(
+                spec.table_id,
+                locality_ids=municipality_ids,
+                state_id=state_filter,
+                variables=spec.variables,
+            )
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "source": "IBGE",
+            "served_from": "local_store",
+            "versions": {table_id: self.table_version(table_id) for table_id in synced},
+            "locations": {
+                "state_id": state_id,
+                "municipality_ids": municipality_ids,
+            },
+            "demographic": data["demographic"],
+            "economic": data["economic"].get("5938"),
+            "poverty": data["poverty"],
+            "education": data["education"],
+            "housing": data["housing"],
+            "errors": errors,
+        }
+
+
+class IBGEBulkSync:
+    """
+    Bulk download job that mirrors SIDRA tables into an IBGEIndicatorStore.
+
+    Each table's period list is checked first; the full table (at its
+    ``level``) is downloaded only when the latest period or its modification date differs
+    from the version already stored.
+    """
+
+    def __init__(
+        self,
+        client: "IBGEClient",
+        store: IBGEIndicatorStore,
+        tables: tuple[IBGETableSpec, ...] = IBGE_BULK_TABLES,
+        request_interval: float = 0.5,
+    ):
+        """
+        Initialize the sync job.
+
+        Args:
+            client: IBGE client used for requests (retries and metrics)
+            store: Destination store
+            tables: Tables to mirror
+            request_interval: Pause between tables to avoid hammering SIDRA
+        """
+        self.client = client
+        self.store = store
+        self.tables = tables
+        self.request_interval = request_interval
+
+    async def fetch_periods(self, table_id: str) -> list[dict[str, Any]]:
+        """Get the period list (with modification dates) of a table."""
+        return await self.client._make_request(
+            f"{self.client.AGREGADOS_URL}/{table_id}/periodos"
+        )
+
+    @staticmethod
+    def version_from_periods(periods: list[dict[str, Any]]) -> str:
+        """Derive a version string from the latest period entry."""
+        if not periods:
+            return "empty"
+        latest = periods[-1]
+        return f"{latest.get('id')}@{latest.get('modificacao', '')}"
+
+    async def sync_table(
+        self, spec: IBGETableSpec, force: bool = False
+    ) -> dict[str, Any]:
+        """
+        Sync one table if its upstream version changed.
+
+        Returns:
+            Status dict with ``status`` in {"updated", "unchanged", "empty"}
+        """
+        periods = await self.fetch_periods(spec.table_id)
+        version = self.version_from_periods(periods)
+
+        if not force and self.store.table_version(spec.table_id) == version:
+            return {"status": "unchanged", "version": version}
+        if not periods:
+            return {"status": "empty", "version": version}
+
+        period_ids = "|".join(str(p["id"]) for p in periods[-spec.periods_to_keep :])
+        variables = "|".join(spec.variables) if spec.variables else "all"
+        url = (
+            f"{self.client.AGREGADOS_URL}/{spec.table_id}/periodos/{period_ids}"
+            f"/variaveis/{variables}?localidades={spec.level}[all]"
+        )
+        payload = await self.client._make_request(url)
+        rows = self.store.write_table(spec.table_id, version, payload, spec.level)
+        return {"status": "updated", "version": version, "rows": rows}
+
+    async def sync_all(self, force: bool = False) -> dict[str, Any]:
+        """
+        Sync every configured table.
+
+        Failures are recorded per table so one unavailable table does not
+        block the others.
+        """
+        results: dict[str, Any] = {}
+        for spec in self.tables:
+            try:
+                results[spec.table_id] = await self.sync_table(spec, force=force)
+            except Exception as e:
+                logger.warning(f"IBGE bulk sync failed for table {spec.table_id}: {e}")
+                results[spec.table_id] = {"status": "failed", "error": str(e)}
+            await asyncio.sleep(self.request_interval)
+
+        summary = {
+            status: sum(1 for r in results.values() if r["status"] == status)
+            for status in ("updated", "unchanged", "failed")
+        }
+        logger.info("IBGE bulk sync finished", **summary)
+        return {"tables": results, "summary": summary}
+
+
+_ibge_store: IBGEIndicatorStore | None = None
+
+
+def get_ibge_store() -> IBGEIndicatorStore:
+    """Get the process-wide IBGE indicator store."""
+    global _ibge_store
+    if _ibge_store is None:
+        from src.core.config import settings
+
+        _ibge_store = IBGEIndicatorStore(settings.ibge_store_path)
+    return _ibge_store
@@ -10,11 +10,13 @@ Created: 2025-10-16 16:15:00 -03:00
 License: Proprietary - All rights reserved
 """
 
+import asyncio
 from datetime import datetime
 from enum import Enum
 from typing import Any
 
 from src.core import get_logger
+from src.services.aggregation_cube import get_aggregation_cube
 from src.services.transparency_apis.federal_apis.bcb_client import (
     BancoCentralClient as BCBClient,
 )
@@ -73,6 +75,9 @@ class TransparencyOrchestrator:
         self._source_usage: dict[str, int] = {}
         self._error_count: dict[str, int] = {}
 
+        # Aggregation cube ingests still running (kept referenced until done)
+        self._ingest_tasks: set[asyncio.Task] = set()
+
         logger.info(
             "transparency_orchestrator_initialized",
             sources=["portal_federal", "pncp", "compras_gov", "bcb", "tce", "state"],
@@ -140,6 +145,7 @@ class TransparencyOrchestrator:
         }
 
         # Execute strategy
+        query_metadata = results["metadata"]
         if strategy == QueryStrategy.FALLBACK:
             results = await self._execute_fallback(sources, "contracts", filters)
         elif strategy == QueryStrategy.AGGREGATE:
@@ -148,11 +154,19 @@ class TransparencyOrchestrator:
             results = await self._execute_fastest(sources, "contracts", filters)
         elif strategy == QueryStrategy.PARALLEL:
             results = await self._execute_parallel(sources, "contracts", filters)
+        results["metadata"] = {**query_metadata, **results["metadata"]}
 
         # Add performance metadata
         duration = (datetime.now() - start_time).total_seconds()
         results["metadata"]["duration_seconds"] = duration
 
+        # Feed the aggregation cube so charts read pre-aggregated rollups,
+        # in the background so the response does not wait for it
+        if results["data"]:
+            task = asyncio.create_task(self._ingest(list(results["data"])))
+            self._ingest_tasks.add(task)
+            task.add_done_callback(self._ingest_tasks.discard)
+
         logger.info(
             "orchestrator_query_completed",
             query_id=results["metadata"]["query_id"],
@@ -163,6 +177,16 @@ class TransparencyOrchestrator:
 
         return results
 
+    async def _ingest(self, records: list[dict]) -> None:
+        """Add contracts to the aggregation cube off the event loop."""
+        try:
+            # Ingest skips contracts already seen
+            await asyncio.to_thread(
+                get_aggregation_cube().ingest, records, require_id=True
+            )
+        except Exception as e:
+            logger.warning("aggregation_cube_ingest_failed", error=str(e))
+
     def _select_sources_for_contracts(self, filters: dict | None) -> list[DataSource]:
         """
         Intelligently select best sources for contract query.
@@ -0,0 +1,677 @@
+"""
+Module: services.webhook_outbox
+Description: Durable webhook outbox and per-endpoint delivery workers
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+
+Webhook deliveries used to run inline in the caller, so a slow subscriber
+added its latency to anomaly detection and a restart lost whatever had not
+been sent. Events are now appended to a local SQLite outbox - the request
+body and headers, signature included, are computed once when the event is
+queued - and a background dispatcher delivers them.
+
+The dispatcher claims due rows under a lease, so rows held by a process
+that died become due again once the lease expires: delivery is at least
+once. A lease always outlasts the row's request timeout. Each endpoint has
+its own concurrency limit and circuit breaker, and a claim takes no more
+rows of an endpoint than its free delivery slots can start at once, so a
+slow endpoint never holds rows that would outlive their lease. Consecutive
+events of an endpoint configured with ``batch_size > 1`` are sent as one
+JSON array. Failures are retried with exponential backoff and jitter
+until the row's ``max_retries`` is spent; rejected (4xx) deliveries are
+not retried. Given-up rows are kept with status ``dead`` for inspection.
+Delivery results are recorded in the same database.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from src.core import get_logger, json_utils
+from src.infrastructure.resilience.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerOpenException,
+    CircuitBreakerTimeoutException,
+)
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+DEAD = "dead"
+
+# Statuses worth retrying besides 5xx
+RETRYABLE_STATUSES = {408, 425, 429}
+# Leases last at least a row's request timeout plus this margin (seconds)
+LEASE_MARGIN_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    event TEXT NOT NULL,
+    body BLOB NOT NULL,
+    headers TEXT NOT NULL,
+    timeout REAL NOT NULL,
+    max_retries INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, available_at);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    webhook_url TEXT NOT NULL,
+    event TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    duration_ms REAL
+);
+"""
+
+
+def sign(body: bytes, secret: str) -> str:
+    """HMAC-SHA256 signature header value of a request body."""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def retry_delay(
+    attempt: int,
+    base: float,
+    cap: float,
+    rng: Callable[[float, float], float] = random.uniform,
+) -> float:
+    """Exponential backoff of the ``attempt``-th retry with equal jitter."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rng(0, delay / 2)
+
+
+@dataclass
+class OutboxEntry:
+    """One queued delivery of an event to an endpoint."""
+
+    id: int
+    url: str
+    event: str
+    body: bytes
+    headers: dict[str, str]
+    timeout: float
+    max_retries: int
+    attempts: int = 0
+
+
+class WebhookOutbox:
+    """
+    SQLite-backed queue of webhook deliveries and their results.
+
+    Methods are blocking and thread-safe; the dispatcher calls them through
+    ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: Path | str, max_history: int = 1000) -> None:
+        """
+        Initialize outbox.
+
+        Args:
+            path: Database file, or ``":memory:"``
+            max_history: Delivery results kept
+        """
+        self.path = str(path)
+        self.max_history = max_history
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        self._recorded = 0
+
+    def enqueue(self, rows: list[dict[str, Any]]) -> list[int]:
+        """
+        Append deliveries in one transaction.
+
+        Args:
+            rows: Dicts with url, event, body, headers, timeout and max_retries
+
+        Returns:
+            Ids of the queued entries
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for row in rows:
+                    cursor = self._conn.execute(
+                        "INSERT INTO outbox (url, event, body, headers, timeout,"
+                        " max_retries, available_at, created_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            row["url"],
+                            row["event"],
+                            row["body"],
+                            json_utils.dumps(row["headers"]),
+                            row["timeout"],
+                            row["max_retries"],
+                            now,
+                            now,
+                        ),
+                    )
+                    ids.append(cursor.lastrowid)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def claim(
+        self,
+        limit: int,
+        lease_seconds: float,
+        exclude: set[str] | None = None,
+        capacity: Callable[[str], int] | None = None,
+    ) -> list[OutboxEntry]:
+        """
+        Due entries in queue order, leased so no other claim returns them.
+
+        Args:
+            limit: Most entries returned
+            lease_seconds: Time after which unsettled entries are due again
+                (at least each entry's timeout plus ``LEASE_MARGIN_SECONDS``)
+            exclude: Endpoints not to claim from
+            capacity: Most entries returned per endpoint
+        """
+        now = time.time()
+        where = " FROM outbox WHERE status = ? AND available_at <= ?"
+        params: list[Any] = [PENDING, now]
+        if exclude:
+            where += f" AND url NOT IN ({','.join('?' * len(exclude))})"
+            params.extend(exclude)
+        select = (
+            "SELECT id, url, event, body, headers, timeout, max_retries, attempts"
+            + where
+        )
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if capacity is None:
+                    rows = self._conn.execute(
+                        select + " ORDER BY id LIMIT ?", [*params, limit]
+                    ).fetchall()
+                else:
+                    rows = []
+                    urls = self._conn.execute("SELECT DISTINCT url" + where, params)
+                    for (url,) in urls.fetchall():
+                        rows += self._conn.execute(
+                            select + " AND url = ? ORDER BY id LIMIT ?",
+                            [*params, url, min(limit, max(0, capacity(url)))],
+                        ).fetchall()
+                    rows = sorted(rows)[:limit]
+                if rows:
+                    self._conn.execute(
+                        "UPDATE outbox SET available_at = ? + MAX(?, timeout + ?)"
+                        f" WHERE id IN ({','.join('?' * len(rows))})",
+                        [
+                            now,
+                            lease_seconds,
+                            LEASE_MARGIN_SECONDS,
+                            *(row[0] for row in rows),
+                        ],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            OutboxEntry(
+                id=row[0],
+                url=row[1],
+                event=row[2],
+                body=bytes(row[3]),
+                headers=json_utils.loads(row[4]),
+                timeout=row[5],
+                max_retries=row[6],
+                attempts=row[7],
+            )
+            for row in rows
+        ]
+
+    def next_due(self) -> float | None:
+        """Epoch time at which the next pending entry becomes due."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(available_at) FROM outbox WHERE status = ?", (PENDING,)
+            ).fetchone()
+        return row[0]
+
+    def complete(self, ids: list[int]) -> None:
+        """Remove delivered entries."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM outbox WHERE id = ?", [(i,) for i in ids]
+            )
+
+    def retry(
+        self, ids: list[int], available_at: float, error: str, attempt: bool = True
+    ) -> None:
+        """Make entries due again at ``available_at``, counting an attempt."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET available_at = ?, last_error = ?,"
+                " attempts = attempts + ? WHERE id = ?",
+                [(available_at, error, int(attempt), i) for i in ids],
+            )
+
+    def bury(self, ids: list[int], error: str) -> None:
+        """Give up on entries, keeping them for inspection."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, last_error = ?,"
+                " attempts = attempts + 1 WHERE id = ?",
+                [(DEAD, error, i) for i in ids],
+            )
+
+    def counts(self) -> dict[str, int]:
+        """Entries per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        return {PENDING: 0, DEAD: 0, **dict(rows)}
+
+    def record(self, results: list[dict[str, Any]]) -> None:
+        """Store delivery results, trimming the oldest beyond ``max_history``."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO deliveries (webhook_url, event, timestamp, status_code,"
+                " response_body, error, attempts, success, duration_ms)"
+                " VALUES (:webhook_url, :event, :timestamp, :status_code,"
+                " :response_body, :error, :attempts, :success, :duration_ms)",
+                results,
+            )
+            self._recorded += len(results)
+            if self._recorded >= max(1, self.max_history // 10):
+                self._recorded = 0
+                self._conn.execute(
+                    "DELETE FROM deliveries WHERE id <="
+                    " (SELECT MAX(id) FROM deliveries) - ?",
+                    (self.max_history,),
+                )
+
+    def history(
+        self,
+        event: str | None = None,
+        url: str | None = None,
+        success: bool | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Delivery results, newest first."""
+        query = "SELECT * FROM deliveries WHERE 1 = 1"
+        params: list[Any] = []
+        if event is not None:
+            query += " AND event = ?"
+            params.append(event)
+        if url is not None:
+            query += " AND webhook_url = ?"
+            params.append(url)
+        if success is not None:
+            query += " AND success = ?"
+            params.append(int(success))
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row, strict=True)) for row in cursor]
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+class _DeliveryFailure(Exception):
+    def __init__(self, message: str, response: httpx.Response | None = None):
+        super().__init__(message)
+        self.response = response
+
+
+class _PermanentFailure(_DeliveryFailure):
+    """The endpoint rejected the delivery; retrying will not help."""
+
+
+class _RetryableFailure(_DeliveryFailure):
+    """The endpoint failed; the delivery may succeed later."""
+
+
+class WebhookDispatcher:
+    """
+    Background delivery of outbox entries.
+
+    All methods must be called from the event loop.
+    """
+
+    def __init__(
+        self,
+        outbox: WebhookOutbox,
+        client: httpx.AsyncClient,
+        batch_size_for: Callable[[str], int] | None = None,
+        secret_for: Callable[[str], str | None] | None = None,
+        endpoint_concurrency: int = 4,
+        claim_limit: int = 100,
+        lease_seconds: float = 120.0,
+        poll_interval: float = 1.0,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 300.0,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+    ) -> None:
+        """
+        Initialize dispatcher.
+
+        Args:
+            outbox: Queue to deliver from
+            client: HTTP client shared by all deliveries
+            batch_size_for: Consecutive events sent together to an endpoint
+            secret_for: Current signing secret of an endpoint (batches are
+                signed when formed)
+            endpoint_concurrency: Requests in flight per endpoint
+            claim_limit: Most entries claimed at once
+            lease_seconds: Time before entries of a dead worker are due again
+                (raised to each entry's timeout plus a margin)
+            poll_interval: Longest sleep between claims
+            retry_base_seconds: First retry delay
+            retry_max_seconds: Cap of the retry delay
+            failure_threshold: Consecutive failures that open an endpoint's
+                circuit
+            recovery_timeout: Seconds an open circuit rejects deliveries
+        """
+        self.outbox = outbox
+        self.client = client
+        self.batch_size_for = batch_size_for or (lambda url: 1)
+        self.secret_for = secret_for or (lambda url: None)
+        self.endpoint_concurrency = endpoint_concurrency
+        self.claim_limit = claim_limit
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base_seconds
+        self.retry_max = retry_max_seconds
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._inflight: dict[str, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closed = False
+
+        self.stats = {"delivered": 0, "retried": 0, "dead": 0, "rejected_open": 0}
+
+    async def enqueue(self, rows: list[dict[str, Any]]) -> list[int]:
+        """Queue deliveries durably and wake the dispatcher."""
+        ids = await asyncio.to_thread(self.outbox.enqueue, rows)
+        self.start()
+        assert self._wake is not None
+        self._wake.set()
+        return ids
+
+    def start(self) -> None:
+        """Start the background loop if it is not running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Loop-bound primitives cannot be reused on another event loop
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._semaphores.clear()
+            self._breakers.clear()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Stop claiming and wait for deliveries in flight."""
+        self._closed = True
+        if self._wake is not None:
+            self._wake.set()
+        if self._task is not None:
+            await asyncio.wait({self._task}, timeout=timeout)
+        if self._tasks:
+            # Unfinished entries stay leased and are retried after a restart
+            await asyncio.wait(self._tasks, timeout=timeout)
+
+    async def drain(self, timeout: float = 10.0) -> bool:
+        """Wait until every entry is delivered or given up; True if it was."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            counts = await asyncio.to_thread(self.outbox.counts)
+            if not self._tasks and not counts[PENDING]:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        wake = self._wake
+        while not self._closed:
+            wake.clear()
+            try:
+                claimed = await self._claim()
+            except Exception as e:
+                logger.warning("webhook_outbox_claim_failed", error=str(e))
+                claimed = 0
+            if claimed:
+                continue
+            due = await asyncio.to_thread(self.outbox.next_due)
+            delay = self.poll_interval
+            if due is not None:
+                delay = min(delay, max(0.0, due - time.time()))
+            try:
+                await asyncio.wait_for(wake.wait(), delay)
+            except TimeoutError:
+                pass
+
+    async def _claim(self) -> int:
+        inflight = dict(self._inflight)
+        saturated = {
+            url for url, count in inflight.items() if count >= self.endpoint_concurrency
+        }
+
+        def capacity(url: str) -> int:
+            # Entries the endpoint's free delivery slots can start right away
+            free = self.endpoint_concurrency - inflight.get(url, 0)
+            return max(0, free) * max(1, self.batch_size_for(url))
+
+        entries = await asyncio.to_thread(
+            self.outbox.claim,
+            self.claim_limit,
+            self.lease_seconds,
+            saturated,
+            capacity,
+        )
+
+        by_url: dict[str, list[OutboxEntry]] = {}
+        for entry in entries:
+            by_url.setdefault(entry.url, []).append(entry)
+        for url, queued in by_url.items():
+            size = max(1, self.batch_size_for(url))
+            for start in range(0, len(queued), size):
+                self._spawn(url, queued[start : start + size])
+        return len(entries)
+
+    def _spawn(self, url: str, entries: list[OutboxEntry]) -> None:
+        self._inflight[url] = self._inflight.get(url, 0) + 1
+        task = asyncio.create_task(self._deliver(url, entries))
+        self._tasks.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._tasks.discard(task)
+            self._inflight[url] -= 1
+            if not self._inflight[url]:
+                del self._inflight[url]
+            if self._wake is not None:
+                # Capacity freed: entries of this endpoint may be claimed
+                self._wake.set()
+
+        task.add_done_callback(done)
+
+    def _breaker(self, url: str, timeout: float) -> CircuitBreaker:
+        breaker = self._breakers.get(url)
+        if breaker is None:
+            breaker = self._breakers[url] = CircuitBreaker(
+                f"webhook:{url}",
+                CircuitBreakerConfig(
+                    failure_threshold=self.failure_threshold,
+                    recovery_timeout=self.recovery_timeout,
+                    success_threshold=1,
+                    timeout=timeout,
+                    expected_exception=_RetryableFailure,
+                ),
+            )
+        return breaker
+
+    def _request(self, url: str, entries: list[OutboxEntry]) -> tuple[dict, bytes]:
+        """Headers and body of one delivery, batching several entries."""
+        if len(entries) == 1:
+            return entries[0].headers, entries[0].body
+
+        body = b"[" + b",".join(entry.body for entry in entries) + b"]"
+        headers = {
+            key: value
+            for key, value in entries[0].headers.items()
+            if key not in ("X-Cidadao-Signature", "X-Cidadao-Event")
+        }
+        headers["X-Cidadao-Event"] = "batch"
+        headers["X-Cidadao-Batch-Size"] = str(len(entries))
+        secret = self.secret_for(url)
+        if secret:
+            headers["X-Cidadao-Signature"] = sign(body, secret)
+        return headers, body
+
+    async def _post(
+        self, url: str, headers: dict, body: bytes, timeout: float
+    ) -> httpx.Response:
+        try:
+            response = await self.client.post(
+                url, headers=headers, content=body, timeout=timeout
+            )
+        except httpx.HTTPError as e:
+            raise _RetryableFailure(f"{type(e).__name__}: {e}") from e
+        if response.status_code >= 500 or response.status_code in RETRYABLE_STATUSES:
+            raise _RetryableFailure(f"HTTP {response.status_code}", response)
+        if not 200 <= response.status_code < 300:
+            raise _PermanentFailure(f"HTTP {response.status_code}", response)
+        return response
+
+    async def _deliver(self, url: str, entries: list[OutboxEntry]) -> None:
+        semaphore = self._semaphores.setdefault(
+            url, asyncio.Semaphore(self.endpoint_concurrency)
+        )
+        ids = [entry.id for entry in entries]
+        timeout = max(entry.timeout for entry in entries)
+        async with semaphore:
+            headers, body = self._request(url, entries)
+            started = time.monotonic()
+            response = None
+            error = None
+            retryable = False
+            try:
+                response = await self._breaker(url, timeout).call(
+                    self._post, url, headers, body, timeout
+                )
+            except CircuitBreakerOpenException:
+                # Not an attempt: the endpoint is left alone until it recovers
+                self.stats["rejected_open"] += len(entries)
+                await asyncio.to_thread(
+                    self.outbox.retry,
+                    ids,
+                    time.time() + self.recovery_timeout,
+                    "circuit open",
+                    False,
+                )
+                return
+            except _DeliveryFailure as e:
+                error, response = str(e), e.response
+                retryable = isinstance(e, _RetryableFailure)
+            except CircuitBreakerTimeoutException as e:
+                error, retryable = str(e), True
+            except Exception as e:
+                error, retryable = f"{type(e).__name__}: {e}", True
+            duration_ms = (time.monotonic() - started) * 1000
+
+        await self._settle(url, entries, response, error, retryable, duration_ms)
+
+    async def _settle(
+        self,
+        url: str,
+        entries: list[OutboxEntry],
+        response: httpx.Response | None,
+        error: str | None,
+        retryable: bool,
+        duration_ms: float,
+    ) -> None:
+        ids = [entry.id for entry in entries]
+        attempts = max(entry.attempts for entry in entries) + 1
+        if error is None:
+            await asyncio.to_thread(self.outbox.complete, ids)
+            self.stats["delivered"] += len(entries)
+        elif retryable and attempts <= max(entry.max_retries for entry in entries):
+            delay = retry_delay(attempts, self.retry_base, self.retry_max)
+            await asyncio.to_thread(self.outbox.retry, ids, time.time() + delay, error)
+            self.stats["retried"] += len(entries)
+        else:
+            await asyncio.to_thread(self.outbox.bury, ids, error)
+            self.stats["dead"] += len(entries)
+            logger.warning(
+                "webhook_delivery_dead",
+                url=url,
+                entries=len(entries),
+                attempts=attempts,
+                error=error,
+            )
+
+        now = time.time()
+        await asyncio.to_thread(
+            self.outbox.record,
+            [
+                {
+                    "webhook_url": url,
+                    "event": entry.event,
+                    "timestamp": now,
+                    "status_code": response.status_code if response else None,
+                    "response_body": response.text[:1000] if response else None,
+                    "error": error,
+                    "attempts": attempts,
+                    "success": int(error is None),
+                    "duration_ms": duration_ms,
+                }
+                for entry in entries
+            ],
+        )
@@ -1,16 +1,15 @@
 """Webhook service for sending notifications to external endpoints.
 
 This service provides async webhook delivery with:
-- Retry logic with exponential backoff
+- Durable outbox delivered by background workers (see webhook_outbox)
+- Retry logic with exponential backoff and jitter
 - Request signing for security
-- Batch webhook sending
+- Per-endpoint concurrency limits, circuit breakers and batching
 - Event filtering
 - Delivery status tracking
 """
 
 import asyncio
-import hashlib
-import hmac
 from datetime import UTC, datetime
 from enum import Enum
 from typing import Any
@@ -26,6 +25,7 @@ from tenacity import (
 
 from src.core import json_utils
 from src.core.logging import get_logger
+from src.services.webhook_outbox import WebhookDispatcher, WebhookOutbox, sign
 
 logger = get_logger(__name__)
 
@@ -80,6 +80,7 @@ class WebhookConfig(BaseModel):
     headers: dict[str, str] | None = None
     timeout: int = Field(default=30, ge=1, le=300)
     max_retries: int = Field(default=3, ge=0, le=10)
+    batch_size: int = Field(default=1, ge=1, le=100)  # Events per request
     active: bool = Field(default=True)
 
     def should_send_event(self, event: WebhookEvent) -> bool:
@@ -108,16 +109,52 @@ class WebhookDelivery(BaseModel):
 class WebhookService:
     """Service for managing and sending webhooks."""
 
-    def __init__(self):
-        """Initialize webhook service."""
+    def __init__(
+        self,
+        outbox_path: str | None = None,
+        endpoint_concurrency: int | None = None,
+    ):
+        """Initialize webhook service.
+
+        Args:
+            outbox_path: Outbox database file (defaults to settings)
+            endpoint_concurrency: Deliveries in flight per endpoint
+                (defaults to settings)
+        """
         self._webhooks: list[WebhookConfig] = []
         self._client = httpx.AsyncClient(
             timeout=httpx.Timeout(30.0),
             follow_redirects=False,
             limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
         )
-        self._delivery_history: list[WebhookDelivery] = []
-        self._max_history = 1000
+        self._outbox_path = outbox_path
+        self._endpoint_concurrency = endpoint_concurrency
+        self._dispatcher: WebhookDispatcher | None = None
+
+    @property
+    def dispatcher(self) -> WebhookDispatcher:
+        """Outbox dispatcher, opened on first use."""
+        if self._dispatcher is None:
+            from src.core.config import settings
+
+            outbox = WebhookOutbox(self._outbox_path or settings.webhook_outbox_path)
+            self._dispatcher = WebhookDispatcher(
+                outbox,
+                self._client,
+                batch_size_for=lambda url: getattr(self._webhook(url), "batch_size", 1),
+                secret_for=lambda url: getattr(self._webhook(url), "secret", None),
+                endpoint_concurrency=(
+                    self._endpoint_concurrency or settings.webhook_endpoint_concurrency
+                ),
+            )
+        return self._dispatcher
+
+    def _webhook(self, url: str) -> WebhookConfig | None:
+        """Active configuration of an endpoint."""
+        for webhook in self._webhooks:
+            if webhook.active and str(webhook.url) == url:
+                return webhook
+        return None
 
     def add_webhook(self, webhook: WebhookConfig) -> None:
         """Add a webhook configuration."""
@@ -146,14 +183,10 @@ class WebhookService:
 
     def _generate_signature(self, payload: bytes, secret: str) -> str:
         """Generate HMAC signature for webhook payload."""
-        signature = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
-        return f"sha256={signature}"
+        return sign(payload, secret)
 
-    def _prepare_request(
-        self, webhook: WebhookConfig, payload: WebhookPayload
-    ) -> tuple[dict[str, str], bytes]:
-        """Prepare webhook request headers and body."""
-        # Serialize payload
+    def _serialize(self, payload: WebhookPayload) -> bytes:
+        """Request body of a payload, the same for every endpoint."""
         body_data = {
             "event": payload.event,
             "timestamp": payload.timestamp.isoformat(),
@@ -162,9 +195,16 @@ class WebhookService:
         if payload.metadata:
             body_data["metadata"] = payload.metadata
 
-        body = json_utils.dumps(body_data).encode()
+        return json_utils.dumps(body_data).encode()
 
-        # Prepare headers
+    def _headers(
+        self,
+        webhook: WebhookConfig,
+        payload: WebhookPayload,
+        body: bytes,
+        signatures: dict[str, str],
+    ) -> dict[str, str]:
+        """Request headers of a payload for one endpoint."""
         headers = {
             "Content-Type": "application/json",
             "User-Agent": "Cidadao.AI/1.0",
@@ -172,17 +212,26 @@ class WebhookService:
             "X-Cidadao-Timestamp": payload.timestamp.isoformat(),
         }
 
-        # Add signature if secret is configured
+        # Add signature if secret is configured, signing once per secret
         if webhook.secret:
-            headers["X-Cidadao-Signature"] = self._generate_signature(
-                body, webhook.secret
-            )
+            if webhook.secret not in signatures:
+                signatures[webhook.secret] = self._generate_signature(
+                    body, webhook.secret
+                )
+            headers["X-Cidadao-Signature"] = signatures[webhook.secret]
 
         # Add custom headers
         if webhook.headers:
             headers.update(webhook.headers)
 
-        return headers, body
+        return headers
+
+    def _prepare_request(
+        self, webhook: WebhookConfig, payload: WebhookPayload
+    ) -> tuple[dict[str, str], bytes]:
+        """Prepare webhook request headers and body."""
+        body = self._serialize(payload)
+        return self._headers(webhook, payload, body, {}), body
 
     @retry(
         stop=stop_after_attempt(3),
@@ -243,8 +292,11 @@ class WebhookService:
         event: WebhookEvent,
         data: dict[str, Any],
         metadata: dict[str, Any] | None = None,
-    ) -> list[WebhookDelivery]:
-        """Send an event to all configured webhooks.
+    ) -> list[int]:
+        """Queue an event for delivery to all configured webhooks.
+
+        The event is written to the durable outbox and delivered in the
+        background, so the caller never waits for subscriber endpoints.
 
         Args:
             event: Event type
@@ -252,7 +304,7 @@ class WebhookService:
             metadata: Optional metadata
 
         Returns:
-            List of delivery results
+            Outbox ids of the queued deliveries
         """
         payload = WebhookPayload(event=event, data=data, metadata=metadata)
 
@@ -262,50 +314,34 @@ class WebhookService:
         ]
 
         if not webhooks_to_send:
-            logger.debug("No webhooks configured for event", event=event)
+            logger.debug("No webhooks configured for event", event_type=event.value)
             return []
 
-        # Send webhooks concurrently
-        tasks = [self._send_webhook(webhook, payload) for webhook in webhooks_to_send]
-
-        deliveries = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Process results
-        results = []
-        for delivery in deliveries:
-            if isinstance(delivery, Exception):
-                # Create failed delivery record
-                delivery = WebhookDelivery(
-                    webhook_url="unknown",
-                    event=event,
-                    timestamp=datetime.now(UTC),
-                    error=str(delivery),
-                    success=False,
-                )
-            results.append(delivery)
-
-        # Store in history
-        self._store_deliveries(results)
-
-        # Log summary
-        successful = sum(1 for d in results if d.success)
-        logger.info(
-            "Webhooks sent",
-            event=event,
-            total=len(results),
-            successful=successful,
-            failed=len(results) - successful,
-        )
+        # Serialize once; sign once per distinct secret
+        body = self._serialize(payload)
+        signatures: dict[str, str] = {}
+        rows = [
+            {
+                "url": str(webhook.url),
+                "event": event.value,
+                "body": body,
+                "headers": self._headers(webhook, payload, body, signatures),
+                "timeout": webhook.timeout,
+                "max_retries": webhook.max_retries,
+            }
+            for webhook in webhooks_to_send
+        ]
+        ids = await self.dispatcher.enqueue(rows)
 
-        return results
+        logger.debug("Webhooks queued", event_type=event.value, total=len(ids))
 
-    def _store_deliveries(self, deliveries: list[WebhookDelivery]) -> None:
-        """Store delivery results in history."""
-        self._delivery_history.extend(deliveries)
+        return ids
 
-        # Trim history if too large
-        if len(self._delivery_history) > self._max_history:
-            self._delivery_history = self._delivery_history[-self._max_history :]
+    async def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until queued deliveries are delivered or given up."""
+        if self._dispatcher is None:
+            return True
+        return await self._dispatcher.drain(timeout)
 
     def get_delivery_history(
         self,
@@ -314,20 +350,27 @@ class WebhookService:
         success: bool | None = None,
         limit: int = 100,
     ) -> list[WebhookDelivery]:
-        """Get webhook delivery history with filtering."""
-        history = self._delivery_history.copy()
-
-        # Apply filters
-        if event:
-            history = [d for d in history if d.event == event]
-        if url:
-            history = [d for d in history if d.webhook_url == url]
-        if success is not None:
-            history = [d for d in history if d.success == success]
-
-        # Sort by timestamp (newest first) and limit
-        history.sort(key=lambda d: d.timestamp, reverse=True)
-        return history[:limit]
+        """Get webhook delivery history with filtering (newest first)."""
+        rows = self.dispatcher.outbox.history(
+            event=event.value if event else None,
+            url=url,
+            success=success,
+            limit=limit,
+        )
+        return [
+            WebhookDelivery(
+                webhook_url=row["webhook_url"],
+                event=WebhookEvent(row["event"]),
+                timestamp=datetime.fromtimestamp(row["timestamp"], UTC),
+                status_code=row["status_code"],
+                response_body=row["response_body"],
+                error=row["error"],
+                attempts=row["attempts"],
+                success=bool(row["success"]),
+                duration_ms=row["duration_ms"],
+            )
+            for row in rows
+        ]
 
     async def test_webhook(self, webhook: WebhookConfig) -> WebhookDelivery:
         """Test a webhook configuration."""
@@ -344,7 +387,12 @@ class WebhookService:
         return await self._send_webhook(webhook, test_payload)
 
     async def close(self):
-        """Close the webhook service."""
+        """Close the webhook service.
+
+        Deliveries still queued stay in the outbox for the next start.
+        """
+        if self._dispatcher is not None:
+            await self._dispatcher.close()
         await self._client.aclose()
 
 
@@ -355,8 +403,8 @@ webhook_service = WebhookService()
 # Convenience functions
 async def send_webhook_event(
     event: WebhookEvent, data: dict[str, Any], metadata: dict[str, Any] | None = None
-) -> list[WebhookDelivery]:
-    """Send a webhook event using the default service."""
+) -> list[int]:
+    """Queue a webhook event using the default service."""
     return await webhook_service.send_event(event, data, metadata)
 
 
@@ -7,6 +7,7 @@ License: Proprietary - All rights reserved
 """
 
 import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta
 from typing import Any
 from urllib.parse import urljoin
@@ -511,49 +512,42 @@ class TransparencyAPIClient:
         data = await self._make_request(endpoint, params)
         return self._parse_response(data)
 
-    async def get_all_pages(
+    async def iter_pages(
         self,
         endpoint: str,
         filters: TransparencyAPIFilter | None = None,
-        max_pages: int = 10,
-    ) -> list[dict[str, Any]]:
+        max_pages: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
         """
-        Get all pages of data from an endpoint.
+        Fetch an endpoint page by page.
+
+        Only one page is held at a time, so callers can stream results of
+        any size. Paging stops at the last page reported by the API, at the
+        first short or empty page, or after ``max_pages``. A failed page
+        fetch is raised rather than ending the iteration, so a stream cut
+        short is never mistaken for a complete one.
 
         Args:
             endpoint: API endpoint
-            filters: Filter parameters
-            max_pages: Maximum number of pages to fetch
+            filters: Filter parameters (``tamanho_pagina`` sets the page size)
+            max_pages: Maximum number of pages to fetch (unbounded if None)
 
-        Returns:
-            All data from all pages
+        Yields:
+            Records of each page
+
+        Raises:
+            TransparencyAPIError: If a page cannot be fetched
         """
-        all_data = []
-        current_filters = filters or TransparencyAPIFilter()
+        current_filters = filters.model_copy() if filters else TransparencyAPIFilter()
+        page = 1
+        fetched = 0
+        records = 0
 
-        for page in range(1, max_pages + 1):
+        while max_pages is None or fetched < max_pages:
             current_filters.pagina = page
 
             try:
                 response = await self.search_data(endpoint, current_filters)
-
-                if not response.data:
-                    break
-
-                all_data.extend(response.data)
-
-                self.logger.info(
-                    "page_fetched",
-                    endpoint=endpoint,
-                    page=page,
-                    records=len(response.data),
-                    total_so_far=len(all_data),
-                )
-
-                # Check if this is the last page
-                if page >= response.total_pages:
-                    break
-
             except DataNotFoundError:
                 break
             except Exception as e:
@@ -563,15 +557,61 @@ class TransparencyAPIClient:
                     page=page,
                     error=str(e),
                 )
+                raise
+
+            if not response.data:
                 break
 
+            fetched += 1
+            records += len(response.data)
+            self.logger.info(
+                "page_fetched",
+                endpoint=endpoint,
+                page=page,
+                records=len(response.data),
+                total_so_far=records,
+            )
+            yield response.data
+
+            # Paginated responses report the last page; plain lists end short
+            if response.meta:
+                if page >= response.total_pages:
+                    break
+            elif len(response.data) < current_filters.tamanho_pagina:
+                break
+            page += 1
+
         self.logger.info(
             "all_pages_fetched",
             endpoint=endpoint,
-            total_records=len(all_data),
-            pages_fetched=page,
+            total_records=records,
+            pages_fetched=fetched,
         )
 
+    async def get_all_pages(
+        self,
+        endpoint: str,
+        filters: TransparencyAPIFilter | None = None,
+        max_pages: int = 10,
+    ) -> list[dict[str, Any]]:
+        """
+        Get all pages of data from an endpoint.
+
+        Args:
+            endpoint: API endpoint
+            filters: Filter parameters
+            max_pages: Maximum number of pages to fetch
+
+        Returns:
+            All data from all pages
+        """
+        all_data = []
+        try:
+            async for page in self.iter_pages(endpoint, filters, max_pages):
+                all_data.extend(page)
+        except Exception:
+            # Already logged by iter_pages; keep the pages fetched so far
+            pass
         return all_data
 
 
@@ -0,0 +1,115 @@
+"""
+Throughput benchmark for the Redis Streams event bus consumer.
+Reports events per second handled by one consumer against fakeredis with a
+simulated network round trip per command.
+"""
+
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from src.infrastructure.events.event_bus import EventBus, EventHandler, EventType
+
+# Simulated network round trip to Redis
+REDIS_RTT_SECONDS = 0.0005
+# I/O a handler waits on per event (database write, notification)
+HANDLER_IO_SECONDS = 0.002
+EVENTS = 2000
+INVESTIGATIONS = 100
+
+
+class LatencyRedis(fakeredis.aioredis.FakeRedis):
+    """fakeredis where each command or pipeline costs one round trip."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(REDIS_RTT_SECONDS)
+
+    async def execute_command(self, *args, **options):
+        await self._round_trip()
+        return await super().execute_command(*args, **options)
+
+    async def xreadgroup(self, *args, block=None, **kwargs):
+        result = await super().xreadgroup(*args, block=block, **kwargs)
+        if not result and block:
+            await asyncio.sleep(0.005)  # fakeredis does not block
+        return result
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        async def timed_execute(raise_on_error=True):
+            await self._round_trip()
+            return await execute(raise_on_error)
+
+        pipe.execute = timed_execute
+        return pipe
+
+
+class IOHandler(EventHandler):
+    def __init__(self):
+        super().__init__([EventType.ANOMALY_DETECTED])
+        self.handled = 0
+
+    async def handle(self, event):
+        await asyncio.sleep(HANDLER_IO_SECONDS)
+        self.handled += 1
+
+
+async def _consume(**options) -> tuple[float, float]:
+    """Drain EVENTS from one consumer; return (events/s, round trips/event)."""
+    redis = LatencyRedis()
+    bus = EventBus(redis, **options)
+    handler = IOHandler()
+    bus.register_handler(handler)
+    await bus.publish_many(
+        [
+            (
+                EventType.ANOMALY_DETECTED,
+                {"investigation_id": f"inv-{i % INVESTIGATIONS}"},
+                None,
+            )
+            for i in range(EVENTS)
+        ]
+    )
+
+    redis.round_trips = 0
+    start = time.perf_counter()
+    await bus.start("bench")
+    while handler.handled < EVENTS:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    await bus.stop()
+    return EVENTS / elapsed, redis.round_trips / EVENTS
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_event_bus_consumer_throughput():
+    """Compare fixed small sequential batches with adaptive concurrent ones."""
+    sequential_eps, sequential_trips = await _consume(
+        min_batch_size=10, max_batch_size=10, handler_concurrency=1
+    )
+    concurrent_eps, concurrent_trips = await _consume()
+
+    print("\n" + "=" * 60)
+    print("EVENT BUS CONSUMER THROUGHPUT (events/second per consumer)")
+    print("=" * 60)
+    print(
+        f"  Batches of 10, one event at a time: {sequential_eps:,.0f} eps "
+        f"({sequential_trips:.3f} round trips/event)"
+    )
+    print(
+        f"  Adaptive batches, 32 partitions:    {concurrent_eps:,.0f} eps "
+        f"({concurrent_trips:.3f} round trips/event)"
+    )
+
+    assert concurrent_trips < sequential_trips
+    assert concurrent_eps > 3 * sequential_eps
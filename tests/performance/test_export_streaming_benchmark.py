@@ -0,0 +1,88 @@
+"""
+Benchmark of large contract exports.
+Compares peak memory and time to first byte of the buffered exporters
+(DataFrame + openpyxl / to_csv) with the streaming CSV and XLSX writers.
+"""
+
+import time
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from src.services.export_service import ExportService
+
+ROWS = 20_000
+
+
+def _rows():
+    for i in range(ROWS):
+        yield {
+            "id": f"CT-{i:07d}",
+            "orgao": "Ministério da Saúde",
+            "fornecedor": f"Fornecedor {i % 997}",
+            "valor": i * 13.37,
+            "data": "2024-05-01",
+        }
+
+
+async def _buffered(service: ExportService, fmt: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    df = pd.DataFrame(list(_rows()))
+    if fmt == "csv":
+        await service.generate_csv(df)
+    else:
+        await service.generate_excel(df, title="Contratos")
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed  # first byte only once the file is complete
+
+
+async def _streamed(service: ExportService, fmt: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    if fmt == "csv":
+        chunks = service.stream_csv(_rows())
+    else:
+        chunks = service.stream_excel(_rows(), title="Contratos")
+    ttfb = None
+    async for _ in chunks:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+    return ttfb, time.perf_counter() - start
+
+
+async def _measure(run, service, fmt) -> tuple[float, float, float]:
+    tracemalloc.start()
+    try:
+        ttfb, total = await run(service, fmt)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ttfb, total, peak / 2**20
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_streaming_export_memory():
+    """Peak memory and TTFB: buffered vs streamed exports."""
+    service = ExportService()
+
+    results = {}
+    for fmt in ("csv", "excel"):
+        results[fmt] = (
+            await _measure(_buffered, service, fmt),
+            await _measure(_streamed, service, fmt),
+        )
+
+    print("\n" + "=" * 60)
+    print(f"EXPORT OF {ROWS:,} ROWS (ttfb s / total s / peak MiB)")
+    print("=" * 60)
+    for fmt, (buffered, streamed) in results.items():
+        print(
+            f"  {fmt:<6} buffered {buffered[0]:.2f} / {buffered[1]:.2f} / "
+            f"{buffered[2]:.1f}   streamed {streamed[0]:.3f} / {streamed[1]:.2f} / "
+            f"{streamed[2]:.1f}"
+        )
+
+    for buffered, streamed in results.values():
+        assert streamed[2] < buffered[2] / 10
+        assert streamed[0] < buffered[0]
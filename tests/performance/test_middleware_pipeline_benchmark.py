@@ -0,0 +1,112 @@
+"""
+Benchmark of per-request middleware overhead.
+Compares the stacked BaseHTTPMiddleware layers with the fused ASGI pipeline
+on the /health and chat endpoints.
+"""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.middleware.logging_middleware import LoggingMiddleware
+from src.api.middleware.metrics_middleware import MetricsMiddleware
+from src.api.middleware.query_tracking import QueryTrackingMiddleware
+from src.api.middleware.rate_limit import RateLimitMiddleware
+from src.api.middleware.request_pipeline import RequestPipelineMiddleware
+from src.infrastructure.observability.correlation import CorrelationMiddleware
+from src.infrastructure.rate_limiter import RateLimiter, rate_limiter
+
+REQUESTS = 500
+ENDPOINTS = ("/health", "/api/v1/chat/message")
+
+
+def _routes(app: FastAPI) -> FastAPI:
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/api/v1/chat/message")
+    async def chat(payload: dict):
+        return {"reply": payload.get("message", "")}
+
+    return app
+
+
+def _bare_app() -> FastAPI:
+    return _routes(FastAPI())
+
+
+def _stacked_app(limiter: RateLimiter) -> FastAPI:
+    app = _routes(FastAPI())
+    app.add_middleware(LoggingMiddleware)
+    app.add_middleware(CorrelationMiddleware, generate_request_id=True)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(QueryTrackingMiddleware, tracked_paths=["/api/v1/chat"])
+    return app
+
+
+def _fused_app(limiter: RateLimiter) -> FastAPI:
+    app = _routes(FastAPI())
+    app.add_middleware(
+        RequestPipelineMiddleware, limiter=limiter, tracked_paths=["/api/v1/chat"]
+    )
+    return app
+
+
+async def _per_request_ms(app: FastAPI, path: str) -> float:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def call(i: int):
+            if path == "/health":
+                return await client.get(path)
+            return await client.post(
+                path,
+                json={"message": "oi"},
+                headers={"X-Forwarded-For": f"10.0.{i % 250}.1"},
+            )
+
+        for i in range(20):  # warm-up
+            await call(i)
+        start = time.perf_counter()
+        for i in range(REQUESTS):
+            response = await call(i)
+            assert response.status_code == 200
+        return (time.perf_counter() - start) * 1000 / REQUESTS
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_fused_pipeline_overhead(monkeypatch):
+    """Middleware overhead per request: stacked layers vs fused pipeline."""
+    # Both stacks share the process-wide limiter, kept off Redis and with
+    # limits no benchmark run can reach
+    monkeypatch.setattr(rate_limiter, "use_redis", False)
+    monkeypatch.setattr(
+        rate_limiter,
+        "_get_limits",
+        lambda *args: {"per_minute": 10**9, "per_hour": 10**9, "per_day": 10**9},
+    )
+    limiter = rate_limiter
+
+    rows = []
+    for path in ENDPOINTS:
+        bare = await _per_request_ms(_bare_app(), path)
+        stacked = await _per_request_ms(_stacked_app(limiter), path)
+        fused = await _per_request_ms(_fused_app(limiter), path)
+        rows.append((path, bare, stacked - bare, fused - bare))
+
+    print("\n" + "=" * 60)
+    print("MIDDLEWARE OVERHEAD PER REQUEST (ms, bare app subtracted)")
+    print("=" * 60)
+    for path, bare, stacked, fused in rows:
+        print(
+            f"  {path:<24} bare {bare:.3f}  stacked +{stacked:.3f}  "
+            f"fused +{fused:.3f}"
+        )
+
+    for _, _, stacked, fused in rows:
+        assert fused < stacked
@@ -0,0 +1,107 @@
+"""
+Load benchmark for the multi-window sliding-window rate limiter.
+Reports requests per second handled by one worker (one event loop).
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.infrastructure import rate_limiter as rate_limiter_module
+from src.infrastructure.rate_limiter import RateLimiter, RateLimitTier
+
+# Simulated network round trip to Redis
+REDIS_RTT_SECONDS = 0.0005
+DURATION_SECONDS = 1.0
+CONCURRENCY = 50
+SUBJECTS = 200
+
+
+class LatencyRedis:
+    """Redis stand-in: each EVALSHA costs one simulated round trip."""
+
+    WINDOWS = {1: "per_second", 60: "per_minute", 3600: "per_hour", 86400: "per_day"}
+
+    def __init__(self):
+        self.round_trips = 0
+        self.server = RateLimiter(use_redis=False)
+
+    async def evalsha(self, sha, numkeys, *keys_and_args):
+        self.round_trips += 1
+        await asyncio.sleep(REDIS_RTT_SECONDS)
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        pairs = args[2:]
+        windows = tuple(
+            (self.WINDOWS[duration], limit)
+            for duration, limit in zip(pairs[::2], pairs[1::2], strict=True)
+        )
+        allowed, denied, remaining = self.server._local_sliding_windows(
+            keys[0], windows, args[0], args[1]
+        )
+        return [int(allowed), denied, *remaining]
+
+
+async def _load(limiter: RateLimiter) -> tuple[float, int]:
+    """Drive the limiter from CONCURRENCY clients; return (rps, requests)."""
+    done = 0
+    deadline = time.perf_counter() + DURATION_SECONDS
+
+    async def client(n: int) -> None:
+        nonlocal done
+        i = n
+        while time.perf_counter() < deadline:
+            await limiter.check_rate_limit(
+                key=f"user:{i % SUBJECTS}",
+                endpoint="/api/v1/investigations",
+                tier=RateLimitTier.UNLIMITED,
+            )
+            done += 1
+            i += CONCURRENCY
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(CONCURRENCY)))
+    return done / (time.perf_counter() - start), done
+
+
+def _redis_limiter(redis: LatencyRedis) -> RateLimiter:
+    limiter = RateLimiter()
+
+    async def _get_redis():
+        return redis
+
+    limiter._get_redis = _get_redis
+    return limiter
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_rate_limiter_throughput_per_worker(monkeypatch):
+    """Compare Redis, Redis plus near-cache and local-only throughput."""
+    monkeypatch.setattr(rate_limiter_module, "NEAR_CACHE_FRACTION", 0.0)
+    redis_only = LatencyRedis()
+    redis_rps, redis_requests = await _load(_redis_limiter(redis_only))
+    monkeypatch.undo()
+
+    near_cached = LatencyRedis()
+    near_rps, near_requests = await _load(_redis_limiter(near_cached))
+
+    local_rps, _ = await _load(RateLimiter(use_redis=False))
+
+    print("\n" + "=" * 60)
+    print("RATE LIMITER THROUGHPUT (requests/second per worker)")
+    print("=" * 60)
+    print(
+        f"  Redis, one EVALSHA per request: {redis_rps:,.0f} rps "
+        f"({redis_only.round_trips / redis_requests:.3f} round trips/request)"
+    )
+    print(
+        f"  Redis with near-cache:          {near_rps:,.0f} rps "
+        f"({near_cached.round_trips / near_requests:.3f} round trips/request)"
+    )
+    print(f"  Local counters only:            {local_rps:,.0f} rps")
+
+    # All windows are checked in a single round trip
+    assert redis_only.round_trips == redis_requests
+    assert near_cached.round_trips < near_requests
+    assert near_rps > redis_rps
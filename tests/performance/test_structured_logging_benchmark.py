@@ -0,0 +1,91 @@
+"""
+Caller-side cost of structured logging.
+Compares writing each record inline on the calling thread with queuing it
+for the background writer, with a file handler as the sink.
+"""
+
+import logging
+import time
+
+import pytest
+
+from src.infrastructure.observability.log_pipeline import LogPipeline, render_line
+from src.infrastructure.observability.structured_logging import (
+    _STATIC_FIELDS,
+    _STDLIB_LEVELS,
+    LogSampler,
+    StructuredLogger,
+)
+
+RECORDS = 20000
+
+
+class InlineLogger(StructuredLogger):
+    """Serializes and writes every record on the calling thread."""
+
+    def _log_structured(self, record):
+        fields = record.to_dict()
+        for key in _STATIC_FIELDS:
+            fields.pop(key, None)
+        self._stdlib_logger.log(
+            _STDLIB_LEVELS[record.level], render_line(fields, self._static_context)
+        )
+
+
+def _caller_us(logger: StructuredLogger) -> float:
+    """Microseconds the caller spends per request + cache log pair."""
+    start = time.perf_counter()
+    for i in range(RECORDS):
+        logger.log_request("GET", f"/api/v1/contracts/{i}", 200, 12.5)
+        logger.log_cache_operation("get", f"contract:{i}", hit=True, duration_ms=0.4)
+    return (time.perf_counter() - start) / RECORDS * 1e6
+
+
+@pytest.mark.benchmark
+def test_structured_logging_caller_cost(tmp_path):
+    """Compare inline writing with the queued, sampled pipeline."""
+    stdlib = logging.getLogger("bench.structured_logging")
+    stdlib.setLevel(logging.DEBUG)
+    stdlib.propagate = False
+    handler = logging.FileHandler(tmp_path / "app.log")
+    stdlib.addHandler(handler)
+    try:
+        unsampled = LogSampler(rates={})
+        inline_us = _caller_us(
+            InlineLogger(stdlib.name, component="bench", sampler=unsampled)
+        )
+
+        pipeline = LogPipeline(capacity=4 * RECORDS)
+        queued_us = _caller_us(
+            StructuredLogger(
+                stdlib.name, component="bench", pipeline=pipeline, sampler=unsampled
+            )
+        )
+        assert pipeline.flush(timeout=60)
+
+        sampled_pipeline = LogPipeline(capacity=4 * RECORDS)
+        sampled_us = _caller_us(
+            StructuredLogger(stdlib.name, component="bench", pipeline=sampled_pipeline)
+        )
+        assert sampled_pipeline.flush(timeout=60)
+        pipeline.close()
+        sampled_pipeline.close()
+    finally:
+        stdlib.removeHandler(handler)
+        handler.close()
+
+    print("\n" + "=" * 60)
+    print("STRUCTURED LOGGING COST ON THE CALLING THREAD (us per request)")
+    print("=" * 60)
+    print(f"  Inline JSON + file write:      {inline_us:6.1f} us")
+    print(f"  Queued to writer thread:       {queued_us:6.1f} us")
+    print(f"  Queued, cache ops sampled 1%:  {sampled_us:6.1f} us")
+    print(
+        f"  Written: {pipeline.stats['written']:,} queued, "
+        f"{sampled_pipeline.stats['written']:,} sampled"
+    )
+
+    assert pipeline.stats["dropped"] == 0
+    assert sampled_pipeline.stats["written"] < pipeline.stats["written"]
+    assert queued_us < inline_us
+    assert sampled_us < queued_us
@@ -12,6 +12,7 @@ import pytest
 from src.agents.abaporu import InvestigationPlan, InvestigationResult, MasterAgent
 from src.agents.deodoro import AgentContext, AgentMessage, AgentResponse, AgentStatus
 from src.core.exceptions import InvestigationError
+from src.services.contract_frame import get_contract_frame_cache
 
 
 @pytest.fixture
@@ -587,6 +588,30 @@ class TestAbaporuEdgeCases:
         # First group should have Zumbi and Anita (can run in parallel)
         assert len(groups[0]) >= 1
 
+    @pytest.mark.asyncio
+    @pytest.mark.unit
+    async def test_contract_frames_released_after_plan(
+        self, master_agent, agent_context
+    ):
+        """Test shared contract frames are dropped even when the plan fails."""
+        cache = get_contract_frame_cache()
+        frame = cache.get([{"valor": 1.0}], agent_context.investigation_id)
+        plan = InvestigationPlan(
+            objective="Test",
+            steps=[{"agent": "Zumbi", "action": "detect"}],
+            required_agents=["Zumbi"],
+            estimated_time=60,
+            quality_criteria={},
+        )
+        master_agent._plan_investigation = AsyncMock(return_value=plan)
+        master_agent.step_scheduler.run = AsyncMock(side_effect=RuntimeError("x"))
+
+        with pytest.raises(RuntimeError):
+            await master_agent._investigate({"query": "q"}, agent_context)
+
+        assert cache.get([{"valor": 1.0}], agent_context.investigation_id) is not frame
+        cache.release(agent_context.investigation_id)
+
     @pytest.mark.asyncio
     @pytest.mark.unit
     async def test_monitor_progress(self, master_agent, agent_context):
@@ -981,7 +1006,7 @@ class TestIntegrationWorkflow:
         self, master_agent, agent_context
     ):
         """Test investigation with parallel step execution - Lines 316-345."""
-        from unittest.mock import AsyncMock, patch
+        from unittest.mock import AsyncMock
 
         await master_agent.initialize()
 
@@ -1025,26 +1050,7 @@ class TestIntegrationWorkflow:
             },  # Triggers both Zumbi and Anita
         )
 
-        # Mock parallel_processor to track parallel execution
-        with patch("src.agents.abaporu.parallel_processor") as mock_pp:
-            mock_pp.execute_parallel = AsyncMock(
-                return_value=[
-                    {
-                        "agent": "Zumbi",
-                        "status": "completed",
-                        "result": {"findings": [], "sources": []},
-                    },
-                    {
-                        "agent": "Anita",
-                        "status": "completed",
-                        "result": {"findings": [], "sources": []},
-                    },
-                ]
-            )
-            mock_pp.aggregate_results = lambda x: {"findings": [], "sources": []}
-
-            response = await master_agent.process(message, agent_context)
+        # Independent steps are scheduled concurrently over the plan DAG
+        response = await master_agent.process(message, agent_context)
 
-            # Verify parallel execution was attempted
-            # (may not be called if plan doesn't group steps for parallel)
-            assert response.status == AgentStatus.COMPLETED
+        assert response.status == AgentStatus.COMPLETED
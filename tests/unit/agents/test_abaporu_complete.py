@@ -347,8 +347,6 @@ class TestAbaporuCompleteCoverage:
     @pytest.mark.asyncio
     async def test_investigate_with_parallel_steps(self, master_agent, agent_context):
         """Test investigation with parallel execution of multiple steps."""
-        from unittest.mock import patch
-
         # Setup multiple agents for parallel execution
         master_agent.agent_registry["Zumbi"] = AsyncMock(
             execute=AsyncMock(
@@ -369,24 +367,13 @@ class TestAbaporuCompleteCoverage:
             )
         )
 
-        # Mock parallel processor
-        with patch("src.agents.abaporu.parallel_processor") as mock_pp:
-            mock_pp.execute_parallel = AsyncMock(return_value=[])
-            mock_pp.aggregate_results = AsyncMock(
-                return_value={"findings": [{"test": 1}], "sources": ["parallel_src"]}
-            )
-
-            # Query that triggers parallel execution (both agents)
-            payload = {"query": "Analyze contract anomalies and patterns"}
+        # Query that triggers parallel execution (both agents)
+        payload = {"query": "Analyze contract anomalies and patterns"}
 
-            result = await master_agent._investigate(payload, agent_context)
+        result = await master_agent._investigate(payload, agent_context)
 
-            # Should have called parallel processor
-            assert isinstance(result, InvestigationResult)
-            # Check if parallel execution was attempted
-            if mock_pp.execute_parallel.called:
-                mock_pp.execute_parallel.assert_called_once()
-                mock_pp.aggregate_results.assert_called_once()
+        assert isinstance(result, InvestigationResult)
+        assert {"type": "anomaly"} in result.findings
 
     @pytest.mark.asyncio
     async def test_plan_investigation_with_memory_context(
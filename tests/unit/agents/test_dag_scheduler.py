@@ -0,0 +1,176 @@
+"""
+Unit tests for the dependency-DAG step scheduler.
+"""
+
+import asyncio
+import gc
+import time
+
+import pytest
+
+from src.agents.dag_scheduler import DAGStepScheduler, StepGraph
+
+
+def _step(agent, depends_on=(), delay=0.0, **extra):
+    return {"agent": agent, "depends_on": list(depends_on), "delay": delay, **extra}
+
+
+class TestStepGraph:
+    """Graph construction from plan steps."""
+
+    def test_dependencies_resolve_to_earlier_steps(self):
+        """Test agent names map to earlier steps only."""
+        steps = [
+            _step("Zumbi"),
+            _step("Anita", ["Zumbi"]),
+            _step("Zumbi", ["Anita"]),  # second Zumbi step, no cycle
+            _step("Tiradentes", ["Zumbi", "Unknown"]),
+        ]
+        graph = StepGraph.from_plan(steps)
+
+        assert graph.predecessors[1] == {0}
+        assert graph.predecessors[2] == {1}
+        assert graph.predecessors[3] == {0, 2}
+
+    def test_levels_and_critical_path(self):
+        """Test depth grouping and longest remaining path."""
+        steps = [_step("A"), _step("B"), _step("C", ["A"]), _step("D", ["B", "C"])]
+        graph = StepGraph.from_plan(steps)
+
+        assert [[s["agent"] for s in g] for g in graph.levels()] == [
+            ["A", "B"],
+            ["C"],
+            ["D"],
+        ]
+        assert graph.critical_path_ranks([1.0, 5.0, 1.0, 1.0]) == [3.0, 6.0, 2.0, 1.0]
+
+
+class TestDAGStepScheduler:
+    """Execution order, concurrency and failure handling."""
+
+    @staticmethod
+    async def _execute(step):
+        await asyncio.sleep(step["delay"])
+        return step["agent"]
+
+    @pytest.mark.asyncio
+    async def test_step_starts_when_its_own_dependencies_finish(self):
+        """Test a dependent step does not wait for unrelated slow steps."""
+        steps = [
+            _step("Fast", delay=0.01),
+            _step("Slow", delay=0.2),
+            _step("Next", ["Fast"], delay=0.01),
+        ]
+
+        outcomes = await DAGStepScheduler().run(steps, self._execute)
+
+        assert [o.result for o in outcomes] == ["Fast", "Slow", "Next"]
+        assert outcomes[2].finished_at < outcomes[1].finished_at
+
+    @pytest.mark.asyncio
+    async def test_total_time_is_critical_path(self):
+        """Test makespan follows the longest chain, not the sum of groups."""
+        steps = [
+            _step("A", delay=0.1),
+            _step("B", delay=0.02),
+            _step("C", ["B"], delay=0.1),
+        ]
+
+        start = time.monotonic()
+        await DAGStepScheduler().run(steps, self._execute)
+
+        assert time.monotonic() - start < 0.18
+
+    @pytest.mark.asyncio
+    async def test_per_agent_limit(self):
+        """Test at most N steps of the same agent run at once."""
+        running = {"now": 0, "peak": 0}
+
+        async def execute(step):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.01)
+            running["now"] -= 1
+
+        steps = [_step("Zumbi") for _ in range(5)]
+        await DAGStepScheduler(per_agent_limit=2).run(steps, execute)
+
+        assert running["peak"] == 2
+
+    @pytest.mark.asyncio
+    async def test_critical_path_dispatched_first(self):
+        """Test the step heading the longest chain starts first."""
+        started = []
+
+        async def execute(step):
+            started.append(step["agent"])
+
+        steps = [_step("Short"), _step("Long"), _step("Tail", ["Long"])]
+        estimates = {"Short": 1.0, "Long": 3.0, "Tail": 3.0}
+
+        await DAGStepScheduler(max_concurrent=1).run(
+            steps, execute, estimate_duration=lambda s: estimates[s["agent"]]
+        )
+
+        assert started == ["Long", "Tail", "Short"]
+
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_are_recorded(self):
+        """Test failing steps record errors and dependents still run."""
+
+        async def execute(step):
+            if step["agent"] == "Broken":
+                raise RuntimeError("boom")
+            await asyncio.sleep(step["delay"])
+            return "ok"
+
+        steps = [
+            _step("Broken"),
+            _step("Hangs", delay=1.0),
+            _step("After", ["Broken"]),
+        ]
+        outcomes = await DAGStepScheduler(step_timeout=0.05).run(steps, execute)
+
+        assert outcomes[0].error == "boom"
+        assert outcomes[1].error == "TimeoutError"
+        assert outcomes[2].result == "ok"
+
+    @pytest.mark.asyncio
+    async def test_fail_fast_errors_are_raised(self):
+        """Test configured exception types abort the run."""
+
+        async def execute(step):
+            raise KeyError(step["agent"])
+
+        with pytest.raises(KeyError):
+            await DAGStepScheduler(fail_fast_on=(KeyError,)).run(
+                [_step("Missing")], execute
+            )
+
+    @pytest.mark.asyncio
+    async def test_fail_fast_settles_every_task(self):
+        """Test an aborted run retrieves sibling errors and awaits cancellations."""
+        loop = asyncio.get_running_loop()
+        unretrieved = []
+        loop.set_exception_handler(lambda _, context: unretrieved.append(context))
+        cancelled = []
+
+        async def execute(step):
+            try:
+                await asyncio.sleep(step["delay"])
+            except asyncio.CancelledError:
+                cancelled.append(step["agent"])
+                raise
+            raise KeyError(step["agent"])
+
+        steps = [_step("A"), _step("B"), _step("C", delay=1.0)]
+        try:
+            await DAGStepScheduler(fail_fast_on=(KeyError,)).run(steps, execute)
+        except KeyError:
+            aborted = True
+        assert cancelled == ["C"]
+        gc.collect()
+        loop.set_exception_handler(None)
+
+        assert aborted
+        assert unretrieved == []
@@ -769,3 +769,39 @@ async def test_decorator_unknown_metric(lampiao_agent, agent_context):
 
     # Should complete (decorator logs warning and uses fallback)
     assert response.status == AgentStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_municipal_statistics_use_mesh_contiguity(lampiao_agent):
+    """Test municipal Gi*/LISA over mesh weights, skipping areas without data."""
+    from src.ml.spatial_statistics import polygon_contiguity_weights
+
+    ids, geometries = [], []
+    for row in range(6):
+        for col in range(6):
+            ids.append(f"35{row:02d}{col:03d}")
+            ring = [[col, row], [col + 1, row], [col + 1, row + 1], [col, row + 1]]
+            geometries.append({"type": "Polygon", "coordinates": [ring + ring[:1]]})
+    lampiao_agent.spatial_weights["municipal"] = polygon_contiguity_weights(
+        ids, geometries
+    )
+    # High values in the first rows, one municipality without data
+    values = {code: float(6 - int(code[2:4])) for code in ids[1:]}
+
+    result = await lampiao_agent.analyze_municipal_statistics(
+        "gdp_per_capita", values, permutations=99
+    )
+
+    assert result["weights"]["n"] == 35
+    assert result["global"]["I"] > 0
+    hot = {area["id"] for area in result["areas"] if area["hotspot"] == "hot"}
+    assert hot and all(code[2:4] in ("00", "01") for code in hot)
+
+
+@pytest.mark.asyncio
+async def test_municipal_statistics_require_data(lampiao_agent):
+    """Test indicators without municipal data are reported."""
+    from src.core.exceptions import DataNotFoundError
+
+    with pytest.raises(DataNotFoundError):
+        await lampiao_agent.analyze_municipal_statistics("hdi")
@@ -865,3 +865,29 @@ class TestMachadoCoverageBoost:
         # Should convert string to TextualAnalysisRequest
         assert response.status == AgentStatus.COMPLETED
         assert "document_type" in response.result
+
+
+class TestBatchAnalysis:
+    """Test bulk analysis of many documents."""
+
+    @pytest.mark.asyncio
+    async def test_analyze_documents_matches_single_analysis(
+        self, agent, agent_context, sample_contract_document, sample_urgent_contract
+    ):
+        """Test batch results equal one-by-one analysis, in order."""
+        from src.agents.machado import TextualAnalysisRequest
+
+        documents = [sample_contract_document, sample_urgent_contract] * 10
+
+        results = await agent.analyze_documents(documents, max_workers=2)
+
+        assert len(results) == len(documents)
+        for document, result in zip(documents, results, strict=True):
+            single = await agent._analyze_document(
+                TextualAnalysisRequest(document_content=document), agent_context
+            )
+            assert result.document_id == single.document_id
+            assert result.checksum == single.checksum
+            assert result.suspicious_patterns == single.suspicious_patterns
+            assert len(result.alerts) == len(single.alerts)
+        assert results[1].alerts[0].alert_type == "urgency_abuse"
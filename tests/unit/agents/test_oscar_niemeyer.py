@@ -18,12 +18,15 @@ from src.agents.oscar_niemeyer import (
     VisualizationType,
 )
 from src.core import AgentStatus
+from src.services.aggregation_cube import AggregationCube
 
 
 @pytest.fixture
 def oscar_agent():
-    """Create Oscar Niemeyer agent instance."""
-    return OscarNiemeyerAgent()
+    """Create Oscar Niemeyer agent instance with an empty cube."""
+    agent = OscarNiemeyerAgent()
+    agent.cube = AggregationCube()
+    return agent
 
 
 @pytest.fixture
@@ -553,3 +556,90 @@ async def test_choropleth_geojson_fallback(oscar_agent, agent_context):
     assert response.status == AgentStatus.COMPLETED
     assert response.result["type"] == "choropleth"
     assert "error" in response.result
+
+
+@pytest.mark.asyncio
+async def test_aggregation_reads_cube_when_data_collected(
+    oscar_agent, agent_context, sample_data
+):
+    """Test multidimensional aggregation uses the cube once records exist."""
+    oscar_agent.ingest_records(sample_data)
+
+    result = await oscar_agent._perform_multidimensional_aggregation(
+        {"dimensions": ["uf"], "metrics": ["total", "count"]}, agent_context
+    )
+
+    assert result["metadata"]["data_source"] == "aggregation_cube"
+    points = {p["uf"]: p for p in result["aggregation"]["data_points"]}
+    assert points["SP"] == {"uf": "SP", "total": 2200.0, "count": 2}
+    assert list(points)[0] == "SP"  # Sorted by total
+
+
+@pytest.mark.asyncio
+async def test_regional_aggregation_from_data(oscar_agent):
+    """Test regional aggregation of passed records uses real values."""
+    data = [
+        {"uf": "SP", "valor": 300.0},
+        {"uf": "SP", "valor": 100.0},
+        {"uf": "BA", "valor": 600.0},
+    ]
+
+    result = await oscar_agent.aggregate_by_region(
+        data, "state", ["total_value", "total_contracts"]
+    )
+
+    sp = result["regions"]["SP"]
+    assert sp["name"] == "São Paulo"
+    assert sp["region"] == "Sudeste"
+    assert sp["metrics"]["total_value"]["value"] == 400.0
+    assert sp["metrics"]["total_contracts"]["value"] == 2
+    assert result["summary"]["top_region"] == "BA"
+    assert oscar_agent.cube.row_count == 0  # Ad-hoc data is not persisted
+
+
+@pytest.mark.asyncio
+async def test_time_series_from_cube(oscar_agent, sample_data):
+    """Test monthly series comes from the month rollup."""
+    oscar_agent.ingest_records(
+        sample_data + [{"date": "2024-02-10", "region": "SP", "value": 50}]
+    )
+
+    ts = await oscar_agent.generate_time_series(
+        "spending", "2024-01-01", "2024-03-31", TimeGranularity.MONTH
+    )
+    quarterly = await oscar_agent.generate_time_series(
+        "spending", None, None, TimeGranularity.QUARTER
+    )
+    daily = await oscar_agent.generate_time_series(
+        "spending", "2024-01-01", "2024-03-31", TimeGranularity.DAY
+    )
+
+    assert ts.granularity == TimeGranularity.MONTH
+    assert ts.values == [4500.0, 50.0]
+    assert ts.metadata["data_source"] == "aggregation_cube"
+    assert quarterly.granularity == TimeGranularity.QUARTER
+    assert quarterly.values == [4550.0]
+    # Daily buckets cannot be derived from the monthly cube
+    assert daily.granularity == TimeGranularity.DAY
+    assert "data_source" not in daily.metadata
+
+
+@pytest.mark.asyncio
+async def test_aggregation_of_request_records_is_isolated(
+    oscar_agent, agent_context, sample_data
+):
+    """Test records sent with a request are aggregated on their own."""
+    oscar_agent.ingest_records([{"uf": "BA", "value": 999}])
+    request = {"dimensions": ["uf"], "metrics": ["total"], "records": sample_data}
+
+    first = await oscar_agent._perform_multidimensional_aggregation(
+        request, agent_context
+    )
+    second = await oscar_agent._perform_multidimensional_aggregation(
+        request, agent_context
+    )
+
+    points = {p["uf"]: p["total"] for p in second["aggregation"]["data_points"]}
+    assert points == {"SP": 2200.0, "RJ": 1700.0, "MG": 600.0}
+    assert first["aggregation"] == second["aggregation"]
+    assert oscar_agent.cube.row_count == 1
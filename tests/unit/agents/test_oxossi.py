@@ -615,6 +615,26 @@ class TestOxossiCircularPayments:
         assert pattern["confidence"] == 0.85
         assert set(pattern["entities_involved"]) == {"ENTITY_A", "ENTITY_B", "ENTITY_C"}
 
+    @pytest.mark.asyncio
+    async def test_detect_longer_circular_payment_once(self, agent):
+        """Test 5-entity cycles are found once, not once per rotation."""
+        entities = ["E1", "E2", "E3", "E4", "E5"]
+        transactions = [
+            {
+                "payer_id": entities[i],
+                "recipient_id": entities[(i + 1) % 5],
+                "amount": 50000 - i * 1000,
+                "date": f"2025-01-{i + 1:02d}",
+            }
+            for i in range(5)
+        ]
+
+        patterns = agent._detect_circular_payments(transactions)
+
+        assert len(patterns) == 1
+        assert patterns[0].entities_involved == entities
+        assert patterns[0].estimated_impact == 46000
+
 
 class TestOxossiBenfordsLaw:
     """Test suite for Benford's Law Analysis."""
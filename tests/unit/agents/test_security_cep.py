@@ -0,0 +1,223 @@
+"""
+Tests for Maria Quitéria's streaming IOC matching and event correlation.
+"""
+
+import random
+from datetime import UTC, datetime
+
+import pytest
+
+from src.agents.maria_quiteria import MariaQuiteriaAgent
+from src.agents.security_cep import (
+    DEFAULT_SIGNATURES,
+    CorrelationEngine,
+    SignatureIndex,
+    parse_timestamp,
+)
+
+T0 = datetime(2026, 3, 2, 14, 0, tzinfo=UTC).timestamp()
+
+
+def detection(offset, source="203.0.113.7", method="signature_based", **event):
+    event.setdefault("source_ip", source)
+    event["timestamp"] = datetime.fromtimestamp(T0 + offset, UTC).isoformat()
+    return {"event": event, "detection_method": method, "confidence": 0.9}
+
+
+class TestParseTimestamp:
+    """Timestamps are normalized to epoch seconds once."""
+
+    def test_formats(self):
+        assert parse_timestamp("2026-03-02T14:00:00+00:00") == T0
+        assert parse_timestamp("2026-03-02T14:00:00Z") == T0
+        assert parse_timestamp("2026-03-02T14:00:00") == T0  # naive is UTC
+        assert parse_timestamp(datetime.fromtimestamp(T0, UTC)) == T0
+        assert parse_timestamp(T0) == T0
+
+    def test_missing_or_invalid_uses_default(self):
+        assert parse_timestamp(None, 1.0) == 1.0
+        assert parse_timestamp("yesterday", 1.0) == 1.0
+        assert parse_timestamp(None) == pytest.approx(
+            datetime.now(UTC).timestamp(), abs=5
+        )
+
+
+class TestSignatureIndex:
+    """Hashed IOC sets and the combined payload matcher."""
+
+    def test_match_all_indicator_types(self):
+        index = SignatureIndex.from_feeds(DEFAULT_SIGNATURES)
+
+        threats = index.match(
+            {
+                "src_ip": "10.0.0.66",
+                "dst_port": "4444",
+                "payload": "id=1 UNION SELECT password FROM users",
+                "file_hash": "5F4DCC3B5AA765D61D8327DEB882CF99",
+            }
+        )
+
+        assert [t["type"] for t in threats] == [
+            "malicious_ip",
+            "suspicious_port",
+            "attack_pattern",
+            "malware_hash",
+        ]
+        assert threats[2]["indicator"] == "union select"
+
+    def test_clean_event(self):
+        index = SignatureIndex.from_feeds(DEFAULT_SIGNATURES)
+        assert index.match({"src_ip": "10.0.0.1", "dst_port": 443}) == []
+
+    def test_overlapping_signatures_all_reported(self):
+        index = SignatureIndex(
+            attack_patterns=["../../../etc/passwd", "../../../", "<script>", "etc"]
+        )
+
+        assert index.scan("GET /../../../etc/passwd <SCRIPT>") == [
+            "../../../etc/passwd",
+            "../../../",
+            "<script>",
+            "etc",
+        ]
+
+    def test_feeds_are_merged(self):
+        index = SignatureIndex.from_feeds(
+            DEFAULT_SIGNATURES,
+            {
+                "malicious_ips": ["198.51.100.99"],
+                "malware_hashes": {"sha256": ["ABC"], "md5": ["def"]},
+                "attack_signatures": ["<script>alert("],
+            },
+        )
+
+        assert {"198.51.100.99", "10.0.0.66"} <= index.malicious_ips
+        assert {"abc", "def"} <= index.malware_hashes
+        assert "<script>alert(" in index.attack_patterns
+
+    def test_scan_matches_substring_search(self):
+        rng = random.Random(7)
+        alphabet = "ab./<s"
+        patterns = list(
+            {"".join(rng.choices(alphabet, k=rng.randint(1, 5))) for _ in range(40)}
+        )
+        index = SignatureIndex(attack_patterns=patterns)
+
+        for _ in range(200):
+            payload = "".join(rng.choices(alphabet + "xyz", k=rng.randint(0, 40)))
+            expected = [p for p in patterns if p in payload]
+            assert index.scan(payload) == expected
+
+
+class TestCorrelationEngine:
+    """Incremental correlation rules over the bucketed windows."""
+
+    def test_multi_vector_opens_once_and_updates(self):
+        engine = CorrelationEngine()
+
+        assert engine.ingest(detection(0)) == []
+        opened = engine.ingest(detection(10, method="behavioral_analysis"))
+        again = engine.ingest(detection(20, method="behavioral_analysis"))
+
+        multi = [i for i in opened if i["correlation_type"] == "multi_vector_attack"]
+        assert len(multi) == 1
+        assert not [i for i in again if i["correlation_type"] == "multi_vector_attack"]
+        assert multi[0]["event_count"] == 3
+        assert multi[0]["source_ip"] == "203.0.113.7"
+
+    def test_high_frequency_on_fifth_event(self):
+        engine = CorrelationEngine()
+
+        types = [
+            [i["correlation_type"] for i in engine.ingest(detection(t))]
+            for t in range(5)
+        ]
+
+        assert "high_frequency_attack" not in sum(types[:4], [])
+        assert "high_frequency_attack" in types[4]
+
+    def test_events_outside_window_do_not_count(self):
+        engine = CorrelationEngine(window_seconds=300)
+
+        for t in range(0, 5 * 400, 400):
+            opened = engine.ingest(detection(t))
+            assert "high_frequency_attack" not in [
+                i["correlation_type"] for i in opened
+            ]
+
+    def test_temporal_chains_split_on_gaps_and_name_sequences(self):
+        engine = CorrelationEngine(window_seconds=300)
+        stages = ["reconnaissance", "exploitation", "privilege_escalation"]
+
+        opened = engine.ingest_many(
+            [detection(i * 60, event_type=stage) for i, stage in enumerate(stages)]
+            + [detection(2000), detection(2100)]
+        )
+
+        chains = [i for i in opened if i["correlation_type"] == "temporal_chain"]
+        assert len(chains) == 2
+        assert chains[0]["event_count"] == 3
+        assert chains[0]["sequence_name"] == "recon_exploit"
+        assert chains[0]["severity"] == "critical"
+        assert chains[1]["sequence_name"] is None
+        assert chains[1]["severity"] == "high"
+
+    def test_distributed_attack_and_account_compromise(self):
+        engine = CorrelationEngine()
+
+        opened = engine.ingest_many(
+            detection(i, source=f"198.51.100.{i}", dest_ip="10.1.1.1", user_id="ana")
+            for i in range(3)
+        )
+
+        by_type = {i["correlation_type"]: i for i in opened}
+        assert by_type["distributed_attack"]["target"] == "10.1.1.1"
+        assert by_type["account_compromise"]["user_id"] == "ana"
+        assert len(by_type["distributed_attack"]["sources"]) == 3
+
+    def test_late_events_are_dropped(self):
+        engine = CorrelationEngine(window_seconds=300)
+        engine.ingest(detection(1000))
+
+        assert engine.ingest(detection(0)) == []
+        assert engine.stats["late"] == 1
+
+    def test_quiet_incidents_close_and_entities_are_swept(self):
+        incidents = {}
+        engine = CorrelationEngine(window_seconds=300, incidents=incidents)
+        engine.ingest(detection(0))
+        engine.ingest(detection(1, method="behavioral_analysis"))
+        assert incidents
+
+        engine.ingest(detection(1000, source="192.0.2.1"))
+
+        assert incidents == {}
+        assert engine.open_incidents() == []
+        assert list(engine._sources) == ["192.0.2.1"]
+
+
+class TestAgentStreaming:
+    """Maria Quitéria keeps correlating across slices of a feed."""
+
+    @pytest.mark.asyncio
+    async def test_monitor_events_correlates_across_calls(self):
+        agent = MariaQuiteriaAgent()
+        await agent._load_threat_intelligence()
+        event = {"source_ip": "203.0.113.42", "payload": "eval(base64_decode("}
+
+        first = await agent.monitor_events(
+            [{**event, "timestamp": detection(0)["event"]["timestamp"]}]
+        )
+        second = await agent.monitor_events(
+            [{**event, "timestamp": detection(30)["event"]["timestamp"]}]
+        )
+
+        assert first == []
+        assert [i["correlation_type"] for i in second] == ["temporal_chain"]
+        assert second[0]["correlation_id"] in agent.active_incidents
+        threats = second[0]["events"][0]["threats"]
+        assert {t["indicator"] for t in threats} >= {
+            "203.0.113.42",
+            "eval(",
+            "eval(base64_decode(",
+        }
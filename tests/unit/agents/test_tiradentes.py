@@ -561,3 +561,106 @@ class TestCombinedReports:
 
         response = await agent.process(message, AgentContext())
         assert response.status == AgentStatus.COMPLETED
+
+
+# ============================================================================
+# Tests - Caching
+# ============================================================================
+
+
+class TestReportCaching:
+    """Sections, renders and PDF files are reused across requests."""
+
+    @pytest.fixture
+    def cached_agent(self, tmp_path):
+        from src.services.report_cache import ReportArtifactStore, ReportCache
+
+        agent = ReporterAgent()
+        agent.report_cache = ReportCache()
+        agent._artifact_store = ReportArtifactStore(tmp_path)
+        return agent
+
+    @staticmethod
+    def message(data, report_format=ReportFormat.MARKDOWN, audience="technical"):
+        request = ReportRequest(
+            report_type=ReportType.INVESTIGATION_REPORT,
+            format=report_format,
+            investigation_results=data,
+            target_audience=audience,
+        )
+        return AgentMessage(
+            sender="test",
+            recipient="tiradentes",
+            action="generate_report",
+            payload=request.model_dump(),
+        )
+
+    @pytest.mark.asyncio
+    async def test_repeated_request_is_served_from_cache(
+        self, cached_agent, sample_investigation_data
+    ):
+        message = self.message(sample_investigation_data)
+        context = AgentContext(investigation_id="INV-2025-001")
+
+        first = await cached_agent.process(message, context)
+        misses = cached_agent.report_cache.misses
+        second = await cached_agent.process(message, context)
+
+        assert second.result["content"] == first.result["content"]
+        assert cached_agent.report_cache.misses == misses
+
+    @pytest.mark.asyncio
+    async def test_audience_change_reuses_shared_sections(
+        self, cached_agent, sample_investigation_data
+    ):
+        await cached_agent.process(
+            self.message(sample_investigation_data), AgentContext()
+        )
+        hits = cached_agent.report_cache.hits
+
+        response = await cached_agent.process(
+            self.message(sample_investigation_data, audience="executive"),
+            AgentContext(),
+        )
+
+        assert response.status == AgentStatus.COMPLETED
+        assert cached_agent.report_cache.hits > hits
+
+    @pytest.mark.asyncio
+    async def test_changed_data_is_not_served_stale(
+        self, cached_agent, sample_investigation_data
+    ):
+        first = await cached_agent.process(
+            self.message(sample_investigation_data), AgentContext()
+        )
+        changed = {
+            **sample_investigation_data,
+            "summary": {**sample_investigation_data["summary"], "anomalies_found": 99},
+        }
+
+        second = await cached_agent.process(self.message(changed), AgentContext())
+
+        assert second.result["content"] != first.result["content"]
+
+    @pytest.mark.asyncio
+    async def test_pdf_is_rendered_once_and_returned_by_reference(
+        self, cached_agent, sample_investigation_data
+    ):
+        from unittest.mock import AsyncMock, patch
+
+        message = self.message(sample_investigation_data, ReportFormat.PDF)
+        context = AgentContext(investigation_id="INV-2025-001")
+        with patch(
+            "src.agents.tiradentes.export_service.generate_pdf",
+            new=AsyncMock(return_value=b"%PDF-1.4 report"),
+        ) as generate_pdf:
+            first = await cached_agent.process(message, context)
+            second = await cached_agent.process(message, context)
+
+        assert generate_pdf.call_count == 1
+        artifact = first.result["artifact"]
+        assert artifact == second.result["artifact"]
+        assert artifact["media_type"] == "application/pdf"
+        assert artifact["url"].endswith(artifact["artifact_id"])
+        stored = cached_agent.artifact_store.get(artifact["artifact_id"])
+        assert await cached_agent.artifact_store.read(stored) == b"%PDF-1.4 report"
@@ -6,7 +6,7 @@ Date: 2025-01-25
 License: Proprietary - All rights reserved
 """
 
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
@@ -20,6 +20,15 @@ from src.api.routes.export import (
 )
 
 
+async def _agen(items):
+    for item in items:
+        yield item
+
+
+async def _body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
 class TestExportRoutes:
     """Test suite for export API routes."""
 
@@ -187,13 +196,20 @@ class TestExportRoutes:
         """Test export contracts as Excel."""
         from src.api.routes.export import ExportRequest
 
-        # Setup mocks - use AsyncMock for async methods
+        # Setup mocks - contracts arrive page by page
         mock_contracts = [
             {"id": "C001", "value": 100000, "supplier": "Company A"},
             {"id": "C002", "value": 200000, "supplier": "Company B"},
         ]
-        mock_data_service.search_contracts = AsyncMock(return_value=mock_contracts)
-        mock_export_service.generate_excel = AsyncMock(return_value=b"excel-content")
+        mock_data_service.iter_contracts = MagicMock(return_value=_agen(mock_contracts))
+        streamed = []
+
+        async def stream_excel(data, title, metadata=None):
+            streamed.extend([row async for row in data])
+            yield b"excel-"
+            yield b"content"
+
+        mock_export_service.stream_excel = MagicMock(side_effect=stream_excel)
 
         # Create request
         request = ExportRequest(
@@ -208,17 +224,35 @@ class TestExportRoutes:
         response = await export_contracts(request, mock_current_user)
 
         # Verify
-        assert response.body == b"excel-content"
+        assert await _body(response) == b"excel-content"
         assert (
             response.media_type
             == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
+        assert ".xlsx" in response.headers["Content-Disposition"]
+
+        # Every contract is streamed, with no export limit
+        assert streamed == mock_contracts
+        mock_data_service.iter_contracts.assert_called_once_with({"year": 2024})
 
-        # Check search was called with filters
-        mock_data_service.search_contracts.assert_called_once()
-        call_kwargs = mock_data_service.search_contracts.call_args[1]
-        assert call_kwargs["year"] == 2024
-        assert call_kwargs["limit"] == 10000
+    @pytest.mark.asyncio
+    @patch("src.api.routes.export.data_service")
+    async def test_export_contracts_csv(self, mock_data_service, mock_current_user):
+        """Test export contracts as CSV streamed from the API pages."""
+        from src.api.routes.export import ExportRequest
+
+        mock_data_service.iter_contracts = MagicMock(
+            return_value=_agen(
+                [{"id": f"C{i:03d}", "value": i * 1000} for i in range(1, 4)]
+            )
+        )
+        request = ExportRequest(export_type="contracts", format="csv")
+
+        response = await export_contracts(request, mock_current_user)
+
+        assert response.media_type == "text/csv"
+        lines = (await _body(response)).decode().splitlines()
+        assert lines == ["id,value", "C001,1000", "C002,2000", "C003,3000"]
 
     @pytest.mark.asyncio
     @patch("src.api.routes.export.investigation_service")
@@ -295,8 +329,8 @@ class TestExportRoutes:
         mock_investigation_service.get_investigation = AsyncMock(
             return_value=mock_investigation
         )
-        mock_export_service.generate_bulk_export = AsyncMock(
-            return_value=b"zip-content"
+        mock_export_service.stream_bulk_export = MagicMock(
+            return_value=_agen([b"zip-", b"content"])
         )
         mock_json_utils.dumps.return_value = '{"test": "json"}'
 
@@ -313,13 +347,13 @@ class TestExportRoutes:
         response = await bulk_export(request, mock_current_user)
 
         # Verify
-        assert response.body == b"zip-content"
+        assert await _body(response) == b"zip-content"
         assert response.media_type == "application/zip"
         assert ".zip" in response.headers["Content-Disposition"]
 
         # Check bulk export was called
-        mock_export_service.generate_bulk_export.assert_called_once()
-        exports_config = mock_export_service.generate_bulk_export.call_args[0][0]
+        mock_export_service.stream_bulk_export.assert_called_once()
+        exports_config = mock_export_service.stream_bulk_export.call_args[0][0]
         assert len(exports_config) == 2
 
     def test_format_investigation_as_markdown(self, mock_investigation):
@@ -362,7 +396,7 @@ class TestExportRoutes:
         from src.api.routes.export import ExportRequest
 
         # Setup mock - use AsyncMock for async methods
-        mock_data_service.search_contracts = AsyncMock(return_value=[])
+        mock_data_service.iter_contracts = MagicMock(return_value=_agen([]))
 
         # Create request
         request = ExportRequest(
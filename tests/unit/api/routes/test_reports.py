@@ -0,0 +1,107 @@
+"""
+Module: tests.unit.api.routes.test_reports
+Description: Unit tests for report routes
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from src.agents.deodoro import AgentResponse
+from src.api.routes import reports
+from src.api.routes.reports import (
+    ReportRequest,
+    _active_reports,
+    _generate_report,
+    download_report,
+)
+from src.core import AgentStatus
+from src.services.report_cache import ReportArtifactStore
+
+USER = {"user_id": "user-1"}
+
+
+async def _body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+class FakeReporter:
+    """Reporter answering like Tiradentes does for PDF output."""
+
+    artifact = None
+
+    async def process(self, message, context):
+        assert message.action == "generate_report"
+        assert message.payload["format"] == "pdf"
+        return AgentResponse(
+            agent_name="tiradentes",
+            status=AgentStatus.COMPLETED,
+            result={
+                "status": "completed",
+                "content": "",
+                "artifact": self.artifact.as_dict(),
+            },
+        )
+
+
+class TestPdfReportDownload:
+    """PDF reports are served from the artifact Tiradentes rendered."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = ReportArtifactStore(tmp_path)
+        with patch.object(reports, "get_report_artifact_store", return_value=store):
+            yield store
+
+    @pytest.fixture
+    def report_id(self):
+        report_id = "report-1"
+        _active_reports[report_id] = {
+            "id": report_id,
+            "status": "started",
+            "title": "Relatório Anual",
+            "output_format": "pdf",
+            "target_audience": "general",
+            "user_id": USER["user_id"],
+            "progress": 0.0,
+            "current_phase": "initializing",
+            "content": "",
+            "metadata": {},
+        }
+        yield report_id
+        _active_reports.pop(report_id, None)
+
+    @pytest.mark.asyncio
+    async def test_download_streams_rendered_artifact(self, store, report_id):
+        FakeReporter.artifact = await store.put(
+            "rendered", b"%PDF-1.4 report", "application/pdf"
+        )
+        request = ReportRequest(
+            report_type="executive_summary",
+            title="Relatório Anual",
+            data_sources=["contracts"],
+            time_range={"start": "2025-01-01", "end": "2025-12-31"},
+            output_format="pdf",
+        )
+
+        with patch.object(reports, "ReporterAgent", FakeReporter):
+            await _generate_report(report_id, request)
+        response = await download_report(report_id, "pdf", USER)
+
+        assert _active_reports[report_id]["status"] == "completed"
+        assert await _body(response) == b"%PDF-1.4 report"
+        assert store.renders == 0
+
+    @pytest.mark.asyncio
+    async def test_evicted_artifact_is_gone(self, store, report_id):
+        _active_reports[report_id]["status"] = "completed"
+        _active_reports[report_id]["artifact"] = {"artifact_id": "evicted"}
+
+        with pytest.raises(HTTPException) as exc:
+            await download_report(report_id, "pdf", USER)
+
+        assert exc.value.status_code == 410
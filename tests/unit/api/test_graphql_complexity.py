@@ -0,0 +1,183 @@
+"""
+Tests for GraphQL static cost analysis and persisted queries.
+"""
+
+import json
+
+import pytest
+from graphql import build_schema, parse, specified_rules, validate
+
+from src.api.graphql.complexity import (
+    DEFAULT_LIST_SIZE,
+    MAX_PAGE_SIZE,
+    operation_cost,
+    query_cost_rule,
+)
+from src.api.graphql.persisted_queries import (
+    PersistedQueryError,
+    PersistedQueryNotFound,
+    PersistedQueryStore,
+    query_hash,
+)
+
+SCHEMA = build_schema("""
+    type Query {
+        investigations(pagination: PaginationInput): [Investigation!]!
+        investigation(id: ID!): Investigation
+        me: User
+    }
+    input PaginationInput { limit: Int = 20 offset: Int = 0 }
+    type Investigation {
+        id: ID!
+        query: String!
+        findings: [Finding!]!
+        user: User
+    }
+    type User { id: ID! name: String! investigations(limit: Int = 10): [Investigation!]! }
+    type Finding { id: ID! title: String! }
+    """)
+
+
+def cost_of(query):
+    document = parse(query)
+    fragments = {
+        d.name.value: d for d in document.definitions if d.kind == "fragment_definition"
+    }
+    operation = next(
+        d for d in document.definitions if d.kind == "operation_definition"
+    )
+    return operation_cost(operation, fragments, SCHEMA)
+
+
+def errors_of(query, **limits):
+    rules = [*specified_rules, query_cost_rule(**limits)]
+    return [error.message for error in validate(SCHEMA, parse(query), rules)]
+
+
+class TestOperationCost:
+    """Static scoring of operations."""
+
+    def test_list_children_multiplied_by_limit(self):
+        cost = cost_of(
+            "{ investigations(pagination: {limit: 5}) { id findings { title } } }"
+        )
+
+        # investigations + 5 * (id + findings + DEFAULT_LIST_SIZE * title)
+        assert cost.cost == 1 + 5 * (2 + DEFAULT_LIST_SIZE)
+        assert cost.depth == 3
+        assert cost.width == 2
+
+    def test_variable_limit_assumes_largest_page(self):
+        cost = cost_of(
+            "query Q($n: Int) { investigations(pagination: {limit: $n}) { id } }"
+        )
+
+        assert cost.cost == 1 + MAX_PAGE_SIZE
+
+    def test_limit_is_capped(self):
+        cost = cost_of("{ investigations(pagination: {limit: 100000}) { id } }")
+
+        assert cost.cost == 1 + MAX_PAGE_SIZE
+
+    def test_fragments_are_expanded(self):
+        inline = cost_of("{ investigation(id: 1) { id user { name } } }")
+        spread = cost_of(
+            "{ investigation(id: 1) { ...F } } "
+            "fragment F on Investigation { id ... on Investigation { user { name } } }"
+        )
+
+        assert spread == inline
+
+
+class TestQueryCostRule:
+    """Rejection of over-deep, over-wide or over-costly operations."""
+
+    NESTED = "{ me { investigations { user { investigations { user { id } } } } } }"
+
+    def test_cheap_query_passes(self):
+        assert errors_of("{ investigation(id: 1) { id query } }") == []
+
+    def test_too_deep(self):
+        errors = errors_of(self.NESTED, max_depth=4)
+
+        assert errors == ["Operation 'anonymous' is nested more than 4 levels deep."]
+
+    def test_self_spreading_fragment_is_not_expanded_forever(self):
+        query = (
+            "{ me { ...F } } fragment F on User { investigations { user { ...F } } }"
+        )
+
+        # No RecursionError: the standard rule reports the cycle instead
+        assert errors_of(query) == ["Cannot spread fragment 'F' within itself."]
+        assert errors_of(query, max_depth=1000) == errors_of(query)
+
+    def test_too_wide(self):
+        query = (
+            "{ investigation(id: 1) { "
+            + " ".join(f"a{i}: id" for i in range(6))
+            + " } }"
+        )
+
+        assert errors_of(query, max_width=5) == [
+            "Operation 'anonymous' selects 6 fields at one level; the maximum is 5."
+        ]
+
+    def test_too_costly(self):
+        errors = errors_of("query Big " + self.NESTED, max_cost=50)
+
+        assert len(errors) == 1
+        assert errors[0].startswith("Operation 'Big' has an estimated cost of")
+
+
+class TestPersistedQueryStore:
+    """Automatic persisted queries and persisted-only mode."""
+
+    QUERY = "{ me { id } }"
+
+    @staticmethod
+    def extensions(query):
+        return {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+    def test_plain_query_passes_through(self):
+        assert PersistedQueryStore().resolve(self.QUERY, None) == self.QUERY
+
+    def test_unknown_hash_then_registration(self):
+        store = PersistedQueryStore()
+
+        with pytest.raises(PersistedQueryNotFound):
+            store.resolve(None, self.extensions(self.QUERY))
+
+        assert store.resolve(self.QUERY, self.extensions(self.QUERY)) == self.QUERY
+        assert store.resolve(None, self.extensions(self.QUERY)) == self.QUERY
+
+    def test_hash_mismatch_rejected(self):
+        with pytest.raises(PersistedQueryError, match="does not match"):
+            PersistedQueryStore().resolve(
+                "{ me { name } }", self.extensions(self.QUERY)
+            )
+
+    def test_registered_documents_are_bounded(self):
+        store = PersistedQueryStore(max_entries=2)
+        hashes = [
+            store.register(f"{{ investigation(id: {i}) {{ id }} }}") for i in range(3)
+        ]
+
+        assert store.get(hashes[0]) is None
+        assert store.get(hashes[2]) is not None
+
+    def test_persisted_only_uses_manifest(self, tmp_path):
+        manifest = tmp_path / "queries.json"
+        manifest.write_text(json.dumps({query_hash(self.QUERY): self.QUERY}))
+        store = PersistedQueryStore.from_file(manifest, persisted_only=True)
+
+        assert store.resolve(None, self.extensions(self.QUERY)) == self.QUERY
+        assert store.resolve(self.QUERY, None) == self.QUERY
+        with pytest.raises(PersistedQueryError, match="Only persisted"):
+            store.resolve("{ me { name } }", None)
+        with pytest.raises(PersistedQueryError, match="Only persisted"):
+            other = "{ me { name } }"
+            store.resolve(other, self.extensions(other))
+
+    def test_manifest_hashes_are_checked(self):
+        with pytest.raises(PersistedQueryError, match="mismatch"):
+            PersistedQueryStore(manifest={"0" * 64: self.QUERY})
@@ -0,0 +1,88 @@
+"""
+Tests for the per-request GraphQL DataLoaders.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.api.graphql.loaders import create_loaders, get_loaders
+
+
+def record(investigation_id, user_id="user-1"):
+    return SimpleNamespace(id=investigation_id, user_id=user_id, results=[])
+
+
+@pytest.fixture
+def service():
+    service = MagicMock()
+    service.get_many = AsyncMock(
+        side_effect=lambda ids: [record(i) for i in ids if i != "missing"]
+    )
+    service.get_contract_anomaly_references = AsyncMock(
+        side_effect=lambda ids: [
+            SimpleNamespace(contract_id=i, investigation_id="inv-1", anomaly_ids=[])
+            for i in ids
+        ]
+    )
+    with patch("src.api.graphql.loaders.investigation_service", service):
+        yield service
+
+
+class TestLoaders:
+    """Lookups of one tick are batched and deduplicated."""
+
+    @pytest.mark.asyncio
+    async def test_investigations_batched_into_one_query(self, service):
+        loaders = create_loaders()
+
+        results = await asyncio.gather(
+            *(loaders.investigations.load(i) for i in ["a", "b", "a", "missing"])
+        )
+
+        assert [r.id if r else None for r in results] == ["a", "b", "a", None]
+        service.get_many.assert_awaited_once_with(["a", "b", "missing"])
+
+    @pytest.mark.asyncio
+    async def test_primed_investigations_are_not_fetched(self, service):
+        loaders = create_loaders()
+        loaders.prime_investigations([record("a")])
+
+        assert (await loaders.investigations.load("a")).id == "a"
+        service.get_many.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_contract_references_grouped_by_contract(self, service):
+        loaders = create_loaders()
+
+        first, second = await asyncio.gather(
+            loaders.contract_anomalies.load("c-1"),
+            loaders.contract_anomalies.load("c-2"),
+        )
+
+        assert [r.contract_id for r in first] == ["c-1"]
+        assert [r.contract_id for r in second] == ["c-2"]
+        service.get_contract_anomaly_references.assert_awaited_once_with(["c-1", "c-2"])
+
+    @pytest.mark.asyncio
+    async def test_users_come_from_one_lookup(self):
+        users = {"u-1": SimpleNamespace(id="u-1")}
+        with patch("src.api.auth.auth_manager") as auth_manager:
+            auth_manager.get_users_by_ids.return_value = users
+            loaders = create_loaders()
+
+            found, missing = await asyncio.gather(
+                loaders.users.load("u-1"), loaders.users.load("u-2")
+            )
+
+        assert found.id == "u-1"
+        assert missing is None
+        auth_manager.get_users_by_ids.assert_called_once_with(["u-1", "u-2"])
+
+    def test_loaders_are_per_request(self):
+        context = {}
+
+        assert get_loaders(context) is get_loaders(context)
+        assert get_loaders({}) is not get_loaders(context)
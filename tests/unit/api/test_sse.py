@@ -0,0 +1,127 @@
+"""
+Tests for Server-Sent Events relaying: heartbeats, coalescing and cleanup.
+"""
+
+import asyncio
+
+import pytest
+
+from src.api.sse import HEARTBEAT_FRAME, sse_event, sse_response, stream_frames
+
+
+async def _collect(frames) -> list[str]:
+    return [frame async for frame in frames]
+
+
+class TestSSEEvent:
+    """Frame formatting."""
+
+    def test_data_frame(self):
+        frame = sse_event({"type": "chunk", "content": "Olá"})
+        assert frame.startswith("data: ")
+        assert frame.endswith("\n\n")
+        assert "Olá" in frame
+
+    def test_response_headers(self):
+        async def frames():
+            yield sse_event({"type": "start"})
+
+        response = sse_response(frames())
+        assert response.media_type == "text/event-stream"
+        assert response.headers["x-accel-buffering"] == "no"
+        assert response.headers["cache-control"] == "no-cache"
+
+
+class TestStreamFrames:
+    """Relay of producer frames to the response."""
+
+    @pytest.mark.asyncio
+    async def test_relays_frames_in_order(self):
+        async def frames():
+            for i in range(5):
+                yield f"data: {i}\n\n"
+                await asyncio.sleep(0)
+
+        received = "".join(await _collect(stream_frames(frames())))
+        assert received == "".join(f"data: {i}\n\n" for i in range(5))
+
+    @pytest.mark.asyncio
+    async def test_first_frame_is_not_delayed(self):
+        async def frames():
+            yield "data: first\n\n"
+            await asyncio.sleep(10)
+            yield "data: late\n\n"
+
+        relay = stream_frames(frames(), heartbeat_interval=60)
+        first = await asyncio.wait_for(relay.__anext__(), timeout=0.5)
+        assert first == "data: first\n\n"
+        await relay.aclose()
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_while_producer_is_idle(self):
+        async def frames():
+            await asyncio.sleep(0.05)
+            yield "data: token\n\n"
+
+        received = await _collect(stream_frames(frames(), heartbeat_interval=0.01))
+        assert received[0] == HEARTBEAT_FRAME
+        assert received[-1] == "data: token\n\n"
+
+    @pytest.mark.asyncio
+    async def test_frames_queued_behind_slow_client_are_coalesced(self):
+        async def frames():
+            for i in range(10):
+                yield f"data: {i}\n\n"
+
+        relay = stream_frames(frames(), max_pending=4)
+        writes = []
+        async for chunk in relay:
+            writes.append(chunk)
+            await asyncio.sleep(0.01)  # slow client
+
+        assert "".join(writes) == "".join(f"data: {i}\n\n" for i in range(10))
+        assert len(writes) < 10
+
+    @pytest.mark.asyncio
+    async def test_producer_waits_for_slow_client(self):
+        produced = 0
+
+        async def frames():
+            nonlocal produced
+            for i in range(100):
+                produced += 1
+                yield f"data: {i}\n\n"
+
+        relay = stream_frames(frames(), max_pending=4)
+        await relay.__anext__()
+        await asyncio.sleep(0.01)
+        # One drained batch plus a full queue, not the producer's length
+        assert produced <= 2 * 4 + 2
+        await relay.aclose()
+
+    @pytest.mark.asyncio
+    async def test_producer_error_propagates(self):
+        async def frames():
+            yield "data: ok\n\n"
+            raise RuntimeError("provider failed")
+
+        relay = stream_frames(frames())
+        with pytest.raises(RuntimeError, match="provider failed"):
+            await _collect(relay)
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_producer(self):
+        closed = asyncio.Event()
+
+        async def frames():
+            try:
+                yield "data: first\n\n"
+                await asyncio.sleep(10)
+                yield "data: never\n\n"
+            finally:
+                closed.set()
+
+        relay = stream_frames(frames())
+        await relay.__anext__()
+        await relay.aclose()
+        assert closed.is_set()
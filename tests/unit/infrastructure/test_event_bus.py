@@ -0,0 +1,172 @@
+"""Tests for batched consumption in the Redis Streams event bus."""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.infrastructure.events.event_bus import EventBus, EventHandler, EventType
+
+
+class RecordingHandler(EventHandler):
+    """Records handled events and the peak number of concurrent calls."""
+
+    def __init__(self, fail: bool = False):
+        super().__init__([EventType.ANOMALY_DETECTED])
+        self.fail = fail
+        self.seen = []
+        self.active = 0
+        self.peak = 0
+
+    async def handle(self, event):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.001)
+        self.active -= 1
+        self.seen.append((event.data["investigation_id"], event.data["n"]))
+        if self.fail:
+            raise RuntimeError("handler down")
+
+
+class BlockingFakeRedis(fakeredis.aioredis.FakeRedis):
+    """fakeredis answers XREADGROUP BLOCK at once; wait briefly like Redis."""
+
+    async def xreadgroup(self, *args, block=None, **kwargs):
+        result = await super().xreadgroup(*args, block=block, **kwargs)
+        if not result and block:
+            await asyncio.sleep(0.005)
+        return result
+
+
+@pytest.fixture
+def client():
+    return BlockingFakeRedis()
+
+
+async def _run_until(bus, condition, timeout=5.0):
+    await bus.start("worker-1")
+    try:
+        async with asyncio.timeout(timeout):
+            while not condition():
+                await asyncio.sleep(0.01)
+    finally:
+        await bus.stop()
+
+
+def _anomalies(investigations, per_investigation):
+    return [
+        (EventType.ANOMALY_DETECTED, {"investigation_id": inv, "n": n}, None)
+        for n in range(per_investigation)
+        for inv in investigations
+    ]
+
+
+class TestEventBusConsumption:
+    """Batched, partitioned consumption with pipelined acknowledgement."""
+
+    @pytest.mark.asyncio
+    async def test_partitions_keep_order_and_run_concurrently(self, client):
+        bus = EventBus(client, handler_concurrency=8)
+        handler = RecordingHandler()
+        bus.register_handler(handler)
+        await bus.publish_many(_anomalies(["inv-a", "inv-b", "inv-c"], 20))
+
+        await _run_until(bus, lambda: len(handler.seen) == 60)
+
+        for inv in ("inv-a", "inv-b", "inv-c"):
+            assert [n for i, n in handler.seen if i == inv] == list(range(20))
+        assert handler.peak > 1
+        assert bus.get_stats()["events_processed"] == 60
+        pending = await client.xpending("events:anomaly", "cidadao-ai")
+        assert pending["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_events_are_retried_then_dead_lettered(self, client):
+        bus = EventBus(client, max_retries=2)
+        handler = RecordingHandler(fail=True)
+        bus.register_handler(handler)
+        await bus.publish(EventType.ANOMALY_DETECTED, {"investigation_id": "i", "n": 0})
+
+        await _run_until(bus, lambda: bus.get_stats()["events_failed"] == 1)
+
+        assert len(handler.seen) == 3
+        assert bus.get_stats()["events_retried"] == 2
+        assert await client.xlen("events:dlq") == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_pending_entries_are_reclaimed(self, client):
+        await client.xgroup_create(
+            "events:anomaly", "cidadao-ai", id="0", mkstream=True
+        )
+        publisher = EventBus(client)
+        await publisher.publish_many(_anomalies(["inv-a"], 5))
+        # A consumer that crashed after reading, before acknowledging
+        await client.xreadgroup("cidadao-ai", "crashed", {"events:anomaly": ">"})
+
+        bus = EventBus(client, claim_idle_ms=0)
+        handler = RecordingHandler()
+        bus.register_handler(handler)
+        await _run_until(bus, lambda: len(handler.seen) == 5)
+
+        assert bus.get_stats()["events_claimed"] == 5
+        assert [n for _, n in handler.seen] == list(range(5))
+
+    @pytest.mark.asyncio
+    async def test_malformed_entries_are_acknowledged(self, client):
+        bus = EventBus(client)
+        handler = RecordingHandler()
+        bus.register_handler(handler)
+        await client.xgroup_create(
+            "events:anomaly", "cidadao-ai", id="0", mkstream=True
+        )
+        await client.xadd("events:anomaly", {"event": "not json"})
+        await bus.publish(EventType.ANOMALY_DETECTED, {"investigation_id": "i", "n": 0})
+
+        await _run_until(bus, lambda: len(handler.seen) == 1)
+
+        pending = await client.xpending("events:anomaly", "cidadao-ai")
+        assert pending["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failing_error_hook_does_not_leave_batch_pending(self, client):
+        class BrokenHook(RecordingHandler):
+            async def handle(self, event):
+                await super().handle(event)
+                if event.data["investigation_id"] == "inv-a":
+                    raise RuntimeError("handler down")
+
+            async def on_error(self, event, error):
+                raise RuntimeError("hook down")
+
+        bus = EventBus(client, max_retries=0)
+        handler = BrokenHook()
+        bus.register_handler(handler)
+        await bus.publish_many(_anomalies(["inv-a", "inv-b"], 1))
+
+        await _run_until(bus, lambda: bus.get_stats()["events_failed"] == 1)
+
+        assert bus.get_stats()["events_processed"] == 1
+        pending = await client.xpending("events:anomaly", "cidadao-ai")
+        assert pending["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failing_autoclaim_does_not_stall_reads(self, client, monkeypatch):
+        async def xautoclaim(*args, **kwargs):
+            raise ConnectionError("claim failed")
+
+        monkeypatch.setattr(client, "xautoclaim", xautoclaim)
+        bus = EventBus(client)
+        handler = RecordingHandler()
+        bus.register_handler(handler)
+        await bus.publish(EventType.ANOMALY_DETECTED, {"investigation_id": "i", "n": 0})
+
+        await _run_until(bus, lambda: len(handler.seen) == 1, timeout=3.0)
+
+    def test_batch_size_adapts_to_backlog(self, client):
+        bus = EventBus(client, min_batch_size=10, max_batch_size=40)
+
+        assert bus._next_batch_size(10, 10) == 20
+        assert bus._next_batch_size(40, 40) == 40
+        assert bus._next_batch_size(40, 25) == 40
+        assert bus._next_batch_size(40, 3) == 20
+        assert bus._next_batch_size(10, 0) == 10
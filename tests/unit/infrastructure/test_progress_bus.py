@@ -0,0 +1,159 @@
+"""Tests for the investigation progress bus."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.infrastructure.events import progress_bus
+from src.infrastructure.events.progress_bus import (
+    ANOMALY,
+    COMPLETION,
+    PROGRESS,
+    InvestigationProgressBus,
+)
+
+
+async def _collect(bus, investigation_id, **kwargs):
+    return [event async for event in bus.subscribe(investigation_id, **kwargs)]
+
+
+class TestInvestigationProgressBus:
+    """In-process progress bus."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_merges_updates(self):
+        """Test updates accumulate into a compact snapshot."""
+        bus = InvestigationProgressBus()
+
+        await bus.update("inv-1", user_id="u1", status="started", progress=0.0)
+        await bus.update("inv-1", status="running", progress=0.3)
+
+        snapshot = await bus.snapshot("inv-1")
+        assert snapshot["user_id"] == "u1"
+        assert (snapshot["status"], snapshot["progress"]) == ("running", 0.3)
+        assert await bus.snapshot("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_subscriber_receives_pushed_events(self):
+        """Test a waiting subscriber is woken by each publish and ends at completion."""
+        bus = InvestigationProgressBus()
+        await bus.update("inv-1", status="running", progress=0.1)
+        consumer = asyncio.create_task(_collect(bus, "inv-1"))
+        await asyncio.sleep(0)
+
+        await bus.publish_results("inv-1", [{"severity": "high"}])
+        await bus.update("inv-1", progress=0.9, anomalies_detected=1)
+        await bus.finish("inv-1", "completed", progress=1.0)
+
+        events = await asyncio.wait_for(consumer, timeout=1)
+        assert [e.type for e in events] == [PROGRESS, ANOMALY, PROGRESS, COMPLETION]
+        assert events[1].to_dict()["result"] == {"severity": "high"}
+        assert events[-1].data == {"status": "completed", "total_anomalies": 1}
+
+    @pytest.mark.asyncio
+    async def test_resume_from_offset(self):
+        """Test a reconnecting consumer only gets events after its last offset."""
+        bus = InvestigationProgressBus()
+        first = await bus.update("inv-1", status="running", progress=0.1)
+        await bus.update("inv-1", progress=0.5)
+        await bus.finish("inv-1", "failed", error="boom")
+
+        events = await _collect(bus, "inv-1", last_event_id=first)
+
+        assert [e.data.get("progress") for e in events] == [0.5, None]
+        assert events[-1].data["error"] == "boom"
+
+    @pytest.mark.asyncio
+    async def test_idle_subscribers_get_heartbeats(self):
+        """Test None is yielded while nothing is published."""
+        bus = InvestigationProgressBus()
+        await bus.update("inv-1", status="running")
+        stream = bus.subscribe("inv-1", idle_timeout=0.01)
+
+        assert (await anext(stream)).type == PROGRESS
+        assert await anext(stream) is None
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_finished_investigation_ends_subscription(self):
+        """Test resuming after the completion event returns immediately."""
+        bus = InvestigationProgressBus()
+        last = await bus.finish("inv-1", "completed")
+
+        assert await _collect(bus, "inv-1", last_event_id=last, idle_timeout=0.01) == []
+
+
+class RecordingRedis:
+    """Redis stand-in recording pipelined writes; ping fails while down."""
+
+    def __init__(self):
+        self.down = True
+        self.pings = 0
+        self.commands = []
+
+    async def ping(self):
+        self.pings += 1
+        if self.down:
+            raise ConnectionError("redis down")
+        return True
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: redis.commands.append(
+                    (name, args, kwargs)
+                )
+
+            async def execute(self, raise_on_error=True):
+                return []
+
+        return Pipeline()
+
+
+class TestGetProgressBus:
+    """Process-wide bus and its Redis reconnection."""
+
+    @pytest.mark.asyncio
+    async def test_local_bus_moves_to_redis_when_it_comes_back(self, monkeypatch):
+        """Test a failed ping is retried and buffered events are migrated."""
+        client = RecordingRedis()
+        event_bus = SimpleNamespace(redis=client, stream_prefix="cidadao")
+
+        async def get_event_bus():
+            return event_bus
+
+        monkeypatch.setattr(progress_bus, "get_event_bus", get_event_bus)
+        monkeypatch.setattr(progress_bus, "_progress_bus", None)
+        monkeypatch.setattr(progress_bus, "_redis_retry_at", 0.0)
+
+        bus = await progress_bus.get_progress_bus()
+        offset = await bus.update("inv-1", status="running")
+        assert not bus.distributed
+        assert await progress_bus.get_progress_bus() is bus
+        assert client.pings == 1  # within the retry interval
+
+        client.down = False
+        monkeypatch.setattr(progress_bus, "_redis_retry_at", 0.0)
+
+        assert await progress_bus.get_progress_bus() is bus
+        assert bus.distributed and bus.event_bus is event_bus
+        xadds = [c for c in client.commands if c[0] == "xadd"]
+        assert xadds[0][1][0] == "cidadao:investigation:inv-1"
+        assert xadds[0][2]["id"] == offset
+        assert ("set", ("cidadao:investigation:inv-1:snapshot",)) in [
+            (c[0], c[1][:1]) for c in client.commands
+        ]
+
+    def test_options_are_keyword_only(self):
+        """Test optional settings cannot be passed positionally."""
+        with pytest.raises(TypeError):
+            InvestigationProgressBus(None, "events")
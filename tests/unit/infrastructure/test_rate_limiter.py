@@ -1,8 +1,11 @@
 """Tests for rate limiter infrastructure."""
 
+import hashlib
+import time
 from datetime import datetime, timedelta
 
 import pytest
+from redis.exceptions import NoScriptError
 
 from src.infrastructure.rate_limiter import (
     RateLimitConfig,
@@ -298,3 +301,178 @@ class TestRateLimitStrategies:
             tier=RateLimitTier.FREE,
         )
         assert allowed is True
+
+
+class ScriptRedis:
+    """Redis stand-in that serves SLIDING_WINDOW_SCRIPT by SHA."""
+
+    WINDOWS = {1: "per_second", 60: "per_minute", 3600: "per_hour"}
+
+    def __init__(self):
+        self.scripts: dict[str, str] = {}
+        self.calls: list[tuple] = []
+        self.server = RateLimiter(use_redis=False)
+
+    async def script_load(self, source):
+        sha = hashlib.sha1(source.encode()).hexdigest()
+        self.scripts[sha] = source
+        return sha
+
+    async def evalsha(self, sha, numkeys, *keys_and_args):
+        if sha not in self.scripts:
+            raise NoScriptError("NOSCRIPT No matching script")
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        self.calls.append((keys, args))
+        now, debt, pairs = args[0], args[1], args[2:]
+        windows = tuple(
+            (self.WINDOWS[duration], limit)
+            for duration, limit in zip(pairs[::2], pairs[1::2], strict=True)
+        )
+        allowed, denied, remaining = self.server._local_sliding_windows(
+            keys[0], windows, now, debt
+        )
+        return [int(allowed), denied, *remaining]
+
+
+class TestSlidingWindowCounters:
+    """Tests for the multi-window sliding-window counter path."""
+
+    @pytest.fixture
+    def redis(self):
+        return ScriptRedis()
+
+    @pytest.fixture
+    def limiter(self, redis):
+        limiter = RateLimiter(strategy=RateLimitStrategy.SLIDING_WINDOW)
+
+        async def _get_redis():
+            return redis
+
+        limiter._get_redis = _get_redis
+        return limiter
+
+    @pytest.mark.asyncio
+    async def test_all_windows_checked_in_one_evalsha(self, limiter, redis):
+        await limiter._sliding_script.load(redis)
+        allowed, results = await limiter.check_rate_limit(
+            key="user:1",
+            endpoint="/api/test",
+            custom_limits={"per_second": 3, "per_minute": 5, "per_hour": 50},
+        )
+
+        assert allowed is True
+        assert len(redis.calls) == 1
+        keys, args = redis.calls[0]
+        assert keys == ("rate_limit:{user:1:/api/test}",)
+        assert args[1] == 0
+        assert set(results) == {"per_second", "per_minute", "per_hour", "per_day"}
+        assert results["per_second"]["remaining"] == 2
+
+    @pytest.mark.asyncio
+    async def test_script_reloaded_after_noscript(self, limiter, redis):
+        allowed, _ = await limiter._check_sliding_window("k", "per_minute", 10)
+
+        assert allowed is True
+        assert limiter._sliding_script.sha in redis.scripts
+        assert len(redis.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_denied_window_reported_and_not_charged(self, limiter, redis):
+        windows = (("per_minute", 2), ("per_hour", 100))
+        for _ in range(2):
+            assert (await limiter._check_sliding_windows("s", windows))[0]
+
+        allowed, results = await limiter._check_sliding_windows("s", windows)
+
+        assert allowed is False
+        assert results["per_minute"]["allowed"] is False
+        assert results["per_hour"]["allowed"] is True
+        # Only the two admitted requests were counted in the hour window
+        assert results["per_hour"]["remaining"] == 98
+
+    @pytest.mark.asyncio
+    async def test_near_cache_admits_locally_and_charges_later(self, limiter, redis):
+        windows = (("per_minute", 1000),)
+
+        await limiter._check_sliding_windows("s", windows)
+        budget = limiter._near_cache["s"].budget
+        assert budget == int(999 * 0.1)
+
+        for _ in range(budget):
+            allowed, _ = await limiter._check_sliding_windows("s", windows)
+            assert allowed is True
+        assert len(redis.calls) == 1
+        assert limiter.near_cache_hits == budget
+
+        # Budget spent: the next check goes to Redis carrying the local admits
+        allowed, results = await limiter._check_sliding_windows("s", windows)
+        assert allowed is True
+        assert len(redis.calls) == 2
+        assert redis.calls[1][1][1] == budget
+        assert results["per_minute"]["remaining"] == 1000 - budget - 2
+
+    @pytest.mark.asyncio
+    async def test_near_cache_skipped_close_to_limit(self, limiter, redis):
+        windows = (("per_minute", 100),)
+        for _ in range(60):
+            redis.server._local_sliding_windows("rate_limit:{s}", windows, time.time())
+
+        allowed, results = await limiter._check_sliding_windows("s", windows)
+
+        assert allowed is True
+        assert results["per_minute"]["remaining"] == 39
+        assert "s" not in limiter._near_cache
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back_to_local_counters(self, limiter):
+        class BrokenRedis:
+            async def evalsha(self, *args):
+                raise ConnectionError("down")
+
+        limiter._redis = BrokenRedis()
+        limiter._get_redis = RateLimiter._get_redis.__get__(limiter)
+
+        allowed, results = await limiter._check_sliding_windows(
+            "s", (("per_minute", 5),)
+        )
+
+        assert allowed is True
+        assert results["per_minute"]["remaining"] == 4
+        assert limiter._redis is None
+        assert limiter._redis_retry_at > 0
+
+
+class TestLocalSlidingWindowCounters:
+    """Tests for the in-process sliding-window counters."""
+
+    def test_previous_bucket_is_weighted_by_overlap(self):
+        limiter = RateLimiter(use_redis=False)
+        windows = (("per_minute", 10),)
+        for _ in range(8):
+            limiter._local_sliding_windows("s", windows, now=60.0)
+
+        # 30s into the next minute half of the previous bucket still counts
+        allowed, denied, remaining = limiter._local_sliding_windows(
+            "s", windows, now=150.0
+        )
+        assert (allowed, denied, remaining) == (True, 0, [5])
+
+        # Two minutes later nothing is left
+        assert limiter._local_sliding_windows("s", windows, now=300.0)[2] == [9]
+
+    def test_memory_is_constant_per_subject(self):
+        limiter = RateLimiter(use_redis=False)
+        for _ in range(1000):
+            limiter._local_sliding_windows("s", (("per_hour", 10_000),), now=5.0)
+
+        assert limiter._local_counters["s"] == {3600: [0.0, 1000, 0]}
+
+    def test_subjects_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(
+            "src.infrastructure.rate_limiter.LOCAL_MAX_KEYS", 3, raising=True
+        )
+        limiter = RateLimiter(use_redis=False)
+        for i in range(5):
+            limiter._local_sliding_windows(f"s{i}", (("per_minute", 10),), now=1.0)
+
+        assert list(limiter._local_counters) == ["s2", "s3", "s4"]
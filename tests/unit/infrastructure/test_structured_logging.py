@@ -0,0 +1,144 @@
+"""Tests for queued, sampled structured logging."""
+
+import json
+import logging
+import random
+import threading
+
+import pytest
+
+from src.infrastructure.observability.log_pipeline import (
+    LogPipeline,
+    render_line,
+    static_context,
+)
+from src.infrastructure.observability.structured_logging import (
+    LogEventType,
+    LogLevel,
+    LogSampler,
+    StructuredLogger,
+)
+
+
+class ListHandler(logging.Handler):
+    """Collects formatted lines and the threads that wrote them."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        super().__init__()
+        self.lines = []
+        self.threads = set()
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate:
+            self.gate.wait(5)
+        self.lines.append(record.getMessage())
+        self.threads.add(threading.get_ident())
+
+
+@pytest.fixture
+def stdlib_logger():
+    logger = logging.getLogger("tests.structured_logging")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = ListHandler()
+    logger.addHandler(handler)
+    yield logger, handler
+    logger.removeHandler(handler)
+
+
+def _logger(pipeline, **kwargs):
+    return StructuredLogger(
+        "tests.structured_logging", component="tests", pipeline=pipeline, **kwargs
+    )
+
+
+class TestLogPipeline:
+    """Queue, writer thread and serialization."""
+
+    def test_records_are_written_off_thread_with_static_context(self, stdlib_logger):
+        _, handler = stdlib_logger
+        pipeline = LogPipeline()
+        logger = _logger(pipeline)
+
+        logger.info("investigation started", investigation_id="inv-1")
+        assert pipeline.flush()
+        pipeline.close()
+
+        (line,) = handler.lines
+        record = json.loads(line)
+        assert record["message"] == "investigation started"
+        assert record["data"] == {"investigation_id": "inv-1"}
+        assert record["component"] == "tests"
+        assert record["logger"] == "tests.structured_logging"
+        assert threading.get_ident() not in handler.threads
+
+    def test_overflow_drops_and_counts(self, stdlib_logger):
+        _, handler = stdlib_logger
+        handler.gate = threading.Event()
+        pipeline = LogPipeline(capacity=2)
+        logger = _logger(pipeline)
+
+        logger.info("blocks the writer")
+        while pipeline._queue:  # Writer picked it up and waits on the gate
+            pass
+        results = [logger.info(f"queued {n}") for n in range(4)]
+        handler.gate.set()
+        pipeline.flush()
+        pipeline.close()
+
+        assert results == [None] * 4
+        assert pipeline.stats["dropped"] == 2
+        assert len(handler.lines) == 3
+
+    def test_disabled_levels_are_not_queued(self, stdlib_logger):
+        stdlib, _ = stdlib_logger
+        stdlib.setLevel(logging.INFO)
+        pipeline = LogPipeline()
+
+        _logger(pipeline).debug("noise")
+
+        assert pipeline.stats["enqueued"] == 0
+
+    def test_render_line_splices_static_context(self):
+        static = static_context(logger="a", component=None, process_id=7)
+
+        assert json.loads(render_line({"message": "m"}, static)) == {
+            "message": "m",
+            "logger": "a",
+            "process_id": 7,
+        }
+        assert json.loads(render_line({}, static)) == {"logger": "a", "process_id": 7}
+        assert render_line({"message": "m"}, "") == '{"message":"m"}'
+
+
+class TestLogSampler:
+    """Rate and tail sampling of high-volume event types."""
+
+    def test_failures_and_slow_operations_are_always_kept(self):
+        sampler = LogSampler({LogEventType.CACHE: 0.0}, slow_ms=100)
+
+        assert sampler.sample_rate(LogLevel.DEBUG, LogEventType.CACHE, 5) is None
+        assert sampler.sample_rate(LogLevel.DEBUG, LogEventType.CACHE, 150) == 1.0
+        assert sampler.sample_rate(LogLevel.ERROR, LogEventType.CACHE, 5) == 1.0
+        assert sampler.sample_rate(LogLevel.INFO, LogEventType.AGENT, 5) == 1.0
+        assert sampler.sampled_out == 1
+
+    def test_rate_sampling_annotates_kept_records(self, stdlib_logger):
+        _, handler = stdlib_logger
+        pipeline = LogPipeline()
+        logger = _logger(pipeline, sampler=LogSampler({LogEventType.DATABASE: 0.2}))
+        random.seed(3)
+
+        for _ in range(1000):
+            logger.log_database_operation("select", "contracts", duration_ms=2)
+        logger.log_database_operation("select", "contracts", 2, success=False)
+        pipeline.flush()
+        pipeline.close()
+
+        records = [json.loads(line) for line in handler.lines]
+        sampled = [r for r in records if r["level"] == "DEBUG"]
+        assert 150 < len(sampled) < 250
+        assert all(r["data"]["sample_rate"] == 0.2 for r in sampled)
+        assert records[-1]["level"] == "ERROR"
+        assert "sample_rate" not in records[-1].get("data", {})
@@ -0,0 +1,208 @@
+"""Tests for the fused request pipeline middleware."""
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.datastructures import State
+
+from src.api.middleware import request_pipeline
+from src.api.middleware.rate_limit import get_rate_limit_identity
+from src.api.middleware.request_pipeline import RequestPipelineMiddleware
+from src.infrastructure.rate_limiter import RateLimiter, RateLimitTier
+from src.services.api_key_cache import VerifiedAPIKey
+
+
+class TinyLimiter(RateLimiter):
+    """Local limiter allowing two requests per minute on every endpoint."""
+
+    def _get_limits(self, endpoint, tier, custom_limits):
+        return {"per_minute": 2}
+
+
+def _app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id}
+
+    @app.get("/api/v1/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    options.setdefault("limiter", RateLimiter(use_redis=False))
+    app.add_middleware(RequestPipelineMiddleware, **options)
+    return app
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = []
+
+    def record(method, path, status_code, duration, error=False, active_requests=0):
+        calls.append((method, path, status_code, error))
+
+    monkeypatch.setattr(request_pipeline, "record_request_metrics", record)
+    return calls
+
+
+@pytest.fixture
+def tracked(monkeypatch):
+    queries = []
+    monkeypatch.setattr(
+        request_pipeline.cache_warming_service, "track_query", queries.append
+    )
+    return queries
+
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(
+        transport=ASGITransport(app=app, raise_app_exceptions=False),
+        base_url="http://test",
+    )
+
+
+@pytest.mark.asyncio
+async def test_adds_correlation_and_timing_headers(recorded, tracked):
+    async with _client(_app()) as client:
+        response = await client.get(
+            "/api/v1/items/7", headers={"X-Request-ID": "req-1"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "req-1"
+    assert response.headers["X-Correlation-ID"]
+    assert float(response.headers["X-Process-Time"]) >= 0
+    assert response.headers["X-RateLimit-Window"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_use_route_template(recorded, tracked):
+    async with _client(_app()) as client:
+        await client.get("/api/v1/items/42")
+
+    assert recorded == [("GET", "/api/v1/items/{item_id}", 200, False)]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_denies_with_429(recorded, tracked):
+    async with _client(_app(limiter=TinyLimiter(use_redis=False))) as client:
+        statuses = [(await client.get("/api/v1/items/1")).status_code for _ in range(3)]
+        denied = await client.get("/api/v1/items/1")
+        health = await client.get("/health")
+
+    assert statuses == [200, 200, 429]
+    body = denied.json()
+    assert body["error"] == "RATE_LIMIT_EXCEEDED"
+    assert isinstance(body["limits"]["per_minute"]["reset"], int)
+    assert denied.headers["X-RateLimit-Remaining"] == "0"
+    assert health.status_code == 200
+    # Denied requests are still measured
+    assert recorded[2][2] == 429
+
+
+@pytest.mark.asyncio
+async def test_forwarded_client_ip_is_the_rate_limit_key(recorded, tracked):
+    # The test client connects from 127.0.0.1, trusted here as the proxy
+    app = _app(
+        limiter=TinyLimiter(use_redis=False),
+        trusted_proxies=["127.0.0.1", "172.16.0.0/12"],
+    )
+    async with _client(app) as client:
+        for ip in ("10.0.0.1", "10.0.0.1", "10.0.0.2"):
+            response = await client.get(
+                "/api/v1/items/1",
+                headers={"X-Forwarded-For": f"6.6.6.{ip[-1]}, {ip}, 172.16.0.1"},
+            )
+            assert response.status_code == 200
+        denied = await client.get(
+            "/api/v1/items/1", headers={"X-Forwarded-For": "9.9.9.9, 10.0.0.1"}
+        )
+
+    # Hops left of the rightmost untrusted one are client-supplied
+    assert denied.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_spoofed_forwarded_for_does_not_reset_the_limit(recorded, tracked):
+    app = _app(limiter=TinyLimiter(use_redis=False), trusted_proxies=[])
+    async with _client(app) as client:
+        statuses = [
+            (
+                await client.get(
+                    "/api/v1/items/1",
+                    headers={
+                        "X-Forwarded-For": f"10.0.0.{i}",
+                        "X-Real-IP": f"10.1.{i}",
+                    },
+                )
+            ).status_code
+            for i in range(3)
+        ]
+
+    assert statuses == [200, 200, 429]
+
+
+@pytest.mark.asyncio
+async def test_stages_can_be_disabled(recorded, tracked):
+    app = _app(correlation=False, metrics=False, rate_limit=False)
+    async with _client(app) as client:
+        response = await client.get("/api/v1/items/1")
+
+    assert "X-Correlation-ID" not in response.headers
+    assert "X-RateLimit-Limit" not in response.headers
+    assert response.headers["X-Request-ID"]
+    assert recorded == []
+
+
+@pytest.mark.asyncio
+async def test_app_errors_are_recorded_and_reraised(recorded, tracked):
+    async with _client(_app()) as client:
+        response = await client.get("/api/v1/boom")
+
+    assert response.status_code == 500
+    assert recorded == [("GET", "/api/v1/boom", 500, True)]
+    assert tracked == []
+
+
+@pytest.mark.asyncio
+async def test_tracked_queries_include_path_params(recorded, tracked):
+    app = _app(tracked_paths=["/api/v1/items"])
+    async with _client(app) as client:
+        await client.get("/api/v1/items/5?year=2024&q=")
+        await client.get("/health")
+
+    assert len(tracked) == 1
+    assert tracked[0]["query_params"] == {"year": "2024", "q": ""}
+    assert tracked[0]["path_params"] == {"item_id": "5"}
+    assert tracked[0]["hash"]
+
+
+def _verified_key(tier="pro", **limits):
+    return VerifiedAPIKey(
+        id="key-1",
+        name="partner",
+        client_id="client-1",
+        status="active",
+        tier=tier,
+        expires_at=None,
+        allowed_ips=frozenset(),
+        allowed_origins=frozenset(),
+        scopes=frozenset(),
+        rate_limits=tuple(limits.items()),
+        version="v1",
+    )
+
+
+def test_verified_api_key_gets_its_own_tier_and_limits():
+    state = State({"api_key": _verified_key("pro", per_minute=60, per_hour=None)})
+
+    key, tier, limits = get_rate_limit_identity(state, "10.0.0.1", RateLimitTier.FREE)
+
+    assert key == "api_key:key-1"
+    assert tier == RateLimitTier.PRO
+    assert limits == {"per_minute": 60}
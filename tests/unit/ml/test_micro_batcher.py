@@ -0,0 +1,109 @@
+"""
+Tests for dynamic micro-batching of inference requests.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.ml.micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    """Batch function stand-in that records the batches it receives."""
+
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        self.threads.add(threading.get_ident())
+        return [item * 2 for item in items]
+
+
+class TestMicroBatcher:
+    """Collection, dispatch and scatter of batched requests."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self):
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=16, max_wait_ms=20)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+        assert results == [i * 2 for i in range(10)]
+        assert model.batches == [list(range(10))]
+        assert threading.get_ident() not in model.threads
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped(self):
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=20)
+
+        results = await batcher.submit_many(range(10))
+
+        assert results == [i * 2 for i in range(10)]
+        assert [len(batch) for batch in model.batches] == [4, 4, 2]
+        assert batcher.stats == {"batches": 3, "items": 10, "max_batch": 4}
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_lone_request_waits_at_most_max_wait(self):
+        batcher = MicroBatcher(RecordingModel(), max_wait_ms=10)
+
+        result = await asyncio.wait_for(batcher.submit(21), timeout=1)
+
+        assert result == 42
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_item_error_fails_only_that_request(self):
+        def process(items):
+            return [ValueError("bad") if item < 0 else item for item in items]
+
+        batcher = MicroBatcher(process, max_wait_ms=20)
+
+        results = await asyncio.gather(
+            batcher.submit(1), batcher.submit(-1), return_exceptions=True
+        )
+
+        assert results[0] == 1
+        assert isinstance(results[1], ValueError)
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_error_fails_all_and_worker_survives(self):
+        calls = 0
+
+        def process(items):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("out of memory")
+            return items
+
+        batcher = MicroBatcher(process, max_wait_ms=20)
+
+        results = await asyncio.gather(
+            batcher.submit(1), batcher.submit(2), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await batcher.submit(3) == 3
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_is_skipped(self):
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_wait_ms=50)
+
+        cancelled = asyncio.ensure_future(batcher.submit(1))
+        kept = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        assert await kept == 4
+        assert model.batches == [[2]]
+        await batcher.close()
@@ -0,0 +1,195 @@
+"""
+Unit tests for the payment graph cycle engine.
+
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from src.ml.payment_graph import PaymentGraph
+
+
+def _tx(payer, recipient, amount=1000.0, date="2025-01-01"):
+    return {
+        "payer_id": payer,
+        "recipient_id": recipient,
+        "amount": amount,
+        "date": date,
+    }
+
+
+def _brute_force_cycles(edges, max_length):
+    """Canonical simple cycles by checking every node permutation."""
+    nodes = sorted({n for e in edges for n in e})
+    found = set()
+    for k in range(2, max_length + 1):
+        for combo in itertools.permutations(nodes, k):
+            if combo[0] != min(combo):
+                continue
+            if all((combo[i], combo[(i + 1) % k]) in edges for i in range(k)):
+                found.add(combo)
+    return found
+
+
+class TestPaymentGraph:
+    """Graph construction and SCC pruning."""
+
+    def test_parallel_transfers_collapse_into_one_edge(self):
+        """Test repeated payments between a pair share an edge."""
+        graph = PaymentGraph.from_transactions(
+            [_tx("A", "B"), _tx("A", "B", date="2025-02-01"), _tx("B", "A")]
+        )
+
+        assert graph.n_nodes == 2
+        assert graph.n_edges == 2
+        assert list(np.diff(graph.edge_ptr)) == [2, 1]
+
+    def test_acyclic_regions_are_pruned(self):
+        """Test only strongly connected parts are searched."""
+        graph = PaymentGraph.from_transactions(
+            [_tx("A", "B"), _tx("B", "C"), _tx("C", "A"), _tx("C", "D"), _tx("D", "E")]
+        )
+
+        components = graph.strongly_connected_components()
+
+        assert len(components) == 1
+        assert {graph.ids[i] for i in components[0]} == {"A", "B", "C"}
+
+
+class TestCycleEnumeration:
+    """Bounded simple-cycle search."""
+
+    def test_each_cycle_reported_once(self):
+        """Test rotations of the same cycle are deduplicated."""
+        graph = PaymentGraph.from_transactions(
+            [_tx("A", "B"), _tx("B", "C"), _tx("C", "A")]
+        )
+
+        cycles = graph.find_cycles(min_length=3)
+
+        assert len(cycles) == 1
+        assert cycles[0].path == ["A", "B", "C", "A"]
+
+    def test_matches_brute_force(self):
+        """Test enumeration equals an exhaustive search on a random graph."""
+        rng = np.random.default_rng(4)
+        edges = {
+            (f"N{a}", f"N{b}") for a, b in rng.integers(0, 9, size=(30, 2)) if a != b
+        }
+        graph = PaymentGraph.from_transactions([_tx(a, b) for a, b in edges])
+
+        found = {c.nodes for c in graph.find_cycles(max_length=5)}
+
+        assert found == _brute_force_cycles(edges, 5)
+
+    def test_length_bounds(self):
+        """Test cycles longer than max_length are not enumerated."""
+        ring = [_tx(f"E{i}", f"E{(i + 1) % 8}") for i in range(8)]
+        graph = PaymentGraph.from_transactions(ring)
+
+        assert graph.find_cycles(max_length=7) == []
+        assert len(graph.find_cycles(max_length=8)) == 1
+
+    def test_visit_budget_bounds_dense_components(self):
+        """Test a dense component is abandoned once the visit budget is spent."""
+        nodes = [f"E{i}" for i in range(30)]
+        graph = PaymentGraph.from_transactions(
+            [_tx(a, b) for a in nodes for b in nodes if a != b]
+        )
+
+        start = time.perf_counter()
+        cycles = graph.find_cycles(
+            min_length=10, max_length=10, max_cycles=10**9, max_visits=20_000
+        )
+
+        assert time.perf_counter() - start < 5
+        assert all(c.length == 10 for c in cycles)
+        assert len(cycles) < 20_000
+
+
+class TestTemporalFlow:
+    """Time-ordered chains and flow scoring."""
+
+    def test_hops_must_follow_in_time(self):
+        """Test a cycle whose transfers go backwards in time is discarded."""
+        ordered = [
+            _tx("A", "B", date="2025-01-01"),
+            _tx("B", "C", date="2025-01-05"),
+            _tx("C", "A", date="2025-01-09"),
+        ]
+        reversed_dates = [
+            _tx("A", "B", date="2025-01-09"),
+            _tx("B", "C", date="2025-01-05"),
+            _tx("C", "A", date="2025-01-01"),
+        ]
+
+        assert len(PaymentGraph.from_transactions(ordered).find_cycles(window_days=30))
+        # Every rotation reaches a hop dated before the previous one
+        assert (
+            PaymentGraph.from_transactions(reversed_dates).find_cycles(window_days=30)
+            == []
+        )
+
+    def test_window_between_hops(self):
+        """Test hops further apart than the window break the chain."""
+        graph = PaymentGraph.from_transactions(
+            [
+                _tx("A", "B", date="2025-01-01"),
+                _tx("B", "C", date="2025-06-01"),
+                _tx("C", "A", date="2025-06-02"),
+            ]
+        )
+
+        assert graph.find_cycles(window_days=30) == []
+        assert len(graph.find_cycles(window_days=200)) == 1
+
+    def test_flow_scoring(self):
+        """Test cycles are ranked by bottleneck flow times retention."""
+        graph = PaymentGraph.from_transactions(
+            [
+                _tx("A", "B", 100_000, "2025-01-01"),
+                _tx("B", "C", 95_000, "2025-01-02"),
+                _tx("C", "A", 90_000, "2025-01-03"),
+                _tx("X", "Y", 5_000, "2025-01-01"),
+                _tx("Y", "Z", 5_000, "2025-01-02"),
+                _tx("Z", "X", 1_000, "2025-01-03"),
+            ]
+        )
+
+        top, low = graph.find_cycles(window_days=30)
+
+        assert top.nodes == ("A", "B", "C")
+        assert top.flow == 90_000
+        assert top.retention == pytest.approx(0.9)
+        assert top.span_days == 2
+        assert top.iso_dates == ["2025-01-01", "2025-01-02", "2025-01-03"]
+        assert low.score < top.score
+
+    def test_production_scale(self):
+        """Test a few hundred thousand transfers are screened quickly."""
+        rng = np.random.default_rng(0)
+        n, m = 20_000, 200_000
+        transactions = [
+            _tx(f"E{a}", f"E{b}", float(x), f"2024-{1 + d % 12:02d}-{1 + d % 28:02d}")
+            for a, b, x, d in zip(
+                rng.integers(n, size=m),
+                rng.integers(n, size=m),
+                rng.uniform(1e3, 1e5, m),
+                rng.integers(0, 400, m),
+                strict=True,
+            )
+        ]
+
+        start = time.perf_counter()
+        graph = PaymentGraph.from_transactions(transactions)
+        cycles = graph.find_cycles(min_length=3, max_length=4, window_days=30)
+        elapsed = time.perf_counter() - start
+
+        assert all(3 <= c.length <= 4 for c in cycles)
+        assert elapsed < 30
@@ -0,0 +1,210 @@
+"""
+Unit tests for the sparse spatial statistics engine.
+
+Author: Anderson H. Silva
+Date: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.ml.spatial_statistics import (
+    BRAZIL_STATE_NEIGHBORS,
+    SpatialStatisticsEngine,
+    contiguity_weights,
+    getis_ord_gi_star,
+    knn_weights,
+    local_morans_i,
+    morans_i,
+    polygon_contiguity_weights,
+)
+
+
+def _dense_morans_i(x, w):
+    """Reference Moran's I with a dense row-standardized matrix."""
+    w = w / np.maximum(w.sum(axis=1, keepdims=True), 1)
+    z = x - x.mean()
+    return len(x) / w.sum() * (z @ w @ z) / (z @ z)
+
+
+def _grid(size):
+    """GeoJSON unit squares on a size x size grid, ids "row-col"."""
+    ids, geometries = [], []
+    for row in range(size):
+        for col in range(size):
+            ids.append(f"{row}-{col}")
+            ring = [
+                [col, row],
+                [col + 1, row],
+                [col + 1, row + 1],
+                [col, row + 1],
+                [col, row],
+            ]
+            geometries.append({"type": "Polygon", "coordinates": [ring]})
+    return ids, geometries
+
+
+@pytest.fixture
+def line_weights():
+    """Five areas on a line: a-b-c-d-e."""
+    ids = ["a", "b", "c", "d", "e"]
+    return contiguity_weights(ids, {"a": ["b"], "b": ["c"], "c": ["d"], "d": ["e"]})
+
+
+class TestWeights:
+    """Weight construction."""
+
+    def test_state_contiguity_is_symmetric(self):
+        """Test the state adjacency table builds a symmetric binary matrix."""
+        weights = SpatialStatisticsEngine().state_weights()
+
+        assert weights.n == 27
+        assert (weights.matrix != weights.matrix.T).nnz == 0
+        assert set(weights.matrix.data) == {1.0}
+        assert weights.cardinalities.min() >= 1
+        sp = weights.index_of("SP")
+        neighbors = {weights.ids[j] for j in weights.matrix[sp].indices}
+        assert neighbors == set(BRAZIL_STATE_NEIGHBORS["SP"])
+
+    def test_knn_excludes_self(self):
+        """Test k-NN weights have exactly k neighbours and no self-loops."""
+        rng = np.random.default_rng(0)
+        coords = np.column_stack((rng.uniform(-30, 0, 50), rng.uniform(-70, -40, 50)))
+        weights = knn_weights([str(i) for i in range(50)], coords, k=4)
+
+        assert np.all(weights.cardinalities == 4)
+        assert weights.matrix.diagonal().sum() == 0
+
+    def test_engine_caches_weights(self):
+        """Test identical inputs reuse the cached matrix."""
+        engine = SpatialStatisticsEngine(max_cached_weights=1)
+        coords = [(0.0, 0.0), (0.0, 1.0), (1.0, 0.0), (1.0, 1.0)]
+
+        first = engine.knn(["a", "b", "c", "d"], coords, k=2)
+
+        assert engine.knn(["a", "b", "c", "d"], coords, k=2) is first
+        engine.knn(["a", "b", "c", "d"], coords, k=3)
+        assert engine.knn(["a", "b", "c", "d"], coords, k=2) is not first
+
+    def test_polygon_queen_and_rook_contiguity(self):
+        """Test mesh contiguity: corners count for queen, shared edges for rook."""
+        ids, geometries = _grid(3)
+
+        queen = polygon_contiguity_weights(ids, geometries)
+        rook = polygon_contiguity_weights(ids, geometries, rook=True)
+
+        assert queen.cardinalities.tolist() == [3, 5, 3, 5, 8, 5, 3, 5, 3]
+        assert rook.cardinalities.tolist() == [2, 3, 2, 3, 4, 3, 2, 3, 2]
+        assert (queen.matrix != queen.matrix.T).nnz == 0
+        assert queen.matrix.diagonal().sum() == 0
+
+    def test_weight_cache_is_thread_safe(self):
+        """Test concurrent builds of the same weights share one cached matrix."""
+        engine = SpatialStatisticsEngine(max_cached_weights=2)
+        ids, geometries = _grid(20)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            built = list(
+                pool.map(
+                    lambda _: engine.polygons(ids, geometries, cache_key="grid"),
+                    range(32),
+                )
+            )
+
+        assert all(weights is built[0] for weights in built)
+        assert len(engine._weights_cache) == 1
+
+
+class TestStatistics:
+    """Statistic values and inference."""
+
+    def test_morans_i_matches_dense_reference(self, line_weights):
+        """Test sparse global Moran's I equals the dense formula."""
+        x = np.array([1.0, 2.0, 3.0, 4.0, 10.0])
+        result = morans_i(x, line_weights, permutations=0)
+
+        dense = line_weights.matrix.toarray()
+        assert result["I"] == pytest.approx(_dense_morans_i(x, dense))
+        assert result["expected_i"] == pytest.approx(-0.25)
+
+    def test_morans_i_detects_clustering(self):
+        """Test a smooth gradient is positively autocorrelated."""
+        rng = np.random.default_rng(1)
+        coords = rng.uniform(0, 10, size=(300, 2))
+        weights = knn_weights([str(i) for i in range(300)], coords, k=6)
+        values = coords[:, 0] + rng.normal(scale=0.5, size=300)
+
+        result = morans_i(values, weights, permutations=99, seed=3)
+
+        assert result["I"] > 0.5
+        assert result["p_value"] < 0.01
+        assert result["p_sim"] == pytest.approx(0.01)
+
+    def test_gi_star_flags_hot_and_cold_ends(self, line_weights):
+        """Test Gi* is positive around high values and negative around low ones."""
+        x = np.array([1.0, 1.0, 5.0, 9.0, 9.0])
+        z = getis_ord_gi_star(x, line_weights)["z"]
+
+        assert z[4] > 0 > z[0]
+        assert np.argmax(z) in (3, 4)
+
+    def test_local_morans_quadrants(self, line_weights):
+        """Test LISA quadrant labels follow value and lag signs."""
+        x = np.array([1.0, 1.0, 5.0, 9.0, 9.0])
+        lisa = local_morans_i(x, line_weights, permutations=99, seed=0)
+
+        assert lisa["quadrant"][0] == 3  # Low-Low
+        assert lisa["quadrant"][4] == 1  # High-High
+        assert np.all((lisa["p_sim"] > 0) & (lisa["p_sim"] <= 0.5 + 1e-9))
+
+    def test_small_inputs_draw_neighbours_without_replacement(self):
+        """Test exact conditional randomization when n is small."""
+        triangle = contiguity_weights(["a", "b", "c"], {"a": ["b", "c"], "b": ["c"]})
+
+        lisa = local_morans_i(np.array([0.0, 3.0, 6.0]), triangle, permutations=99)
+
+        # Each area's only possible neighbour set is the other two areas, so
+        # every permutation reproduces the observed statistic
+        assert np.allclose(lisa["p_sim"], 1 / 100)
+
+    def test_constant_values_are_not_significant(self, line_weights):
+        """Test degenerate input returns neutral statistics."""
+        x = np.full(5, 3.0)
+
+        assert morans_i(x, line_weights)["p_value"] == 1.0
+        assert np.all(local_morans_i(x, line_weights)["p_sim"] == 1.0)
+
+    def test_analyze_rejects_misaligned_values(self, line_weights):
+        """Test values must match the weights' areas."""
+        with pytest.raises(ValueError):
+            SpatialStatisticsEngine().analyze([1.0, 2.0], line_weights)
+
+    def test_connected_clusters(self, line_weights):
+        """Test significant areas are split into contiguous groups."""
+        members = np.array([True, True, False, True, False])
+
+        groups = SpatialStatisticsEngine.connected_clusters(line_weights, members)
+
+        assert sorted(groups) == [["a", "b"], ["d"]]
+
+    def test_municipality_scale_is_fast(self):
+        """Test 5,570 areas with permutation inference stays interactive."""
+        rng = np.random.default_rng(2)
+        coords = np.column_stack(
+            (rng.uniform(-33, 5, 5570), rng.uniform(-73, -35, 5570))
+        )
+        values = coords[:, 0] + rng.normal(size=5570)
+        engine = SpatialStatisticsEngine()
+
+        start = time.perf_counter()
+        weights = engine.knn([str(i) for i in range(5570)], coords, k=6)
+        result = engine.analyze(values, weights, permutations=99, seed=1)
+        elapsed = time.perf_counter() - start
+
+        assert len(result["areas"]) == 5570
+        assert result["global"]["I"] > 0
+        assert elapsed < 10
@@ -0,0 +1,231 @@
+"""
+Unit tests for the columnar aggregation cube.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.services.aggregation_cube import AggregationCube, normalize_record
+
+
+def _records(n, seed=0, offset=0):
+    rng = np.random.default_rng(seed)
+    ufs = ["SP", "RJ", "MG", "BA", "RS"]
+    categories = ["Obras", "Saúde", "TI"]
+    return [
+        {
+            "id": offset + i,
+            "orgao": {"nome": f"Órgão {i % 7}"},
+            "fornecedor": {"nome": f"Fornecedor {i % 11}"},
+            "categoria": categories[i % 3],
+            "uf": ufs[int(rng.integers(5))],
+            "dataAssinatura": f"2024-{1 + i % 12:02d}-15",
+            "valorInicial": float(rng.uniform(100, 10_000)),
+        }
+        for i in range(n)
+    ]
+
+
+def _naive_group(records, dims):
+    groups = {}
+    for record in records:
+        key_dims, value = normalize_record(record)
+        key = tuple(key_dims[d] for d in dims)
+        groups.setdefault(key, []).append(value)
+    return groups
+
+
+class TestNormalization:
+    """Record field extraction."""
+
+    def test_portal_fields(self):
+        """Test Portal da Transparência keys and BR dates are understood."""
+        dims, value = normalize_record(
+            {
+                "orgao": {"nome": "Ministério da Saúde"},
+                "fornecedor": {"nome": "ACME"},
+                "modalidade": "Pregão",
+                "region": "SP",
+                "dataAssinatura": "15/03/2024",
+                "valorInicial": "1500.5",
+            }
+        )
+
+        assert dims["org"] == "Ministério da Saúde"
+        assert dims["uf"] == "SP"
+        assert dims["region"] == "Sudeste"
+        assert dims["month"] == "2024-03"
+        assert value == pytest.approx(1500.5)
+
+
+class TestAggregationCube:
+    """Group-bys, rollups and incremental ingest."""
+
+    @pytest.mark.parametrize("dims", [("uf",), ("category", "region"), ("org",)])
+    def test_query_matches_naive_group_by(self, dims):
+        """Test vectorized group-by equals a plain Python aggregation."""
+        records = _records(500)
+        cube = AggregationCube()
+        cube.ingest(records)
+
+        rows = {tuple(r[d] for d in dims): r for r in cube.query(dims)}
+        expected = _naive_group(records, dims)
+
+        assert rows.keys() == expected.keys()
+        for key, values in expected.items():
+            assert rows[key]["count"] == len(values)
+            assert rows[key]["sum"] == pytest.approx(sum(values))
+            assert rows[key]["min"] == pytest.approx(min(values))
+            assert rows[key]["max"] == pytest.approx(max(values))
+
+    def test_incremental_rollups_equal_rebuild(self):
+        """Test merging batches gives the same slices as one ingest."""
+        first, second = _records(300, seed=1), _records(300, seed=2, offset=300)
+        incremental = AggregationCube()
+        incremental.ingest(first)
+        incremental.ingest(second)
+        rebuilt = AggregationCube()
+        rebuilt.ingest(first + second)
+
+        for dims in (("uf", "month"), ("category",), ()):
+            merged = {tuple(r[d] for d in dims): r for r in incremental.query(dims)}
+            full = {tuple(r[d] for d in dims): r for r in rebuilt.query(dims)}
+
+            assert merged.keys() == full.keys()
+            for key, row in full.items():
+                assert merged[key]["count"] == row["count"]
+                assert merged[key]["sum"] == pytest.approx(row["sum"])
+                assert merged[key]["min"] == row["min"]
+                assert merged[key]["max"] == row["max"]
+
+    def test_reingest_skips_seen_ids(self):
+        """Test re-fetching the same contracts does not double count."""
+        records = _records(50)
+        cube = AggregationCube()
+
+        assert cube.ingest(records) == 50
+        assert cube.ingest(records) == 0
+        assert cube.query()[0]["count"] == 50
+
+    def test_require_id_skips_anonymous_records(self):
+        """Test feeds can refuse records that cannot be deduplicated."""
+        cube = AggregationCube()
+
+        assert cube.ingest([{"valor": 10.0}], require_id=True) == 0
+        assert cube.ingest([{"valor": 10.0}]) == 1
+
+    def test_filters_and_unmaterialized_dimensions(self):
+        """Test filtered queries and raw scans for dimension sets without rollup."""
+        records = _records(400)
+        cube = AggregationCube()
+        cube.ingest(records)
+
+        rows = cube.query(["supplier", "uf"], filters={"uf": "SP"})
+        expected = {
+            k: v
+            for k, v in _naive_group(records, ("supplier", "uf")).items()
+            if k[1] == "SP"
+        }
+
+        assert {(r["supplier"], r["uf"]) for r in rows} == expected.keys()
+        assert sum(r["count"] for r in rows) == sum(map(len, expected.values()))
+        assert cube.query(["uf"], filters={"uf": "XX"}) == []
+
+    def test_order_and_limit(self):
+        """Test results are sorted by the measure and truncated."""
+        cube = AggregationCube()
+        cube.ingest(_records(200))
+
+        rows = cube.query(["uf"], order_by="sum", limit=3)
+
+        assert len(rows) == 3
+        assert rows[0]["sum"] >= rows[1]["sum"] >= rows[2]["sum"]
+
+    def test_query_cache_invalidated_on_ingest(self):
+        """Test cached results are refreshed after new data arrives."""
+        cube = AggregationCube()
+        cube.ingest(_records(10))
+        before = cube.query(["category"])
+
+        cube.ingest(_records(10, offset=10))
+
+        assert cube.query(["category"]) != before
+
+    def test_query_returns_copies(self):
+        """Test mutating a result does not corrupt the memoized rows."""
+        cube = AggregationCube()
+        cube.ingest(_records(20))
+
+        cube.query(["uf"])[0]["sum"] = -1.0
+        cube.query(["uf"]).clear()
+
+        assert all(row["sum"] > 0 for row in cube.query(["uf"]))
+
+    def test_max_rows_evicts_oldest(self):
+        """Test a bounded cube keeps the newest rows and forgets old ids."""
+        cube = AggregationCube(max_rows=100)
+        cube.ingest(_records(80))
+        cube.ingest(_records(80, offset=80))
+
+        newest = (_records(80) + _records(80, offset=80))[-cube.row_count :]
+        expected = _naive_group(newest, ("uf",))
+        rows = {r["uf"]: r for r in cube.query(["uf"])}
+
+        assert cube.row_count == 90
+        assert {k[0]: len(v) for k, v in expected.items()} == {
+            uf: row["count"] for uf, row in rows.items()
+        }
+        assert len(cube._seen_ids) == 90
+        # Evicted contracts can be ingested again
+        assert cube.ingest(_records(1)) == 1
+
+    def test_max_age_expires_rows(self, monkeypatch):
+        """Test rows older than the TTL are dropped on the next ingest."""
+        clock = [1000.0]
+        monkeypatch.setattr("src.services.aggregation_cube.time.time", lambda: clock[0])
+        cube = AggregationCube(max_age_seconds=60)
+        cube.ingest(_records(30))
+        clock[0] += 120
+        cube.ingest(_records(5, offset=30))
+
+        assert cube.row_count == 5
+        assert cube.query()[0]["count"] == 5
+        assert len(cube.dictionaries["org"]) == 5
+
+    def test_unknown_dimension_rejected(self):
+        """Test invalid dimensions and measures raise ValueError."""
+        cube = AggregationCube()
+
+        with pytest.raises(ValueError):
+            cube.query(["color"])
+        with pytest.raises(ValueError):
+            cube.query(["uf"], order_by="median")
+
+
+class TestOrchestratorFeed:
+    """Contracts fetched by the orchestrator reach the cube."""
+
+    @pytest.mark.asyncio
+    async def test_ingest_runs_in_background(self, monkeypatch):
+        from src.services import transparency_orchestrator
+
+        cube = AggregationCube()
+        monkeypatch.setattr(
+            transparency_orchestrator, "get_aggregation_cube", lambda: cube
+        )
+        orchestrator = transparency_orchestrator.TransparencyOrchestrator()
+
+        async def fetch(sources, data_type, filters):
+            return {"data": _records(20), "sources": ["portal_federal"], "metadata": {}}
+
+        monkeypatch.setattr(orchestrator, "_execute_fallback", fetch)
+
+        result = await orchestrator.get_contracts()
+        assert len(result["data"]) == 20
+        assert orchestrator._ingest_tasks
+
+        await asyncio.gather(*orchestrator._ingest_tasks)
+        assert cube.row_count == 20
+        assert not orchestrator._ingest_tasks
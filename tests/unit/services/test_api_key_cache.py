@@ -0,0 +1,208 @@
+"""
+Unit tests for the verified API key cache and usage accounting.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.core.exceptions import AuthenticationError
+from src.models.api_key import APIKey, APIKeyStatus
+from src.services.api_key_cache import (
+    APIKeyUsageAccumulator,
+    VerifiedAPIKey,
+    VerifiedKeyCache,
+)
+from src.services.api_key_service import APIKeyService
+
+
+class FakeSharedCache:
+    """Dict-backed stand-in for the shared cache service."""
+
+    def __init__(self):
+        self.values = {}
+        self.reads = 0
+
+    async def get(self, key):
+        self.reads += 1
+        return self.values.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.values[key] = value
+        return True
+
+
+def _api_key(**overrides):
+    fields = {
+        "id": "key-1",
+        "name": "Test",
+        "key_prefix": "cid",
+        "key_hash": APIKey.hash_key("cid_secret"),
+        "client_id": "client",
+        "status": APIKeyStatus.ACTIVE,
+        "tier": "free",
+        "allowed_ips": ["10.0.0.1"],
+        "allowed_origins": [],
+        "scopes": ["read"],
+        "total_requests": 0,
+        "total_errors": 0,
+    }
+    fields.update(overrides)
+    return APIKey(**fields)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(APIKey.metadata.create_all, tables=[APIKey.__table__])
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as db:
+        db.add(_api_key())
+        await db.commit()
+
+    @asynccontextmanager
+    async def open_session():
+        async with factory() as db:
+            yield db
+            await db.commit()
+
+    yield open_session
+    await engine.dispose()
+
+
+class TestVerifiedAPIKey:
+    """Immutable key policy."""
+
+    def test_policy_matches_model_checks(self):
+        """Test the policy answers like the ORM model."""
+        policy = VerifiedAPIKey.from_model(_api_key(), "0")
+
+        assert policy.is_active
+        assert policy.check_ip_allowed("10.0.0.1")
+        assert not policy.check_ip_allowed("10.0.0.2")
+        assert policy.check_origin_allowed("https://any.example")
+        assert not policy.check_scope_allowed("write")
+        assert policy.get_rate_limits() == _api_key().get_rate_limits()
+
+    def test_expired_key_is_inactive(self):
+        """Test naive expiry timestamps from the database are handled."""
+        expired = _api_key(expires_at=datetime.now() - timedelta(days=1))
+
+        assert not VerifiedAPIKey.from_model(expired, "0").is_active
+
+
+class TestVerifiedKeyCache:
+    """Version-checked policy cache."""
+
+    @pytest.mark.asyncio
+    async def test_fresh_entries_need_no_io(self):
+        """Test hits inside the revalidation window skip the shared store."""
+        shared = FakeSharedCache()
+        cache = VerifiedKeyCache(shared_cache=shared, revalidate_seconds=60)
+        await cache.put("hash", _api_key())
+        reads = shared.reads
+
+        for _ in range(100):
+            assert (await cache.get("hash")).id == "key-1"
+
+        assert shared.reads == reads
+        assert cache.hits == 100
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self):
+        """Test a version bump from another process evicts the policy."""
+        shared = FakeSharedCache()
+        here = VerifiedKeyCache(shared_cache=shared, revalidate_seconds=0)
+        elsewhere = VerifiedKeyCache(shared_cache=shared)
+        await here.put("hash", _api_key())
+
+        await elsewhere.invalidate("key-1")
+
+        assert await here.get("hash") is None
+
+    @pytest.mark.asyncio
+    async def test_unavailable_shared_store_falls_back_to_ttl(self):
+        """Test a failing shared store does not break validation."""
+
+        class Broken:
+            async def get(self, key):
+                raise ConnectionError("down")
+
+        cache = VerifiedKeyCache(shared_cache=Broken(), revalidate_seconds=0)
+        await cache.put("hash", _api_key())
+
+        assert (await cache.get("hash")).id == "key-1"
+
+
+class TestValidateAPIKey:
+    """Service hot path and bulk usage flush."""
+
+    @pytest.mark.asyncio
+    async def test_validation_uses_cache_and_batches_usage(self, session_factory):
+        """Test repeated validations hit the database once and flush counters."""
+        usage = APIKeyUsageAccumulator(session_factory=session_factory)
+        async with session_factory() as db:
+            service = APIKeyService(db)
+            service.key_cache = VerifiedKeyCache(shared_cache=FakeSharedCache())
+            service.usage = usage
+            statements = []
+            original_execute = db.execute
+
+            async def counting_execute(*args, **kwargs):
+                statements.append(args[0])
+                return await original_execute(*args, **kwargs)
+
+            db.execute = counting_execute
+
+            for _ in range(5):
+                policy = await service.validate_api_key(
+                    "cid_secret", ip="10.0.0.1", scope="read"
+                )
+            with pytest.raises(AuthenticationError):
+                await service.validate_api_key("cid_secret", scope="write")
+            with pytest.raises(AuthenticationError):
+                await service.validate_api_key("cid_unknown")
+
+        assert policy.id == "key-1"
+        assert len(statements) == 2  # first lookup and the unknown key
+        assert usage.pending("key-1") == (5, 0)
+
+        usage.record("key-1", error=True)
+        assert await usage.flush() == 1
+        async with session_factory() as db:
+            row = (await db.execute(select(APIKey))).scalar_one()
+        assert (row.total_requests, row.total_errors) == (5, 1)
+        assert row.last_used_at is not None
+        assert usage.pending("key-1") == (0, 0)
+        await usage.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_counts(self):
+        """Test counters survive a database error."""
+
+        @asynccontextmanager
+        async def broken():
+            raise ConnectionError("db down")
+            yield
+
+        usage = APIKeyUsageAccumulator(session_factory=broken)
+        usage.record("key-1")
+        usage.record("key-1")
+
+        with pytest.raises(ConnectionError):
+            await usage.flush()
+        usage.record("key-1")
+
+        assert usage.pending("key-1") == (3, 0)
+        usage._counts.clear()
+        await usage.close()
@@ -0,0 +1,231 @@
+"""
+Tests for the refresh-ahead cache warming planner.
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.cache_warming_planner import (
+    DecayedCountMinSketch,
+    TokenBucket,
+    TopK,
+    WarmingPlanner,
+)
+from src.services.cache_warming_service import CacheWarmingService
+from src.services.transparency_apis.cache import CacheTTL, TransparencyCache
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def planner(clock, **kwargs):
+    kwargs.setdefault("min_popularity", 0.5)
+    kwargs.setdefault("upstream_rate", 100.0)
+    return WarmingPlanner(clock=clock, **kwargs)
+
+
+class Refresher:
+    """Refresh callback recording calls and concurrency."""
+
+    def __init__(self, name, calls, delay=0.0, fail=False):
+        self.name = name
+        self.calls = calls
+        self.delay = delay
+        self.fail = fail
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            self.calls.append(self.name)
+            if self.fail:
+                raise RuntimeError("upstream down")
+        finally:
+            self.active -= 1
+
+
+class TestSketch:
+    """Decayed Count-Min sketch and top-K heap."""
+
+    def test_counts_decay_with_half_life(self, clock):
+        sketch = DecayedCountMinSketch(half_life=60, clock=clock)
+        for _ in range(8):
+            sketch.add("a")
+
+        assert sketch.estimate("a") == pytest.approx(8)
+        clock.now += 120
+        assert sketch.estimate("a") == pytest.approx(2)
+        assert sketch.estimate("never") == 0
+
+    def test_rescale_keeps_estimates(self, clock):
+        sketch = DecayedCountMinSketch(half_life=1, clock=clock)
+        sketch.add("a")
+        clock.now += 100
+
+        assert sketch.rescale() > 1
+        assert sketch.estimate("a") == pytest.approx(2.0**-100)
+
+    def test_top_k_keeps_heaviest(self):
+        top = TopK(k=2)
+        for key, score in [("a", 1), ("b", 5), ("c", 3), ("a", 4), ("d", 2)]:
+            top.offer(key, score)
+
+        assert top.items() == [("b", 5), ("a", 4)]
+
+    def test_token_bucket(self, clock):
+        bucket = TokenBucket(rate=1, burst=2, clock=clock)
+
+        assert [bucket.take() for _ in range(3)] == [True, True, False]
+        clock.now += 1
+        assert bucket.take()
+        assert not bucket.take()
+
+
+class TestPlanner:
+    """Refresh-ahead scheduling."""
+
+    def test_popular_keys_decay(self, clock):
+        plan = planner(clock, half_life=60)
+        for _ in range(4):
+            plan.record_access("query:a")
+        plan.record_access("query:b", hit=False)
+
+        assert [k for k, _ in plan.top(prefix="query:")] == ["query:a", "query:b"]
+        clock.now += 60
+        assert plan.top(1)[0][1] == pytest.approx(2)
+        assert plan.get_stats()["hit_rate"] == pytest.approx(0.8)
+
+    def test_refreshes_only_near_expiry(self, clock):
+        plan = planner(clock, refresh_ahead=0.2)
+        plan.record_access("k")
+        plan.record_fill("k", ttl=100, cost=1, refresh=Refresher("k", []))
+        entry = plan._entries["k"]
+
+        # Due somewhere between 10 and 30 seconds before expiry
+        assert 1070 <= plan.refresh_at(entry) <= 1090
+        assert plan.plan() == []
+        clock.now = plan.refresh_at(entry)
+        assert plan.plan() == [entry]
+
+    def test_orders_by_cost_times_popularity(self, clock):
+        plan = planner(clock)
+        for key, hits, cost in [("cheap", 10, 0.1), ("slow", 2, 5.0), ("mid", 5, 1.0)]:
+            for _ in range(hits):
+                plan.record_access(key)
+            plan.record_fill(key, ttl=10, cost=cost, refresh=Refresher(key, []))
+        plan.record_fill("unpopular", ttl=10, cost=9, refresh=Refresher("u", []))
+        clock.now += 10
+
+        assert [e.key for e in plan.plan()] == ["slow", "mid", "cheap"]
+
+    @pytest.mark.asyncio
+    async def test_run_respects_budgets(self, clock):
+        calls = []
+        plan = planner(clock, concurrency=2, upstream_rate=0.5)
+        refreshers = [Refresher(f"k{i}", calls, delay=0.01) for i in range(5)]
+        shared = Refresher("shared", calls, delay=0.01)
+        for r in refreshers:
+            plan.record_access(r.name)
+            plan.record_fill(r.name, ttl=10, cost=1, refresh=shared)
+        clock.now += 10
+
+        first = await plan.run_once()
+
+        assert first == {"due": 5, "refreshed": 2, "failed": 0, "deferred": 3}
+        assert shared.peak <= 2
+        clock.now += 2
+        assert (await plan.run_once())["refreshed"] == 1
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_refresh_renews_expiry_and_cost(self, clock):
+        plan = planner(clock)
+        plan.record_access("k")
+        plan.record_fill("k", ttl=100, cost=1.0, refresh=Refresher("k", []))
+        clock.now += 100
+
+        assert (await plan.run_once())["refreshed"] == 1
+        entry = plan._entries["k"]
+        assert entry.expires_at == clock.now + 100
+        assert entry.cost < 1.0
+        assert plan.plan() == []
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_backs_off(self, clock):
+        calls = []
+        plan = planner(clock, refresh_ahead=0.2)
+        plan.record_access("k")
+        plan.record_fill("k", ttl=100, cost=1, refresh=Refresher("k", calls, fail=True))
+        clock.now += 100
+
+        assert (await plan.run_once())["failed"] == 1
+        assert (await plan.run_once())["due"] == 0
+        clock.now += 5
+        assert (await plan.run_once())["failed"] == 1
+        assert calls == ["k", "k"]
+
+    def test_entries_are_bounded(self, clock):
+        plan = planner(clock, max_entries=2)
+        for key, hits in [("a", 3), ("b", 1), ("c", 2)]:
+            for _ in range(hits):
+                plan.record_access(key)
+            plan.record_fill(key, ttl=10, cost=1, refresh=Refresher(key, []))
+
+        assert set(plan._entries) == {"a", "c"}
+
+
+class TestIntegration:
+    """Lookups from the caches feed the planner."""
+
+    @pytest.mark.asyncio
+    async def test_transparency_cache_reports_and_refreshes(self, clock):
+        plan = planner(clock, half_life=7 * CacheTTL.CONTRACTS.value)
+        cache = TransparencyCache(planner=plan)
+        calls = []
+
+        assert cache.get_contracts("tce-pe", year=2025) is None
+        cache.set_contracts("tce-pe", [{"id": 1}], year=2025)
+
+        async def refresh():
+            calls.append("refresh")
+            cache.set_contracts("tce-pe", [{"id": 2}], year=2025)
+
+        cache.plan_refresh(
+            "tce-pe", "get_contracts", CacheTTL.CONTRACTS, 2.0, refresh, year=2025
+        )
+        assert cache.get_contracts("tce-pe", year=2025) == [{"id": 1}]
+        clock.now += 0.9 * CacheTTL.CONTRACTS.value
+
+        await plan.run_once()
+
+        assert calls == ["refresh"]
+        assert cache.get_contracts("tce-pe", year=2025) == [{"id": 2}]
+        assert plan.get_stats()["misses"] == 1
+
+    def test_track_query_counts_queries_and_contracts(self, clock):
+        service = CacheWarmingService()
+        service.planner = planner(clock)
+
+        for _ in range(3):
+            service.track_query(
+                {"path": "/c/42", "hash": "abc", "path_params": {"contract_id": "42"}}
+            )
+
+        assert service.planner.top(prefix="query:") == [("query:abc", pytest.approx(3))]
+        assert service.planner.popularity("contract:42") == pytest.approx(3)
@@ -0,0 +1,253 @@
+"""
+Unit tests for write-behind chat persistence.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.models.chat import ChatMessage, ChatSession
+from src.services.chat_persistence import ChatWriteBehindLog
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            ChatSession.metadata.create_all,
+            tables=[ChatSession.__table__, ChatMessage.__table__],
+        )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def transactions():
+    """Transactions opened by the log."""
+    return []
+
+
+@pytest.fixture
+def log(engine, transactions):
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session_factory():
+        transactions.append(1)
+        async with factory() as db:
+            yield db
+            await db.commit()
+
+    return ChatWriteBehindLog(
+        session_factory=session_factory, flush_interval_ms=10_000, max_batch=1000
+    )
+
+
+def _new_session(session_id):
+    now = datetime(2026, 1, 1)
+    return ChatSession(
+        id=session_id,
+        status="active",
+        context={},
+        message_count=0,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+async def _fetch(engine, statement):
+    async with async_sessionmaker(engine)() as db:
+        return (await db.execute(statement)).all()
+
+
+class TestWriteBehindLog:
+    """Batched inserts and coalesced session updates."""
+
+    @pytest.mark.asyncio
+    async def test_turns_are_written_in_one_transaction(
+        self, engine, log, transactions
+    ):
+        """Test a flush inserts new sessions and messages together."""
+        for sid in ("s1", "s2"):
+            log.remember_session(_new_session(sid), new=True)
+            for i in range(5):
+                await log.append_message(sid, "user", f"{sid}-{i}", title="Hi")
+
+        assert await log.flush() == 10
+        assert len(transactions) == 1
+
+        rows = await _fetch(
+            engine,
+            select(ChatSession.id, ChatSession.message_count, ChatSession.title),
+        )
+        assert sorted(rows) == [("s1", 5, "Hi"), ("s2", 5, "Hi")]
+        contents = await _fetch(
+            engine,
+            select(ChatMessage.content)
+            .where(ChatMessage.session_id == "s1")
+            .order_by(ChatMessage.created_at),
+        )
+        assert [c for (c,) in contents] == [f"s1-{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_counts_accumulate_across_flushes(self, engine, log):
+        """Test message_count is incremented, not overwritten."""
+        log.remember_session(_new_session("s1"), new=True)
+        await log.append_message("s1", "user", "a")
+        await log.flush()
+        await log.append_message("s1", "assistant", "b")
+        await log.append_message("s1", "user", "c")
+        log.set_investigation("s1", "inv-1")
+        await log.flush()
+
+        rows = await _fetch(
+            engine,
+            select(ChatSession.message_count, ChatSession.current_investigation_id),
+        )
+        assert rows == [(3, "inv-1")]
+        assert log.cached_session("s1").message_count == 3
+
+    @pytest.mark.asyncio
+    async def test_pending_messages_are_readable(self, log):
+        """Test unflushed messages are visible to readers in order."""
+        log.remember_session(_new_session("s1"), new=True)
+        first = await log.append_message("s1", "user", "a")
+        second = await log.append_message("s1", "assistant", "b")
+
+        assert log.pending_messages("s1") == [first, second]
+        assert first["created_at"] < second["created_at"]
+        assert log.pending_messages("other") == []
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, engine, log):
+        """Test a failed batch is requeued and written by the next flush."""
+        log.remember_session(_new_session("s1"), new=True)
+        await log.append_message("s1", "user", "a")
+        healthy = log._session_factory
+
+        @asynccontextmanager
+        async def broken():
+            raise ConnectionError("db down")
+            yield
+
+        log._session_factory = broken
+        with pytest.raises(ConnectionError):
+            await log.flush()
+        await log.append_message("s1", "assistant", "b")
+
+        log._session_factory = healthy
+        assert await log.flush() == 2
+        rows = await _fetch(engine, select(ChatSession.message_count))
+        assert rows == [(2,)]
+
+    @pytest.mark.asyncio
+    async def test_failing_session_is_isolated(self, engine, log):
+        """Test one bad session does not block the others' writes."""
+        write = log._write
+
+        async def poisoned(rows, deltas):
+            if "bad" in deltas or any(r["session_id"] == "bad" for r in rows):
+                raise ValueError("constraint violated")
+            await write(rows, deltas)
+
+        log._write = poisoned
+        for sid in ("s1", "bad", "s2"):
+            log.remember_session(_new_session(sid), new=True)
+            await log.append_message(sid, "user", sid)
+
+        assert await log.flush() == 2
+        assert log.pending_messages("bad")[0]["content"] == "bad"
+        assert log._retries["bad"][0] == 1
+        # The background flusher waits out the backoff
+        assert await log.flush(due_only=True) == 0
+        rows = await _fetch(engine, select(ChatSession.id).order_by(ChatSession.id))
+        assert rows == [("s1",), ("s2",)]
+
+    @pytest.mark.asyncio
+    async def test_outage_is_not_retried_per_session(self, log, transactions):
+        """Test a down database costs a couple of attempts, not one per session."""
+
+        @asynccontextmanager
+        async def broken():
+            transactions.append(1)
+            raise ConnectionError("db down")
+            yield
+
+        log._session_factory = broken
+        for sid in ("s1", "s2", "s3", "s4"):
+            log.remember_session(_new_session(sid), new=True)
+            await log.append_message(sid, "user", sid)
+
+        with pytest.raises(ConnectionError):
+            await log.flush()
+
+        assert len(transactions) == 3  # the batch and two isolated writes
+        assert all(log._retries[sid][0] == 1 for sid in ("s1", "s2", "s3", "s4"))
+        assert len(log._pending) == 4
+
+    @pytest.mark.asyncio
+    async def test_buffer_bound_sheds_isolated_sessions_first(self, log):
+        """Test overflow drops failing sessions whole and evicts their cache."""
+        log.max_pending = 4
+        log.max_retries = 0
+        write = log._write
+
+        async def poisoned(rows, deltas):
+            if "bad" in deltas or any(r["session_id"] == "bad" for r in rows):
+                raise ValueError("constraint violated")
+            await write(rows, deltas)
+
+        log._write = poisoned
+        log.remember_session(_new_session("bad"), new=True)
+        await log.append_message("bad", "user", "x")
+        with pytest.raises(ValueError):
+            await log.flush()
+
+        async def down(rows, deltas):
+            raise ConnectionError("db down")
+
+        log._write = down
+        log.remember_session(_new_session("s1"), new=True)
+        for i in range(4):
+            await log.append_message("s1", "user", str(i))
+
+        assert log.cached_session("bad") is None
+        assert not log.has_pending("bad")
+        assert [r["content"] for r in log.pending_messages("s1")] == list("0123")
+        assert log.dropped_messages == 1
+
+    @pytest.mark.asyncio
+    async def test_forget_discards_unflushed_writes(self, engine, log):
+        """Test deleted sessions are not resurrected by a later flush."""
+        log.remember_session(_new_session("s1"), new=True)
+        await log.append_message("s1", "user", "a")
+
+        await log.forget("s1")
+        await log.flush()
+
+        assert await _fetch(engine, select(func.count(ChatMessage.id))) == [(0,)]
+        assert log.cached_session("s1") is None
+
+    @pytest.mark.asyncio
+    async def test_full_batch_wakes_the_flusher(self, engine, log):
+        """Test the background flusher writes as soon as a batch fills up."""
+        log.max_batch = 3
+        log.remember_session(_new_session("s1"), new=True)
+        for i in range(3):
+            await log.append_message("s1", "user", str(i))
+        await asyncio.sleep(0.1)  # well below the 10 s flush interval
+
+        assert log.flushes == 1
+        assert await _fetch(engine, select(func.count(ChatMessage.id))) == [(3,)]
+        await log.close()
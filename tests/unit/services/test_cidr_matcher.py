@@ -0,0 +1,82 @@
+"""
+Unit tests for the precompiled CIDR matcher.
+"""
+
+import ipaddress
+import random
+import time
+
+from src.api.middleware.security import IPBlockList
+from src.services.cidr_matcher import CIDRMatcher
+
+
+class TestCIDRMatcher:
+    """Longest-prefix membership over IPv4 and IPv6."""
+
+    def test_matches_like_ipaddress(self):
+        """Test membership equals a linear scan over random networks."""
+        rng = random.Random(7)
+        networks = [
+            ipaddress.ip_network(
+                f"{rng.randrange(1, 224)}.{rng.randrange(256)}.0.0/"
+                f"{rng.choice([8, 12, 16, 24, 32])}",
+                strict=False,
+            )
+            for _ in range(300)
+        ]
+        matcher = CIDRMatcher(networks)
+
+        for _ in range(2000):
+            ip = ipaddress.ip_address(rng.getrandbits(32))
+            assert matcher.contains(ip) == any(ip in n for n in networks)
+
+    def test_most_specific_network_and_ipv6(self):
+        """Test the longest prefix wins and IPv4-mapped clients match."""
+        matcher = CIDRMatcher(["10.0.0.0/8", "10.1.0.0/16", "2001:db8::/32", "::1"])
+
+        assert str(matcher.match("10.1.2.3")) == "10.1.0.0/16"
+        assert str(matcher.match("10.2.0.1")) == "10.0.0.0/8"
+        assert str(matcher.match("::ffff:10.9.9.9")) == "10.0.0.0/8"
+        assert "2001:db8:ffff::1" in matcher
+        assert "::1" in matcher and "::2" not in matcher
+        assert matcher.match("not-an-ip") is None
+
+    def test_expired_entries_never_match(self):
+        """Test expiry is honoured and reported for rebuilds."""
+        now = time.time()
+        matcher = CIDRMatcher([("1.2.3.0/24", now + 60), "5.6.7.8", "bad/99"])
+
+        assert matcher.contains("1.2.3.4", now)
+        assert not matcher.contains("1.2.3.4", now + 61)
+        assert not matcher.is_stale(now)
+        assert matcher.is_stale(now + 61)
+        assert matcher.invalid == 1
+
+
+class TestIPBlockList:
+    """Security middleware blocklist on compiled matchers."""
+
+    def test_repeated_failures_block_until_expiry(self, monkeypatch):
+        """Test the fifth failure blocks and the block lapses."""
+        clock = [1_000_000.0]
+        monkeypatch.setattr("src.api.middleware.security.time.time", lambda: clock[0])
+        blocklist = IPBlockList()
+
+        for _ in range(5):
+            blocklist.record_failed_attempt("203.0.113.9")
+
+        assert blocklist.is_blocked("203.0.113.9")
+        assert not blocklist.is_blocked("203.0.113.10")
+        clock[0] += 31 * 60
+        assert not blocklist.is_blocked("203.0.113.9")
+
+    def test_ranges_and_trusted_networks(self):
+        """Test range blocks and that trusted networks are never blocked."""
+        blocklist = IPBlockList()
+        blocklist.block("198.51.100.0/24")
+        for _ in range(10):
+            blocklist.record_failed_attempt("192.168.1.20")
+
+        assert blocklist.is_blocked("198.51.100.77")
+        assert not blocklist.is_blocked("192.168.1.20")
+        assert blocklist.get_failed_attempts_count("192.168.1.20") == 0
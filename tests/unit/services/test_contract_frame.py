@@ -0,0 +1,145 @@
+"""
+Unit tests for the shared contract frame.
+"""
+
+import numpy as np
+import pytest
+
+from src.services.contract_frame import (
+    ContractFrame,
+    ContractFrameCache,
+    leading_digits,
+)
+
+
+@pytest.fixture
+def contracts():
+    """Portal-style and flat contract records."""
+    return [
+        {
+            "id": 1,
+            "valorInicial": 1500.5,
+            "fornecedor": {"nome": "ACME", "cnpj": "11.111.111/0001-11"},
+            "orgao": {"nome": "Ministério da Saúde", "codigo": "36000"},
+            "dataAssinatura": "15/03/2024",
+        },
+        {
+            "id": 2,
+            "contract_value": "2000",
+            "vendor_name": "ACME",
+            "date": "2024-04-01T22:10:00",
+        },
+        {"id": 3, "value": 987.0, "_month": 5, "_year": 2024, "_org_code": "36000"},
+        {"id": 4},
+    ]
+
+
+class TestLeadingDigits:
+    """First significant digit extraction."""
+
+    def test_matches_string_definition(self):
+        """Test vectorized digits equal the textual first digit."""
+        values = np.array([1000, 999.99, 9.5, 0.0123, 3e12, 45, 7])
+
+        assert leading_digits(values).tolist() == [1, 9, 9, 1, 3, 4, 7]
+
+    def test_non_positive_values_are_zero(self):
+        """Test zeros, negatives and NaN get digit 0."""
+        assert leading_digits(np.array([0, -5, np.nan])).tolist() == [0, 0, 0]
+
+
+class TestContractFrame:
+    """Column extraction."""
+
+    def test_columns(self, contracts):
+        """Test values, vendors, orgs, dates and months are normalized."""
+        frame = ContractFrame.from_records(contracts)
+
+        assert len(frame) == 4
+        assert frame.values[:3].tolist() == [1500.5, 2000.0, 987.0]
+        assert np.isnan(frame.values[3])
+        assert str(frame.timestamps[0])[:10] == "2024-03-15"
+        assert np.isnat(frame.timestamps[2])
+        assert frame.vendors[frame.vendor_codes[0]] == ("ACME", "11.111.111/0001-11")
+        assert frame.vendors[frame.vendor_codes[1]] == ("ACME", None)
+        assert frame.vendor_codes[2] == -1
+        assert frame.org_codes[0] == frame.org_codes[2]
+        assert [frame.months[c] for c in frame.month_codes[:3]] == [
+            "2024-03",
+            "2024-04",
+            "2024-05",
+        ]
+        assert frame.month_codes[3] == -1
+
+    def test_digit_histogram_and_totals(self, contracts):
+        """Test first-digit counts and segmented sums."""
+        frame = ContractFrame.from_records(contracts)
+
+        assert frame.digit_histogram.tolist() == [1, 1, 0, 0, 0, 0, 0, 0, 1]
+        counts, sums = frame.group_totals(frame.month_codes, len(frame.months))
+        assert counts.tolist() == [1, 1, 1]
+        assert sums.tolist() == [1500.5, 2000.0, 987.0]
+
+    def test_arrays_are_read_only(self, contracts):
+        """Test agents cannot mutate the shared columns."""
+        frame = ContractFrame.from_records(contracts)
+
+        with pytest.raises(ValueError):
+            frame.values[0] = 0.0
+
+
+class TestContractFrameCache:
+    """Per-investigation memoization."""
+
+    def test_frame_built_once_per_investigation(self, contracts):
+        """Test the same contracts reuse the frame within an investigation."""
+        cache = ContractFrameCache()
+
+        first = cache.get(contracts, "inv-1")
+
+        assert cache.get(contracts, "inv-1") is first
+        assert cache.get(contracts, "inv-2") is not first
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_lookup_does_not_read_rows(self):
+        """Test a hit is keyed on the list, not on hashing its rows."""
+
+        class Unreadable(dict):
+            def __repr__(self):
+                raise AssertionError("rows must not be hashed on lookup")
+
+        cache = ContractFrameCache()
+        records = [Unreadable(valor=1.0)]
+        first = cache.get(records, "inv-1")
+
+        assert cache.get(records, "inv-1") is first
+
+    def test_different_contracts_are_not_confused(self, contracts):
+        """Test changed content in the same investigation rebuilds the frame."""
+        cache = ContractFrameCache()
+        first = cache.get(contracts, "inv-1")
+
+        changed = [dict(c) for c in contracts]
+        changed[1]["vendor_name"] = "Other"
+
+        assert cache.get(changed, "inv-1") is not first
+
+    def test_change_in_any_row_rebuilds(self):
+        """Test lists differing in a single row never share a frame."""
+        cache = ContractFrameCache()
+        records = [{"id": i, "valor": float(i)} for i in range(1000)]
+        first = cache.get(records, "inv-1")
+
+        for i in (1, 499, 998):
+            changed = [dict(r) for r in records]
+            changed[i]["valor"] = -1.0
+            assert cache.get(changed, "inv-1") is not first
+
+    def test_release_and_no_investigation(self, contracts):
+        """Test release drops frames and id-less calls are not cached."""
+        cache = ContractFrameCache()
+        first = cache.get(contracts, "inv-1")
+        cache.release("inv-1")
+
+        assert cache.get(contracts, "inv-1") is not first
+        assert cache.get(contracts) is not cache.get(contracts)
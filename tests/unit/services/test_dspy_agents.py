@@ -0,0 +1,103 @@
+"""
+Tests for DSPy agent chat streaming.
+"""
+
+import pytest
+
+from src.services.dspy_agents import DSPyAgentService
+
+
+class FakeStreamClient:
+    """Maritaca client stand-in yielding fixed tokens."""
+
+    def __init__(self, tokens, fail_after=None):
+        self.tokens = tokens
+        self.fail_after = fail_after
+        self.messages = None
+
+    async def chat_completion(self, messages, stream=False, **kwargs):
+        assert stream
+        self.messages = messages
+
+        async def tokens():
+            for i, token in enumerate(self.tokens):
+                if i == self.fail_after:
+                    raise ConnectionError("stream dropped")
+                yield token
+
+        return tokens()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = DSPyAgentService()
+
+    async def chat(agent_id, message, intent_type="question", context=""):
+        return {"response": "Resposta completa.", "agent_name": "Zumbi dos Palmares"}
+
+    monkeypatch.setattr(service, "chat", chat)
+    return service
+
+
+async def _events(service, agent_id="zumbi"):
+    return [
+        event
+        async for event in service.chat_stream(
+            agent_id=agent_id, message="Contratos da saúde", intent_type="investigate"
+        )
+    ]
+
+
+class TestChatStream:
+    """Token streaming from the LLM with single-event fallback."""
+
+    @pytest.mark.asyncio
+    async def test_relays_provider_tokens(self, service, monkeypatch):
+        client = FakeStreamClient(["Olá", ", ", "cidadão", "!"])
+        monkeypatch.setattr(service, "_get_stream_client", lambda: client)
+
+        events = await _events(service)
+
+        chunks = [e["content"] for e in events if e["type"] == "chunk"]
+        assert chunks == ["Olá", ", ", "cidadão", "!"]
+        assert events[-1]["type"] == "complete"
+        assert events[-1]["agent_name"] == "Zumbi dos Palmares"
+        system_prompt = client.messages[0]["content"]
+        assert "Zumbi dos Palmares" in system_prompt
+        assert "investigate" in system_prompt
+        assert client.messages[1] == {"role": "user", "content": "Contratos da saúde"}
+
+    @pytest.mark.asyncio
+    async def test_without_client_sends_result_in_one_event(self, service, monkeypatch):
+        monkeypatch.setattr(service, "_get_stream_client", lambda: None)
+
+        events = await _events(service)
+
+        assert [e["type"] for e in events] == ["chunk", "complete"]
+        assert events[0]["content"] == "Resposta completa."
+
+    @pytest.mark.asyncio
+    async def test_failure_before_first_token_falls_back(self, service, monkeypatch):
+        client = FakeStreamClient(["Olá"], fail_after=0)
+        monkeypatch.setattr(service, "_get_stream_client", lambda: client)
+
+        events = await _events(service)
+
+        assert events[0]["content"] == "Resposta completa."
+        assert events[-1]["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_failure_mid_stream_is_not_repeated(self, service, monkeypatch):
+        client = FakeStreamClient(["Olá", " mundo"], fail_after=1)
+        monkeypatch.setattr(service, "_get_stream_client", lambda: client)
+
+        events = await _events(service)
+
+        chunks = [e["content"] for e in events if e["type"] == "chunk"]
+        assert chunks == ["Olá"]
+        assert events[-1] == {
+            "type": "complete",
+            "agent_id": "zumbi",
+            "agent_name": "Zumbi dos Palmares",
+            "success": False,
+        }
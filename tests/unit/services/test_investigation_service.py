@@ -323,6 +323,68 @@ class TestGetById:
             assert result is None
 
 
+class TestBatchLookups:
+    """Tests for the single-query lookups used by GraphQL loaders."""
+
+    @pytest.fixture
+    def service(self):
+        """Create service for testing."""
+        return InvestigationService()
+
+    @staticmethod
+    def _session(mock_session, rows):
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = rows
+        mock_db = AsyncMock()
+        mock_db.execute = AsyncMock(return_value=mock_result)
+        mock_context = AsyncMock()
+        mock_context.__aenter__ = AsyncMock(return_value=mock_db)
+        mock_context.__aexit__ = AsyncMock(return_value=None)
+        mock_session.return_value = mock_context
+        return mock_db
+
+    @pytest.mark.asyncio
+    async def test_get_many_uses_one_in_query(self, service):
+        """Test duplicate IDs are fetched once with an IN clause."""
+        rows = [MagicMock(spec=Investigation), MagicMock(spec=Investigation)]
+
+        with patch(
+            "src.services.investigation_service.get_db_session"
+        ) as mock_session:
+            mock_db = self._session(mock_session, rows)
+
+            result = await service.get_many(["inv-1", "inv-2", "inv-1"])
+
+            assert result == rows
+            mock_db.execute.assert_called_once()
+            statement = str(mock_db.execute.call_args.args[0])
+            assert "investigations.id IN" in statement
+
+    @pytest.mark.asyncio
+    async def test_get_many_empty(self, service):
+        """Test no query is made without IDs."""
+        with patch(
+            "src.services.investigation_service.get_db_session"
+        ) as mock_session:
+            assert await service.get_many([]) == []
+            mock_session.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_contract_anomaly_references_use_one_query(self, service):
+        """Test references of several contracts come from one query."""
+        with patch(
+            "src.services.investigation_service.get_db_session"
+        ) as mock_session:
+            mock_db = self._session(mock_session, [])
+
+            await service.get_contract_anomaly_references(["c-1", "c-2"])
+
+            mock_db.execute.assert_called_once()
+            statement = str(mock_db.execute.call_args.args[0])
+            assert "contract_id IN" in statement
+            assert "involved_in_anomalies IS" in statement
+
+
 class TestSearch:
     """Tests for search method."""
 
@@ -1,5 +1,7 @@
 """Tests for IP whitelist service."""
 
+import time
+from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
@@ -221,6 +223,34 @@ class TestIPWhitelistService:
         )
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_entry_expiring_after_load(
+        self, ip_whitelist_service, mock_db_session
+    ):
+        """Test an entry stops matching once it expires, without a reload."""
+        entries = [
+            Mock(
+                ip_address="10.0.0.0",
+                is_cidr=True,
+                cidr_prefix=24,
+                active=True,
+                expires_at=datetime.now(UTC) + timedelta(seconds=60),
+            )
+        ]
+        scalars_result = Mock()
+        scalars_result.all = Mock(return_value=entries)
+        execute_result = Mock()
+        execute_result.scalars = Mock(return_value=scalars_result)
+        mock_db_session.execute = AsyncMock(return_value=execute_result)
+
+        assert await ip_whitelist_service.check_ip(mock_db_session, "10.0.0.7")
+        with patch(
+            "src.services.ip_whitelist_service.time.time",
+            return_value=time.time() + 120,
+        ):
+            assert ip_whitelist_service.check_ip_loaded("10.0.0.7") is False
+        assert mock_db_session.execute.await_count == 1
+
     @pytest.mark.asyncio
     async def test_remove_ip(self, ip_whitelist_service, mock_db_session):
         """Test removing IP from whitelist."""
@@ -0,0 +1,136 @@
+"""
+Tests for the content-addressed report caches.
+"""
+
+import asyncio
+
+import pytest
+
+from src.services.report_cache import (
+    ReportArtifactStore,
+    ReportCache,
+    content_key,
+    data_version,
+)
+
+
+class TestKeys:
+    """Content addresses of report inputs."""
+
+    def test_content_key_ignores_dict_order(self):
+        assert content_key({"a": 1, "b": [1, 2]}) == content_key({"b": [1, 2], "a": 1})
+        assert content_key({"a": 1}) != content_key({"a": 2})
+        assert content_key("x", 1) != content_key("x", "1")
+
+    def test_data_version_prefers_identity_and_version(self):
+        assert data_version(None) == "none"
+        assert data_version({"investigation_id": "INV-1", "version": 3}) == "INV-1@3"
+        assert (
+            data_version({"id": "INV-1", "metadata": {"updated_at": "2026-01-01"}})
+            == "INV-1@2026-01-01"
+        )
+
+    def test_data_version_digests_unversioned_data(self):
+        assert data_version({"id": "INV-1", "total": 1}) == content_key(
+            {"total": 1, "id": "INV-1"}
+        )
+        assert data_version({"id": "INV-1", "total": 1}) != data_version(
+            {"id": "INV-1", "total": 2}
+        )
+
+
+class TestReportCache:
+    """LRU map of sections and renders."""
+
+    def test_lru_eviction_and_counters(self):
+        cache = ReportCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_get_or_build_builds_once(self):
+        cache = ReportCache()
+        calls = []
+
+        def build():
+            calls.append(1)
+            return "section"
+
+        assert cache.get_or_build("k", build) == "section"
+        assert cache.get_or_build("k", build) == "section"
+        assert len(calls) == 1
+
+
+class TestReportArtifactStore:
+    """Disk store of rendered files."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_render(self, tmp_path):
+        store = ReportArtifactStore(tmp_path)
+
+        async def render():
+            await asyncio.sleep(0.01)
+            return b"%PDF-1.4 report"
+
+        artifacts = await asyncio.gather(
+            *(store.get_or_create("k1", render, "application/pdf") for _ in range(5))
+        )
+
+        assert store.renders == 1
+        assert {a.artifact_id for a in artifacts} == {"k1"}
+        assert artifacts[0].path == tmp_path / "k1.pdf"
+        assert artifacts[0].as_dict()["url"] == "/api/v1/reports/artifacts/k1"
+        assert await store.read(artifacts[0]) == b"%PDF-1.4 report"
+
+        await store.get_or_create("k1", render, "application/pdf")
+        assert store.renders == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_render_is_not_stored(self, tmp_path):
+        store = ReportArtifactStore(tmp_path)
+
+        async def render():
+            raise RuntimeError("renderer crashed")
+
+        with pytest.raises(RuntimeError):
+            await store.get_or_create("k1", render, "application/pdf")
+
+        assert store.get("k1") is None
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used_by_size(self, tmp_path):
+        store = ReportArtifactStore(tmp_path, max_bytes=10)
+        await store.put("a", b"12345", "application/pdf")
+        await store.put("b", b"12345", "application/pdf")
+        store.get("a")
+        await store.put("c", b"12345", "application/pdf")
+
+        assert store.get("b") is None
+        assert not (tmp_path / "b.pdf").exists()
+        assert store.get("a") and store.get("c")
+
+    @pytest.mark.asyncio
+    async def test_reindexes_files_on_start(self, tmp_path):
+        await ReportArtifactStore(tmp_path).put("k1", b"<p>", "text/html")
+
+        artifact = ReportArtifactStore(tmp_path).get("k1")
+
+        assert artifact.media_type == "text/html"
+        assert artifact.size == 3
+
+    @pytest.mark.asyncio
+    async def test_stream_in_chunks(self, tmp_path):
+        store = ReportArtifactStore(tmp_path)
+        artifact = await store.put("k1", bytes(range(256)) * 10, "application/pdf")
+
+        chunks = [chunk async for chunk in store.stream(artifact, chunk_size=1000)]
+
+        assert [len(c) for c in chunks] == [1000, 1000, 560]
+        assert b"".join(chunks) == bytes(range(256)) * 10
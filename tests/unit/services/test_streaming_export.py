@@ -0,0 +1,228 @@
+"""
+Tests for constant-memory CSV, XLSX and ZIP export streams.
+"""
+
+import csv
+import io
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+from src.core.exceptions import TransparencyAPIError
+from src.services import streaming_export
+from src.services.streaming_export import (
+    ZipEntry,
+    peek,
+    stream_csv,
+    stream_xlsx,
+    stream_zip,
+)
+from src.tools.transparency_api import (
+    TransparencyAPIClient,
+    TransparencyAPIFilter,
+    TransparencyAPIResponse,
+)
+
+
+async def _agen(items):
+    for item in items:
+        yield item
+
+
+async def _collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+def _contracts(count: int) -> list[dict]:
+    return [
+        {"id": f"C{i:05d}", "valor": i * 10.5, "fornecedor": f"Empresa {i}"}
+        for i in range(count)
+    ]
+
+
+class TestPeek:
+    """First-row lookahead for 404 before streaming."""
+
+    @pytest.mark.asyncio
+    async def test_empty(self):
+        assert await peek(_agen([])) is None
+
+    @pytest.mark.asyncio
+    async def test_first_row_is_not_lost(self):
+        first, rows = await peek(_agen([1, 2, 3]))
+        assert first == 1
+        assert [row async for row in rows] == [1, 2, 3]
+
+
+class TestStreamCSV:
+    """CSV encoding of row streams."""
+
+    @pytest.mark.asyncio
+    async def test_rows_from_async_iterable(self):
+        data = await _collect(stream_csv(_agen(_contracts(3))))
+
+        rows = list(csv.DictReader(io.StringIO(data.decode())))
+        assert len(rows) == 3
+        assert rows[2] == {"id": "C00002", "valor": "21.0", "fornecedor": "Empresa 2"}
+
+    @pytest.mark.asyncio
+    async def test_column_order_and_nested_values(self):
+        rows = [{"a": 1, "b": {"x": 1}}, {"b": [1, 2]}]
+
+        data = await _collect(stream_csv(rows, columns=["b", "a"]))
+
+        assert data.decode().splitlines() == ["b,a", '"{""x"":1}",1', '"[1,2]",']
+
+    @pytest.mark.asyncio
+    async def test_output_is_chunked(self, monkeypatch):
+        monkeypatch.setattr(streaming_export, "FLUSH_BYTES", 1024)
+
+        chunks = [chunk async for chunk in stream_csv(_contracts(1000))]
+
+        assert len(chunks) > 10
+        assert max(len(chunk) for chunk in chunks) < 2048
+
+
+class TestStreamZip:
+    """ZIP archives written entry by entry."""
+
+    @pytest.mark.asyncio
+    async def test_streamed_and_stored_entries(self):
+        entries = _agen(
+            [
+                ZipEntry("dados.csv", stream_csv(_contracts(500))),
+                ZipEntry("relatorio.pdf", b"%PDF-1.4 fake", compress=False),
+            ]
+        )
+
+        archive = zipfile.ZipFile(io.BytesIO(await _collect(stream_zip(entries))))
+
+        assert archive.testzip() is None
+        assert archive.namelist() == ["dados.csv", "relatorio.pdf"]
+        assert archive.read("relatorio.pdf") == b"%PDF-1.4 fake"
+        assert archive.getinfo("relatorio.pdf").compress_type == zipfile.ZIP_STORED
+        assert len(archive.read("dados.csv").decode().splitlines()) == 501
+
+
+class TestStreamXLSX:
+    """XLSX workbooks written row by row."""
+
+    @pytest.mark.asyncio
+    async def test_workbook_layout(self):
+        data = await _collect(
+            stream_xlsx(
+                {"Contratos": _agen(_contracts(5))},
+                title="Contratos",
+                metadata={"filtro": "2024"},
+            )
+        )
+
+        workbook = load_workbook(io.BytesIO(data))
+        assert workbook.sheetnames == ["Contratos", "Metadados"]
+        sheet = workbook["Contratos"]
+        assert sheet["A1"].value == "Contratos"
+        assert sheet["A2"].value.startswith("Gerado em:")
+        assert [cell.value for cell in sheet[3]] == ["id", "valor", "fornecedor"]
+        assert [cell.value for cell in sheet[8]] == ["C00004", 42.0, "Empresa 4"]
+        assert sheet.max_row == 8
+
+        metadata = {
+            row[0]: row[1]
+            for row in workbook["Metadados"].iter_rows(min_row=4, values_only=True)
+        }
+        assert metadata == {"filtro": "2024", "total_records": "5"}
+
+    @pytest.mark.asyncio
+    async def test_escapes_text(self):
+        rows = [{"descrição": "<a & b>", "ok": True, "vazio": None}]
+
+        data = await _collect(stream_xlsx({"Dados": rows}, title="T"))
+
+        sheet = load_workbook(io.BytesIO(data))["Dados"]
+        assert [cell.value for cell in sheet[4]] == ["<a & b>", True, None]
+
+    @pytest.mark.asyncio
+    async def test_rolls_over_at_row_limit(self, monkeypatch):
+        monkeypatch.setattr(streaming_export, "EXCEL_MAX_ROWS", 13)
+
+        data = await _collect(stream_xlsx({"Dados": _contracts(25)}, title="T"))
+
+        workbook = load_workbook(io.BytesIO(data))
+        assert workbook.sheetnames == ["Dados", "Dados (2)", "Dados (3)"]
+        # 3 heading rows + 10 data rows per sheet
+        assert [ws.max_row - 3 for ws in workbook] == [10, 10, 5]
+        assert workbook["Dados (3)"]["A8"].value == "C00024"
+
+
+class TestIterPages:
+    """Page-by-page fetching from Portal da Transparência."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        client = TransparencyAPIClient(api_key="test")
+        requested = []
+
+        async def search_data(endpoint, filters):
+            requested.append(filters.pagina)
+            start = (filters.pagina - 1) * filters.tamanho_pagina
+            data = _contracts(25)[start : start + filters.tamanho_pagina]
+            return TransparencyAPIResponse(data=data)
+
+        monkeypatch.setattr(client, "search_data", search_data)
+        client.requested = requested
+        return client
+
+    @pytest.mark.asyncio
+    async def test_stops_at_short_page(self, client):
+        pages = [
+            page
+            async for page in client.iter_pages(
+                "/api-de-dados/contratos", TransparencyAPIFilter(tamanho_pagina=10)
+            )
+        ]
+
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert client.requested == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_max_pages(self, client):
+        pages = [
+            page
+            async for page in client.iter_pages(
+                "/api-de-dados/contratos",
+                TransparencyAPIFilter(tamanho_pagina=10),
+                max_pages=2,
+            )
+        ]
+
+        assert len(pages) == 2
+        assert client.requested == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_failed_page_aborts_the_stream(self, client, monkeypatch):
+        search_data = client.search_data
+
+        async def flaky(endpoint, filters):
+            if filters.pagina == 2:
+                raise TransparencyAPIError("upstream timeout")
+            return await search_data(endpoint, filters)
+
+        monkeypatch.setattr(client, "search_data", flaky)
+
+        async def rows():
+            async for page in client.iter_pages(
+                "/api-de-dados/contratos", TransparencyAPIFilter(tamanho_pagina=10)
+            ):
+                for row in page:
+                    yield row
+
+        chunks = []
+        with pytest.raises(TransparencyAPIError):
+            async for chunk in stream_csv(rows()):
+                chunks.append(chunk)
+
+        assert client.requested == [1]
+        assert await client.get_all_pages(
+            "/api-de-dados/contratos", TransparencyAPIFilter(tamanho_pagina=10)
+        ) == _contracts(10)
@@ -0,0 +1,318 @@
+"""
+Tests for the durable webhook outbox and its dispatcher.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from src.services import webhook_outbox
+from src.services.webhook_outbox import (
+    DEAD,
+    LEASE_MARGIN_SECONDS,
+    PENDING,
+    WebhookDispatcher,
+    WebhookOutbox,
+    retry_delay,
+    sign,
+)
+from src.services.webhook_service import WebhookConfig, WebhookEvent, WebhookService
+
+FAST = "https://fast.example.com/hook"
+SLOW = "https://slow.example.com/hook"
+
+
+class Endpoints:
+    """Mock transport recording requests and answering per URL."""
+
+    def __init__(self, statuses=None, delays=None):
+        self.statuses = statuses or {}
+        self.delays = delays or {}
+        self.requests: list[httpx.Request] = []
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        self.requests.append(request)
+        self.active[url] = self.active.get(url, 0) + 1
+        self.peak[url] = max(self.peak.get(url, 0), self.active[url])
+        try:
+            await asyncio.sleep(self.delays.get(url, 0))
+            statuses = self.statuses.get(url, [200])
+            status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+            return httpx.Response(status, text="ok")
+        finally:
+            self.active[url] -= 1
+
+    def to(self, url):
+        return [r for r in self.requests if str(r.url) == url]
+
+
+def row(url=FAST, event="anomaly.detected", n=0, max_retries=3):
+    body = json.dumps({"event": event, "n": n}).encode()
+    return {
+        "url": url,
+        "event": event,
+        "body": body,
+        "headers": {"Content-Type": "application/json", "X-Cidadao-Event": event},
+        "timeout": 5,
+        "max_retries": max_retries,
+    }
+
+
+def dispatcher(outbox, endpoints, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(endpoints))
+    kwargs.setdefault("poll_interval", 0.01)
+    kwargs.setdefault("retry_base_seconds", 0.01)
+    kwargs.setdefault("retry_max_seconds", 0.02)
+    return WebhookDispatcher(outbox, client, **kwargs)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = WebhookOutbox(tmp_path / "outbox.db")
+    yield outbox
+    outbox.close()
+
+
+class TestOutbox:
+    """The SQLite queue."""
+
+    def test_claim_leases_entries(self, outbox):
+        outbox.enqueue([row(n=i) for i in range(3)])
+
+        first = outbox.claim(limit=2, lease_seconds=60)
+        second = outbox.claim(limit=10, lease_seconds=60)
+
+        assert [json.loads(e.body)["n"] for e in first] == [0, 1]
+        assert [json.loads(e.body)["n"] for e in second] == [2]
+        assert outbox.claim(limit=10, lease_seconds=60) == []
+
+    def test_expired_lease_is_claimed_again(self, outbox, monkeypatch):
+        outbox.enqueue([row()])
+        outbox.claim(limit=1, lease_seconds=0)
+        now = webhook_outbox.time.time()
+
+        # The lease outlasts the request timeout even when asked for less
+        assert outbox.claim(limit=1, lease_seconds=60) == []
+        monkeypatch.setattr(
+            webhook_outbox.time, "time", lambda: now + 5 + LEASE_MARGIN_SECONDS + 1
+        )
+        assert len(outbox.claim(limit=1, lease_seconds=60)) == 1
+
+    def test_claim_is_capped_per_endpoint(self, outbox):
+        outbox.enqueue([row(SLOW, n=i) for i in range(5)] + [row(FAST, n=9)])
+
+        caps = {SLOW: 2, FAST: 10}
+        claimed = outbox.claim(10, 60, capacity=caps.get)
+
+        assert [(e.url, json.loads(e.body)["n"]) for e in claimed] == [
+            (SLOW, 0),
+            (SLOW, 1),
+            (FAST, 9),
+        ]
+        assert [json.loads(e.body)["n"] for e in outbox.claim(10, 60)] == [2, 3, 4]
+
+    def test_excluded_endpoints_are_skipped(self, outbox):
+        outbox.enqueue([row(SLOW), row(FAST)])
+
+        assert [e.url for e in outbox.claim(10, 60, exclude={SLOW})] == [FAST]
+
+    def test_entries_survive_reopening(self, tmp_path):
+        path = tmp_path / "outbox.db"
+        WebhookOutbox(path).enqueue([row()])
+
+        reopened = WebhookOutbox(path)
+
+        assert reopened.counts()[PENDING] == 1
+        assert reopened.claim(1, 60)[0].headers["X-Cidadao-Event"] == "anomaly.detected"
+
+    def test_history_is_bounded(self, tmp_path):
+        outbox = WebhookOutbox(tmp_path / "outbox.db", max_history=10)
+        result = {
+            "webhook_url": FAST,
+            "event": "anomaly.detected",
+            "timestamp": 0.0,
+            "status_code": 200,
+            "response_body": "",
+            "error": None,
+            "attempts": 1,
+            "success": 1,
+            "duration_ms": 1.0,
+        }
+        for _ in range(30):
+            outbox.record([result])
+
+        assert len(outbox.history(limit=100)) <= 11
+
+
+class TestRetryDelay:
+    """Exponential backoff with jitter."""
+
+    def test_grows_exponentially_within_jitter(self):
+        low = [retry_delay(a, 1.0, 60.0, rng=lambda a, b: a) for a in (1, 2, 3)]
+        high = [retry_delay(a, 1.0, 60.0, rng=lambda a, b: b) for a in (1, 2, 3)]
+
+        assert low == [0.5, 1.0, 2.0]
+        assert high == [1.0, 2.0, 4.0]
+
+    def test_capped(self):
+        assert retry_delay(20, 1.0, 60.0, rng=lambda a, b: b) == 60.0
+
+
+class TestDispatcher:
+    """Background delivery."""
+
+    @pytest.mark.asyncio
+    async def test_delivers_and_records(self, outbox):
+        endpoints = Endpoints()
+        worker = dispatcher(outbox, endpoints)
+
+        await worker.enqueue([row(n=1)])
+        assert await worker.drain(5)
+        await worker.close()
+
+        assert len(endpoints.to(FAST)) == 1
+        assert outbox.counts() == {PENDING: 0, DEAD: 0}
+        [delivery] = outbox.history()
+        assert delivery["webhook_url"] == FAST
+        assert delivery["success"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self, outbox):
+        endpoints = Endpoints(statuses={FAST: [500, 503, 200]})
+        worker = dispatcher(outbox, endpoints)
+
+        await worker.enqueue([row()])
+        assert await worker.drain(5)
+        await worker.close()
+
+        assert len(endpoints.to(FAST)) == 3
+        assert [d["success"] for d in outbox.history()] == [1, 0, 0]
+        assert outbox.history()[0]["attempts"] == 3
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries_and_on_rejection(self, outbox):
+        endpoints = Endpoints(statuses={FAST: [500], SLOW: [404]})
+        worker = dispatcher(outbox, endpoints, failure_threshold=100)
+
+        await worker.enqueue([row(FAST, max_retries=2), row(SLOW, max_retries=5)])
+        assert await worker.drain(5)
+        await worker.close()
+
+        assert len(endpoints.to(FAST)) == 3
+        assert len(endpoints.to(SLOW)) == 1
+        assert outbox.counts()[DEAD] == 2
+
+    @pytest.mark.asyncio
+    async def test_slow_endpoint_is_limited_and_does_not_block_others(self, outbox):
+        endpoints = Endpoints(delays={SLOW: 0.2})
+        worker = dispatcher(outbox, endpoints, endpoint_concurrency=2)
+
+        await worker.enqueue([row(SLOW, n=i) for i in range(6)] + [row(FAST)])
+        for _ in range(100):
+            if endpoints.to(FAST):
+                break
+            await asyncio.sleep(0.01)
+
+        assert len(endpoints.to(SLOW)) <= 2
+        assert len(endpoints.to(FAST)) == 1
+        # Rows waiting for a slot stay unleased instead of aging in memory
+        assert outbox.counts()[PENDING] == 6
+        assert outbox.next_due() <= time.time()
+        assert await worker.drain(5)
+        await worker.close()
+        assert endpoints.peak[SLOW] == 2
+        assert len(endpoints.to(SLOW)) == 6
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_defers_without_attempting(self, outbox):
+        endpoints = Endpoints(statuses={FAST: [500]})
+        worker = dispatcher(
+            outbox,
+            endpoints,
+            endpoint_concurrency=1,
+            failure_threshold=2,
+            recovery_timeout=60,
+        )
+
+        await worker.enqueue([row(max_retries=10) for _ in range(4)])
+        for _ in range(200):
+            if worker.stats["rejected_open"]:
+                break
+            await asyncio.sleep(0.01)
+        await worker.close()
+
+        assert len(endpoints.to(FAST)) == 2
+        assert worker.stats["rejected_open"] >= 1
+        assert outbox.counts()[PENDING] == 4
+
+    @pytest.mark.asyncio
+    async def test_batches_consecutive_events(self, outbox):
+        endpoints = Endpoints()
+        worker = dispatcher(
+            outbox, endpoints, batch_size_for=lambda url: 3, secret_for=lambda u: "s"
+        )
+
+        await worker.enqueue([row(n=i) for i in range(4)])
+        assert await worker.drain(5)
+        await worker.close()
+
+        batch, single = endpoints.to(FAST)
+        assert [e["n"] for e in json.loads(batch.content)] == [0, 1, 2]
+        assert batch.headers["X-Cidadao-Batch-Size"] == "3"
+        assert batch.headers["X-Cidadao-Signature"] == sign(batch.content, "s")
+        assert json.loads(single.content)["n"] == 3
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_restart(self, tmp_path):
+        path = tmp_path / "outbox.db"
+        WebhookOutbox(path).enqueue([row(n=i) for i in range(3)])
+        endpoints = Endpoints()
+        worker = dispatcher(WebhookOutbox(path), endpoints)
+
+        worker.start()
+        assert await worker.drain(5)
+        await worker.close()
+
+        assert len(endpoints.to(FAST)) == 3
+
+
+class TestWebhookService:
+    """send_event queues instead of delivering inline."""
+
+    @pytest.mark.asyncio
+    async def test_send_event_queues_and_signs_once(self, tmp_path, monkeypatch):
+        service = WebhookService(outbox_path=str(tmp_path / "outbox.db"))
+        endpoints = Endpoints(delays={FAST: 0.05})
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(endpoints))
+        service.dispatcher.poll_interval = 0.01
+        for url in (FAST, "https://other.example.com/hook"):
+            service.add_webhook(WebhookConfig(url=url, secret="s"))
+        signatures = []
+        original = service._generate_signature
+        monkeypatch.setattr(
+            service,
+            "_generate_signature",
+            lambda body, secret: signatures.append(body) or original(body, secret),
+        )
+
+        ids = await service.send_event(WebhookEvent.ANOMALY_DETECTED, {"id": 1})
+
+        assert len(ids) == 2
+        assert endpoints.requests == []  # nothing sent inline
+        assert len(signatures) == 1
+        assert await service.flush(5)
+        history = service.get_delivery_history()
+        assert {d.webhook_url for d in history} == {
+            FAST,
+            "https://other.example.com/hook",
+        }
+        assert all(d.success for d in history)
+        request = endpoints.to(FAST)[0]
+        assert request.headers["X-Cidadao-Signature"] == sign(request.content, "s")
+        await service.close()
@@ -0,0 +1,286 @@
+"""
+Unit tests for the local IBGE indicator store and bulk sync.
+
+Author: Anderson Henrique da Silva
+Created: 2026-10-18
+License: Proprietary - All rights reserved
+"""
+
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from src.services.transparency_apis.federal_apis.ibge_client import IBGEClient
+from src.services.transparency_apis.federal_apis.ibge_store import (
+    IBGE_BULK_TABLES,
+    IBGEBulkSync,
+    IBGEIndicatorStore,
+    IBGETableSpec,
+)
+
+
+def _sidra_payload(values: dict[str, dict[str, str]], variable_id: str = "9324"):
+    """Build a minimal SIDRA agregados response."""
+    return [
+        {
+            "id": variable_id,
+            "variavel": "População residente estimada",
+            "unidade": "Pessoas",
+            "resultados": [
+                {
+                    "classificacoes": [],
+                    "series": [
+                        {
+                            "localidade": {
+                                "id": loc,
+                                "nivel": {"id": "N6", "nome": "Município"},
+                                "nome": f"Município {loc}",
+                            },
+                            "serie": serie,
+                        }
+                        for loc, serie in values.items()
+                    ],
+                }
+            ],
+        }
+    ]
+
+
+POPULATION = {
+    "3304557": {"2020": "6747815", "2021": "6775561"},  # Rio de Janeiro (RJ)
+    "3550308": {"2020": "12325232", "2021": "12396372"},  # São Paulo (SP)
+    "3301702": {"2020": "924624", "2021": "...", "2019": "919596"},  # RJ
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store with the population table synced."""
+    store = IBGEIndicatorStore(tmp_path)
+    store.write_table("6579", "2021@01/07/2021", _sidra_payload(POPULATION))
+    return store
+
+
+class TestIBGEIndicatorStore:
+    """Test columnar writing and lookups."""
+
+    def test_write_table_records_manifest(self, store):
+        """Test table metadata is persisted."""
+        info = store.table_info("6579")
+
+        assert info["version"] == "2021@01/07/2021"
+        assert info["rows"] == 7
+        assert info["variables"]["9324"]["unit"] == "Pessoas"
+        assert store.locality_name("3304557") == "Município 3304557"
+
+    def test_columns_are_memory_mapped(self, store):
+        """Test columns are opened as read-only memory maps."""
+        rows = store.slice("6579", state_id="33")
+
+        assert isinstance(rows["value"].base, np.memmap) or isinstance(
+            rows["value"], np.memmap
+        )
+
+    def test_slice_by_state_uses_code_prefix(self, store):
+        """Test state slices return only municipalities of that UF."""
+        rows = store.slice("6579", state_id="33")
+
+        assert set(rows["locality"].tolist()) == {3304557, 3301702}
+
+    def test_slice_many_municipalities(self, store):
+        """Test multi-municipality slices and period filters."""
+        rows = store.slice(
+            "6579", locality_ids=["3550308", "3304557", "9999999"], periods=[2021]
+        )
+
+        assert rows["locality"].tolist() == [3304557, 3550308]
+        assert rows["value"].tolist() == [6775561.0, 12396372.0]
+
+    def test_suppressed_values_become_nan(self, store):
+        """Test SIDRA placeholders are stored as NaN."""
+        rows = store.slice("6579", locality_ids=["3301702"], periods=[2021])
+
+        assert np.isnan(rows["value"][0])
+
+    def test_get_latest_values_skips_missing(self, store):
+        """Test latest value per municipality ignores suppressed periods."""
+        latest = store.get_latest_values("6579", "9324", state_id="33")
+
+        assert latest == {"3301702": 924624.0, "3304557": 6775561.0}
+
+    def test_to_sidra_round_trip(self, store):
+        """Test the SIDRA response shape is rebuilt for consumers."""
+        payload = store.to_sidra("6579", locality_ids=["3304557"])
+
+        series = payload[0]["resultados"][0]["series"]
+        assert payload[0]["id"] == "9324"
+        assert series[0]["localidade"]["id"] == "3304557"
+        assert series[0]["serie"] == {"2020": "6747815", "2021": "6775561"}
+
+    def test_unsynced_table_returns_none(self, tmp_path):
+        """Test lookups on an empty store."""
+        store = IBGEIndicatorStore(tmp_path)
+
+        assert store.slice("6579") is None
+        assert store.table_version("6579") is None
+        assert store.get_comprehensive_social_data(state_id="33") is None
+
+    def test_rewrite_replaces_previous_version(self, store, tmp_path):
+        """Test a new version replaces the old directory and is visible."""
+        store.slice("6579")  # open memory maps on the old version
+        store.write_table(
+            "6579", "2022@01/07/2022", _sidra_payload({"3304557": {"2022": "1"}})
+        )
+
+        assert store.table_version("6579") == "2022@01/07/2022"
+        assert store.slice("6579")["value"].tolist() == [1.0]
+        assert len(list((tmp_path / "6579").iterdir())) == 1
+
+    def test_comprehensive_data_served_when_all_tables_synced(self, tmp_path):
+        """Test the client's comprehensive payload is served from the store."""
+        store = IBGEIndicatorStore(tmp_path)
+        for spec in IBGE_BULK_TABLES:
+            variable = spec.variables[0] if spec.variables else "1"
+            store.write_table(
+                spec.table_id, "v1", _sidra_payload(POPULATION, variable), spec.level
+            )
+
+        data = store.get_comprehensive_social_data(state_id="35")
+
+        assert data["served_from"] == "local_store"
+        assert set(data["poverty"]) == {"4099", "4100", "4102"}
+        assert data["errors"] == []
+        series = data["economic"][0]["resultados"][0]["series"]
+        assert [s["localidade"]["id"] for s in series] == ["3550308"]
+
+    def test_national_tables_ignore_locality_filter(self, tmp_path):
+        """Test PNAD/SIS tables synced at N1 are served for any selection."""
+        store = IBGEIndicatorStore(tmp_path)
+        store.write_table(
+            "4100", "v1", _sidra_payload({"1": {"2022": "0.518"}}, "1"), "N1"
+        )
+
+        series = store.to_sidra("4100", state_id="35")[0]["resultados"][0]["series"]
+
+        assert series[0]["localidade"]["nivel"] == {"id": "N1", "nome": "Brasil"}
+        assert series[0]["serie"] == {"2022": "0.518"}
+
+    def test_comprehensive_data_is_partial_while_syncing(self, store):
+        """Test missing tables are reported instead of disabling the store."""
+        data = store.get_comprehensive_social_data(municipality_ids=["3304557"])
+
+        assert data["demographic"]["6579"][0]["id"] == "9324"
+        assert data["poverty"]["4100"] is None
+        assert data["economic"] is None
+        assert "IBGE table 4100 not synced" in data["errors"]
+        assert data["versions"] == {"6579": "2021@01/07/2021"}
+
+
+class TestIBGEBulkSync:
+    """Test version-aware bulk sync."""
+
+    @pytest.mark.asyncio
+    async def test_sync_downloads_then_skips_unchanged(self, tmp_path):
+        """Test a table is only downloaded when its version changes."""
+        client = IBGEClient(timeout=10)
+        client._make_request = AsyncMock(
+            side_effect=[
+                [{"id": "2020", "modificacao": "01/07/2020"}],
+                _sidra_payload(POPULATION),
+                [{"id": "2020", "modificacao": "01/07/2020"}],
+            ]
+        )
+        store = IBGEIndicatorStore(tmp_path)
+        sync = IBGEBulkSync(
+            client, store, tables=(IBGETableSpec("6579", "demographic"),)
+        )
+        sync.request_interval = 0
+
+        first = await sync.sync_all()
+        second = await sync.sync_all()
+
+        assert first["tables"]["6579"]["status"] == "updated"
+        assert second["tables"]["6579"]["status"] == "unchanged"
+        assert client._make_request.await_count == 3
+        download_url = client._make_request.await_args_list[1].args[0]
+        assert download_url.endswith("/periodos/2020/variaveis/all?localidades=N6[all]")
+
+    @pytest.mark.asyncio
+    async def test_survey_tables_sync_at_national_level(self, tmp_path):
+        """Test tables the live client reads at N1 are mirrored at N1."""
+        client = IBGEClient(timeout=10)
+        client._make_request = AsyncMock(
+            side_effect=[
+                [{"id": "2022", "modificacao": "01/12/2023"}],
+                _sidra_payload({"1": {"2022": "0.518"}}, "1"),
+            ]
+        )
+        store = IBGEIndicatorStore(tmp_path)
+        spec = next(s for s in IBGE_BULK_TABLES if s.table_id == "4100")
+
+        await IBGEBulkSync(client, store, tables=(spec,), request_interval=0).sync_all()
+
+        download_url = client._make_request.await_args_list[1].args[0]
+        assert download_url.endswith("?localidades=N1[all]")
+        assert store.table_level("4100") == "N1"
+
+    @pytest.mark.asyncio
+    async def test_sync_records_failures_per_table(self, tmp_path):
+        """Test one failing table does not abort the sync."""
+        client = IBGEClient(timeout=10)
+        client._make_request = AsyncMock(side_effect=RuntimeError("boom"))
+        sync = IBGEBulkSync(
+            client,
+            IBGEIndicatorStore(tmp_path),
+            tables=(IBGETableSpec("6579", "demographic"),),
+            request_interval=0,
+        )
+
+        result = await sync.sync_all()
+
+        assert result["summary"]["failed"] == 1
+        assert result["tables"]["6579"]["error"] == "boom"
+
+    @pytest.mark.asyncio
+    async def test_client_prefers_store(self, tmp_path):
+        """Test IBGEClient answers from the store without HTTP calls."""
+        store = IBGEIndicatorStore(tmp_path)
+        for spec in IBGE_BULK_TABLES:
+            store.write_table(spec.table_id, "v1", _sidra_payload(POPULATION))
+        client = IBGEClient(timeout=10, store=store)
+        client.client.get = AsyncMock()
+
+        data = await client.get_comprehensive_social_data(municipality_ids=["3304557"])
+
+        assert data["served_from"] == "local_store"
+        client.client.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_indicator_lookups_prefer_store(self, store):
+        """Test the per-indicator methods are served locally when possible."""
+        client = IBGEClient(timeout=10, store=store)
+        client._make_request = AsyncMock(return_value=[])
+
+        # Positional arguments: the client's TTL cache keys on them only
+        population = await client.get_population("3550308", 2021)
+        demographic = await client.get_demographic_data(["3304557"], ["6579"])
+        await client.get_population(None, 2021)  # national data is not mirrored
+
+        assert population[0]["resultados"][0]["series"][0]["serie"] == {
+            "2021": "12396372"
+        }
+        assert set(demographic) == {"6579"}
+        assert client._make_request.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_year_not_stored_goes_live(self, store):
+        """Test a year outside the synced periods falls back to the API."""
+        client = IBGEClient(timeout=10, store=store)
+        live = [{"id": "9324", "resultados": []}]
+        client._make_request = AsyncMock(return_value=live)
+
+        assert store.get_tables(["6579"], ["3550308"], periods=[2024]) is None
+        assert store.table_periods("6579") == {2019, 2020, 2021}
+        assert await client.get_population("3550308", 2024) == live
+        assert client._make_request.await_count == 1
@@ -460,3 +460,13 @@ class TestAuthManager:
         assert "user1@example.com" in emails
         assert "user2@example.com" in emails
         assert "user3@example.com" in emails
+
+    def test_auth_manager_get_users_by_ids(self, auth_manager):
+        """Test getting several users by ID at once."""
+        user1 = auth_manager.register_user("user1@example.com", "pass1", "User 1")
+        user2 = auth_manager.register_user("user2@example.com", "pass2", "User 2")
+
+        users = auth_manager.get_users_by_ids([user1.id, user2.id, user1.id, "none"])
+
+        assert set(users) == {user1.id, user2.id}
+        assert users[user2.id].email == "user2@example.com"
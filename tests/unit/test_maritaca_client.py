@@ -184,6 +184,32 @@ class TestMaritacaClient:
             assert len(chunks) == 5
             assert "".join(chunks) == "Olá! Como posso ajudar?"
 
+    @pytest.mark.asyncio
+    async def test_streaming_error_after_tokens_is_not_retried(
+        self, maritaca_client, sample_messages
+    ):
+        """A retry after partial output would send the text twice."""
+
+        async def mock_aiter_lines():
+            yield 'data: {"choices": [{"delta": {"content": "Olá"}}]}'
+            raise ConnectionError("connection reset")
+
+        with patch.object(maritaca_client.client, "stream") as mock_stream:
+            mock_response = AsyncMock()
+            mock_response.status_code = 200
+            mock_response.aiter_lines = mock_aiter_lines
+            mock_stream.return_value.__aenter__.return_value = mock_response
+
+            chunks = []
+            with pytest.raises(LLMError):
+                async for chunk in await maritaca_client.chat_completion(
+                    messages=sample_messages, stream=True
+                ):
+                    chunks.append(chunk)
+
+            assert chunks == ["Olá"]
+            assert mock_stream.call_count == 1
+
     @pytest.mark.asyncio
     async def test_circuit_breaker(self, maritaca_client, sample_messages):
         """Test circuit breaker functionality."""